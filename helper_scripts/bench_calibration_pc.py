@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+"""bench_calibration_pc.py
+PZero© Andrea Bistacchi
+
+Time the plane calibration of point_clouds.calibration_pc on synthetic noisy planar targets with outliers,
+of growing size. The distances from the plane computed with a single dot product (plane_distances) are
+compared with the previous implementation, that called vtkPlane.DistanceToPlane for each point, and the
+robust plane fitted with ransac_plane is compared with the least-squares plane used before, by the angle
+between each of them and the true plane. The previous loop is run only up to --loop-max points.
+
+Usage:
+python helper_scripts/bench_calibration_pc.py [--sizes 100000 1000000 10000000] [--noise 0.01]
+    [--outliers 0.2] [--loop-max 1000000]
+"""
+
+import argparse
+import os
+import sys
+from time import perf_counter
+
+from numpy import abs as np_abs
+from numpy import arccos as np_arccos
+from numpy import array as np_array
+from numpy import column_stack as np_column_stack
+from numpy import degrees as np_degrees
+from numpy import minimum as np_minimum
+from numpy import random as np_random
+from numpy import sqrt as np_sqrt
+from numpy import zeros as np_zeros
+from vtkmodules.vtkCommonDataModel import vtkPlane
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pzero.helpers.helper_functions import best_fitting_plane
+from pzero.point_clouds import plane_distances, ransac_plane
+
+"""Normal of the synthetic target z = x + 2y, pointing downwards."""
+target_normal = np_array([1.0, 2.0, -1.0]) / np_sqrt(6)
+
+
+def make_target(n_points=None, noise=None, outliers=None):
+    """Points on a 10 x 10 m target on the plane z = x + 2y with UTM-like coordinates, with Gaussian noise
+    and a fraction of outliers up to 1 m in front of the plane."""
+    rng = np_random.default_rng(0)
+    xy = rng.uniform(0, 10, (n_points, 2))
+    points = np_column_stack([xy, xy[:, 0] + 2 * xy[:, 1]])
+    points[:, 2] += rng.normal(0, noise, n_points)
+    n_outliers = int(n_points * outliers)
+    points[:n_outliers, 2] += rng.uniform(0.1, 1, n_outliers)
+    return points + [500000, 5000000, 1000]
+
+
+def distances_loop(points=None, center=None, normal=None):
+    """Previous implementation of the distances in calibration_pc, one vtkPlane call per point."""
+    plane = vtkPlane()
+    plane.SetOrigin(center)
+    plane.SetNormal(normal)
+    distances = np_zeros(len(points))
+    for i, point in enumerate(points):
+        distances[i] = plane.DistanceToPlane(point)
+    return distances
+
+
+def angle(normal=None):
+    """Angle in degrees between an unoriented normal and the normal of the target."""
+    return np_degrees(np_arccos(np_minimum(np_abs(normal @ target_normal), 1)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[100000, 1000000, 10000000]
+    )
+    parser.add_argument("--noise", type=float, default=0.01)
+    parser.add_argument("--outliers", type=float, default=0.2)
+    parser.add_argument("--loop-max", type=int, default=1000000)
+    args = parser.parse_args()
+
+    print(
+        f"{'points':>11} {'loop s':>8} {'dot s':>8} {'max diff':>9} {'lsq s':>7}"
+        f" {'lsq deg':>8} {'ransac s':>9} {'ransac deg':>11}"
+    )
+    for n_points in args.sizes:
+        points = make_target(
+            n_points=n_points, noise=args.noise, outliers=args.outliers
+        )
+        start_time = perf_counter()
+        center, normal = best_fitting_plane(points)
+        lsq_s = perf_counter() - start_time
+        start_time = perf_counter()
+        distances = plane_distances(points=points, center=center, normal=normal)
+        dot_s = perf_counter() - start_time
+        if n_points <= args.loop_max:
+            start_time = perf_counter()
+            loop_distances = distances_loop(points=points, center=center, normal=normal)
+            loop_s = f"{perf_counter() - start_time:8.2f}"
+            max_diff = f"{np_abs(np_abs(distances) - loop_distances).max():9.1e}"
+        else:
+            loop_s, max_diff = f"{'skipped':>8}", f"{'':>9}"
+        start_time = perf_counter()
+        _, ransac_normal, _, _ = ransac_plane(points=points, seed=0)
+        ransac_s = perf_counter() - start_time
+        print(
+            f"{n_points:11d} {loop_s} {dot_s:8.3f} {max_diff} {lsq_s:7.2f}"
+            f" {angle(normal=normal):8.3f} {ransac_s:9.2f} {angle(normal=ransac_normal):11.4f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
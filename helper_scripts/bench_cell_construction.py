@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+"""bench_cell_construction.py
+PZero© Andrea Bistacchi
+
+Compare the construction of vertex, line and triangle cells with vtkCellArray.SetData, setting the offsets and
+connectivity arrays at once, with the insertion of cells one by one with InsertNextCell used before, and time
+VertexSet.auto_cells, PolyLine.auto_cells and the TriSurf.cells setter as the number of cells grows.
+
+Usage:
+python helper_scripts/bench_cell_construction.py [--sizes 10000 100000 1000000]
+"""
+
+import argparse
+import os
+import sys
+from time import perf_counter
+
+from numpy import arange as np_arange
+from numpy import column_stack as np_column_stack
+from numpy import random as np_random
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pzero.entities_factory import PolyLine, TriSurf, VertexSet, cells_to_vtk
+
+
+def time_call(function=None):
+    """Time of function() in milliseconds."""
+    start = perf_counter()
+    function()
+    return (perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[10000, 100000, 1000000]
+    )
+    args = parser.parse_args()
+
+    rng = np_random.default_rng(0)
+    print(
+        f"{'cells':>8} {'type':>9} {'loop':>10} {'SetData':>10} {'speedup':>8} {'entity':>10}"
+        "   (milliseconds)"
+    )
+    for n_cells in args.sizes:
+        point_ids = np_arange(n_cells + 1)
+        points = rng.random((n_cells + 1, 3))
+        vertex_set = VertexSet()
+        vertex_set.points = points
+        poly_line = PolyLine()
+        poly_line.points = points
+        tri_surf = TriSurf()
+        tri_surf.points = points
+        triangles = rng.integers(0, n_cells + 1, (n_cells, 3))
+
+        def set_triangles():
+            tri_surf.cells = triangles
+
+        for cell_type, cells_matrix, entity_method in [
+            ("vertex", point_ids[:-1, None], vertex_set.auto_cells),
+            (
+                "line",
+                np_column_stack((point_ids[:-1], point_ids[1:])),
+                poly_line.auto_cells,
+            ),
+            ("triangle", triangles, set_triangles),
+        ]:
+            loop_ms = time_call(
+                lambda: cells_to_vtk(cells_matrix=cells_matrix, set_data=False)
+            )
+            set_data_ms = time_call(
+                lambda: cells_to_vtk(cells_matrix=cells_matrix, set_data=True)
+            )
+            entity_ms = time_call(entity_method)
+            print(
+                f"{n_cells:8d} {cell_type:>9} {loop_ms:10.1f} {set_data_ms:10.1f} "
+                f"{loop_ms / set_data_ms:8.1f} {entity_ms:10.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+"""bench_collection_lookup.py
+PZero© Andrea Bistacchi
+
+Compare the cost of the get_uid_* and set_uid_* accessors of a collection, found through the uid hash
+index of BaseCollection, with the linear scan df.loc[df["uid"] == uid, column] used before, as the number
+of entities in the collection grows.
+
+Usage:
+python helper_scripts/bench_collection_lookup.py [--sizes 100 1000 10000 100000] [--lookups 2000]
+"""
+
+import argparse
+import os
+import sys
+from time import perf_counter
+
+from numpy import random as np_random
+from pandas import DataFrame as pd_DataFrame
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pzero.collections.geological_collection import GeologicalCollection
+
+
+def make_collection(n_entities=None):
+    """GeologicalCollection with n_entities rows. The dataframe is built at once, since
+    add_entity_from_dict would also update the legend of a project window."""
+    collection = GeologicalCollection(parent=None)
+    rows = []
+    for i in range(n_entities):
+        entity_dict = dict(GeologicalCollection.geological_entity_dict)
+        entity_dict["uid"] = "uid_" + str(i)
+        entity_dict["name"] = "name_" + str(i)
+        entity_dict["properties_names"] = []
+        entity_dict["properties_components"] = []
+        rows.append(entity_dict)
+    collection.df = pd_DataFrame(rows, columns=list(collection.df.columns))
+    return collection
+
+
+def time_per_call(function=None, uids=None):
+    """Mean time of function(uid) in microseconds."""
+    start = perf_counter()
+    for uid in uids:
+        function(uid)
+    return (perf_counter() - start) / len(uids) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[100, 1000, 10000, 100000]
+    )
+    parser.add_argument("--lookups", type=int, default=2000)
+    args = parser.parse_args()
+
+    rng = np_random.default_rng(0)
+    print(
+        f"{'entities':>9} {'scan get':>10} {'index get':>10} {'scan set':>10} {'index set':>10}"
+        "   (microseconds per call)"
+    )
+    for n_entities in args.sizes:
+        collection = make_collection(n_entities=n_entities)
+        uids = ["uid_" + str(i) for i in rng.integers(0, n_entities, args.lookups)]
+        df = collection.df
+
+        def scan_get(uid):
+            return df.loc[df["uid"] == uid, "name"].values[0]
+
+        def scan_set(uid):
+            df.loc[df["uid"] == uid, "scenario"] = "scan"
+
+        """The first lookup builds the index."""
+        collection.get_uid_name(uids[0])
+        scan_get_us = time_per_call(function=scan_get, uids=uids)
+        index_get_us = time_per_call(function=collection.get_uid_name, uids=uids)
+        scan_set_us = time_per_call(function=scan_set, uids=uids)
+        index_set_us = time_per_call(
+            function=lambda uid: collection.set_uid_scenario(uid=uid, scenario="index"),
+            uids=uids,
+        )
+        print(
+            f"{n_entities:9d} {scan_get_us:10.1f} {index_get_us:10.1f} "
+            f"{scan_set_us:10.1f} {index_set_us:10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
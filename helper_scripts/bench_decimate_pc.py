@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+"""bench_decimate_pc.py
+PZero© Andrea Bistacchi
+
+Compare the decimation modes of point_clouds.decimate_pc (random, voxel and poisson) with the previous
+implementation, that filled a vtkIdTypeArray one id at a time and extracted the points with a
+vtkExtractSelection filter, on synthetic point clouds of growing size. The previous implementation is run
+only up to --loop-max points, since it takes minutes on larger clouds.
+
+Usage:
+python helper_scripts/bench_decimate_pc.py [--sizes 1000000 10000000 100000000] [--fac 0.1]
+    [--voxel-size 1.0] [--radius 1.0] [--loop-max 10000000]
+"""
+
+import argparse
+import os
+import sys
+from time import perf_counter
+
+from numpy import random as np_random
+from vtkmodules.vtkCommonCore import vtkIdTypeArray
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from helper_scripts.bench_lod_octree import make_pc_dom
+from pzero.point_clouds import decimate_pc, extract_id
+
+
+def decimate_pc_loop(vtk_obj=None, fac=None):
+    """Previous implementation of decimate_pc, with ids drawn with replacement and added one at a time."""
+    dec_fac = int(vtk_obj.GetNumberOfPoints() * fac)
+    random = np_random.choice(vtk_obj.GetNumberOfPoints(), dec_fac)
+    ids = vtkIdTypeArray()
+    for i in random:
+        ids.InsertNextValue(i)
+    return extract_id(vtk_obj, ids)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[1000000, 10000000, 100000000]
+    )
+    parser.add_argument("--fac", type=float, default=0.1)
+    parser.add_argument("--voxel-size", type=float, default=1.0)
+    parser.add_argument("--radius", type=float, default=1.0)
+    parser.add_argument("--loop-max", type=int, default=10000000)
+    args = parser.parse_args()
+
+    modes = {
+        "loop": lambda pc_dom: decimate_pc_loop(vtk_obj=pc_dom, fac=args.fac),
+        "random": lambda pc_dom: decimate_pc(pc_dom, fac=args.fac, seed=0),
+        "voxel": lambda pc_dom: decimate_pc(
+            pc_dom, mode="voxel", voxel_size=args.voxel_size
+        ),
+        "poisson": lambda pc_dom: decimate_pc(
+            pc_dom, mode="poisson", radius=args.radius, seed=0
+        ),
+    }
+    print(f"{'points':>11} {'mode':>8} {'seconds':>9} {'kept':>11}")
+    for n_points in args.sizes:
+        pc_dom = make_pc_dom(n_points=n_points)
+        for mode, function in modes.items():
+            if mode == "loop" and n_points > args.loop_max:
+                print(f"{n_points:11d} {mode:>8} {'skipped':>9}")
+                continue
+            start_time = perf_counter()
+            decimated = function(pc_dom)
+            seconds = perf_counter() - start_time
+            print(
+                f"{n_points:11d} {mode:>8} {seconds:9.2f} {decimated.GetNumberOfPoints():11d}"
+            )
+            del decimated
+        del pc_dom
+
+
+if __name__ == "__main__":
+    main()
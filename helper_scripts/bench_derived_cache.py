@@ -0,0 +1,107 @@
+#!/usr/bin/env python
+"""bench_derived_cache.py
+PZero© Andrea Bistacchi
+
+Time repeated reads of the points_map_* properties and of cell_centers on triangulated surfaces with Normals
+and Lineations, as done by stereoplots, legends and exports, with the derived data cache of PolyData and
+without it (recomputing at every read, and with the list comprehension used before for cell_centers).
+The hit and miss counters of the cache are printed for each size.
+
+Usage:
+python helper_scripts/bench_derived_cache.py [--sizes 10000 100000 1000000] [--reads 10]
+"""
+
+import argparse
+import os
+import sys
+from time import perf_counter
+
+from numpy import array as np_array
+from numpy import random as np_random
+from vtk import vtkCellCenters
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pzero.entities_factory import TriSurf, derived_cache_stats
+
+derived_names = [
+    "points_map_dip_azimuth",
+    "points_map_dip",
+    "points_map_trend",
+    "points_map_plunge",
+]
+
+
+def make_trisurf(n_points=None, seed=0):
+    """TriSurf with n_points random points, as many random triangles, and unit Normals and Lineations."""
+    rng = np_random.default_rng(seed)
+    trisurf = TriSurf()
+    trisurf.points = rng.random((n_points, 3))
+    trisurf.cells = rng.integers(0, n_points, (n_points, 3))
+    for data_key in ["Normals", "Lineations"]:
+        vectors = rng.normal(size=(n_points, 3))
+        vectors /= ((vectors**2).sum(axis=1) ** 0.5)[:, None]
+        trisurf.init_point_data(data_key, 3)
+        trisurf.set_point_data(data_key, vectors)
+    return trisurf
+
+
+def loop_cell_centers(trisurf=None):
+    """cell_centers as implemented before, reading the centers point by point."""
+    vtk_cell_ctrs = vtkCellCenters()
+    vtk_cell_ctrs.SetInputData(trisurf)
+    vtk_cell_ctrs.Update()
+    point_ctrs = vtk_cell_ctrs.GetOutput()
+    return np_array(
+        [point_ctrs.GetPoint(i) for i in range(point_ctrs.GetNumberOfPoints())]
+    )
+
+
+def time_reads(function=None, reads=None):
+    """Total time of reads calls of function() in milliseconds."""
+    start = perf_counter()
+    for _ in range(reads):
+        function()
+    return (perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[10000, 100000, 1000000]
+    )
+    parser.add_argument("--reads", type=int, default=10)
+    args = parser.parse_args()
+
+    print(
+        f"{'points':>8} {'map uncached':>13} {'map cached':>11} {'ctrs loop':>10} {'ctrs cached':>12}"
+        f" {'hits':>6} {'misses':>6}   (milliseconds for {args.reads} reads)"
+    )
+    for n_points in args.sizes:
+        trisurf = make_trisurf(n_points=n_points)
+        derived_cache_stats["hits"] = derived_cache_stats["misses"] = 0
+
+        def read_uncached():
+            for name in derived_names:
+                getattr(TriSurf, name).fget.__wrapped__(trisurf)
+
+        def read_cached():
+            for name in derived_names:
+                getattr(trisurf, name)
+
+        uncached_ms = time_reads(function=read_uncached, reads=args.reads)
+        cached_ms = time_reads(function=read_cached, reads=args.reads)
+        loop_ctrs_ms = time_reads(
+            function=lambda: loop_cell_centers(trisurf=trisurf), reads=args.reads
+        )
+        cached_ctrs_ms = time_reads(
+            function=lambda: trisurf.cell_centers, reads=args.reads
+        )
+        print(
+            f"{n_points:8d} {uncached_ms:13.1f} {cached_ms:11.1f} {loop_ctrs_ms:10.1f} {cached_ctrs_ms:12.1f}"
+            f" {derived_cache_stats['hits']:6d} {derived_cache_stats['misses']:6d}"
+        )
+
+
+if __name__ == "__main__":
+    main()
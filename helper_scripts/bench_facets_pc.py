@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+"""bench_facets_pc.py
+PZero© Andrea Bistacchi
+
+Compare the facets of point_clouds.facets_pc, built with cluster_planes.build_facets on the calling thread
+and with pools of worker processes, with the previous implementation, that extracted each cluster with a
+vtkThresholdPoints filter and triangulated it with vtkDelaunay2D. Synthetic point clouds are segmented in
+square clusters of growing number. The previous implementation is run only up to --loop-max clusters, since
+it scans the whole cloud for each cluster.
+
+Usage:
+python helper_scripts/bench_facets_pc.py [--points 1000000] [--clusters 100 1000 10000]
+    [--workers 0 1 2 4] [--loop-max 1000]
+"""
+
+import argparse
+import os
+import sys
+from time import perf_counter
+
+from numpy import floor as np_floor
+from numpy import int64 as np_int64
+from numpy import sqrt as np_sqrt
+from vtkmodules.util import numpy_support
+from vtkmodules.vtkFiltersCore import (
+    vtkAppendPolyData,
+    vtkDelaunay2D,
+    vtkMassProperties,
+    vtkThresholdPoints,
+)
+from vtkmodules.vtkFiltersPoints import vtkProjectPointsToPlane
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from helper_scripts.bench_lod_octree import cloud_size, make_pc_dom
+from pzero.cluster_planes import build_facets
+from pzero.helpers.helper_functions import best_fitting_plane
+
+
+def facets_loop(vtk_obj=None):
+    """Previous implementation of facets_pc, without the field data, one cluster at a time."""
+    appender = vtkAppendPolyData()
+    vtk_obj.GetPointData().SetActiveScalars("ClusterId")
+    for region in set(vtk_obj.get_point_data("ClusterId")):
+        thresh = vtkThresholdPoints()
+        thresh.SetInputData(vtk_obj)
+        thresh.ThresholdBetween(region, region)
+        thresh.Update()
+        points = numpy_support.vtk_to_numpy(thresh.GetOutput().GetPoints().GetData())
+        c, n = best_fitting_plane(points)
+        if n[2] >= 0:
+            n *= -1
+        proj = vtkProjectPointsToPlane()
+        proj.SetInputData(thresh.GetOutput())
+        proj.SetProjectionTypeToSpecifiedPlane()
+        proj.SetNormal(n)
+        proj.SetOrigin(c)
+        delaunay = vtkDelaunay2D()
+        delaunay.SetInputConnection(proj.GetOutputPort())
+        delaunay.SetProjectionPlaneMode(2)
+        delaunay.Update()
+        mass = vtkMassProperties()
+        mass.SetInputData(delaunay.GetOutput())
+        mass.GetSurfaceArea()
+        appender.AddInputData(delaunay.GetOutput())
+    appender.Update()
+    return appender.GetOutput()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--points", type=int, default=1000000)
+    parser.add_argument("--clusters", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--workers", type=int, nargs="+", default=[0, 1, 2, 4])
+    parser.add_argument("--loop-max", type=int, default=1000)
+    args = parser.parse_args()
+
+    pc_dom = make_pc_dom(n_points=args.points)
+    print(f"{args.points} points, {os.cpu_count()} CPUs")
+    print(
+        f"{'clusters':>9} {'mode':>10} {'seconds':>9} {'speed-up':>9} {'triangles':>10}"
+    )
+    for n_clusters in args.clusters:
+        side = cloud_size / int(np_sqrt(n_clusters))
+        cells = np_floor(pc_dom.points[:, :2] / side).astype(np_int64)
+        cluster_ids = cells[:, 0] * int(np_sqrt(n_clusters)) + cells[:, 1]
+        pc_dom.set_point_data("ClusterId", cluster_ids)
+        reference = None
+        if n_clusters <= args.loop_max:
+            start_time = perf_counter()
+            facets = facets_loop(vtk_obj=pc_dom)
+            reference = perf_counter() - start_time
+            print(
+                f"{n_clusters:9d} {'loop':>10} {reference:9.2f} {1:9.1f} {facets.GetNumberOfCells():10d}"
+            )
+        else:
+            print(f"{n_clusters:9d} {'loop':>10} {'skipped':>9}")
+        for workers in args.workers:
+            start_time = perf_counter()
+            result = build_facets(
+                points=pc_dom.points, cluster_ids=cluster_ids, workers=workers
+            )
+            seconds = perf_counter() - start_time
+            if reference is None:
+                reference = seconds
+            print(
+                f"{n_clusters:9d} {f'workers {workers}':>10} {seconds:9.2f}"
+                f" {reference / seconds:9.1f} {len(result['triangles']):10d}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+#!/usr/bin/env python
+"""bench_gocad2vtk.py
+PZero© Andrea Bistacchi
+
+Time the import and export of GOCAD ASCII TSurf files of growing size, with a PVRTX scalar property, as
+done in gocad2vtk and vtk2gocad. The bulk parser (read_gocad and gocad_vtk_obj) is compared with the
+previous line by line parser, that split each line in Python and inserted each vertex, property value and
+triangle in VTK one at a time. Both the points and triangles imported are checked to be the same, with the
+points of the bulk parser, kept in float64, rounded to the float32 of the previous parser. The chunked
+writer (write_gocad) is compared with the previous writer, that formatted each number of each line in
+Python, and the file it writes is checked to be read back exactly. The previous parser and writer are run
+only up to --loop-max vertices.
+
+Usage:
+python helper_scripts/bench_gocad2vtk.py [--sizes 100000 1000000 4000000] [--loop-max 1000000]
+    [--folder /tmp]
+"""
+
+import argparse
+import os
+import sys
+from time import perf_counter
+
+from numpy import arange as np_arange
+from numpy import array_equal as np_array_equal
+from numpy import column_stack as np_column_stack
+from numpy import concatenate as np_concatenate
+from numpy import float32 as np_float32
+from numpy import random as np_random
+from numpy import savetxt as np_savetxt
+from numpy import sqrt as np_sqrt
+from vtk import vtkCellArray, vtkFloatArray, vtkPoints, vtkTriangle
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pzero.entities_factory import TriSurf
+from pzero.imports.gocad2vtk import gocad_vtk_obj, read_gocad, write_gocad
+
+
+def write_tsurf(path=None, n_vertices=None):
+    """Write a TSurf on a square grid of about n_vertices vertices, with UTM-like coordinates and a
+    scalar property, as exported by common geomodelling software. Returns the number of vertices.
+    """
+    side = int(np_sqrt(n_vertices))
+    rng = np_random.default_rng(0)
+    i, j = np_arange(side * side) % side, np_arange(side * side) // side
+    vertices = np_column_stack(
+        [
+            np_arange(side * side) + 1,
+            500000 + i * 2.5,
+            5000000 + j * 2.5,
+            rng.uniform(0, 1000, side * side),
+            rng.uniform(0, 1, side * side),
+        ]
+    )
+    cells = (i + j * side)[(i < side - 1) & (j < side - 1)] + 1
+    triangles = np_concatenate(
+        [
+            np_column_stack([cells, cells + 1, cells + side]),
+            np_column_stack([cells + 1, cells + side + 1, cells + side]),
+        ]
+    )
+    with open(path, "w") as fout:
+        fout.write("GOCAD TSurf 1\nHEADER {\nname: bench\n}\n")
+        fout.write("PROPERTIES value\nESIZES 1\nTFACE\n")
+        np_savetxt(fout, vertices, fmt="PVRTX %d %.3f %.3f %.3f %.6f")
+        np_savetxt(fout, triangles, fmt="TRGL %d %d %d")
+        fout.write("END\n")
+    return side * side
+
+
+def gocad_loop(in_file_name=None):
+    """Previous implementation of the parsing in gocad2vtk, reduced to the lines used by this benchmark."""
+    tri_surf = TriSurf()
+    points = vtkPoints()
+    cells = vtkCellArray()
+    values = vtkFloatArray()
+    values.SetName("value")
+    values.SetNumberOfComponents(1)
+    with open(in_file_name, "rt") as fin:
+        for line in fin:
+            clean_line = line.strip().split()
+            if clean_line[0] == "PVRTX":
+                points.InsertPoint(
+                    int(clean_line[1]) - 1,
+                    float(clean_line[2]),
+                    float(clean_line[3]),
+                    float(clean_line[4]),
+                )
+                values.InsertTuple1(int(clean_line[1]) - 1, float(clean_line[5]))
+            elif clean_line[0] == "TRGL":
+                triangle = vtkTriangle()
+                for k in range(3):
+                    triangle.GetPointIds().SetId(k, int(clean_line[k + 1]) - 1)
+                cells.InsertNextCell(triangle)
+    tri_surf.SetPoints(points)
+    tri_surf.SetPolys(cells)
+    tri_surf.GetPointData().AddArray(values)
+    return tri_surf
+
+
+def gocad_bulk(in_file_name=None):
+    """Current implementation of the parsing in gocad2vtk."""
+    tri_surf = TriSurf()
+    gocad_vtk_obj(gocad_object=read_gocad(in_file_name)[0], vtk_obj=tri_surf)
+    return tri_surf
+
+
+def gocad_write_loop(out_file_name=None, tri_surf=None):
+    """Previous implementation of the writing of VRTX and TRGL lines in vtk2gocad."""
+    pvrtx_mtx = np_column_stack([tri_surf.points, tri_surf.get_point_data("value")])
+    connectivity = tri_surf.cells
+    with open(out_file_name, "w") as fout:
+        fout.write("GOCAD TSurf 1\nHEADER {\nname: bench\n}\n")
+        fout.write("PROPERTIES value\nESIZES 1\nTFACE\n")
+        for row in range(pvrtx_mtx.shape[0]):
+            data_row = " ".join(["{}".format(cell) for cell in pvrtx_mtx[row, :]])
+            fout.write("PVRTX " + str(row + 1) + " " + data_row + "\n")
+        for row in range(connectivity.shape[0]):
+            data_row = " ".join(
+                ["{}".format(cell + 1) for cell in connectivity[row, :]]
+            )
+            fout.write("TRGL " + data_row + "\n")
+        fout.write("END\n")
+
+
+def gocad_write_bulk(out_file_name=None, tri_surf=None):
+    """Current implementation of the writing in vtk2gocad."""
+    write_gocad(
+        out_file_name=out_file_name,
+        gocad_objects=[
+            {
+                "type": "TSurf",
+                "name": "bench",
+                "properties_names": ["value"],
+                "properties_components": [1],
+                "points": tri_surf.points,
+                "properties": [tri_surf.get_point_data("value")],
+                "triangles": tri_surf.cells,
+            }
+        ],
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[100000, 1000000, 4000000]
+    )
+    parser.add_argument("--loop-max", type=int, default=1000000)
+    parser.add_argument("--folder", default="/tmp")
+    args = parser.parse_args()
+
+    print(
+        f"{'vertices':>10} {'MB':>7} {'read loop s':>12} {'read bulk s':>12} {'speed-up':>9}"
+        f" {'write loop s':>13} {'write bulk s':>13} {'speed-up':>9}"
+    )
+    for n_vertices in args.sizes:
+        path = os.path.join(args.folder, f"bench_gocad2vtk_{n_vertices}.ts")
+        n_vertices = write_tsurf(path=path, n_vertices=n_vertices)
+        size_mb = os.path.getsize(path) / 1e6
+        start_time = perf_counter()
+        bulk = gocad_bulk(in_file_name=path)
+        read_bulk_s = perf_counter() - start_time
+        start_time = perf_counter()
+        gocad_write_bulk(out_file_name=path, tri_surf=bulk)
+        write_bulk_s = perf_counter() - start_time
+        written = read_gocad(in_file_name=path)[0]
+        assert np_array_equal(written["points"], bulk.points)
+        assert np_array_equal(written["triangles"], bulk.cells)
+        assert np_array_equal(written["properties"][0], bulk.get_point_data("value"))
+        if n_vertices <= args.loop_max:
+            start_time = perf_counter()
+            loop = gocad_loop(in_file_name=path)
+            read_loop_s = perf_counter() - start_time
+            assert np_array_equal(loop.points, bulk.points.astype(np_float32))
+            assert np_array_equal(loop.cells, bulk.cells)
+            assert np_array_equal(
+                loop.get_point_data("value"), bulk.get_point_data("value")
+            )
+            start_time = perf_counter()
+            gocad_write_loop(out_file_name=path, tri_surf=bulk)
+            write_loop_s = perf_counter() - start_time
+            print(
+                f"{n_vertices:10d} {size_mb:7.1f} {read_loop_s:12.2f} {read_bulk_s:12.2f}"
+                f" {read_loop_s / read_bulk_s:9.1f} {write_loop_s:13.2f}"
+                f" {write_bulk_s:13.2f} {write_loop_s / write_bulk_s:9.1f}"
+            )
+        else:
+            print(
+                f"{n_vertices:10d} {size_mb:7.1f} {'skipped':>12} {read_bulk_s:12.2f}"
+                f" {'':>9} {'skipped':>13} {write_bulk_s:13.2f}"
+            )
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+#!/usr/bin/env python
+"""bench_lod_octree.py
+PZero© Andrea Bistacchi
+
+Measure the frame time of point clouds shown through their level of detail octree (see lod_octree.py), as
+the number of points grows. For each size, a synthetic point cloud is built, its octree is written to a
+temporary folder and memory-mapped, and the camera flies from a view of the whole cloud to a close view of
+one corner. For each frame, the time to select the nodes, to read their points and to render them is
+measured, with the number of points shown. With --full, the whole cloud is also rendered for comparison.
+
+Rendering needs an OpenGL context: without a display (e.g. on a headless server without OSMesa or EGL)
+use --no-render to measure selection and reading only.
+
+Usage:
+python helper_scripts/bench_lod_octree.py [--sizes 10000000 50000000 100000000] [--frames 20]
+    [--point-budget 2000000] [--dtype float32] [--full] [--no-render]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+from shutil import rmtree
+from time import perf_counter
+
+from numpy import array as np_array
+from numpy import empty as np_empty
+from numpy import float32 as np_float32
+from numpy import float64 as np_float64
+from numpy import random as np_random
+from numpy import sin as np_sin
+from pyvista import Plotter as pv_Plotter
+from vtk import vtkCamera
+from vtkmodules.util.numpy_support import numpy_to_vtk
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pzero.entities_factory import PCDom
+from pzero.lod_octree import LodOctree
+
+"""Side of the synthetic cloud, in metres."""
+cloud_size = 1000.0
+
+
+def make_pc_dom(n_points=None, dtype=None, chunk_size=10000000):
+    """PCDom with n_points on a wavy surface and an Intensity property, generated chunk by chunk."""
+    rng = np_random.default_rng(0)
+    points = np_empty((n_points, 3), dtype=dtype)
+    intensity = np_empty(n_points, dtype=np_float32)
+    for first in range(0, n_points, chunk_size):
+        last = min(first + chunk_size, n_points)
+        xy = rng.uniform(0, cloud_size, (last - first, 2))
+        points[first:last, :2] = xy
+        points[first:last, 2] = 20 * np_sin(xy[:, 0] / 50) * np_sin(xy[:, 1] / 70)
+        intensity[first:last] = rng.uniform(0, 1, last - first)
+    pc_dom = PCDom()
+    pc_dom.points = points
+    pc_dom.generate_cells()
+    vtk_array = numpy_to_vtk(intensity, deep=True)
+    vtk_array.SetName("Intensity")
+    pc_dom.GetPointData().AddArray(vtk_array)
+    return pc_dom
+
+
+def camera_path(camera=None, n_frames=None):
+    """Yield once per frame, moving camera from above the whole cloud down to a corner."""
+    start = np_array([cloud_size / 2, cloud_size / 2, 0.0])
+    stop = np_array([cloud_size / 10, cloud_size / 10, 0.0])
+    for frame in range(n_frames):
+        t = frame / max(n_frames - 1, 1)
+        focal_point = start + (stop - start) * t
+        height = 2 * cloud_size * (1 - t) + cloud_size / 50 * t
+        camera.SetFocalPoint(*focal_point)
+        camera.SetPosition(
+            focal_point[0], focal_point[1] - height / 2, focal_point[2] + height
+        )
+        camera.SetViewUp(0, 1, 0)
+        camera.SetClippingRange(height / 100, height * 10)
+        yield
+
+
+def bench_size(n_points=None, args=None, plotter=None):
+    start_time = perf_counter()
+    pc_dom = make_pc_dom(n_points=n_points, dtype=args.dtype)
+    make_s = perf_counter() - start_time
+
+    dir_name = tempfile.mkdtemp(prefix="bench_lod_")
+    try:
+        start_time = perf_counter()
+        octree = LodOctree.from_pcdom(
+            vtk_obj=pc_dom, dir_name=os.path.join(dir_name, "lod")
+        )
+        build_s = perf_counter() - start_time
+
+        full_ms = None
+        if args.full and plotter is not None:
+            plotter.add_mesh(pc_dom, name="cloud", scalars="Intensity")
+            plotter.view_xy()
+            plotter.render()
+            start_time = perf_counter()
+            for _ in range(3):
+                plotter.render()
+            full_ms = (perf_counter() - start_time) / 3 * 1000
+            plotter.remove_actor("cloud")
+        del pc_dom
+
+        if plotter is not None:
+            camera = plotter.camera
+        else:
+            camera = vtkCamera()
+        frames = []
+        for _ in camera_path(camera=camera, n_frames=args.frames):
+            start_time = perf_counter()
+            node_ids = octree.select_nodes(
+                camera=camera,
+                viewport_size=args.window_size,
+                point_budget=args.point_budget,
+            )
+            select_ms = (perf_counter() - start_time) * 1000
+            start_time = perf_counter()
+            point_cloud = octree.node_pcdom(node_ids)
+            read_ms = (perf_counter() - start_time) * 1000
+            render_ms = 0.0
+            if plotter is not None:
+                start_time = perf_counter()
+                plotter.add_mesh(
+                    point_cloud, name="cloud", scalars="Intensity", reset_camera=False
+                )
+                plotter.render()
+                render_ms = (perf_counter() - start_time) * 1000
+            frames.append(
+                (select_ms, read_ms, render_ms, point_cloud.GetNumberOfPoints())
+            )
+        if plotter is not None:
+            plotter.remove_actor("cloud")
+    finally:
+        rmtree(dir_name, ignore_errors=True)
+
+    frame_ms = [select + read + render for select, read, render, _ in frames]
+    print(
+        f"{n_points:11d} {make_s:7.1f} {build_s:8.1f} {octree.nodes.size:7d}"
+        f" {sum(f[0] for f in frames) / len(frames):9.2f}"
+        f" {sum(f[1] for f in frames) / len(frames):8.1f}"
+        f" {sum(f[2] for f in frames) / len(frames):9.1f}"
+        f" {sum(frame_ms) / len(frame_ms):9.1f} {max(frame_ms):8.1f}"
+        f" {max(f[3] for f in frames):10d}"
+        + (f" {full_ms:9.1f}" if full_ms is not None else "")
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[10000000, 50000000, 100000000]
+    )
+    parser.add_argument("--frames", type=int, default=20)
+    parser.add_argument("--point-budget", type=int, default=2000000)
+    parser.add_argument("--window-size", type=int, nargs=2, default=[1600, 1000])
+    parser.add_argument(
+        "--dtype",
+        choices=["float32", "float64"],
+        default="float32",
+        help="type of the coordinates, float32 as imported with points_dtype",
+    )
+    parser.add_argument(
+        "--full", action="store_true", help="also render the whole point cloud"
+    )
+    parser.add_argument("--no-render", action="store_true")
+    args = parser.parse_args()
+    args.dtype = {"float32": np_float32, "float64": np_float64}[args.dtype]
+    args.window_size = tuple(args.window_size)
+
+    plotter = None
+    if not args.no_render:
+        plotter = pv_Plotter(off_screen=True, window_size=list(args.window_size))
+
+    print(
+        f"{'points':>11} {'make s':>7} {'build s':>8} {'nodes':>7} {'select ms':>9}"
+        f" {'read ms':>8} {'render ms':>9} {'frame ms':>9} {'max ms':>8} {'max shown':>10}"
+        + (f" {'full ms':>9}" if args.full and plotter is not None else "")
+    )
+    for n_points in args.sizes:
+        bench_size(n_points=n_points, args=args, plotter=plotter)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+"""bench_neighbour_filters.py
+PZero© Andrea Bistacchi
+
+Time the neighbourhood filters of point_clouds.py (radial outliers, surface density, roughness, curvature
+and colour filter) on synthetic point clouds of growing size. The KD-tree of each cloud is built once, by
+the first filter, and reused by the following ones, so its build time is shown separately.
+
+Usage:
+python helper_scripts/bench_neighbour_filters.py [--sizes 100000 1000000 10000000] [--radius 2.0] [--k 30]
+"""
+
+import argparse
+import os
+import sys
+from time import perf_counter
+
+from numpy import random as np_random
+from numpy import uint8 as np_uint8
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from helper_scripts.bench_lod_octree import make_pc_dom
+from pzero.point_clouds import (
+    colour_filter,
+    curvature,
+    radial_outliers,
+    roughness,
+    surface_density,
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[100000, 1000000, 10000000]
+    )
+    parser.add_argument("--radius", type=float, default=2.0)
+    parser.add_argument("--k", type=int, default=30)
+    args = parser.parse_args()
+
+    filters = {
+        "radial": lambda pc_dom: radial_outliers(
+            vtk_obj=pc_dom, radius=args.radius, min_neighbours=3
+        ),
+        "density": lambda pc_dom: surface_density(vtk_obj=pc_dom, radius=args.radius),
+        "roughness": lambda pc_dom: roughness(
+            vtk_obj=pc_dom, radius=args.radius, k=args.k
+        ),
+        "curvature": lambda pc_dom: curvature(
+            vtk_obj=pc_dom, radius=args.radius, k=args.k
+        ),
+        "colour": lambda pc_dom: colour_filter(
+            vtk_obj=pc_dom, property_name="RGB", radius=args.radius, k=args.k
+        ),
+    }
+    print(
+        f"{'points':>11} {'tree':>10}"
+        + "".join(f" {name:>10}" for name in filters)
+        + "   (seconds)"
+    )
+    for n_points in args.sizes:
+        pc_dom = make_pc_dom(n_points=n_points)
+        pc_dom.set_point_data(
+            "RGB",
+            np_random.default_rng(0).integers(0, 255, (n_points, 3)).astype(np_uint8),
+        )
+        start_time = perf_counter()
+        pc_dom.kd_tree
+        times = [perf_counter() - start_time]
+        for function in filters.values():
+            start_time = perf_counter()
+            function(pc_dom)
+            times.append(perf_counter() - start_time)
+        print(f"{n_points:11d}" + "".join(f" {time:10.2f}" for time in times))
+        del pc_dom
+
+
+if __name__ == "__main__":
+    main()
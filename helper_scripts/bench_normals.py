@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+"""bench_normals.py
+PZero© Andrea Bistacchi
+
+Compare the multi-scale normals of point_clouds.estimate_normals, used by PCDom.vtk_set_normals, with the
+previous vtkPCANormalEstimation filter (15 neighbours, graph traversal orientation) on synthetic noisy
+point clouds of growing size. Besides the time, the median and 95th percentile angle between the estimated
+normals and the analytic normals of the wavy surface are shown, in degrees, ignoring orientation. The VTK
+filter is run only up to --vtk-max points, since its graph traversal takes minutes on larger clouds.
+
+Usage:
+python helper_scripts/bench_normals.py [--sizes 100000 1000000 10000000] [--noise 0.05]
+    [--workers 1 2 4] [--vtk-max 1000000]
+"""
+
+import argparse
+import os
+import sys
+from time import perf_counter
+
+from numpy import abs as np_abs
+from numpy import arccos as np_arccos
+from numpy import column_stack as np_column_stack
+from numpy import cos as np_cos
+from numpy import degrees as np_degrees
+from numpy import minimum as np_minimum
+from numpy import ones as np_ones
+from numpy import percentile as np_percentile
+from numpy import random as np_random
+from numpy import sin as np_sin
+from numpy.linalg import norm as np_linalg_norm
+from vtkmodules.util.numpy_support import vtk_to_numpy
+from vtkmodules.vtkFiltersPoints import vtkPCANormalEstimation
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from helper_scripts.bench_lod_octree import make_pc_dom
+from pzero.point_clouds import estimate_normals
+
+
+def vtk_normals(vtk_obj=None):
+    """Previous implementation of PCDom.vtk_set_normals, returning the normals."""
+    normals_filter = vtkPCANormalEstimation()
+    normals_filter.SetInputData(vtk_obj)
+    normals_filter.SetSampleSize(15)
+    normals_filter.SetNormalOrientationToGraphTraversal()
+    normals_filter.Update()
+    return vtk_to_numpy(normals_filter.GetOutput().GetPointData().GetNormals())
+
+
+def surface_normals(points=None):
+    """Unit normals of the surface z = 20 sin(x / 50) sin(y / 70) of make_pc_dom."""
+    x, y = points[:, 0], points[:, 1]
+    normals = np_column_stack(
+        [
+            -20 / 50 * np_cos(x / 50) * np_sin(y / 70),
+            -20 / 70 * np_sin(x / 50) * np_cos(y / 70),
+            np_ones(len(points)),
+        ]
+    )
+    return normals / np_linalg_norm(normals, axis=1)[:, None]
+
+
+def angle_errors(normals=None, expected=None):
+    """Median and 95th percentile angle, in degrees, between unoriented normals."""
+    cosines = np_minimum(np_abs((normals * expected).sum(axis=1)), 1)
+    return np_percentile(np_degrees(np_arccos(cosines)), [50, 95])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[100000, 1000000, 10000000]
+    )
+    parser.add_argument("--noise", type=float, default=0.05)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--vtk-max", type=int, default=1000000)
+    args = parser.parse_args()
+
+    print(f"{os.cpu_count()} CPUs")
+    print(
+        f"{'points':>11} {'method':>10} {'seconds':>9} {'median deg':>11} {'p95 deg':>8}"
+    )
+    for n_points in args.sizes:
+        pc_dom = make_pc_dom(n_points=n_points)
+        points = pc_dom.points
+        points[:, 2] += np_random.default_rng(1).normal(0, args.noise, n_points)
+        pc_dom.points = points
+        expected = surface_normals(points=points)
+        methods = {"vtk": lambda: vtk_normals(vtk_obj=pc_dom)}
+        for workers in args.workers:
+            methods[f"workers {workers}"] = lambda workers=workers: estimate_normals(
+                vtk_obj=pc_dom, workers=workers
+            )[0]
+        """Build the KD-tree before timing, since it is shared by all the neighbourhood tools."""
+        pc_dom.kd_tree
+        for method, function in methods.items():
+            if method == "vtk" and n_points > args.vtk_max:
+                print(f"{n_points:11d} {method:>10} {'skipped':>9}")
+                continue
+            start_time = perf_counter()
+            normals = function()
+            seconds = perf_counter() - start_time
+            median, p95 = angle_errors(normals=normals, expected=expected)
+            print(
+                f"{n_points:11d} {method:>10} {seconds:9.2f} {median:11.2f} {p95:8.2f}"
+            )
+        del pc_dom
+
+
+if __name__ == "__main__":
+    main()
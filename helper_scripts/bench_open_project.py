@@ -0,0 +1,157 @@
+#!/usr/bin/env python
+"""bench_open_project.py
+PZero© Andrea Bistacchi
+
+Compare load time and peak resident memory (RSS) when the entities of a reference project are read
+eagerly, as in open_project without lazy loading, or lazily, with only the entities shown in a view
+read from file (see LazyVtkObj and VtkObjCache in pzero/project_io.py).
+
+The reference project is made of many small TriSurf entities and a few heavy point clouds, saved in an
+object store. Each mode runs in a separate process, since the peak RSS of a process never decreases.
+Peak RSS is not measured on Windows.
+
+Usage:
+python helper_scripts/bench_open_project.py [--surfaces 200] [--clouds 4] [--cloud-points 2000000] [--shown 20]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+from numpy import arange as np_arange
+from numpy import column_stack as np_column_stack
+from numpy import random as np_random
+from vtk import vtkCellArray
+from vtkmodules.util.numpy_support import numpy_to_vtkIdTypeArray
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pzero.entities_factory import TriSurf, PCDom
+from pzero.project_io import (
+    LazyVtkObj,
+    store_vtk_entities,
+    write_manifest,
+    read_manifest,
+    objects_dir_name,
+    object_file_name,
+)
+
+
+def peak_rss_mb():
+    """Peak resident memory of this process in MB, or None where it cannot be measured.
+    On Linux VmHWM is used, since ru_maxrss includes the memory of the parent process at fork."""
+    if os.path.isfile("/proc/self/status"):
+        with open("/proc/self/status") as fin:
+            for line in fin:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    try:
+        from resource import getrusage, RUSAGE_SELF
+    except ImportError:
+        return None
+    """ru_maxrss is in bytes on macOS."""
+    return getrusage(RUSAGE_SELF).ru_maxrss / 1048576
+
+
+def make_project(project_dir_name=None, n_surfaces=None, n_clouds=None, n_points=None):
+    """Save a reference project with a single revision and return its folder."""
+    rng = np_random.default_rng(0)
+    entities = []
+    ids = np_arange(998)
+    connectivity = np_column_stack((ids, ids + 1, ids + 2)).ravel()
+    offsets = np_arange(0, 3 * len(ids) + 1, 3)
+    for i in range(n_surfaces):
+        trisurf = TriSurf()
+        trisurf.points = rng.random((1000, 3)) * 1000.0
+        cells = vtkCellArray()
+        cells.SetData(
+            numpy_to_vtkIdTypeArray(offsets, deep=True),
+            numpy_to_vtkIdTypeArray(connectivity, deep=True),
+        )
+        trisurf.SetPolys(cells)
+        entities.append(("surf_" + str(i), ".vtp", trisurf))
+    for i in range(n_clouds):
+        point_cloud = PCDom()
+        point_cloud.points = rng.random((n_points, 3)) * 1000.0
+        point_cloud.generate_cells()
+        point_cloud.set_point_data("intensity", rng.random(n_points))
+        entities.append(("cloud_" + str(i), ".vtp", point_cloud))
+    rev_dir_name = os.path.join(project_dir_name, "rev_reference")
+    os.makedirs(rev_dir_name)
+    manifest = store_vtk_entities(
+        entities=entities, objects_dir=objects_dir_name(project_dir_name), workers=0
+    )
+    write_manifest(manifest, rev_dir_name)
+    return rev_dir_name
+
+
+def open_reference(rev_dir_name=None, mode=None, n_shown=None):
+    """Read the entities of the reference project, as open_project does, and print load time and peak RSS."""
+    start = perf_counter()
+    manifest = read_manifest(rev_dir_name)
+    objects_dir = objects_dir_name(os.path.dirname(rev_dir_name))
+    lazy_objs = {}
+    for uid, object_name in manifest.items():
+        vtk_obj = PCDom() if uid.startswith("cloud") else TriSurf()
+        lazy_objs[uid] = LazyVtkObj(
+            vtk_obj=vtk_obj, file_name=object_file_name(objects_dir, object_name)
+        )
+    if mode == "eager":
+        for lazy_obj in lazy_objs.values():
+            lazy_obj.load()
+    else:
+        """Only n_shown surfaces are read, as when they are shown in a view."""
+        for uid in sorted(lazy_objs)[-n_shown:]:
+            lazy_objs[uid].load()
+    elapsed = perf_counter() - start
+    rss = peak_rss_mb()
+    rss_txt = "n/a" if rss is None else f"{rss:8.1f} MB"
+    print(f"{mode:>6}: load time {elapsed:7.2f} s  peak RSS {rss_txt}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--surfaces", type=int, default=200)
+    parser.add_argument("--clouds", type=int, default=4)
+    parser.add_argument("--cloud-points", type=int, default=2000000)
+    parser.add_argument("--shown", type=int, default=20)
+    parser.add_argument("--mode", choices=["eager", "lazy"], help=argparse.SUPPRESS)
+    parser.add_argument("--rev", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        open_reference(rev_dir_name=args.rev, mode=args.mode, n_shown=args.shown)
+        return
+
+    with TemporaryDirectory() as project_dir_name:
+        rev_dir_name = make_project(
+            project_dir_name=project_dir_name,
+            n_surfaces=args.surfaces,
+            n_clouds=args.clouds,
+            n_points=args.cloud_points,
+        )
+        print(
+            f"Reference project: {args.surfaces} TriSurf entities, {args.clouds} point clouds "
+            f"with {args.cloud_points} points, {args.shown} surfaces shown"
+        )
+        for mode in ["eager", "lazy"]:
+            subprocess.run(
+                [
+                    sys.executable,
+                    os.path.abspath(__file__),
+                    "--mode",
+                    mode,
+                    "--rev",
+                    rev_dir_name,
+                    "--shown",
+                    str(args.shown),
+                ],
+                check=True,
+            )
+
+
+if __name__ == "__main__":
+    main()
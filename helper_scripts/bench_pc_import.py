@@ -0,0 +1,222 @@
+#!/usr/bin/env python
+"""bench_pc_import.py
+PZero© Andrea Bistacchi
+
+Compare the throughput and the peak memory of the chunked point cloud import of pc_file2vtk, with
+float64 or float32 points, with the import of the whole file in a single dataframe used before, on
+synthetic CSV and LAS point clouds. Each import runs in a separate process, so that its peak resident
+memory (ru_maxrss) is measured independently.
+
+Usage:
+python helper_scripts/bench_pc_import.py [--sizes 100000 1000000] [--chunk-size 1000000] [--formats csv las]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+from resource import RUSAGE_SELF, getrusage
+from time import perf_counter
+
+from numpy import column_stack as np_column_stack
+from numpy import float32 as np_float32
+from numpy import random as np_random
+from numpy import uint16 as np_uint16
+from numpy import where as np_where
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+col_names = ["X", "Y", "Z", "Red", "Green", "Blue", "Nx", "Ny", "Nz", "intensity"]
+methods = ["whole", "chunked", "chunked_f32"]
+
+
+def write_point_cloud(out_file_name=None, n_points=None):
+    """Write a synthetic point cloud with colors, normals and intensity as CSV or LAS."""
+    from laspy import LasData, LasHeader
+    from pandas import DataFrame as pd_DataFrame
+
+    rng = np_random.default_rng(0)
+    x = rng.uniform(512000.0, 513000.0, n_points)
+    y = rng.uniform(4987000.0, 4988000.0, n_points)
+    z = rng.uniform(200.0, 300.0, n_points)
+    rgb = rng.integers(0, 256, (n_points, 3))
+    normals = rng.normal(size=(n_points, 3))
+    intensity = rng.integers(0, 1000, n_points)
+    if out_file_name.endswith(".csv"):
+        pd_DataFrame(
+            np_column_stack([x, y, z, rgb, normals, intensity]), columns=col_names
+        ).to_csv(out_file_name, index=False, float_format="%.4f")
+    else:
+        header = LasHeader(point_format=2, version="1.2")
+        header.scales = [0.001, 0.001, 0.001]
+        header.offsets = [512000.0, 4987000.0, 0.0]
+        las = LasData(header)
+        las.x, las.y, las.z = x, y, z
+        las.red, las.green, las.blue = rgb.T.astype(np_uint16)
+        las.intensity = intensity.astype(np_uint16)
+        las.write(out_file_name)
+
+
+def import_args(in_file_name=None):
+    """Columns and rows selected as in the import dialog."""
+    if in_file_name.endswith(".csv"):
+        return dict(
+            col_names=col_names,
+            usecols=list(range(len(col_names))),
+            delimiter=",",
+        )
+    else:
+        return dict(
+            col_names=["X", "Y", "Z", "intensity", "Red", "Green", "Blue"],
+            usecols=[0, 1, 2, 3, 15, 16, 17],
+            delimiter=None,
+        )
+
+
+def import_whole(in_file_name=None, col_names=None, usecols=None, delimiter=None):
+    """Import used before pc_file2vtk: the whole file is read in a dataframe, that is then
+    offset, checked and copied in the points and properties of a PCDom."""
+    from laspy import read as lp_read
+    from numpy import c_ as np_c_
+    from pandas import DataFrame as pd_df
+    from pandas import read_csv as pd_read_csv
+    from pandas import to_numeric as pd_to_numeric
+    from vtk import vtkPoints
+    from vtkmodules.util.numpy_support import numpy_to_vtk
+
+    from pzero.entities_factory import PCDom
+
+    if in_file_name.endswith(".csv"):
+        input_df = pd_read_csv(
+            in_file_name,
+            delimiter=delimiter,
+            usecols=usecols,
+            skiprows=1,
+            names=col_names,
+        )
+    else:
+        las_data = lp_read(in_file_name)
+        prop_dict = dict()
+        for dim in las_data.point_format.dimension_names:
+            attr = dim.lower() if dim in ["X", "Y", "Z"] else dim
+            prop_dict[attr] = np_c_[las_data[attr]].flatten()
+        input_df = pd_df.from_dict(prop_dict).iloc[:, usecols]
+        input_df.columns = col_names
+    input_df.apply(lambda c: pd_to_numeric(c, errors="coerce").notnull().all())
+    offset = input_df.loc[0, ["X", "Y"]].round(-2)
+    input_df["X"] -= offset[0]
+    input_df["Y"] -= offset[1]
+    point_cloud = PCDom()
+    points = vtkPoints()
+    points.SetData(
+        numpy_to_vtk(
+            np_column_stack(
+                (input_df["X"].values, input_df["Y"].values, input_df["Z"].values)
+            )
+        )
+    )
+    point_cloud.SetPoints(points)
+    point_cloud.generate_cells()
+    input_df.drop(["X", "Y", "Z"], axis=1, inplace=True)
+    point_cloud.init_point_data("RGB", 3)
+    point_cloud.set_point_data(
+        "RGB", np_column_stack([input_df["Red"], input_df["Green"], input_df["Blue"]])
+    )
+    input_df.drop(["Red", "Green", "Blue"], axis=1, inplace=True)
+    if "Nx" in input_df.columns:
+        normals = np_column_stack([input_df["Nx"], input_df["Ny"], input_df["Nz"]])
+        point_cloud.init_point_data("Normals", 3)
+        point_cloud.set_point_data(
+            "Normals", np_where(normals[:, 2:] > 0, normals * -1, normals)
+        )
+        input_df.drop(["Nx", "Ny", "Nz"], axis=1, inplace=True)
+    for property in input_df.columns:
+        point_cloud.init_point_data(property, 1)
+        point_cloud.set_point_data(property, input_df[property].values)
+    return point_cloud
+
+
+def run_import(in_file_name=None, method=None, chunk_size=None):
+    """Import in_file_name with method and print the time, the number of points and the peak memory."""
+    from pzero.imports.pc2vtk import pc_file2vtk
+
+    """Imports are done here, so that modules are not counted in the import time."""
+    baseline_kb = getrusage(RUSAGE_SELF).ru_maxrss
+    start = perf_counter()
+    if method == "whole":
+        point_cloud = import_whole(
+            in_file_name=in_file_name, **import_args(in_file_name)
+        )
+    else:
+        point_cloud = pc_file2vtk(
+            in_file_name=in_file_name,
+            row_range=range(0, 0),
+            header_row=0,
+            chunk_size=chunk_size,
+            points_dtype=np_float32 if method == "chunked_f32" else None,
+            **import_args(in_file_name),
+        )
+    elapsed = perf_counter() - start
+    peak_kb = getrusage(RUSAGE_SELF).ru_maxrss
+    print(elapsed, point_cloud.GetNumberOfPoints(), peak_kb, peak_kb - baseline_kb)
+
+
+def measure(in_file_name=None, method=None, chunk_size=None):
+    """Run an import in a separate process and return time, points, peak and added memory in kB."""
+    output = subprocess.run(
+        [
+            sys.executable,
+            os.path.abspath(__file__),
+            "--run",
+            method,
+            "--file",
+            in_file_name,
+            "--chunk-size",
+            str(chunk_size),
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    elapsed, n_points, peak_kb, added_kb = output.strip().split("\n")[-1].split()
+    return float(elapsed), int(n_points), int(peak_kb), int(added_kb)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100000, 1000000])
+    parser.add_argument("--chunk-size", type=int, default=1000000)
+    parser.add_argument("--formats", nargs="+", default=["csv", "las"])
+    parser.add_argument("--run", choices=methods, help=argparse.SUPPRESS)
+    parser.add_argument("--file", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        run_import(in_file_name=args.file, method=args.run, chunk_size=args.chunk_size)
+        return
+
+    print(
+        f"{'format':>6} {'points':>9} {'method':>12} {'time s':>8} {'Mpoints/s':>10}"
+        f" {'peak MB':>9} {'added MB':>9}"
+    )
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for file_format in args.formats:
+            for n_points in args.sizes:
+                in_file_name = os.path.join(tmp_dir, f"pc_{n_points}.{file_format}")
+                write_point_cloud(out_file_name=in_file_name, n_points=n_points)
+                for method in methods:
+                    elapsed, n_read, peak_kb, added_kb = measure(
+                        in_file_name=in_file_name,
+                        method=method,
+                        chunk_size=args.chunk_size,
+                    )
+                    print(
+                        f"{file_format:>6} {n_read:9d} {method:>12} {elapsed:8.2f}"
+                        f" {n_read / elapsed / 1e6:10.2f} {peak_kb / 1024:9.1f}"
+                        f" {added_kb / 1024:9.1f}"
+                    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+#!/usr/bin/env python
+"""bench_raster_tiles.py
+PZero© Andrea Bistacchi
+
+Time and memory of the import of large DEMs with the tiled rasters of raster_tiles.py, on synthetic
+float32 GeoTIFF DEMs of growing size, up to several GB, with 1 m pixels. For each DEM the tiled import
+(build_overviews and the overview DEM added to the project by dem2vtk) is timed, then the time to the
+first render of a 3D view is measured as the time to select and read the tiles for a camera showing the
+whole DEM in a 1920 x 1080 viewport, and for a camera zoomed at 500 m above its center. The previous
+import, reading the whole raster in a pyvista StructuredGrid, is timed only up to --whole-max MB, since
+it needs several times the size of the raster in memory. Each import runs in a new process, reporting
+its peak resident memory. No actor is rendered, since the cost of rendering does not depend on the size
+of the raster for tiled DEMs. Overviews are built in a .ovr file next to each DEM, deleted afterwards.
+
+Usage:
+python helper_scripts/bench_raster_tiles.py [--sizes 100 1000 4000] [--whole-max 250] [--folder /tmp]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+from time import perf_counter
+
+import rasterio as rio
+from numpy import arange as np_arange
+from numpy import float32 as np_float32
+from numpy import meshgrid as np_meshgrid
+from numpy import nan as np_nan
+from numpy import radians as np_radians
+from numpy import sin as np_sin
+from numpy import sqrt as np_sqrt
+from numpy import tan as np_tan
+from pyvista import StructuredGrid as pv_StructuredGrid
+from rasterio.transform import from_origin
+from rasterio.windows import Window
+from vtk import vtkCamera
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pzero.entities_factory import DEM
+from pzero.raster_tiles import RasterTiles, build_overviews
+
+
+def write_dem(path=None, size_mb=None):
+    """Write a square float32 DEM of about size_mb MB, tiled as usual for large GeoTIFFs, by strips of
+    512 rows. Returns its number of rows and columns."""
+    n = int(np_sqrt(size_mb * 1e6 / 4)) // 16 * 16
+    cols = np_arange(n, dtype=np_float32)
+    with rio.open(
+        path,
+        "w",
+        driver="GTiff",
+        width=n,
+        height=n,
+        count=1,
+        dtype="float32",
+        crs="EPSG:32632",
+        transform=from_origin(600000, 5100000, 1, 1),
+        nodata=-9999,
+        tiled=True,
+        blockxsize=256,
+        blockysize=256,
+        BIGTIFF="YES",
+    ) as dataset:
+        for row_0 in range(0, n, 512):
+            rows = np_arange(row_0, min(row_0 + 512, n), dtype=np_float32)
+            """Hills with a wavelength of 1 km on a tilted plane."""
+            elevation = (
+                1000
+                + 0.01 * rows[:, None]
+                + 50 * np_sin(rows[:, None] / 160) * np_sin(cols[None, :] / 160)
+            )
+            dataset.write(elevation, 1, window=Window(0, row_0, n, len(rows)))
+    return n, n
+
+
+def peak_mb():
+    """Peak resident memory of the process, in MB (Linux only, NaN elsewhere)."""
+    if not os.path.isfile("/proc/self/status"):
+        return float("nan")
+    with open("/proc/self/status") as fin:
+        for line in fin:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+    return float("nan")
+
+
+def whole_import(path=None):
+    """Previous implementation of dem2vtk, reading the whole raster (with rasterio instead of
+    xarray.open_rasterio, removed from recent versions of xarray)."""
+    with rio.open(path) as dataset:
+        values = dataset.read(1)
+        values[values == dataset.nodata] = np_nan
+        x, y = dataset.xy(0, 0)
+        xx, yy = np_meshgrid(
+            x + np_arange(dataset.width) * dataset.transform.a,
+            y + np_arange(dataset.height) * dataset.transform.e,
+        )
+    dem = DEM()
+    temp_obj = pv_StructuredGrid(xx, yy, values)
+    temp_obj["elevation"] = values.ravel(order="F")
+    dem.ShallowCopy(temp_obj)
+    return dem.GetNumberOfPoints()
+
+
+def camera_above(x=None, y=None, height=None):
+    camera = vtkCamera()
+    camera.SetFocalPoint(x, y, 1000)
+    camera.SetPosition(x, y, 1000 + height)
+    camera.SetViewUp(0, 1, 0)
+    return camera
+
+
+def tiled_import(path=None):
+    """Tiled import of dem2vtk, and the tiles of the first render for two cameras. Returns the times
+    of the import and of the two renders, and the number of pixels shown by each."""
+    start_time = perf_counter()
+    build_overviews(file_name=path)
+    raster_tiles = RasterTiles(file_name=path)
+    overview = raster_tiles.window_dem()
+    import_s = perf_counter() - start_time
+    x_min, x_max, y_min, y_max, z_min, z_max = overview.GetBounds()
+    x, y = (x_min + x_max) / 2, (y_min + y_max) / 2
+    """Heights of cameras showing the whole DEM with the default view angle of 30°, and at 500 m."""
+    results = [import_s]
+    for height in [(y_max - y_min) / 2 / np_tan(np_radians(15)), 500]:
+        start_time = perf_counter()
+        level, tile_rows, tile_cols = raster_tiles.select_tiles(
+            camera=camera_above(x=x, y=y, height=height),
+            viewport_size=(1920, 1080),
+            z_range=(z_min, z_max),
+        )
+        dem = raster_tiles.window_dem(
+            level=level, tile_rows=tile_rows, tile_cols=tile_cols
+        )
+        results += [perf_counter() - start_time, dem.GetNumberOfPoints()]
+    return results
+
+
+def child(method=None, path=None):
+    """Run an import in this process and print its results and peak memory."""
+    if method == "whole":
+        start_time = perf_counter()
+        whole_import(path=path)
+        results = [perf_counter() - start_time]
+    else:
+        results = tiled_import(path=path)
+    print(" ".join(str(result) for result in results + [peak_mb()]))
+
+
+def run_child(method=None, path=None):
+    output = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--child", method, path],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return [float(value) for value in output.split()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 4000])
+    parser.add_argument("--whole-max", type=int, default=250)
+    parser.add_argument("--folder", default="/tmp")
+    parser.add_argument("--child", nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child(method=args.child[0], path=args.child[1])
+        return
+
+    print(
+        f"{'MB':>6} {'pixels':>7} {'whole s':>8} {'whole MB':>9} {'tiled s':>8}"
+        f" {'full view s':>12} {'pixels':>7} {'zoom s':>7} {'pixels':>7}"
+        f" {'tiled MB':>9}"
+    )
+    for size_mb in args.sizes:
+        path = os.path.join(args.folder, f"bench_raster_tiles_{size_mb}.tif")
+        n_rows, n_cols = write_dem(path=path, size_mb=size_mb)
+        file_mb = os.path.getsize(path) / 1e6
+        if file_mb <= args.whole_max:
+            whole_s, whole_mb = run_child(method="whole", path=path)
+            whole = f"{whole_s:8.2f} {whole_mb:9.0f}"
+        else:
+            whole = f"{'skipped':>8} {'':>9}"
+        import_s, full_s, full_n, zoom_s, zoom_n, tiled_mb = run_child(
+            method="tiled", path=path
+        )
+        print(
+            f"{file_mb:6.0f} {n_rows * n_cols / 1e6:6.0f}M {whole} {import_s:8.2f}"
+            f" {full_s:12.2f} {full_n / 1e6:6.1f}M {zoom_s:7.2f} {zoom_n / 1e6:6.1f}M"
+            f" {tiled_mb:9.0f}"
+        )
+        os.remove(path)
+        if os.path.isfile(path + ".ovr"):
+            os.remove(path + ".ovr")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+"""bench_save_project.py
+PZero© Andrea Bistacchi
+
+Compare sequential and parallel writing of entities with the project save engine in pzero/project_io.py,
+on a synthetic project made of random TriSurf entities. The object store is then timed when saving
+the project for the first time and when saving it again with a single modified entity.
+
+Usage:
+python helper_scripts/bench_save_project.py [--entities 500] [--points 20000] [--workers 1 2 4]
+"""
+
+import argparse
+import os
+import sys
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+from numpy import arange as np_arange
+from numpy import column_stack as np_column_stack
+from numpy import random as np_random
+from vtk import vtkCellArray
+from vtkmodules.util.numpy_support import numpy_to_vtkIdTypeArray
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pzero.entities_factory import TriSurf
+from pzero.project_io import save_vtk_entities, store_vtk_entities
+
+
+def synthetic_entities(n_entities=None, n_points=None):
+    """Create a list of (uid, extension, vtk_obj) tuples with random triangle strips."""
+    rng = np_random.default_rng(0)
+    n_cells = n_points - 2
+    ids = np_arange(n_cells)
+    connectivity = np_column_stack((ids, ids + 1, ids + 2)).ravel()
+    offsets = np_arange(0, 3 * n_cells + 1, 3)
+    entities = []
+    for i in range(n_entities):
+        trisurf = TriSurf()
+        trisurf.points = rng.random((n_points, 3)) * 1000.0
+        cells = vtkCellArray()
+        cells.SetData(
+            numpy_to_vtkIdTypeArray(offsets, deep=True),
+            numpy_to_vtkIdTypeArray(connectivity, deep=True),
+        )
+        trisurf.SetPolys(cells)
+        trisurf.set_point_data("elevation", trisurf.points_Z.copy())
+        entities.append(("entity_" + str(i), ".vtp", trisurf))
+    return entities
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--entities", type=int, default=500)
+    parser.add_argument("--points", type=int, default=20000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    args = parser.parse_args()
+
+    entities = synthetic_entities(n_entities=args.entities, n_points=args.points)
+    print(
+        f"Synthetic project: {args.entities} TriSurf entities with {args.points} points each"
+    )
+    reference = None
+    for workers in [0] + args.workers:
+        with TemporaryDirectory() as out_dir_name:
+            start = perf_counter()
+            save_vtk_entities(
+                entities=entities, out_dir_name=out_dir_name, workers=workers
+            )
+            elapsed = perf_counter() - start
+        if reference is None:
+            reference = elapsed
+        label = "sequential" if workers == 0 else f"{workers} workers"
+        print(f"{label:>12}: {elapsed:8.2f} s  speed-up {reference / elapsed:5.2f}x")
+
+    with TemporaryDirectory() as objects_dir:
+        for label in ["first save", "re-save"]:
+            start = perf_counter()
+            store_vtk_entities(
+                entities=entities, objects_dir=objects_dir, workers=args.workers[-1]
+            )
+            elapsed = perf_counter() - start
+            print(f"{label:>12}: {elapsed:8.2f} s  (object store)")
+            entities[0][2].points = entities[0][2].points + 1.0
+
+
+if __name__ == "__main__":
+    main()
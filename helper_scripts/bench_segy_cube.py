@@ -0,0 +1,175 @@
+#!/usr/bin/env python
+"""bench_segy_cube.py
+PZero© Andrea Bistacchi
+
+Time the lazy access to post-stack 3D SEG-Y cubes of segy_cube.py on synthetic float32 cubes of growing
+size, up to several GB. For each cube the trace headers are scanned once (SegyCube.scan), the overview
+stored in the Seismics entity is built (seismics_overview), and then random inline, crossline and time
+slices and random vertical sections are read, reporting the mean time per slice and the private memory
+of the process. Then the whole cube is read with vtkSegYReader, as segy2vtk did before, only up to
+--vtk-max MB, since it must fit in memory. The file is written just before being read, so that part of
+it may still be in the page cache: the first slices of a cube on a cold disk take longer.
+
+Usage:
+python helper_scripts/bench_segy_cube.py [--sizes 200 2000 4000] [--samples 1000] [--slices 20]
+    [--vtk-max 500] [--folder /tmp]
+"""
+
+import argparse
+import os
+import sys
+from time import perf_counter
+
+from numpy import arange as np_arange
+from numpy import dtype as np_dtype
+from numpy import float32 as np_float32
+from numpy import random as np_random
+from numpy import sin as np_sin
+from numpy import sqrt as np_sqrt
+from numpy import zeros as np_zeros
+from vtk import vtkSegYReader
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pzero.segy_cube import SegyCube, seismics_overview
+
+"""Trace records of a post-stack SEG-Y with the standard header fields used by the scan."""
+trace_fields = {
+    "scalar": (">i2", 70),
+    "cdp_x": (">i4", 72),
+    "cdp_y": (">i4", 76),
+    "n_samples": (">i2", 114),
+    "interval": (">i2", 116),
+    "x": (">i4", 180),
+    "y": (">i4", 184),
+    "inline": (">i4", 188),
+    "crossline": (">i4", 192),
+}
+
+
+def write_segy(path=None, size_mb=None, n_samples=None):
+    """Write a cube of about size_mb MB, with n_samples float32 samples per trace, 4 ms sampling and
+    square bins of 25 m, one inline at a time. Returns the number of inlines and
+    crosslines."""
+    n_lines = max(int(np_sqrt(size_mb * 1e6 / (240 + 4 * n_samples))), 2)
+    record = np_dtype(
+        {
+            "names": list(trace_fields) + ["samples"],
+            "formats": [field[0] for field in trace_fields.values()]
+            + [(">f4", (n_samples,))],
+            "offsets": [field[1] for field in trace_fields.values()] + [240],
+            "itemsize": 240 + 4 * n_samples,
+        }
+    )
+    binary_header = np_zeros(200, dtype=">i2")
+    binary_header[8], binary_header[10], binary_header[12] = 4000, n_samples, 5
+    crosslines = np_arange(n_lines)
+    times = np_arange(n_samples, dtype=np_float32)
+    rng = np_random.default_rng(0)
+    with open(path, "wb") as fout:
+        fout.write(b" " * 3200)
+        fout.write(binary_header.tobytes())
+        for inline in range(n_lines):
+            traces = np_zeros(n_lines, dtype=record)
+            traces["scalar"] = -100
+            traces["cdp_x"] = traces["x"] = (600000 + 25 * crosslines) * 100
+            traces["cdp_y"] = traces["y"] = (5100000 + 25 * inline) * 100
+            traces["n_samples"], traces["interval"] = n_samples, 4000
+            traces["inline"], traces["crossline"] = 1000 + inline, 2000 + crosslines
+            """Dipping reflectors with noise."""
+            traces["samples"] = np_sin(
+                (times[None, :] + crosslines[:, None] * 0.3 + inline * 0.2) / 7
+            ) + rng.normal(0, 0.1, (n_lines, n_samples)).astype(np_float32)
+            traces.tofile(fout)
+    return n_lines, n_lines
+
+
+def private_mb():
+    """Resident memory of the process not backed by files, in MB (Linux only, NaN elsewhere). Pages of
+    the SEG-Y file mapped by the cube are left out, since they are in the page cache and can be dropped
+    by the system at any time."""
+    if not os.path.isfile("/proc/self/status"):
+        return float("nan")
+    with open("/proc/self/status") as fin:
+        for line in fin:
+            if line.startswith("RssAnon:"):
+                return int(line.split()[1]) / 1024
+    return float("nan")
+
+
+def vtk_read(path=None):
+    """Previous implementation of segy2vtk, reading the whole cube."""
+    segy_reader = vtkSegYReader()
+    segy_reader.SetFileName(path)
+    segy_reader.Update()
+    return segy_reader.GetOutput().GetNumberOfPoints()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[200, 2000, 4000])
+    parser.add_argument("--samples", type=int, default=1000)
+    parser.add_argument("--slices", type=int, default=20)
+    parser.add_argument("--vtk-max", type=int, default=500)
+    parser.add_argument("--folder", default="/tmp")
+    args = parser.parse_args()
+
+    print(
+        f"{'MB':>6} {'traces':>8} {'vtk s':>8} {'scan s':>7} {'overview s':>11}"
+        f" {'inline ms':>10} {'xline ms':>9} {'time ms':>8} {'section ms':>11}"
+        f" {'private MB':>10}"
+    )
+    rng = np_random.default_rng(1)
+    for size_mb in args.sizes:
+        path = os.path.join(args.folder, f"bench_segy_cube_{size_mb}.sgy")
+        n_inlines, n_crosslines = write_segy(
+            path=path, size_mb=size_mb, n_samples=args.samples
+        )
+        file_mb = os.path.getsize(path) / 1e6
+        start_time = perf_counter()
+        cube = SegyCube.scan(file_name=path)
+        scan_s = perf_counter() - start_time
+        start_time = perf_counter()
+        seismics_overview(cube=cube)
+        overview_s = perf_counter() - start_time
+        slice_ms = []
+        for read_slice, n in [
+            (cube.inline_slice, n_inlines),
+            (cube.crossline_slice, n_crosslines),
+            (cube.time_slice, args.samples),
+        ]:
+            start_time = perf_counter()
+            for index in rng.integers(0, n, args.slices):
+                read_slice(index=index)
+            slice_ms.append((perf_counter() - start_time) / args.slices * 1000)
+        corners = cube.map_xy(
+            inline_ids=[0, 0, n_inlines - 1, n_inlines - 1],
+            crossline_ids=[0, n_crosslines - 1, 0, n_crosslines - 1],
+        )
+        start_time = perf_counter()
+        for _ in range(args.slices):
+            """Sections between random points on the west and east edges of the survey."""
+            start_xy, end_xy = [
+                corners[i] + (corners[i + 2] - corners[i]) * rng.uniform()
+                for i in [0, 1]
+            ]
+            cube.section(start_xy=start_xy, end_xy=end_xy)
+        section_ms = (perf_counter() - start_time) / args.slices * 1000
+        memory_mb = private_mb()
+        del cube
+        if file_mb <= args.vtk_max:
+            start_time = perf_counter()
+            vtk_read(path=path)
+            vtk_s = f"{perf_counter() - start_time:8.2f}"
+        else:
+            vtk_s = f"{'skipped':>8}"
+        print(
+            f"{file_mb:6.0f} {n_inlines * n_crosslines:8d} {vtk_s} {scan_s:7.2f}"
+            f" {overview_s:11.2f} {slice_ms[0]:10.1f} {slice_ms[1]:9.1f}"
+            f" {slice_ms[2]:8.1f} {section_ms:11.1f} {memory_mb:10.0f}"
+        )
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
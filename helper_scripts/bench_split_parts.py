@@ -0,0 +1,128 @@
+#!/usr/bin/env python
+"""bench_split_parts.py
+PZero© Andrea Bistacchi
+
+Compare the single-pass split_parts of TriSurf and PCDom, that slices all parts at once, with the splitting
+used before, that extracted the parts one at a time with a connectivity or threshold filter, as the number
+of parts grows.
+
+Usage:
+python helper_scripts/bench_split_parts.py [--parts 10 100 1000 5000] [--points 200000] [--max-loop 1000]
+"""
+
+import argparse
+import os
+import sys
+from time import perf_counter
+
+from numpy import arange as np_arange
+from numpy import column_stack as np_column_stack
+from numpy import random as np_random
+from vtk import vtkCleanPolyData, vtkPolyDataConnectivityFilter, vtkThresholdPoints
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pzero.entities_factory import PCDom, TriSurf
+
+
+def make_trisurf(n_parts=None, n_points=None, seed=0):
+    """TriSurf made of n_parts separate triangle strips with about n_points points in total."""
+    rng = np_random.default_rng(seed)
+    strip_points = max(n_points // n_parts, 3)
+    ids = np_arange(strip_points - 2)
+    strip_cells = np_column_stack((ids, ids + 1, ids + 2))
+    trisurf = TriSurf()
+    trisurf.points = rng.random((strip_points * n_parts, 3))
+    trisurf.cells = (
+        strip_cells[None, :, :] + (np_arange(n_parts) * strip_points)[:, None, None]
+    ).reshape((-1, 3))
+    return trisurf
+
+
+def make_pc_dom(n_parts=None, n_points=None, seed=0):
+    """PCDom with n_points random points, assigned to n_parts clusters."""
+    rng = np_random.default_rng(seed)
+    pc_dom = PCDom()
+    pc_dom.points = rng.random((n_points, 3))
+    pc_dom.generate_cells()
+    pc_dom.init_point_data("ClusterId", 1)
+    pc_dom.set_point_data("ClusterId", rng.integers(0, n_parts, n_points).astype(float))
+    return pc_dom
+
+
+def loop_split_trisurf(trisurf=None):
+    """split_parts of TriSurf as implemented before, extracting one region at a time."""
+    connectivity_filter = vtkPolyDataConnectivityFilter()
+    connectivity_filter.SetInputData(trisurf)
+    connectivity_filter.SetExtractionModeToAllRegions()
+    connectivity_filter.ColorRegionsOn()
+    connectivity_filter.Update()
+    connectivity_filter.SetExtractionModeToSpecifiedRegions()
+    parts = []
+    for rid in range(connectivity_filter.GetNumberOfExtractedRegions()):
+        connectivity_filter.InitializeSpecifiedRegionList()
+        connectivity_filter.AddSpecifiedRegion(rid)
+        connectivity_filter.Update()
+        cleaner = vtkCleanPolyData()
+        cleaner.SetInputConnection(connectivity_filter.GetOutputPort())
+        cleaner.Update()
+        part = TriSurf()
+        part.DeepCopy(cleaner.GetOutput())
+        parts.append(part)
+    return parts
+
+
+def loop_split_pc_dom(pc_dom=None):
+    """split_parts of PCDom as implemented before, with a threshold filter for each cluster."""
+    parts = []
+    for rid in set(pc_dom.get_point_data("ClusterId")):
+        thresh = vtkThresholdPoints()
+        thresh.SetInputData(pc_dom)
+        thresh.ThresholdBetween(rid, rid)
+        thresh.Update()
+        part = PCDom()
+        part.DeepCopy(thresh.GetOutput())
+        part.generate_cells()
+        parts.append(part)
+    return parts
+
+
+def time_call(function=None):
+    """Time of function() in milliseconds, and its result."""
+    start = perf_counter()
+    result = function()
+    return (perf_counter() - start) * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--parts", type=int, nargs="+", default=[10, 100, 1000, 5000])
+    parser.add_argument("--points", type=int, default=200000)
+    parser.add_argument("--max-loop", type=int, default=1000)
+    args = parser.parse_args()
+
+    print(
+        f"{'parts':>6} {'entity':>8} {'loop':>10} {'single pass':>12} {'speedup':>8}"
+        "   (milliseconds)"
+    )
+    for n_parts in args.parts:
+        for entity_name, entity, loop_split in [
+            ("TriSurf", make_trisurf(n_parts, args.points), loop_split_trisurf),
+            ("PCDom", make_pc_dom(n_parts, args.points), loop_split_pc_dom),
+        ]:
+            single_ms, parts = time_call(entity.split_parts)
+            assert len(parts) == n_parts
+            if n_parts <= args.max_loop:
+                loop_ms, _ = time_call(lambda: loop_split(entity))
+                print(
+                    f"{n_parts:6d} {entity_name:>8} {loop_ms:10.1f} {single_ms:12.1f} "
+                    f"{loop_ms / single_ms:8.1f}"
+                )
+            else:
+                print(
+                    f"{n_parts:6d} {entity_name:>8} {'-':>10} {single_ms:12.1f} {'-':>8}"
+                )
+
+
+if __name__ == "__main__":
+    main()
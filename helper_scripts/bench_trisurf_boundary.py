@@ -0,0 +1,156 @@
+#!/usr/bin/env python
+"""bench_trisurf_boundary.py
+PZero© Andrea Bistacchi
+
+Time the vectorized TriSurf.boundary_dilation and TriSurf.get_clean_boundary on grid surfaces with a hole,
+from 1k to 1M triangles, and compare them with the point by point implementation used before, on the
+smaller surfaces only since its cost is dominated by the Python loops.
+
+Usage:
+python helper_scripts/bench_trisurf_boundary.py [--sizes 1000 10000 100000 1000000] [--max-loop 100000]
+"""
+
+import argparse
+import os
+import sys
+from time import perf_counter
+
+from numpy import arange as np_arange
+from numpy import column_stack as np_column_stack
+from numpy import cross as np_cross
+from numpy import hypot as np_hypot
+from numpy import linalg as np_linalg
+from numpy import mean as np_mean
+from numpy import meshgrid as np_meshgrid
+from numpy import random as np_random
+from numpy import sqrt as np_sqrt
+from numpy import vstack as np_vstack
+from numpy import zeros as np_zeros
+from vtkmodules.util.numpy_support import numpy_to_vtk, numpy_to_vtkIdTypeArray
+from vtkmodules.vtkCommonCore import vtkIdList, vtkPoints
+from vtkmodules.vtkCommonDataModel import vtkCellArray
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pzero.entities_factory import TriSurf
+
+
+def make_trisurf(n_triangles=None, seed=0):
+    """TriSurf on a square grid with about n_triangles triangles, random elevations and a circular
+    hole, so that it has two boundaries. Cells are set at once, since append_cell would take longer
+    than the methods being timed."""
+    rng = np_random.default_rng(seed)
+    n = max(int(np_sqrt(n_triangles / 2)) + 1, 4)
+    x, y = np_meshgrid(np_arange(n, dtype=float), np_arange(n, dtype=float))
+    points = np_column_stack((x.ravel(), y.ravel(), rng.random(n * n)))
+    ids = np_arange(n * n).reshape(n, n)
+    corners = (
+        ids[:-1, :-1].ravel(),
+        ids[:-1, 1:].ravel(),
+        ids[1:, 1:].ravel(),
+        ids[1:, :-1].ravel(),
+    )
+    triangles = np_vstack(
+        (
+            np_column_stack((corners[0], corners[1], corners[2])),
+            np_column_stack((corners[0], corners[2], corners[3])),
+        )
+    )
+    centers = points[triangles].mean(axis=1)
+    triangles = triangles[
+        np_hypot(centers[:, 0] - n / 2, centers[:, 1] - n / 2) > n / 5
+    ]
+    trisurf = TriSurf()
+    vtk_points = vtkPoints()
+    vtk_points.SetData(numpy_to_vtk(points, deep=True))
+    trisurf.SetPoints(vtk_points)
+    cells = vtkCellArray()
+    cells.SetData(
+        numpy_to_vtkIdTypeArray(np_arange(0, triangles.size + 1, 3), deep=True),
+        numpy_to_vtkIdTypeArray(triangles.ravel(), deep=True),
+    )
+    trisurf.SetPolys(cells)
+    return trisurf
+
+
+def loop_boundary_dilation(trisurf=None, tol=None):
+    """Point by point implementation of TriSurf.boundary_dilation used before, with a loop over
+    the cells of each point and over their edges."""
+    surf = TriSurf()
+    surf.ShallowCopy(trisurf.clean_topology())
+    surf.BuildLinks()
+    points = surf.points
+    displaced = points.copy()
+    point_cells = vtkIdList()
+    cell_points = vtkIdList()
+    neighbors = vtkIdList()
+    for point_id in range(surf.GetNumberOfPoints()):
+        point_displ = np_zeros(3)
+        surf.GetPointCells(point_id, point_cells)
+        for c_i in range(point_cells.GetNumberOfIds()):
+            cell_id = point_cells.GetId(c_i)
+            surf.GetCellPoints(cell_id, cell_points)
+            cell_ids = [cell_points.GetId(i) for i in range(3)]
+            trgl_ctr = np_mean(points[cell_ids], axis=0)
+            for edge_point_id in cell_ids:
+                if edge_point_id == point_id:
+                    continue
+                surf.GetCellEdgeNeighbors(cell_id, point_id, edge_point_id, neighbors)
+                if neighbors.GetNumberOfIds() == 0:
+                    edge_vector = points[edge_point_id] - points[point_id]
+                    center2edge = (
+                        points[edge_point_id] + points[point_id]
+                    ) / 2 - trgl_ctr
+                    normal = np_cross(edge_vector, center2edge)
+                    edge_displ = np_cross(normal, edge_vector)
+                    point_displ += edge_displ / np_linalg.norm(edge_displ)
+        if np_linalg.norm(point_displ) > 0:
+            displaced[point_id] += point_displ / np_linalg.norm(point_displ) * tol
+    return displaced
+
+
+def time_call(function=None, repeat=None):
+    """Best time of function() in milliseconds."""
+    best = None
+    for _ in range(repeat):
+        start = perf_counter()
+        function()
+        elapsed = (perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[1000, 10000, 100000, 1000000]
+    )
+    parser.add_argument("--max-loop", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(
+        f"{'triangles':>10} {'boundary':>9} {'clean bnd':>10} {'dilation':>10} {'loop dil.':>10}"
+        "   (milliseconds)"
+    )
+    for n_triangles in args.sizes:
+        trisurf = make_trisurf(n_triangles=n_triangles)
+        clean_boundary_ms = time_call(
+            function=trisurf.get_clean_boundary, repeat=args.repeat
+        )
+        dilation_ms = time_call(
+            function=lambda: trisurf.boundary_dilation(tol=0.5), repeat=args.repeat
+        )
+        if trisurf.GetNumberOfPolys() <= args.max_loop:
+            loop_ms = f"{time_call(function=lambda: loop_boundary_dilation(trisurf=trisurf, tol=0.5), repeat=1):10.1f}"
+        else:
+            loop_ms = f"{'-':>10}"
+        n_boundary = trisurf.get_clean_boundary().GetNumberOfPoints()
+        print(
+            f"{trisurf.GetNumberOfPolys():10d} {n_boundary:9d} {clean_boundary_ms:10.1f} "
+            f"{dilation_ms:10.1f} {loop_ms}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,13 @@
+from multiprocessing import freeze_support
 from sys import argv, exit
 from PyQt5.QtWidgets import QApplication
 
 from pzero.project_window import ProjectWindow
 
-app = QApplication(argv)
-project_window = ProjectWindow()
-project_window.show()
-exit(app.exec_())
+if __name__ == "__main__":
+    """freeze_support is needed by the worker processes used to save projects in frozen executables."""
+    freeze_support()
+    app = QApplication(argv)
+    project_window = ProjectWindow()
+    project_window.show()
+    exit(app.exec_())
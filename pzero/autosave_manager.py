@@ -0,0 +1,314 @@
+"""autosave_manager.py
+PZero© Andrea Bistacchi"""
+
+import os
+from contextlib import contextmanager
+from datetime import datetime
+from tempfile import gettempdir
+from threading import Thread
+from time import perf_counter
+
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+
+from pzero.project_io import (
+    LazyVtkObj,
+    data_signature,
+    objects_dir_name,
+    object_file_name,
+    save_revision,
+    write_project_file,
+)
+
+"""Background autosave of the project.
+
+Edits are notified by the signals of ProjectWindow. The first edit starts a single-shot timer, and
+all the edits made before it expires are saved together, so a burst of edits (e.g. a batch import)
+produces a single autosave. When the timer expires a snapshot of the project is taken on the GUI
+thread: tables are copied, entities that changed since the last autosave are copied with DeepCopy,
+and all other entities are passed by reference to the objects already in the object store. The
+snapshot is then written on a worker thread as a revision named autosave_rev_name, that replaces the
+previous one only when it has been completely written (see save_revision in project_io.py). Only one
+autosave runs at a time: edits made while it is running schedule another autosave when it finishes.
+
+Projects saved as .p0 are autosaved in their own folder, sharing the object store, so the autosave
+revision costs only the entities edited since the project was opened or saved. Projects not saved yet,
+or saved as project containers, are autosaved in a separate <name>_autosave.p0 project.
+
+Autosave never removes files: objects of entities edited again since the previous autosave are left
+in the object store until they are pruned with the explicit command of ProjectWindow, since pruning
+would also remove e.g. octrees of entities that are not referenced by any revision yet."""
+
+"""Name of the revision folder written by autosave."""
+autosave_rev_name = "rev_autosave"
+
+"""Suffix of the separate project used for projects that are not saved as .p0 folders."""
+autosave_suffix = "_autosave"
+
+"""Delay, in seconds, between the first edit and the autosave."""
+autosave_delay_s_default = 30
+
+
+class AutosaveManager(QObject):
+    """Autosave the project of ProjectWindow parent in the background. The time and duration of the
+    last autosave are shown in label, a QLabel (e.g. in the status bar), if given."""
+
+    """Emitted on the worker thread at the end of an autosave, and received on the GUI thread."""
+    autosave_finished_signal = pyqtSignal(object)
+
+    def __init__(self, parent=None, label=None):
+        super(AutosaveManager, self).__init__(parent)
+        self.parent = parent
+        self.label = label
+        self.enabled = True
+        self.delay_s = autosave_delay_s_default
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self.start)
+        """Worker thread of the autosave in progress, if any."""
+        self.thread = None
+        """An edit was made while an autosave was running or paused."""
+        self.pending = False
+        self.n_paused = 0
+        """Incremented at each autosave and reset, so that results of outdated autosaves are discarded."""
+        self.generation = 0
+        """Entities notified as modified since the last snapshot."""
+        self.dirty_uids = set()
+        """Manifest of the last autosave, and data signatures of the entities it contains."""
+        self.manifest = {}
+        self.signatures = {}
+        self.last_time = None
+        self.last_duration = None
+        self.snapshot_duration = None
+        self.autosave_finished_signal.connect(self.finished)
+
+        """Edits of entity geometry and properties make the entity dirty, while all other edits
+        (metadata, legends, removed entities) only schedule an autosave."""
+        for name in dir(type(parent)):
+            if not isinstance(getattr(type(parent), name), pyqtSignal):
+                continue
+            if any(
+                key in name
+                for key in [
+                    "_added_",
+                    "_geom_modified_",
+                    "_data_val_modified_",
+                    "_data_keys_removed_",
+                ]
+            ):
+                getattr(parent, name).connect(self.entities_modified)
+            elif any(key in name for key in ["_removed_", "_modified_"]):
+                getattr(parent, name).connect(self.project_modified)
+
+    @property
+    def running(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    def entities_modified(self, uids=None):
+        """Slot of the signals notifying that the data of entities uids have been modified."""
+        self.dirty_uids.update(uids)
+        self.schedule()
+
+    def project_modified(self, *args):
+        """Slot of all other signals notifying edits of the project."""
+        self.schedule()
+
+    def set_enabled(self, enabled=None):
+        """Slot of actionAutosave."""
+        self.enabled = enabled
+        if not enabled:
+            self.timer.stop()
+
+    def schedule(self):
+        """Start the timer if it is not running already, so that bursts of edits are coalesced."""
+        if not self.enabled:
+            return
+        if self.running or self.n_paused:
+            self.pending = True
+            return
+        if not self.timer.isActive():
+            self.timer.start(int(self.delay_s * 1000))
+
+    def reset(self, manifest=None):
+        """Forget the last autosave, e.g. when a new project is created, opened or saved.
+        manifest is the manifest of the revision just opened or saved, if any: entities found there
+        are not copied by the next autosave if they are already in its object store."""
+        self.generation += 1
+        self.timer.stop()
+        self.pending = False
+        self.dirty_uids = set()
+        self.manifest = dict(manifest or {})
+        self.signatures = {}
+        for uid, extension, vtk_obj in self.parent.vtk_entities_to_save():
+            if uid in self.manifest and not isinstance(vtk_obj, LazyVtkObj):
+                self.signatures[uid] = (id(vtk_obj), data_signature(vtk_obj))
+
+    def wait(self):
+        """Wait for the autosave in progress, if any, to finish writing."""
+        if self.thread is not None:
+            self.thread.join()
+
+    @contextmanager
+    def paused(self):
+        """Context in which no autosave runs, used e.g. while the project is saved, or while
+        objects are removed from the object store. Edits made meanwhile are autosaved afterwards.
+        """
+        self.n_paused += 1
+        if self.timer.isActive():
+            self.timer.stop()
+            self.pending = True
+        self.wait()
+        try:
+            yield
+        finally:
+            self.n_paused -= 1
+            if self.pending and not self.n_paused:
+                self.pending = False
+                self.schedule()
+
+    def autosave_target(self):
+        """Returns the project folder where the autosave revision is written, and the root
+        file pointing to it if the autosave is written in a separate project (None otherwise).
+        """
+        out_file_name = getattr(self.parent, "out_file_name", None)
+        if out_file_name and out_file_name.endswith(".p0"):
+            return out_file_name[:-3] + "_p0", None
+        if out_file_name:
+            base_name = os.path.splitext(out_file_name)[0]
+        else:
+            base_name = os.path.join(gettempdir(), "pzero")
+        return base_name + autosave_suffix + "_p0", base_name + autosave_suffix + ".p0"
+
+    def snapshot_entities(self, objects_dir=None):
+        """Returns the entities to be autosaved and their data signatures. The entities can be
+        written on another thread while the project is edited: entities unchanged since the last
+        autosave, and entities not read yet, are passed by reference to their object in objects_dir,
+        all other entities are copied."""
+        entities = []
+        signatures = {}
+        for uid, extension, vtk_obj in self.parent.vtk_entities_to_save():
+            if isinstance(vtk_obj, LazyVtkObj):
+                if vtk_obj.object_name and os.path.isfile(
+                    object_file_name(objects_dir, vtk_obj.object_name)
+                ):
+                    entities.append((uid, extension, vtk_obj))
+                else:
+                    entities.append((uid, extension, vtk_obj.detached()))
+                continue
+            signature = (id(vtk_obj), data_signature(vtk_obj))
+            signatures[uid] = signature
+            if (
+                uid not in self.dirty_uids
+                and uid in self.manifest
+                and self.signatures.get(uid) == signature
+            ):
+                file_name = object_file_name(objects_dir, self.manifest[uid])
+                if os.path.isfile(file_name):
+                    entities.append(
+                        (uid, extension, LazyVtkObj(vtk_obj=None, file_name=file_name))
+                    )
+                    continue
+            vtk_copy = vtk_obj.NewInstance()
+            vtk_copy.DeepCopy(vtk_obj)
+            entities.append((uid, extension, vtk_copy))
+        return entities, signatures
+
+    def start(self):
+        """Take a snapshot of the project and write it on a worker thread."""
+        if not self.enabled:
+            return
+        if self.running or self.n_paused:
+            self.pending = True
+            return
+        start_time = perf_counter()
+        project_dir_name, root_file_name = self.autosave_target()
+        tables = self.parent.project_tables()
+        entities, signatures = self.snapshot_entities(
+            objects_dir=objects_dir_name(project_dir_name)
+        )
+        self.snapshot_duration = perf_counter() - start_time
+        self.dirty_uids = set()
+        self.pending = False
+        self.generation += 1
+        self.thread = Thread(
+            target=self.run,
+            kwargs=dict(
+                generation=self.generation,
+                project_dir_name=project_dir_name,
+                root_file_name=root_file_name,
+                tables=tables,
+                entities=entities,
+                signatures=signatures,
+            ),
+            daemon=True,
+        )
+        self.thread.start()
+
+    def run(
+        self,
+        generation=None,
+        project_dir_name=None,
+        root_file_name=None,
+        tables=None,
+        entities=None,
+        signatures=None,
+    ):
+        """Write the snapshot. This runs on the worker thread, and must not touch the project."""
+        start_time = perf_counter()
+        result = {
+            "generation": generation,
+            "project_dir_name": project_dir_name,
+            "signatures": signatures,
+            "manifest": None,
+            "error": None,
+        }
+        try:
+            result["manifest"] = save_revision(
+                project_dir_name=project_dir_name,
+                rev_name=autosave_rev_name,
+                tables=tables,
+                entities=entities,
+                workers=0,
+                replace=True,
+            )
+            if root_file_name:
+                write_project_file(root_file_name, autosave_rev_name)
+        except Exception as error:
+            result["error"] = error
+        result["duration"] = perf_counter() - start_time
+        self.autosave_finished_signal.emit(result)
+
+    def finished(self, result=None):
+        """Slot of autosave_finished_signal, on the GUI thread."""
+        if result["generation"] == self.generation:
+            if result["error"] is None:
+                self.manifest = result["manifest"]
+                self.signatures = result["signatures"]
+                self.last_time = datetime.now()
+                self.last_duration = result["duration"]
+                if self.label:
+                    self.label.setText(
+                        "Autosave "
+                        + self.last_time.strftime("%H:%M:%S")
+                        + " ("
+                        + str(round(self.last_duration, 2))
+                        + " s)"
+                    )
+                    self.label.setToolTip(
+                        "Last autosave in "
+                        + result["project_dir_name"]
+                        + "\nSnapshot "
+                        + str(round(self.snapshot_duration * 1000))
+                        + " ms, written in background in "
+                        + str(round(self.last_duration, 2))
+                        + " s"
+                    )
+            else:
+                """Everything is copied again by the next autosave."""
+                self.manifest = {}
+                self.signatures = {}
+                if self.label:
+                    self.label.setText("Autosave failed")
+                    self.label.setToolTip(str(result["error"]))
+        if self.pending:
+            self.pending = False
+            self.schedule()
@@ -0,0 +1,242 @@
+"""cluster_planes.py
+PZero© Andrea Bistacchi
+
+Best-fitting planes and facets of the clusters of a segmented point cloud (see facets_pc and auto_pick in
+point_clouds.py).
+
+Cluster membership is computed once, with a stable argsort of the cluster ids, so that the points of each
+cluster are a contiguous slice of the sorted points. Planes are fitted to all clusters at once, with the
+covariance matrices of all clusters accumulated with np_bincount and a batched eigh, instead of a
+threshold filter and a PCA for each cluster.
+
+Facets, i.e. the Delaunay triangulation of the points of each cluster projected on its plane, are built
+in batches of clusters by a pool of worker processes. This module imports Numpy and scipy only, so the
+workers, started with spawn, do not load VTK and Qt."""
+
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from multiprocessing import get_context
+
+from numpy import abs as np_abs
+from numpy import arcsin as np_arcsin
+from numpy import arctan2 as np_arctan2
+from numpy import argsort as np_argsort
+from numpy import array as np_array
+from numpy import bincount as np_bincount
+from numpy import column_stack as np_column_stack
+from numpy import concatenate as np_concatenate
+from numpy import cross as np_cross
+from numpy import cumsum as np_cumsum
+from numpy import empty as np_empty
+from numpy import float64 as np_float64
+from numpy import int64 as np_int64
+from numpy import pi as np_pi
+from numpy import unique as np_unique
+from numpy import where as np_where
+from numpy import zeros as np_zeros
+from numpy.linalg import eigh as np_linalg_eigh
+from numpy.linalg import norm as np_linalg_norm
+from scipy.spatial import Delaunay, QhullError
+
+"""Default size of the process pool used to build facets, leaving a CPU to the GUI. On a single CPU facets
+are built on the calling thread, since starting a worker costs more than it saves."""
+facet_workers_default = max(0, min(8, (os.cpu_count() or 1) - 1))
+
+"""Approximate number of points sent to a worker in each batch of clusters. Batches keep the
+inter-process traffic low when there are tens of thousands of small clusters."""
+facet_batch_points = 200000
+
+
+def cluster_order(cluster_ids=None):
+    """Group points by cluster. Returns the cluster ids found (sorted), the order of the points sorted by
+    cluster (stable, so points keep their order within a cluster), and the bounds of the clusters in the
+    sorted points, so that the points of cluster i are order[bounds[i]:bounds[i + 1]].
+    """
+    order = np_argsort(cluster_ids, kind="stable")
+    regions, counts = np_unique(cluster_ids, return_counts=True)
+    bounds = np_concatenate([[0], np_cumsum(counts)])
+    return regions, order, bounds
+
+
+def cluster_planes(points=None, cluster_ids=None):
+    """Best-fitting plane of the points of each cluster, as computed by best_fitting_plane for a single
+    cluster: the centre is the mean of the points and the normal is the eigenvector with the smallest
+    eigenvalue of their covariance matrix, pointing downwards as in the DOM tools. Returns the cluster ids
+    found (sorted), the centres and normals as (n_clusters, 3) arrays, and the number of points of each
+    cluster. Coordinates are centred on the centre of their cluster before computing the covariances, so
+    large (e.g. UTM) coordinates do not lose precision."""
+    regions, inverse, counts = np_unique(
+        cluster_ids, return_inverse=True, return_counts=True
+    )
+    n_regions = regions.size
+    centers = (
+        np_column_stack(
+            [
+                np_bincount(inverse, weights=points[:, i], minlength=n_regions)
+                for i in range(3)
+            ]
+        )
+        / counts[:, None]
+    )
+    centred = points - centers[inverse]
+    covariances = np_empty((n_regions, 3, 3))
+    for i in range(3):
+        for j in range(i, 3):
+            covariances[:, i, j] = covariances[:, j, i] = np_bincount(
+                inverse, weights=centred[:, i] * centred[:, j], minlength=n_regions
+            )
+    _, eigenvectors = np_linalg_eigh(covariances / counts[:, None, None])
+    normals = eigenvectors[:, :, 0]
+    normals = np_where(normals[:, 2:] >= 0, -normals, normals)
+    return regions, centers, normals, counts
+
+
+def plane_attitudes(normals=None):
+    """Dip direction and dip, in degrees, of downward normals, as computed in facets_pc."""
+    dip_directions = (
+        np_arctan2(normals[:, 0], normals[:, 1]) * 180 / np_pi - 180
+    ) % 360
+    dips = 90 - np_arcsin(-normals[:, 2]) * 180 / np_pi
+    return dip_directions, dips
+
+
+def plane_axes(normal=None):
+    """Unit strike (horizontal) and dip vectors of a plane with the given normal. The strike of a
+    horizontal plane is taken along X."""
+    strike = np_array([normal[1], -normal[0], 0.0])
+    if np_linalg_norm(strike) < 1e-12:
+        strike = np_array([1.0, 0.0, 0.0])
+    strike /= np_linalg_norm(strike)
+    return strike, np_cross(normal, strike)
+
+
+def triangulate_facet(points=None, center=None, normal=None):
+    """Facet of a cluster: its points projected on the plane (center, normal), triangulated with a 2D
+    Delaunay triangulation in the plane, as done before with vtkProjectPointsToPlane and vtkDelaunay2D.
+    Returns the projected points, the (n, 3) triangles, the area of the facet, and its width and length
+    along strike and dip. Clusters with less than 3 points, or with collinear points, have no triangles.
+    """
+    points = points - ((points - center) @ normal)[:, None] * normal
+    strike, dip = plane_axes(normal)
+    uv = np_column_stack([(points - center) @ strike, (points - center) @ dip])
+    width = float(uv[:, 0].max() - uv[:, 0].min()) if len(uv) else 0.0
+    length = float(uv[:, 1].max() - uv[:, 1].min()) if len(uv) else 0.0
+    try:
+        triangles = Delaunay(uv).simplices.astype(np_int64)
+    except (QhullError, ValueError):
+        triangles = np_zeros((0, 3), dtype=np_int64)
+    edges_1 = uv[triangles[:, 1]] - uv[triangles[:, 0]]
+    edges_2 = uv[triangles[:, 2]] - uv[triangles[:, 0]]
+    area = float(
+        np_abs(edges_1[:, 0] * edges_2[:, 1] - edges_1[:, 1] * edges_2[:, 0]).sum() / 2
+    )
+    return points, triangles, area, width, length
+
+
+def triangulate_facets(batch=None):
+    """Facets of a batch of clusters, given as a list of (points, center, normal). Run in the workers."""
+    return [
+        triangulate_facet(points=points, center=center, normal=normal)
+        for points, center, normal in batch
+    ]
+
+
+def facet_batches(points=None, order=None, bounds=None, centers=None, normals=None):
+    """Yield (first cluster, batch) with consecutive clusters and about facet_batch_points points each."""
+    first = 0
+    n_regions = len(bounds) - 1
+    while first < n_regions:
+        last = first + 1
+        while (
+            last < n_regions and bounds[last + 1] - bounds[first] <= facet_batch_points
+        ):
+            last += 1
+        yield first, [
+            (points[order[bounds[i] : bounds[i + 1]]], centers[i], normals[i])
+            for i in range(first, last)
+        ]
+        first = last
+
+
+def build_facets(
+    points=None, cluster_ids=None, workers=None, callback=None, cancel=None
+):
+    """Planes and facets of all the clusters of a point cloud. Facets are triangulated by a pool of workers
+    processes (0 to work on the calling thread), in batches of clusters. callback, if given, is called
+    with the number of clusters done after each batch, and cancel, if given, is called after each batch
+    and stops the job if it returns True, in which case None is returned. Otherwise returns a dictionary
+    with regions, centers, normals, dip_directions, dips, areas, widths, lengths (one row per cluster)
+    and the points and triangles of all the facets, merged so that they can be set at once in a TriSurf.
+    """
+    if workers is None:
+        workers = facet_workers_default
+    points = points.astype(np_float64, copy=False)
+    regions, centers, normals, _ = cluster_planes(
+        points=points, cluster_ids=cluster_ids
+    )
+    _, order, bounds = cluster_order(cluster_ids=cluster_ids)
+    facets = [None] * regions.size
+
+    def collect(first=None, results=None):
+        facets[first : first + len(results)] = results
+        if callback:
+            callback(len(results))
+        return cancel is not None and cancel()
+
+    batches = facet_batches(
+        points=points, order=order, bounds=bounds, centers=centers, normals=normals
+    )
+    if workers == 0:
+        for first, batch in batches:
+            if collect(first=first, results=triangulate_facets(batch)):
+                return None
+    else:
+        """Spawn is used instead of fork since the parent is a Qt application with running threads, and
+        at most 2 * workers batches are pending, to bound the memory used by their points.
+        """
+        pool = ProcessPoolExecutor(max_workers=workers, mp_context=get_context("spawn"))
+        pending = {}
+        try:
+            for first, batch in batches:
+                if len(pending) >= 2 * workers:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        if collect(first=pending.pop(future), results=future.result()):
+                            return None
+                pending[pool.submit(triangulate_facets, batch)] = first
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    if collect(first=pending.pop(future), results=future.result()):
+                        return None
+        finally:
+            """Batches not started yet are cancelled one by one, since shutdown(cancel_futures=True)
+            needs Python 3.9."""
+            for future in pending:
+                future.cancel()
+            pool.shutdown(wait=True)
+
+    offsets = np_cumsum([0] + [len(facet[0]) for facet in facets])
+    dip_directions, dips = plane_attitudes(normals=normals)
+    return {
+        "regions": regions,
+        "centers": centers,
+        "normals": normals,
+        "dip_directions": dip_directions,
+        "dips": dips,
+        "areas": np_array([facet[2] for facet in facets]),
+        "widths": np_array([facet[3] for facet in facets]),
+        "lengths": np_array([facet[4] for facet in facets]),
+        "points": (
+            np_concatenate([facet[0] for facet in facets])
+            if facets
+            else np_zeros((0, 3))
+        ),
+        "triangles": (
+            np_concatenate(
+                [facet[1] + offset for facet, offset in zip(facets, offsets)]
+            )
+            if facets
+            else np_zeros((0, 3), dtype=np_int64)
+        ),
+    }
@@ -8,6 +8,9 @@ import numpy as np
 import pandas as pd
 from PyQt5.QtCore import QAbstractTableModel, Qt, QVariant
 
+from pzero.collections.base_collection import BaseCollection
+from pzero.project_io import LazyVtkObj
+
 """Options to print Pandas dataframes in console when testing."""
 pd_desired_width = 800
 pd_max_columns = 20
@@ -20,7 +23,7 @@ pd.set_option("display.precision", pd_show_precision)
 pd.set_option("display.max_colwidth", pd_max_colwidth)
 
 
-class BackgroundCollection(QAbstractTableModel):
+class BackgroundCollection(BaseCollection):
     """
     Initialize BackgroundCollection table.
     Column headers are taken from BackgroundCollection.background_entity_dict.keys()
@@ -76,9 +79,7 @@ class BackgroundCollection(QAbstractTableModel):
     """IN THE FUTURE the edit dialog should be able to edit metadata of multiple entities (and selecting "None" will not change them)."""
 
     def __init__(self, parent=None, *args, **kwargs):
-        super(BackgroundCollection, self).__init__(*args, **kwargs)
-        """Import reference to parent, otherwise it is difficult to reference them in SetData() that has a standard list of inputs."""
-        self.parent = parent
+        super(BackgroundCollection, self).__init__(parent, *args, **kwargs)
 
         """Initialize Pandas dataframe."""
         self.df = pd.DataFrame(columns=list(self.background_entity_dict.keys()))
@@ -90,60 +91,78 @@ class BackgroundCollection(QAbstractTableModel):
 
     def add_entity_from_dict(self, entity_dict=None, color=None):
         """Add entity to collection from dictionary."""
+        return self.add_entities_from_dicts(entity_dicts=[entity_dict], color=color)[0]
+
+    def add_entities_from_dicts(self, entity_dicts=None, color=None):
+        """Add entities to collection from a list of dictionaries, with a single model reset, legend
+        update and signal. Returns the list of uids."""
+        if not entity_dicts:
+            return []
         """Create a new uid if it is not included in the dictionary."""
-        if not entity_dict["uid"]:
-            entity_dict["uid"] = str(uuid.uuid4())
-        """"Append new row to dataframe. Note that the 'append()' method for Pandas dataframes DOES NOT
-        work in place, hence a NEW dataframe is created every time and then substituted to the old one."""
-        self.df = self.df.append(entity_dict, ignore_index=True)
+        for entity_dict in entity_dicts:
+            if not entity_dict["uid"]:
+                entity_dict["uid"] = str(uuid.uuid4())
+        """Append new rows to dataframe."""
+        self.append_entity_rows(entity_dicts)
         """Reset data model"""
         self.modelReset.emit()
         """Then add new background_type / feature to the legend if needed."""
-        background_type = entity_dict["background_type"]
-        feature = entity_dict["background_feature"]
-        if self.parent.backgrounds_legend_df.loc[
-            (self.parent.backgrounds_legend_df["background_type"] == background_type)
-            & (self.parent.backgrounds_legend_df["background_feature"] == feature)
-        ].empty:
+        legend_keys = set(
+            zip(
+                self.parent.backgrounds_legend_df["background_type"],
+                self.parent.backgrounds_legend_df["background_feature"],
+            )
+        )
+        new_legend_rows = []
+        for entity_dict in entity_dicts:
+            legend_key = (
+                entity_dict["background_type"],
+                entity_dict["background_feature"],
+            )
+            if legend_key in legend_keys:
+                continue
+            legend_keys.add(legend_key)
             if color:
-                print(color)
                 R, G, B = color
             else:
                 R, G, B = np.round(np.random.random(3) * 255)
+            new_legend_rows.append(
+                {
+                    "background_type": legend_key[0],
+                    "background_feature": legend_key[1],
+                    "color_R": R,
+                    "color_G": G,
+                    "color_B": B,
+                    "line_thick": 2.0,
+                    "point_size": 10.0,
+                    "opacity": 100,
+                }
+            )
+        if new_legend_rows:
             self.parent.backgrounds_legend_df = (
                 self.parent.backgrounds_legend_df.append(
-                    {
-                        "background_type": background_type,
-                        "background_feature": feature,
-                        "color_R": R,
-                        "color_G": G,
-                        "color_B": B,
-                        "line_thick": 2.0,
-                        "point_size": 10.0,
-                        "opacity": 100,
-                    },
-                    ignore_index=True,
+                    new_legend_rows, ignore_index=True
                 )
             )
             self.parent.legend.update_widget(self.parent)
             self.parent.prop_legend.update_widget(self.parent)
         """Then emit signal to update the views."""
-        self.parent.background_added_signal.emit(
-            [entity_dict["uid"]]
-        )  # a list of uids is emitted, even if the entity is just one, for future compatibility
-        return entity_dict["uid"]
+        uids = [entity_dict["uid"] for entity_dict in entity_dicts]
+        self.parent.background_added_signal.emit(uids)
+        return uids
 
     def remove_entity(self, uid=None):
         """Remove entity from collection."""
-        """Remove row from dataframe and reset data model."""
-        if not uid in self.get_uids():
-            return
-        self.df.drop(
-            self.parent.backgrounds_coll.df[
-                self.parent.backgrounds_coll.df["uid"] == uid
-            ].index,
-            inplace=True,
-        )
+        if self.remove_entities(uids=[uid]):
+            return uid
+
+    def remove_entities(self, uids=None):
+        """Remove entities from collection, with a single model reset, legend update and signal.
+        Returns the list of uids actually removed."""
+        """Remove rows from dataframe and reset data model."""
+        uids = self.drop_entity_rows(uids)
+        if not uids:
+            return uids
         self.modelReset.emit()  # is this really necessary?
         """Then remove background_type / feature from legend if needed."""
         """table_updated is used to record if the table is updated or not"""
@@ -200,10 +219,8 @@ class BackgroundCollection(QAbstractTableModel):
         if table_updated:
             self.parent.legend.update_widget(self.parent)
             self.parent.prop_legend.update_widget(self.parent)
-        self.parent.background_removed_signal.emit(
-            [uid]
-        )  # a list of uids is emitted, even if the entity is just one
-        return uid
+        self.parent.background_removed_signal.emit(uids)
+        return uids
 
     def clone_entity(self, uid=None):
         """Clone an entity. Take care since this sends signals immediately."""
@@ -223,12 +240,10 @@ class BackgroundCollection(QAbstractTableModel):
         return out_uid
 
     def replace_vtk(self, uid=None, vtk_object=None, const_color=False):
-        if isinstance(
-            vtk_object, type(self.df.loc[self.df["uid"] == uid, "vtk_obj"].values[0])
-        ):
+        if isinstance(vtk_object, type(self.get_uid_vtk_obj(uid))):
             new_dict = deepcopy(
-                self.df.loc[
-                    self.df["uid"] == uid, self.df.columns != "vtk_obj"
+                self.df.iloc[
+                    [self.get_uid_row(uid)], self.df.columns != "vtk_obj"
                 ].to_dict("records")[0]
             )
             new_dict["vtk_obj"] = vtk_object
@@ -301,12 +316,8 @@ class BackgroundCollection(QAbstractTableModel):
                 table_updated = table_updated or True
         """Then add new background_type or feature"""
         for uid in self.parent.backgrounds_coll.df["uid"].to_list():
-            background_type = self.parent.backgrounds_coll.df.loc[
-                self.parent.backgrounds_coll.df["uid"] == uid, "type"
-            ].values[0]
-            feature = self.parent.backgrounds_coll.df.loc[
-                self.parent.backgrounds_coll.df["uid"] == uid, "feature"
-            ].values[0]
+            background_type = self.get_uid_value(uid=uid, column="type")
+            feature = self.get_uid_value(uid=uid, column="feature")
             if self.parent.backgrounds_legend_df.loc[
                 (
                     self.parent.backgrounds_legend_df["background_type"]
@@ -338,10 +349,8 @@ class BackgroundCollection(QAbstractTableModel):
 
     def get_uid_legend(self, uid=None):
         """Get legend as dictionary from uid."""
-        background_type = self.df.loc[self.df["uid"] == uid, "background_type"].values[
-            0
-        ]
-        feature = self.df.loc[self.df["uid"] == uid, "background_feature"].values[0]
+        background_type = self.get_uid_value(uid=uid, column="background_type")
+        feature = self.get_uid_value(uid=uid, column="background_feature")
         legend_dict = self.parent.backgrounds_legend_df.loc[
             (self.parent.backgrounds_legend_df["background_type"] == background_type)
             & (self.parent.backgrounds_legend_df["background_feature"] == feature)
@@ -367,64 +376,64 @@ class BackgroundCollection(QAbstractTableModel):
 
     def get_uid_name(self, uid=None):
         """Get value(s) stored in dataframe (as pointer) from uid."""
-        return self.df.loc[self.df["uid"] == uid, "name"].values[0]
+        return self.get_uid_value(uid=uid, column="name")
 
     def set_uid_name(self, uid=None, name=None):
         """Set value(s) stored in dataframe (as pointer) from uid."""
-        self.df.loc[self.df["uid"] == uid, "name"] = name
+        self.set_uid_value(uid=uid, column="name", value=name)
 
     def get_name_uid(self, name=None):
         return self.df.loc[self.df["name"] == name, "uid"].values[0]
 
     def get_uid_topological_type(self, uid=None):
         """Get value(s) stored in dataframe (as pointer) from uid."""
-        return self.df.loc[self.df["uid"] == uid, "topological_type"].values[0]
+        return self.get_uid_value(uid=uid, column="topological_type")
 
     def set_uid_topological_type(self, uid=None, topological_type=None):
         """Set value(s) stored in dataframe (as pointer) from uid."""
-        self.df.loc[self.df["uid"] == uid, "topological_type"] = topological_type
+        self.set_uid_value(uid=uid, column="topological_type", value=topological_type)
 
     def get_uid_background_type(self, uid=None):
         """Get value(s) stored in dataframe (as pointer) from uid."""
-        return self.df.loc[self.df["uid"] == uid, "background_type"].values[0]
+        return self.get_uid_value(uid=uid, column="background_type")
 
     def set_uid_background_type(self, uid=None, type=None):
         """Set value(s) stored in dataframe (as pointer) from uid."""
-        self.df.loc[self.df["uid"] == uid, "background_type"] = type
+        self.set_uid_value(uid=uid, column="background_type", value=type)
 
     def get_uid_background_feature(self, uid=None):
         """Get value(s) stored in dataframe (as pointer) from uid."""
-        return self.df.loc[self.df["uid"] == uid, "background_feature"].values[0]
+        return self.get_uid_value(uid=uid, column="background_feature")
 
     def set_uid_background_feature(self, uid=None, feature=None):
         """Set value(s) stored in dataframe (as pointer) from uid."""
-        self.df.loc[self.df["uid"] == uid, "background_feature"] = feature
+        self.set_uid_value(uid=uid, column="background_feature", value=feature)
 
     def get_uid_properties_names(self, uid=None):
         """Get value(s) stored in dataframe (as pointer) from uid. This is a LIST even if we extract it with values[0]!"""
-        return self.df.loc[self.df["uid"] == uid, "properties_names"].values[0]
+        return self.get_uid_value(uid=uid, column="properties_names")
 
     def set_uid_properties_names(self, uid=None, properties_names=None):
         """Set value(s) stored in dataframe (as pointer) from uid. This is a LIST and "at" must be used!"""
-        row = self.df[self.df["uid"] == uid].index.values[0]
-        self.df.at[row, "properties_names"] = properties_names
+        self.set_uid_value(uid=uid, column="properties_names", value=properties_names)
 
     def get_uid_properties_components(self, uid=None):
         """Get value(s) stored in dataframe (as pointer) from uid. This is a LIST even if we extract it with values[0]!"""
-        return self.df.loc[self.df["uid"] == uid, "properties_components"].values[0]
+        return self.get_uid_value(uid=uid, column="properties_components")
 
     def set_uid_properties_components(self, uid=None, properties_components=None):
         """Set value(s) stored in dataframe (as pointer) from uid. This is a LIST and "at" must be used!"""
-        row = self.df[self.df["uid"] == uid].index.values[0]
-        self.df.at[row, "properties_components"] = properties_components
+        self.set_uid_value(
+            uid=uid, column="properties_components", value=properties_components
+        )
 
     def get_uid_x_section(self, uid=None):
         """Get value(s) stored in dataframe (as pointer) from uid."""
-        return self.df.loc[self.df["uid"] == uid, "x_section"].values[0]
+        return self.get_uid_value(uid=uid, column="x_section")
 
     def set_uid_x_section(self, uid=None, x_section=None):
         """Set value(s) stored in dataframe (as pointer) from uid."""
-        self.df.loc[self.df["uid"] == uid, "x_section"] = x_section
+        self.set_uid_value(uid=uid, column="x_section", value=x_section)
 
     def get_xuid_uid(self, xuid=None):
         """[Gabriele] Get the uids of the background objects for the corresponding xsec uid (parent)"""
@@ -436,19 +445,23 @@ class BackgroundCollection(QAbstractTableModel):
         return self.df.loc[self.df["borehole"] == buid, "uid"]
 
     def get_uid_borehole(self, uid=None):
-        return self.df.loc[self.df["uid"] == uid, "borehole"].values[0]
+        return self.get_uid_value(uid=uid, column="borehole")
 
     def set_uid_borehole(self, uid=None, borehole=None):
         """Set value(s) stored in dataframe (as pointer) from uid."""
-        self.df.loc[self.df["uid"] == uid, "x_section"] = borehole
+        self.set_uid_value(uid=uid, column="x_section", value=borehole)
 
     def get_uid_vtk_obj(self, uid=None):
-        """Get value(s) stored in dataframe (as pointer) from uid."""
-        return self.df.loc[self.df["uid"] == uid, "vtk_obj"].values[0]
+        """Get value(s) stored in dataframe (as pointer) from uid. Entities of a project
+        opened with lazy loading are read from file on first access."""
+        vtk_obj = self.get_uid_value(uid=uid, column="vtk_obj")
+        if isinstance(vtk_obj, LazyVtkObj):
+            vtk_obj = self.parent.vtk_obj_cache.load(collection=self, uid=uid)
+        return vtk_obj
 
     def set_uid_vtk_obj(self, uid=None, vtk_obj=None):
         """Set value(s) stored in dataframe (as pointer) from uid."""
-        self.df.loc[self.df["uid"] == uid, "vtk_obj"] = vtk_obj
+        self.set_uid_value(uid=uid, column="vtk_obj", value=vtk_obj)
 
     def append_uid_property(
         self, uid=None, property_name=None, property_components=None
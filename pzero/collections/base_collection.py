@@ -0,0 +1,110 @@
+"""base_collection.py
+PZero© Andrea Bistacchi"""
+
+from PyQt5.QtCore import QAbstractTableModel
+from pandas import DataFrame as pd_DataFrame
+from pandas import concat as pd_concat
+from pandas import unique as pd_unique
+
+
+class BaseCollection(QAbstractTableModel):
+    """Base class of all collections. Entities are rows of the Pandas dataframe self.df, and are
+    found by uid through a hash index {uid: row position}, so that the get_uid_* and set_uid_*
+    accessors do not scan the whole "uid" column.
+
+    The index is updated by append_entity_rows and drop_entity_rows, used by add_entities_from_dicts,
+    remove_entities and replace_vtk. Assigning a new dataframe to self.df (e.g. when a project is
+    opened) invalidates the index, that is rebuilt on the next lookup. The row found in the index is
+    always checked against the "uid" column, so the index is rebuilt also if self.df has been
+    edited in place somewhere else (e.g. sorted or with rows dropped)."""
+
+    def __init__(self, parent=None, *args, **kwargs):
+        super(BaseCollection, self).__init__(*args, **kwargs)
+        """Import reference to parent, otherwise it is difficult to reference them in SetData() that has a standard list of inputs."""
+        self.parent = parent
+        self._df = None
+        self._uid_rows = None
+
+    @property
+    def df(self):
+        """Pandas dataframe with one row per entity."""
+        return self._df
+
+    @df.setter
+    def df(self, df=None):
+        self._df = df
+        self.reset_indexes()
+
+    def reset_indexes(self):
+        """Reset indexes derived from self.df when a new dataframe is assigned. Collections with
+        other indexes extend this method."""
+        self._uid_rows = None
+
+    @property
+    def uid_rows(self):
+        """Hash index {uid: row position in self.df}, rebuilt if needed. If the same uid is found
+        in more than one row, the first one is indexed, as with .values[0] in a linear scan.
+        """
+        if self._uid_rows is None:
+            n_rows = self._df.shape[0]
+            self._uid_rows = dict(
+                zip(self._df["uid"].values[::-1], range(n_rows - 1, -1, -1))
+            )
+        return self._uid_rows
+
+    def get_uid_row(self, uid=None):
+        """Get position of the row of entity uid in self.df. Raises IndexError if uid is
+        not in the collection, as the .values[0] of a linear scan used to do."""
+        row = self.uid_rows.get(uid)
+        if row is None or row >= self._df.shape[0] or self._df["uid"].iat[row] != uid:
+            """The dataframe has been edited in place: rebuild the index and try again."""
+            self._uid_rows = None
+            row = self.uid_rows.get(uid)
+            if row is None:
+                raise IndexError("uid " + str(uid) + " not found in collection")
+        return row
+
+    def get_uid_value(self, uid=None, column=None):
+        """Get value stored in dataframe (as pointer) from uid and column name."""
+        return self._df[column].iat[self.get_uid_row(uid)]
+
+    def set_uid_value(self, uid=None, column=None, value=None):
+        """Set value stored in dataframe (as pointer) from uid and column name. This works
+        also for lists and other sequences, that must not be unpacked over several rows.
+        Nothing is set if uid is not in the collection, and a missing column is added (e.g. the
+        vtk_obj column of a table just read from a project)."""
+        try:
+            row = self.get_uid_row(uid)
+        except IndexError:
+            return
+        if column not in self._df.columns:
+            self._df[column] = None
+        self._df.iat[row, self._df.columns.get_loc(column)] = value
+
+    def append_entity_rows(self, entity_dicts=None):
+        """Append one row per dictionary in entity_dicts to the dataframe and add them to the index.
+        Note that appending to a Pandas dataframe DOES NOT work in place, hence a NEW dataframe is
+        created and then substituted to the old one, with a single concat for all the rows. Other
+        indexes are not reset, and must be updated by the caller."""
+        if not entity_dicts:
+            return
+        n_rows = self._df.shape[0]
+        self._df = pd_concat(
+            [self._df, pd_DataFrame(entity_dicts)],
+            ignore_index=True,
+        )
+        if self._uid_rows is not None:
+            for row, entity_dict in enumerate(entity_dicts, start=n_rows):
+                self._uid_rows.setdefault(entity_dict["uid"], row)
+
+    def drop_entity_rows(self, uids=None):
+        """Remove the rows of all entities in uids from the dataframe in place, with a single drop.
+        The index is rebuilt on the next lookup. Returns the uids actually found in the collection.
+        """
+        mask = self._df["uid"].isin(uids).values
+        if not mask.any():
+            return []
+        dropped_uids = list(pd_unique(self._df["uid"].values[mask]))
+        self._df.drop(self._df.index[mask], inplace=True)
+        self._uid_rows = None
+        return dropped_uids
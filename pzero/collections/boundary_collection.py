@@ -12,8 +12,10 @@ from pandas import DataFrame as pd_DataFrame
 from pandas import set_option as pd_set_option
 from vtk import vtkPoints
 
+from pzero.collections.base_collection import BaseCollection
 from pzero.entities_factory import PolyLine, TriSurf
 from pzero.helpers.helper_dialogs import general_input_dialog
+from pzero.project_io import LazyVtkObj
 
 """Options to print Pandas dataframes in console for testing."""
 pd_desired_width = 800
@@ -163,7 +165,7 @@ def boundary_from_points(self, vector):
     self.enable_actions()
 
 
-class BoundaryCollection(QAbstractTableModel):
+class BoundaryCollection(BaseCollection):
     """
     Initialize BoundaryCollection table.
     Column headers are taken from BoundaryCollection.boundary_entity_dict.keys()
@@ -198,9 +200,7 @@ class BoundaryCollection(QAbstractTableModel):
     """IN THE FUTURE the edit dialog should be able to edit metadata of multiple entities (and selecting "None" will not change them)."""
 
     def __init__(self, parent=None, *args, **kwargs):
-        super(BoundaryCollection, self).__init__(*args, **kwargs)
-        """Import reference to parent, otherwise it is difficult to reference them in SetData() that has a standard list of inputs."""
-        self.parent = parent
+        super(BoundaryCollection, self).__init__(parent, *args, **kwargs)
 
         """Initialize Pandas dataframe."""
         self.df = pd_DataFrame(columns=list(self.boundary_entity_dict.keys()))
@@ -211,38 +211,48 @@ class BoundaryCollection(QAbstractTableModel):
     """Custom methods used to add or remove entities, query the dataframe, etc."""
 
     def add_entity_from_dict(self, entity_dict=None):
-        """Add entity to collection from dictionary.
-        Create a new uid if it is not included in the dictionary."""
-        if not entity_dict["uid"]:
-            entity_dict["uid"] = str(uuid_uuid4())
-        """"Append new row to dataframe. Note that the 'append()' method for Pandas dataframes DOES NOT
-        work in place, hence a NEW dataframe is created every time and then substituted to the old one."""
-        self.df = self.df.append(entity_dict, ignore_index=True)
+        """Add entity to collection from dictionary."""
+        return self.add_entities_from_dicts(entity_dicts=[entity_dict])[0]
+
+    def add_entities_from_dicts(self, entity_dicts=None):
+        """Add entities to collection from a list of dictionaries, with a single model reset and
+        signal. Create a new uid if it is not included in the dictionary. Returns the list of uids.
+        """
+        if not entity_dicts:
+            return []
+        for entity_dict in entity_dicts:
+            if not entity_dict["uid"]:
+                entity_dict["uid"] = str(uuid_uuid4())
+        """Append new rows to dataframe."""
+        self.append_entity_rows(entity_dicts)
         """Reset data model"""
         self.modelReset.emit()
         """Then emit signal to update the views."""
-        self.parent.boundary_added_signal.emit(
-            [entity_dict["uid"]]
-        )  # a list of uids is emitted, even if the entity is just one
-        return entity_dict["uid"]
+        uids = [entity_dict["uid"] for entity_dict in entity_dicts]
+        self.parent.boundary_added_signal.emit(uids)
+        return uids
 
     def remove_entity(self, uid=None):
-        """Remove entity from collection. Remove row from dataframe and reset data model."""
-        self.df.drop(self.df[self.df["uid"] == uid].index, inplace=True)
+        """Remove entity from collection."""
+        if self.remove_entities(uids=[uid]):
+            return uid
+
+    def remove_entities(self, uids=None):
+        """Remove entities from collection, with a single model reset and signal. Remove rows from
+        dataframe and reset data model. Returns the list of uids actually removed."""
+        uids = self.drop_entity_rows(uids)
+        if not uids:
+            return uids
         self.modelReset.emit()  # is this really necessary?
         """When done, send a signal over to the views."""
-        self.parent.boundary_removed_signal.emit(
-            [uid]
-        )  # a list of uids is emitted, even if the entity is just one
-        return uid
+        self.parent.boundary_removed_signal.emit(uids)
+        return uids
 
     def replace_vtk(self, uid=None, vtk_object=None):
-        if isinstance(
-            vtk_object, type(self.df.loc[self.df["uid"] == uid, "vtk_obj"].values[0])
-        ):
+        if isinstance(vtk_object, type(self.get_uid_vtk_obj(uid))):
             new_dict = deepcopy(
-                self.df.loc[
-                    self.df["uid"] == uid, self.df.columns != "vtk_obj"
+                self.df.iloc[
+                    [self.get_uid_row(uid)], self.df.columns != "vtk_obj"
                 ].to_dict("records")[0]
             )
             new_dict["vtk_obj"] = vtk_object
@@ -278,35 +288,39 @@ class BoundaryCollection(QAbstractTableModel):
 
     def get_uid_name(self, uid=None):
         """Get value(s) stored in dataframe (as pointer) from uid."""
-        return self.df.loc[self.df["uid"] == uid, "name"].values[0]
+        return self.get_uid_value(uid=uid, column="name")
 
     def set_uid_name(self, uid=None, name=None):
         """Set value(s) stored in dataframe (as pointer) from uid."""
-        self.df.loc[self.df["uid"] == uid, "name"] = name
+        self.set_uid_value(uid=uid, column="name", value=name)
 
     def get_uid_topological_type(self, uid=None):
         """Get value(s) stored in dataframe (as pointer) from uid."""
-        return self.df.loc[self.df["uid"] == uid, "topological_type"].values[0]
+        return self.get_uid_value(uid=uid, column="topological_type")
 
     def set_uid_topological_type(self, uid=None, topological_type=None):
         """Set value(s) stored in dataframe (as pointer) from uid."""
-        self.df.loc[self.df["uid"] == uid, "topological_type"] = topological_type
+        self.set_uid_value(uid=uid, column="topological_type", value=topological_type)
 
     def get_uid_x_section(self, uid=None):
         """Get value(s) stored in dataframe (as pointer) from uid."""
-        return self.df.loc[self.df["uid"] == uid, "x_section"].values[0]
+        return self.get_uid_value(uid=uid, column="x_section")
 
     def set_uid_x_section(self, uid=None, x_section=None):
         """Set value(s) stored in dataframe (as pointer) from uid."""
-        self.df.loc[self.df["uid"] == uid, "x_section"] = x_section
+        self.set_uid_value(uid=uid, column="x_section", value=x_section)
 
     def get_uid_vtk_obj(self, uid=None):
-        """Get value(s) stored in dataframe (as pointer) from uid."""
-        return self.df.loc[self.df["uid"] == uid, "vtk_obj"].values[0]
+        """Get value(s) stored in dataframe (as pointer) from uid. Entities of a project
+        opened with lazy loading are read from file on first access."""
+        vtk_obj = self.get_uid_value(uid=uid, column="vtk_obj")
+        if isinstance(vtk_obj, LazyVtkObj):
+            vtk_obj = self.parent.vtk_obj_cache.load(collection=self, uid=uid)
+        return vtk_obj
 
     def set_uid_vtk_obj(self, uid=None, vtk_obj=None):
         """Set value(s) stored in dataframe (as pointer) from uid."""
-        self.df.loc[self.df["uid"] == uid, "vtk_obj"] = vtk_obj
+        self.set_uid_value(uid=uid, column="vtk_obj", value=vtk_obj)
 
     """Standard QT methods slightly adapted to the data source."""
 
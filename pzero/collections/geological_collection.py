@@ -2,6 +2,7 @@
 PZero© Andrea Bistacchi"""
 
 import uuid
+from collections import Counter
 from copy import deepcopy
 
 from PyQt5.QtCore import QAbstractTableModel, Qt, QVariant
@@ -10,7 +11,9 @@ from numpy import round as np_round
 from numpy import set_printoptions as np_set_set_printoptions
 from pandas import DataFrame as pd_DataFrame
 from pandas import set_option as pd_set_option
-from pandas import unique as pd_unique
+
+from pzero.collections.base_collection import BaseCollection
+from pzero.project_io import LazyVtkObj
 
 """Options to print Pandas dataframes in console when testing."""
 pd_desired_width = 800
@@ -24,7 +27,7 @@ pd_set_option("display.precision", pd_show_precision)
 pd_set_option("display.max_colwidth", pd_max_colwidth)
 
 
-class GeologicalCollection(QAbstractTableModel):
+class GeologicalCollection(BaseCollection):
     """
     Initialize GeologicalCollection table.
     Column headers are taken from GeologicalCollection.geological_entity_dict.keys()
@@ -87,14 +90,15 @@ class GeologicalCollection(QAbstractTableModel):
         "XsPolyLine",
     ]
 
+    """Columns that define the legend of an entity."""
+    legend_key_columns = ["geological_type", "geological_feature", "scenario"]
+
     """Initialize GeologicalCollection table. Column headers are taken from
     GeologicalCollection.geological_entity_dict.keys(), and parent is supposed to be the project_window."""
     """IN THE FUTURE the edit dialog should be able to edit metadata of multiple entities (and selecting "None" will not change them)."""
 
     def __init__(self, parent=None, *args, **kwargs):
-        super(GeologicalCollection, self).__init__(*args, **kwargs)
-        """Import reference to parent, otherwise it is difficult to reference them in SetData() that has a standard list of inputs."""
-        self.parent = parent
+        super(GeologicalCollection, self).__init__(parent, *args, **kwargs)
 
         """Initialize Pandas dataframe."""
         self.df = pd_DataFrame(columns=list(self.geological_entity_dict.keys()))
@@ -108,146 +112,58 @@ class GeologicalCollection(QAbstractTableModel):
 
     def add_entity_from_dict(self, entity_dict=None, color=None):
         """Add entity to collection from dictionary."""
+        return self.add_entities_from_dicts(entity_dicts=[entity_dict], color=color)[0]
+
+    def add_entities_from_dicts(self, entity_dicts=None, color=None):
+        """Add entities to collection from a list of dictionaries, with a single model reset, legend
+        update and signal, so that importing many entities does not copy the dataframe once per entity.
+        Returns the list of uids."""
+        if not entity_dicts:
+            return []
         """Create a new uid if it is not included in the dictionary."""
-        if not entity_dict["uid"]:
-            entity_dict["uid"] = str(uuid.uuid4())
-        """"Append new row to dataframe. Note that the 'append()' method for Pandas dataframes DOES NOT
-        work in place, hence a NEW dataframe is created every time and then substituted to the old one."""
-        self.df = self.df.append(entity_dict, ignore_index=True)
+        for entity_dict in entity_dicts:
+            if not entity_dict["uid"]:
+                entity_dict["uid"] = str(uuid.uuid4())
+        """Append new rows to dataframe."""
+        self.append_entity_rows(entity_dicts)
         """Reset data model"""
         self.modelReset.emit()
         """Then add new geo_type / feature / scenario to the legend if needed."""
-        geo_type = entity_dict["geological_type"]
-        feature = entity_dict["geological_feature"]
-        scenario = entity_dict["scenario"]
-        if self.parent.geol_legend_df.loc[
-            (self.parent.geol_legend_df["geological_type"] == geo_type)
-            & (self.parent.geol_legend_df["geological_feature"] == feature)
-            & (self.parent.geol_legend_df["scenario"] == scenario)
-        ].empty:
-            if color:
-                R, G, B = color
-            else:
-                R, G, B = np_round(np_random.random(3) * 255)
-            self.parent.geol_legend_df = self.parent.geol_legend_df.append(
-                {
-                    "geological_type": geo_type,
-                    "geological_feature": feature,
-                    "scenario": scenario,
-                    "color_R": R,
-                    "color_G": G,
-                    "color_B": B,
-                    "line_thick": 5.0,
-                    "point_size": 10.0,
-                    "opacity": 100,
-                    "geological_time": 0.0,
-                    "geological_sequence": "strati_0",
-                },
-                ignore_index=True,
-            )
+        if self.update_legend_counts(
+            added_keys=[
+                tuple(entity_dict[column] for column in self.legend_key_columns)
+                for entity_dict in entity_dicts
+            ],
+            color=color,
+        ):
             self.parent.legend.update_widget(self.parent)
             self.parent.prop_legend.update_widget(self.parent)
         """Then emit signal to update the views."""
-        self.parent.geology_added_signal.emit(
-            [entity_dict["uid"]]
-        )  # a list of uids is emitted, even if the entity is just one, for future compatibility
-        return entity_dict["uid"]
+        uids = [entity_dict["uid"] for entity_dict in entity_dicts]
+        self.parent.geology_added_signal.emit(uids)
+        return uids
 
     def remove_entity(self, uid=None, update=True):
         """Remove entity from collection."""
-        """Remove row from dataframe and reset data model."""
-        if not uid in self.get_uids():
-            return
-        self.df.drop(
-            self.parent.geol_coll.df[self.parent.geol_coll.df["uid"] == uid].index,
-            inplace=True,
-        )
+        if self.remove_entities(uids=[uid]):
+            return uid
+
+    def remove_entities(self, uids=None):
+        """Remove entities from collection, with a single model reset, legend update and signal.
+        Returns the list of uids actually removed."""
+        """Remove rows from dataframe and reset data model."""
+        removed_keys = self.get_legend_keys(mask=self.df["uid"].isin(uids).values)
+        uids = self.drop_entity_rows(uids)
+        if not uids:
+            return uids
         self.modelReset.emit()  # is this really necessary?
-        """Then remove geo_type / feature / scenario from legend if needed."""
-        """table_updated is used to record if the table is updated or not"""
-        table_updated = False
-        geo_types_in_legend = pd_unique(self.parent.geol_legend_df["geological_type"])
-        features_in_legend = pd_unique(self.parent.geol_legend_df["geological_feature"])
-        scenarios_in_legend = pd_unique(self.parent.geol_legend_df["scenario"])
-        for geo_type in geo_types_in_legend:
-            if self.parent.geol_coll.df.loc[
-                self.parent.geol_coll.df["geological_type"] == geo_type
-            ].empty:
-                """Get index of row to be removed, then remove it in place with .drop()."""
-                idx_remove = self.parent.geol_legend_df[
-                    self.parent.geol_legend_df["geological_type"] == geo_type
-                ].index
-                self.parent.geol_legend_df.drop(idx_remove, inplace=True)
-                table_updated = table_updated or True
-            for feature in features_in_legend:
-                if self.parent.geol_coll.df.loc[
-                    (self.parent.geol_coll.df["geological_type"] == geo_type)
-                    & (self.parent.geol_coll.df["geological_feature"] == feature)
-                ].empty:
-                    """Get index of row to be removed, then remove it in place with .drop()."""
-                    idx_remove = self.parent.geol_legend_df[
-                        (self.parent.geol_legend_df["geological_type"] == geo_type)
-                        & (self.parent.geol_legend_df["geological_feature"] == feature)
-                    ].index
-                    self.parent.geol_legend_df.drop(idx_remove, inplace=True)
-                    table_updated = table_updated or True
-                for scenario in scenarios_in_legend:
-                    if self.parent.geol_coll.df.loc[
-                        (self.parent.geol_coll.df["geological_type"] == geo_type)
-                        & (self.parent.geol_coll.df["geological_feature"] == feature)
-                        & (self.parent.geol_coll.df["scenario"] == scenario)
-                    ].empty:
-                        """Get index of row to be removed, then remove it in place with .drop()."""
-                        idx_remove = self.parent.geol_legend_df[
-                            (self.parent.geol_legend_df["geological_type"] == geo_type)
-                            & (
-                                self.parent.geol_legend_df["geological_feature"]
-                                == feature
-                            )
-                            & (self.parent.geol_legend_df["scenario"] == scenario)
-                        ].index
-                        self.parent.geol_legend_df.drop(idx_remove, inplace=True)
-                        table_updated = table_updated or True
-        for feature in features_in_legend:
-            if self.parent.geol_coll.df.loc[
-                self.parent.geol_coll.df["geological_feature"] == feature
-            ].empty:
-                """Get index of row to be removed, then remove it in place with .drop()."""
-                idx_remove = self.parent.geol_legend_df[
-                    self.parent.geol_legend_df["geological_feature"] == feature
-                ].index
-                self.parent.geol_legend_df.drop(idx_remove, inplace=True)
-                table_updated = table_updated or True
-            for scenario in scenarios_in_legend:
-                if self.parent.geol_coll.df.loc[
-                    (self.parent.geol_coll.df["geological_feature"] == feature)
-                    & (self.parent.geol_coll.df["scenario"] == scenario)
-                ].empty:
-                    """Get index of row to be removed, then remove it in place with .drop()."""
-                    idx_remove = self.parent.geol_legend_df[
-                        (self.parent.geol_legend_df["geological_feature"] == feature)
-                        & (self.parent.geol_legend_df["scenario"] == scenario)
-                    ].index
-                    self.parent.geol_legend_df.drop(idx_remove, inplace=True)
-                    table_updated = table_updated or True
-        for scenario in scenarios_in_legend:
-            if self.parent.geol_coll.df.loc[
-                self.parent.geol_coll.df["scenario"] == scenario
-            ].empty:
-                """Get index of row to be removed, then remove it in place with .drop()."""
-                idx_remove = self.parent.geol_legend_df[
-                    self.parent.geol_legend_df["scenario"] == scenario
-                ].index
-                self.parent.geol_legend_df.drop(idx_remove, inplace=True)
-                table_updated = table_updated or True
-        """When done, if the table was updated update the widget, and in any case send the signal over to the views."""
-        if table_updated:
+        """Then remove geo_type / feature / scenario from legend if needed, and in any case send
+        the signal over to the views."""
+        if self.update_legend_counts(removed_keys=removed_keys):
             self.parent.legend.update_widget(self.parent)
             self.parent.prop_legend.update_widget(self.parent)
-        self.parent.geology_removed_signal.emit(
-            [uid]
-        )  # a list of uids is emitted, even if the entity is just one
-        return uid
+        self.parent.geology_removed_signal.emit(uids)
+        return uids
 
     def clone_entity(self, uid=None):
         """Clone an entity. Take care since this sends signals immediately."""
@@ -267,12 +183,10 @@ class GeologicalCollection(QAbstractTableModel):
         return out_uid
 
     def replace_vtk(self, uid=None, vtk_object=None, const_color=False):
-        if isinstance(
-            vtk_object, type(self.df.loc[self.df["uid"] == uid, "vtk_obj"].values[0])
-        ):
+        if isinstance(vtk_object, type(self.get_uid_vtk_obj(uid))):
             new_dict = deepcopy(
-                self.df.loc[
-                    self.df["uid"] == uid, self.df.columns != "vtk_obj"
+                self.df.iloc[
+                    [self.get_uid_row(uid)], self.df.columns != "vtk_obj"
                 ].to_dict("records")[0]
             )
             new_dict["vtk_obj"] = vtk_object
@@ -288,118 +202,146 @@ class GeologicalCollection(QAbstractTableModel):
         else:
             print("ERROR - replace_vtk with vtk of a different type.")
 
+    """Methods used to keep the legend in sync with the collection. Each (geological_type,
+    geological_feature, scenario) key has a reference count, that is the number of entities with
+    that key, updated as entities are added, removed or edited. The legend table geol_legend_df is
+    edited only when a count goes from 0 to 1 (a legend row is added) or from 1 to 0 (the legend row
+    is removed), so its cost does not depend on the number of entities in the collection."""
+
+    def reset_indexes(self):
+        """Reset the uid index and rebuild the reference counts of legend keys."""
+        super(GeologicalCollection, self).reset_indexes()
+        self.legend_counts = Counter(self.get_legend_keys())
+
+    def get_legend_keys(self, mask=None):
+        """Get list of (geological_type, geological_feature, scenario) keys of all entities,
+        or of entities in boolean mask."""
+        if mask is None:
+            return list(
+                zip(*[self.df[column].values for column in self.legend_key_columns])
+            )
+        return list(
+            zip(*[self.df[column].values[mask] for column in self.legend_key_columns])
+        )
+
+    def get_uid_legend_key(self, uid=None):
+        """Get (geological_type, geological_feature, scenario) key of entity uid."""
+        row = self.get_uid_row(uid)
+        return tuple(self.df[column].iat[row] for column in self.legend_key_columns)
+
+    def update_legend_counts(self, added_keys=None, removed_keys=None, color=None):
+        """Update the reference counts of legend keys of added and removed entities (e.g. an entity
+        with a modified geological_feature is removed with the old key and added with the new one),
+        and add or remove legend rows accordingly, with color if given, a random color otherwise.
+        Returns True if the legend table has been updated."""
+        new_keys = []
+        unused_keys = []
+        for key in added_keys or []:
+            self.legend_counts[key] += 1
+            if self.legend_counts[key] == 1:
+                new_keys.append(key)
+        for key in removed_keys or []:
+            self.legend_counts[key] -= 1
+            if self.legend_counts[key] <= 0:
+                del self.legend_counts[key]
+                unused_keys.append(key)
+        """Keys added and removed in the same update do not change the legend."""
+        new_keys = [key for key in new_keys if key in self.legend_counts]
+        table_updated = self.remove_legend_keys(keys=unused_keys)
+        table_updated = (
+            self.add_legend_keys(keys=new_keys, color=color) or table_updated
+        )
+        return table_updated
+
+    def get_legend_table_keys(self):
+        """Get set of (geological_type, geological_feature, scenario) keys in the legend table."""
+        return set(
+            zip(
+                *[
+                    self.parent.geol_legend_df[column].values
+                    for column in self.legend_key_columns
+                ]
+            )
+        )
+
+    def add_legend_keys(self, keys=None, color=None):
+        """Add a row to the legend table for each key not already there (e.g. read from a
+        project file), with color if given, a random color otherwise. Returns True if rows have been
+        added."""
+        if not keys:
+            return False
+        legend_keys = self.get_legend_table_keys()
+        new_legend_rows = []
+        for key in keys:
+            if key in legend_keys:
+                continue
+            legend_keys.add(key)
+            if color:
+                R, G, B = color
+            else:
+                R, G, B = np_round(np_random.random(3) * 255)
+            new_legend_rows.append(
+                {
+                    "geological_type": key[0],
+                    "geological_feature": key[1],
+                    "scenario": key[2],
+                    "color_R": R,
+                    "color_G": G,
+                    "color_B": B,
+                    "line_thick": 5.0,
+                    "point_size": 10.0,
+                    "opacity": 100,
+                    "geological_time": 0.0,
+                    "geological_sequence": "strati_0",
+                }
+            )
+        if not new_legend_rows:
+            return False
+        self.parent.geol_legend_df = self.parent.geol_legend_df.append(
+            new_legend_rows, ignore_index=True
+        )
+        return True
+
+    def remove_legend_keys(self, keys=None):
+        """Remove the rows of keys from the legend table, in place with .drop(). Returns True if
+        rows have been removed."""
+        if not keys:
+            return False
+        keys = set(keys)
+        idx_remove = [
+            idx
+            for idx, key in zip(
+                self.parent.geol_legend_df.index,
+                zip(
+                    *[
+                        self.parent.geol_legend_df[column].values
+                        for column in self.legend_key_columns
+                    ]
+                ),
+            )
+            if key in keys
+        ]
+        if not idx_remove:
+            return False
+        self.parent.geol_legend_df.drop(idx_remove, inplace=True)
+        return True
+
     def geology_attr_modified_update_legend_table(self):
-        """Update legend table, adding or removing items, based on metadata table.
-        This is called when editing the geological dataframe with setData(). Slightly different versions
-        are found in add_entity_from_dict and remove_entity methods."""
-        """table_updated is used to record if the table is updated or not"""
-        table_updated = False
-        """First remove unused geo_type / feature"""
-        geo_types_in_legend = pd_unique(self.parent.geol_legend_df["geological_type"])
-        features_in_legend = pd_unique(self.parent.geol_legend_df["geological_feature"])
-        scenarios_in_legend = pd_unique(self.parent.geol_legend_df["scenario"])
-        for geo_type in geo_types_in_legend:
-            if self.parent.geol_coll.df.loc[
-                self.parent.geol_coll.df["geological_type"] == geo_type
-            ].empty:
-                """Get index of row to be removed, then remove it in place with .drop()."""
-                idx_remove = self.parent.geol_legend_df[
-                    self.parent.geol_legend_df["geological_type"] == geo_type
-                ].index
-                self.parent.geol_legend_df.drop(idx_remove, inplace=True)
-                table_updated = table_updated or True
-            for feature in features_in_legend:
-                if self.parent.geol_coll.df.loc[
-                    (self.parent.geol_coll.df["geological_type"] == geo_type)
-                    & (self.parent.geol_coll.df["geological_feature"] == feature)
-                ].empty:
-                    """Get index of row to be removed, then remove it in place with .drop()."""
-                    idx_remove = self.parent.geol_legend_df[
-                        (self.parent.geol_legend_df["geological_type"] == geo_type)
-                        & (self.parent.geol_legend_df["geological_feature"] == feature)
-                    ].index
-                    self.parent.geol_legend_df.drop(idx_remove, inplace=True)
-                    table_updated = table_updated or True
-                for scenario in scenarios_in_legend:
-                    if self.parent.geol_coll.df.loc[
-                        (self.parent.geol_coll.df["geological_type"] == geo_type)
-                        & (self.parent.geol_coll.df["geological_feature"] == feature)
-                        & (self.parent.geol_coll.df["scenario"] == scenario)
-                    ].empty:
-                        """Get index of row to be removed, then remove it in place with .drop()."""
-                        idx_remove = self.parent.geol_legend_df[
-                            (self.parent.geol_legend_df["geological_type"] == geo_type)
-                            & (
-                                self.parent.geol_legend_df["geological_feature"]
-                                == feature
-                            )
-                            & (self.parent.geol_legend_df["scenario"] == scenario)
-                        ].index
-                        self.parent.geol_legend_df.drop(idx_remove, inplace=True)
-                        table_updated = table_updated or True
-        for feature in features_in_legend:
-            if self.parent.geol_coll.df.loc[
-                self.parent.geol_coll.df["geological_feature"] == feature
-            ].empty:
-                """Get index of row to be removed, then remove it in place with .drop()."""
-                idx_remove = self.parent.geol_legend_df[
-                    self.parent.geol_legend_df["geological_feature"] == feature
-                ].index
-                self.parent.geol_legend_df.drop(idx_remove, inplace=True)
-                table_updated = table_updated or True
-            for scenario in scenarios_in_legend:
-                if self.parent.geol_coll.df.loc[
-                    (self.parent.geol_coll.df["geological_feature"] == feature)
-                    & (self.parent.geol_coll.df["scenario"] == scenario)
-                ].empty:
-                    """Get index of row to be removed, then remove it in place with .drop()."""
-                    idx_remove = self.parent.geol_legend_df[
-                        (self.parent.geol_legend_df["geological_feature"] == feature)
-                        & (self.parent.geol_legend_df["scenario"] == scenario)
-                    ].index
-                    self.parent.geol_legend_df.drop(idx_remove, inplace=True)
-                    table_updated = table_updated or True
-        for scenario in scenarios_in_legend:
-            if self.parent.geol_coll.df.loc[
-                self.parent.geol_coll.df["scenario"] == scenario
-            ].empty:
-                """Get index of row to be removed, then remove it in place with .drop()."""
-                idx_remove = self.parent.geol_legend_df[
-                    self.parent.geol_legend_df["scenario"] == scenario
-                ].index
-                self.parent.geol_legend_df.drop(idx_remove, inplace=True)
-                table_updated = table_updated or True
-        """Then add new geo_type / feature"""
-        for uid in self.parent.geol_coll.df["uid"].to_list():
-            geo_type = self.parent.geol_coll.df.loc[
-                self.parent.geol_coll.df["uid"] == uid, "geological_type"
-            ].values[0]
-            feature = self.parent.geol_coll.df.loc[
-                self.parent.geol_coll.df["uid"] == uid, "geological_feature"
-            ].values[0]
-            scenario = self.parent.geol_coll.df.loc[
-                self.parent.geol_coll.df["uid"] == uid, "scenario"
-            ].values[0]
-            if self.parent.geol_legend_df.loc[
-                (self.parent.geol_legend_df["geological_type"] == geo_type)
-                & (self.parent.geol_legend_df["geological_feature"] == feature)
-                & (self.parent.geol_legend_df["scenario"] == scenario)
-            ].empty:
-                self.parent.geol_legend_df = self.parent.geol_legend_df.append(
-                    {
-                        "geological_type": geo_type,
-                        "geological_feature": feature,
-                        "scenario": scenario,
-                        "color_R": round(np_random.random() * 255),
-                        "color_G": round(np_random.random() * 255),
-                        "color_B": round(np_random.random() * 255),
-                        "line_thick": 2.0,
-                        "geological_time": 0.0,
-                        "geological_sequence": "strati_0",
-                    },
-                    ignore_index=True,
-                )
-                table_updated = table_updated or True
+        """Update legend table, adding or removing items, based on metadata table, with a full
+        recomputation of the reference counts of legend keys. add_entities_from_dicts,
+        remove_entities, setData() and set_uid_value() update the counts incrementally, so this
+        is needed only if the dataframe has been edited in place in some other way."""
+        self.legend_counts = Counter(self.get_legend_keys())
+        legend_keys = self.get_legend_table_keys()
+        table_updated = self.remove_legend_keys(
+            keys=[key for key in legend_keys if key not in self.legend_counts]
+        )
+        table_updated = (
+            self.add_legend_keys(
+                keys=[key for key in self.legend_counts if key not in legend_keys]
+            )
+            or table_updated
+        )
         """When done, if the table was updated update the widget. No signal is sent here to the views."""
         if table_updated:
             self.parent.legend.update_widget(self.parent)
@@ -410,9 +352,9 @@ class GeologicalCollection(QAbstractTableModel):
 
     def get_uid_legend(self, uid=None):
         """Get legend as dictionary from uid."""
-        geo_type = self.df.loc[self.df["uid"] == uid, "geological_type"].values[0]
-        feature = self.df.loc[self.df["uid"] == uid, "geological_feature"].values[0]
-        scenario = self.df.loc[self.df["uid"] == uid, "scenario"].values[0]
+        geo_type = self.get_uid_value(uid=uid, column="geological_type")
+        feature = self.get_uid_value(uid=uid, column="geological_feature")
+        scenario = self.get_uid_value(uid=uid, column="scenario")
         legend_dict = self.parent.geol_legend_df.loc[
             (self.parent.geol_legend_df["geological_type"] == geo_type)
             & (self.parent.geol_legend_df["geological_feature"] == feature)
@@ -529,6 +471,27 @@ class GeologicalCollection(QAbstractTableModel):
                     "opacity",
                 ] = opacity
 
+    def set_uid_value(self, uid=None, column=None, value=None):
+        """Set value stored in dataframe (as pointer) from uid and column name, updating the
+        reference counts of legend keys if geological_type, geological_feature or scenario change.
+        """
+        if column not in self.legend_key_columns:
+            return super(GeologicalCollection, self).set_uid_value(
+                uid=uid, column=column, value=value
+            )
+        try:
+            old_key = self.get_uid_legend_key(uid)
+        except IndexError:
+            return
+        super(GeologicalCollection, self).set_uid_value(
+            uid=uid, column=column, value=value
+        )
+        new_key = self.get_uid_legend_key(uid)
+        if new_key != old_key and self.update_legend_counts(
+            added_keys=[new_key], removed_keys=[old_key]
+        ):
+            self.parent.legend.update_widget(self.parent)
+
     def get_uids(self):
         """Get list of uids."""
         return self.df["uid"].to_list()
@@ -547,84 +510,90 @@ class GeologicalCollection(QAbstractTableModel):
 
     def get_uid_name(self, uid=None):
         """Get value(s) stored in dataframe (as pointer) from uid."""
-        return self.df.loc[self.df["uid"] == uid, "name"].values[0]
+        return self.get_uid_value(uid=uid, column="name")
 
     def set_uid_name(self, uid=None, name=None):
         """Set value(s) stored in dataframe (as pointer) from uid."""
-        self.df.loc[self.df["uid"] == uid, "name"] = name
+        self.set_uid_value(uid=uid, column="name", value=name)
 
     def get_name_uid(self, name=None):
         return self.df.loc[self.df["name"] == name, "uid"].values[0]
 
     def get_uid_topological_type(self, uid=None):
         """Get value(s) stored in dataframe (as pointer) from uid."""
-        return self.df.loc[self.df["uid"] == uid, "topological_type"].values[0]
+        return self.get_uid_value(uid=uid, column="topological_type")
 
     def set_uid_topological_type(self, uid=None, topological_type=None):
         """Set value(s) stored in dataframe (as pointer) from uid."""
-        self.df.loc[self.df["uid"] == uid, "topological_type"] = topological_type
+        self.set_uid_value(uid=uid, column="topological_type", value=topological_type)
 
     def get_uid_geological_type(self, uid=None):
         """Get value(s) stored in dataframe (as pointer) from uid."""
-        return self.df.loc[self.df["uid"] == uid, "geological_type"].values[0]
+        return self.get_uid_value(uid=uid, column="geological_type")
 
     def set_uid_geological_type(self, uid=None, geological_type=None):
         """Set value(s) stored in dataframe (as pointer) from uid."""
-        self.df.loc[self.df["uid"] == uid, "geological_type"] = geological_type
+        self.set_uid_value(uid=uid, column="geological_type", value=geological_type)
 
     def get_uid_geological_feature(self, uid=None):
         """Get value(s) stored in dataframe (as pointer) from uid."""
-        return self.df.loc[self.df["uid"] == uid, "geological_feature"].values[0]
+        return self.get_uid_value(uid=uid, column="geological_feature")
 
     def set_uid_geological_feature(self, uid=None, geological_feature=None):
         """Set value(s) stored in dataframe (as pointer) from uid."""
-        self.df.loc[self.df["uid"] == uid, "geological_feature"] = geological_feature
+        self.set_uid_value(
+            uid=uid, column="geological_feature", value=geological_feature
+        )
 
     def get_uid_scenario(self, uid=None):
         """Get value(s) stored in dataframe (as pointer) from uid."""
-        return self.df.loc[self.df["uid"] == uid, "scenario"].values[0]
+        return self.get_uid_value(uid=uid, column="scenario")
 
     def set_uid_scenario(self, uid=None, scenario=None):
         """Set value(s) stored in dataframe (as pointer) from uid."""
-        self.df.loc[self.df["uid"] == uid, "scenario"] = scenario
+        self.set_uid_value(uid=uid, column="scenario", value=scenario)
 
     def get_uid_properties_names(self, uid=None):
         """Get value(s) stored in dataframe (as pointer) from uid. This is a LIST even if we extract it with values[0]!"""
-        return self.df.loc[self.df["uid"] == uid, "properties_names"].values[0]
+        return self.get_uid_value(uid=uid, column="properties_names")
 
     def set_uid_properties_names(self, uid=None, properties_names=None):
         """Set value(s) stored in dataframe (as pointer) from uid. This is a LIST and "at" must be used!"""
-        row = self.df[self.df["uid"] == uid].index.values[0]
-        self.df.at[row, "properties_names"] = properties_names
+        self.set_uid_value(uid=uid, column="properties_names", value=properties_names)
 
     def get_uid_properties_components(self, uid=None):
         """Get value(s) stored in dataframe (as pointer) from uid. This is a LIST even if we extract it with values[0]!"""
-        return self.df.loc[self.df["uid"] == uid, "properties_components"].values[0]
+        return self.get_uid_value(uid=uid, column="properties_components")
 
     def set_uid_properties_components(self, uid=None, properties_components=None):
         """Set value(s) stored in dataframe (as pointer) from uid. This is a LIST and "at" must be used!"""
-        row = self.df[self.df["uid"] == uid].index.values[0]
-        self.df.at[row, "properties_components"] = properties_components
+        self.set_uid_value(
+            uid=uid, column="properties_components", value=properties_components
+        )
 
     def get_uid_x_section(self, uid=None):
         """Get value(s) stored in dataframe (as pointer) from uid."""
-        return self.df.loc[self.df["uid"] == uid, "x_section"].values[0]
+        return self.get_uid_value(uid=uid, column="x_section")
 
     def set_uid_x_section(self, uid=None, x_section=None):
         """Set value(s) stored in dataframe (as pointer) from uid."""
-        self.df.loc[self.df["uid"] == uid, "x_section"] = x_section
+        self.set_uid_value(uid=uid, column="x_section", value=x_section)
 
     def get_xuid_uid(self, xuid=None):
         """[Gabriele] Get the uids of the geological objects for the corresponding xsec uid (parent)"""
         return self.df.loc[self.df["x_section"] == xuid, "uid"]
 
     def get_uid_vtk_obj(self, uid=None):
-        """Get value(s) stored in dataframe (as pointer) from uid."""
-        return self.df.loc[self.df["uid"] == uid, "vtk_obj"].values[0]
+        """Get value(s) stored in dataframe (as pointer) from uid. Entities of a project
+        opened with lazy loading are read from file on first access."""
+        vtk_obj = self.get_uid_value(uid=uid, column="vtk_obj")
+        if isinstance(vtk_obj, LazyVtkObj):
+            vtk_obj = self.parent.vtk_obj_cache.load(collection=self, uid=uid)
+        return vtk_obj
 
     def set_uid_vtk_obj(self, uid=None, vtk_obj=None):
         """Set value(s) stored in dataframe (as pointer) from uid."""
-        self.df.loc[self.df["uid"] == uid, "vtk_obj"] = vtk_obj
+        self.set_uid_value(uid=uid, column="vtk_obj", value=vtk_obj)
 
     def append_uid_property(
         self, uid=None, property_name=None, property_components=None
@@ -709,11 +678,18 @@ class GeologicalCollection(QAbstractTableModel):
         "self.parent is" is used to point to parent, because the standard Qt setData
         method does not allow for extra variables to be passed into this method."""
         if index.isValid():
+            old_key = self.get_legend_keys(mask=[index.row()])[0]
             self.df.iloc[index.row(), index.column()] = value
+            """Update the legend if geological_type, geological_feature or scenario changed."""
+            new_key = self.get_legend_keys(mask=[index.row()])[0]
+            legend_updated = new_key != old_key and self.update_legend_counts(
+                added_keys=[new_key], removed_keys=[old_key]
+            )
             if self.data(index, Qt.DisplayRole) == value:
                 self.dataChanged.emit(index, index)
                 uid = self.df.iloc[index.row(), 0]
-                self.geology_attr_modified_update_legend_table()
+                if legend_updated:
+                    self.parent.legend.update_widget(self.parent)
                 self.parent.geology_metadata_modified_signal.emit(
                     [uid]
                 )  # a list of uids is emitted, even if the entity is just one
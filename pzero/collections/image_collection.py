@@ -8,8 +8,11 @@ import numpy as np
 from PyQt5.QtCore import QAbstractTableModel, Qt, QVariant
 from pandas import DataFrame as pd_DataFrame
 from pandas import set_option as pd_set_option
+from pandas import unique as pd_unique
 
+from pzero.collections.base_collection import BaseCollection
 from pzero.entities_factory import MapImage, XsImage, Seismics, Image3D
+from pzero.project_io import LazyVtkObj
 
 """Options to print Pandas dataframes in console for testing."""
 pd_desired_width = 800
@@ -23,7 +26,7 @@ pd_set_option("display.precision", pd_show_precision)
 pd_set_option("display.max_colwidth", pd_max_colwidth)
 
 
-class ImageCollection(QAbstractTableModel):
+class ImageCollection(BaseCollection):
     """
     Initialize ImageCollection table.
     Column headers are taken from ImageCollection.image_entity_dict.keys()
@@ -69,9 +72,7 @@ class ImageCollection(QAbstractTableModel):
     """IN THE FUTURE the edit dialog should be able to edit metadata of multiple entities (and selecting "None" will not change them)."""
 
     def __init__(self, parent=None, *args, **kwargs):
-        super(ImageCollection, self).__init__(*args, **kwargs)
-        """Import reference to parent, otherwise it is difficult to reference them in SetData() that has a standard list of inputs."""
-        self.parent = parent
+        super(ImageCollection, self).__init__(parent, *args, **kwargs)
 
         """Initialize Pandas dataframe."""
         self.df = pd_DataFrame(columns=list(self.image_entity_dict.keys()))
@@ -82,59 +83,66 @@ class ImageCollection(QAbstractTableModel):
     """Custom methods used to add or remove entities, query the dataframe, etc."""
 
     def add_entity_from_dict(self, entity_dict=None):
-        """Add entity to collection from dictionary.
-        Create a new uid if it is not included in the dictionary."""
+        """Add entity to collection from dictionary."""
+        return self.add_entities_from_dicts(entity_dicts=[entity_dict])[0]
+
+    def add_entities_from_dicts(self, entity_dicts=None):
+        """Add entities to collection from a list of dictionaries, with a single model reset and
+        signal. Create a new uid if it is not included in the dictionary. Returns the list of uids."""
         """NOTE THAT HERE WE ASSUME THE ATTRIBUTES HAVE BEEN CAREFULLY DEFINED, OTHERWISE A CHECK AS IN REPLACE_VTK WOULD BE NECESSARY"""
-        if not entity_dict["uid"]:
-            entity_dict["uid"] = str(uuid.uuid4())
-        """"Append new row to dataframe. Note that the 'append()' method for Pandas dataframes DOES NOT
-        work in place, hence a NEW dataframe is created every time and then substituted to the old one."""
-        self.df = self.df.append(entity_dict, ignore_index=True)
+        if not entity_dicts:
+            return []
+        for entity_dict in entity_dicts:
+            if not entity_dict["uid"]:
+                entity_dict["uid"] = str(uuid.uuid4())
+        """Append new rows to dataframe."""
+        self.append_entity_rows(entity_dicts)
         """Reset data model"""
         self.modelReset.emit()
         """Update properties colormaps if needed"""
-        for i in range(len(entity_dict["properties_names"])):
-            if entity_dict["properties_components"][i] == 1:
-                property_name = entity_dict["properties_names"][i]
-                if self.parent.prop_legend_df.loc[
-                    self.parent.prop_legend_df["property_name"] == property_name
-                ].empty:
-                    self.parent.prop_legend_df = self.parent.prop_legend_df.append(
-                        {"property_name": property_name, "colormap": "gray"},
-                        ignore_index=True,
-                    )
-                    self.parent.prop_legend.update_widget(self.parent)
+        property_names = pd_unique([property_name for entity_dict in entity_dicts
+                                    for property_name, components in zip(entity_dict["properties_names"], entity_dict["properties_components"])
+                                    if components == 1])
+        new_legend_rows = [{"property_name": property_name, "colormap": "gray"} for property_name in property_names
+                           if property_name not in self.parent.prop_legend_df["property_name"].values]
+        if new_legend_rows:
+            self.parent.prop_legend_df = self.parent.prop_legend_df.append(new_legend_rows, ignore_index=True)
+            self.parent.prop_legend.update_widget(self.parent)
         """Then emit signal to update the views."""
-        self.parent.image_added_signal.emit(
-            [entity_dict["uid"]]
-        )  # a list of uids is emitted, even if the entity is just one
-        return entity_dict["uid"]
+        uids = [entity_dict["uid"] for entity_dict in entity_dicts]
+        self.parent.image_added_signal.emit(uids)
+        return uids
 
     def remove_entity(self, uid=None):
-        """Remove entity from collection. Remove row from dataframe and reset data model."""
+        """Remove entity from collection."""
+        if self.remove_entities(uids=[uid]):
+            return uid
+
+    def remove_entities(self, uids=None):
+        """Remove entities from collection, with a single model reset and signal. Remove rows from
+        dataframe and reset data model. Returns the list of uids actually removed."""
         """First remove textures, if defined."""
         for dom_uid in self.parent.dom_coll.get_uids():
-            if uid in self.parent.dom_coll.get_uid_texture_uids(dom_uid):
-                self.parent.dom_coll.remove_map_texture_from_dom(
-                    dom_uid=dom_uid, map_image_uid=uid
-                )
-        """Then remove image"""
-        self.df.drop(self.df[self.df["uid"] == uid].index, inplace=True)
+            for uid in uids:
+                if uid in self.parent.dom_coll.get_uid_texture_uids(dom_uid):
+                    self.parent.dom_coll.remove_map_texture_from_dom(dom_uid=dom_uid, map_image_uid=uid)
+        """Then remove images"""
+        uids = self.drop_entity_rows(uids)
+        if not uids:
+            return uids
         self.modelReset.emit()  # is this really necessary?
         self.parent.prop_legend.update_widget(self.parent)
         """When done, send a signal over to the views."""
-        self.parent.image_removed_signal.emit(
-            [uid]
-        )  # a list of uids is emitted, even if the entity is just one
-        return uid
+        self.parent.image_removed_signal.emit(uids)
+        return uids
 
     def replace_vtk(self, uid=None, vtk_object=None):
         if isinstance(
-            vtk_object, type(self.df.loc[self.df["uid"] == uid, "vtk_obj"].values[0])
+            vtk_object, type(self.get_uid_vtk_obj(uid))
         ):
             new_dict = deepcopy(
-                self.df.loc[
-                    self.df["uid"] == uid, self.df.columns != "vtk_obj"
+                self.df.iloc[
+                    [self.get_uid_row(uid)], self.df.columns != "vtk_obj"
                 ].to_dict("records")[0]
             )
             new_dict["vtk_obj"] = vtk_object
@@ -181,37 +189,35 @@ class ImageCollection(QAbstractTableModel):
 
     def get_uid_name(self, uid=None):
         """Get value(s) stored in dataframe (as pointer) from uid."""
-        return self.df.loc[self.df["uid"] == uid, "name"].values[0]
+        return self.get_uid_value(uid=uid, column="name")
 
     def set_uid_name(self, uid=None, name=None):
         """Set value(s) stored in dataframe (as pointer) from uid."""
-        self.df.loc[self.df["uid"] == uid, "name"] = name
+        self.set_uid_value(uid=uid, column="name", value=name)
 
     def get_uid_image_type(self, uid=None):
         """Get value(s) stored in dataframe (as pointer) from uid."""
-        return self.df.loc[self.df["uid"] == uid, "image_type"].values[0]
+        return self.get_uid_value(uid=uid, column="image_type")
 
     def set_uid_image_type(self, uid=None, image_type=None):
         """Set value(s) stored in dataframe (as pointer) from uid."""
-        self.df.loc[self.df["uid"] == uid, "image_type"] = image_type
+        self.set_uid_value(uid=uid, column="image_type", value=image_type)
 
     def get_uid_properties_names(self, uid=None):
         """Get value(s) stored in dataframe (as pointer) from uid.. This is a LIST even if we extract it with values[0]!"""
-        return self.df.loc[self.df["uid"] == uid, "properties_names"].values[0]
+        return self.get_uid_value(uid=uid, column="properties_names")
 
     def set_uid_properties_names(self, uid=None, properties_names=None):
         """Set value(s) stored in dataframe (as pointer) from uid."""
-        self.df.loc[self.df["uid"] == uid, "properties_names"] = properties_names
+        self.set_uid_value(uid=uid, column="properties_names", value=properties_names)
 
     def get_uid_properties_components(self, uid=None):
         """Get value(s) stored in dataframe (as pointer) from uid.. This is a LIST even if we extract it with values[0]!"""
-        return self.df.loc[self.df["uid"] == uid, "properties_components"].values[0]
+        return self.get_uid_value(uid=uid, column="properties_components")
 
     def set_uid_properties_components(self, uid=None, properties_components=None):
         """Set value(s) stored in dataframe (as pointer) from uid."""
-        self.df.loc[
-            self.df["uid"] == uid, "properties_components"
-        ] = properties_components
+        self.set_uid_value(uid=uid, column="properties_components", value=properties_components)
 
     def get_uid_properties_types(self, uid=None):
         """Get value(s) stored in dataframe (as pointer) from uid. This is a LIST even if we extract it with values[0]!"""
@@ -219,23 +225,27 @@ class ImageCollection(QAbstractTableModel):
 
     def set_uid_properties_types(self, uid=None, properties_types=None):
         """Set value(s) stored in dataframe (as pointer) from uid."""
-        self.df.loc[self.df["uid"] == uid, "properties_types"] = properties_types
+        self.set_uid_value(uid=uid, column="properties_types", value=properties_types)
 
     def get_uid_x_section(self, uid=None):
         """Get value(s) stored in dataframe (as pointer) from uid."""
-        return self.df.loc[self.df["uid"] == uid, "x_section"].values[0]
+        return self.get_uid_value(uid=uid, column="x_section")
 
     def set_uid_x_section(self, uid=None, x_section=None):
         """Set value(s) stored in dataframe (as pointer) from uid."""
-        self.df.loc[self.df["uid"] == uid, "x_section"] = x_section
+        self.set_uid_value(uid=uid, column="x_section", value=x_section)
 
     def get_uid_vtk_obj(self, uid=None):
-        """Get value(s) stored in dataframe (as pointer) from uid."""
-        return self.df.loc[self.df["uid"] == uid, "vtk_obj"].values[0]
+        """Get value(s) stored in dataframe (as pointer) from uid. Entities of a project
+        opened with lazy loading are read from file on first access."""
+        vtk_obj = self.get_uid_value(uid=uid, column="vtk_obj")
+        if isinstance(vtk_obj, LazyVtkObj):
+            vtk_obj = self.parent.vtk_obj_cache.load(collection=self, uid=uid)
+        return vtk_obj
 
     def set_uid_vtk_obj(self, uid=None, vtk_obj=None):
         """Set value(s) stored in dataframe (as pointer) from uid."""
-        self.df.loc[self.df["uid"] == uid, "vtk_obj"] = vtk_obj
+        self.set_uid_value(uid=uid, column="vtk_obj", value=vtk_obj)
 
     """Standard QT methods slightly adapted to the data source."""
 
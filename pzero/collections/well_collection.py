@@ -7,8 +7,11 @@ from numpy import round as np_round
 from pandas import DataFrame as pd_DataFrame
 from pandas import unique as pd_unique
 
+from pzero.collections.base_collection import BaseCollection
+from pzero.project_io import LazyVtkObj
 
-class WellCollection(QAbstractTableModel):
+
+class WellCollection(BaseCollection):
     """
     Initialize WellCollection table.
     Column headers are taken from WellCollection.well_entity_dict.keys()
@@ -46,9 +49,7 @@ class WellCollection(QAbstractTableModel):
     """IN THE FUTURE the edit dialog should be able to edit metadata of multiple entities (and selecting "None" will not change them)."""
 
     def __init__(self, parent=None, *args, **kwargs):
-        super(WellCollection, self).__init__(*args, **kwargs)
-        """Import reference to parent, otherwise it is difficult to reference them in SetData() that has a standard list of inputs."""
-        self.parent = parent
+        super(WellCollection, self).__init__(parent, *args, **kwargs)
         """Initialize Pandas dataframe."""
         self.df = pd_DataFrame(columns=list(self.well_entity_dict.keys()))
         """Here we use .columns.get_indexer to get indexes of the columns that we would like to be editable in the QTableView"""
@@ -57,23 +58,30 @@ class WellCollection(QAbstractTableModel):
     """Custom methods used to add or remove entities, query the dataframe, etc."""
 
     def add_entity_from_dict(self, entity_dict=None, color=None):
-        """Add entity to collection from dictionary.
-        Create a new uid if it is not included in the dictionary."""
-        if not entity_dict["uid"]:
-            entity_dict["uid"] = str(uuid.uuid4())
-        """"Append new row to dataframe. Note that the 'append()' method for Pandas dataframes DOES NOT
-        work in place, hence a NEW dataframe is created every time and then substituted to the old one."""
-        self.df = self.df.append(entity_dict, ignore_index=True)
+        """Add entity to collection from dictionary."""
+        return self.add_entities_from_dicts(entity_dicts=[entity_dict], color=color)[0]
+
+    def add_entities_from_dicts(self, entity_dicts=None, color=None):
+        """Add entities to collection from a list of dictionaries, with a single model reset and
+        signal. Create a new uid if it is not included in the dictionary. Returns the list of uids.
+        """
+        if not entity_dicts:
+            return []
+        for entity_dict in entity_dicts:
+            if not entity_dict["uid"]:
+                entity_dict["uid"] = str(uuid.uuid4())
+        """Append new rows to dataframe."""
+        self.append_entity_rows(entity_dicts)
         """Reset data model"""
         self.modelReset.emit()
         self.parent.prop_legend.update_widget(self.parent)
-        """Then emit signal to update the views."""
-        locid = entity_dict["Loc ID"]
-        if self.parent.well_legend_df.loc[
-            self.parent.well_legend_df["Loc ID"] == locid
-        ].empty:
+        """Then add new Loc ID to the legend if needed."""
+        new_legend_rows = []
+        for locid in pd_unique([entity_dict["Loc ID"] for entity_dict in entity_dicts]):
+            if locid in self.parent.well_legend_df["Loc ID"].values:
+                continue
             R, G, B = np_round(np_random.random(3) * 255)
-            self.parent.well_legend_df = self.parent.well_legend_df.append(
+            new_legend_rows.append(
                 {
                     "Loc ID": locid,
                     "color_R": R,
@@ -81,35 +89,41 @@ class WellCollection(QAbstractTableModel):
                     "color_B": B,
                     "line_thick": 2.0,
                     "opacity": 100,
-                },
-                ignore_index=True,
+                }
+            )
+        if new_legend_rows:
+            self.parent.well_legend_df = self.parent.well_legend_df.append(
+                new_legend_rows, ignore_index=True
             )
             self.parent.legend.update_widget(self.parent)
             self.parent.prop_legend.update_widget(self.parent)
         """Then emit signal to update the views."""
-        self.parent.well_added_signal.emit(
-            [entity_dict["uid"]]
-        )  # a list of uids is emitted, even if the entity is just one
-        return entity_dict["uid"]
+        uids = [entity_dict["uid"] for entity_dict in entity_dicts]
+        self.parent.well_added_signal.emit(uids)
+        return uids
 
     def remove_entity(self, uid=None):
-        """Remove entity from collection. Remove row from dataframe and reset data model."""
-        self.df.drop(self.df[self.df["uid"] == uid].index, inplace=True)
+        """Remove entity from collection."""
+        if self.remove_entities(uids=[uid]):
+            return uid
+
+    def remove_entities(self, uids=None):
+        """Remove entities from collection, with a single model reset and signal. Remove rows from
+        dataframe and reset data model. Returns the list of uids actually removed."""
+        uids = self.drop_entity_rows(uids)
+        if not uids:
+            return uids
         self.modelReset.emit()  # is this really necessary?
         self.parent.prop_legend.update_widget(self.parent)
         """When done, send a signal over to the views."""
-        self.parent.well_removed_signal.emit(
-            [uid]
-        )  # a list of uids is emitted, even if the entity is just one
-        return uid
+        self.parent.well_removed_signal.emit(uids)
+        return uids
 
     def replace_vtk(self, uid=None, vtk_object=None):
-        if isinstance(
-            vtk_object, type(self.df.loc[self.df["uid"] == uid, "vtk_obj"].values[0])
-        ):
+        if isinstance(vtk_object, type(self.get_uid_vtk_obj(uid))):
             new_dict = deepcopy(
-                self.df.loc[
-                    self.df["uid"] == uid, self.df.columns != "vtk_obj"
+                self.df.iloc[
+                    [self.get_uid_row(uid)], self.df.columns != "vtk_obj"
                 ].to_dict("records")[0]
             )
             new_dict["vtk_obj"] = vtk_object
@@ -159,12 +173,8 @@ class WellCollection(QAbstractTableModel):
 
         """Then add new locid / feature"""
         for uid in self.parent.well_coll.df["uid"].to_list():
-            locid = self.parent.well_coll.df.loc[
-                self.parent.well_coll.df["uid"] == uid, "Loc ID"
-            ].values[0]
-            feature = self.parent.well_coll.df.loc[
-                self.parent.well_coll.df["uid"] == uid, "geological_feature"
-            ].values[0]
+            locid = self.get_uid_value(uid=uid, column="Loc ID")
+            feature = self.get_uid_value(uid=uid, column="geological_feature")
             if self.parent.well_legend_df.loc[
                 (self.parent.well_legend_df["Loc ID"] == locid)
                 & (self.parent.well_legend_df["geological_feature"] == feature)
@@ -191,7 +201,7 @@ class WellCollection(QAbstractTableModel):
 
     def get_uid_legend(self, uid=None):
         """Get legend as dictionary from uid."""
-        locid = self.df.loc[self.df["uid"] == uid, "Loc ID"].values[0]
+        locid = self.get_uid_value(uid=uid, column="Loc ID")
 
         legend_dict = self.parent.well_legend_df.loc[
             self.parent.well_legend_df["Loc ID"] == locid
@@ -211,56 +221,62 @@ class WellCollection(QAbstractTableModel):
 
     def get_uid_name(self, uid=None):
         """Get value(s) stored in dataframe (as pointer) from uid."""
-        return self.df.loc[self.df["uid"] == uid, "Loc ID"].values[0]
+        return self.get_uid_value(uid=uid, column="Loc ID")
 
     def set_uid_name(self, uid=None, name=None):
         """Set value(s) stored in dataframe (as pointer) from uid.."""
-        self.df.loc[self.df["uid"] == uid, "name"] = name
+        self.set_uid_value(uid=uid, column="name", value=name)
 
     def get_uid_well_locid(self, uid=None):
         """Get value(s) stored in dataframe (as pointer) from uid."""
-        return self.df.loc[self.df["uid"] == uid, "Loc ID"].values[0]
+        return self.get_uid_value(uid=uid, column="Loc ID")
 
     def set_uid_well_locid(self, uid=None, locid=None):
         """Set value(s) stored in dataframe (as pointer) from uid.."""
-        self.df.loc[self.df["uid"] == uid, "Loc ID"] = locid
+        self.set_uid_value(uid=uid, column="Loc ID", value=locid)
 
     def get_uid_geological_feature(self, uid=None):
         """Get value(s) stored in dataframe (as pointer) from uid."""
-        return self.df.loc[self.df["uid"] == uid, "geological_feature"].values[0]
+        return self.get_uid_value(uid=uid, column="geological_feature")
 
     def set_uid_geological_feature(self, uid=None, geological_feature=None):
         """Set value(s) stored in dataframe (as pointer) from uid."""
-        self.df.loc[self.df["uid"] == uid, "geological_feature"] = geological_feature
+        self.set_uid_value(
+            uid=uid, column="geological_feature", value=geological_feature
+        )
 
     def get_uid_properties_names(self, uid=None):
         """Get value(s) stored in dataframe (as pointer) from uid. This is a LIST even if we extract it with values[0]!"""
-        return self.df.loc[self.df["uid"] == uid, "properties_names"].values[0]
+        return self.get_uid_value(uid=uid, column="properties_names")
 
     def set_uid_properties_names(self, uid=None, properties_names=None):
         """Set value(s) stored in dataframe (as pointer) from uid. This is a LIST and "at" must be used!"""
-        row = self.df[self.df["uid"] == uid].index.values[0]
-        self.df.at[row, "properties_names"] = properties_names
+        self.set_uid_value(uid=uid, column="properties_names", value=properties_names)
 
     def get_uid_properties_components(self, uid=None):
         """Get value(s) stored in dataframe (as pointer) from uid. This is a LIST even if we extract it with values[0]!"""
-        return self.df.loc[self.df["uid"] == uid, "properties_components"].values[0]
+        return self.get_uid_value(uid=uid, column="properties_components")
 
     def set_uid_properties_components(self, uid=None, properties_components=None):
         """Set value(s) stored in dataframe (as pointer) from uid. This is a LIST and "at" must be used!"""
-        row = self.df[self.df["uid"] == uid].index.values[0]
-        self.df.at[row, "properties_components"] = properties_components
+        self.set_uid_value(
+            uid=uid, column="properties_components", value=properties_components
+        )
 
     def get_uid_marker_names(self, uid=None):
-        return self.df.loc[self.df["uid"] == uid, "markers"].values[0]
+        return self.get_uid_value(uid=uid, column="markers")
 
     def get_uid_vtk_obj(self, uid=None):
-        """Get value(s) stored in dataframe (as pointer) from uid."""
-        return self.df.loc[self.df["uid"] == uid, "vtk_obj"].values[0]
+        """Get value(s) stored in dataframe (as pointer) from uid. Entities of a project
+        opened with lazy loading are read from file on first access."""
+        vtk_obj = self.get_uid_value(uid=uid, column="vtk_obj")
+        if isinstance(vtk_obj, LazyVtkObj):
+            vtk_obj = self.parent.vtk_obj_cache.load(collection=self, uid=uid)
+        return vtk_obj
 
     def set_uid_vtk_obj(self, uid=None, vtk_obj=None):
         """Set value(s) stored in dataframe (as pointer) from uid."""
-        self.df.loc[self.df["uid"] == uid, "vtk_obj"] = vtk_obj
+        self.set_uid_value(uid=uid, column="vtk_obj", value=vtk_obj)
 
     def append_uid_property(
         self, uid=None, property_name=None, property_components=None
@@ -9,18 +9,20 @@ from copy import deepcopy
 import pandas as pd
 from PyQt5.QtCore import QAbstractTableModel, Qt, QVariant
 from numpy import array as np_array
+from numpy import column_stack as np_column_stack
 from numpy import cos as np_cos
 from numpy import deg2rad as np_deg2rad
 from numpy import dot as np_dot
 from numpy import matmul as np_matmul
 from numpy import pi as np_pi
-from numpy import repeat as np_repeat
 from numpy import set_printoptions as np_set_printoptions
 from numpy import sin as np_sin
+from numpy import zeros as np_zeros
 from numpy.linalg import inv as np_linalg_inv
 from vtk import vtkPoints, vtkCellArray, vtkLine
 
 # from PyQt5.QtGui import QStandardItem, QImage
+from pzero.collections.base_collection import BaseCollection
 from pzero.entities_factory import Plane, XsPolyLine
 from pzero.helpers.helper_dialogs import general_input_dialog, open_file_dialog
 from pzero.helpers.helper_functions import auto_sep
@@ -268,7 +270,7 @@ def sections_from_file(self):
                 )
 
 
-class XSectionCollection(QAbstractTableModel):
+class XSectionCollection(BaseCollection):
     """
     Initialize XSectionCollection table.
     Column headers are taken from XSectionCollection.section_dict.keys()
@@ -328,10 +330,10 @@ class XSectionCollection(QAbstractTableModel):
     them)______"""
 
     def __init__(self, parent=None, *args, **kwargs):
-        super(XSectionCollection, self).__init__(*args, **kwargs)
-        """Import reference to parent, otherwise it is difficult to reference them in SetData() that has a standard 
-        list of inputs."""
-        self.parent = parent
+        super(XSectionCollection, self).__init__(parent, *args, **kwargs)
+
+        """Affine matrices of the cross sections, cached by uid (see get_uid_affine_matrices)."""
+        self.affine_matrices = {}
 
         """Initialize Pandas dataframe."""
         self.df = pd.DataFrame(columns=list(self.section_dict.keys()))
@@ -345,34 +347,52 @@ class XSectionCollection(QAbstractTableModel):
 
     """Custom methods used to add or remove entities, query the dataframe, etc."""
 
+    def reset_indexes(self):
+        """Reset the uid index and the cached affine matrices when a new dataframe is assigned."""
+        super(XSectionCollection, self).reset_indexes()
+        self.affine_matrices = {}
+
     def add_entity_from_dict(self, entity_dict=None):
         """Add entity to collection from dictionary."""
+        return self.add_entities_from_dicts(entity_dicts=[entity_dict])[0]
+
+    def add_entities_from_dicts(self, entity_dicts=None):
+        """Add entities to collection from a list of dictionaries, with a single model reset and
+        signal. Returns the list of uids."""
+        if not entity_dicts:
+            return []
         """Create a new uid if it is not included in the dictionary."""
-        if not entity_dict["uid"]:
-            entity_dict["uid"] = str(uuid.uuid4())
-        """Append new row to dataframe. Note that the 'append()' method for Pandas dataframes DOES NOT
-        work in place, hence a NEW dataframe is created every time and then substituted to the old one."""
-        self.df = self.df.append(entity_dict, ignore_index=True)
-        self.set_geometry(uid=entity_dict["uid"])
+        for entity_dict in entity_dicts:
+            if not entity_dict["uid"]:
+                entity_dict["uid"] = str(uuid.uuid4())
+        """Append new rows to dataframe."""
+        self.append_entity_rows(entity_dicts)
+        uids = [entity_dict["uid"] for entity_dict in entity_dicts]
+        for uid in uids:
+            self.set_geometry(uid=uid)
         """Reset data model"""
         self.modelReset.emit()
-        self.parent.xsect_added_signal.emit(
-            [entity_dict["uid"]]
-        )  # a list of uids is emitted, even if the entity is just one
-        return entity_dict["uid"]
+        self.parent.xsect_added_signal.emit(uids)
+        return uids
 
     def remove_entity(self, uid=None):
         """Remove entity from collection."""
-        """Remove row from dataframe and reset data model."""
+        if self.remove_entities(uids=[uid]):
+            return uid
+
+    def remove_entities(self, uids=None):
+        """Remove entities from collection, with a single model reset and signal.
+        Returns the list of uids actually removed."""
+        """Remove rows from dataframe and reset data model."""
         """NOTE THAT AT THE MOMENT REMOVING A SECTION DOES NOT REMOVE THE ASSOCIATED OBJECTS."""
-        if not uid in self.get_uids():
-            return
-        self.df.drop(self.df[self.df["uid"] == uid].index, inplace=True)
+        uids = self.drop_entity_rows(uids)
+        if not uids:
+            return uids
+        for uid in uids:
+            self.affine_matrices.pop(uid, None)
         self.modelReset.emit()  # is this really necessary?
-        self.parent.xsect_removed_signal.emit(
-            [uid]
-        )  # a list of uids is emitted, even if the entity is just one
-        return uid
+        self.parent.xsect_removed_signal.emit(uids)
+        return uids
 
     def get_number_of_entities(self):
         """Get number of entities stored in Pandas dataframe."""
@@ -394,131 +414,133 @@ class XSectionCollection(QAbstractTableModel):
 
     def get_uid_name(self, uid=None):
         """Get value(s) stored in dataframe (as pointer) from uid."""
-        return self.df.loc[self.df["uid"] == uid, "name"].values[0]
+        return self.get_uid_value(uid=uid, column="name")
 
     def set_uid_name(self, uid=None, name=None):
         """Set value(s) stored in dataframe (as pointer) from uid."""
-        self.df.loc[self.df["uid"] == uid, "name"] = name
+        self.set_uid_value(uid=uid, column="name", value=name)
 
     def get_uid_base_x(self, uid=None):
         """Get value(s) stored in dataframe (as pointer) from uid."""
-        return self.df.loc[self.df["uid"] == uid, "base_x"].values[0]
+        return self.get_uid_value(uid=uid, column="base_x")
 
     def set_uid_base_x(self, uid=None, base_x=None):
         """Set value(s) stored in dataframe (as pointer) from uid."""
-        self.df.loc[self.df["uid"] == uid, "base_x"] = base_x
+        self.set_uid_value(uid=uid, column="base_x", value=base_x)
 
     def get_uid_base_y(self, uid=None):
         """Get value(s) stored in dataframe (as pointer) from uid."""
-        return self.df.loc[self.df["uid"] == uid, "base_y"].values[0]
+        return self.get_uid_value(uid=uid, column="base_y")
 
     def set_uid_base_y(self, uid=None, base_y=None):
         """Set value(s) stored in dataframe (as pointer) from uid."""
-        self.df.loc[self.df["uid"] == uid, "base_y"] = base_y
+        self.set_uid_value(uid=uid, column="base_y", value=base_y)
 
     def get_uid_base_z(self, uid=None):
         """Get value(s) stored in dataframe (as pointer) from uid."""
-        return self.df.loc[self.df["uid"] == uid, "base_z"].values[0]
+        return self.get_uid_value(uid=uid, column="base_z")
 
     def set_uid_base_z(self, uid=None, base_z=None):
         """Set value(s) stored in dataframe (as pointer) from uid."""
-        self.df.loc[self.df["uid"] == uid, "base_z"] = base_z
+        self.set_uid_value(uid=uid, column="base_z", value=base_z)
 
     def get_uid_end_x(self, uid=None):
         """Get value(s) stored in dataframe (as pointer) from uid."""
-        return self.df.loc[self.df["uid"] == uid, "end_x"].values[0]
+        return self.get_uid_value(uid=uid, column="end_x")
 
     def set_uid_end_x(self, uid=None, end_x=None):
         """Set value(s) stored in dataframe (as pointer) from uid."""
-        self.df.loc[self.df["uid"] == uid, "end_x"] = end_x
+        self.set_uid_value(uid=uid, column="end_x", value=end_x)
 
     def get_uid_end_y(self, uid=None):
         """Get value(s) stored in dataframe (as pointer) from uid."""
-        return self.df.loc[self.df["uid"] == uid, "end_y"].values[0]
+        return self.get_uid_value(uid=uid, column="end_y")
 
     def set_uid_end_y(self, uid=None, end_y=None):
         """Set value(s) stored in dataframe (as pointer) from uid."""
-        self.df.loc[self.df["uid"] == uid, "end_y"] = end_y
+        self.set_uid_value(uid=uid, column="end_y", value=end_y)
 
     def get_uid_end_z(self, uid=None):
         """Get value(s) stored in dataframe (as pointer) from uid."""
-        return self.df.loc[self.df["uid"] == uid, "end_z"].values[0]
+        return self.get_uid_value(uid=uid, column="end_z")
 
     def set_uid_end_z(self, uid=None, end_z=None):
         """Set value(s) stored in dataframe (as pointer) from uid."""
-        self.df.loc[self.df["uid"] == uid, "end_z"] = end_z
+        self.set_uid_value(uid=uid, column="end_z", value=end_z)
 
     def get_uid_normal_x(self, uid=None):
         """Get value(s) stored in dataframe (as pointer) from uid."""
-        return self.df.loc[self.df["uid"] == uid, "normal_x"].values[0]
+        return self.get_uid_value(uid=uid, column="normal_x")
 
     def set_uid_normal_x(self, uid=None, normal_x=None):
         """Set value(s) stored in dataframe (as pointer) from uid."""
-        self.df.loc[self.df["uid"] == uid, "normal_x"] = normal_x
+        self.set_uid_value(uid=uid, column="normal_x", value=normal_x)
 
     def get_uid_normal_y(self, uid=None):
         """Get value(s) stored in dataframe (as pointer) from uid."""
-        return self.df.loc[self.df["uid"] == uid, "normal_y"].values[0]
+        return self.get_uid_value(uid=uid, column="normal_y")
 
     def set_uid_normal_y(self, uid=None, normal_y=None):
         """Set value(s) stored in dataframe (as pointer) from uid."""
-        self.df.loc[self.df["uid"] == uid, "normal_y"] = normal_y
+        self.set_uid_value(uid=uid, column="normal_y", value=normal_y)
 
     def get_uid_normal_z(self, uid=None):
         """Get value(s) stored in dataframe (as pointer) from uid."""
-        return self.df.loc[self.df["uid"] == uid, "normal_z"].values[0]
+        return self.get_uid_value(uid=uid, column="normal_z")
 
     def set_uid_normal_z(self, uid=None, normal_z=None):
         """Set value(s) stored in dataframe (as pointer) from uid."""
-        self.df.loc[self.df["uid"] == uid, "normal_z"] = normal_z
+        self.set_uid_value(uid=uid, column="normal_z", value=normal_z)
 
     def get_uid_azimuth(self, uid=None):
         """Get value(s) stored in dataframe (as pointer) from uid."""
-        return self.df.loc[self.df["uid"] == uid, "azimuth"].values[0]
+        return self.get_uid_value(uid=uid, column="azimuth")
 
     def set_uid_azimuth(self, uid=None, azimuth=None):
         """Set value(s) stored in dataframe (as pointer) from uid."""
-        self.df.loc[self.df["uid"] == uid, "azimuth"] = azimuth
+        self.set_uid_value(uid=uid, column="azimuth", value=azimuth)
 
     def get_uid_length(self, uid=None):
         """Get value(s) stored in dataframe (as pointer) from uid."""
-        return self.df.loc[self.df["uid"] == uid, "length"].values[0]
+        return self.get_uid_value(uid=uid, column="length")
 
     def set_uid_length(self, uid=None, length=None):
         """Set value(s) stored in dataframe (as pointer) from uid."""
-        self.df.loc[self.df["uid"] == uid, "length"] = length
+        self.set_uid_value(uid=uid, column="length", value=length)
 
     def get_uid_top(self, uid=None):
         """Get value(s) stored in dataframe (as pointer) from uid."""
-        return self.df.loc[self.df["uid"] == uid, "top"].values[0]
+        return self.get_uid_value(uid=uid, column="top")
 
     def set_uid_top(self, uid=None, top=None):
         """Set value(s) stored in dataframe (as pointer) from uid."""
-        self.df.loc[self.df["uid"] == uid, "top"] = top
+        self.set_uid_value(uid=uid, column="top", value=top)
 
     def get_uid_bottom(self, uid=None):
         """Get value(s) stored in dataframe (as pointer) from uid."""
-        return self.df.loc[self.df["uid"] == uid, "bottom"].values[0]
+        return self.get_uid_value(uid=uid, column="bottom")
 
     def set_uid_bottom(self, uid=None, bottom=None):
         """Set value(s) stored in dataframe (as pointer) from uid."""
-        self.df.loc[self.df["uid"] == uid, "bottom"] = bottom
+        self.set_uid_value(uid=uid, column="bottom", value=bottom)
 
     def get_uid_vtk_plane(self, uid=None):
         """Get value(s) stored in dataframe (as pointer) from uid."""
-        return self.df.loc[self.df["uid"] == uid, "vtk_plane"].values[0]
+        return self.get_uid_value(uid=uid, column="vtk_plane")
 
     def set_uid_vtk_plane(self, uid=None, vtk_plane=None):
-        """Set value(s) stored in dataframe (as pointer) from uid."""
-        self.df.loc[self.df["uid"] == uid, "vtk_plane"] = vtk_plane
+        """Set value(s) stored in dataframe (as pointer) from uid. The affine matrices of the old plane
+        are removed from the cache."""
+        self.set_uid_value(uid=uid, column="vtk_plane", value=vtk_plane)
+        self.affine_matrices.pop(uid, None)
 
     def get_uid_vtk_frame(self, uid=None):
         """Get value(s) stored in dataframe (as pointer) from uid."""
-        return self.df.loc[self.df["uid"] == uid, "vtk_frame"].values[0]
+        return self.get_uid_value(uid=uid, column="vtk_frame")
 
     def set_uid_vtk_frame(self, uid=None, vtk_frame=None):
         """Set value(s) stored in dataframe (as pointer) from uid."""
-        self.df.loc[self.df["uid"] == uid, "vtk_frame"] = vtk_frame
+        self.set_uid_value(uid=uid, column="vtk_frame", value=vtk_frame)
 
     """Methods used to set parameters and the geometry of a single cross section."""
 
@@ -535,20 +557,20 @@ class XSectionCollection(QAbstractTableModel):
         bottom=None,
     ):
         """Write parameters in Xsections Pandas dataframe"""
-        self.df.loc[self.df["uid"] == uid, "name"] = name
-        self.df.loc[self.df["uid"] == uid, "base_x"] = base_point[0]
-        self.df.loc[self.df["uid"] == uid, "base_y"] = base_point[1]
-        self.df.loc[self.df["uid"] == uid, "base_z"] = base_point[2]
-        self.df.loc[self.df["uid"] == uid, "end_x"] = end_point[0]
-        self.df.loc[self.df["uid"] == uid, "end_y"] = end_point[1]
-        self.df.loc[self.df["uid"] == uid, "end_z"] = end_point[2]
-        self.df.loc[self.df["uid"] == uid, "normal_x"] = normal[0]
-        self.df.loc[self.df["uid"] == uid, "normal_y"] = normal[1]
-        self.df.loc[self.df["uid"] == uid, "normal_z"] = normal[2]
-        self.df.loc[self.df["uid"] == uid, "azimuth"] = azimuth
-        self.df.loc[self.df["uid"] == uid, "length"] = length
-        self.df.loc[self.df["uid"] == uid, "top"] = top
-        self.df.loc[self.df["uid"] == uid, "bottom"] = bottom
+        self.set_uid_value(uid=uid, column="name", value=name)
+        self.set_uid_value(uid=uid, column="base_x", value=base_point[0])
+        self.set_uid_value(uid=uid, column="base_y", value=base_point[1])
+        self.set_uid_value(uid=uid, column="base_z", value=base_point[2])
+        self.set_uid_value(uid=uid, column="end_x", value=end_point[0])
+        self.set_uid_value(uid=uid, column="end_y", value=end_point[1])
+        self.set_uid_value(uid=uid, column="end_z", value=end_point[2])
+        self.set_uid_value(uid=uid, column="normal_x", value=normal[0])
+        self.set_uid_value(uid=uid, column="normal_y", value=normal[1])
+        self.set_uid_value(uid=uid, column="normal_z", value=normal[2])
+        self.set_uid_value(uid=uid, column="azimuth", value=azimuth)
+        self.set_uid_value(uid=uid, column="length", value=length)
+        self.set_uid_value(uid=uid, column="top", value=top)
+        self.set_uid_value(uid=uid, column="bottom", value=bottom)
 
     def set_from_table(self, uid=None):
         """Get parameters from x_section table and set them on x_section"""
@@ -556,34 +578,58 @@ class XSectionCollection(QAbstractTableModel):
 
     def get_XY_from_W(self, section_uid=None, W=None):
         """Gets X, Y coordinates from W coordinate (distance along the Xsection horizontal axis)"""
-        azimuth = self.df.loc[self.df["uid"] == section_uid, "azimuth"].values[0]
-        base_x = self.df.loc[self.df["uid"] == section_uid, "base_x"].values[0]
-        base_y = self.df.loc[self.df["uid"] == section_uid, "base_y"].values[0]
+        azimuth = self.get_uid_value(uid=section_uid, column="azimuth")
+        base_x = self.get_uid_value(uid=section_uid, column="base_x")
+        base_y = self.get_uid_value(uid=section_uid, column="base_y")
         X = W * np_sin(azimuth * np_pi / 180) + base_x
         Y = W * np_cos(azimuth * np_pi / 180) + base_y
         return X, Y
 
     def get_deltaXY_from_deltaW(self, section_uid=None, deltaW=None):
         """Gets X, Y coordinates from W coordinate (distance along the Xsection horizontal axis)"""
-        azimuth = self.df.loc[self.df["uid"] == section_uid, "azimuth"].values[0]
+        azimuth = self.get_uid_value(uid=section_uid, column="azimuth")
         deltaX = deltaW * np_sin(azimuth * np_pi / 180)
         deltaY = deltaW * np_cos(azimuth * np_pi / 180)
         return deltaX, deltaY
 
-    def plane2world(self, section_uid=None, u=None, v=None, as_arr=False):
-        n_points = len(u)
-        plane = self.get_uid_vtk_plane(section_uid)
-
-        normal = np_array(plane.GetNormal())
-        origin = np_array(plane.GetOrigin())
-        d = np_repeat(np_dot(normal, origin), n_points)
+    def get_uid_affine_matrices(self, uid=None):
+        """Returns the 4x4 affine matrices transforming homogeneous world coordinates [X, Y, Z, 1] to
+        plane coordinates [U, V, W, 1] of cross section uid, and back. U is along the direction vector, V
+        along the dip vector with sign inverted because of the right hand rule, and W is the distance from
+        the plane along its normal, so U and V are the same as in world2plane of XSectionBaseEntity.
+        Matrices are computed once from the vtkPlane of the cross section, and are cached until
+        set_geometry or set_uid_vtk_plane is called again on the cross section."""
+        if uid not in self.affine_matrices:
+            plane = self.get_uid_vtk_plane(uid)
+            normal = np_array(plane.GetNormal())
+            origin = np_array(plane.GetOrigin())
+            dip_vec, dir_vec = get_dip_dir_vectors(np_array([normal]))
+            world2plane = np_zeros((4, 4))
+            world2plane[0, :3] = dir_vec[0]
+            world2plane[1, :3] = -dip_vec[0]
+            world2plane[2, :3] = normal
+            world2plane[2, 3] = -np_dot(normal, origin)
+            world2plane[3, 3] = 1.0
+            self.affine_matrices[uid] = (world2plane, np_linalg_inv(world2plane))
+        return self.affine_matrices[uid]
+
+    def world2plane_points(self, section_uid=None, points=None, with_w=False):
+        """Transforms an (N, 3) array of world coordinates to an (N, 2) array of U, V coordinates in the
+        cross section plane, or to an (N, 3) array of U, V, W coordinates if with_w is True."""
+        world2plane, _ = self.get_uid_affine_matrices(section_uid)
+        n_cols = 3 if with_w else 2
+        return np_matmul(points, world2plane[:n_cols, :3].T) + world2plane[:n_cols, 3]
+
+    def plane2world_points(self, section_uid=None, points=None):
+        """Transforms an (N, 2) array of U, V coordinates in the cross section plane, or an (N, 3)
+        array of U, V, W coordinates, to an (N, 3) array of world coordinates."""
+        _, plane2world = self.get_uid_affine_matrices(section_uid)
+        n_cols = points.shape[1]
+        return np_matmul(points, plane2world[:3, :n_cols].T) + plane2world[:3, 3]
 
-        dip_vec, dir_vec = get_dip_dir_vectors(np_array([normal]))
-        A = np_array([dir_vec[0], dip_vec[0], normal])
-        B = np_array(
-            [u, -v, d]
-        )  # this should be [-u +v -d] (because we calculated -v) but it is opposite because of the right hand rule
-        X = np_linalg_inv(A).dot(B).T
+    def plane2world(self, section_uid=None, u=None, v=None, as_arr=False):
+        """Gets X, Y, Z coordinates of points with U, V coordinates in the cross section plane."""
+        X = self.plane2world_points(section_uid=section_uid, points=np_column_stack((u, v)))
 
         if as_arr:
             return X
@@ -595,28 +641,28 @@ class XSectionCollection(QAbstractTableModel):
         visualization"""
 
         base_point = [
-            self.df.loc[self.df["uid"] == uid, "base_x"].values[0],
-            self.df.loc[self.df["uid"] == uid, "base_y"].values[0],
-            self.df.loc[self.df["uid"] == uid, "base_z"].values[0],
+            self.get_uid_value(uid=uid, column="base_x"),
+            self.get_uid_value(uid=uid, column="base_y"),
+            self.get_uid_value(uid=uid, column="base_z"),
         ]
         end_point = [
-            self.df.loc[self.df["uid"] == uid, "end_x"].values[0],
-            self.df.loc[self.df["uid"] == uid, "end_y"].values[0],
-            self.df.loc[self.df["uid"] == uid, "end_z"].values[0],
+            self.get_uid_value(uid=uid, column="end_x"),
+            self.get_uid_value(uid=uid, column="end_y"),
+            self.get_uid_value(uid=uid, column="end_z"),
         ]
         normal = [
-            self.df.loc[self.df["uid"] == uid, "normal_x"].values[0],
-            self.df.loc[self.df["uid"] == uid, "normal_y"].values[0],
-            self.df.loc[self.df["uid"] == uid, "normal_z"].values[0],
+            self.get_uid_value(uid=uid, column="normal_x"),
+            self.get_uid_value(uid=uid, column="normal_y"),
+            self.get_uid_value(uid=uid, column="normal_z"),
         ]
 
-        dip = np_deg2rad(self.df.loc[self.df["uid"] == uid, "dip"].values[0])
+        dip = np_deg2rad(self.get_uid_value(uid=uid, column="dip"))
         azimuth = np_deg2rad(
-            (self.df.loc[self.df["uid"] == uid, "azimuth"].values[0] + 180) % 360
+            (self.get_uid_value(uid=uid, column="azimuth") + 180) % 360
         )
 
-        width = self.df.loc[self.df["uid"] == uid, "width"].values[0]
-        bottom = self.df.loc[self.df["uid"] == uid, "bottom"].values[0]
+        width = self.get_uid_value(uid=uid, column="width")
+        bottom = self.get_uid_value(uid=uid, column="bottom")
 
         vtk_frame = XsPolyLine(x_section_uid=uid, parent=self.parent)
 
@@ -654,8 +700,10 @@ class XSectionCollection(QAbstractTableModel):
         vtk_plane = Plane()
         vtk_plane.SetOrigin(base_point)
         vtk_plane.SetNormal(normal)
-        self.df.loc[self.df["uid"] == uid, "vtk_plane"] = vtk_plane
-        self.df.loc[self.df["uid"] == uid, "vtk_frame"] = vtk_frame
+        self.set_uid_value(uid=uid, column="vtk_plane", value=vtk_plane)
+        self.set_uid_value(uid=uid, column="vtk_frame", value=vtk_frame)
+        """The affine matrices are computed again from the new plane when needed."""
+        self.affine_matrices.pop(uid, None)
 
     """Standard QT methods slightly adapted to the data source."""
 
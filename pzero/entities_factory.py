@@ -1,28 +1,44 @@
 """entities_factory.py
 PZero© Andrea Bistacchi"""
+from functools import wraps
+
 from numpy import NaN as np_NaN
+from numpy import add as np_add
 from numpy import append as np_append
+from numpy import arange as np_arange
 from numpy import arcsin as np_arcsin
+from numpy import argsort as np_argsort
 from numpy import arctan as np_arctan
 from numpy import arctan2 as np_arctan2
 from numpy import array as np_array
 from numpy import asarray as np_asarray
+from numpy import bincount as np_bincount
 from numpy import column_stack as np_column_stack
+from numpy import concatenate as np_concatenate
 from numpy import cos as np_cos
 from numpy import cross as np_cross
-from numpy import dot as np_dot
+from numpy import cumsum as np_cumsum
+from numpy import diff as np_diff
 from numpy import empty as np_empty
+from numpy import flatnonzero as np_flatnonzero
 from numpy import hstack as np_hstack
+from numpy import matmul as np_matmul
+from numpy import maximum as np_maximum
+from numpy import minimum as np_minimum
 from numpy import ones as np_ones
 from numpy import pi as np_pi
+from numpy import repeat as np_repeat
 from numpy import shape as np_shape
 from numpy import sign as np_sign
 from numpy import size as np_size
 from numpy import sqrt as np_sqrt
 from numpy import squeeze as np_squeeze
 from numpy import tan as np_tan
+from numpy import unique as np_unique
 from numpy import where as np_where
 from numpy import zeros as np_zeros
+from numpy import zeros_like as np_zeros_like
+from numpy import ndarray
 from numpy.linalg import norm as np_linalg_norm
 from pyvista import Plotter  # this should be removed
 from pyvista import PolyData as pv_PolyData  # this should be removed
@@ -31,6 +47,7 @@ from pyvista import helpers as pv_helpers  # very useful. Can be used when dsa f
 from pyvista import image_to_texture as pv_image_to_texture
 from pyvista import wrap as pv_wrap
 from pyvista.core.filters import _update_alg
+from scipy.spatial import cKDTree
 from vtk import (
     vtkPolyData,
     vtkPoints,
@@ -53,7 +70,6 @@ from vtk import (
     vtkStructuredGrid,
     vtkPolyDataConnectivityFilter,
     vtkPolyDataMapper,
-    vtkPCANormalEstimation,
     vtkEuclideanClusterExtraction,
     vtkCenterOfMass,
     vtkArcPlotter,
@@ -61,12 +77,19 @@ from vtk import (
     vtkActor,
     vtkLocator,
     vtkQuad,
+    vtkDataSetAttributes,
+    vtkExtractGrid,
 )
 from vtkmodules.numpy_interface.dataset_adapter import (
     WrapDataObject,
     vtkDataArrayToVTKArray,
 )
-from vtkmodules.util.numpy_support import vtk_to_numpy
+from vtkmodules.util.numpy_support import (
+    ID_TYPE_CODE,
+    numpy_to_vtk,
+    numpy_to_vtkIdTypeArray,
+    vtk_to_numpy,
+)
 from vtkmodules.vtkFiltersCore import vtkThresholdPoints
 from vtkmodules.vtkFiltersPoints import vtkConvertToPointCloud
 
@@ -191,6 +214,149 @@ valid_topological_types = [
 ]
 
 
+def points2plane(points=None, normal=None):
+    """Returns an (N, 2) Numpy array with the U, V coordinates of an (N, 3) array of points in a plane
+    with the given normal. U is along the direction vector and V along the dip vector, with sign inverted
+    because of the right hand rule."""
+    dip_vec, dir_vec = get_dip_dir_vectors(normal)
+    return np_matmul(points, np_column_stack((dir_vec[0], -dip_vec[0])))
+
+
+def normalize_rows(vectors=None):
+    """Returns the rows of a Numpy array of vectors normalized to unit vectors. Null vectors are
+    left null instead of being divided by zero."""
+    norms = np_linalg_norm(vectors, axis=1)
+    norms[norms == 0] = 1.0
+    return vectors / norms[:, None]
+
+
+"""vtkCellArray.SetData(offsets, connectivity), used to set all cells at once, is available from VTK 9.0."""
+cell_array_set_data = hasattr(vtkCellArray, "SetData")
+
+
+def cells_to_vtk(cells_matrix=None, set_data=None):
+    """Returns a vtkCellArray with one cell for each row of cells_matrix, a Numpy connectivity matrix
+    with n_rows = n_cells and n_columns = n_points in cell. The offsets and connectivity arrays are built
+    with Numpy and set at once with vtkCellArray.SetData. If set_data is False, or SetData is not available
+    (old VTK versions), cells are inserted one by one with InsertNextCell."""
+    if set_data is None:
+        set_data = cell_array_set_data
+    cells_matrix = np_asarray(cells_matrix, dtype=ID_TYPE_CODE)
+    n_cells, cell_size = np_shape(cells_matrix)
+    vtk_cells = vtkCellArray()
+    if set_data:
+        vtk_cells.SetData(
+            numpy_to_vtkIdTypeArray(
+                np_arange(0, (n_cells + 1) * cell_size, cell_size, dtype=ID_TYPE_CODE),
+                deep=True,
+            ),
+            numpy_to_vtkIdTypeArray(cells_matrix.ravel(), deep=True),
+        )
+    else:
+        for row in cells_matrix.tolist():
+            vtk_cells.InsertNextCell(cell_size, row)
+    return vtk_cells
+
+
+def copy_attributes(in_attributes=None, out_attributes=None, ids=None):
+    """Copies all the arrays of in_attributes (vtkPointData or vtkCellData) to out_attributes, keeping
+    only the tuples in the Numpy array ids, and sets the same active attributes (scalars, normals, etc.)."""
+    for i in range(in_attributes.GetNumberOfArrays()):
+        in_array = in_attributes.GetArray(i)
+        if in_array is None:
+            continue
+        out_array = numpy_to_vtk(vtk_to_numpy(in_array)[ids], deep=True)
+        out_array.SetName(in_array.GetName())
+        out_attributes.AddArray(out_array)
+    for attribute_type in range(vtkDataSetAttributes.NUM_ATTRIBUTES):
+        in_array = in_attributes.GetAttribute(attribute_type)
+        if in_array is not None and in_array.GetName():
+            out_attributes.SetActiveAttribute(in_array.GetName(), attribute_type)
+
+
+def split_cells_by_region(cell_array=None, cell_region=None, n_points=None):
+    """Splits the cells in the vtkCellArray cell_array by region, with cell_region a Numpy array with the
+    region index (0, 1, 2...) of each cell, in a single pass. Cells are sorted by region with a stable argsort,
+    then the points of each region are numbered in order of first appearance in its cells, as done by
+    vtkCleanPolyData, with a single np_unique on (region, point id) keys. Returns a list with a tuple
+    (point_ids, cell_ids, offsets, connectivity) for each region, where point_ids and cell_ids are the
+    original ids of the points and cells in the region, and offsets and connectivity define its cells
+    with compact point ids 0...len(point_ids) - 1."""
+    offsets = vtk_to_numpy(cell_array.GetOffsetsArray()).astype(ID_TYPE_CODE)
+    connectivity = vtk_to_numpy(cell_array.GetConnectivityArray()).astype(ID_TYPE_CODE)
+    cell_region = np_asarray(cell_region, dtype=ID_TYPE_CODE)
+    n_regions = int(cell_region.max()) + 1 if len(cell_region) else 0
+    """Connectivity of the cells sorted by region."""
+    cell_order = np_argsort(cell_region, kind="stable")
+    sorted_sizes = np_diff(offsets)[cell_order]
+    sorted_offsets = np_concatenate(([0], np_cumsum(sorted_sizes))).astype(ID_TYPE_CODE)
+    entries = np_repeat(offsets[:-1][cell_order] - sorted_offsets[:-1], sorted_sizes)
+    sorted_connectivity = connectivity[entries + np_arange(len(entries))]
+    entry_region = np_repeat(cell_region[cell_order], sorted_sizes)
+    """Compact point ids, numbered in order of first appearance. Since entries are sorted by region,
+    the points of each region get consecutive compact ids."""
+    keys, first_entries, inverse = np_unique(
+        entry_region * n_points + sorted_connectivity,
+        return_index=True,
+        return_inverse=True,
+    )
+    key_rank = np_empty(len(keys), dtype=ID_TYPE_CODE)
+    key_rank[np_argsort(first_entries, kind="stable")] = np_arange(len(keys))
+    compact_connectivity = key_rank[inverse]
+    compact_point_ids = np_empty(len(keys), dtype=ID_TYPE_CODE)
+    compact_point_ids[key_rank] = keys % n_points
+    """Boundaries of the regions in the sorted points, cells and connectivity entries."""
+    point_bounds = np_concatenate(
+        ([0], np_cumsum(np_bincount(keys // n_points, minlength=n_regions)))
+    )
+    cell_bounds = np_concatenate(
+        ([0], np_cumsum(np_bincount(cell_region, minlength=n_regions)))
+    )
+    parts = []
+    for region in range(n_regions):
+        first_cell, last_cell = cell_bounds[region], cell_bounds[region + 1]
+        first_entry, last_entry = sorted_offsets[first_cell], sorted_offsets[last_cell]
+        parts.append(
+            (
+                compact_point_ids[point_bounds[region] : point_bounds[region + 1]],
+                cell_order[first_cell:last_cell],
+                sorted_offsets[first_cell : last_cell + 1] - first_entry,
+                compact_connectivity[first_entry:last_entry] - point_bounds[region],
+            )
+        )
+    return parts
+
+
+"""Number of hits and misses of the derived data cache of all PolyData entities (see mtime_cached),
+that can be read, or reset to zero, to measure the benefit of the cache."""
+derived_cache_stats = {"hits": 0, "misses": 0}
+
+
+def mtime_cached(method=None):
+    """Decorator caching the result of a method without arguments of a PolyData entity, such as the
+    points_map_* properties, until the entity is modified. The VTK modification time of vtkPolyData
+    includes points, point and cell data and cells, so the cache is invalidated by any change made
+    through VTK or through the setters of PolyData. Arrays edited in place through Numpy must be
+    followed by Modified() (see edit_point_data). Cached Numpy arrays are returned as read-only
+    arrays, so that they cannot be modified by mistake by the caller."""
+
+    @wraps(method)
+    def cached_method(self):
+        mtime = self.GetMTime()
+        cached = self.derived_cache.get(method.__name__)
+        if cached is not None and cached[0] == mtime:
+            derived_cache_stats["hits"] += 1
+            return cached[1]
+        derived_cache_stats["misses"] += 1
+        value = method(self)
+        if isinstance(value, ndarray):
+            value.flags.writeable = False
+        self.derived_cache[method.__name__] = (mtime, value)
+        return value
+
+    return cached_method
+
+
 class PolyData(vtkPolyData):
     """PolyData is an abstract class used as a base for all entities with a geological or fluid meaning, such as
     triangulated surfaces, polylines (also in cross sections), pointsets, etc., and possibly in other
@@ -203,6 +369,8 @@ class PolyData(vtkPolyData):
     def __init__(self, *args, **kwargs):
         super(PolyData, self).__init__(*args, **kwargs)
         self._locator = None
+        """Derived data cached by mtime_cached, as {method name: (MTime, value)}."""
+        self.derived_cache = {}
 
     @property
     def bounds(self):
@@ -269,31 +437,35 @@ class PolyData(vtkPolyData):
         pass
 
     @cells.setter
-    def cells(
-        self, cells_matrix=None
-    ):  # _______________________________________________________________ this does not work - see how to fix this that is very important - possibly use VEDO or PYVISTA or BETTER numpy_to_vtk.
-        """Set all cells by applying append_cell recursively"""
-        if self.GetNumberOfCells() != 0:
-            self.DeleteCells()  # this marks the cells to be deleted
-            self.RemoveDeletedCells()  # this deletes the cells, i.e. delete the cells from the cell array
-            self.Reset()  # this resets the object and updates the cell array, resulting in an object with an empty cell array
-        for row in range(np_shape(cells_matrix)[0]):
-            self.append_cell(cell_array=cells_matrix[row, :])
+    def cells(self, cells_matrix=None):
+        """Set all cells at once from a connectivity matrix, replacing the existing ones. The cell type is
+        inferred from the number of columns: 1 > vertex, 2 > line, 3 or more > polygon (e.g. triangle).
+        Points are left untouched (Reset(), used before, removed the points too), and an empty matrix
+        removes all cells."""
+        if len(cells_matrix) == 0:
+            cell_size = 0
+            vtk_cells = vtkCellArray()
+        else:
+            cells_matrix = np_asarray(cells_matrix).reshape((len(cells_matrix), -1))
+            cell_size = np_shape(cells_matrix)[1]
+            vtk_cells = cells_to_vtk(cells_matrix=cells_matrix)
+        self.SetVerts(vtk_cells if cell_size == 1 else vtkCellArray())
+        self.SetLines(vtk_cells if cell_size == 2 else vtkCellArray())
+        self.SetPolys(vtk_cells if cell_size >= 3 else vtkCellArray())
+        self.SetStrips(vtkCellArray())
+        self.Modified()
 
     @property
-    def cell_centers(
-        self,
-    ):  # ___________________________________________________ SEEMS USEFUL BUT NOT YET USED AND TESTED
-        """Returns a 3xn array of n point coordinates at the parametric center of n cells.
+    @mtime_cached
+    def cell_centers(self):
+        """Returns a nx3 array of n point coordinates at the parametric center of n cells.
         This is not necessarily the same as the geometric or bonding box center."""
         vtk_cell_ctrs = vtkCellCenters()
-        vtk_cell_ctrs.SetInputConnection(self.outputPort)
+        vtk_cell_ctrs.SetInputData(self)
         vtk_cell_ctrs.Update()
-        point_ctrs = vtk_cell_ctrs.GetOutput()
-        centers_array = np_array(
-            [point_ctrs.GetPoint(i) for i in range(point_ctrs.GetNumberOfPoints())]
-        )
-        return centers_array
+        if vtk_cell_ctrs.GetOutput().GetNumberOfPoints() == 0:
+            return np_zeros((0, 3))
+        return vtk_to_numpy(vtk_cell_ctrs.GetOutput().GetPoints().GetData()).copy()
 
     def ids_to_scalar(self):
         """Store point and cell ids on scalars named "vtkIdFilter_Ids".
@@ -372,6 +544,7 @@ class PolyData(vtkPolyData):
         self.Modified()
 
     @property
+    @mtime_cached
     def points_map_dip_azimuth(self):
         """Returns dip azimuth (in grad) as Numpy array for map plotting if points have Normals property."""
         if "Normals" in self.point_data_keys:
@@ -400,6 +573,7 @@ class PolyData(vtkPolyData):
             return None
 
     @property
+    @mtime_cached
     def points_map_dip(self):
         """Returns dip (in grad) as Numpy array for map plotting if points have Normals property."""
         if "Normals" in self.point_data_keys:
@@ -417,6 +591,7 @@ class PolyData(vtkPolyData):
             return None
 
     @property
+    @mtime_cached
     def points_map_trend(self):
         """Returns trend as Numpy array for map plotting if points have Lineations property."""
         if "Lineations" in self.point_data_keys:
@@ -433,6 +608,7 @@ class PolyData(vtkPolyData):
             return None
 
     @property
+    @mtime_cached
     def points_map_plunge(self):
         """Returns plunge as Numpy array for map plotting if points have Lineations property."""
         if "Lineations" in self.point_data_keys:
@@ -527,6 +703,8 @@ class PolyData(vtkPolyData):
             WrapDataObject(self).PointData[data_key][point_id, col] = point_data_array[
                 col
             ]
+        """Editing in place does not update the modification time, that is used by mtime_cached."""
+        self.GetPointData().GetArray(data_key).Modified()
 
     # ==================== CELL DATA ====================
 
@@ -624,31 +802,63 @@ class PolyData(vtkPolyData):
             return num_regions
 
     def split_parts(self):
-        """Splits connected parts using RegionId from self.connected_calc().
-        Also returns the number of connected regions.
+        """Splits connected parts using RegionId, as calculated by self.connected_calc(), and returns a list
+        of PolyLine or TriSurf entities, one for each connected part, with the point and cell data of self.
         Returns None in case it is called for a VertexSet, so it works for PolyLine and TriSurf only.
-        """
+        The connectivity filter is run once, then all parts are sliced at once from its output with
+        split_cells_by_region. Points are numbered in each part in order of first appearance in its
+        cells, and points not used by any cell are dropped, as vtkCleanPolyData did before."""
         if isinstance(self, (PolyLine, TriSurf)):
             connectivity_filter = vtkPolyDataConnectivityFilter()
             connectivity_filter.SetInputData(self)
             connectivity_filter.SetExtractionModeToAllRegions()
             connectivity_filter.ColorRegionsOn()
             connectivity_filter.Update()
-            connectivity_filter.SetExtractionModeToSpecifiedRegions()
-            num_regions = connectivity_filter.GetNumberOfExtractedRegions()
+            connected = connectivity_filter.GetOutput()
+            if isinstance(self, PolyLine):
+                cell_array = connected.GetLines()
+            else:
+                cell_array = connected.GetPolys()
+            if cell_array.GetNumberOfCells() == 0:
+                return []
+            """The region of each cell is the RegionId of its first point."""
+            point_region = vtk_to_numpy(connected.GetPointData().GetArray("RegionId"))
+            cell_first_points = vtk_to_numpy(cell_array.GetConnectivityArray())[
+                vtk_to_numpy(cell_array.GetOffsetsArray())[:-1]
+            ]
+            points = vtk_to_numpy(connected.GetPoints().GetData())
             vtk_out_list = []
-            for rid in range(num_regions):
-                connectivity_filter.InitializeSpecifiedRegionList()
-                connectivity_filter.AddSpecifiedRegion(rid)
-                connectivity_filter.Update()
-                cleaner = vtkCleanPolyData()
-                cleaner.SetInputConnection(connectivity_filter.GetOutputPort())
-                cleaner.Update()
+            for point_ids, cell_ids, offsets, connectivity in split_cells_by_region(
+                cell_array=cell_array,
+                cell_region=point_region[cell_first_points],
+                n_points=connected.GetNumberOfPoints(),
+            ):
                 if isinstance(self, PolyLine):
                     vtk_out_obj = PolyLine()
-                elif isinstance(self, TriSurf):
+                else:
                     vtk_out_obj = TriSurf()
-                vtk_out_obj.DeepCopy(cleaner.GetOutput())
+                out_points = vtkPoints()
+                out_points.SetData(numpy_to_vtk(points[point_ids], deep=True))
+                vtk_out_obj.SetPoints(out_points)
+                out_cells = vtkCellArray()
+                out_cells.SetData(
+                    numpy_to_vtkIdTypeArray(offsets, deep=True),
+                    numpy_to_vtkIdTypeArray(connectivity, deep=True),
+                )
+                if isinstance(self, PolyLine):
+                    vtk_out_obj.SetLines(out_cells)
+                else:
+                    vtk_out_obj.SetPolys(out_cells)
+                copy_attributes(
+                    in_attributes=connected.GetPointData(),
+                    out_attributes=vtk_out_obj.GetPointData(),
+                    ids=point_ids,
+                )
+                copy_attributes(
+                    in_attributes=connected.GetCellData(),
+                    out_attributes=vtk_out_obj.GetCellData(),
+                    ids=cell_ids,
+                )
                 vtk_out_list.append(vtk_out_obj)
             return vtk_out_list
 
@@ -715,12 +925,9 @@ class VertexSet(PolyData):
             self.DeleteCells()
             self.GetVerts().Modified()
 
-        vertices = vtkCellArray()  # [Gabriele] vertices (cells)
         npoints = self.points_number  # [Gabriele] Points present in the object
-        cellIds = [0]
-        for pid in range(npoints):
-            cellIds[0] = pid
-            vertices.InsertNextCell(1, cellIds)
+        """One vertex cell for each point, set at once with cells_to_vtk."""
+        vertices = cells_to_vtk(cells_matrix=np_arange(npoints).reshape((npoints, 1)))
         self.SetVerts(
             vertices
         )  # [Gabriele] Assign the vertices to the point_cloud (vtkPolyData)
@@ -739,7 +946,7 @@ class PolyLine(PolyData):
         pline_copy.DeepCopy(self)
         return pline_copy
 
-    @property
+    @PolyData.cells.getter
     def cells(self):
         """Returns cells as Numpy array.
         In PolyLine the cells are instances of vtkLine identified by vtkCellType VTK_LINE = 3
@@ -770,12 +977,11 @@ class PolyLine(PolyData):
             argument and in this case RemoveDeletedCells() is not necessary."""
             self.DeleteCells()
             self.GetLines().Modified()
-        pline_cells = vtkCellArray()
-        for point in range(self.points_number - 1):
-            line = vtkLine()
-            line.GetPointIds().SetId(0, point)
-            line.GetPointIds().SetId(1, point + 1)
-            pline_cells.InsertNextCell(line)
+        """One line cell for each pair of consecutive points, set at once with cells_to_vtk."""
+        point_ids = np_arange(max(self.points_number, 1))
+        pline_cells = cells_to_vtk(
+            cells_matrix=np_column_stack((point_ids[:-1], point_ids[1:]))
+        )
         self.SetLines(pline_cells)
         self.BuildLinks()
         self.GetLines().Modified()
@@ -824,7 +1030,7 @@ class TriSurf(PolyData):
         trisurf_copy.DeepCopy(self)
         return trisurf_copy
 
-    @property
+    @PolyData.cells.getter
     def cells(self):
         """Returns cells as Numpy array.
         In TriSurf the cells are instances of vtkTriangle identified by vtkCellType VTK_TRIANGLE = 5
@@ -879,42 +1085,37 @@ class TriSurf(PolyData):
         edges_clean_strips_clean.SetTolerance(0.0)
         edges_clean_strips_clean.SetInputConnection(edges_clean_strips.GetOutputPort())
         edges_clean_strips_clean.Update()
-        """Assemble borders."""
+        """Assemble borders, copying the points of each strip with at least 3 points to a new
+        polygon. This is done on whole arrays, with a single assignment of points and cells."""
+        strips = edges_clean_strips_clean.GetOutput()
+        if strips.GetNumberOfCells() == 0:
+            borders = vtkPolyData()
+            borders.SetPoints(vtkPoints())
+            borders.SetPolys(vtkCellArray())
+            return borders
+        strips_offsets = vtk_to_numpy(strips.GetLines().GetOffsetsArray())
+        strips_connectivity = vtk_to_numpy(strips.GetLines().GetConnectivityArray())
+        strips_sizes = np_diff(strips_offsets)
+        for cell in np_flatnonzero(strips_sizes < 3):
+            print("cell: ", cell, " - degenerate cell with less than 3 points.")
+        border_sizes = strips_sizes[strips_sizes >= 3]
+        border_point_ids = strips_connectivity[np_repeat(strips_sizes >= 3, strips_sizes)]
+        border_points = vtkPoints()
+        border_points.SetData(
+            numpy_to_vtk(
+                vtk_to_numpy(strips.GetPoints().GetData())[border_point_ids], deep=True
+            )
+        )
         border_polygons = vtkCellArray()
-        border_polygons.SetNumberOfCells(
-            edges_clean_strips_clean.GetOutput().GetNumberOfCells()
+        border_polygons.SetData(
+            numpy_to_vtkIdTypeArray(
+                np_concatenate(([0], np_cumsum(border_sizes))).astype(ID_TYPE_CODE),
+                deep=True,
+            ),
+            numpy_to_vtkIdTypeArray(
+                np_arange(len(border_point_ids), dtype=ID_TYPE_CODE), deep=True
+            ),
         )
-        border_points = vtkPoints()
-        points_in_border = 0
-        for cell in range(edges_clean_strips_clean.GetOutput().GetNumberOfCells()):
-            if (
-                edges_clean_strips_clean.GetOutput().GetCell(cell).GetNumberOfPoints()
-                >= 3
-            ):
-                polygon = vtkPolygon()
-                polygon.GetPointIds().SetNumberOfIds(
-                    edges_clean_strips_clean.GetOutput()
-                    .GetCell(cell)
-                    .GetNumberOfPoints()
-                )
-                for point_in_cell in range(
-                    edges_clean_strips_clean.GetOutput()
-                    .GetCell(cell)
-                    .GetNumberOfPoints()
-                ):
-                    point_in_border = point_in_cell + points_in_border
-                    border_points.InsertNextPoint(
-                        edges_clean_strips_clean.GetOutput()
-                        .GetCell(cell)
-                        .GetPoints()
-                        .GetPoint(point_in_cell)
-                    )
-                    polygon.GetPointIds().SetId(point_in_cell, point_in_border)
-                border_polygons.InsertNextCell(polygon)
-                points_in_polygon = polygon.GetNumberOfPoints()
-                points_in_border += points_in_polygon
-            else:
-                print("cell: ", cell, " - degenerate cell with less than 3 points.")
         borders = vtkPolyData()
         borders.SetPoints(border_points)
         borders.SetPolys(border_polygons)
@@ -925,121 +1126,56 @@ class TriSurf(PolyData):
         """Returns a deep copy of the input TriSurf with the boundary edges translated
         outwards, parallel to the cell plane, by an amount equal to tol.
         This is similar to a dilation or a Minkowski sum."""
-        # """Deep copy the input TriSurf, in order not to permanently modify it."""
-        # trisurf_copy = self.deep_copy()
-        # """Clean topology, store point and cell ids on scalars named vtkIdFilter_Ids."""
-        # trisurf_copy.clean_topology()
-        trisurf_copy = self.clean_topology()
-        trisurf_copy.Squeeze()
-        trisurf_copy.Modified()
-        trisurf_copy.BuildCells()
-        trisurf_copy.BuildLinks()
-        trisurf_copy.ids_to_scalar()
-        """Extract boundary cells from the trisurf_copy painted with vtkIdFilter_Ids"""
-        edges_filter = vtkFeatureEdges()
-        edges_filter.BoundaryEdgesOn()
-        edges_filter.NonManifoldEdgesOff()
-        edges_filter.FeatureEdgesOff()
-        edges_filter.ManifoldEdgesOff()
-        edges_filter.SetInputData(trisurf_copy)
-        edges_filter.Update()
-        edges = edges_filter.GetOutput()
-        """Extract a Numpy array of boundary point ids, and use it to build a vtkIdList.
-        Use the for loop to insert ids since the SetArray VTK method does not work."""
-        bnd_pt_ids_narray = WrapDataObject(edges).PointData["vtkIdFilter_Ids"]
-        edges_points_n = len(bnd_pt_ids_narray)
-        bnd_pt_ids = vtkIdList()
-        for bnd_pt_id in bnd_pt_ids_narray:
-            bnd_pt_ids.InsertNextId(bnd_pt_id)
-        """For each point, find the cells and edges, then calculate the dilation vector from each
-        pair of edge and center-to-edge unit vectors, and normalize the dilation vector to have norm = tol.
-        The transformation is applied at the end with displace_boundary_points_array in order not to alter
-        point coordinates within the loop. In early attempts I used the VTK methods ComputeCentroid() and Normals()
-        but the first does not return the true center of the triangle, and the second results in uncertainties
-        if pointing upwards or downwards."""
-        displace_boundary_points_array = np_empty((0, 4), dtype=float)
-        for p_i in range(edges_points_n):
-            """Loop over edge points."""
-            point_id = bnd_pt_ids.GetId(p_i)
-            point_displ = np_zeros(3)
-            """Get list of cells that share the point as vtkIdList."""
-            point_cells_ids = vtkIdList()
-            trisurf_copy.GetPointCells(point_id, point_cells_ids)
-            n_point_cells = point_cells_ids.GetNumberOfIds()
-            for c_i in range(n_point_cells):
-                """Loop over cells (triangles)."""
-                cell_id = point_cells_ids.GetId(c_i)
-                """Get the other two points in this triangle."""
-                trgl_point_ids = vtkIdList()
-                trisurf_copy.GetCellPoints(cell_id, trgl_point_ids)
-                """Use the mean value of vertex coordinates to calculate the triangle center. The ComputeCentroid() VTK method yields incorrect centres not contained in the triangle plane."""
-                trgl_ctr = (
-                    np_asarray(trisurf_copy.GetPoint(trgl_point_ids.GetId(0)))
-                    + np_asarray(trisurf_copy.GetPoint(trgl_point_ids.GetId(1)))
-                    + np_asarray(trisurf_copy.GetPoint(trgl_point_ids.GetId(2)))
-                ) / 3
-                for e_i in range(3):
-                    """Loop over edge points."""
-                    edge_point_id = trgl_point_ids.GetId(e_i)
-                    if edge_point_id != point_id:
-                        """Exclude the cell points excluding the point to be displaced itself."""
-                        edge_cells_ids = vtkIdList()
-                        trisurf_copy.GetCellEdgeNeighbors(
-                            cell_id, point_id, edge_point_id, edge_cells_ids
-                        )
-                        if edge_cells_ids.GetNumberOfIds() == 0:
-                            """Process only points on a boundary edge."""
-                            """Coordinates of the point to be displaced."""
-                            point_xyz = np_asarray(trisurf_copy.GetPoint(point_id))
-                            """Coordinates of the point at the other end of the edge."""
-                            edge_point = np_asarray(
-                                trisurf_copy.GetPoint(edge_point_id)
-                            )
-                            """Unit vector oriented as the edge."""
-                            edge_vector = edge_point - point_xyz
-                            edge_vector = edge_vector / np_linalg_norm(edge_vector)
-                            """Center of the edge."""
-                            edge_ctr = (edge_point + point_xyz) / 2
-                            """Vector connecting the center of the triangle with the center of the edge, normalized to unit vector."""
-                            center2edge_vector = edge_ctr - trgl_ctr
-                            center2edge_vector = center2edge_vector / np_linalg_norm(
-                                center2edge_vector
-                            )
-                            """Unit vector perpendicular to the edge and the triangle plane."""
-                            trgl_normal = np_cross(edge_vector, center2edge_vector)
-                            trgl_normal = trgl_normal / np_linalg_norm(trgl_normal)
-                            """Unit vector perpendicular to the edge and parallel to the triangle plane, pointing outwards."""
-                            edge_displ = np_cross(trgl_normal, edge_vector)
-                            edge_displ = edge_displ / np_linalg_norm(edge_displ)
-                            """Add this vector to the total displacement to be applied to this point."""
-                            point_displ = point_displ + edge_displ
-            """Normalize the displacement, scale by tol, and record all in an array to be used later on."""
-            point_displ = point_displ / np_linalg_norm(point_displ) * tol
-            displace_boundary_points_array = np_append(
-                displace_boundary_points_array,
-                np_array([[point_id, point_displ[0], point_displ[1], point_displ[2]]]),
-                axis=0,
-            )
-        for row in displace_boundary_points_array:
-            """Here we perform the dilation, on the points and with the vectors stored in displace_boundary_points_array.
-            Converting the first column to integer is needed since Numpy arrays store homogeneous objects, hence the point
-            indexes are stored in the array as floats."""
-            point_idx = int(row[0])
-            trisurf_copy.points_X[point_idx] = trisurf_copy.points_X[point_idx] + row[1]
-            trisurf_copy.points_Y[point_idx] = trisurf_copy.points_Y[point_idx] + row[2]
-            trisurf_copy.points_Z[point_idx] = trisurf_copy.points_Z[point_idx] + row[3]
+        """Clean topology, so that triangles sharing an edge share its points too. The output of
+        vtkCleanPolyData is a new vtkPolyData, so the input TriSurf is not modified."""
+        trisurf_copy = TriSurf()
+        trisurf_copy.ShallowCopy(self.clean_topology())
+        if trisurf_copy.GetNumberOfPolys() == 0:
+            return trisurf_copy
+        points = vtk_to_numpy(trisurf_copy.GetPoints().GetData()).astype(float)
+        triangles = trisurf_copy.cells
+        """Each triangle has three edges, (0, 1), (1, 2) and (2, 0), and the third vertex of each
+        edge is the opposite one in the triangle. Edges are identified by a key built from the
+        sorted ids of their end points, and boundary edges are those whose key is found once."""
+        edge_start = triangles.ravel()
+        edge_end = triangles[:, [1, 2, 0]].ravel()
+        edge_opposite = triangles[:, [2, 0, 1]].ravel()
+        edge_keys = np_minimum(edge_start, edge_end) * points.shape[0] + np_maximum(
+            edge_start, edge_end
+        )
+        _, edge_index, edge_count = np_unique(
+            edge_keys, return_inverse=True, return_counts=True
+        )
+        on_boundary = edge_count[edge_index] == 1
+        edge_start = edge_start[on_boundary]
+        edge_end = edge_end[on_boundary]
+        edge_opposite = edge_opposite[on_boundary]
+        """For each boundary edge calculate the dilation vector from the edge and center-to-edge
+        unit vectors. Use the mean value of vertex coordinates to calculate the triangle center,
+        since the ComputeCentroid() VTK method yields incorrect centres not contained in the
+        triangle plane, and the VTK Normals() may point upwards or downwards."""
+        start_xyz = points[edge_start]
+        end_xyz = points[edge_end]
+        trgl_ctr = (start_xyz + end_xyz + points[edge_opposite]) / 3
+        """Unit vector oriented as the edge."""
+        edge_vector = normalize_rows(end_xyz - start_xyz)
+        """Vector connecting the center of the triangle with the center of the edge, normalized to unit vector."""
+        center2edge_vector = normalize_rows((start_xyz + end_xyz) / 2 - trgl_ctr)
+        """Unit vector perpendicular to the edge and the triangle plane."""
+        trgl_normal = normalize_rows(np_cross(edge_vector, center2edge_vector))
+        """Unit vector perpendicular to the edge and parallel to the triangle plane, pointing outwards."""
+        edge_displ = normalize_rows(np_cross(trgl_normal, edge_vector))
+        """Each boundary point is displaced by the sum of the vectors of its boundary edges,
+        normalized and scaled by tol."""
+        point_displ = np_zeros_like(points)
+        np_add.at(point_displ, edge_start, edge_displ)
+        np_add.at(point_displ, edge_end, edge_displ)
+        trisurf_copy.points = points + normalize_rows(point_displ) * tol
         trisurf_copy.Modified()
         return trisurf_copy
 
     def world2plane(self, normal=None):
-        dip_vec, dir_vec = get_dip_dir_vectors(normal)
-        uv = np_zeros((self.GetNumberOfPoints(), 2))
-        for i, point in enumerate(self.points):
-            uv[i, 0] = np_dot(dir_vec[0], point)  # u
-            uv[i, 1] = -np_dot(
-                dip_vec[0], point
-            )  # v is negative because of the right hand rule
-        return uv
+        return points2plane(points=self.points, normal=normal)
 
 
 class Frame(PolyData):
@@ -1061,7 +1197,7 @@ class Frame(PolyData):
         frame_copy.DeepCopy(self)
         return frame_copy
 
-    @property
+    @PolyData.cells.getter
     def cells(self):
         """Returns cells as Numpy array.
         In Frame the cells are instances of vtkQuad identified by vtkCellType VTK_QUAD = 9
@@ -1071,14 +1207,7 @@ class Frame(PolyData):
         )[:, 1:5]
 
     def world2plane(self, normal=None):
-        dip_vec, dir_vec = get_dip_dir_vectors(normal)
-        uv = np_zeros((self.GetNumberOfPoints(), 2))
-        for i, point in enumerate(self.points):
-            uv[i, 0] = np_dot(dir_vec[0], point)  # u
-            uv[i, 1] = -np_dot(
-                dip_vec[0], point
-            )  # v is negative because of the right hand rule
-        return uv
+        return points2plane(points=self.points, normal=normal)
 
 
 class XSectionBaseEntity:
@@ -1091,18 +1220,14 @@ class XSectionBaseEntity:
         self.parent = parent
 
     def world2plane(self, normal=None):
+        """Returns U, V coordinates of points in the plane of the cross section, transformed at once
+        with the affine matrix cached by XSectionCollection, or in the plane with the given normal."""
         if normal is None:
-            plane = self.parent.xsect_coll.get_uid_vtk_plane(self.x_section_uid)
-            normal = np_array([plane.GetNormal()])
-        dip_vec, dir_vec = get_dip_dir_vectors(normal)
-        uv = np_zeros((self.GetNumberOfPoints(), 2))
-
-        for i, point in enumerate(self.points):
-            uv[i, 0] = np_dot(dir_vec[0], point)  # u
-            uv[i, 1] = -np_dot(
-                dip_vec[0], point
-            )  # v is negative because of the right hand rule
-
+            uv = self.parent.xsect_coll.world2plane_points(
+                section_uid=self.x_section_uid, points=self.points
+            )
+        else:
+            uv = points2plane(points=self.points, normal=normal)
         return uv[:, 0], uv[:, 1]
 
     @property
@@ -1655,12 +1780,67 @@ class Seismics(vtkStructuredGrid):
 
     def __init__(self, *args, **kwargs):
         super(Seismics, self).__init__(*args, **kwargs)
+        """Derived data cached until the entity is modified, as {name: (MTime, value)}."""
+        self.derived_cache = {}
 
     def deep_copy(self):
         seismics_copy = Seismics()
         seismics_copy.DeepCopy(self)
         return seismics_copy
 
+    @property
+    def segy_cube(self):
+        """SegyCube of a Seismics imported lazily by segy2vtk, whose grid is only a decimated overview of
+        the cube, or None if the whole cube is in the grid (see segy_cube.py). The SEG-Y file is opened
+        from the index stored in the field data on first use, and opened again if the entity is
+        modified."""
+        from pzero.segy_cube import SegyCube
+
+        mtime = self.GetMTime()
+        cached = self.derived_cache.get("segy_cube")
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        cube = SegyCube.from_vtk(vtk_obj=self)
+        self.derived_cache["segy_cube"] = (mtime, cube)
+        return cube
+
+    @property
+    def survey_shape(self):
+        """Number of inlines, crosslines and samples of the full resolution survey grid."""
+        if self.segy_cube is not None:
+            return self.segy_cube.shape
+        dimensions = self.GetDimensions()
+        return dimensions[1], dimensions[0], dimensions[2]
+
+    def extract_slice(self, axis=None, index=None):
+        """Full resolution inline (axis 0), crossline (axis 1) or time (axis 2) slice with the given index
+        in the survey grid, as a new Seismics one node thick. For a lazy Seismics only the traces of the
+        slice, or a single sample of each trace for a time slice, are read from the SEG-Y
+        file."""
+        if not 0 <= index < self.survey_shape[axis]:
+            raise IndexError(f"Slice index {index} out of the survey grid")
+        cube = self.segy_cube
+        if cube is not None:
+            from pzero.segy_cube import seismics_grid
+
+            ids = [np_arange(n) for n in cube.shape]
+            ids[axis] = np_array([index])
+            return seismics_grid(
+                cube=cube, inline_ids=ids[0], crossline_ids=ids[1], sample_ids=ids[2]
+            )
+        """Grid dimensions are ordered by crossline, inline and sample, as in vtkSegYReader."""
+        voi = list(self.GetExtent())
+        dimension = [1, 0, 2][axis]
+        voi[2 * dimension] += index
+        voi[2 * dimension + 1] = voi[2 * dimension]
+        extract_grid = vtkExtractGrid()
+        extract_grid.SetInputData(self)
+        extract_grid.SetVOI(voi)
+        extract_grid.Update()
+        seismics_slice = Seismics()
+        seismics_slice.ShallowCopy(extract_grid.GetOutput())
+        return seismics_slice
+
     @property
     def bounds(self):
         """Returns a list with xmin, xmax, ymin, ymax, zmin, zmax"""
@@ -1725,6 +1905,14 @@ class Seismics(vtkStructuredGrid):
         except:
             return []
 
+    @property
+    def properties_types(self):
+        """Lists the data types of the point data attributes, as for the other images."""
+        return [
+            self.GetPointData().GetArray(key).GetDataTypeAsString()
+            for key in self.point_data_keys
+        ]
+
     def init_point_data(self, data_key=None, dimension=None):
         """Creates a new point data attribute with name = data_key
         as an empty Numpy array with dimension = 1, 2, 3, 4, 6, or 9.
@@ -2039,6 +2227,14 @@ class DEM(vtkStructuredGrid):
     def set_active_texture(self, map_image_uid=None):
         self.GetPointData().SetActiveTCoords(map_image_uid)
 
+    @property
+    def raster_tiles(self):
+        """RasterTiles of a DEM imported by dem2vtk from a large raster, whose grid is only an overview
+        of the raster, or None if the whole raster is in the grid (raster_tiles.py)."""
+        from pzero.raster_tiles import RasterTiles
+
+        return RasterTiles.from_vtk(vtk_obj=self)
+
 
 class PCDom(PolyData):
     # _______________________ DO WE NEED ADDITIONAL METHODS WITH RESPECT TO POLYDATA?
@@ -2101,50 +2297,80 @@ class PCDom(PolyData):
         self.Modified()
 
     def split_parts(self):
+        """Splits clusters using ClusterId, as calculated by self.connected_calc(), and returns a list of
+        PCDom entities, one for each cluster in order of ClusterId, with the point data of self. Points are
+        grouped by cluster at once with a stable argsort, instead of running a threshold filter for each cluster.
+        """
         if "ClusterId" not in self.point_data_keys:
             print("No Clusters present, please segment pointcloud first")
             return None
         self.GetPointData().SetActiveScalars("ClusterId")
 
-        regions = set(self.get_point_data("ClusterId"))
+        cluster_ids = vtk_to_numpy(self.GetPointData().GetArray("ClusterId"))
+        point_order = np_argsort(cluster_ids, kind="stable")
+        regions, region_counts = np_unique(cluster_ids, return_counts=True)
+        region_bounds = np_concatenate(([0], np_cumsum(region_counts)))
         vtk_out_list = []
-        for rid in regions:
-            thresh = vtkThresholdPoints()
-            thresh.SetInputData(self)
-            thresh.ThresholdBetween(rid, rid)
-            thresh.Update()
-            vtk_out_obj = PCDom()
-            vtk_out_obj.DeepCopy(thresh.GetOutput())
-            vtk_out_obj.generate_cells()
-            vtk_out_list.append(vtk_out_obj)
+        for region in range(len(regions)):
+            point_ids = point_order[region_bounds[region] : region_bounds[region + 1]]
+            vtk_out_list.append(self.extract_points(point_ids=point_ids))
         return vtk_out_list
 
-    # @profiler('/home/gabriele/STORAGE/Unibro/Libri-e-dispense/Tesi/profiler_data/normals_calc/brolla_proxy',10)
-    def vtk_set_normals(self):
-        """Calculate normals for a point cloud using PCA. Since we are using PCA ,normals may point in +/- orientation,
-        which may not be consistent with neighboring normals. To resolve this problem we can flip the normals using
-        np_where. Once the normals are calculated we flip all of the z positive normals (mutiplying Nx,Ny,Nz by -1).
-
-        NOTE: Maybe is better not do it with the PCA filter but by sampling the PC and use the pca helper_function.
-        By doing this we could calculate different PC statistics (curvature, normals, roughness, density and so on)
-        for each sample point. It's a more efficient approach than just running multiple filters on the whole
-        point-cloud. Using a vtkPointSet proxy could speed up the process.
-
-        Another approach could be to calculate the normals on a subsampled pc and then attribute the
-        calculated values to a neighbourhood of points around the known value (voronoi style).
-        """
-
-        normals_filter = vtkPCANormalEstimation()
-        normals_filter.SetInputData(self)
-        normals_filter.SetSampleSize(15)
-        normals_filter.SetNormalOrientationToGraphTraversal()
+    def extract_points(self, point_ids=None):
+        """Returns a new PCDom with the points in point_ids (a Numpy array of ids, in the order of the output)
+        and their point data, copied with Numpy fancy indexing instead of a vtkExtractSelection filter."""
+        points = vtk_to_numpy(self.GetPoints().GetData())
+        vtk_out_obj = PCDom()
+        out_points = vtkPoints()
+        out_points.SetData(numpy_to_vtk(points[point_ids], deep=True))
+        vtk_out_obj.SetPoints(out_points)
+        copy_attributes(
+            in_attributes=self.GetPointData(),
+            out_attributes=vtk_out_obj.GetPointData(),
+            ids=point_ids,
+        )
+        """One vertex cell for each point, as generate_cells would do."""
+        vtk_out_obj.SetVerts(
+            cells_to_vtk(cells_matrix=np_arange(len(point_ids)).reshape((-1, 1)))
+        )
+        return vtk_out_obj
+
+    @property
+    def kd_tree(self):
+        """scipy cKDTree of the points, used by the neighbourhood filters in point_clouds.py. The tree is built
+        on first use and kept in derived_cache until the points change, so it is shared by all filters.
+        Unlike mtime_cached, this depends on the modification time of the points only, so the tree is not
+        built again when a filter adds its result as a new point data property."""
+        points = self.GetPoints()
+        mtime = points.GetMTime()
+        cached = self.derived_cache.get("kd_tree")
+        if cached is not None and cached[0] == mtime and cached[1] is points:
+            derived_cache_stats["hits"] += 1
+            return cached[2]
+        derived_cache_stats["misses"] += 1
+        tree = cKDTree(vtk_to_numpy(points.GetData()))
+        self.derived_cache["kd_tree"] = (mtime, points, tree)
+        return tree
 
-        normals_filter.Update()
-        """Update the input polydata "self" with the new normals."""
-        normals = vtk_to_numpy(normals_filter.GetOutput().GetPointData().GetNormals())
-        print("Flipping to negative")
-        normals_flipped = np_where(normals[:, 2:] > 0, normals * -1, normals)
-        self.set_point_data("Normals", normals_flipped)
+    # @profiler('/home/gabriele/STORAGE/Unibro/Libri-e-dispense/Tesi/profiler_data/normals_calc/brolla_proxy',10)
+    def vtk_set_normals(self, scales=None, radius=None, sensor=None, workers=None):
+        """Calculate normals for a point cloud using PCA of the neighbourhood of each point, with
+        estimate_normals in point_clouds.py. This replaces vtkPCANormalEstimation, that used 15 neighbours
+        for all points on a single thread: here several neighbourhood sizes (scales) are tried for each
+        point and the one giving the best defined normal is kept, so that normals are less noisy where the
+        point density varies, and chunks of points are processed in parallel.
+
+        Normals point toward the sensor position, if given, otherwise downwards (z negative) as before.
+        The planarity of the neighbourhoods and the confidence of the normals, both between 0 and 1, are
+        stored as the "Planarity" and "Normal confidence" properties."""
+        from .point_clouds import estimate_normals
+
+        normals, planarity, confidence, _ = estimate_normals(
+            vtk_obj=self, scales=scales, radius=radius, sensor=sensor, workers=workers
+        )
+        self.set_point_data("Normals", normals)
+        self.set_point_data("Planarity", planarity)
+        self.set_point_data("Normal confidence", confidence)
         self.Modified()
 
     @property
@@ -2324,6 +2550,14 @@ class MapImage(Image):
     def texture(self):
         return pv_image_to_texture(self)
 
+    @property
+    def raster_tiles(self):
+        """RasterTiles of a MapImage imported by geo_image2vtk from a large image, that is only an overview
+        of the image, or None if the whole image has been read (see raster_tiles.py)."""
+        from pzero.raster_tiles import RasterTiles
+
+        return RasterTiles.from_vtk(vtk_obj=self)
+
 
 class XsImage(Image):
     """XsImage is a (possibly multi-property) 2D image, vertically georeferenced in a cross-section,
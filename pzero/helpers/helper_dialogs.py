@@ -863,37 +863,22 @@ class import_dialog(QMainWindow, Ui_ImportOptionsWindow):
 
     def ply2df(self, path):
         """[Gabriele]  PLY file parser.
-        It reads the first header lines to search for properties such as XYZ, RGB etcetc. When the "end_header" line is reached the file is read as a normal .csv file and parsed with pandas.read_csv skipping the header lines.
+        The header is parsed to get the format and the vertex properties, with names such as red or nx
+        mapped to PZero attribute names (Red, Nx, ...). The first 50 vertices are then read from a memory
+        map for binary (little or big endian) files, or with pandas.read_csv for ASCII files.
         --------------------------------------------------------
         Inputs:
         - PLY file path
 
         Outputs:
         - Pandas df
-
-        avg run time of 0.0017 +- 0.0005s for 50 lines.
         --------------------------------------------------------
 
         """
-        header = []
-        end_line = 0
-        with open(path, "r") as f:
-            for i, line in enumerate(f):
-                if "property" in line:
-                    header.append(line.split()[-1])
-                elif "end_header" in line:
-                    end_line = i
-                    break
-        df = pd_read_csv(
-            path,
-            skiprows=end_line + 1,
-            delimiter=" ",
-            names=header,
-            engine="c",
-            index_col=False,
-            nrows=50,
-        )
-        return df
+        """Imported here, since pc2vtk imports entities_factory, that imports this module."""
+        from pzero.imports.pc2vtk import ply2df
+
+        return ply2df(in_file_name=path, n_rows=50)
 
     def assign_data(self):
         df = self.input_data_df
@@ -5,37 +5,26 @@ import os
 import uuid
 from copy import deepcopy
 
-import xarray as xr
-from numpy import any as np_any
-from numpy import asarray as np_asarray
-from numpy import meshgrid as np_meshgrid
-from numpy import nan as np_nan
-from pyvista import StructuredGrid as pv_StructuredGrid
-
 from pzero.collections.dom_collection import DomCollection
 from pzero.collections.fluid_collection import FluidsCollection
-from pzero.entities_factory import DEM
+from pzero.raster_tiles import RasterTiles, build_overviews
 
 
 def dem2vtk(self=None, in_file_name=None, collection=None):
     """Import and add a DEM structured grid to the dom_coll of the project.
     <self> is the calling ProjectWindow() instance."""
-    """Read raster file format (geotiff) with xarray and rasterio and create DEM structured grid.
-    Helpful: http://xarray.pydata.org/en/stable/auto_gallery/plot_rasterio.html
-    https://github.com/pyvista/pyvista-support/issues/205, thanks to Bane Sullivan"""
-    data = xr.open_rasterio(in_file_name)
-    values = np_asarray(data)
-    nans = values == data.nodatavals
-    if np_any(nans):
-        values[nans] = np_nan
-    xx, yy = np_meshgrid(data["x"], data["y"])
-    zz = values.reshape(xx.shape)
-    """Convert to DEM() instance."""
-    curr_obj = DEM()
-    temp_obj = pv_StructuredGrid(xx, yy, zz)
-    temp_obj["elevation"] = zz.ravel(order="F")
-    curr_obj.ShallowCopy(temp_obj)
-    curr_obj.Modified()
+    """Read raster file format (geotiff) by windows with rasterio and create DEM structured grid (see
+    raster_tiles.py). Rasters larger than raster_overview_size are added as an overview, after building
+    the overviews of the raster file if it has none, and 3D views show the tiles needed for the camera.
+    Smaller rasters are read whole."""
+    build_overviews(file_name=in_file_name)
+    raster_tiles = RasterTiles(file_name=in_file_name)
+    curr_obj = raster_tiles.window_dem()
+    if raster_tiles.overview_level() > 0:
+        raster_tiles.to_vtk(vtk_obj=curr_obj)
+        self.TextTerminal.appendPlainText(
+            f"DEM with {raster_tiles.width} x {raster_tiles.height} pixels, shown as tiles."
+        )
     """Create dictionary."""
     if collection == "DEMs and DOMs":
         curr_obj_attributes = deepcopy(DomCollection.dom_entity_dict)
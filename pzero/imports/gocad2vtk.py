@@ -3,18 +3,25 @@ PZero© Andrea Bistacchi"""
 
 import uuid
 from copy import deepcopy
+from io import BytesIO
 
+from numpy import arange as np_arange
 from numpy import column_stack as np_column_stack
-from numpy import shape as np_shape
-from vtk import (
-    vtkPoints,
-    vtkCellArray,
-    vtkDataArrayCollection,
-    vtkFloatArray,
-    vtkLine,
-    vtkTriangle,
-    vtkVertex,
-)
+from numpy import concatenate as np_concatenate
+from numpy import cumsum as np_cumsum
+from numpy import empty as np_empty
+from numpy import flatnonzero as np_flatnonzero
+from numpy import float32 as np_float32
+from numpy import frombuffer as np_frombuffer
+from numpy import full as np_full
+from numpy import int64 as np_int64
+from numpy import int8 as np_int8
+from numpy import loadtxt as np_loadtxt
+from numpy import minimum as np_minimum
+from numpy import nan as np_nan
+from numpy import ones as np_ones
+from numpy import uint8 as np_uint8
+from numpy import zeros as np_zeros
 
 from pzero.collections.boundary_collection import BoundaryCollection
 from pzero.collections.geological_collection import GeologicalCollection
@@ -83,6 +90,255 @@ Other Gocad ASCII properties/fields/keys not implemented in PZero are:
 """
 
 
+"""Keywords of the GOCAD data lines that are parsed in bulk by read_gocad. All other lines (headers,
+properties, TFACE, END, etc.) are few and are parsed one by one."""
+gocad_data_keywords = ["VRTX", "PVRTX", "ATOM", "SEG", "TRGL"]
+
+"""Property sizes (number of components) that are imported. Properties of other sizes are discarded."""
+gocad_property_sizes = [1, 2, 3, 4, 6, 9]
+
+"""GOCAD object types of the topological types exported by vtk2gocad."""
+gocad_vtk_types = {
+    "VertexSet": "VSet",
+    "XsVertexSet": "VSet",
+    "PolyLine": "PLine",
+    "XsPolyLine": "PLine",
+    "TriSurf": "TSurf",
+}
+
+"""For each GOCAD object type written by write_gocad, the keyword of the line that starts its part, the
+keyword of its cell lines and the key of its cells in the object dictionary (None for point sets)."""
+gocad_object_parts = {
+    "VSet": ("SUBVSET", None, None),
+    "PLine": ("ILINE", "SEG", "segments"),
+    "TSurf": ("TFACE", "TRGL", "triangles"),
+}
+
+"""Number of data lines formatted at once by write_gocad_block, which bounds the size of the strings
+built in memory."""
+gocad_chunk_lines = 100000
+
+
+def gocad_line_index(buffer=None):
+    """First phase of read_gocad: index all the lines of a GOCAD file, read as a Numpy uint8 buffer, with
+    a single scan. Returns the start and end (the newline, or the end of the file) byte of each line, and
+    the kind of each line, that is the index of its keyword in gocad_data_keywords, or -1 for all other
+    lines. Data lines are recognized by their keyword at the very start of the line, followed by a space
+    or a tab, comparing the first bytes of all lines at once."""
+    ends = np_flatnonzero(buffer == 10)
+    starts = np_concatenate([[0], ends + 1])
+    ends = np_concatenate([ends, [len(buffer)]])
+    last_byte = len(buffer) - 1
+    kinds = np_full(len(starts), -1, dtype=np_int8)
+    for kind, keyword in enumerate(gocad_data_keywords):
+        match = np_ones(len(starts), dtype=bool)
+        for i, char in enumerate(keyword.encode() + b" "):
+            chars = buffer[np_minimum(starts + i, last_byte)]
+            if char == 32:
+                match &= (chars == 32) | (chars == 9)
+            else:
+                match &= chars == char
+        match &= starts + len(keyword) < ends
+        kinds[match] = kind
+    return starts, ends, kinds
+
+
+def gocad_block(buffer=None, starts=None, ends=None, skip=None, n_columns=None):
+    """Second phase of read_gocad: convert at once the numbers in the lines (starts, ends) of buffer,
+    skipping the first skip bytes (the keyword) of each line. The bytes of the lines are gathered with a
+    mask built from the cumulative sum of +1 at the start and -1 after the end of each line, and converted
+    with np_loadtxt. Returns an (n_lines, n_columns) float array, or None if some line does not have
+    exactly n_columns numbers, e.g. with the flags some applications append to VRTX lines.
+    """
+    if len(starts) == 0:
+        return np_zeros((0, n_columns))
+    first = starts[0]
+    last = min(ends[-1] + 1, len(buffer))
+    delta = np_zeros(last - first + 2, dtype=np_int8)
+    delta[starts + skip - first] = 1
+    delta[ends + 1 - first] = -1
+    mask = np_cumsum(delta[: last - first], dtype=np_int8).view(bool)
+    try:
+        block = np_loadtxt(
+            BytesIO(buffer[first:last][mask].tobytes()), ndmin=2, comments=None
+        )
+    except ValueError:
+        return None
+    if block.shape != (len(starts), n_columns):
+        return None
+    return block
+
+
+def gocad_lines(data=None, starts=None, ends=None, n_columns=None):
+    """Parse the data lines (starts, ends) one by one, as the previous line by line parser did, reading
+    the n_columns numbers after the keyword and ignoring the rest of the line. Used when gocad_block
+    fails."""
+    block = np_empty((len(starts), n_columns))
+    for i, (start, end) in enumerate(zip(starts, ends)):
+        tokens = data[start:end].split()
+        block[i] = [float(token) for token in tokens[1 : n_columns + 1]]
+    return block
+
+
+def read_gocad(in_file_name=None):
+    """Read all the objects of a GOCAD ASCII file (VSet, PLine or TSurf, e.g. .vs, .pl and .ts files) in two
+    phases. First all the lines are indexed with gocad_line_index, and the few header lines are parsed
+    one by one. Then the VRTX/PVRTX, ATOM, SEG and TRGL lines of each object are converted at once with
+    gocad_block. This replaces the previous parser, that split every line in Python and inserted each
+    vertex, property value and cell in VTK one at a time.
+    Returns a list with a dictionary for each object between GOCAD and END, with keys:
+    type (e.g. "TSurf"), name, color (RGB from *solid*color:, in 0-255), geological_type and
+    geological_feature (as in the file, None if not defined), properties_names, properties_components,
+    points (n, 3), properties (list of float32 arrays, one for each property), segments (n, 2) and
+    triangles (n, 3). Cells refer to points with zero-based ids. ATOM vertices get the coordinates and
+    properties of the vertex they refer to, and PVRTX and VRTX lines can be mixed."""
+    with open(in_file_name, "rb") as fin:
+        data = fin.read()
+    buffer = np_frombuffer(data, dtype=np_uint8)
+    starts, ends, kinds = gocad_line_index(buffer=buffer)
+    gocad_objects = []
+    gocad_object = None
+    for line_id in np_flatnonzero(kinds < 0):
+        clean_line = (
+            data[starts[line_id] : ends[line_id]].decode(errors="replace").split()
+        )
+        if not clean_line:
+            continue
+        if clean_line[0] == "GOCAD":
+            gocad_object = {
+                "type": clean_line[1] if len(clean_line) > 1 else None,
+                "name": None,
+                "color": None,
+                "geological_type": None,
+                "geological_feature": None,
+                "properties_names": [],
+                "properties_components": [],
+                "first_line": line_id,
+            }
+        elif gocad_object is None:
+            continue
+        elif "*solid*color:" in clean_line[0]:
+            gocad_object["color"] = tuple(
+                float(round(float(value) * 255)) for value in clean_line[1:4]
+            )
+        elif "name:" in clean_line[0]:
+            if clean_line[0] == "name:":
+                gocad_object["name"] = "_".join(clean_line[1:])
+            else:
+                """Solves a bug in Move that does not add a space after name:"""
+                gocad_object["name"] = "_".join(clean_line[:])[5:]
+        elif clean_line[0] == "GEOLOGICAL_TYPE":
+            gocad_object["geological_type"] = "_".join(clean_line[1:])
+        elif clean_line[0] == "GEOLOGICAL_FEATURE":
+            gocad_object["geological_feature"] = "_".join(clean_line[1:])
+        elif clean_line[0] == "PROPERTIES":
+            gocad_object["properties_names"] = clean_line[1:]
+        elif clean_line[0] == "ESIZES":
+            gocad_object["properties_components"] = [
+                int(size) for size in clean_line[1:]
+            ]
+        elif clean_line[0] == "END":
+            gocad_object_data(
+                data=data,
+                buffer=buffer,
+                starts=starts,
+                ends=ends,
+                kinds=kinds,
+                gocad_object=gocad_object,
+                last_line=line_id,
+            )
+            gocad_objects.append(gocad_object)
+            gocad_object = None
+    return gocad_objects
+
+
+def gocad_object_data(
+    data=None,
+    buffer=None,
+    starts=None,
+    ends=None,
+    kinds=None,
+    gocad_object=None,
+    last_line=None,
+):
+    """Second phase of read_gocad for a single object, whose data lines are those of kinds between its
+    GOCAD line and last_line (its END line). Adds points, properties, segments and triangles to the
+    gocad_object dictionary."""
+    first_line = gocad_object.pop("first_line")
+    object_kinds = kinds[first_line:last_line]
+
+    def block(keyword=None, n_columns=None):
+        """Numbers in the lines of the object starting with keyword, in bulk if possible."""
+        line_ids = (
+            np_flatnonzero(object_kinds == gocad_data_keywords.index(keyword))
+            + first_line
+        )
+        numbers = gocad_block(
+            buffer=buffer,
+            starts=starts[line_ids],
+            ends=ends[line_ids],
+            skip=len(keyword),
+            n_columns=n_columns,
+        )
+        if numbers is None:
+            numbers = gocad_lines(
+                data=data,
+                starts=starts[line_ids],
+                ends=ends[line_ids],
+                n_columns=n_columns,
+            )
+        return numbers
+
+    names = gocad_object["properties_names"]
+    components = gocad_object["properties_components"]
+    if len(components) < len(names):
+        components = components + [1] * (len(names) - len(components))
+    vertices = block(keyword="VRTX", n_columns=4)
+    p_vertices = block(keyword="PVRTX", n_columns=4 + sum(components[: len(names)]))
+    atoms = block(keyword="ATOM", n_columns=2).astype(np_int64) - 1
+    ids = np_concatenate([vertices[:, 0], p_vertices[:, 0]]).astype(np_int64) - 1
+    n_points = int(max(ids.max(initial=-1), atoms[:, 0].max(initial=-1)) + 1)
+    points = np_zeros((n_points, 3))
+    points[ids] = np_concatenate([vertices[:, 1:4], p_vertices[:, 1:4]])
+    points[atoms[:, 0]] = points[atoms[:, 1]]
+
+    gocad_object["properties_names"] = []
+    gocad_object["properties_components"] = []
+    gocad_object["properties"] = []
+    column = 4
+    for name, size in zip(names, components):
+        if size in gocad_property_sizes:
+            values = np_full((n_points, size), np_nan, dtype=np_float32)
+            values[p_vertices[:, 0].astype(np_int64) - 1] = p_vertices[
+                :, column : column + size
+            ]
+            values[atoms[:, 0]] = values[atoms[:, 1]]
+            gocad_object["properties_names"].append(name)
+            gocad_object["properties_components"].append(size)
+            gocad_object["properties"].append(values[:, 0] if size == 1 else values)
+        column += size
+    gocad_object["points"] = points
+    gocad_object["segments"] = block(keyword="SEG", n_columns=2).astype(np_int64) - 1
+    gocad_object["triangles"] = block(keyword="TRGL", n_columns=3).astype(np_int64) - 1
+
+
+def gocad_vtk_obj(gocad_object=None, vtk_obj=None, properties=True):
+    """Set points, cells and, if properties is True, properties of a gocad_object read by read_gocad on
+    vtk_obj, a VertexSet, PolyLine or TriSurf (or subclass), each with a single call."""
+    vtk_obj.points = gocad_object["points"]
+    if isinstance(vtk_obj, VertexSet):
+        vtk_obj.auto_cells()
+    elif isinstance(vtk_obj, PolyLine):
+        vtk_obj.cells = gocad_object["segments"]
+    elif isinstance(vtk_obj, TriSurf):
+        vtk_obj.cells = gocad_object["triangles"]
+    if properties:
+        for name, values in zip(
+            gocad_object["properties_names"], gocad_object["properties"]
+        ):
+            vtk_obj.set_point_data(name, values)
+
+
 def gocad2vtk(self=None, in_file_name=None, uid_from_name=None):
     """
     Read a GOCAD ASCII file and add, to the geol_coll GeologicalCollection(), all the
@@ -125,84 +381,56 @@ def gocad2vtk(self=None, in_file_name=None, uid_from_name=None):
         reset_legend = True
     else:
         reset_legend = False
-    """Open input file"""
-    fin = open(in_file_name, "rt")
     """Number of entities before importing________________________________"""
     n_entities_before = self.geol_coll.get_number_of_entities()
     """Initialize entity_counter"""
     entity_counter = 0
-    """Parse fin file"""
-    for line in fin:
-        """Read one line from file."""
-        clean_line = line.strip().split()
-
-        """The effect of the following if/elif cascade is to loop for every single object marked by
-        the GOCAD keyword, reading the lines that we want to import and skipping the others."""
-        if clean_line[0] == "GOCAD":
-            """A new entity starts here in a GOCAD file, so here we create a new empty dictionary,
-            then we will fill its components in the next lines. Use deepcopy otherwise the
-            original dictionary would be altered."""
-            curr_obj_dict = deepcopy(GeologicalCollection.geological_entity_dict)
-            curr_obj_dict["scenario"] = scenario_default
-
-            """Store uid of new entity."""
-            curr_obj_dict["uid"] = str(uuid.uuid4())
-
-            """Create the empty vtk object with class = topological_type."""
-            if clean_line[1] == "VSet":
-                curr_obj_dict["topological_type"] = "VertexSet"
-                curr_obj_dict["vtk_obj"] = VertexSet()
-                curr_obj_dict["geological_type"] = geological_type_default
-            elif clean_line[1] == "PLine":
-                curr_obj_dict["topological_type"] = "PolyLine"
-                curr_obj_dict["vtk_obj"] = PolyLine()
-                curr_obj_dict["geological_type"] = geological_type_default
-            elif clean_line[1] == "TSurf":
-                curr_obj_dict["topological_type"] = "TriSurf"
-                curr_obj_dict["vtk_obj"] = TriSurf()
-                curr_obj_dict["geological_type"] = geological_type_default
-            else:
-                """Here topological types different from the allowed ones are handled.
-                At the moment THIS WILL CAUSE ERRORS - KEEP THIS MESSAGE JUST FOR DEBUGGING.
-                This must be reimplementende in sucha way that, is non-valid objects are found,
-                the file reader jumps to the next line starting with the 'GOCAD' keyword (if any).
-                """
-                self.TextTerminal.appendPlainText(
-                    "gocad2vtk - entity type not recognized ERROR."
-                )
-
-            """Create empty arrays for coordinates and topology and a counter for properties."""
-            curr_obj_points = vtkPoints()
-            curr_obj_cells = vtkCellArray()
-            curr_obj_properties_collection = vtkDataArrayCollection()
-            properties_number = 0
-
-        elif "*solid*color:" in clean_line[0]:
-            curr_obj_color_r = float(round(float(clean_line[1]) * 255))
-            curr_obj_color_g = float(round(float(clean_line[2]) * 255))
-            curr_obj_color_b = float(round(float(clean_line[3]) * 255))
+    """Entities read from the file, with their colors in the file"""
+    entity_dicts = []
+    legend_colors = []
+    """Parse the file, then build an entity for each object."""
+    for gocad_object in read_gocad(in_file_name=in_file_name):
+        """Create a new empty dictionary for the entity. Use deepcopy otherwise the
+        original dictionary would be altered."""
+        curr_obj_dict = deepcopy(GeologicalCollection.geological_entity_dict)
+        curr_obj_dict["scenario"] = scenario_default
+        curr_obj_dict["uid"] = str(uuid.uuid4())
+        curr_obj_dict["geological_type"] = geological_type_default
+
+        """Create the empty vtk object with class = topological_type."""
+        if gocad_object["type"] == "VSet":
+            curr_obj_dict["topological_type"] = "VertexSet"
+            curr_obj_dict["vtk_obj"] = VertexSet()
+            message = (
+                "Importing Gocad VSet (VertexSet) as a PolyData 0D in VTK with name: "
+            )
+        elif gocad_object["type"] == "PLine":
+            curr_obj_dict["topological_type"] = "PolyLine"
+            curr_obj_dict["vtk_obj"] = PolyLine()
+            message = (
+                "Importing GOCAD PLine (PolyLine) as a PolyData 1D in VTK with name: "
+            )
+        elif gocad_object["type"] == "TSurf":
+            curr_obj_dict["topological_type"] = "TriSurf"
+            curr_obj_dict["vtk_obj"] = TriSurf()
+            message = (
+                "Importing GOCAD TSurf (TriSurf) as a PolyData 2D in VTK with name: "
+            )
+        else:
+            """Objects with topological types different from the allowed ones are skipped."""
+            self.TextTerminal.appendPlainText(
+                "gocad2vtk - entity type not recognized ERROR."
+            )
+            continue
 
-        elif "name:" in clean_line[0]:
-            if clean_line[0] == "name:":
-                """standard import"""
-                curr_obj_dict["name"] = "_".join(
-                    clean_line[1:]
-                )  # see if a suffix must be added to split multipart
-                if geological_feature_from_name:
-                    curr_obj_dict["geological_feature"] = curr_obj_dict["name"]
-            else:
-                """solves a bug in Move that does not add a space after name:"""
-                curr_obj_dict["name"] = "_".join(clean_line[:])
-                curr_obj_dict["name"] = curr_obj_dict["name"][
-                    5:
-                ]  # this removes 'name:'
-                if geological_feature_from_name:
-                    curr_obj_dict["geological_feature"] = curr_obj_dict["name"]
+        if gocad_object["name"] is not None:
+            curr_obj_dict["name"] = gocad_object["name"]
+            if geological_feature_from_name:
+                curr_obj_dict["geological_feature"] = curr_obj_dict["name"]
             if uid_from_name:
                 curr_obj_dict["uid"] = curr_obj_dict["name"]
-
-        elif clean_line[0] == "GEOLOGICAL_TYPE":
-            curr_obj_dict["geological_type"] = ("_".join(clean_line[1:])).lower()
+        if gocad_object["geological_type"] is not None:
+            curr_obj_dict["geological_type"] = gocad_object["geological_type"].lower()
             if (
                 curr_obj_dict["geological_type"]
                 not in GeologicalCollection.valid_geological_types
@@ -215,231 +443,37 @@ def gocad2vtk(self=None, in_file_name=None, uid_from_name=None):
                     curr_obj_dict["geological_type"] = "top"
                 else:
                     curr_obj_dict["geological_type"] = "undef"
-
-        elif clean_line[0] == "GEOLOGICAL_FEATURE":
-            curr_obj_dict["geological_feature"] = "_".join(clean_line[1:])
-
-        elif clean_line[0] == "PROPERTIES":
-            """Populate the list of property names, the properties number, and initialize the VTK arrays."""
-            for prop in clean_line[1:]:
-                curr_obj_dict["properties_names"].append(prop)
-            properties_number = len(curr_obj_dict["properties_names"])
-            for i in range(properties_number):
-                new_prop = vtkFloatArray()
-                curr_obj_properties_collection.AddItem(new_prop)
-                curr_obj_properties_collection.GetItem(i).SetName(
-                    curr_obj_dict["properties_names"][i]
-                )
-
-        elif clean_line[0] == "ESIZES":
-            ESZ_str = clean_line[1:]
-            for i in range(len(ESZ_str)):
-                curr_obj_dict["properties_components"].append(int(ESZ_str[i]))
-                curr_obj_properties_collection.GetItem(i).SetNumberOfComponents(
-                    int(ESZ_str[i])
-                )
-
-        elif (
-            clean_line[0] == "SUBVSET"
-        ):  # see if and how to start a new SUBVSET part here
-            pass
-
-        elif clean_line[0] == "ILINE":  # see if and how to start a new ILINE part here
-            pass
-
-        elif clean_line[0] == "TFACE":  # see if and how to start a new TFACE part here
-            pass
-
-        elif clean_line[0] in ["VRTX", "PVRTX", "SEG", "TRGL", "ATOM"]:
-            """This inner condition is required to handle multipart entities."""
-            if clean_line[0] == "VRTX":
-                curr_obj_points.InsertPoint(
-                    int(clean_line[1]) - 1,
-                    float(clean_line[2]),
-                    float(clean_line[3]),
-                    float(clean_line[4]),
-                )  # vtkPoint with ID, X, Y Z, "-1" since first vertex has index 0 in VTK
-
-            elif clean_line[0] == "PVRTX":
-                curr_obj_points.InsertPoint(
-                    int(clean_line[1]) - 1,
-                    float(clean_line[2]),
-                    float(clean_line[3]),
-                    float(clean_line[4]),
-                )  # vtkPoint with ID, X, Y Z, "-1" since first vertex has index 0 in VTK
-                if properties_number > 0:
-                    """Now we set values in the properties float arrays"""
-                    """_____________Check if all is OK here with vector properties_________________________________________________"""
-                    i = 5  # i = 5 since the first five elements have already been read: PVRTX, id, X, Y, Z
-                    for j in range(properties_number):
-                        this_prop = curr_obj_properties_collection.GetItem(j)
-                        if curr_obj_dict["properties_components"][j] == 1:
-                            this_prop.InsertTuple1(
-                                int(clean_line[1]) - 1, float(clean_line[i])
-                            )
-                            i = i + 1
-                        elif curr_obj_dict["properties_components"][j] == 2:
-                            this_prop.InsertTuple2(
-                                int(clean_line[1]) - 1,
-                                float(clean_line[i]),
-                                float(clean_line[i + 1]),
-                            )
-                            i = i + 2
-                        elif curr_obj_dict["properties_components"][j] == 3:
-                            this_prop.InsertTuple3(
-                                int(clean_line[1]) - 1,
-                                float(clean_line[i]),
-                                float(clean_line[i + 1]),
-                                float(clean_line[i + 2]),
-                            )
-                            i = i + 3
-                        elif curr_obj_dict["properties_components"][j] == 4:
-                            this_prop.InsertTuple4(
-                                int(clean_line[1]) - 1,
-                                float(clean_line[i]),
-                                float(clean_line[i + 1]),
-                                float(clean_line[i + 2]),
-                                float(clean_line[i + 3]),
-                            )
-                            i = i + 4
-                        elif curr_obj_dict["properties_components"][j] == 6:
-                            this_prop.InsertTuple4(
-                                int(clean_line[1]) - 1,
-                                float(clean_line[i]),
-                                float(clean_line[i + 1]),
-                                float(clean_line[i + 2]),
-                                float(clean_line[i + 3]),
-                                float(clean_line[i + 4]),
-                                float(clean_line[i + 5]),
-                            )
-                            i = i + 6
-                        elif curr_obj_dict["properties_components"][j] == 9:
-                            this_prop.InsertTuple4(
-                                int(clean_line[1]) - 1,
-                                float(clean_line[i]),
-                                float(clean_line[i + 1]),
-                                float(clean_line[i + 2]),
-                                float(clean_line[i + 3]),
-                                float(clean_line[i + 4]),
-                                float(clean_line[i + 5]),
-                                float(clean_line[i + 6]),
-                                float(clean_line[i + 7]),
-                                float(clean_line[i + 8]),
-                            )
-                            i = i + 9
-                        else:
-                            """Discard property if it is not 1D, 2D, 3D, 4D, 6D or 9D"""
-                            i = i + curr_obj_dict["properties_components"][j]
-                            curr_obj_dict["properties_names"] = curr_obj_dict[
-                                "properties_names"
-                            ].remove(j)
-                            properties_number = properties_number - 1
-                            curr_obj_dict["properties_components"].remove(j)
-                            curr_obj_properties_collection.RemoveItem(j)
-
-            elif clean_line[0] == "ATOM":
-                """ATOM id1 id2 (where id1 > id2) indicates a vertex with index id1 that shares the same XYZ position
-                as a previous vertex with id2. This is used in Gocad to create co-located vertexes that are
-                disconnected in topological sense. In PZero we create two independent vertexes with the same
-                coordinates."""
-                this_atom_id = int(clean_line[1]) - 1
-                from_vrtx_id = int(clean_line[2]) - 1
-                curr_obj_points.InsertPoint(
-                    this_atom_id, curr_obj_points.GetPoint(from_vrtx_id)
-                )
-                pass
-
-            elif clean_line[0] == "SEG":
-                line = vtkLine()
-                line.GetPointIds().SetId(
-                    0, int(clean_line[1]) - 1
-                )  # "-1" since first vertex has index 0 in VTK
-                line.GetPointIds().SetId(1, int(clean_line[2]) - 1)
-                curr_obj_cells.InsertNextCell(line)
-
-            elif clean_line[0] == "TRGL":
-                triangle = vtkTriangle()
-                triangle.GetPointIds().SetId(
-                    0, int(clean_line[1]) - 1
-                )  # "-1" since first vertex has index 0 in VTK
-                triangle.GetPointIds().SetId(1, int(clean_line[2]) - 1)
-                triangle.GetPointIds().SetId(2, int(clean_line[3]) - 1)
-                curr_obj_cells.InsertNextCell(triangle)
-
-        elif clean_line[0] == "BSTONE":
-            """NOT YET IMPLEMENTED"""
-            pass
-
-        elif clean_line[0] == "BORDER":
-            """NOT YET IMPLEMENTED"""
-            pass
-
-        elif clean_line[0] == "END":
-            """When END reached, process the arrays and write the VTK entity with properties to the project geol_coll"""
-            entity_counter += 1  # update entity counter
-
-            """Write points and cells TO VTK OBJECT"""
-            if curr_obj_dict["topological_type"] == "VertexSet":
-                self.TextTerminal.appendPlainText(
-                    "Importing Gocad VSet (VertexSet) as a PolyData 0D in VTK with name: "
-                    + curr_obj_dict["name"]
-                )
-                curr_obj_dict["vtk_obj"].SetPoints(curr_obj_points)
-                """Vertex cells, one for each point, are added here."""
-                for pid in range(curr_obj_dict["vtk_obj"].GetNumberOfPoints()):
-                    vertex = vtkVertex()
-                    vertex.GetPointIds().SetId(0, pid)
-                    curr_obj_cells.InsertNextCell(vertex)
-                curr_obj_dict["vtk_obj"].SetVerts(curr_obj_cells)
-
-            elif curr_obj_dict["topological_type"] == "PolyLine":
-                self.TextTerminal.appendPlainText(
-                    "Importing GOCAD PLine (PolyLine) as a PolyData 1D in VTK with name: "
-                    + curr_obj_dict["name"]
-                )
-                curr_obj_dict["vtk_obj"].SetPoints(curr_obj_points)
-                curr_obj_dict["vtk_obj"].SetLines(curr_obj_cells)
-
-            elif curr_obj_dict["topological_type"] == "TriSurf":
-                self.TextTerminal.appendPlainText(
-                    "Importing GOCAD TSurf (TriSurf) as a PolyData 2D in VTK with name: "
-                    + curr_obj_dict["name"]
+        if gocad_object["geological_feature"] is not None:
+            curr_obj_dict["geological_feature"] = gocad_object["geological_feature"]
+        curr_obj_dict["properties_names"] = gocad_object["properties_names"]
+        curr_obj_dict["properties_components"] = gocad_object["properties_components"]
+
+        """Write points, cells and properties to the VTK object at once."""
+        entity_counter += 1  # update entity counter
+        self.TextTerminal.appendPlainText(message + curr_obj_dict["name"])
+        gocad_vtk_obj(gocad_object=gocad_object, vtk_obj=curr_obj_dict["vtk_obj"])
+
+        """Collect current_entity, after checking if the entity is valid. Entities are added to
+        the entities collection all at once when the whole file has been parsed."""
+        if curr_obj_dict["vtk_obj"].points_number > 0:
+            if (
+                curr_obj_dict["topological_type"] == "VertexSet"
+                or curr_obj_dict["vtk_obj"].cells_number > 0
+            ):
+                entity_dicts.append(curr_obj_dict)
+                legend_colors.append(gocad_object["color"])
+
+        """Closing message"""
+        self.TextTerminal.appendPlainText("Object n. " + str(entity_counter) + " saved")
+
+    """Add all entities with a single update of the collection, legend and views."""
+    uids = self.geol_coll.add_entities_from_dicts(entity_dicts=entity_dicts)
+    if reset_legend:
+        for uid, color in zip(uids, legend_colors):
+            if color is not None:
+                self.geol_coll.set_uid_legend(
+                    uid=uid, color_R=color[0], color_G=color[1], color_B=color[2]
                 )
-                curr_obj_dict["vtk_obj"].SetPoints(curr_obj_points)
-                curr_obj_dict["vtk_obj"].SetPolys(curr_obj_cells)
-
-            if properties_number > 0:
-                for i in range(properties_number):
-                    curr_obj_dict["vtk_obj"].GetPointData().AddArray(
-                        curr_obj_properties_collection.GetItem(i)
-                    )
-
-            # print(curr_obj_dict["vtk_obj"])
-
-            """Add current_entity to entities collection, after checking if the entity is valid."""
-            if curr_obj_dict["vtk_obj"].points_number > 0:
-                if curr_obj_dict["topological_type"] == "VertexSet":
-                    self.geol_coll.add_entity_from_dict(entity_dict=curr_obj_dict)
-                else:
-                    if curr_obj_dict["vtk_obj"].cells_number > 0:
-                        self.geol_coll.add_entity_from_dict(entity_dict=curr_obj_dict)
-                if reset_legend:
-                    self.geol_coll.set_uid_legend(
-                        uid=curr_obj_dict["uid"],
-                        color_R=curr_obj_color_r,
-                        color_G=curr_obj_color_g,
-                        color_B=curr_obj_color_b,
-                    )
-            del curr_obj_points
-            del curr_obj_cells
-            del curr_obj_properties_collection
-            del curr_obj_dict
-
-            """Closing message"""
-            self.TextTerminal.appendPlainText(
-                "Object n. " + str(entity_counter) + " saved"
-            )
-
     n_entities_after = self.geol_coll.get_number_of_entities()
     self.TextTerminal.appendPlainText(
         "Entities before importing: " + str(n_entities_before)
@@ -482,80 +516,50 @@ def gocad2vtk_section(self=None, in_file_name=None, uid_from_name=None, x_sectio
         geological_feature_from_name = True
     else:
         geological_feature_from_name = False
-    """Open input file"""
-    fin = open(in_file_name, "rt")
     """Number of entities before importing________________________________"""
     n_entities_before = self.geol_coll.get_number_of_entities()
     """Initialize entity_counter"""
     entity_counter = 0
-    """Parse fin file"""
-    for line in fin:
-        """Read one line from file."""
-        clean_line = line.strip().split()
-
-        """The effect of the following if/elif cascade is to loop for every single object marked by
-        the GOCAD keyword, reading the lines that we want to import and skipping the others."""
-        if clean_line[0] == "GOCAD":
-            """A new entity starts here in a GOCAD file, so here we create a new empty dictionary,
-            then we will fill its components in the next lines. Use deepcopy otherwise the
-            original dictionary would be altered."""
-            curr_obj_dict = deepcopy(GeologicalCollection.geological_entity_dict)
-            curr_obj_dict["x_section"] = x_section
-            curr_obj_dict["scenario"] = scenario_default
-
-            """Store uid and topological type of new entity."""
-            curr_obj_dict["uid"] = str(uuid.uuid4())
-
-            """Create the empty vtk object with class = topological_type."""
-            if clean_line[1] == "VSet":
-                curr_obj_dict["vtk_obj"] = XsVertexSet(
-                    x_section_uid=x_section, parent=self
-                )
-                curr_obj_dict["topological_type"] = "XsVertexSet"
-                curr_obj_dict["geological_type"] = geological_type_default
-            elif clean_line[1] == "PLine":
-                curr_obj_dict["vtk_obj"] = XsPolyLine(
-                    x_section_uid=x_section, parent=self
-                )
-                curr_obj_dict["topological_type"] = "XsPolyLine"
-                curr_obj_dict["geological_type"] = geological_type_default
-            else:
-                """Here topological types different from the allowed ones are handled.
-                At the moment THIS WILL CAUSE ERRORS - KEEP THIS MESSAGE JUST FOR DEBUGGING.
-                This must be reimplementende in sucha way that, is non-valid objects are found,
-                the file reader jumps to the next line starting with the 'GOCAD' keyword (if any).
-                """
-                self.TextTerminal.appendPlainText(
-                    "gocad2vtk - entity type not recognized ERROR."
-                )
-
-            """Create empty arrays for coordinates and topology and a counter for properties."""
-            curr_obj_points = vtkPoints()
-            curr_obj_cells = vtkCellArray()
-            curr_obj_properties_collection = vtkDataArrayCollection()
-            properties_number = 0
+    """Entities read from the file"""
+    entity_dicts = []
+    """Parse the file, then build an entity for each object."""
+    for gocad_object in read_gocad(in_file_name=in_file_name):
+        """Create a new empty dictionary for the entity. Use deepcopy otherwise the
+        original dictionary would be altered."""
+        curr_obj_dict = deepcopy(GeologicalCollection.geological_entity_dict)
+        curr_obj_dict["scenario"] = scenario_default
+        curr_obj_dict["x_section"] = x_section
+        curr_obj_dict["uid"] = str(uuid.uuid4())
+        curr_obj_dict["geological_type"] = geological_type_default
+
+        """Create the empty vtk object with class = topological_type."""
+        if gocad_object["type"] == "VSet":
+            curr_obj_dict["vtk_obj"] = XsVertexSet(x_section_uid=x_section, parent=self)
+            curr_obj_dict["topological_type"] = "XsVertexSet"
+            message = (
+                "Importing Gocad VSet (VertexSet) as a PolyData 0D in VTK with name: "
+            )
+        elif gocad_object["type"] == "PLine":
+            curr_obj_dict["vtk_obj"] = XsPolyLine(x_section_uid=x_section, parent=self)
+            curr_obj_dict["topological_type"] = "XsPolyLine"
+            message = (
+                "Importing GOCAD PLine (PolyLine) as a PolyData 1D in VTK with name: "
+            )
+        else:
+            """Objects with topological types different from the allowed ones are skipped."""
+            self.TextTerminal.appendPlainText(
+                "gocad2vtk - entity type not recognized ERROR."
+            )
+            continue
 
-        elif "name:" in clean_line[0]:
-            if clean_line[0] == "name:":
-                """standard import"""
-                curr_obj_dict["name"] = "_".join(
-                    clean_line[1:]
-                )  # see if a suffix must be added to split multipart
-                if geological_feature_from_name:
-                    curr_obj_dict["geological_feature"] = curr_obj_dict["name"]
-            else:
-                """solves a bug in Move that does not add a space after name:"""
-                curr_obj_dict["name"] = "_".join(clean_line[:])
-                curr_obj_dict["name"] = curr_obj_dict["name"][
-                    5:
-                ]  # this removes 'name:'
-                if geological_feature_from_name:
-                    curr_obj_dict["geological_feature"] = curr_obj_dict["name"]
+        if gocad_object["name"] is not None:
+            curr_obj_dict["name"] = gocad_object["name"]
+            if geological_feature_from_name:
+                curr_obj_dict["geological_feature"] = curr_obj_dict["name"]
             if uid_from_name:
                 curr_obj_dict["uid"] = curr_obj_dict["name"]
-
-        elif clean_line[0] == "GEOLOGICAL_TYPE":
-            curr_obj_dict["geological_type"] = ("_".join(clean_line[1:])).lower()
+        if gocad_object["geological_type"] is not None:
+            curr_obj_dict["geological_type"] = gocad_object["geological_type"].lower()
             if (
                 curr_obj_dict["geological_type"]
                 not in GeologicalCollection.valid_geological_types
@@ -568,180 +572,24 @@ def gocad2vtk_section(self=None, in_file_name=None, uid_from_name=None, x_sectio
                     curr_obj_dict["geological_type"] = "top"
                 else:
                     curr_obj_dict["geological_type"] = "undef"
+        if gocad_object["geological_feature"] is not None:
+            curr_obj_dict["geological_feature"] = gocad_object["geological_feature"]
+        curr_obj_dict["properties_names"] = gocad_object["properties_names"]
+        curr_obj_dict["properties_components"] = gocad_object["properties_components"]
 
-        elif clean_line[0] == "GEOLOGICAL_FEATURE":
-            curr_obj_dict["geological_feature"] = "_".join(clean_line[1:])
-
-        elif clean_line[0] == "PROPERTIES":
-            """Populate the list of property names, the properties number, and initialize the VTK arrays."""
-            for prop in clean_line[1:]:
-                curr_obj_dict["properties_names"].append(prop)
-            properties_number = len(curr_obj_dict["properties_names"])
-            for i in range(properties_number):
-                new_prop = vtkFloatArray()
-                curr_obj_properties_collection.AddItem(new_prop)
-                curr_obj_properties_collection.GetItem(i).SetName(
-                    curr_obj_dict["properties_names"][i]
-                )
-
-        elif clean_line[0] == "ESIZES":
-            ESZ_str = clean_line[1:]
-            for i in range(len(ESZ_str)):
-                curr_obj_dict["properties_components"].append(int(ESZ_str[i]))
-                curr_obj_properties_collection.GetItem(i).SetNumberOfComponents(
-                    int(ESZ_str[i])
-                )
+        """Write points, cells and properties to the VTK object at once."""
+        entity_counter += 1  # update entity counter
+        self.TextTerminal.appendPlainText(message + curr_obj_dict["name"])
+        gocad_vtk_obj(gocad_object=gocad_object, vtk_obj=curr_obj_dict["vtk_obj"])
 
-        elif (
-            clean_line[0] == "SUBVSET"
-        ):  # see if and how to start a new SUBVSET part here
-            pass
+        """Collect current_entity, added to entities collection at the end"""
+        entity_dicts.append(curr_obj_dict)
 
-        elif clean_line[0] == "ILINE":  # see if and how to start a new ILINE part here
-            pass
-
-        elif clean_line[0] == "VRTX":
-            curr_obj_points.InsertPoint(
-                int(clean_line[1]) - 1,
-                float(clean_line[2]),
-                float(clean_line[3]),
-                float(clean_line[4]),
-            )  # vtkPoint with ID, X, Y Z, "-1" since first vertex has index 0 in VTK
-
-        elif clean_line[0] == "PVRTX":
-            curr_obj_points.InsertPoint(
-                int(clean_line[1]) - 1,
-                float(clean_line[2]),
-                float(clean_line[3]),
-                float(clean_line[4]),
-            )  # vtkPoint with ID, X, Y Z, "-1" since first vertex has index 0 in VTK
-            if properties_number > 0:
-                """Now we set values in the properties float arrays"""
-                """_____________Check if all is OK here with vector properties_________________________________________________"""
-                i = 5  # i = 5 since the first five elements have already been read: PVRTX, id, X, Y, Z
-                for j in range(properties_number):
-                    this_prop = curr_obj_properties_collection.GetItem(j)
-                    if curr_obj_dict["properties_components"][j] == 1:
-                        this_prop.InsertTuple1(
-                            int(clean_line[1]) - 1, float(clean_line[i])
-                        )
-                        i = i + 1
-                    elif curr_obj_dict["properties_components"][j] == 2:
-                        this_prop.InsertTuple2(
-                            int(clean_line[1]) - 1,
-                            float(clean_line[i]),
-                            float(clean_line[i + 1]),
-                        )
-                        i = i + 2
-                    elif curr_obj_dict["properties_components"][j] == 3:
-                        this_prop.InsertTuple3(
-                            int(clean_line[1]) - 1,
-                            float(clean_line[i]),
-                            float(clean_line[i + 1]),
-                            float(clean_line[i + 2]),
-                        )
-                        i = i + 3
-                    elif curr_obj_dict["properties_components"][j] == 4:
-                        this_prop.InsertTuple4(
-                            int(clean_line[1]) - 1,
-                            float(clean_line[i]),
-                            float(clean_line[i + 1]),
-                            float(clean_line[i + 2]),
-                            float(clean_line[i + 3]),
-                        )
-                        i = i + 4
-                    elif curr_obj_dict["properties_components"][j] == 6:
-                        this_prop.InsertTuple4(
-                            int(clean_line[1]) - 1,
-                            float(clean_line[i]),
-                            float(clean_line[i + 1]),
-                            float(clean_line[i + 2]),
-                            float(clean_line[i + 3]),
-                            float(clean_line[i + 4]),
-                            float(clean_line[i + 5]),
-                        )
-                        i = i + 6
-                    elif curr_obj_dict["properties_components"][j] == 9:
-                        this_prop.InsertTuple4(
-                            int(clean_line[1]) - 1,
-                            float(clean_line[i]),
-                            float(clean_line[i + 1]),
-                            float(clean_line[i + 2]),
-                            float(clean_line[i + 3]),
-                            float(clean_line[i + 4]),
-                            float(clean_line[i + 5]),
-                            float(clean_line[i + 6]),
-                            float(clean_line[i + 7]),
-                            float(clean_line[i + 8]),
-                        )
-                        i = i + 9
-                    else:
-                        """Discard property if it is not 1D, 2D, 3D, 4D, 6D or 9D"""
-                        i = i + curr_obj_dict["properties_components"][j]
-                        curr_obj_dict["properties_names"] = curr_obj_dict[
-                            "properties_names"
-                        ].remove(j)
-                        properties_number = properties_number - 1
-                        curr_obj_dict["properties_components"].remove(j)
-                        curr_obj_properties_collection.RemoveItem(j)
-
-        elif clean_line[0] == "ATOM":
-            # atom_id = int(clean_line[1]) - 1
-            # vrtx_id = int(clean_line[2]) - 1
-            pass
-
-        elif clean_line[0] == "SEG":
-            line = vtkLine()
-            line.GetPointIds().SetId(
-                0, int(clean_line[1]) - 1
-            )  # "-1" since first vertex has index 0 in VTK
-            line.GetPointIds().SetId(1, int(clean_line[2]) - 1)
-            curr_obj_cells.InsertNextCell(line)
-
-        elif clean_line[0] == "END":
-            """When END reached, process the arrays and write the VTK entity with properties to the project geol_coll"""
-            entity_counter += 1  # update entity counter
-
-            """Write points and cells TO VTK OBJECT"""
-            if curr_obj_dict["topological_type"] == "XsVertexSet":
-                self.TextTerminal.appendPlainText(
-                    "Importing Gocad VSet (VertexSet) as a PolyData 0D in VTK with name: "
-                    + curr_obj_dict["name"]
-                )
-                curr_obj_dict["vtk_obj"].SetPoints(curr_obj_points)
-                """Vertex cells, one for each point, are added here."""
-                for pid in range(curr_obj_dict["vtk_obj"].GetNumberOfPoints()):
-                    vertex = vtkVertex()
-                    vertex.GetPointIds().SetId(0, pid)
-                    curr_obj_cells.InsertNextCell(vertex)
-                curr_obj_dict["vtk_obj"].SetVerts(curr_obj_cells)
-
-            elif curr_obj_dict["topological_type"] == "XsPolyLine":
-                self.TextTerminal.appendPlainText(
-                    "Importing GOCAD PLine (PolyLine) as a PolyData 1D in VTK with name: "
-                    + curr_obj_dict["name"]
-                )
-                curr_obj_dict["vtk_obj"].SetPoints(curr_obj_points)
-                curr_obj_dict["vtk_obj"].SetLines(curr_obj_cells)
-
-            if properties_number > 0:
-                for i in range(properties_number):
-                    curr_obj_dict["vtk_obj"].GetPointData().AddArray(
-                        curr_obj_properties_collection.GetItem(i)
-                    )
-
-            """Add current_entity to entities collection"""
-            self.geol_coll.add_entity_from_dict(entity_dict=curr_obj_dict)
-            del curr_obj_points
-            del curr_obj_cells
-            del curr_obj_properties_collection
-            del curr_obj_dict
-
-            """Closing message"""
-            self.TextTerminal.appendPlainText(
-                "Object n. " + str(entity_counter) + " saved"
-            )
+        """Closing message"""
+        self.TextTerminal.appendPlainText("Object n. " + str(entity_counter) + " saved")
 
+    """Add all entities with a single update of the collection, legend and views."""
+    self.geol_coll.add_entities_from_dicts(entity_dicts=entity_dicts)
     n_entities_after = self.geol_coll.get_number_of_entities()
     self.TextTerminal.appendPlainText(
         "Entities before importing: " + str(n_entities_before)
@@ -758,269 +606,61 @@ def gocad2vtk_boundary(self=None, in_file_name=None, uid_from_name=None):
     polyline and triangulated surfaces as VTK polydata entities.
     <self> is the calling ProjectWindow() instance.
     """
-    # """Define import options."""
-    # scenario_default = input_text_dialog(parent=None, title="Scenario", label="Default scenario", default_text="undef")
-    # if not scenario_default:
-    #     scenario_default = "undef"
-    # geological_type_default = input_combo_dialog(parent=None, title="Geological type", label="Default geological type", choice_list=GeologicalCollection.valid_geological_types)
-    # if not geological_type_default:
-    #     geological_type_default = "undef"
-    # geological_feature_from_name = options_dialog(title="Feature from name", message="Get geological feature from object name if not defined in file", yes_role="Yes", no_role="No", reject_role=None)
-    # if geological_feature_from_name == 0:
-    #     geological_feature_from_name = True
-    # else:
-    #     geological_feature_from_name = False
-    """Open input file"""
-    fin = open(in_file_name, "rt")
     """Number of entities before importing________________________________"""
     n_entities_before = self.boundary_coll.get_number_of_entities()
     """Initialize entity_counter"""
     entity_counter = 0
-    """Parse fin file"""
-    for line in fin:
-        """Read one line from file."""
-        clean_line = line.strip().split()
-
-        """The effect of the following if/elif cascade is to loop for every single object marked by
-        the GOCAD keyword, reading the lines that we want to import and skipping the others."""
-        if clean_line[0] == "GOCAD":
-            """A new entity starts here in a GOCAD file, so here we create a new empty dictionary,
-            then we will fill its components in the next lines. Use deepcopy otherwise the
-            original dictionary would be altered."""
-            curr_obj_dict = deepcopy(BoundaryCollection.boundary_entity_dict)
-            # curr_obj_dict['scenario'] = scenario_default
-
-            """Store uid and topological type of new entity."""
-            curr_obj_dict["uid"] = str(uuid.uuid4())
-
-            """Create the empty vtk object with class = topological_type."""
-            # if clean_line[1] == 'VSet':
-            #     curr_obj_dict['topological_type'] = 'VertexSet'
-            #     curr_obj_dict['vtk_obj'] = VertexSet()
-            #     curr_obj_dict['geological_type'] = geological_type_default
-            if clean_line[1] == "PLine":
-                curr_obj_dict["topological_type"] = "PolyLine"
-                curr_obj_dict["vtk_obj"] = PolyLine()
-                # curr_obj_dict['geological_type'] = geological_type_default
-            elif clean_line[1] == "TSurf":
-                curr_obj_dict["topological_type"] = "TriSurf"
-                curr_obj_dict["vtk_obj"] = TriSurf()
-                # curr_obj_dict['geological_type'] = geological_type_default
-            else:
-                """Here topological types different from the allowed ones are handled.
-                At the moment THIS WILL CAUSE ERRORS - KEEP THIS MESSAGE JUST FOR DEBUGGING.
-                This must be reimplementende in sucha way that, is non-valid objects are found,
-                the file reader jumps to the next line starting with the 'GOCAD' keyword (if any).
-                """
-                self.TextTerminal.appendPlainText(
-                    "gocad2vtk - entity type not recognized ERROR."
-                )
-
-            """Create empty arrays for coordinates and topology and a counter for properties."""
-            curr_obj_points = vtkPoints()
-            curr_obj_cells = vtkCellArray()
-            # curr_obj_properties_collection = vtkDataArrayCollection()
-            # properties_number = 0
+    """Entities read from the file"""
+    entity_dicts = []
+    """Parse the file, then build an entity for each object."""
+    for gocad_object in read_gocad(in_file_name=in_file_name):
+        """Create a new empty dictionary for the entity. Use deepcopy otherwise the
+        original dictionary would be altered."""
+        curr_obj_dict = deepcopy(BoundaryCollection.boundary_entity_dict)
+        curr_obj_dict["uid"] = str(uuid.uuid4())
+
+        """Create the empty vtk object with class = topological_type."""
+        if gocad_object["type"] == "PLine":
+            curr_obj_dict["topological_type"] = "PolyLine"
+            curr_obj_dict["vtk_obj"] = PolyLine()
+            message = (
+                "Importing GOCAD PLine (PolyLine) as a PolyData 1D in VTK with name: "
+            )
+        elif gocad_object["type"] == "TSurf":
+            curr_obj_dict["topological_type"] = "TriSurf"
+            curr_obj_dict["vtk_obj"] = TriSurf()
+            message = (
+                "Importing GOCAD TSurf (TriSurf) as a PolyData 2D in VTK with name: "
+            )
+        else:
+            """Objects with topological types different from the allowed ones are skipped."""
+            self.TextTerminal.appendPlainText(
+                "gocad2vtk - entity type not recognized ERROR."
+            )
+            continue
 
-        elif "name:" in clean_line[0]:
-            if clean_line[0] == "name:":
-                """standard import"""
-                curr_obj_dict["name"] = "_".join(
-                    clean_line[1:]
-                )  # see if a suffix must be added to split multipart
-                # if geological_feature_from_name:
-                #     curr_obj_dict['geological_feature'] = curr_obj_dict['name']
-            else:
-                """solves a bug in Move that does not add a space after name:"""
-                curr_obj_dict["name"] = "_".join(clean_line[:])
-                curr_obj_dict["name"] = curr_obj_dict["name"][
-                    5:
-                ]  # this removes 'name:'
-                # if geological_feature_from_name:
-                #     curr_obj_dict['geological_feature'] = curr_obj_dict['name']
+        if gocad_object["name"] is not None:
+            curr_obj_dict["name"] = gocad_object["name"]
             if uid_from_name:
                 curr_obj_dict["uid"] = curr_obj_dict["name"]
 
-        # elif clean_line[0] == 'GEOLOGICAL_TYPE':
-        #     curr_obj_dict['geological_type'] = ("_".join(clean_line[1:])).lower()
-        #     if curr_obj_dict['geological_type'] not in GeologicalCollection.valid_geological_types:
-        #         if "Fault" in curr_obj_dict['geological_type']:
-        #             curr_obj_dict['geological_type'] = "fault"
-        #         elif "fault" in curr_obj_dict['geological_type']:
-        #             curr_obj_dict['geological_type'] = "fault"
-        #         elif  "Horizon" in curr_obj_dict['geological_type']:
-        #             curr_obj_dict['geological_type'] = "top"
-        #         else:
-        #             curr_obj_dict['geological_type'] = "undef"
-        #
-        # elif clean_line[0] == 'GEOLOGICAL_FEATURE':
-        #     curr_obj_dict['geological_feature'] = ("_".join(clean_line[1:]))
-        #
-        # elif clean_line[0] == 'PROPERTIES':
-        #     """Populate the list of property names, the properties number, and initialize the VTK arrays."""
-        #     for prop in clean_line[1:]:
-        #         curr_obj_dict['properties_names'].append(prop)
-        #     properties_number = len(curr_obj_dict['properties_names'])
-        #     for i in range(properties_number):
-        #         new_prop = vtkFloatArray()
-        #         curr_obj_properties_collection.AddItem(new_prop)
-        #         curr_obj_properties_collection.GetItem(i).SetName(curr_obj_dict['properties_names'][i])
-        #
-        # elif clean_line[0] == 'ESIZES':
-        #     ESZ_str = clean_line[1:]
-        #     for i in range(len(ESZ_str)):
-        #         curr_obj_dict['properties_components'].append(int(ESZ_str[i]))
-        #         curr_obj_properties_collection.GetItem(i).SetNumberOfComponents(int(ESZ_str[i]))
-
-        elif (
-            clean_line[0] == "SUBVSET"
-        ):  # see if and how to start a new SUBVSET part here
-            pass
-
-        elif clean_line[0] == "ILINE":  # see if and how to start a new ILINE part here
-            pass
+        """Write points and cells to the VTK object at once. Properties are not imported in boundaries."""
+        entity_counter += 1  # update entity counter
+        self.TextTerminal.appendPlainText(message + curr_obj_dict["name"])
+        gocad_vtk_obj(
+            gocad_object=gocad_object,
+            vtk_obj=curr_obj_dict["vtk_obj"],
+            properties=False,
+        )
 
-        elif clean_line[0] == "TFACE":  # see if and how to start a new TFACE part here
-            pass
+        """Collect current_entity, added to entities collection at the end"""
+        entity_dicts.append(curr_obj_dict)
 
-        elif (clean_line[0] == "VRTX") or (clean_line[0] == "PVRTX"):
-            """VRTX or PVRTX is the same here since properties are not imported."""
-            curr_obj_points.InsertPoint(
-                int(clean_line[1]) - 1,
-                float(clean_line[2]),
-                float(clean_line[3]),
-                float(clean_line[4]),
-            )  # vtkPoint with ID, X, Y Z, "-1" since first vertex has index 0 in VTK
-
-        # elif clean_line[0] == 'PVRTX':
-        #     curr_obj_points.InsertPoint(int(clean_line[1]) - 1, float(clean_line[2]), float(clean_line[3]), float(clean_line[4]))  # vtkPoint with ID, X, Y Z, "-1" since first vertex has index 0 in VTK
-        #     if properties_number > 0:
-        #         """Now we set values in the properties float arrays"""
-        #         """_____________Check if all is OK here with vector properties_________________________________________________"""
-        #         i = 5  # i = 5 since the first five elements have already been read: PVRTX, id, X, Y, Z
-        #         for j in range(properties_number):
-        #             this_prop = curr_obj_properties_collection.GetItem(j)
-        #             if curr_obj_dict['properties_components'][j] == 1:
-        #                 this_prop.InsertTuple1(int(clean_line[1]) - 1,
-        #                                        float(clean_line[i]))
-        #                 i = i + 1
-        #             elif curr_obj_dict['properties_components'][j] == 2:
-        #                 this_prop.InsertTuple2(int(clean_line[1]) - 1,
-        #                                        float(clean_line[i]),
-        #                                        float(clean_line[i + 1]))
-        #                 i = i + 2
-        #             elif curr_obj_dict['properties_components'][j] == 3:
-        #                 this_prop.InsertTuple3(int(clean_line[1]) - 1,
-        #                                        float(clean_line[i]),
-        #                                        float(clean_line[i + 1]),
-        #                                        float(clean_line[i + 2]))
-        #                 i = i + 3
-        #             elif curr_obj_dict['properties_components'][j] == 4:
-        #                 this_prop.InsertTuple4(int(clean_line[1]) - 1,
-        #                                        float(clean_line[i]),
-        #                                        float(clean_line[i + 1]),
-        #                                        float(clean_line[i + 2]),
-        #                                        float(clean_line[i + 3]))
-        #                 i = i + 4
-        #             elif curr_obj_dict['properties_components'][j] == 6:
-        #                 this_prop.InsertTuple4(int(clean_line[1]) - 1,
-        #                                        float(clean_line[i]),
-        #                                        float(clean_line[i + 1]),
-        #                                        float(clean_line[i + 2]),
-        #                                        float(clean_line[i + 3]),
-        #                                        float(clean_line[i + 4]),
-        #                                        float(clean_line[i + 5]))
-        #                 i = i + 6
-        #             elif curr_obj_dict['properties_components'][j] == 9:
-        #                 this_prop.InsertTuple4(int(clean_line[1]) - 1,
-        #                                        float(clean_line[i]),
-        #                                        float(clean_line[i + 1]),
-        #                                        float(clean_line[i + 2]),
-        #                                        float(clean_line[i + 3]),
-        #                                        float(clean_line[i + 4]),
-        #                                        float(clean_line[i + 5]),
-        #                                        float(clean_line[i + 6]),
-        #                                        float(clean_line[i + 7]),
-        #                                        float(clean_line[i + 8]))
-        #                 i = i + 9
-        #             else:
-        #                 """Discard property if it is not 1D, 2D, 3D, 4D, 6D or 9D"""
-        #                 i = i + curr_obj_dict['properties_components'][j]
-        #                 curr_obj_dict['properties_names'] = curr_obj_dict['properties_names'].remove(j)
-        #                 properties_number = properties_number - 1
-        #                 curr_obj_dict['properties_components'].remove(j)
-        #                 curr_obj_properties_collection.RemoveItem(j)
-
-        elif clean_line[0] == "ATOM":
-            """NOT YET IMPLEMENTED"""
-            # atom_id = int(clean_line[1]) - 1
-            # vrtx_id = int(clean_line[2]) - 1
-            pass
-
-        elif clean_line[0] == "SEG":
-            line = vtkLine()
-            line.GetPointIds().SetId(
-                0, int(clean_line[1]) - 1
-            )  # "-1" since first vertex has index 0 in VTK
-            line.GetPointIds().SetId(1, int(clean_line[2]) - 1)
-            curr_obj_cells.InsertNextCell(line)
-
-        elif clean_line[0] == "TRGL":
-            triangle = vtkTriangle()
-            triangle.GetPointIds().SetId(
-                0, int(clean_line[1]) - 1
-            )  # "-1" since first vertex has index 0 in VTK
-            triangle.GetPointIds().SetId(1, int(clean_line[2]) - 1)
-            triangle.GetPointIds().SetId(2, int(clean_line[3]) - 1)
-            curr_obj_cells.InsertNextCell(triangle)
-
-        elif clean_line[0] == "END":
-            """When END reached, process the arrays and write the VTK entity with properties to the project geol_coll"""
-            entity_counter += 1  # update entity counter
-
-            """Write points and cells TO VTK OBJECT"""
-            # if curr_obj_dict['topological_type'] == 'VertexSet':
-            #     self.TextTerminal.appendPlainText("Importing Gocad VSet (VertexSet) as a PolyData 0D in VTK with name: " + curr_obj_dict['name'])
-            #     curr_obj_dict['vtk_obj'].SetPoints(curr_obj_points)
-            #     """Vertex cells, one for each point, are added here."""
-            #     for pid in range(curr_obj_dict['vtk_obj'].GetNumberOfPoints()):
-            #         vertex = vtkVertex()
-            #         vertex.GetPointIds().SetId(0, pid)
-            #         curr_obj_cells.InsertNextCell(vertex)
-            #     curr_obj_dict['vtk_obj'].SetVerts(curr_obj_cells)
-            #
-            if curr_obj_dict["topological_type"] == "PolyLine":
-                self.TextTerminal.appendPlainText(
-                    "Importing GOCAD PLine (PolyLine) as a PolyData 1D in VTK with name: "
-                    + curr_obj_dict["name"]
-                )
-                curr_obj_dict["vtk_obj"].SetPoints(curr_obj_points)
-                curr_obj_dict["vtk_obj"].SetLines(curr_obj_cells)
-
-            elif curr_obj_dict["topological_type"] == "TriSurf":
-                self.TextTerminal.appendPlainText(
-                    "Importing GOCAD TSurf (TriSurf) as a PolyData 2D in VTK with name: "
-                    + curr_obj_dict["name"]
-                )
-                curr_obj_dict["vtk_obj"].SetPoints(curr_obj_points)
-                curr_obj_dict["vtk_obj"].SetPolys(curr_obj_cells)
-
-            # if properties_number > 0:
-            #     for i in range(properties_number):
-            #         curr_obj_dict['vtk_obj'].GetPointData().AddArray(curr_obj_properties_collection.GetItem(i))
-
-            """Add current_entity to entities collection"""
-            self.boundary_coll.add_entity_from_dict(entity_dict=curr_obj_dict)
-            del curr_obj_points
-            del curr_obj_cells
-            # del curr_obj_properties_collection
-            del curr_obj_dict
-
-            """Closing message"""
-            self.TextTerminal.appendPlainText(
-                "Object n. " + str(entity_counter) + " saved"
-            )
+        """Closing message"""
+        self.TextTerminal.appendPlainText("Object n. " + str(entity_counter) + " saved")
 
+    """Add all entities with a single update of the collection and views."""
+    self.boundary_coll.add_entities_from_dicts(entity_dicts=entity_dicts)
     n_entities_after = self.boundary_coll.get_number_of_entities()
     self.TextTerminal.appendPlainText(
         "Entities before importing: " + str(n_entities_before)
@@ -1031,161 +671,150 @@ def gocad2vtk_boundary(self=None, in_file_name=None, uid_from_name=None):
     self.TextTerminal.appendPlainText("Entities imported: " + str(entity_counter))
 
 
-def vtk2gocad(self=None, out_file_name=None):
-    """Export a GOCAD ASCII file with all the pointsets, polylines, and triangulated surfaces included, as VTK entities,
-    in the self.geol_coll GeologicalCollection(), where <self> is the calling ProjectWindow() instance.
-    """
-    """Open file"""
-    fout = open(out_file_name, "w")
-    """Write entities"""
-    for uid in self.geol_coll.df["uid"].to_list():
-        """Loop over uids"""
-        topological_type = self.geol_coll.df.loc[
-            self.geol_coll.df["uid"] == uid, "topological_type"
-        ].values[0]
-        """Check if this uid is compatible with Gocad Ascii"""
-        if topological_type in [
-            "VertexSet",
-            "PolyLine",
-            "TriSurf",
-            "TetraSolid",
-            "XsVertexSet",
-            "XsPolyLine",
-        ]:
-            """Get properties and convert to properly formatted strings"""
-            color_R = self.geol_coll.get_uid_legend(uid=uid)["color_R"] / 255
-            color_G = self.geol_coll.get_uid_legend(uid=uid)["color_G"] / 255
-            color_B = self.geol_coll.get_uid_legend(uid=uid)["color_B"] / 255
-            geological_feature = self.geol_coll.df.loc[
-                self.geol_coll.df["uid"] == uid, "geological_feature"
-            ].values[0]
-            geological_type = self.geol_coll.df.loc[
-                self.geol_coll.df["uid"] == uid, "geological_type"
-            ].values[0]
-            geological_age = self.geol_coll.df.loc[
-                self.geol_coll.df["uid"] == uid, "geological_age"
-            ].values[0]
-            geological_time = self.a_t_df.loc[
-                self.a_t_df["uid"] == uid, "geological_time"
-            ].values[0]
-            properties_names = self.a_t_df.loc[
-                self.a_t_df["uid"] == uid, "properties_names"
-            ].values[0]
-            if properties_names != "":
-                properties_names = str(properties_names).split(";")
-            else:
-                properties_names = []
-            properties_components = self.a_t_df.loc[
-                self.a_t_df["uid"] == uid, "properties_components"
-            ].values[0]
-            if properties_components != "":
-                properties_components = str(properties_components).split(";")
-            else:
-                properties_components = []
-            """Write header for each uid"""
-            fout.write("GOCAD " + topological_type + " 1\n")
+def write_gocad_block(fout=None, keyword=None, columns=None, formats=None):
+    """Write the data lines of a block, e.g. all the PVRTX lines of an object, each with keyword followed
+    by a row of the arrays in columns, whose values are formatted with the printf-style format in formats
+    for the same array. Lines are formatted gocad_chunk_lines at a time, with a single string formatting
+    operation on the whole chunk, and each chunk is written with a single call."""
+    columns = [column.reshape(len(column), -1) for column in columns]
+    line_format = (
+        " ".join(
+            [keyword]
+            + [
+                value_format
+                for column, value_format in zip(columns, formats)
+                for _ in range(column.shape[1])
+            ]
+        )
+        + "\n"
+    )
+    for start in range(0, len(columns[0]), gocad_chunk_lines):
+        chunk = np_column_stack(
+            [column[start : start + gocad_chunk_lines] for column in columns]
+        )
+        fout.write((line_format * len(chunk)) % tuple(chunk.ravel().tolist()))
+
+
+def write_gocad(out_file_name=None, gocad_objects=None):
+    """Write the gocad_objects to a GOCAD ASCII file, one after the other. gocad_objects is an iterable of
+    dictionaries as those returned by read_gocad, and may be a generator, so that only the arrays of one
+    object at a time are kept in memory. An optional stratigraphic_position key, with (age, time), is
+    written as STRATIGRAPHIC_POSITION. Vertex ids are written one-based, coordinates with the shortest
+    representation that is read back exactly and property values with 9 significant digits, enough for
+    float32 values."""
+    with open(out_file_name, "w", buffering=2**20) as fout:
+        for gocad_object in gocad_objects:
+            part_keyword, cell_keyword, cell_key = gocad_object_parts[
+                gocad_object["type"]
+            ]
+            fout.write("GOCAD " + gocad_object["type"] + " 1\n")
             fout.write("HEADER {\n")
-            fout.write(
-                "*solid*color: "
-                + (f"{color_R:.3f}" + " " + f"{color_G:.3f}" + " " + f"{color_B:.3f}")
-                + " 1\n"
-            )
-            fout.write(
-                "name: " + uid + "\n"
-            )  # IMPORTANT: 'name' is uid, not the 'name' shown as a text label that is not unique
+            if gocad_object.get("color") is not None:
+                fout.write(
+                    "*solid*color: "
+                    + " ".join(
+                        [f"{value / 255:.3f}" for value in gocad_object["color"]]
+                    )
+                    + " 1\n"
+                )
+            fout.write("name: " + gocad_object["name"] + "\n")
             fout.write("}\n")
-            fout.write("GEOLOGICAL_FEATURE " + geological_feature + "\n")
-            fout.write("GEOLOGICAL_TYPE " + geological_type + "\n")
-            fout.write(
-                "STRATIGRAPHIC_POSITION "
-                + geological_age
-                + " "
-                + str(geological_time)
-                + "\n"
-            )
-            """Options for properties"""
-            if properties_names:
+            if gocad_object.get("geological_feature") is not None:
                 fout.write(
-                    "PROPERTIES " + (" ".join(map(str, properties_names))) + "\n"
+                    "GEOLOGICAL_FEATURE " + gocad_object["geological_feature"] + "\n"
                 )
+            if gocad_object.get("geological_type") is not None:
+                fout.write("GEOLOGICAL_TYPE " + gocad_object["geological_type"] + "\n")
+            if gocad_object.get("stratigraphic_position") is not None:
                 fout.write(
-                    "ESIZES " + (" ".join(map(str, properties_components))) + "\n"
+                    "STRATIGRAPHIC_POSITION "
+                    + " ".join(map(str, gocad_object["stratigraphic_position"]))
+                    + "\n"
                 )
-                """Build PVRTX matrix here"""
-                """_____________Check if there is an error here with vector properties_________________________________________________"""
-                pvrtx_mtx = self.geol_coll.get_uid_vtk_obj(uid).points
-                for property_name in properties_names:
-                    pvrtx_mtx = np_column_stack(
-                        [
-                            pvrtx_mtx,
-                            self.geol_coll.get_uid_vtk_obj(uid).get_point_data(
-                                property_name
-                            ),
-                        ]
-                    )
-            else:
-                """Build VRTX matrix here"""
-                vrtx_mtx = self.geol_coll.get_uid_vtk_obj(uid).points
-            """Options for different topological types"""
-            if topological_type in ["VertexSet", "XsVertexSet"]:
-                fout.write("SUBVSET\n")
-                """No connectivity matrix in this case."""
-            elif topological_type in ["PolyLine", "XsPolyLine"]:
-                fout.write("ILINE\n")
-                """Build connectivity matrix here."""
-                connectivity = self.geol_coll.get_uid_vtk_obj(uid).cells
-            elif topological_type in ["TriSurf"]:
-                fout.write("TFACE\n")
-                """Build connectivity matrix here."""
-                connectivity = self.geol_coll.get_uid_vtk_obj(uid).cells
-            elif topological_type in ["TetraSolid"]:
-                fout.write("TVOLUME\n")
-                """Build connectivity matrix here."""
-                connectivity = self.geol_coll.get_uid_vtk_obj(uid).cells
-            """Write VRTX or PVRTX"""
-            if properties_names:
-                for row in range(np_shape(pvrtx_mtx)[0]):
-                    data_row = " ".join(
-                        ["{}".format(cell) for cell in pvrtx_mtx[row, :]]
+            points = gocad_object["points"]
+            ids = np_arange(1, len(points) + 1)
+            if gocad_object["properties_names"]:
+                fout.write(
+                    "PROPERTIES " + " ".join(gocad_object["properties_names"]) + "\n"
+                )
+                fout.write(
+                    "ESIZES "
+                    + " ".join(map(str, gocad_object["properties_components"]))
+                    + "\n"
+                )
+            fout.write(part_keyword + "\n")
+            if len(points) > 0:
+                if gocad_object["properties_names"]:
+                    write_gocad_block(
+                        fout=fout,
+                        keyword="PVRTX",
+                        columns=[ids, points] + list(gocad_object["properties"]),
+                        formats=["%d", "%r"]
+                        + ["%.9g"] * len(gocad_object["properties"]),
                     )
-                    fout.write(
-                        "PVRTX " + str(row + 1) + " " + data_row + "\n"
-                    )  # row+1 since indexes in Gocad Ascii start from 1
-                del pvrtx_mtx
-            else:
-                for row in range(np_shape(vrtx_mtx)[0]):
-                    data_row = " ".join(
-                        ["{}".format(cell) for cell in vrtx_mtx[row, :]]
+                else:
+                    write_gocad_block(
+                        fout=fout,
+                        keyword="VRTX",
+                        columns=[ids, points],
+                        formats=["%d", "%r"],
                     )
-                    fout.write(
-                        "VRTX " + str(row + 1) + " " + data_row + "\n"
-                    )  # row+1 since indexes in Gocad Ascii start from 1
-                del vrtx_mtx
-            """Write connectivity"""
-            if topological_type in ["VertexSet", "XsVertexSet"]:
-                pass
-            elif topological_type in ["PolyLine", "XsPolyLine"]:
-                for row in range(np_shape(connectivity)[0]):
-                    data_row = " ".join(
-                        ["{}".format(cell + 1) for cell in connectivity[row, :]]
-                    )  # cell+1 since indexes in Gocad Ascii start from 1 - do not alter connectivity that is a shallow copy
-                    fout.write("SEG " + data_row + "\n")
-                del connectivity
-            elif topological_type in ["TriSurf"]:
-                for row in range(np_shape(connectivity)[0]):
-                    data_row = " ".join(
-                        ["{}".format(cell + 1) for cell in connectivity[row, :]]
-                    )  # cell+1 since indexes in Gocad Ascii start from 1 - do not alter connectivity that is a shallow copy
-                    fout.write("TRGL " + data_row + "\n")
-                del connectivity
-            elif topological_type in ["TetraSolid"]:
-                for row in range(np_shape(connectivity)[0]):
-                    data_row = " ".join(
-                        ["{}".format(cell + 1) for cell in connectivity[row, :]]
-                    )  # cell+1 since indexes in Gocad Ascii start from 1 - do not alter connectivity that is a shallow copy
-                    fout.write("TETRA " + data_row + "\n")
-                del connectivity
+            if cell_keyword and len(gocad_object[cell_key]) > 0:
+                write_gocad_block(
+                    fout=fout,
+                    keyword=cell_keyword,
+                    columns=[gocad_object[cell_key] + 1],
+                    formats=["%d"],
+                )
             fout.write("END\n")
-        else:
-            print("Entity ", uid, "not supported in Gocad Ascii")
-    fout.close()
+
+
+def vtk2gocad(self=None, out_file_name=None):
+    """Export a GOCAD ASCII file with all the pointsets, polylines, and triangulated surfaces included, as VTK entities,
+    in the self.geol_coll GeologicalCollection(), where <self> is the calling ProjectWindow() instance.
+    """
+
+    def gocad_objects():
+        """Yield the entities one at a time, so that write_gocad streams them to the file."""
+        for uid in self.geol_coll.df["uid"].to_list():
+            topological_type = self.geol_coll.get_uid_topological_type(uid)
+            """Check if this uid is compatible with Gocad Ascii"""
+            if topological_type not in gocad_vtk_types:
+                print("Entity ", uid, "not supported in Gocad Ascii")
+                continue
+            """Colors, age and time are in the legend of the entity. The age is missing (NaN) in
+            legend rows added with new entities."""
+            legend = self.geol_coll.get_uid_legend(uid=uid)
+            vtk_obj = self.geol_coll.get_uid_vtk_obj(uid)
+            gocad_object = {
+                "type": gocad_vtk_types[topological_type],
+                # IMPORTANT: 'name' is uid, not the 'name' shown as a text label that is not unique
+                "name": uid,
+                "color": (legend["color_R"], legend["color_G"], legend["color_B"]),
+                "geological_type": self.geol_coll.get_uid_geological_type(uid),
+                "geological_feature": self.geol_coll.get_uid_geological_feature(uid),
+                "stratigraphic_position": (
+                    (
+                        legend["geological_age"]
+                        if isinstance(legend["geological_age"], str)
+                        else "undef"
+                    ),
+                    legend["geological_time"],
+                ),
+                "properties_names": self.geol_coll.get_uid_properties_names(uid),
+                "properties_components": self.geol_coll.get_uid_properties_components(
+                    uid
+                ),
+                "points": vtk_obj.points,
+            }
+            gocad_object["properties"] = [
+                vtk_obj.get_point_data(property_name).reshape(vtk_obj.points_number, -1)
+                for property_name in gocad_object["properties_names"]
+            ]
+            if gocad_object["type"] == "PLine":
+                gocad_object["segments"] = vtk_obj.cells
+            elif gocad_object["type"] == "TSurf":
+                gocad_object["triangles"] = vtk_obj.cells
+            yield gocad_object
+
+    write_gocad(out_file_name=out_file_name, gocad_objects=gocad_objects())
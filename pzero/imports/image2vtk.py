@@ -6,7 +6,6 @@ import uuid
 from copy import deepcopy
 
 import rasterio as rio
-import rasterio.plot as rio_plt
 from numpy import abs as np_abs
 from numpy import cos as np_cos
 from numpy import dstack as np_dstack
@@ -15,71 +14,30 @@ from numpy import sin as np_sin
 from vtkmodules.util import numpy_support
 
 from pzero.collections.image_collection import ImageCollection
-from pzero.entities_factory import MapImage, XsImage
+from pzero.entities_factory import XsImage
 from pzero.helpers.helper_dialogs import multiple_input_dialog
+from pzero.raster_tiles import RasterTiles, build_overviews
 
 
 def geo_image2vtk(self=None, in_file_name=None):
     """Import and add an image to the imaage collection
     <self> is the calling ProjectWindow() instance."""
     try:
-        """Open raster file format (geotiff or other accepted by GDAL) with rasterio.
-        The image is not read here but will be read afterwards with geo_image.read()
-        http://xarray.pydata.org/en/stable/io.html#rasterio
+        """Open raster file format (geotiff or other accepted by GDAL) with rasterio and read it by
+        windows (see raster_tiles.py). Images larger than raster_overview_size are added as an overview,
+        after building the overviews of the image file if it has none, and 3D views show the tiles needed
+        for the camera. Smaller images are read whole. With the origin in the center of the upper-left
+        pixel and negative spacing along Y, image coords 0,0 are at upper-left and grow along x and -y.
         http://www-2.unipv.it/compmech/seminars/group/VTK-VMTK.pdf"""
-        geo_image = rio.open(in_file_name)
-        """Georeferencing variables as read by rasterio."""
-        img_width_px = geo_image.width
-        img_height_px = geo_image.height
-        img_x_min = rio_plt.plotting_extent(geo_image)[0]
-        img_x_max = rio_plt.plotting_extent(geo_image)[1]
-        img_y_min = rio_plt.plotting_extent(geo_image)[2]
-        img_y_max = rio_plt.plotting_extent(geo_image)[3]
-        """Read the image and convert to vtk array.
-        Deep copy used since the image is read now from file.
-        DO NOT specify the array type as e.g. in array_type=vtk.VTK_CHAR"""
-        if geo_image.count == 1:
-            vtk_array = numpy_support.numpy_to_vtk(geo_image.read(1).ravel(), deep=True)
-            vtk_array.SetName("greyscale")
-        elif geo_image.count == 3:
-            vtk_r_property = geo_image.read(1)
-            vtk_g_property = geo_image.read(2)
-            vtk_b_property = geo_image.read(3)
-            numpy_array = np_dstack((vtk_r_property, vtk_g_property, vtk_b_property))
-            # vtk_array = numpy_support.numpy_to_vtk(np.flip(numpy_array.swapaxes(0, 1), axis=1).reshape((-1, 3), order='F'), deep=True)
-            vtk_array = numpy_support.numpy_to_vtk(
-                numpy_array.swapaxes(0, 1).reshape((-1, 3), order="F"), deep=True
-            )
-            vtk_array.SetName("RGB")
-        elif geo_image.count == 4:
-            vtk_r_property = geo_image.read(1)
-            vtk_g_property = geo_image.read(2)
-            vtk_b_property = geo_image.read(3)
-            vtk_a_property = geo_image.read(4)
-            numpy_array = np_dstack(
-                (vtk_r_property, vtk_g_property, vtk_b_property, vtk_a_property)
-            )
-            # vtk_array = numpy_support.numpy_to_vtk(np.flip(numpy_array.swapaxes(0, 1), axis=1).reshape((-1, 3), order='F'), deep=True)
-            vtk_array = numpy_support.numpy_to_vtk(
-                numpy_array.swapaxes(0, 1).reshape((-1, 4), order="F"), deep=True
-            )
-            vtk_array.SetName("RGB")
-        else:
+        build_overviews(file_name=in_file_name)
+        raster_tiles = RasterTiles(file_name=in_file_name)
+        vtk_image = raster_tiles.window_map_image()
+        if vtk_image is None:
             """ADD OPTION FOR MULTIBAND IMAGES HERE_____________________________"""
             print("Multiband not supported")
             return
-        """Create MapImage entity (inherits from vtk.vtkImageData) and then set all data."""
-        vtk_image = MapImage()
-        """With the following dimensions, origin and spacing, image coords 0,0 are at upper-left and image coords grow along x and -y."""
-        vtk_image.SetDimensions(img_width_px, img_height_px, 1)
-        vtk_image.SetSpacing(
-            [
-                (img_x_max - img_x_min) / (img_width_px + 1),
-                (img_y_min - img_y_max) / (img_height_px + 1),
-                1,
-            ]
-        )
-        vtk_image.SetOrigin([img_x_min, img_y_max, 0])
+        if raster_tiles.overview_level() > 0:
+            raster_tiles.to_vtk(vtk_obj=vtk_image)
         # For some reason we wer re-centering the image as follows, with the comment: "Maybe not the best solution,
         # we should add an option to add re-centering every object using the same translation vector." However this
         # was shifting the image in a wrong position. I keep this code here in case it was useful for some reason.
@@ -87,22 +45,12 @@ def geo_image2vtk(self=None, in_file_name=None):
         #     [img_x_min - round(img_x_min, -2), img_y_max - round(img_y_min, -2), 0]
         # )
 
-        """Add the vtk array image data"""
-        vtk_image.GetPointData().AddArray(vtk_array)
-        if geo_image.count == 1:
-            vtk_image.GetPointData().SetActiveScalars("greyscale")
-        elif geo_image.count >= 3:
-            vtk_image.GetPointData().SetActiveScalars("RGB")
-
         """Create dictionary."""
         curr_obj_dict = deepcopy(ImageCollection.image_entity_dict)
         curr_obj_dict["uid"] = str(uuid.uuid4())
         curr_obj_dict["name"] = os.path.basename(in_file_name)
         curr_obj_dict["image_type"] = "MapImage"
-        if geo_image.count == 1:
-            curr_obj_dict["properties_names"] = ["greyscale"]
-        elif geo_image.count >= 3:
-            curr_obj_dict["properties_names"] = ["RGB"]
+        curr_obj_dict["properties_names"] = vtk_image.properties_names
         curr_obj_dict["properties_components"] = vtk_image.properties_components
         curr_obj_dict["properties_types"] = vtk_image.properties_types
         curr_obj_dict["vtk_obj"] = vtk_image
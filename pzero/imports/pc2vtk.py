@@ -4,18 +4,28 @@ PZero© Andrea Bistacchi
 
 Convert point cloud data (txt, csv, xyz, las ...) in vtk objects.
 
-
+Files are read in chunks of chunk_size points (pandas read_csv with chunksize for text and ASCII PLY files,
+slices of a memory map for binary PLY files, laspy chunk_iterator for LAS/LAZ files), and each chunk is
+checked, offset and written in preallocated point and property buffers, so that the peak memory is about
+the size of the point cloud plus one chunk, instead of several times the size of the point cloud.
+
+PLY files are parsed from their header: the properties of the vertex element are mapped to a Numpy
+structured dtype, so that ascii, binary_little_endian and binary_big_endian files are all read with
+the same column indexes, and common property names (red, nx, ...) are mapped to PZero attribute names.
 """
 
 import os
 from copy import deepcopy
 from uuid import uuid4
 
-from laspy import read as lp_read
-from numpy import array as np_array
+from laspy import open as lp_open
 from numpy import c_ as np_c_
 from numpy import column_stack as np_column_stack
-from numpy import shape as np_shape
+from numpy import dtype as np_dtype
+from numpy import empty as np_empty
+from numpy import float64 as np_float64
+from numpy import memmap as np_memmap
+from numpy import result_type as np_result_type
 from numpy import uint8 as np_uint8
 from numpy import where as np_where
 
@@ -24,14 +34,70 @@ from pandas import DataFrame as pd_df
 from pandas import read_csv as pd_read_csv
 from pandas import to_numeric as pd_to_numeric
 from vtk import vtkPoints
-from vtkmodules.util.numpy_support import numpy_to_vtk
+from vtkmodules.util.numpy_support import (
+    get_vtk_array_type,
+    numpy_to_vtk,
+    vtk_to_numpy,
+)
 
 from pzero.collections.dom_collection import DomCollection
 from pzero.entities_factory import PCDom
 
-
 # from .helper_functions import profiler
 
+"""Default number of points read at a time."""
+pc_chunk_size = 1000000
+
+"""Numpy type codes of the scalar types of PLY properties."""
+ply_types = {
+    "char": "i1",
+    "int8": "i1",
+    "uchar": "u1",
+    "uint8": "u1",
+    "short": "i2",
+    "int16": "i2",
+    "ushort": "u2",
+    "uint16": "u2",
+    "int": "i4",
+    "int32": "i4",
+    "uint": "u4",
+    "uint32": "u4",
+    "float": "f4",
+    "float32": "f4",
+    "double": "f8",
+    "float64": "f8",
+}
+
+"""Byte order of the binary PLY formats."""
+ply_byte_orders = {"binary_little_endian": "<", "binary_big_endian": ">"}
+
+"""PZero attribute names of common PLY vertex properties. Other properties keep their name."""
+ply_attributes = {
+    "x": "X",
+    "y": "Y",
+    "z": "Z",
+    "red": "Red",
+    "green": "Green",
+    "blue": "Blue",
+    "diffuse_red": "Red",
+    "diffuse_green": "Green",
+    "diffuse_blue": "Blue",
+    "nx": "Nx",
+    "ny": "Ny",
+    "nz": "Nz",
+    "normal_x": "Nx",
+    "normal_y": "Ny",
+    "normal_z": "Nz",
+    "intensity": "Intensity",
+    "scalar_intensity": "Intensity",
+}
+
+"""Columns combined in vector properties, with the name of the property."""
+pc_vector_properties = {
+    "RGB": ["Red", "Green", "Blue"],
+    "Normals": ["Nx", "Ny", "Nz"],
+}
+
 
 def pc2vtk(
     in_file_name, col_names, row_range, header_row, usecols, delimiter, self=None
@@ -39,10 +105,113 @@ def pc2vtk(
     print("1. Reading and importing file")
 
     basename = os.path.basename(in_file_name)
-    _, ext = os.path.splitext(basename)
 
-    point_cloud = PCDom()  # [Gabriele] vtkPointSet object
-    points = vtkPoints()
+    point_cloud = pc_file2vtk(
+        in_file_name=in_file_name,
+        col_names=col_names,
+        row_range=row_range,
+        header_row=header_row,
+        usecols=usecols,
+        delimiter=delimiter,
+        rgb_255=self.check255Box.isChecked(),
+    )
+    if point_cloud is None:
+        return
+
+    print("4. Adding PC to project")
+    properties_names = point_cloud.point_data_keys
+    properties_components = [
+        point_cloud.get_point_data_shape(i)[1] for i in properties_names
+    ]
+    properties_types = [point_cloud.get_point_data_type(i) for i in properties_names]
+
+    """Create dictionary."""
+    curr_obj_attributes = deepcopy(DomCollection.dom_entity_dict)
+    curr_obj_attributes["uid"] = str(uuid4())
+    point_cloud.Modified()
+    curr_obj_attributes["name"] = basename
+    curr_obj_attributes["dom_type"] = "PCDom"
+    curr_obj_attributes["texture_uids"] = []
+    curr_obj_attributes["properties_names"] = properties_names
+    curr_obj_attributes["properties_components"] = properties_components
+    curr_obj_attributes["properties_types"] = properties_types
+    curr_obj_attributes["vtk_obj"] = point_cloud
+    """Add to entity collection."""
+    self.parent.dom_coll.add_entity_from_dict(entity_dict=curr_obj_attributes)
+    """Cleaning."""
+    del point_cloud
+    print("Done!")
+
+
+def pc_file2vtk(
+    in_file_name=None,
+    col_names=None,
+    row_range=None,
+    header_row=None,
+    usecols=None,
+    delimiter=None,
+    rgb_255=False,
+    chunk_size=None,
+    points_dtype=None,
+):
+    """Reads a point cloud file in chunks and returns a PCDom, or None if the file contains invalid values.
+    Point coordinates are stored as float64, or as points_dtype (e.g. float32, that is precise enough
+    after the XY offset and takes half the memory)."""
+    if chunk_size is None:
+        chunk_size = pc_chunk_size
+    if points_dtype is None:
+        points_dtype = np_float64
+
+    buffer = None
+    for chunk_df in pc_chunks(
+        in_file_name=in_file_name,
+        col_names=col_names,
+        row_range=row_range,
+        header_row=header_row,
+        usecols=usecols,
+        delimiter=delimiter,
+        chunk_size=chunk_size,
+    ):
+        # [Gabriele] Check if in the chunk there are NaNs text and such
+        val_check = chunk_df.apply(
+            lambda c: pd_to_numeric(c, errors="coerce").notnull().all()
+        )
+        if not val_check.all():
+            print("Invalid values in data set, not importing.")
+            return None
+        if buffer is None:
+            print("2. Checking the data")
+            """[Gabriele] Correcting input data by subtracting an equal value approximated to the hundreds (53932.4325 -> 53932.4325 - 53900.0000 = 32.4325). Can be always applied since for numbers < 100 the approximation is always 0.
+            The offset is taken from the first point of the first chunk and applied to all chunks."""
+            offset = chunk_df.loc[chunk_df.index[0], ["X", "Y"]].round(-2).values
+            buffer = PCBuffer(
+                capacity=pc_capacity(in_file_name=in_file_name, row_range=row_range)
+                or len(chunk_df),
+                points_dtype=points_dtype,
+                offset=offset,
+                rgb_255=rgb_255,
+            )
+        buffer.append(chunk_df)
+
+    if buffer is None:
+        print("No points in data set, not importing.")
+        return None
+    print("3. Creating PointCloud")
+    return buffer.to_pcdom()
+
+
+def pc_chunks(
+    in_file_name=None,
+    col_names=None,
+    row_range=None,
+    header_row=None,
+    usecols=None,
+    delimiter=None,
+    chunk_size=None,
+):
+    """Yields Pandas dataframes with col_names columns and up to chunk_size rows, read from a text, PLY
+    or LAS/LAZ file with the same row and column selection used in the import dialog."""
+    _, ext = os.path.splitext(in_file_name)
 
     skip_range = range(1, row_range.start)
     if skip_range:
@@ -57,146 +226,325 @@ def pc2vtk(
 
     # [Gabriele] Read in different ways depending on the input file type
     if ext == ".ply":
-        with open(in_file_name, "r") as f:
-            for i, line in enumerate(f):
-                if "end_header" in line:
-                    index = i
-                    break
-        input_df = pd_read_csv(
-            in_file_name,
-            skiprows=index + 1 + skiprows,
+        yield from ply_chunks(
+            in_file_name=in_file_name,
+            col_names=col_names,
+            row_range=row_range,
             usecols=usecols,
-            delimiter=delimiter,
-            names=col_names,
-            index_col=False,
-            nrows=nrows,
+            chunk_size=chunk_size,
         )
 
     elif ext == ".las" or ext == ".laz":
-        las_data = lp_read(in_file_name)
-        dim_names = las_data.point_format.dimension_names
-        prop_dict = dict()
-        for dim in dim_names:
-            if dim == "X" or dim == "Y" or dim == "Z":
-                attr = dim.lower()
-                prop_dict[attr] = np_c_[las_data[attr]].flatten()
-            else:
-                prop_dict[dim] = np_c_[las_data[dim]].flatten()
-        if row_range:
-            input_df = pd_df.from_dict(prop_dict).iloc[row_range, usecols]
-        else:
-            input_df = pd_df.from_dict(prop_dict).iloc[:, usecols]
-        input_df.columns = col_names
+        with lp_open(in_file_name) as las_file:
+            dim_names = list(las_file.header.point_format.dimension_names)
+            """X, Y and Z are read as scaled coordinates x, y, z."""
+            attrs = [
+                dim.lower() if dim in ["X", "Y", "Z"] else dim for dim in dim_names
+            ]
+            first_row = 0
+            for las_data in las_file.chunk_iterator(chunk_size):
+                last_row = first_row + len(las_data)
+                if row_range:
+                    start = max(row_range.start, first_row)
+                    stop = min(row_range.stop, last_row)
+                else:
+                    start, stop = first_row, last_row
+                if start < stop:
+                    yield pd_df(
+                        {
+                            col_name: np_c_[las_data[attrs[col]]].flatten()[
+                                start - first_row : stop - first_row
+                            ]
+                            for col_name, col in zip(col_names, usecols)
+                        },
+                        index=range(start, stop),
+                    )
+                first_row = last_row
+                if row_range and first_row >= row_range.stop:
+                    break
 
     else:
-        input_df = pd_read_csv(
+        yield from pd_read_csv(
             in_file_name,
             delimiter=delimiter,
             usecols=usecols,
             skiprows=skiprows,
             nrows=nrows,
             names=col_names,
+            chunksize=chunk_size,
         )
 
-    print("2. Checking the data")
-
-    # [Gabriele] Check if in the whole dataset there are NaNs text and such
-    val_check = input_df.apply(
-        lambda c: pd_to_numeric(c, errors="coerce").notnull().all()
-    )
 
-    if not val_check.all():
-        print("Invalid values in data set, not importing.")
+def pc_capacity(in_file_name=None, row_range=None):
+    """Returns the number of points that will be read, if it is known before reading the file, from the
+    row range or from the header of LAS/LAZ files, or None otherwise."""
+    _, ext = os.path.splitext(in_file_name)
+    if ext == ".las" or ext == ".laz":
+        with lp_open(in_file_name) as las_file:
+            point_count = las_file.header.point_count
+    elif ext == ".ply":
+        point_count = ply_vertex_element(read_ply_header(in_file_name))["count"]
+    elif row_range:
+        return row_range.stop - row_range.start
     else:
-        print("3. Creating PointCloud")
+        return None
+    if row_range:
+        return max(min(row_range.stop, point_count) - row_range.start, 0)
+    return point_count
+
+
+def read_ply_header(in_file_name=None):
+    """Parse the header of a PLY file. Returns a dictionary with the format (ascii, binary_little_endian
+    or binary_big_endian), the number of header lines and bytes, and the list of elements, each a
+    dictionary with name, count and properties, a list of (name, Numpy type code) tuples, where list
+    properties have the type code None. Raises ValueError if the file is not a valid PLY file.
+    """
+    header = {"format": None, "n_lines": 0, "n_bytes": 0, "elements": []}
+    with open(in_file_name, "rb") as f:
+        if f.readline().strip() != b"ply":
+            raise ValueError(f"{in_file_name} is not a PLY file")
+        header["n_lines"] = 1
+        for line in f:
+            header["n_lines"] += 1
+            words = line.decode("ascii", errors="replace").split()
+            if not words or words[0] in ["comment", "obj_info"]:
+                continue
+            elif words[0] == "format":
+                header["format"] = words[1]
+            elif words[0] == "element":
+                header["elements"].append(
+                    {"name": words[1], "count": int(words[2]), "properties": []}
+                )
+            elif words[0] == "property":
+                if words[1] == "list":
+                    header["elements"][-1]["properties"].append((words[-1], None))
+                else:
+                    header["elements"][-1]["properties"].append(
+                        (words[-1], ply_types[words[1]])
+                    )
+            elif words[0] == "end_header":
+                header["n_bytes"] = f.tell()
+                break
+        else:
+            raise ValueError(f"{in_file_name} has no end_header line")
+    if header["format"] != "ascii" and header["format"] not in ply_byte_orders:
+        raise ValueError(f"Unknown PLY format {header['format']}")
+    return header
+
+
+def ply_vertex_element(header=None):
+    """Returns the vertex element of a PLY header, raising ValueError if missing."""
+    for element in header["elements"]:
+        if element["name"] == "vertex":
+            return element
+    raise ValueError("PLY file without vertex element")
+
+
+def ply_element_dtype(header=None, element=None):
+    """Numpy structured dtype of an element of a PLY file, with the byte order of the file for binary files.
+    Raises ValueError if the element has list properties, that have variable size."""
+    byte_order = ply_byte_orders.get(header["format"], "=")
+    properties = element["properties"]
+    if any(type_code is None for _, type_code in properties):
+        raise ValueError(
+            f"PLY {element['name']} elements with list properties are not supported"
+        )
+    return np_dtype([(name, byte_order + type_code) for name, type_code in properties])
+
+
+def ply_column_names(header=None):
+    """Names of the vertex properties of a PLY file, with common names mapped to PZero attribute names."""
+    return [
+        ply_attributes.get(name.lower(), name)
+        for name, _ in ply_vertex_element(header)["properties"]
+    ]
+
+
+def ply_vertices(in_file_name=None, header=None):
+    """Read-only memory map of the vertices of a binary PLY file, as a Numpy structured array.
+    The elements written before the vertices (rarely any) must have properties of fixed size.
+    """
+    vertex_element = ply_vertex_element(header)
+    offset = header["n_bytes"]
+    for element in header["elements"]:
+        if element is vertex_element:
+            break
+        offset += element["count"] * ply_element_dtype(header, element).itemsize
+    return np_memmap(
+        in_file_name,
+        dtype=ply_element_dtype(header, vertex_element),
+        mode="r",
+        offset=offset,
+        shape=(vertex_element["count"],),
+    )
 
-        """ [Gabriele] Correcting input data by subtracting an equal value approximated to the hundreds (53932.4325 -> 53932.4325 - 53900.0000 = 32.4325). Can be always applied since for numbers < 100 the approximation is always 0."""
 
-        offset = input_df.loc[0, ["X", "Y"]].round(-2)
+def ply_chunks(
+    in_file_name=None, col_names=None, row_range=None, usecols=None, chunk_size=None
+):
+    """Yields Pandas dataframes with col_names columns, read from the usecols vertex properties of a PLY file,
+    for the vertices in row_range (all vertices if row_range is empty), in chunks of up to chunk_size rows.
+    Binary files are sliced from a memory map, ASCII files are read with pandas read_csv.
+    """
+    header = read_ply_header(in_file_name)
+    n_vertices = ply_vertex_element(header)["count"]
+    if row_range:
+        start, stop = row_range.start, min(row_range.stop, n_vertices)
+    else:
+        start, stop = 0, n_vertices
+    if start >= stop:
+        return
+    if not chunk_size:
+        chunk_size = stop - start
+    if col_names is None:
+        col_names = ply_column_names(header)
+    if usecols is None:
+        usecols = list(range(len(col_names)))
+
+    if header["format"] == "ascii":
+        """Lines of the elements written before the vertices are skipped, one line per element."""
+        skiprows = header["n_lines"]
+        for element in header["elements"]:
+            if element["name"] == "vertex":
+                break
+            skiprows += element["count"]
+        for chunk_df in pd_read_csv(
+            in_file_name,
+            sep=r"\s+",
+            header=None,
+            skiprows=skiprows + start,
+            nrows=stop - start,
+            usecols=usecols,
+            names=col_names,
+            index_col=False,
+            chunksize=chunk_size,
+        ):
+            chunk_df.index += start
+            yield chunk_df
+    else:
+        vertices = ply_vertices(in_file_name=in_file_name, header=header)
+        names = vertices.dtype.names
+        for first in range(start, stop, chunk_size):
+            last = min(first + chunk_size, stop)
+            """Fields are copied in the native byte order, that is required by Pandas."""
+            yield pd_df(
+                {
+                    col_name: vertices[names[col]][first:last].astype(
+                        vertices.dtype[col].newbyteorder("=")
+                    )
+                    for col_name, col in zip(col_names, usecols)
+                },
+                index=range(first, last),
+            )
+        del vertices
+
+
+def ply2df(in_file_name=None, n_rows=None):
+    """Pandas dataframe with all the vertex properties of the first n_rows vertices of a PLY file
+    (all vertices if n_rows is None), used to preview the file and assign properties to columns.
+    """
+    return next(
+        ply_chunks(
+            in_file_name=in_file_name,
+            row_range=range(0, n_rows) if n_rows else range(0, 0),
+            chunk_size=None,
+        ),
+        pd_df(columns=ply_column_names(read_ply_header(in_file_name))),
+    )
 
-        input_df["X"] -= offset[0]
-        input_df["Y"] -= offset[1]
 
-        XYZ = numpy_to_vtk(
-            np_column_stack(
-                (input_df["X"].values, input_df["Y"].values, input_df["Z"].values)
+class PCBuffer:
+    """Preallocated buffers of point coordinates and properties, filled chunk by chunk. Points are written
+    in the data array of a vtkPoints, and properties in Numpy arrays. Red, Green and Blue, and Nx, Ny and Nz,
+    are written in the RGB and Normals vector properties. If more points than expected are appended,
+    the buffers are reallocated with twice the size."""
+
+    def __init__(self, capacity=None, points_dtype=None, offset=None, rgb_255=False):
+        self.capacity = max(capacity, 1)
+        self.points_dtype = points_dtype
+        self.offset = offset
+        self.rgb_255 = rgb_255
+        self.n_points = 0
+        self.vtk_points = vtkPoints()
+        self.vtk_points.SetDataType(get_vtk_array_type(points_dtype))
+        self.vtk_points.SetNumberOfPoints(self.capacity)
+        self.properties = {}
+
+    @property
+    def points(self):
+        """Numpy view of the data array of vtk_points."""
+        return vtk_to_numpy(self.vtk_points.GetData())
+
+    def property_values(self, chunk_df=None):
+        """Returns a dictionary with the values of the properties in chunk_df, as arrays with one row per point."""
+        values = {}
+        columns = [col for col in chunk_df.columns if col not in ["X", "Y", "Z"]]
+        for property_name, property_columns in pc_vector_properties.items():
+            if all(col in columns for col in property_columns):
+                values[property_name] = np_column_stack(
+                    [chunk_df[col].values for col in property_columns]
+                )
+                columns = [col for col in columns if col not in property_columns]
+        if "RGB" in values and self.rgb_255:
+            values["RGB"] = values["RGB"].astype(np_uint8)
+        if "Normals" in values:
+            normals = values["Normals"]
+            values["Normals"] = np_where(normals[:, 2:] > 0, normals * -1, normals)
+        for col in columns:
+            values[col] = chunk_df[col].values
+        return values
+
+    def grow(self, capacity=None):
+        """Reallocate the buffers with the given capacity, keeping the points already appended.
+        The data array is resized directly, since vtkPoints.SetNumberOfPoints discards the data.
+        """
+        self.vtk_points.GetData().Resize(capacity)
+        self.vtk_points.GetData().SetNumberOfTuples(capacity)
+        for property_name, property_array in self.properties.items():
+            new_array = np_empty(
+                (capacity,) + property_array.shape[1:], dtype=property_array.dtype
             )
-        )
-
-        # [Gabriele] Create pyvista PolyData using XYZ data
-        points.SetData(XYZ)
-        point_cloud.SetPoints(points)
+            new_array[: self.n_points] = property_array[: self.n_points]
+            self.properties[property_name] = new_array
+        self.capacity = capacity
+
+    def append(self, chunk_df=None):
+        """Apply the XY offset to a chunk and write it in the buffers."""
+        n_chunk = len(chunk_df)
+        if self.n_points + n_chunk > self.capacity:
+            self.grow(capacity=max(2 * self.capacity, self.n_points + n_chunk))
+        first, last = self.n_points, self.n_points + n_chunk
+        points = self.points
+        points[first:last, 0] = chunk_df["X"].values - self.offset[0]
+        points[first:last, 1] = chunk_df["Y"].values - self.offset[1]
+        points[first:last, 2] = chunk_df["Z"].values
+        for property_name, values in self.property_values(chunk_df).items():
+            if property_name not in self.properties:
+                self.properties[property_name] = np_empty(
+                    (self.capacity,) + values.shape[1:], dtype=values.dtype
+                )
+            property_array = self.properties[property_name]
+            """Pandas infers the dtype of each chunk separately, so a column with integer values in the
+            first chunks may have decimals later: the buffer is then promoted to the wider dtype."""
+            dtype = np_result_type(property_array.dtype, values.dtype)
+            if dtype != property_array.dtype:
+                self.properties[property_name] = property_array.astype(dtype)
+            self.properties[property_name][first:last] = values
+        self.n_points = last
+
+    def to_pcdom(self):
+        """Returns a PCDom with the points and properties appended so far."""
+        if self.n_points < self.capacity:
+            self.vtk_points.GetData().SetNumberOfTuples(self.n_points)
+            self.vtk_points.Squeeze()
+        point_cloud = PCDom()
+        point_cloud.SetPoints(self.vtk_points)
         point_cloud.Modified()
         point_cloud.generate_cells()
-
-        # pv_PD = PointSet(XYZ)
-        """ [Gabriele] Set properties (exclude XYZ data) and add properties names and components in the appropriate lists (properties_names and properties_components)."""
-        input_df.drop(["X", "Y", "Z"], axis=1, inplace=True)
-
-        if not input_df.empty:
-            if "Red" in input_df.columns:
-                point_cloud.init_point_data("RGB", 3)
-                # print(properties_df)
-                if self.check255Box.isChecked():
-                    RGB = np_array(
-                        [input_df["Red"], input_df["Green"], input_df["Blue"]]
-                    ).T.astype(np_uint8)
-                else:
-                    RGB = np_array(
-                        [input_df["Red"], input_df["Green"], input_df["Blue"]]
-                    ).T
-
-                point_cloud.set_point_data("RGB", RGB)
-
-                input_df.drop(["Red", "Green", "Blue"], axis=1, inplace=True)
-
-            if "Nx" in input_df.columns:
-                point_cloud.init_point_data("Normals", 3)
-                normals = np_array([input_df["Nx"], input_df["Ny"], input_df["Nz"]]).T
-
-                normals_flipped = np_where(normals[:, 2:] > 0, normals * -1, normals)
-                point_cloud.set_point_data("Normals", normals_flipped)
-
-                input_df.drop(["Nx", "Ny", "Nz"], axis=1, inplace=True)
-
-            for property in input_df.columns:
-                n_components = np_shape(input_df[property].values)
-                if len(n_components):
-                    n_components = 1
-                else:
-                    n_components = n_components[1]
-                point_cloud.init_point_data(property, n_components)
-
-                point_cloud.set_point_data(property, input_df[property].values)
-                # point_cloud.set_point_data(property,properties_value)
-
-        print("4. Adding PC to project")
-        # point_cloud.ShallowCopy(pv_PD)
-        point_cloud.Modified()
-        properties_names = point_cloud.point_data_keys
-        properties_components = [
-            point_cloud.get_point_data_shape(i)[1] for i in properties_names
-        ]
-        properties_types = [
-            point_cloud.get_point_data_type(i) for i in properties_names
-        ]
-
-        # point_cloud.generate_point_set()
-
-        """Create dictionary."""
-        curr_obj_attributes = deepcopy(DomCollection.dom_entity_dict)
-        curr_obj_attributes["uid"] = str(uuid4())
+        """ [Gabriele] Set properties (exclude XYZ data)."""
+        for property_name, property_array in self.properties.items():
+            vtk_array = numpy_to_vtk(property_array[: self.n_points], deep=True)
+            vtk_array.SetName(property_name)
+            point_cloud.GetPointData().AddArray(vtk_array)
         point_cloud.Modified()
-        curr_obj_attributes["name"] = basename
-        curr_obj_attributes["dom_type"] = "PCDom"
-        curr_obj_attributes["texture_uids"] = []
-        curr_obj_attributes["properties_names"] = properties_names
-        curr_obj_attributes["properties_components"] = properties_components
-        curr_obj_attributes["properties_types"] = properties_types
-        curr_obj_attributes["vtk_obj"] = point_cloud
-        """Add to entity collection."""
-        self.parent.dom_coll.add_entity_from_dict(entity_dict=curr_obj_attributes)
-        """Cleaning."""
-        del input_df
-        del point_cloud
-        print("Done!")
+        return point_cloud
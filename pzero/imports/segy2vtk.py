@@ -9,25 +9,45 @@ from vtk import vtkSegYReader
 
 from pzero.collections.image_collection import ImageCollection
 from pzero.entities_factory import Seismics
+from pzero.segy_cube import SegyCube, seismics_overview
 
 """Very basic SEG-Y importer. TO BE IMPROVED IN THE FUTURE."""
 
 
 def segy2vtk(self=None, in_file_name=None):
-    """Import and add a SEGY seismics cube to the mesh3d_coll of the project.
+    """Import and add a SEGY seismics cube to the image_coll of the project.
     <self> is the calling ProjectWindow() instance."""
+    """3D cubes are read lazily (see segy_cube.py): the trace headers are scanned once and the entity
+    is a decimated overview of the cube, with the index of its traces, while full resolution slices and
+    sections are read from the SEG-Y file when needed. Other files, e.g. 2D lines, are read whole
+    with vtkSegYReader."""
     try:
-        """Do not use the StructuredGridOff() option, this causes problems.
-        https://vtk.org/doc/nightly/html/classvtkSegYReader.html#aa1e0a8e126958a91b3106159a2680041
-        """
-        curr_object = Seismics()  # ________________________________________
-        segy_reader = vtkSegYReader()
-        segy_reader.SetFileName(in_file_name)
-        segy_reader.Update()
-        curr_object.ShallowCopy(segy_reader.GetOutput())
-        curr_object.Modified()
+        cube = SegyCube.scan(file_name=in_file_name)
+    except (ValueError, OSError) as error:
+        cube = None
+        self.TextTerminal.appendPlainText(
+            f"SEGY file not read as a 3D cube ({error}), reading it with vtkSegYReader."
+        )
+    try:
+        if cube is not None:
+            curr_object = seismics_overview(cube=cube)
+            n_inlines, n_crosslines, n_samples = cube.shape
+            self.TextTerminal.appendPlainText(
+                f"SEGY cube with {n_inlines} inlines, {n_crosslines} crosslines and"
+                f" {n_samples} samples, shown as a decimated overview."
+            )
+        else:
+            """Do not use the StructuredGridOff() option, this causes problems.
+            https://vtk.org/doc/nightly/html/classvtkSegYReader.html#aa1e0a8e126958a91b3106159a2680041
+            """
+            curr_object = Seismics()  # ________________________________________
+            segy_reader = vtkSegYReader()
+            segy_reader.SetFileName(in_file_name)
+            segy_reader.Update()
+            curr_object.ShallowCopy(segy_reader.GetOutput())
+            curr_object.Modified()
         """Create dictionary."""
-        curr_obj_attributes = deepcopy(ImageCollection.image_entity_type_dict)
+        curr_obj_attributes = deepcopy(ImageCollection.image_entity_dict)
         curr_obj_attributes["uid"] = str(uuid.uuid4())
         curr_obj_attributes["name"] = os.path.basename(in_file_name)
         curr_obj_attributes["image_type"] = "Seismics"
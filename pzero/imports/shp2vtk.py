@@ -49,6 +49,8 @@ def shp2vtk(self=None, in_file_name=None, collection=None):
     #     print("Empty geometries found - aborting.")
     #     return
     column_names = list(gdf.columns)
+    """Entities are collected in entity_dicts and added at the end, all at once."""
+    entity_dicts = []
     # print("Column names of GeoDataframe: ", list(gdf.columns))
     # print("GeoDataframe:\n", gdf)
     # [Gabriele] This is horroble, we should rewrite to accept
@@ -110,7 +112,7 @@ def shp2vtk(self=None, in_file_name=None, collection=None):
                     curr_obj_dict["vtk_obj"].ShallowCopy(vtkappend.GetOutput())
                 """Create entity from the dictionary and run left_right."""
                 if curr_obj_dict["vtk_obj"].points_number > 0:
-                    output_uid = self.geol_coll.add_entity_from_dict(curr_obj_dict)
+                    entity_dicts.append(curr_obj_dict)
                 else:
                     print("Empty object")
                 # else:
@@ -203,7 +205,7 @@ def shp2vtk(self=None, in_file_name=None, collection=None):
                         ]
                         curr_obj_dict["properties_names"] = properties_names
                         curr_obj_dict["properties_components"] = properties_components
-                        self.geol_coll.add_entity_from_dict(curr_obj_dict)
+                        entity_dicts.append(curr_obj_dict)
                         del curr_obj_dict
                     elif curr_obj_dict["vtk_obj"].points_number > 0:
                         curr_obj_dict["vtk_obj"].auto_cells()
@@ -215,7 +217,7 @@ def shp2vtk(self=None, in_file_name=None, collection=None):
                         ]
                         curr_obj_dict["properties_names"] = properties_names
                         curr_obj_dict["properties_components"] = properties_components
-                        self.geol_coll.add_entity_from_dict(curr_obj_dict)
+                        entity_dicts.append(curr_obj_dict)
                         del curr_obj_dict
             else:
                 print(
@@ -276,7 +278,7 @@ def shp2vtk(self=None, in_file_name=None, collection=None):
                     curr_obj_dict["vtk_obj"].ShallowCopy(vtkappend.GetOutput())
                 """Create entity from the dictionary and run left_right."""
                 if curr_obj_dict["vtk_obj"].points_number > 0:
-                    output_uid = self.fluids_coll.add_entity_from_dict(curr_obj_dict)
+                    entity_dicts.append(curr_obj_dict)
                 else:
                     print("Empty object")
                 # else:
@@ -343,7 +345,7 @@ def shp2vtk(self=None, in_file_name=None, collection=None):
                         ]
                         curr_obj_dict["properties_names"] = properties_names
                         curr_obj_dict["properties_components"] = properties_components
-                        self.fluids_coll.add_entity_from_dict(curr_obj_dict)
+                        entity_dicts.append(curr_obj_dict)
                         del curr_obj_dict
                     elif curr_obj_dict["vtk_obj"].points_number > 0:
                         curr_obj_dict["vtk_obj"].auto_cells()
@@ -355,7 +357,7 @@ def shp2vtk(self=None, in_file_name=None, collection=None):
                         ]
                         curr_obj_dict["properties_names"] = properties_names
                         curr_obj_dict["properties_components"] = properties_components
-                        self.fluids_coll.add_entity_from_dict(curr_obj_dict)
+                        entity_dicts.append(curr_obj_dict)
                         del curr_obj_dict
             else:
                 print(
@@ -429,7 +431,7 @@ def shp2vtk(self=None, in_file_name=None, collection=None):
                 """Create entity from the dictionary and run left_right."""
 
                 if curr_obj_dict["vtk_obj"].points_number > 0:
-                    self.backgrounds_coll.add_entity_from_dict(curr_obj_dict)
+                    entity_dicts.append(curr_obj_dict)
                 else:
                     print("Empty object")
                 # else:
@@ -496,7 +498,7 @@ def shp2vtk(self=None, in_file_name=None, collection=None):
                         curr_obj_dict["properties_names"] = properties_names
                         curr_obj_dict["properties_components"] = properties_components
 
-                        self.backgrounds_coll.add_entity_from_dict(curr_obj_dict)
+                        entity_dicts.append(curr_obj_dict)
                         del curr_obj_dict
                     elif curr_obj_dict["vtk_obj"].points_number > 0:
                         # curr_obj_dict["vtk_obj"].auto_cells()
@@ -508,7 +510,7 @@ def shp2vtk(self=None, in_file_name=None, collection=None):
                         ]
                         curr_obj_dict["properties_names"] = properties_names
                         curr_obj_dict["properties_components"] = properties_components
-                        self.backgrounds_coll.add_entity_from_dict(curr_obj_dict)
+                        entity_dicts.append(curr_obj_dict)
                         del curr_obj_dict
             else:
                 print(
@@ -517,3 +519,11 @@ def shp2vtk(self=None, in_file_name=None, collection=None):
         else:
             print("Only Point and Line geometries can be imported - aborting.")
             return  # except:  #     self.TextTerminal.appendPlainText("SHP file not recognized ERROR.")
+    """Add all entities with a single update of the collection, legend and views."""
+    if entity_dicts:
+        if collection == "Geology":
+            self.geol_coll.add_entities_from_dicts(entity_dicts)
+        elif collection == "Fluid contacts":
+            self.fluids_coll.add_entities_from_dicts(entity_dicts)
+        elif collection == "Background data":
+            self.backgrounds_coll.add_entities_from_dicts(entity_dicts)
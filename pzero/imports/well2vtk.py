@@ -24,7 +24,6 @@ from pzero.collections.geological_collection import GeologicalCollection
 from pzero.collections.well_collection import WellCollection
 from pzero.entities_factory import Well, VertexSet
 
-
 # from .entities_factory import WellData
 
 
@@ -82,6 +81,10 @@ def well2vtk(self, path=None):
                 except:
                     print("No key found")
                 else:
+                    """Markers are added to the geological collection all at once, then their colors
+                    in the legend are used for the trace data."""
+                    marker_obj_dicts = []
+                    intervals = []
                     for row, (start, end, value) in prop.iterrows():
                         start_idx = np_argmin(np_abs(arr - start))
                         end_idx = np_argmin(np_abs(arr - end))
@@ -106,30 +109,27 @@ def well2vtk(self, path=None):
                             marker_obj_dict["geological_feature"] = value
                             marker_obj_dict["x_section"] = well_uid
                             marker_obj_dict["vtk_obj"] = marker_obj
-                            self.geol_coll.add_entity_from_dict(marker_obj_dict)
-                            color_R = (
-                                self.geol_coll.get_uid_legend(
-                                    uid=marker_obj_dict["uid"]
-                                )["color_R"]
-                                / 255
-                            )
-                            color_G = (
-                                self.geol_coll.get_uid_legend(
-                                    uid=marker_obj_dict["uid"]
-                                )["color_G"]
-                                / 255
-                            )
-                            color_B = (
-                                self.geol_coll.get_uid_legend(
-                                    uid=marker_obj_dict["uid"]
-                                )["color_B"]
-                                / 255
+                            marker_obj_dicts.append(marker_obj_dict)
+                        intervals.append((start_idx, end_idx, value))
+                    self.geol_coll.add_entities_from_dicts(
+                        entity_dicts=marker_obj_dicts
+                    )
+                    for marker_obj_dict in marker_obj_dicts:
+                        legend = self.geol_coll.get_uid_legend(
+                            uid=marker_obj_dict["uid"]
+                        )
+                        color_dict[marker_obj_dict["geological_feature"]] = (
+                            np_array(
+                                [
+                                    legend["color_R"],
+                                    legend["color_G"],
+                                    legend["color_B"],
+                                ]
                             )
-                            color_dict[value] = np_array([color_R, color_G, color_B])
-                            del marker_obj_dict
-                        color_val = color_dict[value]
-
-                        tr_data[start_idx:end_idx] = color_val
+                            / 255
+                        )
+                    for start_idx, end_idx, value in intervals:
+                        tr_data[start_idx:end_idx] = color_dict[value]
 
             else:
                 tr_data = np_zeros(shape=points)
@@ -189,6 +189,7 @@ def well2vtk(self, path=None):
     bore_obj_attributes["vtk_obj"] = well_obj.trace
     self.well_coll.add_entity_from_dict(entity_dict=bore_obj_attributes)
 
+    annotation_obj_dicts = []
     for annotation in ann_list:
         ann_keys = annotation.point_data_keys
         name = annotation.get_field_data_keys()[0]
@@ -213,9 +214,8 @@ def well2vtk(self, path=None):
         annotation_obj_attributes["borehole"] = bore_obj_attributes["uid"]
 
         annotation_obj_attributes["vtk_obj"] = annotation
-        self.backgrounds_coll.add_entity_from_dict(
-            entity_dict=annotation_obj_attributes
-        )
+        annotation_obj_dicts.append(annotation_obj_attributes)
+    self.backgrounds_coll.add_entities_from_dicts(entity_dicts=annotation_obj_dicts)
     # paths = in_file_name
 
     # data_paths = paths[1]
@@ -0,0 +1,439 @@
+"""lod_octree.py
+PZero© Andrea Bistacchi
+
+Multi-resolution (level of detail) octree of the points of a PCDom, used to display point clouds with
+many more points than can be rendered interactively.
+
+Points are shuffled and then distributed to the nodes of an octree, breadth-first: each node keeps up
+to node_size points, a random subsample of the points that fall in its cube, and passes the other ones
+to its eight children. The points of a node and of all its ancestors are therefore a uniform subsample
+of the cloud in the node cube, with density increasing with depth. Points and properties are reordered
+so that the points of each node are contiguous.
+
+Octrees are saved as Numpy .npy files in the lod folder of the project folder, next to the object store
+(see project_io.py), and are memory-mapped when read, so that only the nodes that are shown are read
+from disk, and a cloud does not need to fit in memory to be displayed.
+
+The name of the object of the entity in the object store is saved with the octree when known, so that
+views can check that the octree is up to date without reading an entity that has not been read yet
+(lazy loading, see project_io.py).
+
+Views select the nodes to show for their camera with select_nodes: nodes outside the view frustum are
+skipped, and nodes are refined, starting from the ones with the largest point spacing on screen, until
+the spacing on screen is below pixel_error or the number of points would exceed point_budget.
+"""
+
+import os
+from heapq import heappop, heappush
+from json import dump as json_dump
+from json import load as json_load
+from shutil import rmtree
+
+from numpy import abs as np_abs
+from numpy import arange as np_arange
+from numpy import array as np_array
+from numpy import clip as np_clip
+from numpy import concatenate as np_concatenate
+from numpy import cumsum as np_cumsum
+from numpy import diff as np_diff
+from numpy import dtype as np_dtype
+from numpy import empty as np_empty
+from numpy import flatnonzero as np_flatnonzero
+from numpy import floor as np_floor
+from numpy import int64 as np_int64
+from numpy import load as np_load
+from numpy import maximum as np_maximum
+from numpy import minimum as np_minimum
+from numpy import ones as np_ones
+from numpy import random as np_random
+from numpy import repeat as np_repeat
+from numpy import save as np_save
+from numpy import searchsorted as np_searchsorted
+from numpy import sqrt as np_sqrt
+from numpy import tan as np_tan
+from numpy import zeros as np_zeros
+from numpy import radians as np_radians
+from numpy.lib.format import open_memmap
+from vtkmodules.util.numpy_support import numpy_to_vtk, vtk_to_numpy
+
+from pzero.entities_factory import PCDom
+
+"""Default maximum number of points kept in a node."""
+lod_node_size_default = 50000
+
+"""Default maximum depth of the octree (the root has depth 0). Nodes at this depth keep all their points."""
+lod_max_depth_default = 16
+
+"""Default maximum number of points shown for each point cloud in a view."""
+lod_point_budget_default = 2000000
+
+"""Default point spacing on screen, in pixels, below which nodes are not refined."""
+lod_pixel_error_default = 2.0
+
+"""Number of points reordered at a time when an octree is written to file."""
+lod_chunk_size = 1000000
+
+"""Description file of an octree in its folder, written last when an octree is saved."""
+lod_file = "lod.json"
+
+"""Nodes of an octree. key is the Morton code of the node cube at its depth, the points of the node are
+points[start:start + count], its children are nodes[first_child:first_child + n_children], and spacing is
+the mean spacing of its points, assuming that they lie on a surface as usual for DOMs."""
+lod_node_dtype = np_dtype(
+    [
+        ("depth", "i1"),
+        ("key", "i8"),
+        ("start", "i8"),
+        ("count", "i8"),
+        ("first_child", "i8"),
+        ("n_children", "i1"),
+        ("center", "f8", (3,)),
+        ("half_size", "f8"),
+        ("spacing", "f8"),
+    ]
+)
+
+
+def spread_bits(values=None):
+    """Insert two zero bits between the 21 lowest bits of each integer in values."""
+    values = values & 0x1FFFFF
+    values = (values | values << 32) & 0x1F00000000FFFF
+    values = (values | values << 16) & 0x1F0000FF0000FF
+    values = (values | values << 8) & 0x100F00F00F00F00F
+    values = (values | values << 4) & 0x10C30C30C30C30C3
+    values = (values | values << 2) & 0x1249249249249249
+    return values
+
+
+def morton_keys(cells=None):
+    """Morton codes of the (n, 3) integer cell indexes of an octree level, so that the children of a
+    node have consecutive codes and the code of the parent of a node is key >> 3."""
+    return (
+        spread_bits(cells[:, 0])
+        | spread_bits(cells[:, 1]) << 1
+        | spread_bits(cells[:, 2]) << 2
+    )
+
+
+def build_lod_nodes(points=None, node_size=None, max_depth=None, seed=None):
+    """Distribute points to the nodes of an octree. Returns the nodes, as an array with lod_node_dtype,
+    and the order of the points, such that the points of node i are points[order][start_i:start_i + count_i].
+    """
+    if node_size is None:
+        node_size = lod_node_size_default
+    if max_depth is None:
+        max_depth = lod_max_depth_default
+    max_depth = min(max_depth, 21)
+    n_points = points.shape[0]
+    origin = points.min(axis=0).astype(float)
+    size = max(float((points.max(axis=0) - origin).max()), 1e-9)
+
+    """Remaining points are in random order, that is kept by the stable sorts below, so that the first
+    node_size points of each node are a random subsample of its points."""
+    remaining = np_random.default_rng(seed).permutation(n_points)
+    order_parts = []
+    level_nodes = []
+    n_ordered = 0
+    for depth in range(max_depth + 1):
+        if remaining.size == 0:
+            break
+        n_cells = 2**depth
+        cells = np_empty((remaining.size, 3), dtype=np_int64)
+        for axis in range(3):
+            cells[:, axis] = np_clip(
+                np_floor((points[remaining, axis] - origin[axis]) / size * n_cells),
+                0,
+                n_cells - 1,
+            )
+        keys = morton_keys(cells)
+        sort = keys.argsort(kind="stable")
+        remaining, keys, cells = remaining[sort], keys[sort], cells[sort]
+
+        """Groups of points with the same key, and rank of each point in its group."""
+        group_starts = np_concatenate([[0], np_flatnonzero(np_diff(keys)) + 1])
+        group_counts = np_diff(np_concatenate([group_starts, [keys.size]]))
+        if depth == max_depth:
+            own = np_ones(keys.size, dtype=bool)
+            counts = group_counts
+        else:
+            ranks = np_arange(keys.size) - np_repeat(group_starts, group_counts)
+            own = ranks < node_size
+            counts = np_minimum(group_counts, node_size)
+
+        nodes = np_zeros(group_starts.size, dtype=lod_node_dtype)
+        nodes["depth"] = depth
+        nodes["key"] = keys[group_starts]
+        nodes["count"] = counts
+        nodes["start"] = n_ordered + np_cumsum(counts) - counts
+        nodes["half_size"] = size / n_cells / 2
+        nodes["center"] = origin + (cells[group_starts] + 0.5) * (size / n_cells)
+        nodes["spacing"] = 2 * nodes["half_size"] / np_sqrt(counts)
+        level_nodes.append(nodes)
+        order_parts.append(remaining[own])
+        n_ordered += int(counts.sum())
+        remaining = remaining[~own]
+
+    """Link each level to the next one: children have consecutive keys, and the key of their parent
+    is their key >> 3."""
+    first_ids = np_cumsum([0] + [nodes.size for nodes in level_nodes])
+    for depth in range(len(level_nodes) - 1):
+        parents, children = level_nodes[depth], level_nodes[depth + 1]
+        parent_keys = children["key"] >> 3
+        starts = np_searchsorted(parent_keys, parents["key"], side="left")
+        stops = np_searchsorted(parent_keys, parents["key"], side="right")
+        parents["first_child"] = first_ids[depth + 1] + starts
+        parents["n_children"] = stops - starts
+    return np_concatenate(level_nodes), np_concatenate(order_parts)
+
+
+class LodOctree:
+    """Level of detail octree of a point cloud. points and the arrays in point_data (a dictionary
+    {name: array}) are reordered as the nodes, and are Numpy arrays or read-only memory maps when the
+    octree is read from file. bounds are the bounds of the original cloud, as given by GetBounds().
+    object_name is the name of the object of the cloud in the object store of the project, or None if
+    the cloud has not been saved since it was last edited.
+    """
+
+    def __init__(
+        self, nodes=None, points=None, point_data=None, bounds=None, object_name=None
+    ):
+        self.nodes = nodes
+        self.points = points
+        self.point_data = point_data
+        self.bounds = bounds
+        self.object_name = object_name
+
+    @property
+    def n_points(self):
+        return self.points.shape[0]
+
+    @property
+    def in_memory(self):
+        """True if the octree has not been saved to (or read from) file."""
+        return not hasattr(self.points, "filename")
+
+    @classmethod
+    def from_pcdom(
+        cls,
+        vtk_obj=None,
+        dir_name=None,
+        node_size=None,
+        max_depth=None,
+        seed=0,
+        object_name=None,
+    ):
+        """Build the octree of a PCDom, stored as object_name if known. If dir_name is given, the
+        reordered points and properties are written there chunk by chunk, and the octree is returned
+        memory-mapped, otherwise they are kept in memory."""
+        points = vtk_to_numpy(vtk_obj.GetPoints().GetData())
+        nodes, order = build_lod_nodes(
+            points=points, node_size=node_size, max_depth=max_depth, seed=seed
+        )
+        point_data = {}
+        for i in range(vtk_obj.GetPointData().GetNumberOfArrays()):
+            array = vtk_obj.GetPointData().GetArray(i)
+            if array is not None and array.GetName():
+                point_data[array.GetName()] = vtk_to_numpy(array)
+        octree = cls(
+            nodes=nodes,
+            points=points,
+            point_data=point_data,
+            bounds=list(vtk_obj.GetBounds()),
+            object_name=object_name,
+        )
+        if dir_name is None:
+            octree.points = points[order]
+            octree.point_data = {
+                name: values[order] for name, values in point_data.items()
+            }
+            return octree
+        octree.save(dir_name=dir_name, order=order)
+        return cls.load(dir_name)
+
+    def save(self, dir_name=None, order=None):
+        """Save the octree in dir_name, replacing any previous one. Arrays are written in a temporary
+        folder, that is renamed to dir_name when complete. If order is given, points and point_data are
+        in the original order, and are reordered while they are written."""
+        tmp_dir_name = dir_name + ".tmp"
+        if os.path.isdir(tmp_dir_name):
+            rmtree(tmp_dir_name)
+        os.makedirs(tmp_dir_name)
+        np_save(os.path.join(tmp_dir_name, "nodes.npy"), self.nodes)
+        arrays = [("points.npy", self.points)]
+        arrays += [
+            (f"point_data_{i}.npy", values)
+            for i, values in enumerate(self.point_data.values())
+        ]
+        for file_name, values in arrays:
+            out = open_memmap(
+                os.path.join(tmp_dir_name, file_name),
+                mode="w+",
+                dtype=values.dtype,
+                shape=values.shape,
+            )
+            for first in range(0, values.shape[0], lod_chunk_size):
+                last = min(first + lod_chunk_size, values.shape[0])
+                if order is None:
+                    out[first:last] = values[first:last]
+                else:
+                    out[first:last] = values[order[first:last]]
+            out.flush()
+            del out
+        self.write_description(dir_name=tmp_dir_name)
+        if os.path.isdir(dir_name):
+            rmtree(dir_name)
+        os.replace(tmp_dir_name, dir_name)
+
+    def write_description(self, dir_name=None):
+        """Write the description file of the octree in dir_name, replacing the previous one at once,
+        e.g. to update object_name after the cloud has been saved."""
+        with open(os.path.join(dir_name, lod_file + ".tmp"), "w") as fout:
+            json_dump(
+                {
+                    "n_points": int(self.n_points),
+                    "bounds": [float(bound) for bound in self.bounds],
+                    "point_data": list(self.point_data),
+                    "object_name": self.object_name,
+                },
+                fout,
+                indent=0,
+            )
+        os.replace(
+            os.path.join(dir_name, lod_file + ".tmp"), os.path.join(dir_name, lod_file)
+        )
+
+    @classmethod
+    def exists(cls, dir_name=None):
+        """True if a complete octree has been saved in dir_name."""
+        return os.path.isfile(os.path.join(dir_name, lod_file))
+
+    @classmethod
+    def load(cls, dir_name=None):
+        """Read an octree saved in dir_name, with points and point_data memory-mapped."""
+        with open(os.path.join(dir_name, lod_file), "r") as fin:
+            description = json_load(fin)
+        return cls(
+            nodes=np_load(os.path.join(dir_name, "nodes.npy")),
+            points=np_load(os.path.join(dir_name, "points.npy"), mmap_mode="r"),
+            point_data={
+                name: np_load(
+                    os.path.join(dir_name, f"point_data_{i}.npy"), mmap_mode="r"
+                )
+                for i, name in enumerate(description["point_data"])
+            },
+            bounds=description["bounds"],
+            object_name=description.get("object_name"),
+        )
+
+    def matches(self, vtk_obj=None):
+        """True if the octree has been built from vtk_obj, as far as can be checked from the number of
+        points, the bounds and the names of the properties. Properties added to vtk_obj after the octree
+        was built (e.g. normals) would be missing from the nodes shown, so they invalidate the octree.
+        """
+        point_data = vtk_obj.GetPointData()
+        names = {
+            point_data.GetArray(i).GetName()
+            for i in range(point_data.GetNumberOfArrays())
+            if point_data.GetArray(i) is not None and point_data.GetArray(i).GetName()
+        }
+        return (
+            vtk_obj.GetNumberOfPoints() == self.n_points
+            and names == set(self.point_data)
+            and all(
+                abs(a - b) <= 1e-6 * max(1.0, abs(a))
+                for a, b in zip(vtk_obj.GetBounds(), self.bounds)
+            )
+        )
+
+    def screen_spacing(self, camera=None, viewport_size=None):
+        """Point spacing of each node on screen, in pixels, and mask of the nodes that intersect the
+        view frustum of camera (a vtkCamera), for a viewport of viewport_size (width, height) pixels.
+        """
+        width, height = viewport_size
+        planes = [0.0] * 24
+        camera.GetFrustumPlanes(width / max(height, 1), planes)
+        planes = np_array(planes).reshape(6, 4)
+        centers = self.nodes["center"]
+        half_sizes = self.nodes["half_size"]
+        """A cube is outside the frustum if it is completely on the outer side of a plane
+        (plane normals point inward)."""
+        distances = centers @ planes[:, :3].T + planes[:, 3]
+        radii = half_sizes[:, None] * np_abs(planes[:, :3]).sum(axis=1)
+        in_frustum = (distances >= -radii).all(axis=1)
+        if camera.GetParallelProjection():
+            pixels_per_unit = height / (2 * camera.GetParallelScale())
+        else:
+            camera_distances = np_sqrt(
+                ((centers - np_array(camera.GetPosition())) ** 2).sum(axis=1)
+            )
+            camera_distances = np_maximum(
+                camera_distances - half_sizes * np_sqrt(3), 1e-9
+            )
+            pixels_per_unit = height / (
+                2 * camera_distances * np_tan(np_radians(camera.GetViewAngle()) / 2)
+            )
+        return self.nodes["spacing"] * pixels_per_unit, in_frustum
+
+    def select_nodes(
+        self, camera=None, viewport_size=None, point_budget=None, pixel_error=None
+    ):
+        """Ids of the nodes to show for camera, sorted as their points in file. Nodes in the view frustum
+        are refined from the root, largest spacing on screen first, while their spacing is above
+        pixel_error, and a node is skipped if its points would exceed point_budget."""
+        if point_budget is None:
+            point_budget = lod_point_budget_default
+        if pixel_error is None:
+            pixel_error = lod_pixel_error_default
+        spacing, in_frustum = self.screen_spacing(
+            camera=camera, viewport_size=viewport_size
+        )
+        nodes = self.nodes
+        selected = []
+        n_selected = 0
+        queue = [(-spacing[0], 0)] if in_frustum[0] else []
+        while queue:
+            _, node_id = heappop(queue)
+            count = nodes["count"][node_id]
+            if n_selected + count > point_budget:
+                continue
+            selected.append(node_id)
+            n_selected += count
+            if spacing[node_id] > pixel_error:
+                first_child = nodes["first_child"][node_id]
+                for child in range(
+                    first_child, first_child + nodes["n_children"][node_id]
+                ):
+                    if in_frustum[child]:
+                        heappush(queue, (-spacing[child], child))
+        return np_array(sorted(selected), dtype=np_int64)
+
+    def node_pcdom(self, node_ids=None):
+        """PCDom with the points and properties of the nodes in node_ids."""
+        slices = [
+            slice(start, start + count)
+            for start, count in zip(
+                self.nodes["start"][node_ids], self.nodes["count"][node_ids]
+            )
+        ]
+        point_cloud = PCDom()
+        if not slices:
+            return point_cloud
+        point_cloud.points = np_concatenate([self.points[s] for s in slices])
+        point_cloud.generate_cells()
+        for name, values in self.point_data.items():
+            vtk_array = numpy_to_vtk(
+                np_concatenate([values[s] for s in slices]), deep=True
+            )
+            vtk_array.SetName(name)
+            point_cloud.GetPointData().AddArray(vtk_array)
+        point_cloud.Modified()
+        return point_cloud
+
+    def node_bounds(self, node_ids=None):
+        """Bounds (xmin, xmax, ymin, ymax, zmin, zmax) of the cubes of the nodes in node_ids."""
+        centers = self.nodes["center"][node_ids]
+        half_sizes = self.nodes["half_size"][node_ids][:, None]
+        bounds = np_empty((len(node_ids), 6))
+        bounds[:, 0::2] = centers - half_sizes
+        bounds[:, 1::2] = centers + half_sizes
+        return bounds
@@ -190,11 +190,47 @@ def set_normals(self):
 
         elif self.shown_table == "tabDOMs":
             print("Calculating normals for Point Cloud")
+            """Neighbourhood sizes are min_k, max_k and the scales in between, doubling each time."""
+            input_dict = {
+                "min_k": ["Minimum number of neighbours: ", 10],
+                "max_k": ["Maximum number of neighbours: ", 40],
+                "radius": ["Maximum neighbour distance (0 = unlimited): ", 0.0],
+                "orientation": ["Orient normals: ", ["downwards", "toward sensor"]],
+                "sensor_x": ["Sensor X: ", 0.0],
+                "sensor_y": ["Sensor Y: ", 0.0],
+                "sensor_z": ["Sensor Z: ", 0.0],
+            }
+            updt_dict = multiple_input_dialog(
+                title="Point cloud normals", input_dict=input_dict
+            )
+            if updt_dict is None:
+                return
+            scales = [max(updt_dict["min_k"], 3)]
+            while scales[-1] * 2 < updt_dict["max_k"]:
+                scales.append(scales[-1] * 2)
+            scales.append(max(updt_dict["max_k"], scales[0]))
+            sensor = None
+            if updt_dict["orientation"] == "toward sensor":
+                sensor = [
+                    updt_dict["sensor_x"],
+                    updt_dict["sensor_y"],
+                    updt_dict["sensor_z"],
+                ]
             for uid in self.selected_uids:
-                self.dom_coll.append_uid_property(
-                    uid=uid, property_name="Normals", property_components=3
+                for property_name, property_components in [
+                    ("Normals", 3),
+                    ("Planarity", 1),
+                    ("Normal confidence", 1),
+                ]:
+                    if property_name not in self.dom_coll.get_uid_properties_names(uid):
+                        self.dom_coll.append_uid_property(
+                            uid=uid,
+                            property_name=property_name,
+                            property_components=property_components,
+                        )
+                self.dom_coll.get_uid_vtk_obj(uid).vtk_set_normals(
+                    scales=scales, radius=updt_dict["radius"] or None, sensor=sensor
                 )
-                self.dom_coll.get_uid_vtk_obj(uid).vtk_set_normals()
                 self.prop_legend.update_widget(self)
                 print(self.prop_legend_df)
             print("Done")
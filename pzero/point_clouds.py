@@ -1,48 +1,77 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
 from copy import deepcopy
 from uuid import uuid4
 
 import matplotlib.pyplot as plt
 import matplotlib.style as mplstyle
 import seaborn as sns
-from numpy import arcsin as np_arcsin
-from numpy import arctan2 as np_arctan2
-from numpy import max as np_max
+from numpy import abs as np_abs
+from numpy import arange as np_arange
+from numpy import array as np_array
+from numpy import concatenate as np_concatenate
+from numpy import cross as np_cross
+from numpy import empty as np_empty
+from numpy import empty_like as np_empty_like
+from numpy import eye as np_eye
+from numpy import finfo as np_finfo
+from numpy import flatnonzero as np_flatnonzero
+from numpy import float64 as np_float64
+from numpy import floor as np_floor
+from numpy import full as np_full
+from numpy import inf as np_inf
+from numpy import int64 as np_int64
+from numpy import lexsort as np_lexsort
+from numpy import maximum as np_maximum
 from numpy import mean as np_mean
-from numpy import min as np_min
+from numpy import median as np_median
+from numpy import nan as np_nan
+from numpy import nanmean as np_nanmean
+from numpy import nanmedian as np_nanmedian
+from numpy import nanstd as np_nanstd
+from numpy import ones as np_ones
+from numpy import ones_like as np_ones_like
+from numpy import percentile as np_percentile
 from numpy import pi as np_pi
 from numpy import random as np_random
+from numpy import rint as np_rint
+from numpy import searchsorted as np_searchsorted
+from numpy import sort as np_sort
+from numpy import sqrt as np_sqrt
+from numpy import stack as np_stack
 from numpy import std as np_std
+from numpy import unique as np_unique
+from numpy import where as np_where
 from numpy import zeros as np_zeros
 from numpy import zeros_like as np_zeros_like
+from numpy.linalg import eigh as np_linalg_eigh
+from numpy.linalg import solve as np_linalg_solve
 from pyvista.core.filters import _update_alg
+from scipy.spatial import cKDTree
 from vtkmodules.util import numpy_support
-from vtkmodules.vtkCommonCore import vtkIdTypeArray
 from vtkmodules.vtkCommonDataModel import (
     vtkDataObject,
     vtkImplicitSelectionLoop,
     vtkSelectionNode,
     vtkSelection,
-    vtkPlane,
 )
 from vtkmodules.vtkFiltersCore import (
     vtkThreshold,
     vtkAppendPolyData,
     vtkThresholdPoints,
-    vtkDelaunay2D,
-    vtkMassProperties,
 )
 from vtkmodules.vtkFiltersExtraction import vtkExtractGeometry, vtkExtractSelection
 from vtkmodules.vtkFiltersPoints import (
     vtkEuclideanClusterExtraction,
     vtkRadiusOutlierRemoval,
-    vtkProjectPointsToPlane,
 )
 
 from pzero.collections.dom_collection import DomCollection
 from pzero.collections.geological_collection import GeologicalCollection
-from pzero.helpers.helper_dialogs import multiple_input_dialog
-from pzero.helpers.helper_functions import best_fitting_plane, srf
+from pzero.helpers.helper_dialogs import multiple_input_dialog, progress_dialog
+from pzero.helpers.helper_functions import srf
 from pzero.helpers.helper_widgets import Scissors
+from .cluster_planes import build_facets, cluster_planes
 from .entities_factory import PCDom, TriSurf, Attitude
 
 
@@ -187,19 +216,95 @@ def cut_pc(self, method="both"):
     self.plotter.track_click_position(side="right", callback=end_digitize)
 
 
-def decimate_pc(vtk_obj, fac):
-    """Function used to decimate (randomly) a given point cloud"""
-    dec_fac = int(vtk_obj.GetNumberOfPoints() * fac)
-    random = np_random.choice(vtk_obj.GetNumberOfPoints(), dec_fac)
-
-    ids = vtkIdTypeArray()
-
-    for i in random:
-        ids.InsertNextValue(i)
-
-    selection = extract_id(vtk_obj, ids)
-
-    return selection
+def decimate_pc(
+    vtk_obj, fac=None, mode="random", seed=None, voxel_size=None, radius=None
+):
+    """Function used to decimate a given point cloud. Returns a new PCDom with the points kept, in their
+    original order, and their point data. Modes are:
+    "random" keeps a fraction fac of the points (e.g. 0.1 for 10%), drawn without replacement;
+    "voxel" keeps, in each cell of a grid with spacing voxel_size, the point closest to the cell centre;
+    "poisson" keeps a Poisson-disk subsample, with no two points closer than radius (see poisson_disk_ids).
+    seed makes the random and poisson modes repeatable."""
+    points = numpy_support.vtk_to_numpy(vtk_obj.GetPoints().GetData())
+    if mode == "random":
+        n_points = vtk_obj.GetNumberOfPoints()
+        point_ids = np_sort(
+            np_random.default_rng(seed).choice(
+                n_points, int(n_points * fac), replace=False
+            )
+        )
+    elif mode == "voxel":
+        point_ids = voxel_ids(points=points, voxel_size=voxel_size)
+    elif mode == "poisson":
+        point_ids = poisson_disk_ids(points=points, radius=radius, seed=seed)
+    else:
+        raise ValueError(f"Unknown decimation mode {mode}")
+    return vtk_obj.extract_points(point_ids=point_ids)
+
+
+def grid_keys(points=None, cell_size=None):
+    """Integer (n, 3) indexes of the cells of a regular grid with cell_size containing points, and a
+    single integer key for each cell."""
+    cells = np_floor((points - points.min(axis=0)) / cell_size).astype(np_int64)
+    dims = cells.max(axis=0) + 1
+    if float(dims[0]) * float(dims[1]) * float(dims[2]) >= 2**62:
+        raise ValueError(
+            f"Grid with cell size {cell_size} too fine for the point cloud"
+        )
+    keys = (cells[:, 0] * dims[1] + cells[:, 1]) * dims[2] + cells[:, 2]
+    return cells, keys
+
+
+def voxel_ids(points=None, voxel_size=None):
+    """Sorted ids of the points closest to the centre of each voxel of a grid with spacing voxel_size."""
+    cells, keys = grid_keys(points=points, cell_size=voxel_size)
+    offsets = (points - points.min(axis=0)) / voxel_size - cells - 0.5
+    order = np_lexsort(((offsets**2).sum(axis=1), keys))
+    sorted_keys = keys[order]
+    first = np_concatenate([[True], sorted_keys[1:] != sorted_keys[:-1]])
+    return np_sort(order[first])
+
+
+def poisson_disk_ids(points=None, radius=None, seed=None, chunk_size=1000000):
+    """Sorted ids of a maximal Poisson-disk subsample of points: no two points kept are closer than radius,
+    and every point discarded is within radius of a point kept.
+
+    Points are binned in a grid with cells of size radius / sqrt(3), so that a point kept covers its whole
+    cell. Cells are processed in 27 phases (cell indexes modulo 3), and cells of the same phase are at least
+    two cells apart, hence farther than radius. In each phase, a random point still available is kept in
+    each cell of the phase, and the points within radius of them are discarded with a KD-tree query, so
+    each cell is settled in its phase and a single pass is needed."""
+    n_points = points.shape[0]
+    cells, keys = grid_keys(points=points, cell_size=radius / np_sqrt(3))
+    phases = (cells % 3) @ np_array([9, 3, 1])
+    del cells
+    ranks = np_random.default_rng(seed).permutation(n_points)
+    order = np_lexsort((ranks, keys, phases))
+    del ranks
+    sorted_keys = keys[order]
+    phase_starts = np_searchsorted(phases[order], np_arange(28))
+    available = np_ones(n_points, dtype=bool)
+    kept = []
+    for phase in range(27):
+        start, stop = phase_starts[phase], phase_starts[phase + 1]
+        phase_ids = np_flatnonzero(available[start:stop]) + start
+        if phase_ids.size == 0:
+            continue
+        phase_keys = sorted_keys[phase_ids]
+        first = np_concatenate([[True], phase_keys[1:] != phase_keys[:-1]])
+        kept_ids = order[phase_ids[first]]
+        kept.append(kept_ids)
+        tree = cKDTree(points[kept_ids])
+        later_ids = np_flatnonzero(available[stop:]) + stop
+        for first_id in range(0, later_ids.size, chunk_size):
+            chunk_ids = later_ids[first_id : first_id + chunk_size]
+            distances, _ = tree.query(
+                points[order[chunk_ids]], k=1, distance_upper_bound=radius, workers=-1
+            )
+            available[chunk_ids[distances <= radius]] = False
+    if not kept:
+        return np_array([], dtype=np_int64)
+    return np_sort(np_concatenate(kept))
 
 
 def extract_pc(vtk_obj, implicit_func):
@@ -335,7 +440,9 @@ def segment_pc(self):
 
 
 def facets_pc(self):
-    """Function used to create polygons starting from a region of points"""
+    """Function used to create polygons starting from a region of points. Planes are fitted to all the
+    regions at once, and the regions are triangulated in parallel by a pool of worker processes (see
+    cluster_planes.py), then all the facets are added as a single TriSurf."""
     if len(self.selected_uids) == 0:
         print("No entities selected, make sure to have the right tab open")
         return
@@ -344,70 +451,35 @@ def facets_pc(self):
 
     vtk_obj = self.parent.dom_coll.get_uid_vtk_obj(uid)
     name = self.parent.dom_coll.get_uid_name(uid)
-    appender = vtkAppendPolyData()
-    regions = set(vtk_obj.get_point_data("ClusterId"))
-    n_regions = len(regions)
-    vtk_obj.GetPointData().SetActiveScalars("ClusterId")
-    dd_list = np_zeros(n_regions)
-    d_list = np_zeros(n_regions)
-    n_list = np_zeros((n_regions, 3))
-    c_list = np_zeros((n_regions, 3))
-    a_list = np_zeros(n_regions)
-    l_list = np_zeros(n_regions)
-    w_list = np_zeros(n_regions)
-    for i, region in enumerate(regions):
-        print(f"{i}/{n_regions}", end="\r")
-
-        thresh = vtkThresholdPoints()
-
-        thresh.SetInputData(vtk_obj)
-        thresh.ThresholdBetween(region, region)
-
-        thresh.Update()
-        points = numpy_support.vtk_to_numpy(thresh.GetOutput().GetPoints().GetData())
-        n_points = thresh.GetOutput().GetNumberOfPoints()
-
-        if n_points > 0:
-            c, n = best_fitting_plane(points)
-            if n[2] >= 0:
-                n *= -1
-            c_list[i] = c
-            n_list[i] = n
-            dd_list[i] = (np_arctan2(n[0], n[1]) * 180 / np_pi - 180) % 360
-            d_list[i] = 90 - np_arcsin(-n[2]) * 180 / np_pi
-
-            facet = TriSurf()
-            proj = vtkProjectPointsToPlane()
-            proj.SetInputData(thresh.GetOutput())
-            proj.SetProjectionTypeToSpecifiedPlane()
-            proj.SetNormal(n)
-            proj.SetOrigin(c)
-
-            delaunay = vtkDelaunay2D()
-            delaunay.SetInputConnection(proj.GetOutputPort())
-            delaunay.SetProjectionPlaneMode(2)
-            delaunay.Update()
-            facet.ShallowCopy(delaunay.GetOutput())
-            twod_pts = facet.world2plane(normal=n)
-            w_list[i] = abs(np_max(twod_pts[:, 0]) - np_min(twod_pts[:, 0]))
-            l_list[i] = abs(np_max(twod_pts[:, 1]) - np_min(twod_pts[:, 1]))
-
-            mass = vtkMassProperties()
-            mass.SetInputData(facet)
-            a_list[i] = mass.GetSurfaceArea()
-            appender.AddInputData(facet)
-
-    appender.Update()
+    cluster_ids = vtk_obj.get_point_data("ClusterId")
+    prgs_bar = progress_dialog(
+        max_value=np_unique(cluster_ids).size,
+        title_txt="Facets",
+        label_txt="Fitting and triangulating regions...",
+        cancel_txt="Cancel",
+        parent=self,
+    )
+    result = build_facets(
+        points=vtk_obj.points,
+        cluster_ids=cluster_ids,
+        callback=lambda n_done: prgs_bar.setValue(prgs_bar.value() + n_done),
+        cancel=lambda: prgs_bar.was_canceled,
+    )
+    prgs_bar.close()
+    if result is None:
+        print("Facets canceled")
+        return
 
     facets = TriSurf()
-    facets.ShallowCopy(appender.GetOutput())
-    facets.set_field_data("Normals", n_list)
-    facets.set_field_data("Centers", c_list)
-    facets.set_field_data("dip direction", dd_list)
-    facets.set_field_data("dip", d_list)
-    facets.set_field_data("area", a_list)
-    facets.set_field_data("width", w_list)
-    facets.set_field_data("length", l_list)
+    facets.points = result["points"]
+    facets.cells = result["triangles"]
+    facets.set_field_data("Normals", result["normals"])
+    facets.set_field_data("Centers", result["centers"])
+    facets.set_field_data("dip direction", result["dip_directions"])
+    facets.set_field_data("dip", result["dips"])
+    facets.set_field_data("area", result["areas"])
+    facets.set_field_data("width", result["widths"])
+    facets.set_field_data("length", result["lengths"])
 
     properties_name = facets.point_data_keys
     properties_components = [facets.get_point_data_shape(i)[1] for i in properties_name]
@@ -426,43 +498,179 @@ def facets_pc(self):
     self.clear_selection()
 
 
+"""Number of plane hypotheses drawn by ransac_plane, maximum number of random points the hypotheses are
+scored on, number of points scored against all the hypotheses at a time, and inlier threshold, in robust
+standard deviations of the residuals, used when none is given."""
+ransac_hypotheses = 256
+ransac_score_points = 500000
+ransac_chunk_size = 20000
+ransac_threshold_sigmas = 3.0
+
+
+def plane_distances(points=None, center=None, normal=None):
+    """Signed distances of points from the plane through center with unit normal, positive on the side the
+    normal points to, as a single dot product. This replaces a vtkPlane.DistanceToPlane call per point,
+    that returned the absolute distance."""
+    return (points - center) @ normal
+
+
+def fit_plane(points=None, chunk_size=None):
+    """Least-squares plane of points, as best_fitting_plane, returning its centre and unit normal pointing
+    downwards. The covariance matrix is accumulated over chunks of points, centred on the centre, so that
+    full scans, possibly in float32, are not copied as a whole."""
+    if chunk_size is None:
+        chunk_size = ransac_chunk_size * 50
+    center = points.mean(axis=0, dtype=np_float64)
+    covariance = np_zeros((3, 3))
+    for start in range(0, len(points), chunk_size):
+        centred = points[start : start + chunk_size] - center
+        covariance += centred.T @ centred
+    normal = np_linalg_eigh(covariance)[1][:, 0]
+    if normal[2] >= 0:
+        normal = -normal
+    return center, normal
+
+
+def ransac_plane(
+    points=None, threshold=None, hypotheses=None, seed=None, chunk_size=None
+):
+    """Robust plane fitting of points with RANSAC. Planes through random triplets of points are scored
+    all at once against chunks of points (at most ransac_score_points, drawn at random), counting the
+    points closer than threshold to each of them, then the plane with most inliers is refined by least
+    squares on its inliers (see fit_plane), and the inliers are found again. Without a threshold, it is
+    ransac_threshold_sigmas times the robust standard deviation (1.4826 times the median absolute
+    residual) of the best plane found by least median of squares on a random sample of chunk_size
+    points, that needs no threshold and works with up to half of outliers. Returns the centre and unit
+    normal (pointing downwards) of the plane, the boolean inliers mask and the threshold used.
+    Coordinates are centred on the first point drawn, for precision."""
+    if hypotheses is None:
+        hypotheses = ransac_hypotheses
+    if chunk_size is None:
+        chunk_size = ransac_chunk_size
+    n_points = len(points)
+    if n_points < 3:
+        raise ValueError("At least 3 points are needed to fit a plane.")
+
+    rng = np_random.default_rng(seed)
+    triplets = points[rng.integers(0, n_points, (hypotheses, 3))].astype(np_float64)
+    origin = triplets[0, 0].copy()
+    triplets -= origin
+    normals = np_cross(triplets[:, 1] - triplets[:, 0], triplets[:, 2] - triplets[:, 0])
+    lengths = np_sqrt((normals**2).sum(axis=1))
+    valid = lengths > 0
+    normals[valid] /= lengths[valid, None]
+    offsets = (normals * triplets[:, 0]).sum(axis=1)
+    if threshold is None:
+        sample = points[rng.choice(n_points, min(n_points, chunk_size), replace=False)]
+        medians = np_median(np_abs((sample - origin) @ normals.T - offsets), axis=0)
+        medians[~valid] = np_inf
+        threshold = ransac_threshold_sigmas * 1.4826 * medians.min()
+    """A perfect plane has a null threshold, that would reject points by rounding errors."""
+    extent = float((points.max(axis=0) - points.min(axis=0)).max())
+    threshold = max(threshold, 1e-9 * extent)
+
+    if n_points > ransac_score_points:
+        scored_ids = rng.choice(n_points, ransac_score_points, replace=False)
+        scored = points[np_sort(scored_ids)]
+    else:
+        scored = points
+    counts = np_zeros(hypotheses, dtype=np_int64)
+    for start in range(0, len(scored), chunk_size):
+        distances = (scored[start : start + chunk_size] - origin) @ normals.T - offsets
+        counts += (np_abs(distances) <= threshold).sum(axis=0)
+    counts[~valid] = -1
+    best = counts.argmax()
+
+    def inliers_of(center=None, normal=None):
+        """Inliers of a plane, with larger chunks since there is a single plane."""
+        inliers = np_empty(n_points, dtype=bool)
+        step = chunk_size * 50
+        for start in range(0, n_points, step):
+            distances = plane_distances(
+                points=points[start : start + step], center=center, normal=normal
+            )
+            inliers[start : start + step] = np_abs(distances) <= threshold
+        return inliers
+
+    inliers = inliers_of(center=origin + triplets[best, 0], normal=normals[best])
+    center, normal = fit_plane(points=points[inliers])
+    return center, normal, inliers_of(center=center, normal=normal), threshold
+
+
+def residual_stats(distances=None, inliers=None):
+    """Statistics of the signed distances of the inliers of a calibration target from its plane: number of
+    points, inlier ratio, mean, standard deviation and root mean square of the residuals, and median, 95th
+    percentile and maximum of their absolute value."""
+    residuals = distances[inliers]
+    abs_residuals = np_abs(residuals)
+    return {
+        "points": len(distances),
+        "inlier_ratio": len(residuals) / max(len(distances), 1),
+        "mean": float(np_mean(residuals)),
+        "std": float(np_std(residuals)),
+        "rms": float(np_sqrt(np_mean(residuals**2))),
+        "median_abs": float(np_median(abs_residuals)),
+        "p95_abs": float(np_percentile(abs_residuals, 95)),
+        "max_abs": float(abs_residuals.max()),
+    }
+
+
 def calibration_pc(self):
+    """Fit a reference plane to each selected point cloud (e.g. the calibration targets, or the regions
+    split from a segmented cloud) with ransac_plane, write the signed distance from the plane as the
+    Distance property, and show the residual statistics of each target."""
     if len(self.selected_uids) == 0:
         print("No entities selected, make sure to have the right tab open")
         return
+    input_dict = {
+        "threshold": ["Inlier threshold (0 = automatic): ", 0.0],
+        "hypotheses": ["Number of RANSAC hypotheses: ", ransac_hypotheses],
+        "seed": ["Random seed: ", 0],
+    }
+    options = multiple_input_dialog(title="Calibration", input_dict=input_dict)
+    if options is None:
+        return
     n_points = np_zeros_like(self.selected_uids, dtype=float)
-    normals_var = np_zeros_like(self.selected_uids, dtype=float)
+    normals_var = np_full(len(self.selected_uids), np_nan)
+    rms = np_zeros_like(self.selected_uids, dtype=float)
+    print(
+        f"{'name':>20} {'points':>10} {'inliers':>8} {'mean':>10} {'std':>10} {'rms':>10}"
+        f" {'p95':>10} {'max':>10}"
+    )
     for i, uid in enumerate(self.selected_uids):
         vtk_obj = self.parent.dom_coll.get_uid_vtk_obj(uid)
         points = vtk_obj.points
-        normals = numpy_support.vtk_to_numpy(
-            vtk_obj.GetPointData().GetScalars("Normals")
-        )
         n_points[i] = vtk_obj.GetNumberOfPoints()
-        normals_var[i] = srf(normals)
-
-        c, n = best_fitting_plane(points)
-        if n[2] >= 0:
-            n *= -1
-
-        plane2 = vtkPlane()
-        plane2.SetOrigin(c)
-        plane2.SetNormal(n)
-
-        distances = np_zeros(len(points))
-
-        for c, point in enumerate(points):
-            distances[c] = plane2.DistanceToPlane(point)
+        if "Normals" in vtk_obj.point_data_keys:
+            normals_var[i] = srf(vtk_obj.get_point_data("Normals"))
+        if n_points[i] < 3:
+            print(f"{self.parent.dom_coll.get_uid_name(uid):>20} too few points")
+            continue
+
+        center, normal, inliers, _ = ransac_plane(
+            points=points,
+            threshold=options["threshold"] or None,
+            hypotheses=options["hypotheses"],
+            seed=options["seed"],
+        )
+        distances = plane_distances(points=points, center=center, normal=normal)
+        stats = residual_stats(distances=distances, inliers=inliers)
+        rms[i] = stats["rms"]
+        print(
+            f"{self.parent.dom_coll.get_uid_name(uid):>20} {stats['points']:10d}"
+            f" {stats['inlier_ratio']:8.1%} {stats['mean']:10.4g} {stats['std']:10.4g}"
+            f" {stats['rms']:10.4g} {stats['p95_abs']:10.4g} {stats['max_abs']:10.4g}"
+        )
 
         vtk_obj.set_point_data("Distance", distances)
         self.parent.dom_coll.replace_vtk(uid, vtk_obj)
     self.clear_selection()
 
     print(np_mean(n_points), np_std(n_points))
-    print(np_mean(normals_var), np_std(normals_var))
+    print(np_nanmean(normals_var), np_nanstd(normals_var))
 
     with mplstyle.context(("default")):
-        fig, (ax1, ax2) = plt.subplots(2, 1)
+        fig, (ax1, ax2, ax3) = plt.subplots(3, 1)
         # plt.tick_params(bottom=False)
 
     sns.set_style("darkgrid")
@@ -471,6 +679,8 @@ def calibration_pc(self):
     ax.set(xlabel="Number of points per region")
     ax = sns.histplot(normals_var, ax=ax2)
     ax.set(xlabel="SRF")
+    ax = sns.histplot(rms, ax=ax3)
+    ax.set(xlabel="RMS distance from plane")
     # ax1.autoscale(enable=True, axis="y", tight=True)
     # ax2.hist(normals_var)
     # ax2.set_xticklabels([])
@@ -486,7 +696,9 @@ def calibration_pc(self):
 
 
 def auto_pick(self):
-    """Function used to pick automatically the regions from the segmentation"""
+    """Function used to pick automatically the regions from the segmentation. One attitude is added at the
+    centre of each region, with the normal of its best-fitting plane, all fitted at once with
+    cluster_planes."""
     if len(self.selected_uids) == 0:
         print("No entities selected, make sure to have the right tab open")
         return
@@ -495,38 +707,15 @@ def auto_pick(self):
 
     vtk_obj = self.parent.dom_coll.get_uid_vtk_obj(uid)
     name = self.parent.dom_coll.get_uid_name(uid)
-    appender = vtkAppendPolyData()
-    max_region = np_max(vtk_obj.get_point_data("ClusterId"))
-    vtk_obj.GetPointData().SetActiveScalars("ClusterId")
-    for i in range(max_region):
-        print(f"{i}/{max_region}", end="\r")
-        thresh = vtkThresholdPoints()
-
-        thresh.SetInputData(vtk_obj)
-        thresh.ThresholdBetween(i, i)
-
-        thresh.Update()
-
-        points = numpy_support.vtk_to_numpy(thresh.GetOutput().GetPoints().GetData())
-        # print(points)
-        if thresh.GetOutput().GetNumberOfPoints() > 0:
-            # print(thresh.GetOutput())
-            c, n = best_fitting_plane(points)
-            # n = np.mean(numpy_support.vtk_to_numpy(thresh.GetOutput().GetPointData().GetArray('Normals')),axis=0)
-            # c = np.mean(points,axis=0)
-            if n[2] >= 0:
-                n *= -1
-            # plane = pv.Plane(center = c, direction= n)
-            att_point = Attitude()
-            att_point.append_point(point_vector=c)
-            att_point.auto_cells()
-            att_point.set_point_data(data_key="Normals", attribute_matrix=n)
-            appender.AddInputData(att_point)
-
-    appender.Update()
+    _, centers, normals, _ = cluster_planes(
+        points=vtk_obj.points.astype(np_float64),
+        cluster_ids=vtk_obj.get_point_data("ClusterId"),
+    )
 
     points = Attitude()
-    points.ShallowCopy(appender.GetOutput())
+    points.points = centers
+    points.auto_cells()
+    points.set_point_data(data_key="Normals", attribute_matrix=normals)
     properties_name = points.point_data_keys
     properties_components = [points.get_point_data_shape(i)[1] for i in properties_name]
 
@@ -599,21 +788,452 @@ def thresh_filt(self):
     self.clear_selection()
 
 
+"""Number of points whose neighbourhoods are processed at a time by the neighbourhood filters, to bound the
+memory used by the (n, k) arrays of neighbours."""
+neighbours_chunk_size = 200000
+
+
+def neighbour_chunks(vtk_obj=None, radius=None, k=None, chunk_size=None, workers=-1):
+    """Neighbourhood engine shared by the filters below. Yields, for consecutive chunks of points of the
+    PCDom vtk_obj, (start, stop, ids, mask), where ids is a (stop - start, k) array with the ids of the k
+    points closest to each point (the point itself included) within radius, and mask is False where fewer
+    than k neighbours are found. Queries use the KD-tree cached on vtk_obj (see PCDom.kd_tree) and run in
+    parallel with workers (-1 to use all the processors)."""
+    if chunk_size is None:
+        chunk_size = neighbours_chunk_size
+    tree = vtk_obj.kd_tree
+    n_points = tree.n
+    k = min(k, n_points)
+    for start in range(0, n_points, chunk_size):
+        stop = min(start + chunk_size, n_points)
+        distances, ids = tree.query(
+            tree.data[start:stop],
+            k=k,
+            distance_upper_bound=radius,
+            workers=workers,
+        )
+        ids = ids.reshape((stop - start, k))
+        mask = ids < n_points
+        ids[~mask] = 0
+        yield start, stop, ids, mask
+
+
+def neighbour_counts(vtk_obj=None, radius=None, workers=-1):
+    """Number of points within radius of each point of vtk_obj, the point itself included."""
+    tree = vtk_obj.kd_tree
+    counts = np_empty(tree.n, dtype=np_int64)
+    for start in range(0, tree.n, neighbours_chunk_size):
+        stop = min(start + neighbours_chunk_size, tree.n)
+        counts[start:stop] = tree.query_ball_point(
+            tree.data[start:stop], r=radius, return_length=True, workers=workers
+        )
+    return counts
+
+
+def local_frames(neighbours=None, mask=None):
+    """Principal component analysis of the neighbourhoods of a chunk of points, with neighbours the
+    (n, k, 3) coordinates points[ids] of the neighbours (ids, mask) given by neighbour_chunks. Returns the
+    centroid and the eigenvalues (ascending) and eigenvectors (columns) of the covariance matrix of each
+    neighbourhood, so that [..., 0] is the normal of the best-fit plane. Batched products use matmul,
+    that is much faster than einsum here."""
+    weights = mask[..., None].astype(float)
+    counts = np_maximum(weights.sum(axis=1), 1)
+    centroids = (neighbours * weights).sum(axis=1) / counts
+    centred = (neighbours - centroids[:, None, :]) * weights
+    covariances = (centred.transpose(0, 2, 1) @ centred) / counts[..., None]
+    eigenvalues, eigenvectors = np_linalg_eigh(covariances)
+    return centroids, eigenvalues, eigenvectors
+
+
+"""Neighbourhood sizes (numbers of neighbours) tried by estimate_normals for each point, the number of points
+processed at a time by each thread, and the default number of threads. Chunks are smaller than in the
+filters above since several are processed at once."""
+normals_scales = (10, 20, 40)
+normals_chunk_size = 50000
+normals_workers_default = max(1, min(4, os.cpu_count() or 1))
+
+
+def normals_chunk(tree=None, start=None, stop=None, scales=None, radius=None):
+    """Multi-scale normals of the points start:stop of the KD-tree tree (see estimate_normals). For each
+    scale the neighbourhood is the first k neighbours of the point within radius, and the scale with the
+    smallest ratio between the two smallest eigenvalues, i.e. with the best defined normal, is kept. Noise
+    raises this ratio at small scales and curvature at large ones. Neighbours are sorted by distance, so
+    the sums giving the covariance matrices are accumulated from each scale to the next, reading each
+    neighbour once. Neighbours are centred on the point, to keep precision with large
+    coordinates."""
+    n_points = tree.n
+    k = min(max(scales), n_points)
+    _, ids = tree.query(
+        tree.data[start:stop], k=k, distance_upper_bound=radius, workers=1
+    )
+    ids = ids.reshape((stop - start, k))
+    mask = ids < n_points
+    ids[~mask] = 0
+    neighbours = (tree.data[ids] - tree.data[start:stop, None, :]) * mask[..., None]
+    normals = np_zeros((stop - start, 3))
+    best_eigenvalues = np_zeros((stop - start, 3))
+    best_ratio = np_full(stop - start, np_inf)
+    best_scale = np_zeros(stop - start, dtype=np_int64)
+    sums = np_zeros((stop - start, 3))
+    products = np_zeros((stop - start, 3, 3))
+    counts = np_zeros(stop - start)
+    first = 0
+    for scale in sorted({min(scale, k) for scale in scales}):
+        segment = neighbours[:, first:scale]
+        sums += segment.sum(axis=1)
+        products += segment.transpose(0, 2, 1) @ segment
+        counts += mask[:, first:scale].sum(axis=1)
+        first = scale
+        means = sums / np_maximum(counts, 1)[:, None]
+        covariances = products / np_maximum(counts, 1)[:, None, None] - (
+            means[:, :, None] * means[:, None, :]
+        )
+        eigenvalues, eigenvectors = np_linalg_eigh(covariances)
+        eigenvalues = np_maximum(eigenvalues, 0)
+        ratio = eigenvalues[:, 0] / np_maximum(eigenvalues[:, 1], np_finfo(float).tiny)
+        better = (counts >= 3) & (ratio < best_ratio)
+        normals[better] = eigenvectors[better, :, 0]
+        best_eigenvalues[better] = eigenvalues[better]
+        best_ratio[better] = ratio[better]
+        best_scale[better] = scale
+    return normals, best_eigenvalues, best_scale
+
+
+def estimate_normals(
+    vtk_obj=None, scales=None, radius=None, sensor=None, workers=None, chunk_size=None
+):
+    """Normals of the points of the PCDom vtk_obj, estimated by principal component analysis of multi-scale
+    neighbourhoods (see normals_chunk), with neighbourhoods limited to radius if given. Chunks of points
+    are processed by a pool of workers threads, since KD-tree queries and batched eigh release the GIL.
+    Normals point toward the sensor position if given, otherwise downwards as in the other DOM tools.
+    Returns the normals, the planarity (l1 - l0) / l2 of the neighbourhoods, with l0 <= l1 <= l2 their
+    eigenvalues, the confidence 1 - l0 / l1 of the normals, and the number of neighbours used. Points with
+    fewer than 3 neighbours have zero normals and confidence."""
+    if scales is None:
+        scales = normals_scales
+    if radius is None:
+        radius = np_inf
+    if workers is None:
+        workers = normals_workers_default
+    if chunk_size is None:
+        chunk_size = normals_chunk_size
+    tree = vtk_obj.kd_tree
+    normals = np_empty((tree.n, 3))
+    planarity = np_empty(tree.n)
+    confidence = np_empty(tree.n)
+    used_scales = np_empty(tree.n, dtype=np_int64)
+
+    def run_chunk(start):
+        stop = min(start + chunk_size, tree.n)
+        chunk_normals, eigenvalues, chunk_scales = normals_chunk(
+            tree=tree, start=start, stop=stop, scales=scales, radius=radius
+        )
+        if sensor is not None:
+            towards = np_array(sensor) - tree.data[start:stop]
+        else:
+            towards = np_array([0.0, 0.0, -1.0])
+        flip = (chunk_normals * towards).sum(axis=1) < 0
+        chunk_normals[flip] *= -1
+        normals[start:stop] = chunk_normals
+        planarity[start:stop] = (eigenvalues[:, 1] - eigenvalues[:, 0]) / np_maximum(
+            eigenvalues[:, 2], np_finfo(float).tiny
+        )
+        confidence[start:stop] = np_where(
+            chunk_scales > 0,
+            1 - eigenvalues[:, 0] / np_maximum(eigenvalues[:, 1], np_finfo(float).tiny),
+            0,
+        )
+        used_scales[start:stop] = chunk_scales
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(run_chunk, range(0, tree.n, chunk_size)))
+    return normals, planarity, confidence, used_scales
+
+
+def radial_outliers(vtk_obj=None, radius=None, min_neighbours=None):
+    """Mask of the points of vtk_obj with fewer than min_neighbours other points within radius, as removed by
+    vtkRadiusOutlierRemoval."""
+    return neighbour_counts(vtk_obj=vtk_obj, radius=radius) - 1 < min_neighbours
+
+
+def surface_density(vtk_obj=None, radius=None):
+    """Number of points per unit area around each point of vtk_obj, counting the points within radius, the
+    point itself included, divided by the area of a circle with the same radius."""
+    return neighbour_counts(vtk_obj=vtk_obj, radius=radius) / (np_pi * radius**2)
+
+
+def roughness(vtk_obj=None, radius=None, k=30):
+    """Distance of each point of vtk_obj from the plane fitted to its k closest neighbours within radius.
+    Points with fewer than 3 neighbours get NaN."""
+    points = numpy_support.vtk_to_numpy(vtk_obj.GetPoints().GetData())
+    values = np_full(vtk_obj.GetNumberOfPoints(), np_nan)
+    for start, stop, ids, mask in neighbour_chunks(vtk_obj=vtk_obj, radius=radius, k=k):
+        centroids, _, eigenvectors = local_frames(neighbours=points[ids], mask=mask)
+        distances = np_abs(
+            ((points[start:stop] - centroids) * eigenvectors[:, :, 0]).sum(axis=1)
+        )
+        values[start:stop] = np_where(mask.sum(axis=1) >= 3, distances, np_nan)
+    return values
+
+
+def curvature(vtk_obj=None, radius=None, k=30, kind="mean"):
+    """Curvature of the surface sampled by vtk_obj at each point, from a quadric z = f(x, y) fitted to the k
+    closest neighbours within radius, in the frame of their best-fit plane. kind can be "mean" (absolute
+    value of the mean curvature, 1/R for a sphere and 1/2R for a cylinder with radius R), "gaussian", or
+    "variation" (surface variation, smallest eigenvalue over the sum of the eigenvalues of the covariance
+    matrix). Points with fewer than 6 neighbours get NaN."""
+    points = numpy_support.vtk_to_numpy(vtk_obj.GetPoints().GetData())
+    values = np_full(vtk_obj.GetNumberOfPoints(), np_nan)
+    for start, stop, ids, mask in neighbour_chunks(vtk_obj=vtk_obj, radius=radius, k=k):
+        neighbours = points[ids]
+        _, eigenvalues, eigenvectors = local_frames(neighbours=neighbours, mask=mask)
+        valid = mask.sum(axis=1) >= 6
+        if kind == "variation":
+            values[start:stop] = np_where(
+                valid,
+                eigenvalues[:, 0] / np_maximum(eigenvalues.sum(axis=1), 1e-300),
+                np_nan,
+            )
+            continue
+        """Neighbours in the frame (u, v, w) of the best-fit plane, centred on the point, and least squares
+        fit of w = a u^2 + b u v + c v^2 + d u + e v + f, with weights 0 for missing neighbours. A tiny
+        ridge keeps the normal equations of points with too few neighbours solvable."""
+        local = (neighbours - points[start:stop, None, :]) @ eigenvectors
+        w, u, v = local[..., 0], local[..., 1], local[..., 2]
+        design = (
+            np_stack([u * u, u * v, v * v, u, v, np_ones_like(u)], axis=2)
+            * mask[..., None]
+        )
+        normal_matrices = design.transpose(0, 2, 1) @ design
+        ridge = 1e-12 * np_maximum(normal_matrices.trace(axis1=1, axis2=2), 1e-300)
+        normal_matrices += ridge[:, None, None] * np_eye(6)
+        coefficients = np_linalg_solve(
+            normal_matrices, (design.transpose(0, 2, 1) @ (w * mask)[..., None])
+        )[..., 0]
+        a, b, c, d, e = (coefficients[:, i] for i in range(5))
+        slope = 1 + d**2 + e**2
+        if kind == "mean":
+            curvatures = np_abs(
+                ((1 + e**2) * a - d * e * b + (1 + d**2) * c) / slope**1.5
+            )
+        elif kind == "gaussian":
+            curvatures = (4 * a * c - b**2) / slope**2
+        else:
+            raise ValueError(f"Unknown curvature {kind}")
+        values[start:stop] = np_where(valid, curvatures, np_nan)
+    return values
+
+
+def colour_filter(vtk_obj=None, property_name=None, radius=None, k=30, mode="mean"):
+    """Smooth the point data property_name (e.g. RGB colours) of vtk_obj with the mean or median of the
+    values of the k closest neighbours within radius, to reduce colour noise before segmentation. Returns
+    an array with the same type and shape as the property."""
+    values = vtk_obj.get_point_data(property_name)
+    values_2d = values.reshape((values.shape[0], -1)).astype(float)
+    filtered = np_empty_like(values_2d)
+    for start, stop, ids, mask in neighbour_chunks(vtk_obj=vtk_obj, radius=radius, k=k):
+        if mode == "mean":
+            weights = mask[..., None]
+            filtered[start:stop] = (values_2d[ids] * weights).sum(axis=1) / weights.sum(
+                axis=1
+            )
+        elif mode == "median":
+            neighbours = np_where(mask[..., None], values_2d[ids], np_nan)
+            filtered[start:stop] = np_nanmedian(neighbours, axis=1)
+        else:
+            raise ValueError(f"Unknown colour filter {mode}")
+    if values.dtype.kind in "iu":
+        filtered = np_rint(filtered)
+    return filtered.reshape(values.shape).astype(values.dtype)
+
+
+def add_neighbour_property(self, uid=None, property_name=None, values=None):
+    """Add values as a new point data property property_name of the point cloud uid, replacing a previous
+    one with the same name, and update the legend."""
+    collection = self.parent.dom_coll
+    if property_name in collection.get_uid_properties_names(uid):
+        collection.remove_uid_property(uid=uid, property_name=property_name)
+    components = 1 if values.ndim == 1 else values.shape[1]
+    collection.append_uid_property(
+        uid=uid, property_name=property_name, property_components=components
+    )
+    collection.get_uid_vtk_obj(uid).set_point_data(
+        data_key=property_name, attribute_matrix=values
+    )
+    collection.get_uid_vtk_obj(uid).Modified()
+    self.parent.dom_data_val_modified_signal.emit([uid])
+    self.parent.prop_legend.update_widget(self.parent)
+
+
+def selected_pc_uids(self):
+    """Selected point clouds, or None if no point cloud is selected."""
+    uids = [
+        uid
+        for uid in self.selected_uids
+        if isinstance(self.parent.dom_coll.get_uid_vtk_obj(uid), PCDom)
+    ]
+    if not uids:
+        print("No point cloud selected, make sure to have the right tab open")
+        return None
+    return uids
+
+
 def radial_filt(self):
-    ...
+    """Function used to remove isolated points, with fewer than a given number of neighbours within a radius.
+    The filtered point cloud is added as a new entity."""
+    uids = selected_pc_uids(self)
+    if uids is None:
+        return
+    input_dict = {
+        "radius": ["Search radius: ", 1.0],
+        "min_neighbours": ["Minimum number of neighbours: ", 5],
+    }
+    dialog = multiple_input_dialog(title="Radial filter", input_dict=input_dict)
+    if dialog is None:
+        return
+    for uid in uids:
+        vtk_obj = self.parent.dom_coll.get_uid_vtk_obj(uid)
+        outliers = radial_outliers(
+            vtk_obj=vtk_obj,
+            radius=dialog["radius"],
+            min_neighbours=dialog["min_neighbours"],
+        )
+        entity_dict = deepcopy(self.parent.dom_coll.dom_entity_dict)
+        entity_dict["name"] = (
+            self.parent.dom_coll.get_uid_name(uid)
+            + "_radial_"
+            + str(dialog["radius"])
+            + "_"
+            + str(dialog["min_neighbours"])
+        )
+        entity_dict["dom_type"] = "PCDom"
+        entity_dict["properties_names"] = self.parent.dom_coll.get_uid_properties_names(
+            uid
+        )
+        entity_dict["properties_components"] = (
+            self.parent.dom_coll.get_uid_properties_components(uid)
+        )
+        entity_dict["properties_types"] = self.parent.dom_coll.get_uid_properties_types(
+            uid
+        )
+        entity_dict["vtk_obj"] = vtk_obj.extract_points(
+            point_ids=np_flatnonzero(~outliers)
+        )
+        self.parent.dom_coll.add_entity_from_dict(entity_dict)
+        print(f"{outliers.sum()} outliers removed")
+    self.clear_selection()
 
 
 def surf_den_filt(self):
-    ...
+    """Function used to calculate the surface density (points per unit area) of a point cloud, saved as
+    the surface_density property, that can be used with the threshold filter."""
+    uids = selected_pc_uids(self)
+    if uids is None:
+        return
+    input_dict = {"radius": ["Search radius: ", 1.0]}
+    dialog = multiple_input_dialog(title="Surface density", input_dict=input_dict)
+    if dialog is None:
+        return
+    for uid in uids:
+        add_neighbour_property(
+            self,
+            uid=uid,
+            property_name="surface_density",
+            values=surface_density(
+                vtk_obj=self.parent.dom_coll.get_uid_vtk_obj(uid),
+                radius=dialog["radius"],
+            ),
+        )
+    self.clear_selection()
 
 
 def rough_filt(self):
-    ...
+    """Function used to calculate the roughness of a point cloud, saved as the roughness property."""
+    uids = selected_pc_uids(self)
+    if uids is None:
+        return
+    input_dict = {
+        "radius": ["Search radius: ", 1.0],
+        "k": ["Maximum number of neighbours: ", 30],
+    }
+    dialog = multiple_input_dialog(title="Roughness", input_dict=input_dict)
+    if dialog is None:
+        return
+    for uid in uids:
+        add_neighbour_property(
+            self,
+            uid=uid,
+            property_name="roughness",
+            values=roughness(
+                vtk_obj=self.parent.dom_coll.get_uid_vtk_obj(uid),
+                radius=dialog["radius"],
+                k=dialog["k"],
+            ),
+        )
+    self.clear_selection()
 
 
 def curv_filt(self):
-    ...
+    """Function used to calculate the curvature of a point cloud, saved as the <kind>_curvature property."""
+    uids = selected_pc_uids(self)
+    if uids is None:
+        return
+    input_dict = {
+        "kind": ["Curvature: ", ["mean", "gaussian", "variation"]],
+        "radius": ["Search radius: ", 1.0],
+        "k": ["Maximum number of neighbours: ", 30],
+    }
+    dialog = multiple_input_dialog(title="Curvature", input_dict=input_dict)
+    if dialog is None:
+        return
+    for uid in uids:
+        add_neighbour_property(
+            self,
+            uid=uid,
+            property_name=dialog["kind"] + "_curvature",
+            values=curvature(
+                vtk_obj=self.parent.dom_coll.get_uid_vtk_obj(uid),
+                radius=dialog["radius"],
+                k=dialog["k"],
+                kind=dialog["kind"],
+            ),
+        )
+    self.clear_selection()
 
 
 def col_filt(self):
-    ...
+    """Function used to smooth a colour (or other) property of a point cloud with the mean or median of its
+    neighbours, saved as the <property>_<mode> property."""
+    uids = selected_pc_uids(self)
+    if uids is None:
+        return
+    input_dict = {
+        "prop_name": [
+            "Select property name: ",
+            self.parent.dom_coll.get_uid_properties_names(uids[0]),
+        ],
+        "mode": ["Filter: ", ["mean", "median"]],
+        "radius": ["Search radius: ", 1.0],
+        "k": ["Maximum number of neighbours: ", 30],
+    }
+    dialog = multiple_input_dialog(title="Colour filter", input_dict=input_dict)
+    if dialog is None:
+        return
+    for uid in uids:
+        vtk_obj = self.parent.dom_coll.get_uid_vtk_obj(uid)
+        if dialog["prop_name"] not in vtk_obj.point_data_keys:
+            print(f"{dialog['prop_name']} not found in {uid}")
+            continue
+        add_neighbour_property(
+            self,
+            uid=uid,
+            property_name=dialog["prop_name"] + "_" + dialog["mode"],
+            values=colour_filter(
+                vtk_obj=vtk_obj,
+                property_name=dialog["prop_name"],
+                radius=dialog["radius"],
+                k=dialog["k"],
+                mode=dialog["mode"],
+            ),
+        )
+    self.clear_selection()
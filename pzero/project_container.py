@@ -0,0 +1,502 @@
+"""project_container.py
+PZero© Andrea Bistacchi"""
+
+import os
+from io import StringIO
+from json import dumps as json_dumps
+from json import loads as json_loads
+from weakref import WeakSet
+from zipfile import ZIP_DEFLATED, ZipFile
+
+from numpy import array as np_array
+from numpy import empty as np_empty
+from numpy import int64 as np_int64
+from numpy import prod as np_prod
+from numpy.lib.format import read_array as np_read_array
+from numpy.lib.format import write_array as np_write_array
+from vtk import (
+    vtkCellArray,
+    vtkDataArray,
+    vtkImageData,
+    vtkPoints,
+    vtkPolyData,
+    vtkStringArray,
+    vtkStructuredGrid,
+    vtkUnstructuredGrid,
+    VTK_UNSIGNED_CHAR,
+)
+from vtkmodules.util.numpy_support import (
+    numpy_to_vtk,
+    numpy_to_vtkIdTypeArray,
+    vtk_to_numpy,
+)
+
+from pzero.project_io import (
+    FolderRevision,
+    LazyVtkObj,
+    read_project_file,
+    save_revision,
+    table_text,
+    write_project_file,
+)
+
+"""Single-file container for PZero projects, saved with the .p0c extension as an alternative to the
+.p0 file plus <name>_p0 folder.
+
+The container is a zip archive. index.json describes the revision and the layout of each entity,
+tables/ holds the legends and collection tables as the same JSON written in rev_<date-time> folders, and
+entities/<uid>/ holds points, cells and properties of each entity as numpy .npy blocks. Bulk arrays are
+split in chunks of at most chunk_mb, each compressed on its own, so that any range of rows (e.g. a part of
+a large point cloud) is read by seeking through the zip central directory, without decompressing the rest
+of the file. The entity layout depends only on the VTK data type, so every class in entities_factory is
+stored in the same way."""
+
+"""Format name and version written in index.json, and names of the members of the archive."""
+container_format = "PZero container"
+container_version = 1
+index_member = "index.json"
+tables_folder = "tables/"
+entities_folder = "entities/"
+
+"""Default size of the chunks of bulk arrays in MB, and zlib compression level (1 is the fastest)."""
+chunk_mb_default = 64
+compresslevel_default = 1
+
+"""VTK data types that can be stored in a container, with the extension used in project folders."""
+vtk_data_types = {
+    "vtkPolyData": (vtkPolyData, ".vtp"),
+    "vtkStructuredGrid": (vtkStructuredGrid, ".vts"),
+    "vtkImageData": (vtkImageData, ".vti"),
+    "vtkUnstructuredGrid": (vtkUnstructuredGrid, ".vtu"),
+}
+
+"""Containers currently open for reading, closed before a container is replaced on disk."""
+open_containers = WeakSet()
+
+
+def vtk_data_type(vtk_obj=None):
+    """Name of the VTK data type of vtk_obj, one of the keys of vtk_data_types."""
+    for data_type, (vtk_class, _) in vtk_data_types.items():
+        if isinstance(vtk_obj, vtk_class):
+            return data_type
+    raise TypeError(
+        "entities of class "
+        + vtk_obj.GetClassName()
+        + " cannot be stored in a container"
+    )
+
+
+def entity_arrays(vtk_obj=None):
+    """Split vtk_obj in a dict of geometry parameters and a list of (spec, numpy array) tuples
+    with points, cells and properties. spec is a dict with the key of the array in the container
+    and, for properties, the information needed to build the VTK array again."""
+    data_type = vtk_data_type(vtk_obj)
+    geometry = {}
+    arrays = []
+    if data_type == "vtkImageData":
+        geometry["extent"] = list(vtk_obj.GetExtent())
+        geometry["origin"] = list(vtk_obj.GetOrigin())
+        geometry["spacing"] = list(vtk_obj.GetSpacing())
+        matrix = vtk_obj.GetDirectionMatrix()
+        geometry["direction"] = [matrix.GetElement(i // 3, i % 3) for i in range(9)]
+    else:
+        if data_type == "vtkStructuredGrid":
+            geometry["extent"] = list(vtk_obj.GetExtent())
+        if vtk_obj.GetPoints() and vtk_obj.GetNumberOfPoints() > 0:
+            points = vtk_obj.GetPoints().GetData()
+            arrays.append(
+                ({"key": "points", "name": points.GetName()}, vtk_to_numpy(points))
+            )
+    if data_type == "vtkPolyData":
+        cell_arrays = [
+            ("verts", vtk_obj.GetVerts()),
+            ("lines", vtk_obj.GetLines()),
+            ("polys", vtk_obj.GetPolys()),
+            ("strips", vtk_obj.GetStrips()),
+        ]
+    elif data_type == "vtkUnstructuredGrid":
+        cell_arrays = [("cells", vtk_obj.GetCells())]
+        if vtk_obj.GetCellTypesArray():
+            arrays.append(
+                ({"key": "cell_types"}, vtk_to_numpy(vtk_obj.GetCellTypesArray()))
+            )
+    else:
+        cell_arrays = []
+    for name, cell_array in cell_arrays:
+        if cell_array and cell_array.GetNumberOfCells() > 0:
+            arrays.append(
+                ({"key": name + "_offsets"}, vtk_to_numpy(cell_array.GetOffsetsArray()))
+            )
+            arrays.append(
+                (
+                    {"key": name + "_connectivity"},
+                    vtk_to_numpy(cell_array.GetConnectivityArray()),
+                )
+            )
+    for location, data in [
+        ("point", vtk_obj.GetPointData()),
+        ("cell", vtk_obj.GetCellData()),
+        ("field", vtk_obj.GetFieldData()),
+    ]:
+        for i in range(data.GetNumberOfArrays()):
+            array = data.GetAbstractArray(i)
+            spec = {
+                "key": location + "_data_" + str(i),
+                "location": location,
+                "name": array.GetName(),
+                "vtk_class": array.GetClassName(),
+                "data_type": array.GetDataType(),
+                "components": array.GetNumberOfComponents(),
+                "attribute": data.IsArrayAnAttribute(i) if location != "field" else -1,
+            }
+            if isinstance(array, vtkStringArray):
+                values = np_array(
+                    [array.GetValue(j) for j in range(array.GetNumberOfValues())],
+                    dtype=str,
+                )
+            elif isinstance(array, vtkDataArray):
+                values = vtk_to_numpy(array)
+            else:
+                raise TypeError(
+                    "arrays of class "
+                    + array.GetClassName()
+                    + " cannot be stored in a container"
+                )
+            arrays.append((spec, values))
+    return geometry, arrays
+
+
+def set_entity_arrays(vtk_obj=None, geometry=None, arrays=None):
+    """Fill the empty vtk_obj with the geometry and the arrays returned by entity_arrays.
+    arrays is a list of (spec, numpy array) tuples. Returns vtk_obj."""
+    data_type = vtk_data_type(vtk_obj)
+    values = {spec["key"]: array for spec, array in arrays}
+    if data_type == "vtkImageData":
+        vtk_obj.SetExtent(geometry["extent"])
+        vtk_obj.SetOrigin(geometry["origin"])
+        vtk_obj.SetSpacing(geometry["spacing"])
+        vtk_obj.SetDirectionMatrix(geometry["direction"])
+    elif data_type == "vtkStructuredGrid":
+        vtk_obj.SetExtent(geometry["extent"])
+    if "points" in values:
+        points = vtkPoints()
+        points.SetData(numpy_to_vtk(values["points"], deep=True))
+        points.GetData().SetName(
+            [spec for spec, _ in arrays if spec["key"] == "points"][0]["name"]
+        )
+        vtk_obj.SetPoints(points)
+
+    def cell_array(name):
+        cells = vtkCellArray()
+        cells.SetData(
+            numpy_to_vtkIdTypeArray(
+                values[name + "_offsets"].astype(np_int64), deep=True
+            ),
+            numpy_to_vtkIdTypeArray(
+                values[name + "_connectivity"].astype(np_int64), deep=True
+            ),
+        )
+        return cells
+
+    if data_type == "vtkPolyData":
+        for name, setter in [
+            ("verts", vtk_obj.SetVerts),
+            ("lines", vtk_obj.SetLines),
+            ("polys", vtk_obj.SetPolys),
+            ("strips", vtk_obj.SetStrips),
+        ]:
+            if name + "_offsets" in values:
+                setter(cell_array(name))
+    elif data_type == "vtkUnstructuredGrid" and "cells_offsets" in values:
+        vtk_obj.SetCells(
+            numpy_to_vtk(values["cell_types"], deep=True, array_type=VTK_UNSIGNED_CHAR),
+            cell_array("cells"),
+        )
+    data = {
+        "point": vtk_obj.GetPointData(),
+        "cell": vtk_obj.GetCellData(),
+        "field": vtk_obj.GetFieldData(),
+    }
+    for spec, array in arrays:
+        if "location" not in spec:
+            continue
+        if spec["vtk_class"] == "vtkStringArray":
+            vtk_array = vtkStringArray()
+            vtk_array.SetNumberOfComponents(spec["components"])
+            vtk_array.SetNumberOfValues(len(array))
+            for j, value in enumerate(array):
+                vtk_array.SetValue(j, str(value))
+        else:
+            vtk_array = numpy_to_vtk(array, deep=True, array_type=spec["data_type"])
+            vtk_array.SetNumberOfComponents(spec["components"])
+        vtk_array.SetName(spec["name"])
+        index = data[spec["location"]].AddArray(vtk_array)
+        if spec["attribute"] >= 0:
+            data[spec["location"]].SetActiveAttribute(index, spec["attribute"])
+    vtk_obj.Modified()
+    return vtk_obj
+
+
+def array_member(uid=None, key=None, chunk=None):
+    """Name of the archive member with chunk number chunk of array key of entity uid."""
+    return entities_folder + uid + "/" + key + "/" + str(chunk) + ".npy"
+
+
+def write_container(
+    file_name=None,
+    tables=None,
+    entities=None,
+    revision=None,
+    chunk_mb=None,
+    compresslevel=None,
+    callback=None,
+):
+    """Write a project container to file_name.
+    tables is an iterable of (name, table) tuples as in save_revision. entities is an iterable
+    of (uid, extension, vtk_obj) tuples as in store_vtk_entities, and vtk_obj can be a LazyVtkObj.
+    revision is the name of the saved revision (rev_<date-time>). callback, if given, is called with
+    the uid of each entity once it has been written. The container is written with a .partial suffix
+    and renamed when complete, as entity files in project folders."""
+    if chunk_mb is None:
+        chunk_mb = chunk_mb_default
+    if compresslevel is None:
+        compresslevel = compresslevel_default
+    chunk_bytes = int(chunk_mb * 1048576)
+    index = {
+        "format": container_format,
+        "version": container_version,
+        "revision": revision,
+        "tables": [],
+        "entities": {},
+    }
+    partial_file_name = file_name + ".partial"
+    try:
+        with ZipFile(
+            partial_file_name,
+            "w",
+            compression=ZIP_DEFLATED,
+            compresslevel=compresslevel,
+        ) as zip_file:
+            for name, table in tables:
+                zip_file.writestr(tables_folder + name, table_text(table))
+                index["tables"].append(name)
+            for uid, extension, vtk_obj in entities:
+                if isinstance(vtk_obj, LazyVtkObj):
+                    lazy_obj = vtk_obj
+                    vtk_obj = lazy_obj.load()
+                else:
+                    lazy_obj = None
+                geometry, arrays = entity_arrays(vtk_obj)
+                specs = []
+                for spec, values in arrays:
+                    """Rows of the same chunk are contiguous along the first axis."""
+                    row_bytes = values.itemsize * int(np_prod(values.shape[1:]))
+                    chunk_rows = max(1, chunk_bytes // max(1, row_bytes))
+                    n_chunks = max(1, -(-len(values) // chunk_rows))
+                    for chunk in range(n_chunks):
+                        block = values[chunk * chunk_rows : (chunk + 1) * chunk_rows]
+                        with zip_file.open(
+                            array_member(uid, spec["key"], chunk),
+                            "w",
+                            force_zip64=block.nbytes > 1073741824,
+                        ) as fout:
+                            np_write_array(fout, block, allow_pickle=False)
+                    spec.update(
+                        {
+                            "dtype": values.dtype.str,
+                            "shape": list(values.shape),
+                            "chunk_rows": chunk_rows,
+                            "n_chunks": n_chunks,
+                        }
+                    )
+                    specs.append(spec)
+                index["entities"][uid] = {
+                    "data_type": vtk_data_type(vtk_obj),
+                    "extension": extension,
+                    "geometry": geometry,
+                    "arrays": specs,
+                }
+                if lazy_obj:
+                    lazy_obj.unload()
+                if callback:
+                    callback(uid)
+            zip_file.writestr(index_member, json_dumps(index, indent=0))
+    except BaseException:
+        if os.path.isfile(partial_file_name):
+            os.remove(partial_file_name)
+        raise
+    """Placeholders of a project opened from file_name read it again after it has been replaced."""
+    for container in list(open_containers):
+        if os.path.abspath(container.file_name) == os.path.abspath(file_name):
+            container.close()
+    os.replace(partial_file_name, file_name)
+
+
+class ContainerRevision:
+    """Tables and entities of the project container file_name, with the same interface as
+    FolderRevision. The archive is kept open while entities are read, and opened again
+    on demand after close()."""
+
+    def __init__(self, file_name=None):
+        self.file_name = file_name
+        self._zip_file = None
+        open_containers.add(self)
+        self.index = json_loads(self.zip_file.read(index_member))
+        if self.index.get("format") != container_format:
+            raise ValueError(file_name + " is not a PZero project container")
+        if self.index["version"] > container_version:
+            raise ValueError(
+                file_name + " was saved by a newer version of PZero, please update"
+            )
+
+    @property
+    def zip_file(self):
+        if self._zip_file is None:
+            self._zip_file = ZipFile(self.file_name, "r")
+        return self._zip_file
+
+    def close(self):
+        if self._zip_file is not None:
+            self._zip_file.close()
+            self._zip_file = None
+
+    @property
+    def revision(self):
+        return self.index["revision"]
+
+    def has_table(self, name=None):
+        return name in self.index["tables"]
+
+    def table(self, name=None):
+        """Buffer with the text of table name, to be read with pd_read_json or pd_read_csv."""
+        return StringIO(self.zip_file.read(tables_folder + name).decode("utf-8"))
+
+    def table_names(self):
+        return list(self.index["tables"])
+
+    def has_entity(self, uid=None, extension=None):
+        return (
+            uid in self.index["entities"]
+            and self.index["entities"][uid]["extension"] == extension
+        )
+
+    def entity(self, uid=None, extension=None, vtk_obj=None):
+        """ContainerVtkObj placeholder that reads entity uid into vtk_obj."""
+        return ContainerVtkObj(vtk_obj=vtk_obj, container=self, uid=uid)
+
+    def entity_uids(self):
+        """List of (uid, extension) tuples of the entities of the revision."""
+        return [
+            (uid, entry["extension"]) for uid, entry in self.index["entities"].items()
+        ]
+
+    def array_spec(self, uid=None, key=None):
+        for spec in self.index["entities"][uid]["arrays"]:
+            if spec["key"] == key:
+                return spec
+        raise KeyError(key)
+
+    def read_array(self, uid=None, key=None, start=None, stop=None):
+        """Read rows start:stop of array key of entity uid (all rows by default). Only the chunks
+        that overlap the requested rows are decompressed."""
+        spec = self.array_spec(uid=uid, key=key)
+        start, stop, _ = slice(start, stop).indices(spec["shape"][0])
+        stop = max(start, stop)
+        out = np_empty([stop - start] + spec["shape"][1:], dtype=spec["dtype"])
+        chunk_rows = spec["chunk_rows"]
+        for chunk in range(start // chunk_rows, -(-stop // chunk_rows)):
+            with self.zip_file.open(array_member(uid, key, chunk)) as fin:
+                block = np_read_array(fin, allow_pickle=False)
+            first = chunk * chunk_rows
+            lo = max(start, first)
+            hi = min(stop, first + len(block))
+            out[lo - start : hi - start] = block[lo - first : hi - first]
+        return out
+
+    def read_entity(self, uid=None, vtk_obj=None):
+        """Read entity uid into the empty vtk_obj and return it. vtk_obj defaults to a plain
+        VTK object of the stored data type."""
+        entry = self.index["entities"][uid]
+        if vtk_obj is None:
+            vtk_obj = vtk_data_types[entry["data_type"]][0]()
+        arrays = [
+            (spec, self.read_array(uid=uid, key=spec["key"]))
+            for spec in entry["arrays"]
+        ]
+        return set_entity_arrays(
+            vtk_obj=vtk_obj, geometry=entry["geometry"], arrays=arrays
+        )
+
+
+class ContainerVtkObj(LazyVtkObj):
+    """Placeholder for an entity stored in a project container. See LazyVtkObj."""
+
+    def __init__(self, vtk_obj=None, container=None, uid=None):
+        super().__init__(vtk_obj=vtk_obj, file_name=container.file_name)
+        self.container = container
+        self.uid = uid
+
+    @property
+    def extension(self):
+        return self.container.index["entities"][self.uid]["extension"]
+
+    @property
+    def object_name(self):
+        """Entities of a container are not in an object store."""
+        return None
+
+    def load(self):
+        """Read the entity into vtk_obj and return it."""
+        self.vtk_obj.Initialize()
+        self.container.read_entity(uid=self.uid, vtk_obj=self.vtk_obj)
+        return self.vtk_obj
+
+
+def convert_project(in_file_name=None, out_file_name=None, callback=None):
+    """Convert the last revision of a project between the .p0 file plus <name>_p0 folder format and
+    the .p0c container format, in the direction given by the extension of in_file_name. Entities are
+    converted with their VTK data type, so no information on PZero classes is needed. callback is
+    the same as in write_container. Returns the number of converted entities."""
+    if in_file_name.endswith(".p0c"):
+        revision = ContainerRevision(file_name=in_file_name)
+        rev_name = revision.revision
+    else:
+        rev_name = read_project_file(in_file_name)
+        revision = FolderRevision(rev_dir_name=in_file_name[:-3] + "_p0/" + rev_name)
+    vtk_classes = {
+        extension: vtk_class for vtk_class, extension in vtk_data_types.values()
+    }
+
+    def read_table(name):
+        table = revision.table(name)
+        if isinstance(table, StringIO):
+            return table.getvalue()
+        with open(table, "r", encoding="utf-8") as fin:
+            return fin.read()
+
+    def entities():
+        for uid, extension in revision.entity_uids():
+            yield uid, extension, revision.entity(
+                uid=uid, extension=extension, vtk_obj=vtk_classes[extension]()
+            )
+
+    tables = [(name, read_table(name)) for name in revision.table_names()]
+    if out_file_name.endswith(".p0c"):
+        write_container(
+            file_name=out_file_name,
+            tables=tables,
+            entities=entities(),
+            revision=rev_name,
+            callback=callback,
+        )
+    else:
+        save_revision(
+            project_dir_name=out_file_name[:-3] + "_p0",
+            rev_name=rev_name,
+            tables=tables,
+            entities=entities(),
+            workers=0,
+            callback=callback,
+        )
+        write_project_file(out_file_name, rev_name)
+    return len(revision.entity_uids())
@@ -0,0 +1,709 @@
+"""project_io.py
+PZero© Andrea Bistacchi"""
+
+import os
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from copy import copy
+from hashlib import sha256
+from json import dump as json_dump
+from json import load as json_load
+from multiprocessing import get_context
+from re import DOTALL
+from re import compile as re_compile
+from shutil import rmtree
+
+from vtk import (
+    vtkXMLPolyDataWriter,
+    vtkXMLStructuredGridWriter,
+    vtkXMLImageDataWriter,
+    vtkXMLUnstructuredGridWriter,
+    vtkXMLPolyDataReader,
+    vtkXMLStructuredGridReader,
+    vtkXMLImageDataReader,
+    vtkXMLUnstructuredGridReader,
+)
+
+"""Engine used to write the entities of a project to disk.
+
+Saving is split in two stages. On the calling (GUI) thread every vtk_obj is serialized to an uncompressed
+XML string, that is fast and makes the buffer independent of any later editing of the entity. Buffers are
+then handed to a bounded pool of worker processes that parse them back, compress them with the standard
+VTK ZLib compressor, and write the .vtp/.vts/.vti files. Tables, legends and the manifest of a revision
+are written in a hidden staging folder that is renamed to the final rev_<date-time> folder only when all
+writers have finished, so a failed or interrupted save never leaves a partial revision behind."""
+
+"""Default number of worker processes used to write entity files, leaving a CPU to the GUI. Set to 0
+to write sequentially on the calling thread, as in older versions of PZero, that is the default with up
+to 2 CPUs, since a single worker only adds the cost of starting it and of parsing buffers again."""
+save_workers_default = (
+    0 if (os.cpu_count() or 1) <= 2 else min(4, (os.cpu_count() or 1) - 1)
+)
+
+"""VTK XML writers and readers used for each file extension found in the project folder."""
+vtk_xml_writers = {
+    ".vtp": vtkXMLPolyDataWriter,
+    ".vts": vtkXMLStructuredGridWriter,
+    ".vti": vtkXMLImageDataWriter,
+    ".vtu": vtkXMLUnstructuredGridWriter,
+}
+
+vtk_xml_readers = {
+    ".vtp": vtkXMLPolyDataReader,
+    ".vts": vtkXMLStructuredGridReader,
+    ".vti": vtkXMLImageDataReader,
+    ".vtu": vtkXMLUnstructuredGridReader,
+}
+
+
+def write_vtk_file(vtk_obj=None, extension=None, file_name=None):
+    """Write a VTK object to file with the default (compressed) settings of the VTK XML writers.
+    This is the sequential path used when no workers are requested."""
+    writer = vtk_xml_writers[extension]()
+    writer.SetFileName(file_name)
+    writer.SetInputData(vtk_obj)
+    writer.Write()
+
+
+def serialize_vtk_obj(vtk_obj=None, extension=None):
+    """Serialize a VTK object to an uncompressed VTK XML string. Appended data are base64-encoded,
+    so the output is a plain str that can be pickled and sent to another process."""
+    writer = vtk_xml_writers[extension]()
+    writer.WriteToOutputStringOn()
+    writer.SetCompressorTypeToNone()
+    writer.SetDataModeToAppended()
+    writer.EncodeAppendedDataOn()
+    writer.SetInputData(vtk_obj)
+    writer.Write()
+    return writer.GetOutputString()
+
+
+def write_vtk_buffer(buffer=None, extension=None, file_name=None, compress=True):
+    """Write a buffer produced by serialize_vtk_obj to file. This runs in the worker pool.
+    With compress=True the buffer is parsed and written again with the ZLib compressor, so the
+    output files are equivalent to the ones written by write_vtk_file. The file is written with
+    a .partial suffix and renamed when complete, so an interrupted writer never leaves a truncated
+    file under the final name. Returns the file name."""
+    partial_file_name = file_name + ".partial"
+    if compress:
+        reader = vtk_xml_readers[extension]()
+        reader.ReadFromInputStringOn()
+        reader.SetInputString(buffer)
+        reader.Update()
+        write_vtk_file(
+            vtk_obj=reader.GetOutput(),
+            extension=extension,
+            file_name=partial_file_name,
+        )
+    else:
+        with open(partial_file_name, "w") as fout:
+            fout.write(buffer)
+    os.replace(partial_file_name, file_name)
+    return file_name
+
+
+def staging_dir_name(out_dir_name=None):
+    """Name of the hidden folder where a revision is written before being committed."""
+    head, tail = os.path.split(os.path.normpath(out_dir_name))
+    return os.path.join(head, "." + tail + ".partial")
+
+
+def begin_revision(out_dir_name=None):
+    """Create an empty staging folder for the revision out_dir_name and return its path.
+    A stale staging folder left by an interrupted save is removed first."""
+    staging_dir = staging_dir_name(out_dir_name)
+    if os.path.isdir(staging_dir):
+        rmtree(staging_dir)
+    os.makedirs(staging_dir)
+    return staging_dir
+
+
+def commit_revision(out_dir_name=None, replace=False):
+    """Atomically rename the staging folder to the final revision folder. With replace=True
+    an existing revision with the same name (e.g. the autosave revision) is replaced."""
+    if replace and os.path.isdir(out_dir_name):
+        old_dir_name = staging_dir_name(out_dir_name)[: -len(".partial")] + ".old"
+        if os.path.isdir(old_dir_name):
+            rmtree(old_dir_name)
+        os.rename(out_dir_name, old_dir_name)
+        os.rename(staging_dir_name(out_dir_name), out_dir_name)
+        rmtree(old_dir_name)
+    else:
+        os.rename(staging_dir_name(out_dir_name), out_dir_name)
+
+
+def abort_revision(out_dir_name=None):
+    """Remove the staging folder after a failed save."""
+    rmtree(staging_dir_name(out_dir_name), ignore_errors=True)
+
+
+def write_vtk_buffers(jobs=None, workers=None, compress=True, callback=None):
+    """Write buffers produced by serialize_vtk_obj to file.
+    jobs is an iterable of (uid, extension, buffer, file_name) tuples, consumed lazily so that at
+    most 2 * workers buffers are kept in memory at the same time. A job with buffer None has nothing
+    to write (e.g. the file is already in the object store) and only triggers the callback.
+    workers is the size of the process pool (0 to write on the calling thread). callback, if given,
+    is called with the uid of each job once its file has been written. Exceptions raised by writers
+    are re-raised here after the pool has been shut down."""
+    if workers is None:
+        workers = save_workers_default
+    if workers == 0:
+        for uid, extension, buffer, file_name in jobs:
+            if buffer is not None:
+                write_vtk_buffer(buffer, extension, file_name, compress)
+            if callback:
+                callback(uid)
+        return
+    """The pool is started only when the first buffer must be written, so that saving a project
+    where nothing changed does not pay the start-up of the worker processes. Spawn is used instead
+    of fork since the parent is a Qt application with running threads."""
+    pool = None
+    pending = {}
+    try:
+        for uid, extension, buffer, file_name in jobs:
+            if buffer is None:
+                if callback:
+                    callback(uid)
+                continue
+            if pool is None:
+                pool = ProcessPoolExecutor(
+                    max_workers=workers, mp_context=get_context("spawn")
+                )
+            if len(pending) >= 2 * workers:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    future.result()
+                    done_uid = pending.pop(future)
+                    if callback:
+                        callback(done_uid)
+            future = pool.submit(
+                write_vtk_buffer, buffer, extension, file_name, compress
+            )
+            pending[future] = uid
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                future.result()
+                done_uid = pending.pop(future)
+                if callback:
+                    callback(done_uid)
+    finally:
+        if pool is not None:
+            pool.shutdown(wait=True)
+
+
+def save_vtk_entities(
+    entities=None, out_dir_name=None, workers=None, compress=True, callback=None
+):
+    """Write all entities to out_dir_name.
+    entities is an iterable of (uid, extension, vtk_obj) tuples, and each entity is written
+    to <out_dir_name>/<uid><extension>. workers is the size of the process pool (default
+    save_workers_default, 0 to write sequentially on the calling thread). callback, if given,
+    is called with the uid of each entity once its file has been written."""
+    if workers is None:
+        workers = save_workers_default
+    if workers == 0:
+        for uid, extension, vtk_obj in entities:
+            write_vtk_file(
+                vtk_obj=vtk_obj,
+                extension=extension,
+                file_name=os.path.join(out_dir_name, uid + extension),
+            )
+            if callback:
+                callback(uid)
+        return
+    jobs = (
+        (
+            uid,
+            extension,
+            serialize_vtk_obj(vtk_obj=vtk_obj, extension=extension),
+            os.path.join(out_dir_name, uid + extension),
+        )
+        for uid, extension, vtk_obj in entities
+    )
+    write_vtk_buffers(jobs=jobs, workers=workers, compress=compress, callback=callback)
+
+
+"""--------------------- OBJECT STORE ---------------------
+
+Entity files are stored once in <name>_p0/objects/<key[:2]>/<key><extension>, where key is the SHA-256
+of the uncompressed XML serialization of the vtk_obj. Each rev_<date-time> folder contains the tables,
+the legends and a manifest.json file that maps every uid to the name of its object, so an entity that
+did not change since the previous save costs only its serialization and hashing. Old revisions saved
+with one file per entity inside the revision folder (without manifest) are still read, and can be
+moved to the object store with migrate_project.
+
+Data derived from an entity and shared by all revisions, such as the level of detail octrees of point
+clouds (see lod_octree.py), are stored in <name>_p0/lod/<uid>."""
+
+"""Name of the object store folder inside <name>_p0, and of the manifest inside each revision."""
+objects_folder = "objects"
+manifest_file = "manifest.json"
+
+"""Name of the folder of level of detail octrees inside <name>_p0."""
+lod_folder = "lod"
+
+"""Patterns used to normalize the XML header of a buffer before hashing."""
+information_key_pattern = re_compile(r"\s*<InformationKey.*?</InformationKey>", DOTALL)
+empty_data_array_pattern = re_compile(r">\s*</DataArray>")
+
+
+def objects_dir_name(project_dir_name=None):
+    """Path of the object store of the project folder <name>_p0."""
+    return os.path.join(project_dir_name, objects_folder)
+
+
+def lod_dir_name(project_dir_name=None, uid=None):
+    """Path of the level of detail octree of entity uid in the project folder <name>_p0."""
+    return os.path.join(project_dir_name, lod_folder, uid)
+
+
+def object_key(buffer=None):
+    """Content hash of a buffer produced by serialize_vtk_obj. VTK writes information keys
+    (e.g. the cached L2 norm range of an array) only once they have been computed, so they
+    are removed from the XML header before hashing. The appended data are hashed as they are.
+    """
+    header_end = buffer.find("<AppendedData")
+    if header_end < 0:
+        header_end = len(buffer)
+    header = information_key_pattern.sub("", buffer[:header_end])
+    header = empty_data_array_pattern.sub("/>", header)
+    key = sha256(header.encode("utf-8"))
+    key.update(buffer[header_end:].encode("utf-8"))
+    return key.hexdigest()
+
+
+def object_file_name(objects_dir=None, object_name=None):
+    """Path of object_name (<key><extension>) in the object store. Objects are sharded in
+    sub-folders named after the first two characters of the key, to keep folders small.
+    """
+    return os.path.join(objects_dir, object_name[:2], object_name)
+
+
+def store_vtk_entities(entities=None, objects_dir=None, workers=None, callback=None):
+    """Write the entities that are not yet in the object store objects_dir and return
+    the manifest of the revision, a dict {uid: object_name}.
+    entities, workers and callback are the same as in save_vtk_entities, and callback is
+    called also for entities whose object was already stored. vtk_obj can be a LazyVtkObj.
+    """
+    manifest = {}
+
+    def jobs():
+        scheduled = set()
+        for uid, extension, vtk_obj in entities:
+            if isinstance(vtk_obj, LazyVtkObj):
+                """Entities not read yet are already in the object store, unless they come
+                from an old revision, and in this case they are read just to be stored.
+                """
+                if vtk_obj.object_name and os.path.isfile(
+                    object_file_name(objects_dir, vtk_obj.object_name)
+                ):
+                    manifest[uid] = vtk_obj.object_name
+                    yield uid, extension, None, None
+                    continue
+                buffer = serialize_vtk_obj(vtk_obj=vtk_obj.load(), extension=extension)
+                vtk_obj.unload()
+            else:
+                buffer = serialize_vtk_obj(vtk_obj=vtk_obj, extension=extension)
+            object_name = object_key(buffer) + extension
+            manifest[uid] = object_name
+            file_name = object_file_name(objects_dir, object_name)
+            if object_name in scheduled or os.path.isfile(file_name):
+                yield uid, extension, None, file_name
+            else:
+                scheduled.add(object_name)
+                os.makedirs(os.path.dirname(file_name), exist_ok=True)
+                yield uid, extension, buffer, file_name
+
+    write_vtk_buffers(jobs=jobs(), workers=workers, callback=callback)
+    return manifest
+
+
+def table_text(table=None):
+    """JSON text of a table of a revision, given as a DataFrame or as text already."""
+    if isinstance(table, str):
+        return table
+    return table.to_json(orient="index")
+
+
+def save_revision(
+    project_dir_name=None,
+    rev_name=None,
+    tables=None,
+    entities=None,
+    workers=None,
+    callback=None,
+    replace=False,
+):
+    """Save a complete revision rev_name of the project folder project_dir_name, with entities in
+    the object store of the project, and return its manifest.
+    tables is an iterable of (name, table) tuples, where name is the file name in the revision folder
+    (e.g. geological_table.json) and table a DataFrame or its JSON text. entities, workers and
+    callback are the same as in store_vtk_entities. The revision is committed only if all files
+    have been written, replacing an existing revision with the same name if replace=True.
+    """
+    out_dir_name = os.path.join(project_dir_name, rev_name)
+    staging_dir = begin_revision(out_dir_name)
+    try:
+        for name, table in tables:
+            with open(os.path.join(staging_dir, name), "w", encoding="utf-8") as fout:
+                fout.write(table_text(table))
+        manifest = store_vtk_entities(
+            entities=entities,
+            objects_dir=objects_dir_name(project_dir_name),
+            workers=workers,
+            callback=callback,
+        )
+        write_manifest(manifest, staging_dir)
+    except BaseException:
+        abort_revision(out_dir_name)
+        raise
+    commit_revision(out_dir_name, replace=replace)
+    return manifest
+
+
+def write_manifest(manifest=None, rev_dir_name=None):
+    """Write the manifest of a revision as a JSON file."""
+    with open(os.path.join(rev_dir_name, manifest_file), "w") as fout:
+        json_dump(manifest, fout, indent=0, sort_keys=True)
+
+
+def read_manifest(rev_dir_name=None):
+    """Read the manifest of a revision. Returns an empty dict for revisions saved
+    before the object store was introduced."""
+    if not os.path.isfile(os.path.join(rev_dir_name, manifest_file)):
+        return {}
+    with open(os.path.join(rev_dir_name, manifest_file), "r") as fin:
+        return json_load(fin)
+
+
+def entity_file_name(rev_dir_name=None, manifest=None, uid=None, extension=None):
+    """Path of the VTK file of entity uid in revision rev_dir_name, found through the manifest
+    if the entity is in the object store or in the revision folder itself otherwise."""
+    if uid in manifest:
+        return object_file_name(
+            objects_dir_name(os.path.dirname(os.path.normpath(rev_dir_name))),
+            manifest[uid],
+        )
+    return os.path.join(rev_dir_name, uid + extension)
+
+
+def revision_dir_names(project_dir_name=None):
+    """List the revision folders of a project, including staging folders of saves in progress."""
+    return [
+        os.path.join(project_dir_name, name)
+        for name in sorted(os.listdir(project_dir_name))
+        if name not in [objects_folder, lod_folder]
+        and os.path.isdir(os.path.join(project_dir_name, name))
+    ]
+
+
+def collect_garbage(project_dir_name=None):
+    """Remove objects not referenced by the manifest of any revision, level of detail octrees of
+    entities not found in any manifest, and temporary files left by interrupted saves. Returns the
+    number of removed files and the number of bytes freed.
+    """
+    referenced = set()
+    referenced_uids = set()
+    for rev_dir_name in revision_dir_names(project_dir_name):
+        manifest = read_manifest(rev_dir_name)
+        referenced.update(manifest.values())
+        referenced_uids.update(manifest)
+    n_removed = 0
+    n_bytes = 0
+    lod_dir = os.path.join(project_dir_name, lod_folder)
+    if os.path.isdir(lod_dir):
+        for uid in os.listdir(lod_dir):
+            if uid in referenced_uids:
+                continue
+            for name in os.listdir(os.path.join(lod_dir, uid)):
+                n_bytes += os.path.getsize(os.path.join(lod_dir, uid, name))
+                n_removed += 1
+            rmtree(os.path.join(lod_dir, uid))
+    objects_dir = objects_dir_name(project_dir_name)
+    if not os.path.isdir(objects_dir):
+        return n_removed, n_bytes
+    for shard in os.listdir(objects_dir):
+        shard_dir = os.path.join(objects_dir, shard)
+        for name in os.listdir(shard_dir):
+            if name in referenced:
+                continue
+            n_bytes += os.path.getsize(os.path.join(shard_dir, name))
+            os.remove(os.path.join(shard_dir, name))
+            n_removed += 1
+        if not os.listdir(shard_dir):
+            os.rmdir(shard_dir)
+    return n_removed, n_bytes
+
+
+def migrate_revision(rev_dir_name=None, callback=None):
+    """Move the VTK files of a revision saved without manifest into the object store of its
+    project and write the manifest. Files are parsed and hashed as in store_vtk_entities, so
+    identical entities of different revisions end up in the same object. Returns the number of
+    migrated files, 0 if the revision already has a manifest."""
+    if os.path.isfile(os.path.join(rev_dir_name, manifest_file)):
+        return 0
+    objects_dir = objects_dir_name(os.path.dirname(os.path.normpath(rev_dir_name)))
+    manifest = {}
+    for name in sorted(os.listdir(rev_dir_name)):
+        uid, extension = os.path.splitext(name)
+        if extension not in vtk_xml_readers:
+            continue
+        reader = vtk_xml_readers[extension]()
+        reader.SetFileName(os.path.join(rev_dir_name, name))
+        reader.Update()
+        object_name = (
+            object_key(
+                serialize_vtk_obj(vtk_obj=reader.GetOutput(), extension=extension)
+            )
+            + extension
+        )
+        file_name = object_file_name(objects_dir, object_name)
+        if os.path.isfile(file_name):
+            os.remove(os.path.join(rev_dir_name, name))
+        else:
+            os.makedirs(os.path.dirname(file_name), exist_ok=True)
+            os.replace(os.path.join(rev_dir_name, name), file_name)
+        manifest[uid] = object_name
+        if callback:
+            callback(uid)
+    write_manifest(manifest, rev_dir_name)
+    return len(manifest)
+
+
+def migrate_project(project_dir_name=None, callback=None):
+    """Migrate all revisions of a project to the object store. Returns the number of migrated files."""
+    return sum(
+        migrate_revision(rev_dir_name=rev_dir_name, callback=callback)
+        for rev_dir_name in revision_dir_names(project_dir_name)
+        if not os.path.basename(rev_dir_name).startswith(".")
+    )
+
+
+"""--------------------- REVISIONS ---------------------
+
+open_project reads a revision through an object with the methods has_table, table, has_entity and entity,
+so that the same code reads rev_<date-time> folders (FolderRevision) and single-file project containers
+(ContainerRevision in project_container.py)."""
+
+
+def write_project_file(file_name=None, rev_name=None):
+    """Write the .p0 root file of a project, pointing to its last revision rev_name."""
+    with open(file_name, "w") as fout:
+        fout.write(
+            "PZero project file saved in folder with the same name, including VTK files and CSV tables.\n"
+        )
+        fout.write("Last saved revision:\n")
+        fout.write(rev_name)
+
+
+def read_project_file(file_name=None):
+    """Return the name of the last revision written in the .p0 root file of a project."""
+    with open(file_name, "rt") as fin:
+        return fin.readlines()[2].strip()
+
+
+class FolderRevision:
+    """Tables and entities of the revision folder rev_dir_name. Entities are found through
+    the manifest of the revision, or in the folder itself for old revisions."""
+
+    def __init__(self, rev_dir_name=None):
+        self.rev_dir_name = rev_dir_name
+        self.manifest = read_manifest(rev_dir_name)
+
+    def has_table(self, name=None):
+        return os.path.isfile(os.path.join(self.rev_dir_name, name))
+
+    def table(self, name=None):
+        """Path of table name, to be read with pd_read_json or pd_read_csv."""
+        return os.path.join(self.rev_dir_name, name)
+
+    def table_names(self):
+        return [
+            name
+            for name in sorted(os.listdir(self.rev_dir_name))
+            if os.path.splitext(name)[1] in [".json", ".csv"] and name != manifest_file
+        ]
+
+    def has_entity(self, uid=None, extension=None):
+        return os.path.isfile(
+            entity_file_name(self.rev_dir_name, self.manifest, uid, extension)
+        )
+
+    def entity(self, uid=None, extension=None, vtk_obj=None):
+        """LazyVtkObj placeholder that reads entity uid into vtk_obj."""
+        return LazyVtkObj(
+            vtk_obj=vtk_obj,
+            file_name=entity_file_name(
+                self.rev_dir_name, self.manifest, uid, extension
+            ),
+        )
+
+    def entity_uids(self):
+        """List of (uid, extension) tuples of the entities of the revision."""
+        if self.manifest:
+            return [
+                (uid, os.path.splitext(object_name)[1])
+                for uid, object_name in self.manifest.items()
+            ]
+        return [
+            os.path.splitext(name)
+            for name in sorted(os.listdir(self.rev_dir_name))
+            if os.path.splitext(name)[1] in vtk_xml_readers
+        ]
+
+
+"""--------------------- LAZY LOADING ---------------------
+
+When a project is opened with lazy loading, the vtk_obj column of the collections is filled with
+LazyVtkObj placeholders, and the VTK files are read only when get_uid_vtk_obj is called on an entity for
+the first time (e.g. when a view shows it). VtkObjCache keeps track of the entities read in this way and
+unloads the least recently loaded ones when their memory exceeds a budget."""
+
+
+class LazyVtkObj:
+    """Placeholder for an entity whose data are stored in file_name and have not been read yet.
+    vtk_obj is an empty entity of the right class (e.g. an XsPolyLine already linked to its
+    cross-section), that is filled by load(). The same vtk_obj is returned by every load, so views
+    that keep a reference to an entity keep working after it has been unloaded and read again.
+    """
+
+    def __init__(self, vtk_obj=None, file_name=None):
+        self.vtk_obj = vtk_obj
+        self.file_name = file_name
+
+    @property
+    def extension(self):
+        return os.path.splitext(self.file_name)[1]
+
+    @property
+    def object_name(self):
+        """Name of the object if file_name is in an object store, None for files of old revisions."""
+        if (
+            os.path.basename(os.path.dirname(os.path.dirname(self.file_name)))
+            == objects_folder
+        ):
+            return os.path.basename(self.file_name)
+        return None
+
+    def load(self):
+        """Read file_name into vtk_obj and return it."""
+        reader = vtk_xml_readers[self.extension]()
+        reader.SetFileName(self.file_name)
+        reader.Update()
+        self.vtk_obj.ShallowCopy(reader.GetOutput())
+        self.vtk_obj.Modified()
+        return self.vtk_obj
+
+    def detached(self):
+        """Placeholder that reads the same data into a new empty VTK object, so that it can be
+        loaded e.g. on another thread without touching vtk_obj."""
+        detached = copy(self)
+        detached.vtk_obj = self.vtk_obj.NewInstance()
+        return detached
+
+    def unload(self):
+        """Release the data of vtk_obj."""
+        self.vtk_obj.Initialize()
+        self.vtk_obj.Modified()
+
+
+def data_signature(vtk_obj=None):
+    """Signature of the data of vtk_obj, that changes when its geometry, topology or properties
+    are edited. The MTime of vtk_obj itself is not used, since it changes also when e.g. the
+    active scalars are set to show a property in a view."""
+    signature = [vtk_obj.GetNumberOfPoints(), vtk_obj.GetNumberOfCells()]
+    for getter in ["GetPoints", "GetVerts", "GetLines", "GetPolys", "GetStrips"]:
+        if hasattr(vtk_obj, getter) and getattr(vtk_obj, getter)():
+            signature.append(getattr(vtk_obj, getter)().GetMTime())
+    if hasattr(vtk_obj, "GetSpacing"):
+        signature.extend(
+            [vtk_obj.GetOrigin(), vtk_obj.GetSpacing(), vtk_obj.GetDimensions()]
+        )
+    for data in [vtk_obj.GetPointData(), vtk_obj.GetCellData(), vtk_obj.GetFieldData()]:
+        for i in range(data.GetNumberOfArrays()):
+            array = data.GetAbstractArray(i)
+            signature.append((array.GetName(), array.GetMTime()))
+    return signature
+
+
+class VtkObjCache:
+    """Entities loaded on demand from LazyVtkObj placeholders, in least recently used order.
+    budget_mb is the memory, in MB, above which loaded entities are unloaded (None or 0 for no limit).
+    Only entities that have not been modified since they were loaded, and for which is_shown(uid)
+    is False, are unloaded: their data are released and the LazyVtkObj is placed back in the
+    collection, so they are read again on next access. on_unload(uid), if given, is called after
+    an entity has been unloaded, e.g. to release the data of hidden actors in the views.
+    """
+
+    def __init__(self, budget_mb=None, is_shown=None, on_unload=None):
+        self.budget_mb = budget_mb
+        self.is_shown = is_shown
+        self.on_unload = on_unload
+        """entries is {uid: [collection, lazy_obj, data_signature after loading, memory in bytes]}"""
+        self.entries = OrderedDict()
+        self.n_loads = 0
+        self.n_unloads = 0
+
+    def clear(self):
+        """Forget all entries, e.g. when a new project is opened."""
+        self.entries.clear()
+        self.n_loads = 0
+        self.n_unloads = 0
+
+    @property
+    def memory_mb(self):
+        """Memory of the loaded entities, in MB."""
+        return sum(entry[3] for entry in self.entries.values()) / 1048576
+
+    def load(self, collection=None, uid=None):
+        """Read the entity uid of collection, replace its LazyVtkObj with it, and unload other
+        entities if needed to stay within budget_mb. Returns the loaded vtk_obj."""
+        lazy_obj = collection.get_uid_value(uid=uid, column="vtk_obj")
+        vtk_obj = lazy_obj.load()
+        collection.set_uid_vtk_obj(uid=uid, vtk_obj=vtk_obj)
+        self.entries[uid] = [
+            collection,
+            lazy_obj,
+            data_signature(vtk_obj),
+            vtk_obj.GetActualMemorySize() * 1024,
+        ]
+        self.n_loads += 1
+        self.evict(keep=uid)
+        return vtk_obj
+
+    def touch(self, uid=None):
+        """Mark uid as the most recently used entity."""
+        if uid in self.entries:
+            self.entries.move_to_end(uid)
+
+    def evict(self, keep=None):
+        """Unload least recently used entities until the memory is within budget_mb.
+        Entities removed from their collection, replaced or modified since loading are no longer
+        tracked, since their data must be kept in memory until the project is saved."""
+        if not self.budget_mb:
+            return
+        for uid in list(self.entries):
+            if self.memory_mb <= self.budget_mb:
+                return
+            if uid == keep:
+                continue
+            collection, lazy_obj, signature, _ = self.entries[uid]
+            try:
+                stored = collection.get_uid_value(uid=uid, column="vtk_obj")
+            except IndexError:
+                stored = None
+            if (
+                stored is not lazy_obj.vtk_obj
+                or data_signature(lazy_obj.vtk_obj) != signature
+            ):
+                del self.entries[uid]
+                continue
+            if self.is_shown and self.is_shown(uid):
+                continue
+            lazy_obj.unload()
+            collection.set_uid_vtk_obj(uid=uid, vtk_obj=lazy_obj)
+            del self.entries[uid]
+            self.n_unloads += 1
+            if self.on_unload:
+                self.on_unload(uid)
@@ -4,17 +4,18 @@ PZero© Andrea Bistacchi"""
 import os
 from copy import deepcopy
 from datetime import datetime
+from shutil import rmtree
+from time import perf_counter
 
 import pandas as pd
 from PyQt5.QtCore import Qt, QSortFilterProxyModel, pyqtSignal
-from PyQt5.QtWidgets import QMainWindow, QMessageBox
+from PyQt5.QtWidgets import QMainWindow, QMessageBox, QLabel
 from pandas import DataFrame as pd_DataFrame
 from pandas import read_csv as pd_read_csv
 from pandas import read_json as pd_read_json
 from vtk import (
     vtkPolyData,
     vtkAppendPolyData,
-    vtkOctreePointLocator,
     vtkXMLPolyDataWriter,
     vtkXMLStructuredGridWriter,
     vtkXMLImageDataWriter,
@@ -48,7 +49,12 @@ from pzero.imports.cesium2vtk import vtk2cesium
 from pzero.imports.dem2vtk import dem2vtk
 from pzero.imports.dxf2vtk import vtk2dxf
 from pzero.imports.gltf2vtk import vtk2gltf
-from pzero.imports.gocad2vtk import gocad2vtk, gocad2vtk_section, gocad2vtk_boundary
+from pzero.imports.gocad2vtk import (
+    gocad2vtk,
+    gocad2vtk_section,
+    gocad2vtk_boundary,
+    vtk2gocad,
+)
 from pzero.imports.image2vtk import geo_image2vtk, xs_image2vtk
 from pzero.imports.lxml2vtk import vtk2lxml
 from pzero.imports.obj2vtk import vtk2obj
@@ -60,6 +66,26 @@ from pzero.imports.shp2vtk import shp2vtk
 from pzero.imports.stl2vtk import vtk2stl, vtk2stl_dilation
 from pzero.imports.vedo2vtk import vedo2vtk
 from pzero.imports.well2vtk import well2vtk
+from pzero.project_io import (
+    save_workers_default,
+    VtkObjCache,
+    FolderRevision,
+    save_revision,
+    write_project_file,
+    read_project_file,
+    collect_garbage,
+    migrate_project,
+    lod_dir_name,
+    LazyVtkObj,
+    data_signature,
+)
+from pzero.lod_octree import LodOctree
+from pzero.autosave_manager import AutosaveManager, autosave_rev_name
+from pzero.project_container import (
+    ContainerRevision,
+    write_container,
+    convert_project,
+)
 from pzero.ui.project_window_ui import Ui_ProjectWindow
 from .entities_factory import (
     VertexSet,
@@ -74,7 +100,7 @@ from .entities_factory import (
     XsVoxet,
     PCDom,
     TSDom,
-    Well,
+    WellTrace,
     Attitude,
     XsImage,
 )
@@ -97,6 +123,7 @@ from .three_d_surfaces import (
     split_surf,
     retopo,
 )
+from .windows_factory import BaseView
 from .windows_factory import NewViewMap
 from .windows_factory import NewViewXsection
 from .windows_factory import View3D
@@ -232,6 +259,9 @@ class ProjectWindow(QMainWindow, Ui_ProjectWindow):
         self.actionProjectNew.triggered.connect(self.new_project)
         self.actionProjectOpen.triggered.connect(self.open_project)
         self.actionProjectSave.triggered.connect(self.save_project)
+        self.actionProjectMigrate.triggered.connect(self.migrate_project_revisions)
+        self.actionProjectPrune.triggered.connect(self.prune_project_objects)
+        self.actionProjectConvert.triggered.connect(self.convert_project_format)
 
         """File>Import actions -> slots"""
         self.actionImportGocad.triggered.connect(self.import_gocad)
@@ -267,6 +297,7 @@ class ProjectWindow(QMainWindow, Ui_ProjectWindow):
         self.actionCalculateLineation.triggered.connect(self.lineations_calculate)
 
         self.actionBuildOctree.triggered.connect(self.build_octree)
+        self.actionSeismicsSlice.triggered.connect(self.seismics_slice)
 
         """Interpolation actions -> slots"""
         self.actionDelaunay2DInterpolation.triggered.connect(
@@ -303,6 +334,36 @@ class ProjectWindow(QMainWindow, Ui_ProjectWindow):
 
         self.update_actors = True
 
+        """Number of worker processes used by save_project (0 to save sequentially)."""
+        self.save_workers = save_workers_default
+
+        """With lazy loading, open_project reads only the tables and entities are read from file
+        when first accessed. Loaded entities not shown in any view are unloaded when their memory
+        exceeds lazy_loading_budget_mb (0 for no limit)."""
+        self.lazy_loading = False
+        self.lazy_loading_budget_mb = 2048
+        self.vtk_obj_cache = VtkObjCache(
+            budget_mb=self.lazy_loading_budget_mb,
+            is_shown=self.entity_is_shown,
+            on_unload=self.entity_unloaded,
+        )
+        self.actionLazyLoading.toggled.connect(self.set_lazy_loading)
+
+        """Level of detail octrees of point clouds (see build_octree) are discarded when their entity
+        is removed or its properties are edited. Properties added to an entity are not signalled in a
+        specific way, and are found by get_lod_octree since the octree does not match any more."""
+        self.dom_removed_signal.connect(self.discard_lod_octrees)
+        self.dom_data_keys_removed_signal.connect(self.discard_lod_octrees)
+        self.dom_data_val_modified_signal.connect(self.discard_lod_octrees)
+
+        """The project is autosaved in the background after each edit (see autosave_manager.py).
+        The time and duration of the last autosave are shown in the status bar."""
+        self.autosave_label = QLabel(self)
+        self.statusbar.addPermanentWidget(self.autosave_label)
+        self.autosave_manager = AutosaveManager(parent=self, label=self.autosave_label)
+        self.autosave_manager.set_enabled(self.actionAutosave.isChecked())
+        self.actionAutosave.toggled.connect(self.autosave_manager.set_enabled)
+
     def closeEvent(self, event):
         """Re-implement the standard closeEvent method of QWidget and ask (1) to save project, and (2) for confirmation to quit."""
         reply = QMessageBox.question(
@@ -322,6 +383,9 @@ class ProjectWindow(QMainWindow, Ui_ProjectWindow):
             QMessageBox.No,
         )
         if reply == QMessageBox.Yes:
+            """Let an autosave in progress finish writing, and stop autosaving."""
+            self.autosave_manager.set_enabled(False)
+            self.autosave_manager.wait()
             self.project_close_signal.emit()  # this is used to delete open windows when the current project is closed
             event.accept()
         else:
@@ -832,45 +896,187 @@ class ProjectWindow(QMainWindow, Ui_ProjectWindow):
         pass
 
     def build_octree(self):
-        if self.selected_uids:
-            for uid in self.selected_uids:
-                if self.shown_table == "tabGeology":
-                    entity = self.geol_coll.get_uid_vtk_obj(uid)
-                elif self.shown_table == "tabXSections":
-                    entity = self.xsect_coll.get_uid_vtk_obj(uid)
-                elif self.shown_table == "tabMeshes3D":
-                    entity = self.mesh3d_coll.get_uid_vtk_obj(uid)
-                elif self.shown_table == "tabDOMs":
-                    entity = self.dom_coll.get_uid_vtk_obj(uid)
-                elif self.shown_table == "tabImages":
-                    entity = self.image_coll.get_uid_vtk_obj(uid)
-                elif self.shown_table == "tabBoundaries":
-                    entity = self.boundary_coll.get_uid_vtk_obj(uid)
-                elif self.shown_table == "tabWells":
-                    entity = self.well_coll.get_uid_vtk_obj(uid)
+        """Build the level of detail octrees of the selected point clouds, used by the 3D views to show
+        only the points needed for the camera (see lod_octree.py). If the project has been saved as a
+        folder, octrees are written to its lod folder and memory-mapped, otherwise they are kept in
+        memory and written when the project is saved."""
+        if not self.selected_uids:
+            return
+        if self.shown_table != "tabDOMs":
+            self.TextTerminal.appendPlainText("Octrees are built for point clouds only")
+            return
+        for uid in self.selected_uids:
+            entity = self.dom_coll.get_uid_vtk_obj(uid)
+            if not isinstance(entity, PCDom):
+                continue
+            start_time = perf_counter()
+            if self.project_dir_name:
+                octree = LodOctree.from_pcdom(
+                    vtk_obj=entity,
+                    dir_name=lod_dir_name(self.project_dir_name, uid),
+                    object_name=self.dom_object_name(uid),
+                )
+            else:
+                octree = LodOctree.from_pcdom(vtk_obj=entity)
+            self.lod_octrees[uid] = octree
+            self.TextTerminal.appendPlainText(
+                f"Octree of {self.dom_coll.get_uid_name(uid)}: {octree.nodes.size} nodes"
+                f" built in {perf_counter() - start_time:.1f} s"
+            )
+        for view in self.findChildren(View3D):
+            view.update_lod_actors(uids=self.selected_uids, force=True)
+
+    def seismics_slice(self):
+        """Extract a full resolution inline, crossline or time slice of the selected Seismics, added to the
+        image collection. Slices of Seismics imported lazily are read from their SEG-Y file, reading only
+        the traces and samples of the slice (see segy_cube.py)."""
+        if not self.selected_uids:
+            return
+        if self.shown_table != "tabImages":
+            self.TextTerminal.appendPlainText("Slices are extracted from Seismics only")
+            return
+        slice_types = ["inline", "crossline", "time"]
+        input_dict = {
+            "slice_type": ["Slice: ", slice_types],
+            "index": ["Index in the survey grid (from 0): ", 0],
+        }
+        slice_dict = multiple_input_dialog(
+            title="Extract seismic slice", input_dict=input_dict
+        )
+        if slice_dict is None:
+            return
+        for uid in self.selected_uids:
+            if self.image_coll.get_uid_image_type(uid) != "Seismics":
+                continue
+            try:
+                seismics_slice = self.image_coll.get_uid_vtk_obj(uid).extract_slice(
+                    axis=slice_types.index(slice_dict["slice_type"]),
+                    index=slice_dict["index"],
+                )
+            except IndexError as error:
+                self.TextTerminal.appendPlainText(str(error))
+                continue
+            entity_dict = deepcopy(self.image_coll.image_entity_dict)
+            entity_dict["name"] = (
+                f"{self.image_coll.get_uid_name(uid)}"
+                f"_{slice_dict['slice_type']}_{slice_dict['index']}"
+            )
+            entity_dict["image_type"] = "Seismics"
+            entity_dict["properties_names"] = seismics_slice.point_data_keys
+            entity_dict["properties_types"] = seismics_slice.properties_types
+            entity_dict["vtk_obj"] = seismics_slice
+            self.image_coll.add_entity_from_dict(entity_dict=entity_dict)
 
-                octree = vtkOctreePointLocator()
-                octree.SetDataSet(entity)
-                octree.BuildLocator()
-                entity.locator = octree
+    @property
+    def project_dir_name(self):
+        """Folder <name>_p0 of the project, or None if the project has not been saved as a folder."""
+        out_file_name = getattr(self, "out_file_name", None)
+        if out_file_name and out_file_name.endswith(".p0"):
+            return out_file_name[:-3] + "_p0"
+        return None
+
+    def dom_object_name(self, uid=None):
+        """Name of the object of DOM uid in the object store of the project, if the entity has not been
+        edited since it was read from there, or None. The entity is not read if it has not been read yet.
+        """
+        stored = self.dom_coll.get_uid_value(uid=uid, column="vtk_obj")
+        if isinstance(stored, LazyVtkObj):
+            return stored.object_name
+        entry = self.vtk_obj_cache.entries.get(uid)
+        if (
+            entry is not None
+            and entry[1].vtk_obj is stored
+            and data_signature(stored) == entry[2]
+        ):
+            return entry[1].object_name
+        return None
+
+    def get_lod_octree(self, uid=None):
+        """Level of detail octree of DOM uid, read from the lod folder of the project if needed, or None
+        if the entity has no octree or the octree does not match the entity any more. If the octree has
+        been built from the object of the entity in the object store, the entity is not read to check it,
+        so clouds opened with lazy loading are shown without reading them."""
+        octree = self.lod_octrees.get(uid)
+        if octree is None and self.project_dir_name:
+            dir_name = lod_dir_name(self.project_dir_name, uid)
+            if LodOctree.exists(dir_name):
+                octree = LodOctree.load(dir_name)
+        if octree is None:
+            self.lod_octrees.pop(uid, None)
+            return None
+        stored = octree.object_name is not None and (
+            octree.object_name == self.dom_object_name(uid)
+        )
+        if not stored and not octree.matches(self.dom_coll.get_uid_vtk_obj(uid)):
+            self.lod_octrees.pop(uid, None)
+            return None
+        self.lod_octrees[uid] = octree
+        return octree
+
+    def discard_lod_octrees(self, uids=None):
+        """Remove the octrees of entities that have been removed or whose properties have been edited.
+        Octrees are derived data, that can be built again."""
+        for uid in uids:
+            self.lod_octrees.pop(uid, None)
+            if self.project_dir_name:
+                dir_name = lod_dir_name(self.project_dir_name, uid)
+                if os.path.isdir(dir_name):
+                    rmtree(dir_name)
+
+    def save_lod_octrees(self, manifest=None):
+        """Write the octrees that are not in the lod folder of the project yet, i.e. those built before
+        the project was saved as a folder, or read from another folder before saving with a new name.
+        Octrees that still match their entity are marked with the object of the entity in manifest, the
+        manifest of the revision just saved, so they can be shown without reading the entity next time.
+        """
+        for uid, octree in self.lod_octrees.items():
+            dir_name = lod_dir_name(self.project_dir_name, uid)
+            object_name = manifest.get(uid)
+            update = octree.object_name != object_name and octree.matches(
+                self.dom_coll.get_uid_vtk_obj(uid)
+            )
+            if update:
+                octree.object_name = object_name
+            if octree.in_memory or not LodOctree.exists(dir_name):
+                octree.save(dir_name=dir_name)
+                self.lod_octrees[uid] = LodOctree.load(dir_name)
+            elif update:
+                octree.write_description(dir_name=dir_name)
 
     def decimate_pc_dialog(self):
         if self.selected_uids:
-            fac = (
-                input_one_value_dialog(
-                    parent=self,
-                    title="Decimation factor",
-                    label="Set the decimation factor (% of the original)",
-                    default_value=100.0,
-                )
-                / 100
+            input_dict = {
+                "mode": ["Decimation mode", ["random", "voxel", "poisson"]],
+                "fac": ["Random: % of points kept", 10.0],
+                "voxel_size": ["Voxel: grid spacing", 1.0],
+                "radius": ["Poisson: minimum distance", 1.0],
+                "seed": ["Random seed", 0],
+            }
+            dec_dict = multiple_input_dialog(
+                title="Point cloud decimation", input_dict=input_dict
             )
+            if dec_dict is None:
+                return
+            mode = dec_dict["mode"]
+            fac = dec_dict["fac"] / 100
+            suffix = {
+                "random": f"subsamp_{fac}",
+                "voxel": f"voxel_{dec_dict['voxel_size']}",
+                "poisson": f"poisson_{dec_dict['radius']}",
+            }[mode]
             for uid in self.selected_uids:
                 if self.shown_table == "tabDOMs":
                     collection = self.dom_coll
                     entity = collection.get_uid_vtk_obj(uid)
 
-                    vtk_object = decimate_pc(entity, fac)
+                    vtk_object = decimate_pc(
+                        entity,
+                        fac=fac,
+                        mode=mode,
+                        seed=dec_dict["seed"],
+                        voxel_size=dec_dict["voxel_size"],
+                        radius=dec_dict["radius"],
+                    )
                     vtk_out_dict = deepcopy(
                         collection.df.loc[collection.df["uid"] == uid]
                         .drop(["uid", "vtk_obj"], axis=1)
@@ -878,7 +1084,7 @@ class ProjectWindow(QMainWindow, Ui_ProjectWindow):
                     )
                     name = vtk_out_dict["name"]
                     vtk_out_dict["uid"] = None
-                    vtk_out_dict["name"] = f"{name}_subsamp_{fac}"
+                    vtk_out_dict["name"] = f"{name}_{suffix}"
                     vtk_out_dict["vtk_obj"] = vtk_object
                     collection.add_entity_from_dict(entity_dict=vtk_out_dict)
                 else:
@@ -1005,40 +1211,32 @@ class ProjectWindow(QMainWindow, Ui_ProjectWindow):
                 collection = self.boundary_coll
             else:
                 return
+            """New single-part entities are added, and multi-part entities removed, all at once."""
+            vtk_out_dicts = []
+            split_uids = []
             for uid in self.selected_uids:
                 if isinstance(collection.get_uid_vtk_obj(uid), (PolyLine, TriSurf)):
                     if "RegionId" not in collection.get_uid_properties_names(uid):
                         collection.append_uid_property(
                             uid=uid, property_name="RegionId", property_components=1
                         )
-                    vtk_out_list = collection.get_uid_vtk_obj(uid).split_parts()
-
-                    for i, vtk_object in enumerate(vtk_out_list):
-                        vtk_out_dict = deepcopy(
-                            collection.df.loc[collection.df["uid"] == uid]
-                            .drop(["uid", "vtk_obj"], axis=1)
-                            .to_dict("records")[0]
-                        )
-                        name = vtk_out_dict["name"]
-                        vtk_out_dict["uid"] = None
-                        vtk_out_dict["name"] = f"{name}_{i}"
-                        vtk_out_dict["vtk_obj"] = vtk_object
-                        collection.add_entity_from_dict(entity_dict=vtk_out_dict)
-                    collection.remove_entity(uid)
-                elif isinstance(collection.get_uid_vtk_obj(uid), PCDom):
-                    vtk_out_list = collection.get_uid_vtk_obj(uid).split_parts()
-                    for i, vtk_object in enumerate(vtk_out_list):
-                        vtk_out_dict = deepcopy(
-                            collection.df.loc[collection.df["uid"] == uid]
-                            .drop(["uid", "vtk_obj"], axis=1)
-                            .to_dict("records")[0]
-                        )
-                        name = vtk_out_dict["name"]
-                        vtk_out_dict["uid"] = None
-                        vtk_out_dict["name"] = f"{name}_{i}"
-                        vtk_out_dict["vtk_obj"] = vtk_object
-                        collection.add_entity_from_dict(entity_dict=vtk_out_dict)
-                    collection.remove_entity(uid)
+                elif not isinstance(collection.get_uid_vtk_obj(uid), PCDom):
+                    continue
+                vtk_out_list = collection.get_uid_vtk_obj(uid).split_parts()
+                for i, vtk_object in enumerate(vtk_out_list):
+                    vtk_out_dict = deepcopy(
+                        collection.df.iloc[[collection.get_uid_row(uid)]]
+                        .drop(["uid", "vtk_obj"], axis=1)
+                        .to_dict("records")[0]
+                    )
+                    name = vtk_out_dict["name"]
+                    vtk_out_dict["uid"] = None
+                    vtk_out_dict["name"] = f"{name}_{i}"
+                    vtk_out_dict["vtk_obj"] = vtk_object
+                    vtk_out_dicts.append(vtk_out_dict)
+                split_uids.append(uid)
+            collection.add_entities_from_dicts(entity_dicts=vtk_out_dicts)
+            collection.remove_entities(uids=split_uids)
 
             self.prop_legend.update_widget(self)
 
@@ -1048,6 +1246,10 @@ class ProjectWindow(QMainWindow, Ui_ProjectWindow):
         """Create empty containers for a new empty project."""
         self.project_close_signal.emit()  # this is used to delete open windows when the current project is closed (and a new one is opened)
 
+        """Level of detail octrees {uid: LodOctree} of point clouds, built by build_octree or read
+        from the lod folder of the project."""
+        self.lod_octrees = {}
+
         """Create the geol_coll GeologicalCollection (a Qt QAbstractTableModel with a Pandas dataframe as attribute)
         and connect the model to GeologyTableView (a Qt QTableView created with QTDesigner and provided by
         Ui_ProjectWindow). Setting the model also updates the view."""
@@ -1144,17 +1346,21 @@ class ProjectWindow(QMainWindow, Ui_ProjectWindow):
         self.prop_legend.update_widget(parent=self)
 
     def save_project(self):
-        # ________________________________________WRITERS TO BE MOVED TO COLLECTIONS
-        """Save project to file and folder"""
+        """Save project to file and folder, or to a single project container file (.p0c)."""
         """Get date and time, used to save incremental revisions."""
         now = datetime.now().strftime("%Y-%m-%d-%H-%M-%S")
         """Select and open output file and folder. Saving always performs a complete backup since the output folder
         is named with the present date and time "rev_<now>"."""
         self.out_file_name = save_file_dialog(
-            parent=self, caption="Save project.", filter="PZero (*.p0)"
+            parent=self,
+            caption="Save project.",
+            filter="PZero (*.p0);;PZero container (*.p0c)",
         )
         if not self.out_file_name:
             return
+        if self.out_file_name.endswith(".p0c"):
+            self.save_project_container(rev_name="rev_" + now)
+            return
         out_dir_name = self.out_file_name[:-3] + "_p0/rev_" + now
         self.TextTerminal.appendPlainText(
             (
@@ -1166,267 +1372,247 @@ class ProjectWindow(QMainWindow, Ui_ProjectWindow):
         """Create the folder if it does not exist already."""
         if not os.path.isdir(self.out_file_name[:-3] + "_p0"):
             os.mkdir(self.out_file_name[:-3] + "_p0")
-        os.mkdir(out_dir_name)
-        """Save the root file pointing to the folder."""
-        fout = open(self.out_file_name, "w")
-        fout.write(
-            "PZero project file saved in folder with the same name, including VTK files and CSV tables.\n"
-        )
-        fout.write("Last saved revision:\n")
-        fout.write("rev_" + now)
-        fout.close()
-
-        """--------------------- SAVE LEGENDS ---------------------"""
-
-        """Save geological legend table to JSON file. Keep old CSV table format here in comments, in case it might be useful in the future."""
-        self.geol_legend_df.to_json(
-            out_dir_name + "/geol_legend_table.json", orient="index"
-        )
-        # self.geol_legend_df.to_csv(out_dir_name + '/geol_legend_table.csv', encoding='utf-8', index=False)
-        """Save others legend table to JSON file."""
-        self.others_legend_df.to_json(
-            out_dir_name + "/others_legend_table.json", orient="index"
-        )
-        # self.others_legend_df.to_csv(out_dir_name + '/others_legend_table.csv', encoding='utf-8', index=False)
-        """Save properties legend table to JSON file."""
-        self.prop_legend_df.to_json(
-            out_dir_name + "/prop_legend_df.json", orient="index"
-        )
-        # self.prop_legend_df.to_csv(out_dir_name + '/prop_legend_df.csv', encoding='utf-8', index=False)
-
-        self.well_legend_df.to_json(
-            out_dir_name + "/well_legend_table.json", orient="index"
-        )
-
-        self.fluids_legend_df.to_json(
-            out_dir_name + "/fluids_legend_table.json", orient="index"
-        )
 
-        self.backgrounds_legend_df.to_json(
-            out_dir_name + "/backgrounds_legend_table.json", orient="index"
-        )
-
-        """--------------------- SAVE tables ---------------------"""
-
-        """Save x_section table to JSON file."""
-        out_cols = list(self.xsect_coll.df.columns)
-        out_cols.remove("vtk_plane")
-        out_cols.remove("vtk_frame")
-        self.xsect_coll.df[out_cols].to_json(
-            out_dir_name + "/xsection_table.json", orient="index"
-        )
-        # self.xsect_coll.df[out_cols].to_csv(out_dir_name + '/xsection_table.csv', encoding='utf-8', index=False)
-
-        """Save geological collection table to JSON file and entities as VTK."""
-        out_cols = list(self.geol_coll.df.columns)
-        out_cols.remove("vtk_obj")
-        self.geol_coll.df[out_cols].to_json(
-            out_dir_name + "/geological_table.json", orient="index"
-        )
-        # self.geol_coll.df[out_cols].to_csv(out_dir_name + '/geological_table.csv', encoding='utf-8', index=False)
+        """Save legends, tables and entities of all collections. The revision is written in a staging
+        folder that is renamed to rev_<now> only when all files have been written, and entities are
+        saved in the object store of the project using a pool of self.save_workers processes. Only
+        entities that changed since they were last saved are written, and the manifest of the
+        revision points to the objects of all entities (see project_io.py)."""
+        entities = self.vtk_entities_to_save()
         prgs_bar = progress_dialog(
-            max_value=self.geol_coll.df.shape[0],
-            title_txt="Save geology",
-            label_txt="Saving geological objects...",
+            max_value=len(entities),
+            title_txt="Save project",
+            label_txt="Saving entities...",
             cancel_txt=None,
             parent=self,
         )
-        for uid in self.geol_coll.df["uid"].to_list():
-            pd_writer = vtkXMLPolyDataWriter()
-            pd_writer.SetFileName(out_dir_name + "/" + uid + ".vtp")
-            pd_writer.SetInputData(self.geol_coll.get_uid_vtk_obj(uid))
-            pd_writer.Write()
-            prgs_bar.add_one()
+        """No autosave runs while the project is saved."""
+        with self.autosave_manager.paused():
+            try:
+                manifest = save_revision(
+                    project_dir_name=self.out_file_name[:-3] + "_p0",
+                    rev_name="rev_" + now,
+                    tables=self.project_tables(),
+                    entities=entities,
+                    workers=self.save_workers,
+                    callback=lambda uid: prgs_bar.add_one(),
+                )
+            except Exception as error:
+                self.TextTerminal.appendPlainText(
+                    "Error - project not saved: " + str(error) + "\n"
+                )
+                return
 
-        """Save DOM collection table to JSON file and entities as VTK."""
-        out_cols = list(self.dom_coll.df.columns)
-        out_cols.remove("vtk_obj")
-        self.dom_coll.df[out_cols].to_json(
-            out_dir_name + "/dom_table.json", orient="index"
+            """Save the root file pointing to the folder. This is done last, so the project
+            file always points to a complete revision."""
+            write_project_file(self.out_file_name, "rev_" + now)
+            self.save_lod_octrees(manifest=manifest)
+            """Next autosaves go to the folder of the saved project."""
+            self.autosave_manager.reset(manifest=manifest)
+
+    def save_project_container(self, rev_name=None):
+        """Save the project to the single container file self.out_file_name (see project_container.py).
+        The previous container is replaced only when the new one has been completely written.
+        """
+        self.TextTerminal.appendPlainText(
+            "Saving project as project container.\nIn file: "
+            + self.out_file_name
+            + "\n"
         )
-        # self.dom_coll.df[out_cols].to_csv(out_dir_name + '/dom_table.csv', encoding='utf-8', index=False)
+        entities = self.vtk_entities_to_save()
         prgs_bar = progress_dialog(
-            max_value=self.dom_coll.df.shape[0],
-            title_txt="Save DOM",
-            label_txt="Saving DOM objects...",
+            max_value=len(entities),
+            title_txt="Save project",
+            label_txt="Saving entities...",
             cancel_txt=None,
             parent=self,
         )
+        with self.autosave_manager.paused():
+            try:
+                write_container(
+                    file_name=self.out_file_name,
+                    tables=self.project_tables(),
+                    entities=entities,
+                    revision=rev_name,
+                    callback=lambda uid: prgs_bar.add_one(),
+                )
+            except Exception as error:
+                self.TextTerminal.appendPlainText(
+                    "Error - project not saved: " + str(error) + "\n"
+                )
+                return
+            self.autosave_manager.reset()
+
+    def project_tables(self):
+        """Returns a list of (file name, DataFrame) tuples with the legends and the tables of all
+        collections, as saved in a revision folder or in a project container. DataFrames are copies,
+        so they can be written to JSON on another thread while the project is edited."""
+        tables = []
+
+        """Legend tables. Old projects might have CSV tables, that are still read by open_project:
+        the format was e.g. self.geol_legend_df.to_csv(out_dir_name + '/geol_legend_table.csv', encoding='utf-8', index=False)
+        """
+        for legend_df, table_name in [
+            (self.geol_legend_df, "geol_legend_table"),
+            (self.others_legend_df, "others_legend_table"),
+            (self.prop_legend_df, "prop_legend_df"),
+            (self.well_legend_df, "well_legend_table"),
+            (self.fluids_legend_df, "fluids_legend_table"),
+            (self.backgrounds_legend_df, "backgrounds_legend_table"),
+        ]:
+            tables.append((table_name + ".json", legend_df.copy(deep=False)))
+
+        """x_section table, without the VTK plane and frame that are built again when opening."""
+        out_cols = list(self.xsect_coll.df.columns)
+        out_cols.remove("vtk_plane")
+        out_cols.remove("vtk_frame")
+        tables.append(("xsection_table.json", self.xsect_coll.df[out_cols]))
+
+        """All other collection tables, without the entities."""
+        for collection, table_name in [
+            (self.geol_coll, "geological_table"),
+            (self.dom_coll, "dom_table"),
+            (self.image_coll, "image_table"),
+            (self.mesh3d_coll, "mesh3d_table"),
+            (self.boundary_coll, "boundary_table"),
+            (self.well_coll, "well_table"),
+            (self.fluids_coll, "fluids_table"),
+            (self.backgrounds_coll, "backgrounds_table"),
+        ]:
+            out_cols = list(collection.df.columns)
+            out_cols.remove("vtk_obj")
+            tables.append((table_name + ".json", collection.df[out_cols]))
+        return tables
+
+    def vtk_entities_to_save(self):
+        """Returns a list of (uid, file extension, vtk_obj) tuples with all the entities that are saved
+        as VTK files in a project folder. The file type depends on the VTK class of each entity.
+        Entities of a project opened with lazy loading that have not been read yet are returned as
+        LazyVtkObj placeholders, so they are not read just to be saved.
+        """
+
+        def stored_vtk_obj(collection, uid):
+            return collection.get_uid_value(uid=uid, column="vtk_obj")
+
+        entities = []
+        for uid in self.geol_coll.df["uid"].to_list():
+            entities.append((uid, ".vtp", stored_vtk_obj(self.geol_coll, uid)))
         for uid in self.dom_coll.df["uid"].to_list():
-            if (
-                self.dom_coll.df.loc[self.dom_coll.df["uid"] == uid, "dom_type"].values[
-                    0
-                ]
-                == "DEM"
-            ):
-                sg_writer = vtkXMLStructuredGridWriter()
-                sg_writer.SetFileName(out_dir_name + "/" + uid + ".vts")
-                sg_writer.SetInputData(self.dom_coll.get_uid_vtk_obj(uid))
-                sg_writer.Write()
-                prgs_bar.add_one()
-            elif (
-                self.dom_coll.df.loc[self.dom_coll.df["uid"] == uid, "dom_type"].values[
-                    0
-                ]
-                == "DomXs"
-            ):
-                pl_writer = vtkXMLPolyDataWriter()
-                pl_writer.SetFileName(out_dir_name + "/" + uid + ".vtp")
-                pl_writer.SetInputData(self.dom_coll.get_uid_vtk_obj(uid))
-                pl_writer.Write()
-                prgs_bar.add_one()
-            elif (
-                self.dom_coll.df.loc[self.dom_coll.df["uid"] == uid, "dom_type"].values[
-                    0
-                ]
-                == "PCDom"
-            ):  # _____________ PROBABLY THE SAME WILL WORK FOR TSDOMs
-                """Save PCDOm collection entities as VTK"""
-                pd_writer = vtkXMLPolyDataWriter()
-                pd_writer.SetFileName(out_dir_name + "/" + uid + ".vtp")
-                pd_writer.SetInputData(self.dom_coll.get_uid_vtk_obj(uid))
-                pd_writer.Write()
-                prgs_bar.add_one()
-
-        """Save image collection table to JSON file and entities as VTK."""
-        out_cols = list(self.image_coll.df.columns)
-        out_cols.remove("vtk_obj")
-        self.image_coll.df[out_cols].to_json(
-            out_dir_name + "/image_table.json", orient="index"
-        )
-        # self.image_coll.df[out_cols].to_csv(out_dir_name + '/image_table.csv', encoding='utf-8', index=False)
-        prgs_bar = progress_dialog(
-            max_value=self.image_coll.df.shape[0],
-            title_txt="Save image",
-            label_txt="Saving image objects...",
-            cancel_txt=None,
-            parent=self,
-        )
+            if self.dom_coll.get_uid_dom_type(uid) == "DEM":
+                entities.append((uid, ".vts", stored_vtk_obj(self.dom_coll, uid)))
+            elif self.dom_coll.get_uid_dom_type(uid) in ["DomXs", "PCDom"]:
+                # _____________ PROBABLY THE SAME WILL WORK FOR TSDOMs
+                entities.append((uid, ".vtp", stored_vtk_obj(self.dom_coll, uid)))
         for uid in self.image_coll.df["uid"].to_list():
-            if self.image_coll.df.loc[
-                self.image_coll.df["uid"] == uid, "image_type"
-            ].values[0] in ["MapImage", "XsImage", "TSDomImage"]:
-                im_writer = vtkXMLImageDataWriter()
-                im_writer.SetFileName(out_dir_name + "/" + uid + ".vti")
-                im_writer.SetInputData(self.image_coll.get_uid_vtk_obj(uid))
-                im_writer.Write()
-                prgs_bar.add_one()
-            elif self.image_coll.df.loc[
-                self.image_coll.df["uid"] == uid, "image_type"
-            ].values[0] in ["Seismics"]:
-                sg_writer = vtkXMLStructuredGridWriter()
-                sg_writer.SetFileName(out_dir_name + "/" + uid + ".vts")
-                sg_writer.SetInputData(self.image_coll.get_uid_vtk_obj(uid))
-                sg_writer.Write()
-
-        """Save mesh3d collection table to JSON file and entities as VTK."""
-        out_cols = list(self.mesh3d_coll.df.columns)
-        out_cols.remove("vtk_obj")
-        self.mesh3d_coll.df[out_cols].to_json(
-            out_dir_name + "/mesh3d_table.json", orient="index"
-        )
-        # self.mesh3d_coll.df[out_cols].to_csv(out_dir_name + '/mesh3d_table.csv', encoding='utf-8', index=False)
-        prgs_bar = progress_dialog(
-            max_value=self.mesh3d_coll.df.shape[0],
-            title_txt="Save 3D mesh",
-            label_txt="Saving 3D mesh objects...",
-            cancel_txt=None,
-            parent=self,
-        )
+            if self.image_coll.get_uid_image_type(uid) in [
+                "MapImage",
+                "XsImage",
+                "TSDomImage",
+            ]:
+                entities.append((uid, ".vti", stored_vtk_obj(self.image_coll, uid)))
+            elif self.image_coll.get_uid_image_type(uid) in ["Seismics"]:
+                entities.append((uid, ".vts", stored_vtk_obj(self.image_coll, uid)))
         for uid in self.mesh3d_coll.df["uid"].to_list():
-            if self.mesh3d_coll.df.loc[
-                self.mesh3d_coll.df["uid"] == uid, "mesh3d_type"
-            ].values[0] in ["Voxet", "XsVoxet"]:
-                im_writer = vtkXMLImageDataWriter()
-                im_writer.SetFileName(out_dir_name + "/" + uid + ".vti")
-                im_writer.SetInputData(self.mesh3d_coll.get_uid_vtk_obj(uid))
-                im_writer.Write()
-            prgs_bar.add_one()
-
-        """Save boundaries collection table to JSON file and entities as VTK."""
-        out_cols = list(self.boundary_coll.df.columns)
-        out_cols.remove("vtk_obj")
-        self.boundary_coll.df[out_cols].to_json(
-            out_dir_name + "/boundary_table.json", orient="index"
+            if self.mesh3d_coll.get_uid_mesh3d_type(uid) in ["Voxet", "XsVoxet"]:
+                entities.append((uid, ".vti", stored_vtk_obj(self.mesh3d_coll, uid)))
+        for collection in [
+            self.boundary_coll,
+            self.well_coll,
+            self.fluids_coll,
+            self.backgrounds_coll,
+        ]:
+            for uid in collection.df["uid"].to_list():
+                entities.append((uid, ".vtp", stored_vtk_obj(collection, uid)))
+        return entities
+
+    def read_vtk_entity(self, lazy_obj=None):
+        """Read the entity of the LazyVtkObj placeholder lazy_obj, returned by the entity method
+        of a revision, and return it. With lazy loading the placeholder is returned instead, and
+        the entity is read on first access."""
+        if self.lazy_loading:
+            return lazy_obj
+        return lazy_obj.load()
+
+    def entity_is_shown(self, uid=None):
+        """True if entity uid is visible in at least one open view."""
+        for view in self.findChildren(BaseView):
+            if view.actors_df.loc[view.actors_df["uid"] == uid, "show"].any():
+                return True
+        return False
+
+    def entity_unloaded(self, uid=None):
+        """Release the data of the hidden actors of an entity unloaded by vtk_obj_cache."""
+        for view in self.findChildren(BaseView):
+            view.unload_actor(uid=uid)
+
+    def set_lazy_loading(self, lazy_loading=None):
+        """Slot of actionLazyLoading. The setting is used by the next open_project."""
+        self.lazy_loading = lazy_loading
+
+    def migrate_project_revisions(self):
+        """Move the entity files of all revisions of a project saved without manifest to the
+        object store of the project, so that identical entities are stored only once."""
+        in_file_name = open_file_dialog(
+            parent=self, caption="Migrate PZero project", filter=("PZero (*.p0)")
         )
-        # self.boundary_coll.df[out_cols].to_csv(out_dir_name + '/boundary_table.csv', encoding='utf-8', index=False)
-        prgs_bar = progress_dialog(
-            max_value=self.boundary_coll.df.shape[0],
-            title_txt="Save boundary",
-            label_txt="Saving boundary objects...",
-            cancel_txt=None,
-            parent=self,
+        if not in_file_name:
+            return
+        with self.autosave_manager.paused():
+            n_files = migrate_project(project_dir_name=in_file_name[:-3] + "_p0")
+        self.TextTerminal.appendPlainText(
+            "Migrated " + str(n_files) + " entity files to the object store\n"
         )
-        for uid in self.boundary_coll.df["uid"].to_list():
-            pd_writer = vtkXMLPolyDataWriter()
-            pd_writer.SetFileName(out_dir_name + "/" + uid + ".vtp")
-            pd_writer.SetInputData(self.boundary_coll.get_uid_vtk_obj(uid))
-            pd_writer.Write()
-            prgs_bar.add_one()
-
-        """Save wells collection table to JSON file and entities as VTK."""
 
-        out_cols = list(self.well_coll.df.columns)
-        out_cols.remove("vtk_obj")
-        self.well_coll.df[out_cols].to_json(
-            out_dir_name + "/well_table.json", orient="index"
+    def prune_project_objects(self):
+        """Remove objects that are not referenced by any revision of a project, e.g. after
+        deleting old rev_<date-time> folders."""
+        in_file_name = open_file_dialog(
+            parent=self, caption="Prune PZero project", filter=("PZero (*.p0)")
         )
-        # self.boundary_coll.df[out_cols].to_csv(out_dir_name + '/boundary_table.csv', encoding='utf-8', index=False)
-        prgs_bar = progress_dialog(
-            max_value=self.well_coll.df.shape[0],
-            title_txt="Save wells",
-            label_txt="Saving well objects...",
-            cancel_txt=None,
-            parent=self,
+        if not in_file_name:
+            return
+        """An autosave in progress might be writing objects that are not referenced yet."""
+        with self.autosave_manager.paused():
+            n_files, n_bytes = collect_garbage(
+                project_dir_name=in_file_name[:-3] + "_p0"
+            )
+        self.TextTerminal.appendPlainText(
+            "Removed "
+            + str(n_files)
+            + " unused objects ("
+            + str(round(n_bytes / 1048576, 1))
+            + " MB)\n"
         )
-        for uid in self.well_coll.df["uid"].to_list():
-            pd_writer = vtkXMLPolyDataWriter()
-            pd_writer.SetFileName(out_dir_name + "/" + uid + ".vtp")
-            pd_writer.SetInputData(self.well_coll.get_uid_vtk_obj(uid))
-            pd_writer.Write()
-            prgs_bar.add_one()
 
-        """Save fluids collection table to JSON file and entities as VTK."""
-        out_cols = list(self.fluids_coll.df.columns)
-        out_cols.remove("vtk_obj")
-        self.fluids_coll.df[out_cols].to_json(
-            out_dir_name + "/fluids_table.json", orient="index"
+    def convert_project_format(self):
+        """Convert the last revision of a project from the .p0 file and folder format to a single
+        project container (.p0c), or vice versa."""
+        in_file_name = open_file_dialog(
+            parent=self, caption="Convert PZero project", filter=("PZero (*.p0 *.p0c)")
         )
-        # self.geol_coll.df[out_cols].to_csv(out_dir_name + '/geological_table.csv', encoding='utf-8', index=False)
-        prgs_bar = progress_dialog(
-            max_value=self.fluids_coll.df.shape[0],
-            title_txt="Save fluids",
-            label_txt="Saving fluid objects...",
-            cancel_txt=None,
-            parent=self,
+        if not in_file_name:
+            return
+        if in_file_name.endswith(".p0c"):
+            out_filter = "PZero (*.p0)"
+        else:
+            out_filter = "PZero container (*.p0c)"
+        out_file_name = save_file_dialog(
+            parent=self, caption="Save converted PZero project", filter=out_filter
         )
-        for uid in self.fluids_coll.df["uid"].to_list():
-            pd_writer = vtkXMLPolyDataWriter()
-            pd_writer.SetFileName(out_dir_name + "/" + uid + ".vtp")
-            pd_writer.SetInputData(self.fluids_coll.get_uid_vtk_obj(uid))
-            pd_writer.Write()
-            prgs_bar.add_one()
-
-        """Save Backgrounds collection table to JSON file and entities as VTK."""
-        out_cols = list(self.backgrounds_coll.df.columns)
-        out_cols.remove("vtk_obj")
-        self.backgrounds_coll.df[out_cols].to_json(
-            out_dir_name + "/backgrounds_table.json", orient="index"
+        if not out_file_name:
+            return
+        n_entities = convert_project(
+            in_file_name=in_file_name, out_file_name=out_file_name
         )
-        # self.geol_coll.df[out_cols].to_csv(out_dir_name + '/geological_table.csv', encoding='utf-8', index=False)
-        prgs_bar = progress_dialog(
-            max_value=self.backgrounds_coll.df.shape[0],
-            title_txt="Save Backgrounds",
-            label_txt="Saving Backgrounds objects...",
-            cancel_txt=None,
-            parent=self,
+        self.TextTerminal.appendPlainText(
+            "Converted "
+            + str(n_entities)
+            + " entities from "
+            + in_file_name
+            + " to "
+            + out_file_name
+            + "\n"
         )
-        for uid in self.backgrounds_coll.df["uid"].to_list():
-            pd_writer = vtkXMLPolyDataWriter()
-            pd_writer.SetFileName(out_dir_name + "/" + uid + ".vtp")
-            pd_writer.SetInputData(self.backgrounds_coll.get_uid_vtk_obj(uid))
-            pd_writer.Write()
-            prgs_bar.add_one()
 
     def new_project(self):
         """Creates a new empty project, after having cleared all variables."""
@@ -1441,8 +1627,10 @@ class ProjectWindow(QMainWindow, Ui_ProjectWindow):
             )
             if confirm_new == QMessageBox.No:
                 return
-        """Create empty containers."""
+        """Create empty containers. The new project has no file until it is saved."""
         self.create_empty()
+        self.out_file_name = None
+        self.autosave_manager.reset()
         # """Save a new empty project to file"""
         # self.save_project()
 
@@ -1462,27 +1650,60 @@ class ProjectWindow(QMainWindow, Ui_ProjectWindow):
                 self.save_project()
 
         self.create_empty()
+        self.out_file_name = None
+        self.autosave_manager.reset()
         """Select and open project file."""
         in_file_name = open_file_dialog(
-            parent=self, caption="Open PZero project", filter=("PZero (*.p0)")
+            parent=self, caption="Open PZero project", filter=("PZero (*.p0 *.p0c)")
         )
         if not in_file_name:
             return
         self.out_file_name = in_file_name
 
-        """Read name of last revision in project file. This opens the last revision.
-        To open a different one, edit the project file."""  # _________________________________________________________________________ IN THE FUTURE an option to open a specific revision could be added
-        fin = open(in_file_name, "rt")
-        rev_name = fin.readlines()[2].strip()
-        fin.close()
-        in_dir_name = in_file_name[:-3] + "_p0/" + rev_name
+        if in_file_name.endswith(".p0c"):
+            """Project containers hold a single revision (see project_container.py)."""
+            revision = ContainerRevision(file_name=in_file_name)
+            rev_name = revision.revision
+        else:
+            """Read name of last revision in project file. This opens the last revision.
+            To open a different one, edit the project file."""  # _________________________________________________________________________ IN THE FUTURE an option to open a specific revision could be added
+            rev_name = read_project_file(in_file_name)
+            """Offer to recover the autosave revision if it is more recent than the saved one."""
+            autosave_dir_name = in_file_name[:-3] + "_p0/" + autosave_rev_name
+            saved_dir_name = in_file_name[:-3] + "_p0/" + rev_name
+            if (
+                rev_name != autosave_rev_name
+                and os.path.isdir(autosave_dir_name)
+                and (
+                    not os.path.isdir(saved_dir_name)
+                    or os.path.getmtime(autosave_dir_name)
+                    > os.path.getmtime(saved_dir_name)
+                )
+            ):
+                recover = QMessageBox.question(
+                    self,
+                    "Open Project",
+                    "The project has been autosaved after it was last saved.\nOpen the autosaved revision?",
+                    QMessageBox.Yes | QMessageBox.No,
+                    QMessageBox.Yes,
+                )
+                if recover == QMessageBox.Yes:
+                    rev_name = autosave_rev_name
+            in_dir_name = in_file_name[:-3] + "_p0/" + rev_name
+            if not os.path.isdir(in_dir_name):
+                print(in_dir_name)
+                print("error: missing folder")
+                return
+            """Entity files are found through the manifest of the revision, or in the revision folder
+            itself for revisions saved before the object store was introduced."""
+            revision = FolderRevision(rev_dir_name=in_dir_name)
         self.TextTerminal.appendPlainText(
             ("Opening project/revision : " + in_file_name + "/" + rev_name + "\n")
         )
-        if not os.path.isdir(in_dir_name):
-            print(in_dir_name)
-            print("error: missing folder")
-            return
+        """Entities read on demand are tracked from scratch for each project (see read_vtk_entity)."""
+        self.vtk_obj_cache.clear()
+        self.vtk_obj_cache.budget_mb = self.lazy_loading_budget_mb
+        start_time = perf_counter()
         """In the following it is still possible to open old projects with metadata stored
          as CSV tables, however JSON is used now because it leads to less problems and errors
          for numeric and list fields. In fact, reading Pandas dataframes from JSON, dtype
@@ -1491,19 +1712,19 @@ class ProjectWindow(QMainWindow, Ui_ProjectWindow):
         """--------------------- READ LEGENDS ---------------------"""
 
         """Read geological legend tables."""
-        if os.path.isfile((in_dir_name + "/geol_legend_table.csv")) or os.path.isfile(
-            (in_dir_name + "/geol_legend_table.json")
+        if revision.has_table("geol_legend_table.csv") or revision.has_table(
+            "geol_legend_table.json"
         ):
-            if os.path.isfile((in_dir_name + "/geol_legend_table.json")):
+            if revision.has_table("geol_legend_table.json"):
                 new_geol_legend_df = pd_read_json(
-                    in_dir_name + "/geol_legend_table.json",
+                    revision.table("geol_legend_table.json"),
                     orient="index",
                     dtype=Legend.legend_type_dict,
                 )
                 # in a branch called "Riccardo", a control to set opacity to 100 in case it was null was added here, but it is most problably useless
             else:
                 new_geol_legend_df = pd_read_csv(
-                    in_dir_name + "/geol_legend_table.csv",
+                    revision.table("geol_legend_table.csv"),
                     encoding="utf-8",
                     dtype=Legend.legend_type_dict,
                     keep_default_na=False,
@@ -1524,18 +1745,18 @@ class ProjectWindow(QMainWindow, Ui_ProjectWindow):
 
         """Read well legend tables."""
 
-        if os.path.isfile((in_dir_name + "/well_legend_table.csv")) or os.path.isfile(
-            (in_dir_name + "/well_legend_table.json")
+        if revision.has_table("well_legend_table.csv") or revision.has_table(
+            "well_legend_table.json"
         ):
-            if os.path.isfile((in_dir_name + "/well_legend_table.json")):
+            if revision.has_table("well_legend_table.json"):
                 new_well_legend_df = pd_read_json(
-                    in_dir_name + "/well_legend_table.json",
+                    revision.table("well_legend_table.json"),
                     orient="index",
                     dtype=Legend.legend_type_dict,
                 )
             else:
                 new_well_legend_df = pd_read_csv(
-                    in_dir_name + "/well_legend_table.csv",
+                    revision.table("well_legend_table.csv"),
                     encoding="utf-8",
                     dtype=Legend.legend_type_dict,
                     keep_default_na=False,
@@ -1552,18 +1773,18 @@ class ProjectWindow(QMainWindow, Ui_ProjectWindow):
             self.well_legend_df.sort_values(by="Loc ID", ascending=True, inplace=True)
         """Read fluids legend tables."""
 
-        if os.path.isfile((in_dir_name + "/fluids_legend_table.csv")) or os.path.isfile(
-            (in_dir_name + "/fluids_legend_table.json")
+        if revision.has_table("fluids_legend_table.csv") or revision.has_table(
+            "fluids_legend_table.json"
         ):
-            if os.path.isfile((in_dir_name + "/fluids_legend_table.json")):
+            if revision.has_table("fluids_legend_table.json"):
                 new_fluids_legend_df = pd_read_json(
-                    in_dir_name + "/fluids_legend_table.json",
+                    revision.table("fluids_legend_table.json"),
                     orient="index",
                     dtype=Legend.legend_type_dict,
                 )
             else:
                 new_fluids_legend_df = pd_read_csv(
-                    in_dir_name + "/fluids_legend_table.csv",
+                    revision.table("fluids_legend_table.csv"),
                     encoding="utf-8",
                     dtype=Legend.legend_type_dict,
                     keep_default_na=False,
@@ -1583,18 +1804,18 @@ class ProjectWindow(QMainWindow, Ui_ProjectWindow):
 
         """Read Backgrounds legend tables."""
 
-        if os.path.isfile(
-            (in_dir_name + "/backgrounds_legend_table.csv")
-        ) or os.path.isfile((in_dir_name + "/backgrounds_legend_table.json")):
-            if os.path.isfile((in_dir_name + "/backgrounds_legend_table.json")):
+        if revision.has_table("backgrounds_legend_table.csv") or revision.has_table(
+            "backgrounds_legend_table.json"
+        ):
+            if revision.has_table("backgrounds_legend_table.json"):
                 new_backgrounds_legend_df = pd_read_json(
-                    in_dir_name + "/backgrounds_legend_table.json",
+                    revision.table("backgrounds_legend_table.json"),
                     orient="index",
                     dtype=Legend.legend_type_dict,
                 )
             else:
                 new_backgrounds_legend_df = pd_read_csv(
-                    in_dir_name + "/backgrounds_legend_table.csv",
+                    revision.table("backgrounds_legend_table.csv"),
                     encoding="utf-8",
                     dtype=Legend.legend_type_dict,
                     keep_default_na=False,
@@ -1611,18 +1832,18 @@ class ProjectWindow(QMainWindow, Ui_ProjectWindow):
 
         """Read other legend tables."""
 
-        if os.path.isfile((in_dir_name + "/others_legend_table.csv")) or os.path.isfile(
-            (in_dir_name + "/others_legend_table.json")
+        if revision.has_table("others_legend_table.csv") or revision.has_table(
+            "others_legend_table.json"
         ):
-            if os.path.isfile((in_dir_name + "/others_legend_table.json")):
+            if revision.has_table("others_legend_table.json"):
                 new_others_legend_df = pd_read_json(
-                    in_dir_name + "/others_legend_table.json",
+                    revision.table("others_legend_table.json"),
                     orient="index",
                     dtype=Legend.legend_type_dict,
                 )
             else:
                 new_others_legend_df = pd_read_csv(
-                    in_dir_name + "/others_legend_table.csv",
+                    revision.table("others_legend_table.csv"),
                     encoding="utf-8",
                     dtype=Legend.legend_type_dict,
                     keep_default_na=False,
@@ -1635,12 +1856,12 @@ class ProjectWindow(QMainWindow, Ui_ProjectWindow):
             for diff in diffs:
                 self.others_legend_df[diff] = Legend.others_legend_dict[diff]
 
-        if os.path.isfile((in_dir_name + "/prop_legend_df.csv")) or os.path.isfile(
-            (in_dir_name + "/prop_legend_df.json")
+        if revision.has_table("prop_legend_df.csv") or revision.has_table(
+            "prop_legend_df.json"
         ):
-            if os.path.isfile((in_dir_name + "/prop_legend_df.json")):
+            if revision.has_table("prop_legend_df.json"):
                 new_prop_legend_df = pd_read_json(
-                    in_dir_name + "/prop_legend_df.json",
+                    revision.table("prop_legend_df.json"),
                     orient="index",
                     dtype=PropertiesCMaps.prop_cmap_type_dict,
                 )
@@ -1655,13 +1876,13 @@ class ProjectWindow(QMainWindow, Ui_ProjectWindow):
         """--------------------- READ TABLES ---------------------"""
 
         """Read x_section table and build cross-sections. Note beginResetModel() and endResetModel()."""
-        if os.path.isfile((in_dir_name + "/xsection_table.csv")) or os.path.isfile(
-            (in_dir_name + "/xsection_table.json")
+        if revision.has_table("xsection_table.csv") or revision.has_table(
+            "xsection_table.json"
         ):
             self.xsect_coll.beginResetModel()
-            if os.path.isfile((in_dir_name + "/xsection_table.json")):
+            if revision.has_table("xsection_table.json"):
                 new_xsect_coll_df = pd_read_json(
-                    in_dir_name + "/xsection_table.json",
+                    revision.table("xsection_table.json"),
                     orient="index",
                     dtype=XSectionCollection.section_type_dict,
                 )
@@ -1677,7 +1898,7 @@ class ProjectWindow(QMainWindow, Ui_ProjectWindow):
                     self.xsect_coll.df = new_xsect_coll_df
             else:
                 self.xsect_coll.df = pd_read_csv(
-                    in_dir_name + "/xsection_table.csv",
+                    revision.table("xsection_table.csv"),
                     encoding="utf-8",
                     dtype=XSectionCollection.section_type_dict,
                     keep_default_na=False,
@@ -1687,13 +1908,11 @@ class ProjectWindow(QMainWindow, Ui_ProjectWindow):
             self.xsect_coll.endResetModel()
 
         """Read DOM table and files. Note beginResetModel() and endResetModel()."""
-        if os.path.isfile((in_dir_name + "/dom_table.csv")) or os.path.isfile(
-            (in_dir_name + "/dom_table.json")
-        ):
+        if revision.has_table("dom_table.csv") or revision.has_table("dom_table.json"):
             self.dom_coll.beginResetModel()
-            if os.path.isfile((in_dir_name + "/dom_table.json")):
+            if revision.has_table("dom_table.json"):
                 new_dom_coll_df = pd_read_json(
-                    in_dir_name + "/dom_table.json",
+                    revision.table("dom_table.json"),
                     orient="index",
                     dtype=DomCollection.dom_entity_type_dict,
                 )
@@ -1701,7 +1920,7 @@ class ProjectWindow(QMainWindow, Ui_ProjectWindow):
                     self.dom_coll.df = new_dom_coll_df
             else:
                 self.dom_coll.df = pd_read_csv(
-                    in_dir_name + "/dom_table.csv",
+                    revision.table("dom_table.csv"),
                     encoding="utf-8",
                     dtype=DomCollection.dom_entity_type_dict,
                     keep_default_na=False,
@@ -1715,23 +1934,19 @@ class ProjectWindow(QMainWindow, Ui_ProjectWindow):
             )
             for uid in self.dom_coll.df["uid"].to_list():
                 if self.dom_coll.get_uid_dom_type(uid) == "DEM":
-                    if not os.path.isfile((in_dir_name + "/" + uid + ".vts")):
+                    if not revision.has_entity(uid, ".vts"):
                         print("error: missing VTK file")
                         return
                     vtk_object = DEM()
-                    sg_reader = vtkXMLStructuredGridReader()
-                    sg_reader.SetFileName(in_dir_name + "/" + uid + ".vts")
-                    sg_reader.Update()
-                    vtk_object.ShallowCopy(sg_reader.GetOutput())
-                    vtk_object.Modified()
+                    vtk_object = self.read_vtk_entity(
+                        revision.entity(uid=uid, extension=".vts", vtk_obj=vtk_object)
+                    )
                 elif self.dom_coll.get_uid_dom_type(uid) == "DomXs":
                     xsect_uid = self.dom_coll.get_uid_x_section(uid)
                     vtk_object = XsPolyLine(x_section_uid=xsect_uid, parent=self)
-                    pl_reader = vtkXMLPolyDataReader()
-                    pl_reader.SetFileName(in_dir_name + "/" + uid + ".vtp")
-                    pl_reader.Update()
-                    vtk_object.ShallowCopy(pl_reader.GetOutput())
-                    vtk_object.Modified()
+                    vtk_object = self.read_vtk_entity(
+                        revision.entity(uid=uid, extension=".vtp", vtk_obj=vtk_object)
+                    )
                 elif (
                     self.dom_coll.df.loc[
                         self.dom_coll.df["uid"] == uid, "dom_type"
@@ -1748,23 +1963,21 @@ class ProjectWindow(QMainWindow, Ui_ProjectWindow):
                 ):
                     """Open saved PCDoms data"""
                     vtk_object = PCDom()
-                    pd_reader = vtkXMLPolyDataReader()
-                    pd_reader.SetFileName(in_dir_name + "/" + uid + ".vtp")
-                    pd_reader.Update()
-                    vtk_object.ShallowCopy(pd_reader.GetOutput())
-                    vtk_object.Modified()
+                    vtk_object = self.read_vtk_entity(
+                        revision.entity(uid=uid, extension=".vtp", vtk_obj=vtk_object)
+                    )
                 self.dom_coll.set_uid_vtk_obj(uid=uid, vtk_obj=vtk_object)
                 prgs_bar.add_one()
             self.dom_coll.endResetModel()
 
         """Read image collection and files"""
-        if os.path.isfile((in_dir_name + "/image_table.csv")) or os.path.isfile(
-            (in_dir_name + "/image_table.json")
+        if revision.has_table("image_table.csv") or revision.has_table(
+            "image_table.json"
         ):
             self.image_coll.beginResetModel()
-            if os.path.isfile((in_dir_name + "/image_table.json")):
+            if revision.has_table("image_table.json"):
                 new_image_coll_df = pd_read_json(
-                    in_dir_name + "/image_table.json",
+                    revision.table("image_table.json"),
                     orient="index",
                     dtype=ImageCollection.image_entity_type_dict,
                 )
@@ -1772,7 +1985,7 @@ class ProjectWindow(QMainWindow, Ui_ProjectWindow):
                     self.image_coll.df = new_image_coll_df
             else:
                 self.image_coll.df = pd_read_csv(
-                    in_dir_name + "/image_table.csv",
+                    revision.table("image_table.csv"),
                     encoding="utf-8",
                     dtype=ImageCollection.image_entity_type_dict,
                     keep_default_na=False,
@@ -1788,19 +2001,17 @@ class ProjectWindow(QMainWindow, Ui_ProjectWindow):
                 if self.image_coll.df.loc[
                     self.image_coll.df["uid"] == uid, "image_type"
                 ].values[0] in ["MapImage", "TSDomImage"]:
-                    if not os.path.isfile((in_dir_name + "/" + uid + ".vti")):
+                    if not revision.has_entity(uid, ".vti"):
                         print("error: missing image file")
                         return
                     vtk_object = MapImage()
-                    im_reader = vtkXMLImageDataReader()
-                    im_reader.SetFileName(in_dir_name + "/" + uid + ".vti")
-                    im_reader.Update()
-                    vtk_object.ShallowCopy(im_reader.GetOutput())
-                    vtk_object.Modified()
+                    vtk_object = self.read_vtk_entity(
+                        revision.entity(uid=uid, extension=".vti", vtk_obj=vtk_object)
+                    )
                 elif self.image_coll.df.loc[
                     self.image_coll.df["uid"] == uid, "image_type"
                 ].values[0] in ["XsImage"]:
-                    if not os.path.isfile((in_dir_name + "/" + uid + ".vti")):
+                    if not revision.has_entity(uid, ".vti"):
                         print("error: missing image file")
                         return
                     vtk_object = XsImage(
@@ -1809,35 +2020,31 @@ class ProjectWindow(QMainWindow, Ui_ProjectWindow):
                             self.image_coll.df["uid"] == uid, "x_section"
                         ].values[0],
                     )
-                    im_reader = vtkXMLImageDataReader()
-                    im_reader.SetFileName(in_dir_name + "/" + uid + ".vti")
-                    im_reader.Update()
-                    vtk_object.ShallowCopy(im_reader.GetOutput())
-                    vtk_object.Modified()
+                    vtk_object = self.read_vtk_entity(
+                        revision.entity(uid=uid, extension=".vti", vtk_obj=vtk_object)
+                    )
                 elif self.image_coll.df.loc[
                     self.image_coll.df["uid"] == uid, "image_type"
                 ].values[0] in ["Seismics"]:
-                    if not os.path.isfile((in_dir_name + "/" + uid + ".vts")):
+                    if not revision.has_entity(uid, ".vts"):
                         print("error: missing VTK file")
                         return
                     vtk_object = Seismics()
-                    sg_reader = vtkXMLStructuredGridReader()
-                    sg_reader.SetFileName(in_dir_name + "/" + uid + ".vts")
-                    sg_reader.Update()
-                    vtk_object.ShallowCopy(sg_reader.GetOutput())
-                    vtk_object.Modified()
+                    vtk_object = self.read_vtk_entity(
+                        revision.entity(uid=uid, extension=".vts", vtk_obj=vtk_object)
+                    )
                 self.image_coll.set_uid_vtk_obj(uid=uid, vtk_obj=vtk_object)
                 prgs_bar.add_one()
             self.image_coll.endResetModel()
 
         """Read mesh3d collection and files"""
-        if os.path.isfile((in_dir_name + "/mesh3d_table.csv")) or os.path.isfile(
-            (in_dir_name + "/mesh3d_table.json")
+        if revision.has_table("mesh3d_table.csv") or revision.has_table(
+            "mesh3d_table.json"
         ):
             self.mesh3d_coll.beginResetModel()
-            if os.path.isfile((in_dir_name + "/mesh3d_table.json")):
+            if revision.has_table("mesh3d_table.json"):
                 new_mesh3d_coll_df = pd_read_json(
-                    in_dir_name + "/mesh3d_table.json",
+                    revision.table("mesh3d_table.json"),
                     orient="index",
                     dtype=Mesh3DCollection.mesh3d_entity_type_dict,
                 )
@@ -1845,7 +2052,7 @@ class ProjectWindow(QMainWindow, Ui_ProjectWindow):
                     self.mesh3d_coll.df = new_mesh3d_coll_df
             else:
                 self.mesh3d_coll.df = pd_read_csv(
-                    in_dir_name + "/mesh3d_table.csv",
+                    revision.table("mesh3d_table.csv"),
                     encoding="utf-8",
                     dtype=Mesh3DCollection.mesh3d_entity_type_dict,
                     keep_default_na=False,
@@ -1861,19 +2068,17 @@ class ProjectWindow(QMainWindow, Ui_ProjectWindow):
                 if self.mesh3d_coll.df.loc[
                     self.mesh3d_coll.df["uid"] == uid, "mesh3d_type"
                 ].values[0] in ["Voxet"]:
-                    if not os.path.isfile((in_dir_name + "/" + uid + ".vti")):
+                    if not revision.has_entity(uid, ".vti"):
                         print("error: missing .mesh3d file")
                         return
                     vtk_object = Voxet()
-                    im_reader = vtkXMLImageDataReader()
-                    im_reader.SetFileName(in_dir_name + "/" + uid + ".vti")
-                    im_reader.Update()
-                    vtk_object.ShallowCopy(im_reader.GetOutput())
-                    vtk_object.Modified()
+                    vtk_object = self.read_vtk_entity(
+                        revision.entity(uid=uid, extension=".vti", vtk_obj=vtk_object)
+                    )
                 elif self.mesh3d_coll.df.loc[
                     self.mesh3d_coll.df["uid"] == uid, "mesh3d_type"
                 ].values[0] in ["XsVoxet"]:
-                    if not os.path.isfile((in_dir_name + "/" + uid + ".vti")):
+                    if not revision.has_entity(uid, ".vti"):
                         print("error: missing .mesh3d file")
                         return
                     vtk_object = XsVoxet(
@@ -1882,23 +2087,21 @@ class ProjectWindow(QMainWindow, Ui_ProjectWindow):
                         ].values[0],
                         parent=self,
                     )
-                    im_reader = vtkXMLImageDataReader()
-                    im_reader.SetFileName(in_dir_name + "/" + uid + ".vti")
-                    im_reader.Update()
-                    vtk_object.ShallowCopy(im_reader.GetOutput())
-                    vtk_object.Modified()
+                    vtk_object = self.read_vtk_entity(
+                        revision.entity(uid=uid, extension=".vti", vtk_obj=vtk_object)
+                    )
                 self.mesh3d_coll.set_uid_vtk_obj(uid=uid, vtk_obj=vtk_object)
                 prgs_bar.add_one()
             self.mesh3d_coll.endResetModel()
 
         """Read boundaries collection and files"""
-        if os.path.isfile((in_dir_name + "/boundary_table.csv")) or os.path.isfile(
-            (in_dir_name + "/boundary_table.json")
+        if revision.has_table("boundary_table.csv") or revision.has_table(
+            "boundary_table.json"
         ):
             self.boundary_coll.beginResetModel()
-            if os.path.isfile((in_dir_name + "/boundary_table.json")):
+            if revision.has_table("boundary_table.json"):
                 new_boundary_coll_df = pd_read_json(
-                    in_dir_name + "/boundary_table.json",
+                    revision.table("boundary_table.json"),
                     orient="index",
                     dtype=BoundaryCollection.boundary_entity_type_dict,
                 )
@@ -1906,7 +2109,7 @@ class ProjectWindow(QMainWindow, Ui_ProjectWindow):
                     self.boundary_coll.df = new_boundary_coll_df
             else:
                 self.boundary_coll.df = pd_read_csv(
-                    in_dir_name + "/boundary_table.csv",
+                    revision.table("boundary_table.csv"),
                     encoding="utf-8",
                     dtype=BoundaryCollection.boundary_entity_type_dict,
                     keep_default_na=False,
@@ -1919,30 +2122,28 @@ class ProjectWindow(QMainWindow, Ui_ProjectWindow):
                 parent=self,
             )
             for uid in self.boundary_coll.df["uid"].to_list():
-                if not os.path.isfile((in_dir_name + "/" + uid + ".vtp")):
+                if not revision.has_entity(uid, ".vtp"):
                     print("error: missing VTK file")
                     return
                 if self.boundary_coll.get_uid_topological_type(uid) == "PolyLine":
                     vtk_object = PolyLine()
                 elif self.boundary_coll.get_uid_topological_type(uid) == "TriSurf":
                     vtk_object = TriSurf()
-                pd_reader = vtkXMLPolyDataReader()
-                pd_reader.SetFileName(in_dir_name + "/" + uid + ".vtp")
-                pd_reader.Update()
-                vtk_object.ShallowCopy(pd_reader.GetOutput())
-                vtk_object.Modified()
+                vtk_object = self.read_vtk_entity(
+                    revision.entity(uid=uid, extension=".vtp", vtk_obj=vtk_object)
+                )
                 self.boundary_coll.set_uid_vtk_obj(uid=uid, vtk_obj=vtk_object)
                 prgs_bar.add_one()
             self.boundary_coll.endResetModel()
 
         """Read well table and files"""
-        if os.path.isfile((in_dir_name + "/well_table.csv")) or os.path.isfile(
-            (in_dir_name + "/well_table.json")
+        if revision.has_table("well_table.csv") or revision.has_table(
+            "well_table.json"
         ):
             self.well_coll.beginResetModel()
-            if os.path.isfile((in_dir_name + "/well_table.json")):
+            if revision.has_table("well_table.json"):
                 new_well_coll_df = pd_read_json(
-                    in_dir_name + "/well_table.json",
+                    revision.table("well_table.json"),
                     orient="index",
                     dtype=WellCollection.well_entity_type_dict,
                 )
@@ -1950,7 +2151,7 @@ class ProjectWindow(QMainWindow, Ui_ProjectWindow):
                     self.well_coll.df = new_well_coll_df
             else:
                 self.well_coll.df = pd_read_csv(
-                    in_dir_name + "/well_table.csv",
+                    revision.table("well_table.csv"),
                     encoding="utf-8",
                     dtype=WellCollection.well_entity_type_dict,
                     keep_default_na=False,
@@ -1963,16 +2164,15 @@ class ProjectWindow(QMainWindow, Ui_ProjectWindow):
                 parent=self,
             )
             for uid in self.well_coll.df["uid"].to_list():
-                if not os.path.isfile((in_dir_name + "/" + uid + ".vtp")):
+                if not revision.has_entity(uid, ".vtp"):
                     print("error: missing VTK file")
                     return
-                vtk_object = Well()
-                pd_reader = vtkXMLPolyDataReader()
-                pd_reader.SetFileName(in_dir_name + "/" + uid + ".vtp")
-                pd_reader.Update()
-                vtk_object.trace = pd_reader.GetOutput()
+                """Only the trace of a Well is stored in the collection."""
+                vtk_object = self.read_vtk_entity(
+                    revision.entity(uid=uid, extension=".vtp", vtk_obj=WellTrace())
+                )
 
-                self.well_coll.set_uid_vtk_obj(uid=uid, vtk_obj=vtk_object.trace)
+                self.well_coll.set_uid_vtk_obj(uid=uid, vtk_obj=vtk_object)
                 # Don't know if I like it.
                 # Maybe it's better to always add to the vtkobject column the
                 # Well and not the WellTrace instance and then call well.trace/head where needed
@@ -1981,13 +2181,13 @@ class ProjectWindow(QMainWindow, Ui_ProjectWindow):
         self.prop_legend.update_widget(parent=self)
 
         """Read geological table and files. Note beginResetModel() and endResetModel()."""
-        if os.path.isfile((in_dir_name + "/geological_table.csv")) or os.path.isfile(
-            (in_dir_name + "/geological_table.json")
+        if revision.has_table("geological_table.csv") or revision.has_table(
+            "geological_table.json"
         ):
             self.geol_coll.beginResetModel()
-            if os.path.isfile((in_dir_name + "/geological_table.json")):
+            if revision.has_table("geological_table.json"):
                 new_geol_coll_df = pd_read_json(
-                    in_dir_name + "/geological_table.json",
+                    revision.table("geological_table.json"),
                     orient="index",
                     dtype=GeologicalCollection.geological_entity_type_dict,
                 )
@@ -1995,7 +2195,7 @@ class ProjectWindow(QMainWindow, Ui_ProjectWindow):
                     self.geol_coll.df = new_geol_coll_df
             else:
                 self.geol_coll.df = pd_read_csv(
-                    in_dir_name + "/geological_table.csv",
+                    revision.table("geological_table.csv"),
                     encoding="utf-8",
                     dtype=GeologicalCollection.geological_entity_type_dict,
                     keep_default_na=False,
@@ -2008,7 +2208,7 @@ class ProjectWindow(QMainWindow, Ui_ProjectWindow):
                 parent=self,
             )
             for uid in self.geol_coll.df["uid"].to_list():
-                if not os.path.isfile((in_dir_name + "/" + uid + ".vtp")):
+                if not revision.has_entity(uid, ".vtp"):
                     print("error: missing VTK file")
                     return
                 if self.geol_coll.get_uid_topological_type(uid) == "VertexSet":
@@ -2028,11 +2228,9 @@ class ProjectWindow(QMainWindow, Ui_ProjectWindow):
                     vtk_object = XsPolyLine(
                         self.geol_coll.get_uid_x_section(uid), parent=self
                     )
-                pd_reader = vtkXMLPolyDataReader()
-                pd_reader.SetFileName(in_dir_name + "/" + uid + ".vtp")
-                pd_reader.Update()
-                vtk_object.ShallowCopy(pd_reader.GetOutput())
-                vtk_object.Modified()
+                vtk_object = self.read_vtk_entity(
+                    revision.entity(uid=uid, extension=".vtp", vtk_obj=vtk_object)
+                )
                 self.geol_coll.set_uid_vtk_obj(uid=uid, vtk_obj=vtk_object)
                 prgs_bar.add_one()
             self.geol_coll.endResetModel()
@@ -2040,13 +2238,13 @@ class ProjectWindow(QMainWindow, Ui_ProjectWindow):
         self.prop_legend.update_widget(parent=self)
 
         """Read fluids table and files. Note beginResetModel() and endResetModel()."""
-        if os.path.isfile((in_dir_name + "/fluids_table.csv")) or os.path.isfile(
-            (in_dir_name + "/fluids_table.json")
+        if revision.has_table("fluids_table.csv") or revision.has_table(
+            "fluids_table.json"
         ):
             self.fluids_coll.beginResetModel()
-            if os.path.isfile((in_dir_name + "/fluids_table.json")):
+            if revision.has_table("fluids_table.json"):
                 new_fluids_coll_df = pd_read_json(
-                    in_dir_name + "/fluids_table.json",
+                    revision.table("fluids_table.json"),
                     orient="index",
                     dtype=FluidsCollection.fluid_entity_type_dict,
                 )
@@ -2054,7 +2252,7 @@ class ProjectWindow(QMainWindow, Ui_ProjectWindow):
                     self.fluids_coll.df = new_fluids_coll_df
             else:
                 self.fluids_coll.df = pd_read_csv(
-                    in_dir_name + "/fluids_table.csv",
+                    revision.table("fluids_table.csv"),
                     encoding="utf-8",
                     dtype=FluidsCollection.fluid_entity_type_dict,
                     keep_default_na=False,
@@ -2067,7 +2265,7 @@ class ProjectWindow(QMainWindow, Ui_ProjectWindow):
                 parent=self,
             )
             for uid in self.fluids_coll.df["uid"].to_list():
-                if not os.path.isfile((in_dir_name + "/" + uid + ".vtp")):
+                if not revision.has_entity(uid, ".vtp"):
                     print("error: missing VTK file")
                     return
                 if self.fluids_coll.get_uid_topological_type(uid) == "VertexSet":
@@ -2084,11 +2282,9 @@ class ProjectWindow(QMainWindow, Ui_ProjectWindow):
                     vtk_object = XsPolyLine(
                         self.fluids_coll.get_uid_x_section(uid), parent=self
                     )
-                pd_reader = vtkXMLPolyDataReader()
-                pd_reader.SetFileName(in_dir_name + "/" + uid + ".vtp")
-                pd_reader.Update()
-                vtk_object.ShallowCopy(pd_reader.GetOutput())
-                vtk_object.Modified()
+                vtk_object = self.read_vtk_entity(
+                    revision.entity(uid=uid, extension=".vtp", vtk_obj=vtk_object)
+                )
                 self.fluids_coll.set_uid_vtk_obj(uid=uid, vtk_obj=vtk_object)
                 prgs_bar.add_one()
             self.fluids_coll.endResetModel()
@@ -2096,13 +2292,13 @@ class ProjectWindow(QMainWindow, Ui_ProjectWindow):
         self.prop_legend.update_widget(parent=self)
 
         """Read Backgrounds table and files. Note beginResetModel() and endResetModel()."""
-        if os.path.isfile((in_dir_name + "/backgrounds_table.csv")) or os.path.isfile(
-            (in_dir_name + "/backgrounds_table.json")
+        if revision.has_table("backgrounds_table.csv") or revision.has_table(
+            "backgrounds_table.json"
         ):
             self.backgrounds_coll.beginResetModel()
-            if os.path.isfile((in_dir_name + "/backgrounds_table.json")):
+            if revision.has_table("backgrounds_table.json"):
                 new_backgrounds_coll_df = pd_read_json(
-                    in_dir_name + "/backgrounds_table.json",
+                    revision.table("backgrounds_table.json"),
                     orient="index",
                     dtype=FluidsCollection.fluid_entity_type_dict,
                 )
@@ -2110,7 +2306,7 @@ class ProjectWindow(QMainWindow, Ui_ProjectWindow):
                     self.backgrounds_coll.df = new_backgrounds_coll_df
             else:
                 self.backgrounds_coll.df = pd_read_csv(
-                    in_dir_name + "/backgrounds_table.csv",
+                    revision.table("backgrounds_table.csv"),
                     encoding="utf-8",
                     dtype=FluidsCollection.fluid_entity_type_dict,
                     keep_default_na=False,
@@ -2123,7 +2319,7 @@ class ProjectWindow(QMainWindow, Ui_ProjectWindow):
                 parent=self,
             )
             for uid in self.backgrounds_coll.df["uid"].to_list():
-                if not os.path.isfile((in_dir_name + "/" + uid + ".vtp")):
+                if not revision.has_entity(uid, ".vtp"):
                     print("error: missing VTK file")
                     return
                 if self.backgrounds_coll.get_uid_topological_type(uid) == "VertexSet":
@@ -2136,16 +2332,26 @@ class ProjectWindow(QMainWindow, Ui_ProjectWindow):
                 #     vtk_object = XsVertexSet(self.backgrounds_coll.get_uid_x_section(uid), parent=self)
                 # elif self.backgrounds_coll.get_uid_topological_type(uid) == 'XsPolyLine':
                 #     vtk_object = XsPolyLine(self.backgrounds_coll.get_uid_x_section(uid), parent=self)
-                pd_reader = vtkXMLPolyDataReader()
-                pd_reader.SetFileName(in_dir_name + "/" + uid + ".vtp")
-                pd_reader.Update()
-                vtk_object.ShallowCopy(pd_reader.GetOutput())
-                vtk_object.Modified()
+                vtk_object = self.read_vtk_entity(
+                    revision.entity(uid=uid, extension=".vtp", vtk_obj=vtk_object)
+                )
                 self.backgrounds_coll.set_uid_vtk_obj(uid=uid, vtk_obj=vtk_object)
                 prgs_bar.add_one()
             self.backgrounds_coll.endResetModel()
         """Update legend."""
         self.prop_legend.update_widget(parent=self)
+        self.TextTerminal.appendPlainText(
+            "Project opened in "
+            + str(round(perf_counter() - start_time, 2))
+            + " s"
+            + (" with lazy loading" if self.lazy_loading else "")
+            + "\n"
+        )
+        """Entities are autosaved from now on, and unchanged entities are not copied if they are
+        already in the object store used by autosave."""
+        self.autosave_manager.reset(
+            manifest=revision.manifest if isinstance(revision, FolderRevision) else None
+        )
 
     """Methods used to import entities from other file formats."""
 
@@ -2424,8 +2630,7 @@ class ProjectWindow(QMainWindow, Ui_ProjectWindow):
             os.mkdir(f"{out_dir_name}/dxf")
             vtk2dxf(self=self, out_dir_name=out_dir_name)
         elif cad_format == "GOCAD":
-            # vtk2gocad(self=self, out_file_name=(out_dir_name + '/gocad_ascii.gp'))
-            pass
+            vtk2gocad(self=self, out_file_name=(out_dir_name + "/gocad_ascii.gp"))
         elif cad_format == "GLTF":
             vtk2gltf(self=self, out_dir_name=out_dir_name)
         elif cad_format == "CESIUM":
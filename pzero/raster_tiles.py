@@ -0,0 +1,394 @@
+"""raster_tiles.py
+PZero© Andrea Bistacchi
+
+Tiled, multi-resolution access to large georeferenced rasters (DEMs and orthoimages), used by the DEM and
+MapImage entities imported by dem2vtk and geo_image2vtk, instead of reading the whole raster in memory.
+
+Rasters are read by windows with rasterio. Each raster is divided in square tiles of raster_tile_size
+pixels on a pyramid of levels, where the pixels of level l are 2**l times larger than those of the
+raster. Windows of coarse levels are read from the overviews of the raster, that are built once as an
+external .ovr file next to it if the raster has none (see build_overviews), so that reading a tile takes
+about the same time at any level. The last tiles read are cached in memory.
+
+The entity added to the project is an overview of the raster, at the first level that fits in
+raster_overview_size pixels, with the raster file name in its field data, so that the raster is not read
+again when a project is opened. Smaller rasters are read whole, as before. 3D views replace the overview
+with a mosaic of the tiles in the view frustum, at the level needed for the camera (see select_tiles).
+"""
+
+import os
+from collections import OrderedDict
+
+import rasterio as rio
+from numpy import abs as np_abs
+from numpy import arange as np_arange
+from numpy import array as np_array
+from numpy import ascontiguousarray as np_ascontiguousarray
+from numpy import empty as np_empty
+from numpy import flatnonzero as np_flatnonzero
+from numpy import float32 as np_float32
+from numpy import meshgrid as np_meshgrid
+from numpy import minimum as np_minimum
+from numpy import nan as np_nan
+from numpy import radians as np_radians
+from numpy import result_type as np_result_type
+from numpy import sqrt as np_sqrt
+from numpy import tan as np_tan
+from pyvista import StructuredGrid as pv_StructuredGrid
+from rasterio.enums import Resampling
+from rasterio.errors import RasterioError
+from rasterio.windows import Window
+from vtk import vtkStringArray
+from vtkmodules.util import numpy_support
+
+from pzero.entities_factory import DEM, MapImage
+
+"""Size in pixels of the side of the tiles."""
+raster_tile_size = 512
+
+"""Maximum size in pixels of the side of the overview of a raster stored in an entity. Rasters up to this
+size are read whole."""
+raster_overview_size = 1024
+
+"""Maximum number of tiles kept in memory for each raster."""
+raster_cache_tiles = 64
+
+"""Default maximum number of raster pixels shown for each raster in a view."""
+raster_pixel_budget_default = 4000000
+
+"""Default size on screen, in pixels, of a raster pixel below which finer levels are not read."""
+raster_pixel_error_default = 1.0
+
+"""Name of the field data array where the file name of a tiled raster is stored."""
+raster_field_data_key = "raster_file_name"
+
+"""RasterTiles of the rasters opened so far, by file name, shared by all entities and views, so that
+tiles are cached once."""
+raster_tiles_opened = {}
+
+
+def build_overviews(file_name=None):
+    """Build the overviews of a raster larger than raster_overview_size, with factors 2, 4, ... up to the
+    first level that fits in a tile, unless it already has overviews. Overviews are written by GDAL in an
+    external .ovr file next to the raster, that is opened in update mode but not modified. Returns False
+    if they could not be built, e.g. in a read-only folder."""
+    with rio.open(file_name) as dataset:
+        if dataset.overviews(1):
+            return True
+        size = max(dataset.width, dataset.height)
+    if size <= raster_overview_size:
+        return True
+    factors = []
+    while size / 2 ** len(factors) > raster_tile_size:
+        factors.append(2 ** (len(factors) + 1))
+    try:
+        with rio.Env(TIFF_USE_OVR=True):
+            with rio.open(file_name, "r+") as dataset:
+                dataset.build_overviews(factors, Resampling.average)
+    except RasterioError as error:
+        print("Raster overviews not built: ", error)
+        return False
+    return True
+
+
+def dem_from_array(values=None, x=None, y=None):
+    """DEM structured grid with elevation values, a (n_rows, n_cols) array, at the pixel centers with
+    coordinates x (n_cols) and y (n_rows), laid out as the DEMs of dem2vtk."""
+    """Helpful: https://github.com/pyvista/pyvista-support/issues/205, thanks to Bane Sullivan"""
+    xx, yy = np_meshgrid(x, y)
+    dem = DEM()
+    temp_obj = pv_StructuredGrid(xx, yy, values)
+    temp_obj["elevation"] = values.ravel(order="F")
+    dem.ShallowCopy(temp_obj)
+    dem.Modified()
+    return dem
+
+
+def map_image_from_array(bands=None, origin=None, spacing=None):
+    """MapImage with the bands of a (count, n_rows, n_cols) array, with the first pixel center at origin
+    (X, Y) and pixel size spacing (X, Y), negative along Y for north-up images, so that image coords 0,0
+    are at upper-left. One band is shown in greyscale, three or four as RGB or RGBA. Returns None for other
+    numbers of bands.
+    DO NOT specify the array type as e.g. in array_type=vtk.VTK_CHAR"""
+    count, n_rows, n_cols = bands.shape
+    if count == 1:
+        vtk_array = numpy_support.numpy_to_vtk(bands[0].ravel(), deep=True)
+        vtk_array.SetName("greyscale")
+    elif count in [3, 4]:
+        vtk_array = numpy_support.numpy_to_vtk(
+            np_ascontiguousarray(bands.transpose(1, 2, 0)).reshape(-1, count),
+            deep=True,
+        )
+        vtk_array.SetName("RGB")
+    else:
+        return None
+    map_image = MapImage()
+    map_image.SetDimensions(n_cols, n_rows, 1)
+    map_image.SetSpacing([spacing[0], spacing[1], 1])
+    map_image.SetOrigin([origin[0], origin[1], 0])
+    map_image.GetPointData().AddArray(vtk_array)
+    map_image.GetPointData().SetActiveScalars(vtk_array.GetName())
+    return map_image
+
+
+class RasterTiles:
+    """Pyramid of square tiles of a raster, read by windows with rasterio. Tiles on the right and bottom
+    borders of a level may be smaller than raster_tile_size. Use RasterTiles.from_vtk to get the
+    RasterTiles of an entity, shared with the other entities of the same raster."""
+
+    def __init__(self, file_name=None):
+        self.file_name = os.path.abspath(file_name)
+        self.dataset = rio.open(self.file_name)
+        self.width = self.dataset.width
+        self.height = self.dataset.height
+        self.count = self.dataset.count
+        self.dtype = self.dataset.dtypes[0]
+        self.nodata = self.dataset.nodata
+        self.transform = self.dataset.transform
+        self.n_levels = 1
+        while max(self.level_shape(level=self.n_levels - 1)) > raster_tile_size:
+            self.n_levels += 1
+        """Cached tiles, as {(level, row, col): array}, least recently used first."""
+        self.tiles = OrderedDict()
+
+    @classmethod
+    def from_vtk(cls, vtk_obj=None):
+        """RasterTiles of the raster whose file name is stored in the field data of vtk_obj, or None if
+        vtk_obj has been read whole or the raster cannot be found."""
+        field_data = vtk_obj.GetFieldData()
+        if not field_data.HasArray(raster_field_data_key):
+            return None
+        file_name = field_data.GetAbstractArray(raster_field_data_key).GetValue(0)
+        if file_name not in raster_tiles_opened:
+            if not os.path.isfile(file_name):
+                print("Raster file not found: ", file_name)
+                return None
+            raster_tiles_opened[file_name] = cls(file_name=file_name)
+        return raster_tiles_opened[file_name]
+
+    def to_vtk(self, vtk_obj=None):
+        """Store the file name of the raster in the field data of vtk_obj."""
+        file_name = vtkStringArray()
+        file_name.SetName(raster_field_data_key)
+        file_name.InsertNextValue(self.file_name)
+        vtk_obj.GetFieldData().AddArray(file_name)
+
+    def level_shape(self, level=None):
+        """Number of rows and columns of the pixels of a level."""
+        factor = 2**level
+        return -(-self.height // factor), -(-self.width // factor)
+
+    def tiles_shape(self, level=None):
+        """Number of rows and columns of the tiles of a level."""
+        n_rows, n_cols = self.level_shape(level=level)
+        return -(-n_rows // raster_tile_size), -(-n_cols // raster_tile_size)
+
+    def overview_level(self):
+        """First level that fits in raster_overview_size pixels, 0 if the raster is read whole."""
+        level = 0
+        while max(self.level_shape(level=level)) > raster_overview_size:
+            level += 1
+        return level
+
+    def read_tile(self, level=None, row=None, col=None):
+        """Bands of a tile, as a (count, n_rows, n_cols) array, read from the raster (or its overviews)
+        unless it is cached."""
+        key = (level, row, col)
+        if key in self.tiles:
+            self.tiles.move_to_end(key)
+            return self.tiles[key]
+        factor = 2**level
+        n_rows, n_cols = self.level_shape(level=level)
+        out_rows = min(raster_tile_size, n_rows - row * raster_tile_size)
+        out_cols = min(raster_tile_size, n_cols - col * raster_tile_size)
+        col_off = col * raster_tile_size * factor
+        row_off = row * raster_tile_size * factor
+        tile = self.dataset.read(
+            window=Window(
+                col_off,
+                row_off,
+                min(out_cols * factor, self.width - col_off),
+                min(out_rows * factor, self.height - row_off),
+            ),
+            out_shape=(self.count, out_rows, out_cols),
+            resampling=Resampling.nearest,
+        )
+        self.tiles[key] = tile
+        if len(self.tiles) > raster_cache_tiles:
+            self.tiles.popitem(last=False)
+        return tile
+
+    def read_window(self, level=None, tile_rows=None, tile_cols=None):
+        """Mosaic of the tiles of a level in the ranges tile_rows and tile_cols, given as (first, last + 1),
+        as a (count, n_rows, n_cols) array, with row and column of its first pixel."""
+        n_rows, n_cols = self.level_shape(level=level)
+        row_0 = tile_rows[0] * raster_tile_size
+        col_0 = tile_cols[0] * raster_tile_size
+        bands = np_empty(
+            (
+                self.count,
+                min(tile_rows[1] * raster_tile_size, n_rows) - row_0,
+                min(tile_cols[1] * raster_tile_size, n_cols) - col_0,
+            ),
+            dtype=self.dtype,
+        )
+        for row in range(*tile_rows):
+            for col in range(*tile_cols):
+                tile = self.read_tile(level=level, row=row, col=col)
+                first_row = row * raster_tile_size - row_0
+                first_col = col * raster_tile_size - col_0
+                bands[
+                    :,
+                    first_row : first_row + tile.shape[1],
+                    first_col : first_col + tile.shape[2],
+                ] = tile
+        return bands, row_0, col_0
+
+    def pixel_size(self, level=None):
+        """Size of the pixels of a level along X and Y (negative for north-up rasters)."""
+        return self.transform.a * 2**level, self.transform.e * 2**level
+
+    def pixel_centers(self, level=None, rows=None, cols=None):
+        """X of the centers of the pixels in columns cols and Y of those in rows rows of a level."""
+        x_size, y_size = self.pixel_size(level=level)
+        return (
+            self.transform.c + (cols + 0.5) * x_size,
+            self.transform.f + (rows + 0.5) * y_size,
+        )
+
+    def window_selection(self, level=None, tile_rows=None, tile_cols=None):
+        """Level and tile ranges of a window, defaulting to the whole overview."""
+        if level is None:
+            level = self.overview_level()
+        n_tile_rows, n_tile_cols = self.tiles_shape(level=level)
+        return level, tile_rows or (0, n_tile_rows), tile_cols or (0, n_tile_cols)
+
+    def window_dem(self, level=None, tile_rows=None, tile_cols=None):
+        """DEM of the first band of the mosaic of the tiles in tile_rows and tile_cols of a level (see
+        read_window), or of the whole overview by default, with NaN for nodata."""
+        level, tile_rows, tile_cols = self.window_selection(
+            level=level, tile_rows=tile_rows, tile_cols=tile_cols
+        )
+        bands, row_0, col_0 = self.read_window(
+            level=level, tile_rows=tile_rows, tile_cols=tile_cols
+        )
+        values = bands[0].astype(np_result_type(bands.dtype, np_float32))
+        if self.nodata is not None:
+            values[values == self.nodata] = np_nan
+        x, y = self.pixel_centers(
+            level=level,
+            rows=np_arange(row_0, row_0 + values.shape[0]),
+            cols=np_arange(col_0, col_0 + values.shape[1]),
+        )
+        return dem_from_array(values=values, x=x, y=y)
+
+    def window_map_image(self, level=None, tile_rows=None, tile_cols=None):
+        """MapImage of the mosaic of the tiles in tile_rows and tile_cols of a level (see read_window), or
+        of the whole overview by default, or None if the bands are not supported."""
+        level, tile_rows, tile_cols = self.window_selection(
+            level=level, tile_rows=tile_rows, tile_cols=tile_cols
+        )
+        bands, row_0, col_0 = self.read_window(
+            level=level, tile_rows=tile_rows, tile_cols=tile_cols
+        )
+        x, y = self.pixel_centers(level=level, rows=row_0, cols=col_0)
+        return map_image_from_array(
+            bands=bands, origin=(x, y), spacing=self.pixel_size(level=level)
+        )
+
+    def tile_boxes(self, level=None, z_range=None):
+        """Centers and half sizes along X, Y and Z of the boxes of the tiles of a level, whose Z range is
+        z_range, as (n_tiles, 3) arrays with tiles ordered by row and column."""
+        factor = 2**level * raster_tile_size
+        n_tile_rows, n_tile_cols = self.tiles_shape(level=level)
+        x_edges = self.transform.c + self.transform.a * np_minimum(
+            np_arange(n_tile_cols + 1) * factor, self.width
+        )
+        y_edges = self.transform.f + self.transform.e * np_minimum(
+            np_arange(n_tile_rows + 1) * factor, self.height
+        )
+        x_centers, y_centers = np_meshgrid(
+            (x_edges[:-1] + x_edges[1:]) / 2, (y_edges[:-1] + y_edges[1:]) / 2
+        )
+        x_half, y_half = np_meshgrid(
+            np_abs(x_edges[1:] - x_edges[:-1]) / 2,
+            np_abs(y_edges[1:] - y_edges[:-1]) / 2,
+        )
+        n_tiles = n_tile_rows * n_tile_cols
+        centers = np_empty((n_tiles, 3))
+        half_sizes = np_empty((n_tiles, 3))
+        centers[:, 0], centers[:, 1] = x_centers.ravel(), y_centers.ravel()
+        centers[:, 2] = (z_range[0] + z_range[1]) / 2
+        half_sizes[:, 0], half_sizes[:, 1] = x_half.ravel(), y_half.ravel()
+        half_sizes[:, 2] = (z_range[1] - z_range[0]) / 2
+        return centers, half_sizes
+
+    def select_tiles(
+        self,
+        camera=None,
+        viewport_size=None,
+        z_range=None,
+        pixel_budget=None,
+        pixel_error=None,
+    ):
+        """Level and tile ranges (level, tile_rows, tile_cols) of the mosaic to show for camera (a
+        vtkCamera), for a viewport of viewport_size (width, height) pixels, or None if the raster, with
+        elevations in z_range, is out of the view frustum. Levels are refined from the coarsest, keeping
+        the tiles in the frustum, until a pixel of the level is at most pixel_error pixels on screen at the
+        nearest tile, or the next level would exceed pixel_budget pixels."""
+        if pixel_budget is None:
+            pixel_budget = raster_pixel_budget_default
+        if pixel_error is None:
+            pixel_error = raster_pixel_error_default
+        width, height = viewport_size
+        planes = [0.0] * 24
+        camera.GetFrustumPlanes(width / max(height, 1), planes)
+        """Only the side planes are used, since the near and far planes are set by the renderer on the
+        bounds of the actors shown, that may not include tiles of the raster out of the mosaic shown."""
+        planes = np_array(planes).reshape(6, 4)[:4]
+        selection = None
+        for level in range(self.n_levels - 1, -1, -1):
+            centers, half_sizes = self.tile_boxes(level=level, z_range=z_range)
+            """A box is outside the frustum if it is completely on the outer side of a plane, whose
+            normal points inward."""
+            distances = centers @ planes[:, :3].T + planes[:, 3]
+            radii = half_sizes @ np_abs(planes[:, :3]).T
+            visible = np_flatnonzero((distances >= -radii).all(axis=1))
+            if len(visible) == 0:
+                return selection
+            n_tile_cols = self.tiles_shape(level=level)[1]
+            rows, cols = visible // n_tile_cols, visible % n_tile_cols
+            tile_rows = (int(rows.min()), int(rows.max()) + 1)
+            tile_cols = (int(cols.min()), int(cols.max()) + 1)
+            n_rows, n_cols = self.level_shape(level=level)
+            n_pixels = (
+                min(tile_rows[1] * raster_tile_size, n_rows)
+                - tile_rows[0] * raster_tile_size
+            ) * (
+                min(tile_cols[1] * raster_tile_size, n_cols)
+                - tile_cols[0] * raster_tile_size
+            )
+            if selection is not None and n_pixels > pixel_budget:
+                return selection
+            selection = (level, tile_rows, tile_cols)
+            if camera.GetParallelProjection():
+                pixels_per_unit = height / (2 * camera.GetParallelScale())
+            else:
+                camera_distances = np_sqrt(
+                    ((centers[visible] - np_array(camera.GetPosition())) ** 2).sum(
+                        axis=1
+                    )
+                )
+                camera_distance = max(
+                    (
+                        camera_distances
+                        - np_sqrt((half_sizes[visible] ** 2).sum(axis=1))
+                    ).min(),
+                    1e-9,
+                )
+                pixels_per_unit = height / (
+                    2 * camera_distance * np_tan(np_radians(camera.GetViewAngle()) / 2)
+                )
+            if abs(self.pixel_size(level=level)[0]) * pixels_per_unit <= pixel_error:
+                return selection
+        return selection
@@ -0,0 +1,503 @@
+"""segy_cube.py
+PZero© Andrea Bistacchi
+
+Lazy access to post-stack 3D SEG-Y seismic cubes, used by Seismics entities (see segy2vtk.py) instead of
+reading the whole cube in a vtkStructuredGrid with vtkSegYReader.
+
+A SEG-Y file is made of a 3200 bytes textual header, a 400 bytes binary header, optional 3200 bytes
+extended textual headers, and a sequence of traces, each with a 240 bytes header followed by its samples,
+all with the same number of samples in a post-stack cube. The trace headers are scanned once, reading
+only their inline, crossline and CDP coordinates fields, to build the index of the trace of each node of
+the (inline, crossline) grid of the survey, and the affine transformation from inline and crossline
+numbers to map coordinates. Traces are then memory-mapped, so that only the traces and samples of the
+slices and sections that are requested are read from disk, and a cube does not need to fit in memory.
+
+The index is stored in the field data of the Seismics entity, so that the file is not scanned again when
+a project is opened. Grids built from a cube follow vtkSegYReader: the amplitude array is called "trace",
+and Z is minus the sample time in ms (or depth), with points ordered by crossline, inline and sample.
+"""
+
+import os
+
+from numpy import arange as np_arange
+from numpy import array as np_array
+from numpy import ascontiguousarray as np_ascontiguousarray
+from numpy import ceil as np_ceil
+from numpy import column_stack as np_column_stack
+from numpy import dtype as np_dtype
+from numpy import empty as np_empty
+from numpy import flatnonzero as np_flatnonzero
+from numpy import float32 as np_float32
+from numpy import float64 as np_float64
+from numpy import fromfile as np_fromfile
+from numpy import full as np_full
+from numpy import int32 as np_int32
+from numpy import int64 as np_int64
+from numpy import interp as np_interp
+from numpy import ldexp as np_ldexp
+from numpy import linspace as np_linspace
+from numpy import memmap as np_memmap
+from numpy import ones as np_ones
+from numpy import repeat as np_repeat
+from numpy import rint as np_rint
+from numpy import tile as np_tile
+from numpy import uint32 as np_uint32
+from numpy import unique as np_unique
+from numpy import where as np_where
+from numpy import zeros as np_zeros
+from numpy.linalg import lstsq as np_linalg_lstsq
+from numpy.linalg import norm as np_linalg_norm
+from vtk import vtkImageData, vtkStringArray
+from vtkmodules.util.numpy_support import numpy_to_vtk, vtk_to_numpy
+
+from pzero.entities_factory import Seismics
+
+"""Sizes of the headers of a SEG-Y file."""
+segy_textual_header_size = 3200
+segy_binary_header_size = 400
+segy_trace_header_size = 240
+
+"""Numpy dtypes of the samples, for the supported data sample format codes of the binary header. IBM
+floats (code 1) are read as big endian unsigned integers and converted with ibm2ieee."""
+segy_sample_formats = {1: ">u4", 2: ">i4", 3: ">i2", 5: ">f4", 8: "i1"}
+
+"""Default position (first byte, one-based as in the SEG-Y standard) of the inline and crossline numbers
+and of the CDP X and Y coordinates in the trace headers."""
+segy_inline_byte = 189
+segy_crossline_byte = 193
+segy_x_byte = 181
+segy_y_byte = 185
+
+"""Number of trace headers read at once when scanning a file."""
+segy_scan_traces = 100000
+
+"""Maximum number of nodes along each axis of the overview grid of a cube stored in a Seismics."""
+segy_overview_nodes = 64
+
+"""Names of the field data arrays where the index of a cube is stored."""
+segy_field_data_keys = [
+    "segy_file_name",
+    "segy_layout",
+    "segy_inlines",
+    "segy_crosslines",
+    "segy_trace_index",
+    "segy_transform",
+]
+
+
+def ibm2ieee(words=None):
+    """Convert IBM System/360 single precision floats, given as unsigned 32 bit integers, to float32."""
+    words = words.astype(np_uint32, copy=False)
+    sign = np_where(words >> 31, -1.0, 1.0)
+    exponent = ((words >> 24) & 0x7F).astype(np_int32) - 64
+    fraction = (words & 0x00FFFFFF) / float(2**24)
+    return (sign * np_ldexp(fraction, 4 * exponent)).astype(np_float32)
+
+
+def read_binary_header(file_name=None):
+    """Read the layout of the traces of a SEG-Y file from its binary header. Returns the byte where the
+    first trace starts, the number of samples per trace, the sample format code and the sample interval in
+    microseconds (or in the depth unit multiplied by 1000). Raises ValueError if the number of samples or
+    the format are not supported."""
+    header = np_fromfile(
+        file_name, dtype=">i2", count=segy_binary_header_size // 2, offset=3200
+    )
+    sample_interval = int(header[8])
+    n_samples = int(header[10])
+    format_code = int(header[12])
+    n_extended_headers = max(int(header[152]), 0)
+    if n_samples <= 0:
+        raise ValueError("SEG-Y number of samples not defined in the binary header")
+    if format_code not in segy_sample_formats:
+        raise ValueError(f"SEG-Y data sample format {format_code} not supported")
+    data_offset = (
+        segy_textual_header_size
+        + segy_binary_header_size
+        + segy_textual_header_size * n_extended_headers
+    )
+    return data_offset, n_samples, format_code, sample_interval
+
+
+class SegyCube:
+    """Index and memory-mapped traces of a post-stack 3D SEG-Y cube. Create it with SegyCube.scan for a
+    new file, or with SegyCube.from_vtk for a file already scanned, whose index is stored in the field
+    data of a Seismics."""
+
+    def __init__(
+        self,
+        file_name=None,
+        layout=None,
+        inlines=None,
+        crosslines=None,
+        trace_index=None,
+        transform=None,
+    ):
+        """layout is (data_offset, n_samples, format_code, sample_interval), inlines and crosslines are
+        the sorted inline and crossline numbers of the survey grid, trace_index is the (n_inlines,
+        n_crosslines) array of the trace of each node (-1 for missing traces) and transform is the (3, 2)
+        affine matrix from [inline, crossline, 1] to map [X, Y]."""
+        self.file_name = file_name
+        self.data_offset, self.n_samples, self.format_code, self.sample_interval = [
+            int(value) for value in layout
+        ]
+        self.inlines = inlines
+        self.crosslines = crosslines
+        self.trace_index = trace_index
+        self.transform = transform
+        self.sample_dtype = np_dtype(segy_sample_formats[self.format_code])
+        self.trace_size = (
+            segy_trace_header_size + self.n_samples * self.sample_dtype.itemsize
+        )
+        n_traces = (os.path.getsize(file_name) - self.data_offset) // self.trace_size
+        """The samples of all traces, as a (n_traces, n_samples) array mapped on the file, skipping the
+        trace headers. Nothing is read until it is indexed."""
+        self.samples = np_memmap(
+            file_name,
+            dtype=np_dtype(
+                {
+                    "names": ["samples"],
+                    "formats": [(self.sample_dtype, (self.n_samples,))],
+                    "offsets": [segy_trace_header_size],
+                    "itemsize": self.trace_size,
+                }
+            ),
+            mode="r",
+            offset=self.data_offset,
+            shape=(n_traces,),
+        )["samples"]
+
+    @classmethod
+    def scan(
+        cls,
+        file_name=None,
+        inline_byte=None,
+        crossline_byte=None,
+        x_byte=None,
+        y_byte=None,
+    ):
+        """Scan the trace headers of a SEG-Y file once, in chunks of segy_scan_traces traces, and build its
+        index. Header bytes default to the standard ones (segy_inline_byte etc.). Raises ValueError if the
+        file is not a 3D cube, with traces on at least two inlines and crosslines."""
+        file_name = os.path.abspath(file_name)
+        data_offset, n_samples, format_code, sample_interval = read_binary_header(
+            file_name=file_name
+        )
+        trace_size = (
+            segy_trace_header_size
+            + n_samples * np_dtype(segy_sample_formats[format_code]).itemsize
+        )
+        n_traces = (os.path.getsize(file_name) - data_offset) // trace_size
+        if n_traces < 4:
+            raise ValueError("SEG-Y file with less than 4 traces")
+        headers = np_memmap(
+            file_name,
+            dtype=np_dtype(
+                {
+                    "names": ["inline", "crossline", "x", "y", "scalar"],
+                    "formats": [">i4", ">i4", ">i4", ">i4", ">i2"],
+                    "offsets": [
+                        (inline_byte or segy_inline_byte) - 1,
+                        (crossline_byte or segy_crossline_byte) - 1,
+                        (x_byte or segy_x_byte) - 1,
+                        (y_byte or segy_y_byte) - 1,
+                        70,
+                    ],
+                    "itemsize": trace_size,
+                }
+            ),
+            mode="r",
+            offset=data_offset,
+            shape=(n_traces,),
+        )
+        trace_inlines = np_empty(n_traces, dtype=np_int64)
+        trace_crosslines = np_empty(n_traces, dtype=np_int64)
+        trace_xy = np_empty((n_traces, 2))
+        for start in range(0, n_traces, segy_scan_traces):
+            chunk = np_array(headers[start : start + segy_scan_traces])
+            stop = start + len(chunk)
+            trace_inlines[start:stop] = chunk["inline"]
+            trace_crosslines[start:stop] = chunk["crossline"]
+            """Coordinates are divided by the absolute value of a negative scalar, multiplied by a
+            positive one, and left as they are if the scalar is 0."""
+            scalar = chunk["scalar"].astype(np_float64)
+            scalar = np_where(scalar < 0, 1 / np_where(scalar < 0, -scalar, 1), scalar)
+            scalar[scalar == 0] = 1
+            trace_xy[start:stop, 0] = chunk["x"] * scalar
+            trace_xy[start:stop, 1] = chunk["y"] * scalar
+        del headers
+        inlines, inline_ids = np_unique(trace_inlines, return_inverse=True)
+        crosslines, crossline_ids = np_unique(trace_crosslines, return_inverse=True)
+        if len(inlines) < 2 or len(crosslines) < 2:
+            raise ValueError(
+                "SEG-Y file is not a 3D cube with inline and crossline numbers"
+            )
+        trace_index = np_full((len(inlines), len(crosslines)), -1, dtype=np_int64)
+        trace_index[inline_ids, crossline_ids] = np_arange(n_traces)
+        transform = np_linalg_lstsq(
+            np_column_stack([trace_inlines, trace_crosslines, np_ones(n_traces)]),
+            trace_xy,
+            rcond=None,
+        )[0]
+        return cls(
+            file_name=file_name,
+            layout=(data_offset, n_samples, format_code, sample_interval),
+            inlines=inlines,
+            crosslines=crosslines,
+            trace_index=trace_index,
+            transform=transform,
+        )
+
+    @classmethod
+    def from_vtk(cls, vtk_obj=None):
+        """Cube whose index is stored in the field data of vtk_obj, or None if vtk_obj has no index or its
+        SEG-Y file cannot be found."""
+        field_data = vtk_obj.GetFieldData()
+        if not all(field_data.HasArray(key) for key in segy_field_data_keys):
+            return None
+        file_name = field_data.GetAbstractArray("segy_file_name").GetValue(0)
+        if not os.path.isfile(file_name):
+            print("SEG-Y file not found: ", file_name)
+            return None
+        inlines = vtk_to_numpy(field_data.GetArray("segy_inlines")).astype(np_int64)
+        crosslines = vtk_to_numpy(field_data.GetArray("segy_crosslines")).astype(
+            np_int64
+        )
+        return cls(
+            file_name=file_name,
+            layout=vtk_to_numpy(field_data.GetArray("segy_layout")),
+            inlines=inlines,
+            crosslines=crosslines,
+            trace_index=vtk_to_numpy(field_data.GetArray("segy_trace_index"))
+            .astype(np_int64)
+            .reshape(len(inlines), len(crosslines)),
+            transform=vtk_to_numpy(field_data.GetArray("segy_transform")).reshape(3, 2),
+        )
+
+    def to_vtk(self, vtk_obj=None):
+        """Store the index of the cube in the field data of vtk_obj."""
+        field_data = vtk_obj.GetFieldData()
+        file_name = vtkStringArray()
+        file_name.SetName("segy_file_name")
+        file_name.InsertNextValue(self.file_name)
+        field_data.AddArray(file_name)
+        for key, values in [
+            (
+                "segy_layout",
+                np_array(
+                    [
+                        self.data_offset,
+                        self.n_samples,
+                        self.format_code,
+                        self.sample_interval,
+                    ],
+                    dtype=np_int64,
+                ),
+            ),
+            ("segy_inlines", self.inlines.astype(np_int64)),
+            ("segy_crosslines", self.crosslines.astype(np_int64)),
+            ("segy_trace_index", self.trace_index.astype(np_int32).ravel()),
+            ("segy_transform", self.transform.ravel()),
+        ]:
+            array = numpy_to_vtk(np_ascontiguousarray(values), deep=True)
+            array.SetName(key)
+            field_data.AddArray(array)
+
+    @property
+    def shape(self):
+        """Number of inlines, crosslines and samples of the survey grid."""
+        return len(self.inlines), len(self.crosslines), self.n_samples
+
+    def read_samples(self, trace_ids=None, sample_ids=slice(None)):
+        """Samples sample_ids (a slice or an array) of the traces trace_ids, as a float32 array of shape
+        (len(trace_ids), n_selected_samples). Only these traces are read from the file, and missing traces
+        (trace id -1) are filled with zeros."""
+        trace_ids = np_array(trace_ids, dtype=np_int64)
+        values = np_arange(self.n_samples)[sample_ids]
+        out = np_zeros((len(trace_ids), len(values)), dtype=np_float32)
+        present = np_flatnonzero(trace_ids >= 0)
+        if len(present) > 0:
+            if isinstance(sample_ids, slice):
+                raw = self.samples[trace_ids[present]][:, sample_ids]
+            else:
+                """Only the selected samples are gathered, e.g. a single sample of each trace for a
+                time slice, instead of copying the whole traces."""
+                raw = self.samples[trace_ids[present][:, None], values[None, :]]
+            out[present] = (
+                ibm2ieee(raw) if self.format_code == 1 else raw.astype(np_float32)
+            )
+        return out
+
+    def subcube(
+        self, inline_ids=slice(None), crossline_ids=slice(None), sample_ids=slice(None)
+    ):
+        """Amplitudes of the nodes selected by inline_ids, crossline_ids and sample_ids (slices or arrays
+        of indices in the survey grid), as a float32 array of shape (n_inlines, n_crosslines,
+        n_samples) of the selection."""
+        trace_ids = self.trace_index[inline_ids][:, crossline_ids]
+        values = self.read_samples(trace_ids=trace_ids.ravel(), sample_ids=sample_ids)
+        return values.reshape(trace_ids.shape + (values.shape[1],))
+
+    def inline_slice(self, index=None):
+        """Amplitudes of the inline with the given index in the survey grid, shape (n_crosslines,
+        n_samples)."""
+        return self.subcube(inline_ids=[index])[0]
+
+    def crossline_slice(self, index=None):
+        """Amplitudes of the crossline with the given index in the survey grid, shape (n_inlines,
+        n_samples)."""
+        return self.subcube(crossline_ids=[index])[:, 0]
+
+    def time_slice(self, index=None):
+        """Amplitudes of the sample with the given index of all traces, shape (n_inlines, n_crosslines).
+        A single value is read from each trace."""
+        return self.subcube(sample_ids=[index])[:, :, 0]
+
+    def map_xy(self, inline_ids=None, crossline_ids=None):
+        """Map coordinates of the nodes with the given indices in the survey grid, shape (n, 2)."""
+        return (
+            np_column_stack(
+                [
+                    self.inlines[inline_ids],
+                    self.crosslines[crossline_ids],
+                    np_ones(len(inline_ids)),
+                ]
+            )
+            @ self.transform
+        )
+
+    def z_values(self, sample_ids=slice(None)):
+        """Z of the samples with the given indices, minus their time in ms (or depth), as in
+        vtkSegYReader."""
+        return -np_arange(self.n_samples)[sample_ids] * self.sample_interval / 1000
+
+    def grid_points(self, inline_ids=None, crossline_ids=None, sample_ids=None):
+        """Points of the structured grid of the nodes selected by the arrays of indices inline_ids,
+        crossline_ids and sample_ids, ordered by crossline, inline and sample (i.e. with dimensions
+        (len(crossline_ids), len(inline_ids), len(sample_ids)) in a structured grid)."""
+        xy = self.map_xy(
+            inline_ids=np_repeat(inline_ids, len(crossline_ids)),
+            crossline_ids=np_tile(crossline_ids, len(inline_ids)),
+        )
+        z = self.z_values(sample_ids=sample_ids)
+        return np_column_stack([np_tile(xy, (len(z), 1)), np_repeat(z, len(xy))])
+
+    def grid_values(self, amplitudes=None):
+        """Amplitudes returned by subcube, flattened in the order of grid_points."""
+        return np_ascontiguousarray(amplitudes.transpose(2, 0, 1)).ravel()
+
+    def overview_ids(self, max_nodes=None):
+        """Indices of the inlines, crosslines and samples of an overview of the cube, decimated with a
+        constant step along each axis so that each axis has at most max_nodes nodes, including the first
+        and the last."""
+        return [
+            np_unique(
+                np_rint(np_linspace(0, n - 1, min(n, max_nodes))).astype(np_int64)
+            )
+            for n in self.shape
+        ]
+
+    def node_spacing(self):
+        """Distance between adjacent inlines and between adjacent crosslines of the survey grid."""
+        inline_step = np_linalg_norm(self.transform[0]) * (
+            (self.inlines[-1] - self.inlines[0]) / (len(self.inlines) - 1)
+        )
+        crossline_step = np_linalg_norm(self.transform[1]) * (
+            (self.crosslines[-1] - self.crosslines[0]) / (len(self.crosslines) - 1)
+        )
+        return inline_step, crossline_step
+
+    def section(self, start_xy=None, end_xy=None):
+        """Vertical section of the cube along the segment from start_xy to end_xy, in map coordinates,
+        sampled with the smallest node spacing of the survey grid at the nearest trace. Returns the
+        distance of the section columns from start_xy, their map coordinates, and their amplitudes as a
+        (n_columns, n_samples) array, reading only the traces crossed by the section. Columns out of the
+        survey grid are dropped."""
+        start_xy = np_array(start_xy, dtype=np_float64)
+        end_xy = np_array(end_xy, dtype=np_float64)
+        length = np_linalg_norm(end_xy - start_xy)
+        """The tolerance avoids an extra column for sections spanning a whole number of nodes."""
+        n_columns = int(np_ceil(length / min(self.node_spacing()) - 1e-6)) + 1
+        distances = np_linspace(0, length, n_columns)
+        xy = start_xy + (end_xy - start_xy) * (distances / max(length, 1e-12))[:, None]
+        """Inline and crossline numbers of the columns, with the inverse of the affine transform, then
+        converted to fractional indices of the (possibly irregular) survey grid."""
+        line_numbers = np_linalg_lstsq(
+            self.transform[:2].T, (xy - self.transform[2]).T, rcond=None
+        )[0].T
+        inside = np_ones(len(xy), dtype=bool)
+        ids = []
+        for axis, lines in enumerate([self.inlines, self.crosslines]):
+            numbers = line_numbers[:, axis]
+            """Columns up to half a line beyond the first and last lines take their traces."""
+            inside &= numbers >= lines[0] - (lines[1] - lines[0]) / 2
+            inside &= numbers <= lines[-1] + (lines[-1] - lines[-2]) / 2
+            ids.append(np_interp(numbers, lines, np_arange(len(lines))))
+        inline_ids = np_rint(ids[0][inside]).astype(np_int64)
+        crossline_ids = np_rint(ids[1][inside]).astype(np_int64)
+        trace_ids = self.trace_index[inline_ids, crossline_ids]
+        """Each trace is read once, also if it is the nearest one for several columns."""
+        unique_ids, inverse = np_unique(trace_ids, return_inverse=True)
+        amplitudes = self.read_samples(trace_ids=unique_ids)[inverse]
+        return distances[inside], xy[inside], amplitudes
+
+    def section_image(self, start_xy=None, end_xy=None):
+        """Vertical section of the cube from start_xy to end_xy (see section), as a vtkImageData with
+        the amplitudes in the "trace" point data, columns along the section, rows from the deepest sample
+        upwards, and a direction matrix placing it on the vertical plane of the section, as the XsVoxet
+        sections of a Voxet. Returns None if the section misses the survey grid."""
+        distances, xy, amplitudes = self.section(start_xy=start_xy, end_xy=end_xy)
+        if len(distances) < 2:
+            return None
+        direction = (xy[-1] - xy[0]) / (distances[-1] - distances[0])
+        image = vtkImageData()
+        image.SetOrigin([xy[0, 0], xy[0, 1], self.z_values()[-1]])
+        image.SetSpacing([distances[1] - distances[0], self.sample_interval / 1000, 1])
+        image.SetDimensions([len(distances), self.n_samples, 1])
+        image.SetDirectionMatrix(
+            [direction[0], 0, direction[1], direction[1], 0, -direction[0], 0, 1, 0]
+        )
+        values = numpy_to_vtk(
+            np_ascontiguousarray(amplitudes[:, ::-1].T).ravel(), deep=True
+        )
+        values.SetName("trace")
+        image.GetPointData().AddArray(values)
+        return image
+
+
+def seismics_grid(cube=None, inline_ids=None, crossline_ids=None, sample_ids=None):
+    """Seismics with the nodes of the cube selected by the arrays of indices inline_ids, crossline_ids and
+    sample_ids, reading only their traces and samples from the SEG-Y file."""
+    seismics = Seismics()
+    seismics.SetDimensions(len(crossline_ids), len(inline_ids), len(sample_ids))
+    seismics.points = cube.grid_points(
+        inline_ids=inline_ids, crossline_ids=crossline_ids, sample_ids=sample_ids
+    )
+    seismics.set_point_data(
+        data_key="trace",
+        attribute_matrix=cube.grid_values(
+            amplitudes=cube.subcube(
+                inline_ids=inline_ids,
+                crossline_ids=crossline_ids,
+                sample_ids=sample_ids,
+            )
+        ),
+    )
+    return seismics
+
+
+def seismics_overview(cube=None, max_nodes=None):
+    """Seismics with an overview of the cube, decimated to at most max_nodes (default
+    segy_overview_nodes) nodes along each axis, and the index of the cube in its field data. This is
+    what is shown in the views and saved in the project, while full resolution slices and sections
+    are read from the SEG-Y file."""
+    inline_ids, crossline_ids, sample_ids = cube.overview_ids(
+        max_nodes=max_nodes or segy_overview_nodes
+    )
+    seismics = seismics_grid(
+        cube=cube,
+        inline_ids=inline_ids,
+        crossline_ids=crossline_ids,
+        sample_ids=sample_ids,
+    )
+    cube.to_vtk(vtk_obj=seismics)
+    return seismics
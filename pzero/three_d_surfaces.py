@@ -1077,7 +1077,7 @@ def subdivision_resampling(self, mode=0, type="linear", n_subd=2):
 
 def intersection_xs(self):
     """vtkCutter is a filter to cut through data using any subclass of vtkImplicitFunction.
-    HOW TO USE: select one or more Geological objects, DOMs or 3D Meshes (Source data), then function asks for XSection
+    HOW TO USE: select one or more Geological objects, DOMs, 3D Meshes or Seismics (Source data), then function asks for XSection
     (input data) for the filter."""
     print(
         "Intersection with XSection: intersect Geological entities, 3D Meshes and DEM & DOMs"
@@ -1449,9 +1449,41 @@ def intersection_xs(self):
                         self.dom_coll.add_entity_from_dict(obj_dict)
                     else:
                         print(" -- empty object -- ")
+        elif self.shown_table == "tabImages":
+            for uid in input_uids:
+                if self.image_coll.get_uid_image_type(uid) != "Seismics":
+                    continue
+                cube = self.image_coll.get_uid_vtk_obj(uid).segy_cube
+                if cube is None:
+                    print(" -- only Seismics imported lazily can be intersected -- ")
+                    continue
+                """Only the traces crossed by the XSection are read from the SEG-Y file, at full
+                resolution, and the section is added as an XsVoxet, as for Voxets."""
+                section_image = cube.section_image(
+                    start_xy=[
+                        self.xsect_coll.get_uid_base_x(xsect_uid),
+                        self.xsect_coll.get_uid_base_y(xsect_uid),
+                    ],
+                    end_xy=[
+                        self.xsect_coll.get_uid_end_x(xsect_uid),
+                        self.xsect_coll.get_uid_end_y(xsect_uid),
+                    ],
+                )
+                if section_image is None:
+                    print(" -- empty object -- ")
+                    continue
+                obj_dict = deepcopy(self.mesh3d_coll.mesh3d_entity_dict)
+                obj_dict["name"] = f"{self.image_coll.get_uid_name(uid)}{postfix}"
+                obj_dict["mesh3d_type"] = "XsVoxet"
+                obj_dict["properties_names"] = ["trace"]
+                obj_dict["properties_components"] = [1]
+                obj_dict["x_section"] = xsect_uid
+                obj_dict["vtk_obj"] = XsVoxet(x_section_uid=xsect_uid, parent=self)
+                obj_dict["vtk_obj"].ShallowCopy(section_image)
+                self.mesh3d_coll.add_entity_from_dict(obj_dict)
         else:
             print(
-                " -- Only Geological objects, 3D Meshes and DEM & DOMs can be intersected with XSection -- "
+                " -- Only Geological objects, 3D Meshes, DEM & DOMs and Seismics can be intersected with XSection -- "
             )
             return
 
@@ -306,6 +306,19 @@ class Ui_ProjectWindow(object):
         self.actionProjectOpen.setObjectName("actionProjectOpen")
         self.actionProjectSave = QtWidgets.QAction(ProjectWindow)
         self.actionProjectSave.setObjectName("actionProjectSave")
+        self.actionProjectMigrate = QtWidgets.QAction(ProjectWindow)
+        self.actionProjectMigrate.setObjectName("actionProjectMigrate")
+        self.actionProjectPrune = QtWidgets.QAction(ProjectWindow)
+        self.actionProjectPrune.setObjectName("actionProjectPrune")
+        self.actionProjectConvert = QtWidgets.QAction(ProjectWindow)
+        self.actionProjectConvert.setObjectName("actionProjectConvert")
+        self.actionLazyLoading = QtWidgets.QAction(ProjectWindow)
+        self.actionLazyLoading.setCheckable(True)
+        self.actionLazyLoading.setObjectName("actionLazyLoading")
+        self.actionAutosave = QtWidgets.QAction(ProjectWindow)
+        self.actionAutosave.setCheckable(True)
+        self.actionAutosave.setChecked(True)
+        self.actionAutosave.setObjectName("actionAutosave")
         self.actionImportGocad = QtWidgets.QAction(ProjectWindow)
         self.actionImportGocad.setObjectName("actionImportGocad")
         self.actionExportCAD = QtWidgets.QAction(ProjectWindow)
@@ -409,6 +422,8 @@ class Ui_ProjectWindow(object):
         self.actionRetopologize.setObjectName("actionRetopologize")
         self.actionBuildOctree = QtWidgets.QAction(ProjectWindow)
         self.actionBuildOctree.setObjectName("actionBuildOctree")
+        self.actionSeismicsSlice = QtWidgets.QAction(ProjectWindow)
+        self.actionSeismicsSlice.setObjectName("actionSeismicsSlice")
         self.actionDecimatePointCloud = QtWidgets.QAction(ProjectWindow)
         self.actionDecimatePointCloud.setObjectName("actionDecimatePointCloud")
         self.actionExportCSV = QtWidgets.QAction(ProjectWindow)
@@ -416,6 +431,11 @@ class Ui_ProjectWindow(object):
         self.menuFile.addAction(self.actionProjectNew)
         self.menuFile.addAction(self.actionProjectOpen)
         self.menuFile.addAction(self.actionProjectSave)
+        self.menuFile.addAction(self.actionProjectMigrate)
+        self.menuFile.addAction(self.actionProjectPrune)
+        self.menuFile.addAction(self.actionProjectConvert)
+        self.menuFile.addAction(self.actionLazyLoading)
+        self.menuFile.addAction(self.actionAutosave)
         self.menuFile.addSeparator()
         self.menuFile.addAction(self.actionImportGocad)
         self.menuFile.addAction(self.actionImportGocadXsection)
@@ -464,6 +484,7 @@ class Ui_ProjectWindow(object):
         self.menuEdit.addAction(self.actionCalculateLineation)
         self.menuEdit.addSeparator()
         self.menuEdit.addAction(self.actionBuildOctree)
+        self.menuEdit.addAction(self.actionSeismicsSlice)
         self.menuInterpolation_tools.addAction(self.actionDelaunay2DInterpolation)
         self.menuInterpolation_tools.addAction(self.actionPoissonInterpolation)
         self.menuInterpolation_tools.addAction(
@@ -593,6 +614,33 @@ class Ui_ProjectWindow(object):
         self.actionProjectNew.setText(_translate("ProjectWindow", "New Project"))
         self.actionProjectOpen.setText(_translate("ProjectWindow", "Open Project"))
         self.actionProjectSave.setText(_translate("ProjectWindow", "Save Project"))
+        self.actionProjectMigrate.setText(
+            _translate("ProjectWindow", "Migrate Project Revisions")
+        )
+        self.actionProjectPrune.setText(
+            _translate("ProjectWindow", "Prune Unused Objects")
+        )
+        self.actionProjectConvert.setText(
+            _translate("ProjectWindow", "Convert Project Format")
+        )
+        self.actionProjectConvert.setToolTip(
+            _translate(
+                "ProjectWindow",
+                "Convert between project folder and single-file project container",
+            )
+        )
+        self.actionLazyLoading.setText(_translate("ProjectWindow", "Lazy Loading"))
+        self.actionLazyLoading.setToolTip(
+            _translate(
+                "ProjectWindow", "Read entities from file only when they are needed"
+            )
+        )
+        self.actionAutosave.setText(_translate("ProjectWindow", "Autosave"))
+        self.actionAutosave.setToolTip(
+            _translate(
+                "ProjectWindow", "Save the project in the background after each edit"
+            )
+        )
         self.actionImportGocad.setText(_translate("ProjectWindow", "Import Gocad"))
         self.actionImportGocad.setToolTip(_translate("ProjectWindow", "Import Gocad"))
         self.actionExportCAD.setText(_translate("ProjectWindow", "Export CAD"))
@@ -700,6 +748,9 @@ class Ui_ProjectWindow(object):
         self.actionSplitSurf.setText(_translate("ProjectWindow", "Split surfaces"))
         self.actionRetopologize.setText(_translate("ProjectWindow", "Retopologize"))
         self.actionBuildOctree.setText(_translate("ProjectWindow", "Build octree"))
+        self.actionSeismicsSlice.setText(
+            _translate("ProjectWindow", "Extract seismic slice")
+        )
         self.actionDecimatePointCloud.setText(
             _translate("ProjectWindow", "Decimate point cloud")
         )
@@ -4,7 +4,7 @@ from vtkmodules.vtkRenderingCore import vtkPropPicker
 
 """QT imports"""
 from PyQt5.QtWidgets import *
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, QTimer
 
 """PZero imports"""
 from pzero.ui.base_view_window_ui import Ui_BaseViewWindow
@@ -40,6 +40,8 @@ from pzero.collections.geological_collection import GeologicalCollection
 from .orientation_analysis import get_dip_dir_vectors
 from pzero.helpers.helper_functions import best_fitting_plane, gen_frame
 from pzero.helpers.helper_widgets import Vector
+from pzero.lod_octree import lod_pixel_error_default, lod_point_budget_default
+from pzero.raster_tiles import raster_pixel_budget_default, raster_pixel_error_default
 
 """Maths imports"""
 from math import degrees, sqrt, atan2
@@ -51,6 +53,7 @@ from numpy import pi as np_pi
 from numpy import array as np_array
 from numpy import all as np_all
 from numpy import cross as np_cross
+from numpy import array_equal as np_array_equal
 
 from pandas import DataFrame as pd_DataFrame
 from pandas import unique as pd_unique
@@ -149,6 +152,10 @@ class BaseView(QMainWindow, Ui_BaseViewWindow):
         """Create list of selected uid's."""
         self.selected_uids = []
 
+        """Set of uid's of hidden actors whose data have been released since their entity was unloaded
+        by lazy loading (see unload_actor)."""
+        self.unloaded_uids = set()
+
         """Initialize menus and tools, canvas, add actors and show it. These methods must be defined in subclasses."""
         self.initialize_menu_tools()
         self.initialize_interactor()
@@ -1147,7 +1154,7 @@ class BaseView(QMainWindow, Ui_BaseViewWindow):
         """Update geology tree without creating a new model"""
         uid_list = list(new_list["uid"])
         if sec_uid:
-            for i, uid in enumerate(new_list["uid"]):
+            for i, uid in reversed(list(enumerate(new_list["uid"]))):
                 if (
                     sec_uid
                     != self.parent.geol_coll.df.loc[
@@ -1204,7 +1211,27 @@ class BaseView(QMainWindow, Ui_BaseViewWindow):
                             """Already exists a TreeItem (2 level) for the geological feature"""
                             counter_2 = 0
                             for child_2 in range(
-                                self.GeologyTreeWidget.itemBelow(
+                                self.GeologyTreeWidget.findItems(
+                                    self.parent.geol_coll.get_uid_geological_type(uid),
+                                    Qt.MatchExactly,
+                                    0,
+                                )[0]
+                                .child(child_1)
+                                .childCount()
+                            ):
+                                """for cycle that loops n times as the number of sub-subItems in the specific geological type and geological feature branch"""
+                                if self.GeologyTreeWidget.findItems(
+                                    self.parent.geol_coll.get_uid_geological_type(uid),
+                                    Qt.MatchExactly,
+                                    0,
+                                )[0].child(child_1).child(child_2).text(
+                                    0
+                                ) == self.parent.geol_coll.get_uid_scenario(
+                                    uid
+                                ):
+                                    counter_2 += 1
+                            if counter_2 != 0:
+                                for child_2 in range(
                                     self.GeologyTreeWidget.findItems(
                                         self.parent.geol_coll.get_uid_geological_type(
                                             uid
@@ -1212,44 +1239,16 @@ class BaseView(QMainWindow, Ui_BaseViewWindow):
                                         Qt.MatchExactly,
                                         0,
                                     )[0]
-                                ).childCount()
-                            ):
-                                """for cycle that loops n times as the number of sub-subItems in the specific geological type and geological feature branch"""
-                                if self.GeologyTreeWidget.itemBelow(
-                                    self.GeologyTreeWidget.findItems(
+                                    .child(child_1)
+                                    .childCount()
+                                ):
+                                    if self.GeologyTreeWidget.findItems(
                                         self.parent.geol_coll.get_uid_geological_type(
                                             uid
                                         ),
                                         Qt.MatchExactly,
                                         0,
-                                    )[0]
-                                ).child(child_2).text(
-                                    0
-                                ) == self.parent.geol_coll.get_uid_scenario(
-                                    uid
-                                ):
-                                    counter_2 += 1
-                            if counter_2 != 0:
-                                for child_2 in range(
-                                    self.GeologyTreeWidget.itemBelow(
-                                        self.GeologyTreeWidget.findItems(
-                                            self.parent.geol_coll.get_uid_geological_type(
-                                                uid
-                                            ),
-                                            Qt.MatchExactly,
-                                            0,
-                                        )[0]
-                                    ).childCount()
-                                ):
-                                    if self.GeologyTreeWidget.itemBelow(
-                                        self.GeologyTreeWidget.findItems(
-                                            self.parent.geol_coll.get_uid_geological_type(
-                                                uid
-                                            ),
-                                            Qt.MatchExactly,
-                                            0,
-                                        )[0]
-                                    ).child(child_2).text(
+                                    )[0].child(child_1).child(child_2).text(
                                         0
                                     ) == self.parent.geol_coll.get_uid_scenario(
                                         uid
@@ -1397,7 +1396,6 @@ class BaseView(QMainWindow, Ui_BaseViewWindow):
                     ].values[0]:
                         glevel_4.setCheckState(0, Qt.Unchecked)
                     self.GeologyTreeWidget.insertTopLevelItem(0, glevel_4)
-                    break
             else:
                 """Different geological type, geological feature and scenario"""
                 glevel_1 = QTreeWidgetItem(
@@ -1444,7 +1442,6 @@ class BaseView(QMainWindow, Ui_BaseViewWindow):
                 ].values[0]:
                     glevel_4.setCheckState(0, Qt.Unchecked)
                 self.GeologyTreeWidget.insertTopLevelItem(0, glevel_4)
-                break
         self.GeologyTreeWidget.itemChanged.connect(
             self.toggle_geology_topology_visibility
         )
@@ -1543,7 +1540,7 @@ class BaseView(QMainWindow, Ui_BaseViewWindow):
         """Update topology tree without creating a new model"""
         uid_list = list(new_list["uid"])
         if sec_uid:
-            for i, uid in enumerate(new_list["uid"]):
+            for i, uid in reversed(list(enumerate(new_list["uid"]))):
                 if (
                     sec_uid
                     != self.parent.geol_coll.df.loc[
@@ -1672,7 +1669,6 @@ class BaseView(QMainWindow, Ui_BaseViewWindow):
                     ].values[0]:
                         tlevel_3.setCheckState(0, Qt.Unchecked)
                     self.TopologyTreeWidget.insertTopLevelItem(0, tlevel_3)
-                    break
             else:
                 """Different topological type and scenario"""
                 tlevel_1 = QTreeWidgetItem(
@@ -1712,7 +1708,6 @@ class BaseView(QMainWindow, Ui_BaseViewWindow):
                 ].values[0]:
                     tlevel_3.setCheckState(0, Qt.Unchecked)
                 self.TopologyTreeWidget.insertTopLevelItem(0, tlevel_3)
-                break
         self.TopologyTreeWidget.itemChanged.connect(
             self.toggle_geology_topology_visibility
         )
@@ -1873,7 +1868,7 @@ class BaseView(QMainWindow, Ui_BaseViewWindow):
         """Update XSection tree without creating a new model"""
         uid_list = list(new_list["uid"])
         if sec_uid:
-            for i, uid in enumerate(new_list["uid"]):
+            for i, uid in reversed(list(enumerate(new_list["uid"]))):
                 if sec_uid != uid:
                     del uid_list[i]
         for uid in uid_list:
@@ -2100,7 +2095,7 @@ class BaseView(QMainWindow, Ui_BaseViewWindow):
         row = self.Mesh3DTableWidget.rowCount()
         uid_list = list(new_list["uid"])
         if sec_uid:
-            for i, uid in enumerate(new_list["uid"]):
+            for i, uid in reversed(list(enumerate(new_list["uid"]))):
                 if (
                     sec_uid
                     != self.parent.mesh3d_coll.df.loc[
@@ -2283,7 +2278,7 @@ class BaseView(QMainWindow, Ui_BaseViewWindow):
         row = self.DOMsTableWidget.rowCount()
         uid_list = list(new_list["uid"])
         if sec_uid:
-            for i, uid in enumerate(new_list["uid"]):
+            for i, uid in reversed(list(enumerate(new_list["uid"]))):
                 if (
                     sec_uid
                     != self.parent.dom_coll.df.loc[
@@ -2810,7 +2805,6 @@ class BaseView(QMainWindow, Ui_BaseViewWindow):
                     self.actors_df["uid"] == uid, "show"
                 ].values[0]:
                     tlevel_2_trace.setCheckState(0, Qt.Unchecked)
-                break
 
         self.WellsTreeWidget.itemChanged.connect(self.toggle_well_visibility)
         self.WellsTreeWidget.expandAll()
@@ -3090,7 +3084,7 @@ class BaseView(QMainWindow, Ui_BaseViewWindow):
         """Update fluid tree without creating a new model"""
         uid_list = list(new_list["uid"])
         if sec_uid:
-            for i, uid in enumerate(new_list["uid"]):
+            for i, uid in reversed(list(enumerate(new_list["uid"]))):
                 if (
                     sec_uid
                     != self.parent.fluids_coll.df.loc[
@@ -3145,22 +3139,20 @@ class BaseView(QMainWindow, Ui_BaseViewWindow):
                             """Already exists a TreeItem (2 level) for the fluid feature"""
                             counter_2 = 0
                             for child_2 in range(
-                                self.FluidsTreeWidget.itemBelow(
-                                    self.FluidsTreeWidget.findItems(
-                                        self.parent.fluids_coll.get_uid_fluid_type(uid),
-                                        Qt.MatchExactly,
-                                        0,
-                                    )[0]
-                                ).childCount()
+                                self.FluidsTreeWidget.findItems(
+                                    self.parent.fluids_coll.get_uid_fluid_type(uid),
+                                    Qt.MatchExactly,
+                                    0,
+                                )[0]
+                                .child(child_1)
+                                .childCount()
                             ):
                                 """for cycle that loops n times as the number of sub-subItems in the specific fluid type and fluid feature branch"""
-                                if self.FluidsTreeWidget.itemBelow(
-                                    self.FluidsTreeWidget.findItems(
-                                        self.parent.fluids_coll.get_uid_fluid_type(uid),
-                                        Qt.MatchExactly,
-                                        0,
-                                    )[0]
-                                ).child(child_2).text(
+                                if self.FluidsTreeWidget.findItems(
+                                    self.parent.fluids_coll.get_uid_fluid_type(uid),
+                                    Qt.MatchExactly,
+                                    0,
+                                )[0].child(child_1).child(child_2).text(
                                     0
                                 ) == self.parent.fluids_coll.get_uid_scenario(
                                     uid
@@ -3168,25 +3160,19 @@ class BaseView(QMainWindow, Ui_BaseViewWindow):
                                     counter_2 += 1
                             if counter_2 != 0:
                                 for child_2 in range(
-                                    self.FluidsTreeWidget.itemBelow(
-                                        self.FluidsTreeWidget.findItems(
-                                            self.parent.fluids_coll.get_uid_fluid_type(
-                                                uid
-                                            ),
-                                            Qt.MatchExactly,
-                                            0,
-                                        )[0]
-                                    ).childCount()
+                                    self.FluidsTreeWidget.findItems(
+                                        self.parent.fluids_coll.get_uid_fluid_type(uid),
+                                        Qt.MatchExactly,
+                                        0,
+                                    )[0]
+                                    .child(child_1)
+                                    .childCount()
                                 ):
-                                    if self.FluidsTreeWidget.itemBelow(
-                                        self.FluidsTreeWidget.findItems(
-                                            self.parent.fluids_coll.get_uid_fluid_type(
-                                                uid
-                                            ),
-                                            Qt.MatchExactly,
-                                            0,
-                                        )[0]
-                                    ).child(child_2).text(
+                                    if self.FluidsTreeWidget.findItems(
+                                        self.parent.fluids_coll.get_uid_fluid_type(uid),
+                                        Qt.MatchExactly,
+                                        0,
+                                    )[0].child(child_1).child(child_2).text(
                                         0
                                     ) == self.parent.fluids_coll.get_uid_scenario(
                                         uid
@@ -3332,7 +3318,6 @@ class BaseView(QMainWindow, Ui_BaseViewWindow):
                     ].values[0]:
                         flevel_4.setCheckState(0, Qt.Unchecked)
                     self.FluidsTreeWidget.insertTopLevelItem(0, flevel_4)
-                    break
             else:
                 """Different fluid type, fluid feature and scenario"""
                 flevel_1 = QTreeWidgetItem(
@@ -3379,7 +3364,6 @@ class BaseView(QMainWindow, Ui_BaseViewWindow):
                 ].values[0]:
                     flevel_4.setCheckState(0, Qt.Unchecked)
                 self.FluidsTreeWidget.insertTopLevelItem(0, flevel_4)
-                break
         self.FluidsTreeWidget.itemChanged.connect(
             self.toggle_fluids_topology_visibility
         )
@@ -3480,7 +3464,7 @@ class BaseView(QMainWindow, Ui_BaseViewWindow):
         """Update topology tree without creating a new model"""
         uid_list = list(new_list["uid"])
         if sec_uid:
-            for i, uid in enumerate(new_list["uid"]):
+            for i, uid in reversed(list(enumerate(new_list["uid"]))):
                 if (
                     sec_uid
                     != self.parent.geol_coll.df.loc[
@@ -3613,7 +3597,6 @@ class BaseView(QMainWindow, Ui_BaseViewWindow):
                     ].values[0]:
                         tlevel_3.setCheckState(0, Qt.Unchecked)
                     self.FluidsTopologyTreeWidget.insertTopLevelItem(0, tlevel_3)
-                    break
             else:
                 """Different topological type and scenario"""
                 tlevel_1 = QTreeWidgetItem(
@@ -3653,7 +3636,6 @@ class BaseView(QMainWindow, Ui_BaseViewWindow):
                 ].values[0]:
                     tlevel_3.setCheckState(0, Qt.Unchecked)
                 self.FluidsTopologyTreeWidget.insertTopLevelItem(0, tlevel_3)
-                break
         self.FluidsTopologyTreeWidget.itemChanged.connect(
             self.toggle_fluids_topology_visibility
         )
@@ -4004,7 +3986,7 @@ class BaseView(QMainWindow, Ui_BaseViewWindow):
 
         uid_list = list(new_list["uid"])
         if sec_uid:
-            for i, uid in enumerate(new_list["uid"]):
+            for i, uid in reversed(list(enumerate(new_list["uid"]))):
                 if (
                     sec_uid
                     != self.parent.backgrounds_coll.df.loc[
@@ -4142,7 +4124,6 @@ class BaseView(QMainWindow, Ui_BaseViewWindow):
                     ].values[0]:
                         flevel_3.setCheckState(0, Qt.Unchecked)
                     self.BackgroundsTreeWidget.insertTopLevelItem(0, flevel_3)
-                    break
             else:
                 """Different background type and background feature"""
                 flevel_1 = QTreeWidgetItem(
@@ -4182,7 +4163,6 @@ class BaseView(QMainWindow, Ui_BaseViewWindow):
                 ].values[0]:
                     flevel_3.setCheckState(0, Qt.Unchecked)
                 self.BackgroundsTreeWidget.insertTopLevelItem(0, flevel_3)
-                break
         self.BackgroundsTreeWidget.itemChanged.connect(
             self.toggle_backgrounds_topology_visibility
         )
@@ -4265,7 +4245,7 @@ class BaseView(QMainWindow, Ui_BaseViewWindow):
         """Update topology tree without creating a new model"""
         uid_list = list(new_list["uid"])
         if sec_uid:
-            for i, uid in enumerate(new_list["uid"]):
+            for i, uid in reversed(list(enumerate(new_list["uid"]))):
                 if (
                     sec_uid
                     != self.parent.backgrounds_coll.df.loc[
@@ -4402,7 +4382,6 @@ class BaseView(QMainWindow, Ui_BaseViewWindow):
                     ].values[0]:
                         tlevel_3.setCheckState(0, Qt.Unchecked)
                     self.BackgroundsTopologyTreeWidget.insertTopLevelItem(0, tlevel_3)
-                    break
             else:
                 """Different topological type and feature"""
                 tlevel_1 = QTreeWidgetItem(
@@ -4444,7 +4423,6 @@ class BaseView(QMainWindow, Ui_BaseViewWindow):
                 ].values[0]:
                     tlevel_3.setCheckState(0, Qt.Unchecked)
                 self.BackgroundsTopologyTreeWidget.insertTopLevelItem(0, tlevel_3)
-                break
         self.BackgroundsTopologyTreeWidget.itemChanged.connect(
             self.toggle_geology_topology_visibility
         )
@@ -4612,8 +4590,8 @@ class BaseView(QMainWindow, Ui_BaseViewWindow):
                 },
                 ignore_index=True,
             )
-            self.update_geology_tree_added(actors_df_new)
-            self.update_topology_tree_added(actors_df_new)
+        self.update_geology_tree_added(actors_df_new)
+        self.update_topology_tree_added(actors_df_new)
         """Re-connect signals."""
         self.GeologyTreeWidget.itemChanged.connect(
             self.toggle_geology_topology_visibility
@@ -4863,7 +4841,7 @@ class BaseView(QMainWindow, Ui_BaseViewWindow):
                 },
                 ignore_index=True,
             )
-            self.update_xsections_tree_added(actors_df_new)
+        self.update_xsections_tree_added(actors_df_new)
         """Re-connect signals."""
         self.XSectionTreeWidget.itemChanged.connect(self.toggle_xsection_visibility)
 
@@ -4977,7 +4955,7 @@ class BaseView(QMainWindow, Ui_BaseViewWindow):
                 },
                 ignore_index=True,
             )
-            self.update_boundary_list_added(actors_df_new)
+        self.update_boundary_list_added(actors_df_new)
         """Re-connect signals."""
         self.BoundariesTableWidget.itemChanged.connect(self.toggle_boundary_visibility)
 
@@ -5096,7 +5074,7 @@ class BaseView(QMainWindow, Ui_BaseViewWindow):
                 },
                 ignore_index=True,
             )
-            self.update_mesh3d_list_added(actors_df_new)
+        self.update_mesh3d_list_added(actors_df_new)
         """Re-connect signals."""
         self.Mesh3DTableWidget.itemChanged.connect(self.toggle_mesh3d_visibility)
 
@@ -5239,7 +5217,7 @@ class BaseView(QMainWindow, Ui_BaseViewWindow):
                 },
                 ignore_index=True,
             )
-            self.update_dom_list_added(actors_df_new)
+        self.update_dom_list_added(actors_df_new)
         """Re-connect signals."""
         self.DOMsTableWidget.itemChanged.connect(self.toggle_dom_visibility)
 
@@ -5391,7 +5369,7 @@ class BaseView(QMainWindow, Ui_BaseViewWindow):
                 },
                 ignore_index=True,
             )
-            self.update_image_list_added(actors_df_new)
+        self.update_image_list_added(actors_df_new)
         """Re-connect signals."""
         self.ImagesTableWidget.itemChanged.connect(self.toggle_image_visibility)
 
@@ -5463,7 +5441,7 @@ class BaseView(QMainWindow, Ui_BaseViewWindow):
                 },
                 ignore_index=True,
             )
-            self.update_well_tree_added(actors_df_new)
+        self.update_well_tree_added(actors_df_new)
         """Re-connect signals."""
         self.WellsTreeWidget.itemChanged.connect(self.toggle_well_visibility)
 
@@ -5602,8 +5580,8 @@ class BaseView(QMainWindow, Ui_BaseViewWindow):
                 },
                 ignore_index=True,
             )
-            self.update_fluids_tree_added(actors_df_new)
-            self.update_fluids_topology_tree_added(actors_df_new)
+        self.update_fluids_tree_added(actors_df_new)
+        self.update_fluids_topology_tree_added(actors_df_new)
         """Re-connect signals."""
         self.FluidsTreeWidget.itemChanged.connect(
             self.toggle_fluids_topology_visibility
@@ -5855,8 +5833,8 @@ class BaseView(QMainWindow, Ui_BaseViewWindow):
                 },
                 ignore_index=True,
             )
-            self.update_backgrounds_tree_added(actors_df_new)
-            self.update_backgrounds_topology_tree_added(actors_df_new)
+        self.update_backgrounds_tree_added(actors_df_new)
+        self.update_backgrounds_topology_tree_added(actors_df_new)
         """Re-connect signals."""
         self.BackgroundsTreeWidget.itemChanged.connect(
             self.toggle_backgrounds_topology_visibility
@@ -6120,6 +6098,8 @@ class BaseView(QMainWindow, Ui_BaseViewWindow):
     def add_all_entities(self):
         """Add all entities in project collections. This must be reimplemented for cross-sections in order
         to show entities belonging to the section only. All objects are visible by default -> show = True
+        Hidden entities are added with actor None, so they are not read when the project has been lazy
+        loaded, and their actor is created by set_actor_visible when they are shown for the first time.
         """
 
         for index, uid in enumerate(self.parent.geol_coll.df["uid"].tolist()):
@@ -6138,13 +6118,10 @@ class BaseView(QMainWindow, Ui_BaseViewWindow):
             )
 
         for uid in self.parent.xsect_coll.df["uid"].tolist():
-            this_actor = self.show_actor_with_property(
-                uid=uid, collection="xsect_coll", show_property=None, visible=False
-            )
             self.actors_df = self.actors_df.append(
                 {
                     "uid": uid,
-                    "actor": this_actor,
+                    "actor": None,
                     "show": False,
                     "collection": "xsect_coll",
                     "show_prop": None,
@@ -6153,13 +6130,10 @@ class BaseView(QMainWindow, Ui_BaseViewWindow):
             )
 
         for uid in self.parent.boundary_coll.df["uid"].tolist():
-            this_actor = self.show_actor_with_property(
-                uid=uid, collection="boundary_coll", show_property=None, visible=False
-            )
             self.actors_df = self.actors_df.append(
                 {
                     "uid": uid,
-                    "actor": this_actor,
+                    "actor": None,
                     "show": False,
                     "collection": "boundary_coll",
                     "show_prop": None,
@@ -6168,13 +6142,10 @@ class BaseView(QMainWindow, Ui_BaseViewWindow):
             )
 
         for uid in self.parent.mesh3d_coll.df["uid"].tolist():
-            this_actor = self.show_actor_with_property(
-                uid=uid, collection="mesh3d_coll", show_property=None, visible=False
-            )
             self.actors_df = self.actors_df.append(
                 {
                     "uid": uid,
-                    "actor": this_actor,
+                    "actor": None,
                     "show": False,
                     "collection": "mesh3d_coll",
                     "show_prop": None,
@@ -6183,13 +6154,10 @@ class BaseView(QMainWindow, Ui_BaseViewWindow):
             )
 
         for uid in self.parent.dom_coll.df["uid"].tolist():
-            this_actor = self.show_actor_with_property(
-                uid=uid, collection="dom_coll", show_property=None, visible=False
-            )
             self.actors_df = self.actors_df.append(
                 {
                     "uid": uid,
-                    "actor": this_actor,
+                    "actor": None,
                     "show": False,
                     "collection": "dom_coll",
                     "show_prop": None,
@@ -6198,13 +6166,10 @@ class BaseView(QMainWindow, Ui_BaseViewWindow):
             )
 
         for uid in self.parent.image_coll.df["uid"].tolist():
-            this_actor = self.show_actor_with_property(
-                uid=uid, collection="image_coll", show_property=None, visible=False
-            )
             self.actors_df = self.actors_df.append(
                 {
                     "uid": uid,
-                    "actor": this_actor,
+                    "actor": None,
                     "show": False,
                     "collection": "image_coll",
                     "show_prop": None,
@@ -6213,13 +6178,10 @@ class BaseView(QMainWindow, Ui_BaseViewWindow):
             )
 
         for uid in self.parent.well_coll.df["uid"].tolist():
-            this_actor = self.show_actor_with_property(
-                uid=uid, collection="well_coll", show_property=None, visible=False
-            )
             self.actors_df = self.actors_df.append(
                 {
                     "uid": uid,
-                    "actor": this_actor,
+                    "actor": None,
                     "show": False,
                     "collection": "well_coll",
                     "show_prop": None,
@@ -6228,13 +6190,10 @@ class BaseView(QMainWindow, Ui_BaseViewWindow):
             )
 
         for uid in self.parent.fluids_coll.df["uid"].tolist():
-            this_actor = self.show_actor_with_property(
-                uid=uid, collection="fluids_coll", show_property=None, visible=False
-            )
             self.actors_df = self.actors_df.append(
                 {
                     "uid": uid,
-                    "actor": this_actor,
+                    "actor": None,
                     "show": False,
                     "collection": "fluids_coll",
                     "show_prop": None,
@@ -6242,16 +6201,10 @@ class BaseView(QMainWindow, Ui_BaseViewWindow):
                 ignore_index=True,
             )
         for uid in self.parent.backgrounds_coll.df["uid"].tolist():
-            this_actor = self.show_actor_with_property(
-                uid=uid,
-                collection="backgrounds_coll",
-                show_property=None,
-                visible=False,
-            )
             self.actors_df = self.actors_df.append(
                 {
                     "uid": uid,
-                    "actor": this_actor,
+                    "actor": None,
                     "show": False,
                     "collection": "backgrounds_coll",
                     "show_prop": None,
@@ -6422,15 +6375,39 @@ class BaseView(QMainWindow, Ui_BaseViewWindow):
             self.actors_df.loc[self.actors_df["uid"] == uid, "actor"].values[
                 0
             ].GetProperty().SetPointSize(point_size)
-         else:
+        else:
             return
 
     def set_actor_visible(self, uid=None, visible=None, name=None):
         """Set actor uid visible or invisible (visible = True or False)"""
-        this_actor = self.actors_df.loc[self.actors_df["uid"] == uid, "actor"].values[0]
         collection = self.actors_df.loc[
             self.actors_df["uid"] == uid, "collection"
         ].values[0]
+        this_actor = self.actors_df.loc[self.actors_df["uid"] == uid, "actor"].values[0]
+        if visible and (this_actor is None or uid in self.unloaded_uids):
+            """The actor has not been created yet, since the entity was hidden when the view was opened,
+            or the entity has been unloaded while hidden, so the actor is created now, and this reads
+            the entity from file."""
+            self.unloaded_uids.discard(uid)
+            show_property = self.actors_df.loc[
+                self.actors_df["uid"] == uid, "show_prop"
+            ].values[0]
+            self.remove_actor_in_view(uid=uid)
+            this_actor = self.show_actor_with_property(
+                uid=uid, collection=collection, show_property=show_property, visible=True
+            )
+            self.actors_df = self.actors_df.append(
+                {
+                    "uid": uid,
+                    "actor": this_actor,
+                    "show": True,
+                    "collection": collection,
+                    "show_prop": show_property,
+                },
+                ignore_index=True,
+            )
+        if this_actor is None:
+            return
         actors = self.plotter.renderer.actors
 
         if collection == "well_coll":
@@ -6461,6 +6438,29 @@ class BaseView(QMainWindow, Ui_BaseViewWindow):
         else:
             this_actor.SetVisibility(visible)
 
+    def lod_entity(self, uid=None):
+        """Point cloud to show instead of DOM uid, with the nodes of its level of detail octree
+        selected for the camera, or None to show the entity itself. Reimplemented in View3D."""
+        return None
+
+    def raster_tile_entity(self, uid=None, plot_entity=None, show_property=None):
+        """DEM or MapImage to show instead of plot_entity, with the tiles of its raster selected for the
+        camera, or None to show plot_entity itself. Reimplemented in View3D."""
+        return None
+
+    def unload_actor(self, uid=None):
+        """Release the data of the actor of an entity that has been unloaded by lazy loading. This is
+        called only for entities that are hidden in all views, and the actor is created again by
+        set_actor_visible when the entity is shown."""
+        if self.actors_df.loc[self.actors_df["uid"] == uid].empty:
+            return
+        this_actor = self.actors_df.loc[self.actors_df["uid"] == uid, "actor"].values[0]
+        if not hasattr(this_actor, "GetMapper") or this_actor.GetMapper() is None:
+            return
+        if this_actor.GetMapper().GetInput() is not None:
+            this_actor.GetMapper().GetInput().Initialize()
+        self.unloaded_uids.add(uid)
+
     def remove_actor_in_view(self, uid=None, redraw=False):
         update = self.parent.update_actors
         print("update: ", update)
@@ -6529,7 +6529,11 @@ class BaseView(QMainWindow, Ui_BaseViewWindow):
             line_thick = self.parent.dom_coll.get_legend()["line_thick"]
             opacity = self.parent.dom_coll.get_legend()["opacity"] / 100
 
-            plot_entity = self.parent.dom_coll.get_uid_vtk_obj(uid)
+            """Point clouds with a level of detail octree are shown with the nodes selected for the
+            camera, read from the octree without reading the entity if possible (see lod_entity)."""
+            plot_entity = self.lod_entity(uid=uid)
+            if plot_entity is None:
+                plot_entity = self.parent.dom_coll.get_uid_vtk_obj(uid)
         elif collection == "image_coll":
             """Note: no legend for image."""
             color_RGB = [255, 255, 255]
@@ -6728,6 +6732,12 @@ class BaseView(QMainWindow, Ui_BaseViewWindow):
                     visible=visible,
                 )
             else:
+                """DEMs of large rasters are shown with the tiles selected for the camera."""
+                raster_tile_entity = self.raster_tile_entity(
+                    uid=uid, plot_entity=plot_entity, show_property=show_property
+                )
+                if raster_tile_entity is not None:
+                    plot_entity = raster_tile_entity
                 plot_rgb_option = None
                 if show_property is None:
                     show_scalar_bar = False
@@ -6827,7 +6837,14 @@ class BaseView(QMainWindow, Ui_BaseViewWindow):
 
         elif isinstance(plot_entity, (MapImage, XsImage)):
             """Do not plot directly image - it is much slower.
-            Texture options according to type."""
+            Texture options according to type. Large map images are shown with the tiles selected
+            for the camera."""
+            if isinstance(plot_entity, MapImage):
+                raster_tile_entity = self.raster_tile_entity(
+                    uid=uid, plot_entity=plot_entity, show_property=show_property
+                )
+                if raster_tile_entity is not None:
+                    plot_entity = raster_tile_entity
             if show_property is None or show_property == "none":
                 plot_texture_option = None
             else:
@@ -7455,6 +7472,11 @@ class View3D(BaseView):
 
         self.trigger_event = "LeftButtonPressEvent"
 
+        """Nodes of point clouds with a level of detail octree, and tiles of large rasters, are selected
+        again when the camera has been still for lod_timer interval (see lod_camera_check)."""
+        self.plotter.renderer.AddObserver("StartEvent", self.lod_camera_check)
+        self.update_lod_actors(force=True)
+
     """Re-implementations of functions that appear in all views - see placeholders in BaseView()"""
 
     def initialize_menu_tools(self):
@@ -7465,6 +7487,11 @@ class View3D(BaseView):
             facets_pc,
             auto_pick,
             thresh_filt,
+            radial_filt,
+            surf_den_filt,
+            rough_filt,
+            curv_filt,
+            col_filt,
             normals2dd,
             calibration_pc,
         )
@@ -7473,6 +7500,24 @@ class View3D(BaseView):
         self.menuBaseView.setTitle("Edit")
         self.actionBase_Tool.setText("Edit")
 
+        """Point clouds with a level of detail octree are shown with up to lod_point_budget points each,
+        refining nodes until their point spacing on screen is below lod_pixel_error pixels. lod_nodes is
+        {uid: ids of the nodes shown}. This is set here since actors are added before __init__ ends."""
+        self.lod_point_budget = lod_point_budget_default
+        self.lod_pixel_error = lod_pixel_error_default
+        self.lod_nodes = {}
+        """DEMs and MapImages of large rasters are shown with up to raster_pixel_budget pixels each,
+        refining tiles until their pixels on screen are below raster_pixel_error pixels.
+        raster_tiles_shown is {uid: (level, tile_rows, tile_cols) shown, or None if out of view}."""
+        self.raster_pixel_budget = raster_pixel_budget_default
+        self.raster_pixel_error = raster_pixel_error_default
+        self.raster_tiles_shown = {}
+        self.lod_camera_mtime = None
+        self.lod_timer = QTimer(self)
+        self.lod_timer.setSingleShot(True)
+        self.lod_timer.setInterval(200)
+        self.lod_timer.timeout.connect(lambda: self.update_lod_actors())
+
         self.menuBoreTraceVis = QMenu("Borehole visualization methods", self)
         self.actionBoreTrace = QAction("Trace", self)
 
@@ -7497,9 +7542,15 @@ class View3D(BaseView):
         self.menuBaseView.addMenu(self.menuBoreTraceVis)
 
         self.actionThresholdf.triggered.connect(lambda: thresh_filt(self))
-        self.actionSurface_densityf.triggered.connect(lambda: self.surf_den_filt())
-        self.actionRoughnessf.triggered.connect(lambda: self.rough_filt())
-        self.actionCurvaturef.triggered.connect(lambda: self.curv_filt())
+        self.actionSurface_densityf.triggered.connect(lambda: surf_den_filt(self))
+        self.actionRoughnessf.triggered.connect(lambda: rough_filt(self))
+        self.actionCurvaturef.triggered.connect(lambda: curv_filt(self))
+        self.actionRadialf = QAction("Radial", self)
+        self.actionRadialf.triggered.connect(lambda: radial_filt(self))
+        self.menuTools.insertAction(self.actionSurface_densityf, self.actionRadialf)
+        self.actionColourf = QAction("Colour", self)
+        self.actionColourf.triggered.connect(lambda: col_filt(self))
+        self.menuTools.insertAction(self.actionThresholdf, self.actionColourf)
         self.actionNormalsf.triggered.connect(lambda: self.norm_filt())
         self.actionManualBoth.triggered.connect(lambda: cut_pc(self))
         self.actionManualInner.triggered.connect(lambda: cut_pc(self, "inner"))
@@ -7514,10 +7565,13 @@ class View3D(BaseView):
         # self.actionCalculate_normals.triggered.connect(lambda: self.normalGeometry())
         self.actionNormals_to_DDR.triggered.connect(lambda: normals2dd(self))
 
-        # self.showOct = QAction("Show octree structure", self)
-        # self.showOct.triggered.connect(self.show_octree)
-        # self.menuBaseView.addAction(self.showOct)
-        # self.toolBarBase.addAction(self.showOct)
+        self.actionLodPointBudget = QAction("Point cloud point budget", self)
+        self.actionLodPointBudget.triggered.connect(self.set_lod_point_budget)
+        self.menuBaseView.addAction(self.actionLodPointBudget)
+
+        self.showOct = QAction("Show octree nodes", self)
+        self.showOct.triggered.connect(self.show_octree)
+        self.menuBaseView.addAction(self.showOct)
 
         self.menuOrbit = QMenu("Orbit around", self)
 
@@ -7756,14 +7810,162 @@ class View3D(BaseView):
         return this_actor
 
     def show_octree(self):
-        vis_uids = self.actors_df.loc[self.actors_df["show"] == True, "uid"]
-        for uid in vis_uids:
-            vtk_obj = self.parent.dom_coll.get_uid_vtk_obj(uid)
-            oct = PolyData()  # [Gabriele] possible recursion problem
-            # print(vtk_obj.locator)
-            vtk_obj.locator.GenerateRepresentation(3, oct)
+        """Show the cubes of the level of detail octree nodes shown for each point cloud."""
+        for uid, node_ids in self.lod_nodes.items():
+            octree = self.parent.lod_octrees.get(uid)
+            if octree is None:
+                continue
+            append = vtkAppendPolyData()
+            for bounds in octree.node_bounds(node_ids):
+                append.AddInputData(pv_Box(bounds=bounds).outline())
+            append.Update()
+            self.plotter.add_mesh(
+                append.GetOutput(), name=f"{uid}_octree", style="wireframe", color="red"
+            )
+
+    def lod_entity(self, uid=None):
+        """Point cloud with the nodes of the level of detail octree of DOM uid selected for the present
+        camera and window size, or None if the entity has no octree (see lod_octree.py)."""
+        octree = self.parent.get_lod_octree(uid=uid)
+        if octree is None:
+            self.lod_nodes.pop(uid, None)
+            return None
+        node_ids = octree.select_nodes(
+            camera=self.plotter.camera,
+            viewport_size=self.plotter.window_size,
+            point_budget=self.lod_point_budget,
+            pixel_error=self.lod_pixel_error,
+        )
+        self.lod_nodes[uid] = node_ids
+        return octree.node_pcdom(node_ids)
+
+    def raster_tile_entity(self, uid=None, plot_entity=None, show_property=None):
+        """DEM or MapImage with the mosaic of the tiles of the raster of plot_entity selected for the
+        present camera and window size, or None if plot_entity has been read whole, is out of view, or
+        show_property is not read from the raster, e.g. a texture (raster_tiles.py)."""
+        raster_tiles = plot_entity.raster_tiles
+        if isinstance(plot_entity, DEM):
+            tiled_properties = [None, "none", "X", "Y", "Z", "elevation"]
+        else:
+            tiled_properties = plot_entity.properties_names
+        if raster_tiles is None or show_property not in tiled_properties:
+            self.raster_tiles_shown.pop(uid, None)
+            return None
+        selection = self.raster_tile_selection(
+            raster_tiles=raster_tiles, plot_entity=plot_entity
+        )
+        self.raster_tiles_shown[uid] = selection
+        if selection is None:
+            return None
+        level, tile_rows, tile_cols = selection
+        if isinstance(plot_entity, DEM):
+            return raster_tiles.window_dem(
+                level=level, tile_rows=tile_rows, tile_cols=tile_cols
+            )
+        return raster_tiles.window_map_image(
+            level=level, tile_rows=tile_rows, tile_cols=tile_cols
+        )
+
+    def raster_tile_selection(self, raster_tiles=None, plot_entity=None):
+        """Tiles of raster_tiles to show for the present camera and window size, with the Z range of
+        plot_entity."""
+        return raster_tiles.select_tiles(
+            camera=self.plotter.camera,
+            viewport_size=self.plotter.window_size,
+            z_range=plot_entity.bounds[4:6],
+            pixel_budget=self.raster_pixel_budget,
+            pixel_error=self.raster_pixel_error,
+        )
+
+    def lod_camera_check(self, caller=None, event=None):
+        """Observer of the StartEvent of the renderer, that (re)starts lod_timer if the camera has moved
+        since the last check, so that nodes are selected again only when the camera is still."""
+        camera_mtime = self.plotter.camera.GetMTime()
+        if (self.lod_nodes or self.raster_tiles_shown) and (
+            camera_mtime != self.lod_camera_mtime
+        ):
+            self.lod_camera_mtime = camera_mtime
+            self.lod_timer.start()
+
+    def update_lod_actors(self, uids=None, force=False):
+        """Select again the nodes of the shown point clouds with a level of detail octree, and the tiles
+        of the shown large rasters, and redraw their actors if the nodes or tiles have changed. uids are
+        redrawn also if they have no nodes yet (e.g. just after build_octree), and force=True redraws
+        them in any case."""
+        if uids is None:
+            uids = list(self.lod_nodes) + list(self.raster_tiles_shown)
+        for uid in uids:
+            if self.actors_df.loc[self.actors_df["uid"] == uid].empty:
+                self.lod_nodes.pop(uid, None)
+                self.raster_tiles_shown.pop(uid, None)
+                continue
+            if not self.actors_df.loc[self.actors_df["uid"] == uid, "show"].values[0]:
+                continue
+            if not force and uid in self.raster_tiles_shown:
+                collection = self.actors_df.loc[
+                    self.actors_df["uid"] == uid, "collection"
+                ].values[0]
+                plot_entity = getattr(self.parent, collection).get_uid_vtk_obj(uid)
+                raster_tiles = plot_entity.raster_tiles
+                if raster_tiles is not None and self.raster_tiles_shown[
+                    uid
+                ] == self.raster_tile_selection(
+                    raster_tiles=raster_tiles, plot_entity=plot_entity
+                ):
+                    continue
+            elif not force and uid in self.lod_nodes:
+                octree = self.parent.get_lod_octree(uid=uid)
+                if octree is not None and np_array_equal(
+                    self.lod_nodes[uid],
+                    octree.select_nodes(
+                        camera=self.plotter.camera,
+                        viewport_size=self.plotter.window_size,
+                        point_budget=self.lod_point_budget,
+                        pixel_error=self.lod_pixel_error,
+                    ),
+                ):
+                    continue
+            self.redraw_actor(uid=uid)
+
+    def redraw_actor(self, uid=None):
+        """Create again the actor of uid with the same collection, property and visibility."""
+        collection = self.actors_df.loc[self.actors_df["uid"] == uid, "collection"].values[0]
+        show = self.actors_df.loc[self.actors_df["uid"] == uid, "show"].values[0]
+        show_property = self.actors_df.loc[self.actors_df["uid"] == uid, "show_prop"].values[0]
+        self.remove_actor_in_view(uid=uid)
+        this_actor = self.show_actor_with_property(
+            uid=uid, collection=collection, show_property=show_property, visible=show
+        )
+        self.actors_df = self.actors_df.append(
+            {
+                "uid": uid,
+                "actor": this_actor,
+                "show": show,
+                "collection": collection,
+                "show_prop": show_property,
+            },
+            ignore_index=True,
+        )
 
-            self.plotter.add_mesh(oct, style="wireframe", color="red")
+    def set_actor_visible(self, uid=None, visible=None, name=None):
+        """Reimplemented to select again the nodes of a point cloud with a level of detail octree, or the
+        tiles of a large raster, that was hidden, since the camera might have moved."""
+        super().set_actor_visible(uid=uid, visible=visible, name=name)
+        if visible and (uid in self.lod_nodes or uid in self.raster_tiles_shown):
+            self.lod_timer.start()
+
+    def set_lod_point_budget(self):
+        """Set the maximum number of points shown for each point cloud with a level of detail octree."""
+        point_budget = input_one_value_dialog(
+            parent=self,
+            title="Point cloud point budget",
+            label="Maximum number of points shown for each point cloud with octree",
+            default_value=self.lod_point_budget,
+        )
+        if point_budget is None:
+            return
+        self.lod_point_budget = int(point_budget)
+        self.update_lod_actors()
 
     def change_bore_vis(self, method):
         actors = set(self.plotter.renderer.actors.copy())
@@ -8195,26 +8397,20 @@ class ViewStereoplot(BaseView):
                             """Already exists a TreeItem (2 level) for the geological feature"""
                             counter_2 = 0
                             for child_2 in range(
-                                self.GeologyTreeWidget.itemBelow(
-                                    self.GeologyTreeWidget.findItems(
+                                self.GeologyTreeWidget.findItems(
                                         self.parent.geol_coll.get_uid_geological_type(
                                             uid
                                         ),
                                         Qt.MatchExactly,
                                         0,
-                                    )[0]
-                                ).childCount()
+                                    )[0].child(child_1).childCount()
                             ):
                                 """for cycle that loops n times as the number of sub-subItems in the specific geological type and geological feature branch"""
-                                if self.GeologyTreeWidget.itemBelow(
-                                    self.GeologyTreeWidget.findItems(
-                                        self.parent.geol_coll.get_uid_geological_type(
-                                            uid
-                                        ),
-                                        Qt.MatchExactly,
-                                        0,
-                                    )[0]
-                                ).child(child_2).text(
+                                if self.GeologyTreeWidget.findItems(
+                                    self.parent.geol_coll.get_uid_geological_type(uid),
+                                    Qt.MatchExactly,
+                                    0,
+                                )[0].child(child_1).child(child_2).text(
                                     0
                                 ) == self.parent.geol_coll.get_uid_scenario(
                                     uid
@@ -8222,25 +8418,23 @@ class ViewStereoplot(BaseView):
                                     counter_2 += 1
                             if counter_2 != 0:
                                 for child_2 in range(
-                                    self.GeologyTreeWidget.itemBelow(
-                                        self.GeologyTreeWidget.findItems(
-                                            self.parent.geol_coll.get_uid_geological_type(
-                                                uid
-                                            ),
-                                            Qt.MatchExactly,
-                                            0,
-                                        )[0]
-                                    ).childCount()
+                                    self.GeologyTreeWidget.findItems(
+                                        self.parent.geol_coll.get_uid_geological_type(
+                                            uid
+                                        ),
+                                        Qt.MatchExactly,
+                                        0,
+                                    )[0]
+                                    .child(child_1)
+                                    .childCount()
                                 ):
-                                    if self.GeologyTreeWidget.itemBelow(
-                                        self.GeologyTreeWidget.findItems(
-                                            self.parent.geol_coll.get_uid_geological_type(
-                                                uid
-                                            ),
-                                            Qt.MatchExactly,
-                                            0,
-                                        )[0]
-                                    ).child(child_2).text(
+                                    if self.GeologyTreeWidget.findItems(
+                                        self.parent.geol_coll.get_uid_geological_type(
+                                            uid
+                                        ),
+                                        Qt.MatchExactly,
+                                        0,
+                                    )[0].child(child_1).child(child_2).text(
                                         0
                                     ) == self.parent.geol_coll.get_uid_scenario(
                                         uid
@@ -8382,7 +8576,6 @@ class ViewStereoplot(BaseView):
                     ].values[0]:
                         glevel_4.setCheckState(0, Qt.Unchecked)
                     self.GeologyTreeWidget.insertTopLevelItem(0, glevel_4)
-                    break
             else:
                 """Different geological type, geological feature and scenario"""
                 glevel_1 = QTreeWidgetItem(
@@ -8427,7 +8620,6 @@ class ViewStereoplot(BaseView):
                 ].values[0]:
                     glevel_4.setCheckState(0, Qt.Unchecked)
                 self.GeologyTreeWidget.insertTopLevelItem(0, glevel_4)
-                break
         self.GeologyTreeWidget.itemChanged.connect(
             self.toggle_geology_topology_visibility
         )
@@ -8553,7 +8745,6 @@ class ViewStereoplot(BaseView):
                     ].values[0]:
                         tlevel_3.setCheckState(0, Qt.Unchecked)
                     self.TopologyTreeWidget.insertTopLevelItem(0, tlevel_3)
-                    break
             else:
                 """Different topological type and scenario"""
                 tlevel_1 = QTreeWidgetItem(
@@ -8591,7 +8782,6 @@ class ViewStereoplot(BaseView):
                 ].values[0]:
                     tlevel_3.setCheckState(0, Qt.Unchecked)
                 self.TopologyTreeWidget.insertTopLevelItem(0, tlevel_3)
-                break
         self.TopologyTreeWidget.itemChanged.connect(
             self.toggle_geology_topology_visibility
         )
@@ -9639,7 +9829,8 @@ class NewViewXsection(NewView2D):
         self.plotter.reset_camera()
 
     def add_all_entities(self):
-        """Add all entities in project collections. All objects are visible by default -> show = True"""
+        """Add all entities in project collections. All objects are visible by default -> show = True
+        Hidden entities are added with actor None, as in BaseView.add_all_entities."""
         sec_uid = self.this_x_section_uid
         for uid in self.parent.geol_coll.df["uid"].tolist():
             if self.parent.geol_coll.get_uid_x_section(uid) == sec_uid:
@@ -9659,13 +9850,10 @@ class NewViewXsection(NewView2D):
 
         for uid in self.parent.xsect_coll.df["uid"].tolist():
             if uid == sec_uid:
-                this_actor = self.show_actor_with_property(
-                    uid=uid, collection="xsect_coll", show_property=None, visible=False
-                )
                 self.actors_df = self.actors_df.append(
                     {
                         "uid": uid,
-                        "actor": this_actor,
+                        "actor": None,
                         "show": False,
                         "collection": "xsect_coll",
                         "show_prop": None,
@@ -9675,16 +9863,10 @@ class NewViewXsection(NewView2D):
 
         for uid in self.parent.boundary_coll.df["uid"].tolist():
             if self.parent.boundary_coll.get_uid_x_section(uid) == sec_uid:
-                this_actor = self.show_actor_with_property(
-                    uid=uid,
-                    collection="boundary_coll",
-                    show_property=None,
-                    visible=False,
-                )
                 self.actors_df = self.actors_df.append(
                     {
                         "uid": uid,
-                        "actor": this_actor,
+                        "actor": None,
                         "show": False,
                         "collection": "boundary_coll",
                         "show_prop": None,
@@ -9693,13 +9875,10 @@ class NewViewXsection(NewView2D):
                 )
         for uid in self.parent.mesh3d_coll.df["uid"].tolist():
             if self.parent.mesh3d_coll.get_uid_x_section(uid) == sec_uid:
-                this_actor = self.show_actor_with_property(
-                    uid=uid, collection="mesh3d_coll", show_property=None, visible=False
-                )
                 self.actors_df = self.actors_df.append(
                     {
                         "uid": uid,
-                        "actor": this_actor,
+                        "actor": None,
                         "show": False,
                         "collection": "mesh3d_coll",
                         "show_prop": None,
@@ -9708,13 +9887,10 @@ class NewViewXsection(NewView2D):
                 )
         for uid in self.parent.dom_coll.df["uid"].tolist():
             if self.parent.dom_coll.get_uid_x_section(uid) == sec_uid:
-                this_actor = self.show_actor_with_property(
-                    uid=uid, collection="dom_coll", show_property=None, visible=False
-                )
                 self.actors_df = self.actors_df.append(
                     {
                         "uid": uid,
-                        "actor": this_actor,
+                        "actor": None,
                         "show": False,
                         "collection": "dom_coll",
                         "show_prop": None,
@@ -9723,13 +9899,10 @@ class NewViewXsection(NewView2D):
                 )
         for uid in self.parent.image_coll.df["uid"].tolist():
             if self.parent.image_coll.get_uid_x_section(uid) == sec_uid:
-                this_actor = self.show_actor_with_property(
-                    uid=uid, collection="image_coll", show_property=None, visible=False
-                )
                 self.actors_df = self.actors_df.append(
                     {
                         "uid": uid,
-                        "actor": this_actor,
+                        "actor": None,
                         "show": False,
                         "collection": "image_coll",
                         "show_prop": None,
@@ -9737,13 +9910,10 @@ class NewViewXsection(NewView2D):
                     ignore_index=True,
                 )
         for uid in self.parent.well_coll.df["uid"].tolist():
-            this_actor = self.show_actor_with_property(
-                uid=uid, collection="well_coll", show_property=None, visible=False
-            )
             self.actors_df = self.actors_df.append(
                 {
                     "uid": uid,
-                    "actor": this_actor,
+                    "actor": None,
                     "show": False,
                     "collection": "well_coll",
                     "show_prop": None,
@@ -9752,13 +9922,10 @@ class NewViewXsection(NewView2D):
             )
         for uid in self.parent.fluids_coll.df["uid"].tolist():
             if self.parent.fluids_coll.get_uid_x_section(uid) == sec_uid:
-                this_actor = self.show_actor_with_property(
-                    uid=uid, collection="fluids_coll", show_property=None, visible=False
-                )
                 self.actors_df = self.actors_df.append(
                     {
                         "uid": uid,
-                        "actor": this_actor,
+                        "actor": None,
                         "show": False,
                         "collection": "fluids_coll",
                         "show_prop": None,
@@ -9767,16 +9934,10 @@ class NewViewXsection(NewView2D):
                 )
         for uid in self.parent.backgrounds_coll.df["uid"].tolist():
             if self.parent.backgrounds_coll.get_uid_x_section(uid) == sec_uid:
-                this_actor = self.show_actor_with_property(
-                    uid=uid,
-                    collection="backgrounds_coll",
-                    show_property=None,
-                    visible=False,
-                )
                 self.actors_df = self.actors_df.append(
                     {
                         "uid": uid,
-                        "actor": this_actor,
+                        "actor": None,
                         "show": False,
                         "collection": "backgrounds_coll",
                         "show_prop": None,
@@ -9842,6 +10003,9 @@ class NewViewXsection(NewView2D):
 
     def change_actor_line_thick(self, uid=None, collection=None):
         """Update line thickness for actor uid"""
+        if None in self.actors_df.loc[self.actors_df["uid"] == uid, "actor"].to_list():
+            """The actor of a hidden entity is created by set_actor_visible, with the current legend."""
+            return
 
         sec_uid = self.this_x_section_uid
         attr = getattr(self.parent, collection)
@@ -10538,7 +10702,7 @@ class NewViewXsection(NewView2D):
                 },
                 ignore_index=True,
             )
-            self.update_dom_list_added(actors_df_new, sec_uid=self.this_x_section_uid)
+        self.update_dom_list_added(actors_df_new, sec_uid=self.this_x_section_uid)
         """Re-connect signals."""
         self.DOMsTableWidget.itemChanged.connect(self.toggle_dom_visibility)
 
@@ -0,0 +1,233 @@
+import os
+from threading import Event
+
+import numpy as np
+import pytest
+from pandas import DataFrame as pd_DataFrame
+from PyQt5.QtCore import QObject, pyqtSignal
+from PyQt5.QtWidgets import QLabel
+from vtkmodules.util.numpy_support import vtk_to_numpy
+
+from pzero.autosave_manager import AutosaveManager, autosave_rev_name
+from pzero.entities_factory import TriSurf
+from pzero.project_io import (
+    LazyVtkObj,
+    read_manifest,
+    read_project_file,
+    object_file_name,
+    objects_dir_name,
+)
+from tests.test_project_io import make_trisurf, read_polydata
+
+
+# Table whose JSON text is written only when release is set, used to keep an autosave running
+class BlockingTable:
+    def __init__(self):
+        self.release = Event()
+
+    def to_json(self, orient=None):
+        self.release.wait(10)
+        return "{}"
+
+
+# Class used as a substitute of ProjectWindow, with the methods and signals used by AutosaveManager
+class FakeProjectWindow(QObject):
+    geology_added_signal = pyqtSignal(list)
+    geology_geom_modified_signal = pyqtSignal(list)
+    geology_metadata_modified_signal = pyqtSignal(list)
+    line_digitized_signal = pyqtSignal(dict)
+
+    def __init__(self, out_file_name=None, n=3):
+        super().__init__()
+        self.out_file_name = out_file_name
+        self.vtk_objs = {"surf_" + str(i): make_trisurf(seed=i) for i in range(n)}
+        self.table = pd_DataFrame({"uid": list(self.vtk_objs)})
+
+    def project_tables(self):
+        return [("geological_table.json", self.table.copy(deep=False))]
+
+    def vtk_entities_to_save(self):
+        return [(uid, ".vtp", vtk_obj) for uid, vtk_obj in self.vtk_objs.items()]
+
+
+@pytest.fixture
+def project(tmp_path, qtbot):
+    """Autosave manager of a fake project, stopped at the end of each test."""
+    parent = FakeProjectWindow(out_file_name=str(tmp_path / "project.p0"))
+    label = QLabel()
+    qtbot.addWidget(label)
+    manager = AutosaveManager(parent=parent, label=label)
+    manager.delay_s = 0.05
+    yield parent, manager
+    manager.set_enabled(False)
+    manager.wait()
+    qtbot.wait(10)
+
+
+def autosave(manager, qtbot):
+    with qtbot.waitSignal(manager.autosave_finished_signal, timeout=10000):
+        manager.start()
+
+
+# Class for testing the background autosave
+class TestAutosaveManager:
+
+    # a burst of edits starts the timer once and produces a single autosave
+    def test_coalesce_edits(self, project, tmp_path, qtbot):
+        parent, manager = project
+        finished = []
+        manager.autosave_finished_signal.connect(finished.append)
+        for uid in parent.vtk_objs:
+            parent.geology_geom_modified_signal.emit([uid])
+        parent.geology_metadata_modified_signal.emit(["surf_0"])
+
+        assert manager.timer.isActive()
+        assert manager.dirty_uids == set(parent.vtk_objs)
+
+        qtbot.waitUntil(lambda: len(finished) == 1, timeout=10000)
+        qtbot.wait(200)
+
+        assert len(finished) == 1
+        assert finished[0]["error"] is None
+        assert not manager.timer.isActive()
+        assert manager.dirty_uids == set()
+
+    # signals that do not edit the project do not schedule an autosave
+    def test_ignored_signals(self, project, tmp_path, qtbot):
+        parent, manager = project
+        parent.line_digitized_signal.emit({})
+
+        assert not manager.timer.isActive()
+
+    # the autosave revision is written in the project folder, sharing its object store
+    def test_autosave_revision(self, project, tmp_path, qtbot):
+        parent, manager = project
+        autosave(manager, qtbot)
+
+        project_dir_name = str(tmp_path / "project_p0")
+        rev_dir_name = os.path.join(project_dir_name, autosave_rev_name)
+        manifest = read_manifest(rev_dir_name)
+        assert sorted(manifest) == sorted(parent.vtk_objs)
+        assert os.path.isfile(os.path.join(rev_dir_name, "geological_table.json"))
+        out = read_polydata(
+            object_file_name(objects_dir_name(project_dir_name), manifest["surf_1"])
+        )
+        assert np.allclose(out.points, parent.vtk_objs["surf_1"].points)
+        assert manager.label.text().startswith("Autosave ")
+        assert manager.last_duration is not None
+
+    # autosave does not remove objects and octrees that no revision references
+    def test_no_garbage_collection(self, project, tmp_path, qtbot):
+        parent, manager = project
+        project_dir_name = str(tmp_path / "project_p0")
+        unreferenced = [
+            object_file_name(objects_dir_name(project_dir_name), "unreferenced.vtp"),
+            os.path.join(project_dir_name, "lod", "new_uid", "lod.json"),
+        ]
+        for file_name in unreferenced:
+            os.makedirs(os.path.dirname(file_name))
+            open(file_name, "w").close()
+        autosave(manager, qtbot)
+
+        assert all(os.path.isfile(file_name) for file_name in unreferenced)
+
+    # projects not saved as .p0 folders are autosaved in a separate project
+    def test_autosave_separate_project(self, project, tmp_path, qtbot):
+        parent, manager = project
+        parent.out_file_name = str(tmp_path / "project.p0c")
+        autosave(manager, qtbot)
+
+        assert read_project_file(str(tmp_path / "project_autosave.p0")) == (
+            autosave_rev_name
+        )
+        assert os.path.isdir(str(tmp_path / "project_autosave_p0" / autosave_rev_name))
+
+    # only entities edited since the last autosave are copied by the snapshot
+    def test_snapshot_copies_dirty_entities(self, project, tmp_path, qtbot):
+        parent, manager = project
+        autosave(manager, qtbot)
+        objects_dir = objects_dir_name(str(tmp_path / "project_p0"))
+        parent.vtk_objs["surf_0"].points = parent.vtk_objs["surf_0"].points + 1.0
+        parent.geology_geom_modified_signal.emit(["surf_1"])
+
+        entities, _ = manager.snapshot_entities(objects_dir=objects_dir)
+        snapshot = {uid: vtk_obj for uid, _, vtk_obj in entities}
+
+        assert isinstance(snapshot["surf_2"], LazyVtkObj)
+        assert snapshot["surf_2"].object_name == manager.manifest["surf_2"]
+        for uid in ["surf_0", "surf_1"]:
+            assert not isinstance(snapshot[uid], LazyVtkObj)
+            assert snapshot[uid] is not parent.vtk_objs[uid]
+            assert np.allclose(
+                vtk_to_numpy(snapshot[uid].GetPoints().GetData()),
+                parent.vtk_objs[uid].points,
+            )
+
+    # edits made while the autosave is written do not change what is saved
+    def test_snapshot_isolation(self, project, tmp_path, qtbot):
+        parent, manager = project
+        table = BlockingTable()
+        parent.project_tables = lambda: [("geological_table.json", table)]
+        points = parent.vtk_objs["surf_0"].points.copy()
+        with qtbot.waitSignal(manager.autosave_finished_signal, timeout=10000):
+            manager.start()
+            parent.vtk_objs["surf_0"].points = points + 1.0
+            table.release.set()
+
+        manifest = read_manifest(str(tmp_path / "project_p0" / autosave_rev_name))
+        out = read_polydata(
+            object_file_name(
+                objects_dir_name(str(tmp_path / "project_p0")), manifest["surf_0"]
+            )
+        )
+        assert np.allclose(out.points, points)
+
+    # edits made while an autosave is running are saved by a second autosave, never concurrently
+    def test_no_concurrent_autosaves(self, project, tmp_path, qtbot):
+        parent, manager = project
+        table = BlockingTable()
+        parent.project_tables = lambda: [("geological_table.json", table)]
+        finished = []
+        manager.autosave_finished_signal.connect(finished.append)
+        manager.start()
+        first_thread = manager.thread
+        parent.geology_geom_modified_signal.emit(["surf_0"])
+        manager.start()
+
+        assert manager.thread is first_thread
+        assert manager.pending
+        assert not manager.timer.isActive()
+
+        table.release.set()
+        qtbot.waitUntil(lambda: len(finished) == 2, timeout=10000)
+
+        assert manager.thread is not first_thread
+        assert all(result["error"] is None for result in finished)
+
+    # no autosave starts while paused, and edits made meanwhile are autosaved afterwards
+    def test_paused(self, project, tmp_path, qtbot):
+        parent, manager = project
+        with manager.paused():
+            parent.geology_added_signal.emit(["surf_0"])
+            manager.start()
+
+            assert manager.thread is None
+            assert not manager.timer.isActive()
+
+        assert manager.timer.isActive()
+
+    # after a reset, unchanged entities of the opened revision are passed by reference
+    def test_reset(self, project, tmp_path, qtbot):
+        parent, manager = project
+        autosave(manager, qtbot)
+        manifest = dict(manager.manifest)
+        parent.geology_geom_modified_signal.emit(["surf_0"])
+        manager.reset(manifest=manifest)
+
+        assert not manager.timer.isActive()
+        assert manager.dirty_uids == set()
+        entities, _ = manager.snapshot_entities(
+            objects_dir=objects_dir_name(str(tmp_path / "project_p0"))
+        )
+        assert all(isinstance(vtk_obj, LazyVtkObj) for _, _, vtk_obj in entities)
+        assert isinstance(parent.vtk_objs["surf_0"], TriSurf)
@@ -0,0 +1,133 @@
+import numpy as np
+import pytest
+
+from pzero import cluster_planes as cp
+from pzero.cluster_planes import (
+    build_facets,
+    cluster_order,
+    cluster_planes,
+    plane_attitudes,
+    triangulate_facet,
+)
+from pzero.helpers.helper_functions import best_fitting_plane
+
+
+# Unit normal of a plane with the given dip direction and dip, pointing downwards
+def downward_normal(dip_direction, dip):
+    dd, d = np.radians(dip_direction), np.radians(dip)
+    return -np.array([np.sin(d) * np.sin(dd), np.sin(d) * np.cos(dd), np.cos(d)])
+
+
+# Square 10 x 10 patches of points with known attitudes, shuffled, with a two-points region (id 7)
+# and UTM-like coordinates
+def make_clusters(seed=0):
+    rng = np.random.default_rng(seed)
+    attitudes = [(30, 20), (120, 45), (250, 80), (0, 0), (315, 60)]
+    points, ids = [], []
+    for region, (dip_direction, dip) in enumerate(attitudes):
+        normal = -downward_normal(dip_direction, dip)
+        strike = np.array(
+            [np.cos(np.radians(dip_direction)), -np.sin(np.radians(dip_direction)), 0]
+        )
+        dip_vector = np.cross(normal, strike)
+        u, v = np.meshgrid(np.linspace(0, 10, 21), np.linspace(0, 10, 21))
+        center = np.array([500000.0, 5000000.0, 1000.0]) + region * 50
+        points.append(
+            center + u.reshape(-1, 1) * strike + v.reshape(-1, 1) * dip_vector
+        )
+        ids.append(np.full(u.size, region * 2))
+    points.append(np.array([[500000.0, 5000000.0, 0.0], [500001.0, 5000000.0, 0.0]]))
+    ids.append(np.array([7, 7]))
+    points, ids = np.vstack(points), np.concatenate(ids)
+    order = rng.permutation(len(ids))
+    return points[order], ids[order], attitudes
+
+
+# Class for testing the plane fitting and triangulation of clusters
+class TestClusterPlanes:
+
+    # points of each cluster are a contiguous slice of the stable order
+    def test_cluster_order(self):
+        ids = np.array([3, 1, 3, 0, 1, 3])
+        regions, order, bounds = cluster_order(cluster_ids=ids)
+
+        assert regions.tolist() == [0, 1, 3]
+        assert order.tolist() == [3, 1, 4, 0, 2, 5]
+        assert bounds.tolist() == [0, 1, 3, 6]
+
+    # all the clusters, including the last one, are fitted as by best_fitting_plane
+    def test_cluster_planes(self):
+        points, ids, attitudes = make_clusters()
+        regions, centers, normals, counts = cluster_planes(
+            points=points, cluster_ids=ids
+        )
+        dip_directions, dips = plane_attitudes(normals=normals)
+
+        assert regions.tolist() == [0, 2, 4, 6, 7, 8]
+        assert counts.tolist() == [441] * 4 + [2, 441]
+        for i, region in enumerate(regions):
+            c, n = best_fitting_plane(points[ids == region])
+            assert np.allclose(centers[i], c)
+            if region != 7:
+                assert abs(np.dot(normals[i], n)) == pytest.approx(1)
+        planes = [i for i, region in enumerate(regions) if region != 7]
+        assert np.all(normals[planes, 2] < 0)
+        assert np.allclose(dips[planes], [d for _, d in attitudes], atol=1e-6)
+        assert np.allclose(
+            dip_directions[planes][[0, 1, 2, 4]],
+            [dd for dd, d in attitudes if d > 0],
+            atol=1e-6,
+        )
+
+    # facets are flat, with the area and sides of the patch, and degenerate clusters have no triangles
+    def test_triangulate_facet(self):
+        points, ids, _ = make_clusters()
+        regions, centers, normals, _ = cluster_planes(points=points, cluster_ids=ids)
+        noisy = points[ids == 2] + np.random.default_rng(1).normal(0, 0.01, (441, 3))
+        facet_points, triangles, area, width, length = triangulate_facet(
+            points=noisy, center=centers[1], normal=normals[1]
+        )
+
+        assert np.abs((facet_points - centers[1]) @ normals[1]).max() < 1e-9
+        assert triangles.shape[1] == 3 and triangles.max() < 441
+        assert area == pytest.approx(100, rel=0.01)
+        assert width == pytest.approx(10, rel=0.01)
+        assert length == pytest.approx(10, rel=0.01)
+        _, triangles, area, width, _ = triangulate_facet(
+            points=points[ids == 7], center=centers[4], normal=normals[4]
+        )
+        assert triangles.shape == (0, 3) and area == 0 and width == pytest.approx(1)
+
+    # the pool gives the same facets as the calling thread, batches of clusters up to 1000 points are
+    # reported, and cancel stops the job
+    def test_build_facets(self, monkeypatch):
+        points, ids, _ = make_clusters()
+        monkeypatch.setattr(cp, "facet_batch_points", 1000)
+        done = []
+        serial = build_facets(
+            points=points, cluster_ids=ids, workers=0, callback=done.append
+        )
+        pooled = build_facets(points=points, cluster_ids=ids, workers=1)
+
+        assert done == [2, 3, 1]
+        assert len(serial["triangles"]) == len(pooled["triangles"]) > 0
+        for key in [
+            "centers",
+            "normals",
+            "areas",
+            "widths",
+            "lengths",
+            "points",
+            "triangles",
+        ]:
+            assert np.array_equal(serial[key], pooled[key])
+        assert serial["points"].shape == points.shape
+        assert serial["triangles"].max() == len(points) - 1
+        assert np.allclose(serial["areas"][[0, 1, 2, 3, 5]], 100)
+        for workers in [0, 1]:
+            assert (
+                build_facets(
+                    points=points, cluster_ids=ids, workers=workers, cancel=lambda: True
+                )
+                is None
+            )
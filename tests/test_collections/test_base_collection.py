@@ -0,0 +1,195 @@
+from copy import deepcopy
+
+import pytest
+from pandas import DataFrame as pd_DataFrame
+from PyQt5.QtWidgets import QMainWindow
+
+from pzero.collections.boundary_collection import BoundaryCollection
+from pzero.collections.geological_collection import GeologicalCollection
+from pzero.entities_factory import PolyLine
+from pzero.legend_manager import Legend
+
+
+# Class used as a substitute of pyqt-signals/emit
+class FakeSignal:
+    def emit(self, uid):
+        return
+
+
+# Class used as a substitute of pyqt-signals/emit, recording the emitted lists of uids
+class RecordingSignal:
+    def __init__(self):
+        self.emitted = []
+
+    def emit(self, uids):
+        self.emitted.append(list(uids))
+
+
+# Class used as a substitute of Legend, counting the updates
+class FakeLegend:
+    def __init__(self):
+        self.n_updates = 0
+
+    def update_widget(self, parent):
+        self.n_updates += 1
+
+
+# Class used for test the main window (project_window) as a parent
+class FakeWindow(QMainWindow):
+    boundary_added_signal = FakeSignal()
+    boundary_removed_signal = FakeSignal()
+
+
+# Class used for test the main window (project_window) as a parent, with a geological legend
+class FakeGeologyWindow:
+    def __init__(self):
+        self.geol_legend_df = pd_DataFrame(columns=list(Legend.geol_legend_dict.keys()))
+        self.legend = FakeLegend()
+        self.prop_legend = FakeLegend()
+        self.geology_added_signal = RecordingSignal()
+        self.geology_removed_signal = RecordingSignal()
+
+
+def geological_entity_dicts(n=6):
+    entity_dicts = []
+    for i in range(n):
+        entity_dict = deepcopy(GeologicalCollection.geological_entity_dict)
+        entity_dict["name"] = "name_" + str(i)
+        entity_dict["geological_feature"] = "feature_" + str(i % 3)
+        entity_dict["vtk_obj"] = PolyLine()
+        entity_dicts.append(entity_dict)
+    return entity_dicts
+
+
+def make_collection(n=5):
+    collection = BoundaryCollection(parent=FakeWindow)
+    for i in range(n):
+        collection.add_entity_from_dict(
+            {
+                "uid": "uid_" + str(i),
+                "name": "name_" + str(i),
+                "topological_type": "PolyLine",
+                "x_section": "",
+                "vtk_obj": PolyLine(),
+            }
+        )
+    return collection
+
+
+def linear_scan(collection, uid, column):
+    return collection.df.loc[collection.df["uid"] == uid, column].values[0]
+
+
+# Class for testing the uid index shared by all collections
+class TestBaseCollection:
+
+    # lookups through the index return the same values as a linear scan
+    def test_get_uid_value(self):
+        collection = make_collection()
+
+        for uid in collection.get_uids():
+            assert collection.get_uid_name(uid) == linear_scan(collection, uid, "name")
+            assert collection.get_uid_vtk_obj(uid) is linear_scan(
+                collection, uid, "vtk_obj"
+            )
+        with pytest.raises(IndexError):
+            collection.get_uid_name("missing")
+
+    # values are set in the row of the entity only, lists are not unpacked over rows
+    def test_set_uid_value(self):
+        collection = make_collection()
+        collection.set_uid_name(uid="uid_3", name="new_name")
+        collection.set_uid_value(uid="uid_1", column="x_section", value=["a", "b"])
+        collection.set_uid_name(uid="missing", name="new_name")
+
+        assert collection.df["name"].to_list() == [
+            "name_0",
+            "name_1",
+            "name_2",
+            "new_name",
+            "name_4",
+        ]
+        assert linear_scan(collection, "uid_1", "x_section") == ["a", "b"]
+
+    # the index is kept in sync by add_entity_from_dict, remove_entity and replace_vtk
+    def test_index_in_sync(self):
+        collection = make_collection()
+        collection.remove_entity("uid_1")
+        new_vtk_obj = PolyLine()
+        collection.replace_vtk(uid="uid_3", vtk_object=new_vtk_obj)
+
+        assert collection.uid_rows == {
+            uid: row for row, uid in enumerate(collection.df["uid"].values)
+        }
+        assert collection.get_uid_vtk_obj("uid_3") is new_vtk_obj
+        assert collection.get_uid_name("uid_3") == "name_3"
+        assert collection.get_uid_name("uid_4") == "name_4"
+        assert "uid_1" not in collection.uid_rows
+
+    # the index is rebuilt when the dataframe is replaced or edited in place
+    def test_index_rebuilt(self):
+        collection = make_collection()
+        collection.df.sort_values(by="name", ascending=False, inplace=True)
+
+        assert collection.get_uid_name("uid_0") == "name_0"
+        assert collection.uid_rows["uid_0"] == 4
+
+        collection.df = pd_DataFrame(
+            {"uid": ["a", "b"], "name": ["name_a", "name_b"], "vtk_obj": [None, None]}
+        )
+
+        assert collection.get_uid_name("b") == "name_b"
+        with pytest.raises(IndexError):
+            collection.get_uid_name("uid_0")
+
+
+# Class for testing the batch insertion and removal of entities
+class TestBatchEntities:
+
+    # a batch is added with a single model reset, legend update and signal
+    def test_add_entities_from_dicts(self):
+        parent = FakeGeologyWindow()
+        collection = GeologicalCollection(parent=parent)
+        n_resets = []
+        collection.modelReset.connect(lambda: n_resets.append(1))
+        uids = collection.add_entities_from_dicts(
+            entity_dicts=geological_entity_dicts()
+        )
+
+        assert len(n_resets) == 1
+        assert collection.get_uids() == uids
+        assert all(uids) and len(set(uids)) == 6
+        assert collection.get_uid_name(uids[4]) == "name_4"
+        assert parent.geology_added_signal.emitted == [uids]
+        assert parent.legend.n_updates == 1
+        assert sorted(parent.geol_legend_df["geological_feature"]) == [
+            "feature_0",
+            "feature_1",
+            "feature_2",
+        ]
+        assert collection.add_entities_from_dicts(entity_dicts=[]) == []
+        assert len(parent.geology_added_signal.emitted) == 1
+
+    # a batch is removed with a single signal, and the legend keeps the features still in use
+    def test_remove_entities(self):
+        parent = FakeGeologyWindow()
+        collection = GeologicalCollection(parent=parent)
+        parent.geol_coll = collection
+        uids = collection.add_entities_from_dicts(
+            entity_dicts=geological_entity_dicts()
+        )
+        n_resets = []
+        collection.modelReset.connect(lambda: n_resets.append(1))
+        removed_uids = collection.remove_entities(uids=[uids[0], uids[3], "missing"])
+
+        assert removed_uids == [uids[0], uids[3]]
+        assert len(n_resets) == 1
+        assert parent.geology_removed_signal.emitted == [removed_uids]
+        assert collection.get_uids() == [uids[1], uids[2], uids[4], uids[5]]
+        assert collection.get_uid_name(uids[5]) == "name_5"
+        assert sorted(parent.geol_legend_df["geological_feature"]) == [
+            "feature_1",
+            "feature_2",
+        ]
+        assert collection.remove_entities(uids=["missing"]) == []
+        assert len(parent.geology_removed_signal.emitted) == 1
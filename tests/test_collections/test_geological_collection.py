@@ -1,3 +1,7 @@
+from collections import Counter
+from copy import deepcopy
+
+from numpy import random as np_random
 from pzero.collections.geological_collection import GeologicalCollection
 from pzero.legend_manager import Legend
 
@@ -69,3 +73,97 @@ class TestGeologicalCollection:
                and (self.geological_entity_dict2['uid'] in self.geo_coll_istance.get_uids())
 
 
+
+
+# Class used as a substitute of the main window (project_window), with its own legend table
+class FakeLegendWindow:
+    def __init__(self):
+        self.geol_legend_df = pd_DataFrame(columns=list(Legend.geol_legend_dict.keys()))
+        self.legend = FakeLegend()
+        self.prop_legend = FakeLegend()
+        self.geology_added_signal = FakeSignal()
+        self.geology_removed_signal = FakeSignal()
+        self.geology_metadata_modified_signal = FakeSignal()
+
+
+def random_entity_dicts(rng, n=None):
+    entity_dicts = []
+    for _ in range(n):
+        entity_dict = deepcopy(GeologicalCollection.geological_entity_dict)
+        entity_dict["geological_type"] = str(rng.choice(["top", "fault", "undef"]))
+        entity_dict["geological_feature"] = "feature_" + str(rng.integers(0, 5))
+        entity_dict["scenario"] = "sc_" + str(rng.integers(0, 2))
+        entity_dicts.append(entity_dict)
+    return entity_dicts
+
+
+def legend_keys(legend_df):
+    return sorted(
+        zip(
+            legend_df["geological_type"],
+            legend_df["geological_feature"],
+            legend_df["scenario"],
+        )
+    )
+
+
+# Class for testing the incremental legend of geological_collection.py against a full recomputation
+class TestGeologicalLegend:
+
+    # reference counts and legend rows stay consistent through adds, removals and edits
+    def test_incremental_legend(self):
+        rng = np_random.default_rng(0)
+        parent = FakeLegendWindow()
+        collection = GeologicalCollection(parent=parent)
+        parent.geol_coll = collection
+        for step in range(60):
+            operation = step % 4
+            if operation == 0:
+                collection.add_entities_from_dicts(
+                    entity_dicts=random_entity_dicts(rng, n=int(rng.integers(1, 6)))
+                )
+            elif operation == 1 and collection.get_number_of_entities():
+                uids = collection.get_uids()
+                collection.remove_entities(
+                    uids=list(rng.choice(uids, size=min(3, len(uids)), replace=False))
+                )
+            elif operation == 2 and collection.get_number_of_entities():
+                uid = str(rng.choice(collection.get_uids()))
+                collection.set_uid_geological_feature(
+                    uid=uid, geological_feature="feature_" + str(rng.integers(0, 5))
+                )
+            elif operation == 3 and collection.get_number_of_entities():
+                row = int(rng.integers(0, collection.get_number_of_entities()))
+                index = collection.index(row, collection.df.columns.get_loc("scenario"))
+                collection.setData(index, "sc_" + str(rng.integers(0, 3)))
+
+            full_counts = Counter(
+                zip(
+                    collection.df["geological_type"],
+                    collection.df["geological_feature"],
+                    collection.df["scenario"],
+                )
+            )
+            assert collection.legend_counts == full_counts
+            assert legend_keys(parent.geol_legend_df) == sorted(full_counts)
+
+        # a full recomputation does not change the legend, nor its colors
+        legend_df = parent.geol_legend_df.copy()
+        collection.geology_attr_modified_update_legend_table()
+        assert parent.geol_legend_df.equals(legend_df)
+
+    # a full recomputation repairs the legend after the dataframe is edited in place
+    def test_full_recomputation(self):
+        parent = FakeLegendWindow()
+        collection = GeologicalCollection(parent=parent)
+        parent.geol_coll = collection
+        uids = collection.add_entities_from_dicts(
+            entity_dicts=random_entity_dicts(np_random.default_rng(1), n=10)
+        )
+        collection.df["geological_feature"] = "edited"
+        collection.geology_attr_modified_update_legend_table()
+
+        assert legend_keys(parent.geol_legend_df) == sorted(
+            set(legend_keys(collection.df))
+        )
+        assert sum(collection.legend_counts.values()) == len(uids)
@@ -1,5 +1,11 @@
+from copy import deepcopy
+
+import numpy as np
 from pzero.collections.xsection_collection import XSectionCollection
+from pzero.entities_factory import XsPolyLine
+from pzero.orientation_analysis import dip_directions2normals, get_dip_dir_vectors
 from PyQt5.QtWidgets import QMainWindow
+from vtk import vtkPlane
 
 
 # Class used as a substitute of pyqt-signals/emit
@@ -68,3 +74,87 @@ class TestXSectionCollection:
 
         assert self.x_section_coll_istance.get_number_of_entities() == 1 \
             and self.geological_entity_dict['uid'] in self.x_section_coll_istance.get_uids()
+
+
+# Class used for test the main window (project_window) as a parent, with the cross section collection
+class FakeXSectionWindow:
+    def __init__(self):
+        self.xsect_added_signal = FakeSignal()
+        self.xsect_removed_signal = FakeSignal()
+        self.xsect_coll = XSectionCollection(parent=self)
+
+
+def add_section(collection, azimuth=30.0, dip=70.0):
+    section_dict = deepcopy(XSectionCollection.section_dict)
+    section_dict["name"] = "section"
+    section_dict["base_x"], section_dict["base_y"], section_dict["base_z"] = 500000.0, 5000000.0, -100.0
+    section_dict["end_x"] = 500000.0 + 1000.0 * np.sin(np.deg2rad(azimuth))
+    section_dict["end_y"] = 5000000.0 + 1000.0 * np.cos(np.deg2rad(azimuth))
+    section_dict["azimuth"], section_dict["dip"] = azimuth, dip
+    section_dict["normal_x"], section_dict["normal_y"], section_dict["normal_z"] = dip_directions2normals(
+        dips=dip, directions=(azimuth + 90) % 360)
+    return collection.add_entity_from_dict(entity_dict=section_dict)
+
+
+# Testing the batched transforms between world and cross section coordinates
+class TestXSectionTransforms:
+
+    # U, V coordinates are the same as those calculated point by point with the dip and direction vectors
+    def test_world2plane_points(self):
+        parent = FakeXSectionWindow()
+        uid = add_section(parent.xsect_coll)
+        points = np.random.default_rng(0).random((50, 3)) * 1000.0 + [500000.0, 5000000.0, 0.0]
+        normal = np.array([parent.xsect_coll.get_uid_vtk_plane(uid).GetNormal()])
+        dip_vec, dir_vec = get_dip_dir_vectors(normal)
+        reference = np.array([[np.dot(dir_vec[0], point), -np.dot(dip_vec[0], point)] for point in points])
+
+        assert np.allclose(parent.xsect_coll.world2plane_points(section_uid=uid, points=points), reference)
+        uvw = parent.xsect_coll.world2plane_points(section_uid=uid, points=points, with_w=True)
+        assert uvw.shape == (50, 3)
+        assert np.allclose(uvw[:, 2], np.dot(points - [500000.0, 5000000.0, -100.0], normal[0]))
+
+    # points are transformed back to world coordinates, and points with W = 0 lie on the plane
+    def test_plane2world_points(self):
+        parent = FakeXSectionWindow()
+        uid = add_section(parent.xsect_coll)
+        points = np.random.default_rng(1).random((50, 3)) * 1000.0 + [500000.0, 5000000.0, 0.0]
+        uvw = parent.xsect_coll.world2plane_points(section_uid=uid, points=points, with_w=True)
+
+        assert np.allclose(parent.xsect_coll.plane2world_points(section_uid=uid, points=uvw), points)
+        X, Y, Z = parent.xsect_coll.plane2world(uid, uvw[:, 0], uvw[:, 1])
+        plane = parent.xsect_coll.get_uid_vtk_plane(uid)
+        assert np.allclose([plane.EvaluateFunction(point) for point in zip(X, Y, Z)], 0.0, atol=1e-6)
+
+    # the cached matrices are replaced when the geometry of the section is set again
+    def test_affine_matrices_cache(self):
+        parent = FakeXSectionWindow()
+        uid = add_section(parent.xsect_coll)
+        world2plane, _ = parent.xsect_coll.get_uid_affine_matrices(uid)
+
+        assert parent.xsect_coll.get_uid_affine_matrices(uid)[0] is world2plane
+
+        parent.xsect_coll.set_uid_normal_x(uid, 1.0)
+        parent.xsect_coll.set_uid_normal_y(uid, 0.0)
+        parent.xsect_coll.set_uid_normal_z(uid, 0.0)
+        parent.xsect_coll.set_geometry(uid=uid)
+
+        assert uid not in parent.xsect_coll.affine_matrices
+        assert np.allclose(parent.xsect_coll.get_uid_affine_matrices(uid)[0][2, :3], [1.0, 0.0, 0.0])
+        plane = vtkPlane()
+        plane.SetOrigin(0.0, 0.0, 0.0)
+        plane.SetNormal(0.0, 1.0, 0.0)
+        parent.xsect_coll.set_uid_vtk_plane(uid=uid, vtk_plane=plane)
+        assert np.allclose(parent.xsect_coll.get_uid_affine_matrices(uid)[0][2, :3], [0.0, 1.0, 0.0])
+        parent.xsect_coll.remove_entity(uid)
+        assert parent.xsect_coll.affine_matrices == {}
+
+    # entities in a cross section use the batched transform of the collection
+    def test_xs_entity_world2plane(self):
+        parent = FakeXSectionWindow()
+        uid = add_section(parent.xsect_coll)
+        xs_line = XsPolyLine(x_section_uid=uid, parent=parent)
+        uv = np.random.default_rng(2).random((20, 2)) * 100.0
+        xs_line.points = parent.xsect_coll.plane2world_points(section_uid=uid, points=uv)
+        u, v = xs_line.world2plane()
+
+        assert np.allclose(np.column_stack((u, v)), uv, atol=1e-3)
@@ -2,9 +2,12 @@ import pytest
 from pytest import raises
 
 from pzero.entities_factory import VertexSet, PolyLine, TriSurf, PolyData, XsVertexSet, XsPolyLine, TetraSolid, \
-    Voxet, XsVoxet, DEM, PCDom, TSDom, MapImage, Image3D, Well, WellMarker
+    Voxet, XsVoxet, DEM, PCDom, TSDom, MapImage, Image3D, Well, WellMarker, cells_to_vtk, \
+    derived_cache_stats
 
-from vtk import vtkTexture
+from vtk import vtkTexture, vtkFeatureEdges, vtkCleanPolyData, vtkStripper, vtkIdList, \
+    vtkPolyDataConnectivityFilter, vtkThresholdPoints
+from vtkmodules.util.numpy_support import vtk_to_numpy
 import numpy as np
 
 
@@ -624,3 +627,343 @@ class TestWellMarker:
 
         assert isinstance(deep_copy, WellMarker)
         assert isinstance(deep_copy2, WellMarker)
+
+
+# Build a TriSurf on a grid of nx * ny points, with random elevations, optionally removing
+# the triangles with center in a circular hole and in a strip that splits the surface in two parts
+def make_grid_trisurf(nx=20, ny=15, hole=False, split=False, seed=0):
+    rng = np.random.default_rng(seed)
+    x, y = np.meshgrid(np.arange(nx, dtype=float), np.arange(ny, dtype=float))
+    points = np.column_stack((x.ravel(), y.ravel(), rng.random(nx * ny)))
+    ids = np.arange(nx * ny).reshape(ny, nx)
+    corners = (ids[:-1, :-1].ravel(), ids[:-1, 1:].ravel(), ids[1:, 1:].ravel(), ids[1:, :-1].ravel())
+    triangles = np.vstack((np.column_stack((corners[0], corners[1], corners[2])),
+                           np.column_stack((corners[0], corners[2], corners[3]))))
+    centers = points[triangles].mean(axis=1)
+    keep = np.ones(len(triangles), dtype=bool)
+    if hole:
+        keep &= np.hypot(centers[:, 0] - nx / 4, centers[:, 1] - ny / 2) > min(nx, ny) / 6
+    if split:
+        keep &= np.abs(centers[:, 0] - nx * 3 / 4) > 1.0
+    trisurf = TriSurf()
+    trisurf.points = points
+    for triangle in triangles[keep]:
+        trisurf.append_cell(triangle)
+    return trisurf
+
+
+# Reference implementation of TriSurf.get_clean_boundary, assembling borders cell by cell
+def reference_clean_boundary(trisurf):
+    edges = vtkFeatureEdges()
+    edges.BoundaryEdgesOn()
+    edges.NonManifoldEdgesOff()
+    edges.FeatureEdgesOff()
+    edges.ManifoldEdgesOff()
+    edges.SetInputData(trisurf)
+    clean = vtkCleanPolyData()
+    clean.SetTolerance(0.0)
+    clean.SetInputConnection(edges.GetOutputPort())
+    strips = vtkStripper()
+    strips.JoinContiguousSegmentsOn()
+    strips.SetInputConnection(clean.GetOutputPort())
+    strips_clean = vtkCleanPolyData()
+    strips_clean.SetTolerance(0.0)
+    strips_clean.SetInputConnection(strips.GetOutputPort())
+    strips_clean.Update()
+    output = strips_clean.GetOutput()
+    polygons = []
+    for cell in range(output.GetNumberOfCells()):
+        cell_points = output.GetCell(cell).GetPoints()
+        if cell_points.GetNumberOfPoints() >= 3:
+            polygons.append(np.array([cell_points.GetPoint(i) for i in range(cell_points.GetNumberOfPoints())]))
+    return polygons
+
+
+# Reference implementation of TriSurf.boundary_dilation, looping over boundary points and their cells
+def reference_boundary_dilation(trisurf, tol=1.0):
+    surf = TriSurf()
+    surf.ShallowCopy(trisurf.clean_topology())
+    surf.BuildLinks()
+    points = np.array(surf.points)
+    displaced = points.copy()
+    for point_id in range(surf.GetNumberOfPoints()):
+        point_displ = np.zeros(3)
+        point_cells = vtkIdList()
+        surf.GetPointCells(point_id, point_cells)
+        for c_i in range(point_cells.GetNumberOfIds()):
+            cell_id = point_cells.GetId(c_i)
+            cell_points = vtkIdList()
+            surf.GetCellPoints(cell_id, cell_points)
+            trgl_ctr = np.mean([points[cell_points.GetId(i)] for i in range(3)], axis=0)
+            for e_i in range(3):
+                edge_point_id = cell_points.GetId(e_i)
+                if edge_point_id == point_id:
+                    continue
+                neighbors = vtkIdList()
+                surf.GetCellEdgeNeighbors(cell_id, point_id, edge_point_id, neighbors)
+                if neighbors.GetNumberOfIds() == 0:
+                    edge_vector = points[edge_point_id] - points[point_id]
+                    edge_vector /= np.linalg.norm(edge_vector)
+                    center2edge = (points[edge_point_id] + points[point_id]) / 2 - trgl_ctr
+                    center2edge /= np.linalg.norm(center2edge)
+                    normal = np.cross(edge_vector, center2edge)
+                    normal /= np.linalg.norm(normal)
+                    edge_displ = np.cross(normal, edge_vector)
+                    point_displ += edge_displ / np.linalg.norm(edge_displ)
+        if np.linalg.norm(point_displ) > 0:
+            displaced[point_id] += point_displ / np.linalg.norm(point_displ) * tol
+    return displaced
+
+
+# Testing the boundary methods of TriSurf against the reference implementations
+class TestTriSurfBoundary:
+
+    # borders are the same as those assembled cell by cell, also with holes and multiple parts
+    @pytest.mark.parametrize("hole,split", [(False, False), (True, False), (True, True)])
+    def test_get_clean_boundary(self, hole, split):
+        trisurf = make_grid_trisurf(hole=hole, split=split)
+        borders = trisurf.get_clean_boundary()
+        reference = reference_clean_boundary(trisurf)
+
+        assert borders.GetNumberOfCells() == len(reference) == 1 + hole + split
+        for cell, polygon in enumerate(reference):
+            cell_points = borders.GetCell(cell).GetPoints()
+            assert np.allclose([cell_points.GetPoint(i) for i in range(cell_points.GetNumberOfPoints())], polygon)
+
+    # boundary points are displaced as by the reference implementation, other points are not
+    @pytest.mark.parametrize("hole,split", [(False, False), (True, False), (True, True)])
+    def test_boundary_dilation(self, hole, split):
+        trisurf = make_grid_trisurf(hole=hole, split=split)
+        points = np.array(trisurf.points)
+        dilated = trisurf.boundary_dilation(tol=0.25)
+
+        assert isinstance(dilated, TriSurf)
+        assert dilated.GetNumberOfPolys() == trisurf.GetNumberOfPolys()
+        assert np.allclose(dilated.points, reference_boundary_dilation(trisurf, tol=0.25))
+        assert np.array_equal(trisurf.points, points)
+
+    # on a flat rectangle the boundary is moved outwards by tol
+    def test_boundary_dilation_flat(self):
+        trisurf = make_grid_trisurf(nx=5, ny=4)
+        trisurf.points = np.column_stack((trisurf.points[:, :2], np.zeros(20)))
+        dilated = trisurf.boundary_dilation(tol=0.5)
+
+        assert np.allclose(dilated.bounds, (-0.5, 4.5, -0.5, 3.5, 0.0, 0.0))
+        interior = trisurf.points[(trisurf.points_X % 4 != 0) & (trisurf.points_Y % 3 != 0)]
+        distances = np.linalg.norm(dilated.points[:, None, :] - interior[None, :, :], axis=2)
+        assert np.allclose(distances.min(axis=0), 0.0)
+
+
+# Connectivity matrix of the cells in a vtkCellArray, read cell by cell
+def cell_array_to_list(vtk_cells):
+    cells = []
+    point_ids = vtkIdList()
+    vtk_cells.InitTraversal()
+    while vtk_cells.GetNextCell(point_ids):
+        cells.append([point_ids.GetId(i) for i in range(point_ids.GetNumberOfIds())])
+    return cells
+
+
+# Testing the construction of cells at once with vtkCellArray.SetData
+class TestCellsToVtk:
+
+    # cells set with SetData are the same as those inserted one by one
+    @pytest.mark.parametrize("cell_size", [1, 2, 3, 4])
+    def test_cells_to_vtk(self, cell_size):
+        cells_matrix = np.random.default_rng(cell_size).integers(0, 100, (50, cell_size))
+        fast_cells = cells_to_vtk(cells_matrix=cells_matrix, set_data=True)
+        loop_cells = cells_to_vtk(cells_matrix=cells_matrix, set_data=False)
+
+        assert fast_cells.GetNumberOfCells() == 50
+        assert cell_array_to_list(fast_cells) == cell_array_to_list(loop_cells) == cells_matrix.tolist()
+        assert cells_to_vtk(cells_matrix=np.zeros((0, cell_size))).GetNumberOfCells() == 0
+
+    # auto_cells builds one vertex per point, or one line per pair of consecutive points
+    def test_auto_cells(self):
+        vertex_set = VertexSet()
+        vertex_set.points = np.random.default_rng(0).random((10, 3))
+        vertex_set.auto_cells()
+        poly_line = PolyLine()
+        poly_line.points = np.random.default_rng(1).random((10, 3))
+        poly_line.auto_cells()
+
+        assert cell_array_to_list(vertex_set.GetVerts()) == [[i] for i in range(10)]
+        assert poly_line.cells.tolist() == [[i, i + 1] for i in range(9)]
+        assert vertex_set.GetNumberOfCells() == 10
+
+    # the cells setter replaces all cells and keeps the points
+    def test_cells_setter(self):
+        tri_surf = TriSurf()
+        tri_surf.points = np.random.default_rng(2).random((6, 3))
+        tri_surf.cells = np.array([[0, 1, 2], [2, 3, 4]])
+        tri_surf.cells = np.array([[1, 2, 3], [3, 4, 5], [0, 4, 5]])
+        poly_line = PolyLine()
+        poly_line.points = tri_surf.points
+        poly_line.cells = np.array([[0, 1], [4, 5]])
+
+        assert tri_surf.cells.tolist() == [[1, 2, 3], [3, 4, 5], [0, 4, 5]]
+        assert tri_surf.points_number == 6
+        assert poly_line.cells.tolist() == [[0, 1], [4, 5]]
+        assert poly_line.GetNumberOfPolys() == 0
+
+    # an empty connectivity matrix removes all cells and keeps the points
+    @pytest.mark.parametrize("empty", [np.zeros((0, 3), dtype=int), []])
+    def test_cells_setter_empty(self, empty):
+        tri_surf = TriSurf()
+        tri_surf.points = np.random.default_rng(3).random((6, 3))
+        tri_surf.cells = np.array([[0, 1, 2], [2, 3, 4]])
+        tri_surf.cells = empty
+
+        assert tri_surf.GetNumberOfCells() == 0
+        assert tri_surf.points_number == 6
+
+
+# Triangulated surface with Normals and Lineations point data, used to test the derived data cache
+def make_oriented_trisurf(n_points=12, seed=0):
+    rng = np.random.default_rng(seed)
+    trisurf = TriSurf()
+    trisurf.points = rng.random((n_points, 3))
+    trisurf.cells = rng.integers(0, n_points, (n_points, 3))
+    for data_key in ["Normals", "Lineations"]:
+        vectors = rng.normal(size=(n_points, 3))
+        vectors[:, 2] = -np.abs(vectors[:, 2])
+        trisurf.init_point_data(data_key, 3)
+        trisurf.set_point_data(data_key, vectors / np.linalg.norm(vectors, axis=1)[:, None])
+    return trisurf
+
+
+# Testing the cache of derived arrays of PolyData, keyed on the VTK modification time
+class TestDerivedCache:
+
+    # the second access is a cache hit returning the same read-only array
+    def test_cache_hit(self):
+        trisurf = make_oriented_trisurf()
+        hits, misses = derived_cache_stats["hits"], derived_cache_stats["misses"]
+        dip = trisurf.points_map_dip
+        trisurf.points_map_dip_azimuth, trisurf.points_map_trend, trisurf.points_map_plunge
+
+        assert trisurf.points_map_dip is dip
+        assert derived_cache_stats["misses"] - misses == 4
+        assert derived_cache_stats["hits"] - hits == 1
+        with pytest.raises(ValueError):
+            dip[0] = 0.0
+
+    # the cached values are recomputed when points, point data or cells change
+    def test_cache_invalidation(self):
+        trisurf = make_oriented_trisurf()
+        centers = trisurf.cell_centers
+        dip = trisurf.points_map_dip
+
+        trisurf.points = trisurf.points + 1.0
+        assert np.allclose(trisurf.cell_centers, centers + 1.0)
+
+        trisurf.edit_point_data("Normals", 0, np.array([0.0, 0.0, -1.0]))
+        assert trisurf.points_map_dip[0] == 0.0
+        assert np.allclose(trisurf.points_map_dip[1:], dip[1:])
+
+        trisurf.set_point_data("Normals", np.tile([0.0, -0.6, -0.8], (12, 1)))
+        assert np.allclose(trisurf.points_map_dip, 90 - np.arcsin(0.8) * 180 / np.pi)
+        assert np.allclose(trisurf.points_map_dip_azimuth, 0.0)
+
+        trisurf.cells = np.array([[0, 1, 2]])
+        assert trisurf.cell_centers.shape == (1, 3)
+
+    # cell centers of triangles are their centroids, also for entities without cells
+    def test_cell_centers(self):
+        trisurf = make_oriented_trisurf()
+
+        assert np.allclose(trisurf.cell_centers, trisurf.points[trisurf.cells].mean(axis=1))
+        assert PolyLine().cell_centers.shape == (0, 3)
+
+
+# Reference implementation of split_parts for PolyLine and TriSurf, extracting one region at a time
+def reference_split_parts(entity):
+    connectivity_filter = vtkPolyDataConnectivityFilter()
+    connectivity_filter.SetInputData(entity)
+    connectivity_filter.SetExtractionModeToAllRegions()
+    connectivity_filter.ColorRegionsOn()
+    connectivity_filter.Update()
+    connectivity_filter.SetExtractionModeToSpecifiedRegions()
+    parts = []
+    for rid in range(connectivity_filter.GetNumberOfExtractedRegions()):
+        connectivity_filter.InitializeSpecifiedRegionList()
+        connectivity_filter.AddSpecifiedRegion(rid)
+        connectivity_filter.Update()
+        cleaner = vtkCleanPolyData()
+        cleaner.SetInputConnection(connectivity_filter.GetOutputPort())
+        cleaner.Update()
+        part = type(entity)()
+        part.DeepCopy(cleaner.GetOutput())
+        parts.append(part)
+    return parts
+
+
+# Reference implementation of PCDom.split_parts, with a threshold filter for each cluster
+def reference_split_clusters(pc_dom):
+    parts = []
+    for rid in sorted(set(pc_dom.get_point_data("ClusterId"))):
+        thresh = vtkThresholdPoints()
+        thresh.SetInputData(pc_dom)
+        thresh.ThresholdBetween(rid, rid)
+        thresh.Update()
+        part = PCDom()
+        part.DeepCopy(thresh.GetOutput())
+        part.generate_cells()
+        parts.append(part)
+    return parts
+
+
+# Assert that two lists of parts have the same points, cells and point data
+def assert_same_parts(parts, reference):
+    assert len(parts) == len(reference)
+    for part, reference_part in zip(parts, reference):
+        assert type(part) == type(reference_part)
+        assert np.allclose(part.points, reference_part.points)
+        for get_cells in ["GetVerts", "GetLines", "GetPolys"]:
+            assert cell_array_to_list(getattr(part, get_cells)()) == cell_array_to_list(
+                getattr(reference_part, get_cells)())
+        assert sorted(part.point_data_keys) == sorted(reference_part.point_data_keys)
+        for data_key in reference_part.point_data_keys:
+            assert np.allclose(vtk_to_numpy(part.GetPointData().GetArray(data_key)),
+                               vtk_to_numpy(reference_part.GetPointData().GetArray(data_key)))
+
+
+# Testing the single-pass split_parts against the reference implementations
+class TestSplitParts:
+
+    # parts of a triangulated surface, with point data, split by a strip and with triangles in random order
+    def test_split_trisurf(self):
+        trisurf = make_grid_trisurf(nx=30, ny=12, hole=True, split=True)
+        trisurf.init_point_data("elevation", 1)
+        trisurf.set_point_data("elevation", trisurf.points_Z)
+        shuffled = TriSurf()
+        shuffled.points = trisurf.points
+        shuffled.cells = trisurf.cells[np.random.default_rng(0).permutation(trisurf.cells_number)]
+
+        assert len(trisurf.split_parts()) == 2
+        assert_same_parts(trisurf.split_parts(), reference_split_parts(trisurf))
+        assert_same_parts(shuffled.split_parts(), reference_split_parts(shuffled))
+
+    # many separate parts of a polyline
+    def test_split_polyline(self):
+        poly_line = PolyLine()
+        poly_line.points = np.random.default_rng(1).random((200, 3))
+        poly_line.cells = np.array([[i, i + 1] for i in range(199) if i % 7 != 6])
+        parts = poly_line.split_parts()
+
+        assert len(parts) == 29
+        assert all(isinstance(part, PolyLine) for part in parts)
+        assert_same_parts(parts, reference_split_parts(poly_line))
+
+    # clusters of a point cloud
+    def test_split_pc_dom(self):
+        rng = np.random.default_rng(2)
+        pc_dom = PCDom()
+        pc_dom.points = rng.random((500, 3))
+        pc_dom.generate_cells()
+        pc_dom.init_point_data("ClusterId", 1)
+        pc_dom.set_point_data("ClusterId", rng.integers(0, 12, 500).astype(float))
+        pc_dom.init_point_data("intensity", 1)
+        pc_dom.set_point_data("intensity", rng.random(500))
+
+        assert_same_parts(pc_dom.split_parts(), reference_split_clusters(pc_dom))
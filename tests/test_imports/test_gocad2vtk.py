@@ -0,0 +1,271 @@
+from copy import deepcopy
+
+import numpy as np
+import pytest
+
+from pzero.collections.geological_collection import GeologicalCollection
+from pzero.entities_factory import PolyLine, TriSurf, VertexSet, XsPolyLine
+from pzero.imports import gocad2vtk as g2v
+from pzero.imports.gocad2vtk import (
+    gocad_block,
+    gocad_line_index,
+    gocad_vtk_obj,
+    read_gocad,
+    vtk2gocad,
+    write_gocad,
+)
+from tests.test_collections.test_geological_collection import FakeLegendWindow
+
+# Three objects in a single file: a VSet with a scalar and a vector property, a PLine with a
+# CNXYZ flag at the end of a vertex line, and a TSurf with an ATOM and a property of a size not imported
+gocad_text = """GOCAD VSet 1
+HEADER {
+name: wells
+*solid*color: 1 0 0.5 1
+}
+GEOLOGICAL_TYPE Horizon
+PROPERTIES depth dir
+ESIZES 1 3
+PVRTX 1 500000.5 5000000.25 100 -1.5 1 0 0
+PVRTX 2 500001.5 5000001.25 101 -2.5 0 1 0
+PVRTX 3 500002.5 5000002.25 102 -3.5 0 0 1
+END
+GOCAD PLine 1
+HEADER {
+name:trace
+}
+GEOLOGICAL_FEATURE fault_A
+ILINE
+VRTX 1 0 0 0
+VRTX 2 1 0 0 CNXYZ
+VRTX 3 2 1 0
+
+SEG 1 2
+SEG 2 3
+END
+GOCAD TSurf 1
+HEADER {
+name: surface
+}
+PROPERTIES tensor a
+ESIZES 5 1
+TFACE
+PVRTX 1 0 0 0 1 2 3 4 5 10
+PVRTX 2 1 0 0 1 2 3 4 5 20
+PVRTX 3 0 1 0 1 2 3 4 5 30
+ATOM 4 2
+PVRTX 5 1 1 1 1 2 3 4 5 50
+TRGL 1 2 3
+TRGL 3 4 5
+END
+"""
+
+
+def write_text(path, text, newline="\n"):
+    path.write_bytes(text.replace("\n", newline).encode())
+    return str(path)
+
+
+# Class for testing the bulk GOCAD ASCII parser
+class TestReadGocad:
+
+    # data lines are recognized by their keyword followed by a space or a tab only
+    def test_line_index(self):
+        data = b"VRTX 1 0 0 0\nPVRTX\t2 0 0 0\nVRTXX 3\nSEG 1 2\nTRGL 1 2 3"
+        buffer = np.frombuffer(data, dtype=np.uint8)
+        starts, ends, kinds = gocad_line_index(buffer=buffer)
+
+        assert kinds.tolist() == [0, 1, -1, 3, 4]
+        assert ends[-1] == len(data)
+        assert data[starts[1] : ends[1]] == b"PVRTX\t2 0 0 0"
+
+    # blocks with extra tokens are rejected, so that they are parsed line by line
+    def test_block(self):
+        data = b"VRTX 1 0 0 0\nVRTX 2 1 0 0 CNXYZ\n"
+        buffer = np.frombuffer(data, dtype=np.uint8)
+        starts, ends, _ = gocad_line_index(buffer=buffer)
+
+        block = gocad_block(
+            buffer=buffer, starts=starts[:1], ends=ends[:1], skip=4, n_columns=4
+        )
+        assert block.tolist() == [[1, 0, 0, 0]]
+        assert (
+            gocad_block(
+                buffer=buffer, starts=starts[:2], ends=ends[:2], skip=4, n_columns=4
+            )
+            is None
+        )
+
+    # all the objects of a multi-object file are read, also with Windows line endings
+    @pytest.mark.parametrize("newline", ["\n", "\r\n"])
+    def test_read_gocad(self, tmp_path, newline):
+        gocad_objects = read_gocad(
+            in_file_name=write_text(tmp_path / "multi.ts", gocad_text, newline)
+        )
+        v_set, p_line, t_surf = gocad_objects
+
+        assert [o["type"] for o in gocad_objects] == ["VSet", "PLine", "TSurf"]
+        assert [o["name"] for o in gocad_objects] == ["wells", "trace", "surface"]
+        assert v_set["color"] == (255.0, 0.0, 128.0)
+        assert v_set["geological_type"] == "Horizon"
+        assert p_line["geological_feature"] == "fault_A"
+        assert v_set["properties_names"] == ["depth", "dir"]
+        assert v_set["properties_components"] == [1, 3]
+        assert v_set["points"][1].tolist() == [500001.5, 5000001.25, 101]
+        assert v_set["properties"][0].dtype == np.float32
+        assert v_set["properties"][0].tolist() == [-1.5, -2.5, -3.5]
+        assert np.array_equal(v_set["properties"][1], np.eye(3))
+        assert p_line["points"].tolist() == [[0, 0, 0], [1, 0, 0], [2, 1, 0]]
+        assert p_line["segments"].tolist() == [[0, 1], [1, 2]]
+        assert p_line["properties"] == []
+        assert t_surf["points"][3].tolist() == [1, 0, 0]
+        assert t_surf["triangles"].tolist() == [[0, 1, 2], [2, 3, 4]]
+        assert t_surf["properties_names"] == ["a"]
+        assert t_surf["properties"][0].tolist() == [10, 20, 30, 20, 50]
+
+    # points, cells and properties are set on each entity type
+    def test_gocad_vtk_obj(self, tmp_path):
+        v_set, p_line, t_surf = read_gocad(
+            in_file_name=write_text(tmp_path / "multi.ts", gocad_text)
+        )
+        vertex_set, poly_line, tri_surf = VertexSet(), PolyLine(), TriSurf()
+        gocad_vtk_obj(gocad_object=v_set, vtk_obj=vertex_set)
+        gocad_vtk_obj(gocad_object=p_line, vtk_obj=poly_line)
+        gocad_vtk_obj(gocad_object=t_surf, vtk_obj=tri_surf, properties=False)
+
+        assert vertex_set.points_number == vertex_set.cells_number == 3
+        assert np.allclose(vertex_set.get_point_data("dir"), np.eye(3))
+        assert poly_line.cells.tolist() == [[0, 1], [1, 2]]
+        assert tri_surf.cells.tolist() == [[0, 1, 2], [2, 3, 4]]
+        assert tri_surf.GetPointData().GetNumberOfArrays() == 0
+
+
+# Objects with UTM-like coordinates, scalar, vector and NaN property values, and no vertices
+def make_gocad_objects(seed=0):
+    rng = np.random.default_rng(seed)
+    points = rng.uniform(0, 1000, (50, 3)) + [500000.0, 5000000.0, 0.0]
+    values = rng.normal(size=50).astype(np.float32)
+    values[7] = np.nan
+    return [
+        {
+            "type": "VSet",
+            "name": "points",
+            "color": (255.0, 0.0, 128.0),
+            "geological_type": "top",
+            "geological_feature": "top_A",
+            "properties_names": ["value", "vector"],
+            "properties_components": [1, 3],
+            "points": points,
+            "properties": [values, rng.normal(size=(50, 3)).astype(np.float32)],
+        },
+        {
+            "type": "PLine",
+            "name": "line",
+            "properties_names": [],
+            "properties_components": [],
+            "points": points[:10],
+            "properties": [],
+            "segments": np.column_stack([np.arange(9), np.arange(1, 10)]),
+        },
+        {
+            "type": "TSurf",
+            "name": "empty",
+            "properties_names": [],
+            "properties_components": [],
+            "points": np.zeros((0, 3)),
+            "properties": [],
+            "triangles": np.zeros((0, 3), dtype=np.int64),
+        },
+        {
+            "type": "TSurf",
+            "name": "surface",
+            "properties_names": ["value"],
+            "properties_components": [1],
+            "points": points,
+            "properties": [values],
+            "triangles": rng.integers(0, 50, (80, 3)),
+        },
+    ]
+
+
+def assert_same_objects(read_objects, gocad_objects):
+    assert len(read_objects) == len(gocad_objects)
+    for read_object, gocad_object in zip(read_objects, gocad_objects):
+        assert read_object["type"] == gocad_object["type"]
+        assert read_object["name"] == gocad_object["name"]
+        for key in ["color", "geological_type", "geological_feature"]:
+            assert read_object[key] == gocad_object.get(key)
+        assert read_object["properties_names"] == gocad_object["properties_names"]
+        assert (
+            read_object["properties_components"]
+            == gocad_object["properties_components"]
+        )
+        assert np.array_equal(read_object["points"], gocad_object["points"])
+        for read_values, values in zip(
+            read_object["properties"], gocad_object["properties"]
+        ):
+            assert np.array_equal(read_values, values, equal_nan=True)
+        for key in ["segments", "triangles"]:
+            if key in gocad_object:
+                assert np.array_equal(read_object[key], gocad_object[key])
+
+
+# Class for testing the GOCAD ASCII writer with import-export round trips
+class TestWriteGocad:
+
+    # geometry, properties and metadata are read back exactly, also when blocks are written in chunks
+    @pytest.mark.parametrize("chunk_lines", [100000, 7])
+    def test_round_trip(self, tmp_path, monkeypatch, chunk_lines):
+        monkeypatch.setattr(g2v, "gocad_chunk_lines", chunk_lines)
+        gocad_objects = make_gocad_objects()
+        path = str(tmp_path / "round_trip.ts")
+        write_gocad(out_file_name=path, gocad_objects=iter(gocad_objects))
+
+        assert_same_objects(read_gocad(in_file_name=path), gocad_objects)
+
+    # a file written again from the objects read is identical
+    def test_rewrite(self, tmp_path):
+        path_1, path_2 = str(tmp_path / "first.ts"), str(tmp_path / "second.ts")
+        write_gocad(out_file_name=path_1, gocad_objects=make_gocad_objects())
+        write_gocad(out_file_name=path_2, gocad_objects=read_gocad(path_1))
+
+        with open(path_1) as file_1, open(path_2) as file_2:
+            assert file_1.read() == file_2.read()
+
+    # all the entities of the geological collection are exported with their legend and properties
+    def test_vtk2gocad(self, tmp_path):
+        parent = FakeLegendWindow()
+        parent.geol_coll = GeologicalCollection(parent=parent)
+        v_set, p_line, _, t_surf = make_gocad_objects()
+        entity_dicts = []
+        for gocad_object, vtk_obj, topological_type in [
+            (v_set, VertexSet(), "VertexSet"),
+            (p_line, XsPolyLine(x_section_uid="xs", parent=parent), "XsPolyLine"),
+            (t_surf, TriSurf(), "TriSurf"),
+        ]:
+            gocad_vtk_obj(gocad_object=gocad_object, vtk_obj=vtk_obj)
+            entity_dict = deepcopy(GeologicalCollection.geological_entity_dict)
+            entity_dict["uid"] = gocad_object["name"]
+            entity_dict["topological_type"] = topological_type
+            entity_dict["geological_type"] = "fault"
+            entity_dict["geological_feature"] = "feature_" + gocad_object["name"]
+            entity_dict["properties_names"] = gocad_object["properties_names"]
+            entity_dict["properties_components"] = gocad_object["properties_components"]
+            entity_dict["vtk_obj"] = vtk_obj
+            entity_dicts.append(entity_dict)
+            gocad_object["geological_type"] = "fault"
+            gocad_object["geological_feature"] = "feature_" + gocad_object["name"]
+        parent.geol_coll.add_entities_from_dicts(entity_dicts=entity_dicts)
+        parent.geol_coll.set_uid_legend(
+            uid="points", color_R=255.0, color_G=0.0, color_B=128.0
+        )
+        path = str(tmp_path / "export.ts")
+        vtk2gocad(self=parent, out_file_name=path)
+        read_objects = read_gocad(in_file_name=path)
+
+        assert read_objects[0]["color"] == (255.0, 0.0, 128.0)
+        for read_object, gocad_object in zip(read_objects, [v_set, p_line, t_surf]):
+            read_object["color"] = gocad_object.get("color")
+        assert_same_objects(read_objects, [v_set, p_line, t_surf])
+        with open(path) as fin:
+            assert "STRATIGRAPHIC_POSITION undef 0.0\n" in fin.read()
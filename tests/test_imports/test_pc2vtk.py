@@ -0,0 +1,339 @@
+import numpy as np
+import pytest
+from numpy import float32 as np_float32
+from pandas import DataFrame as pd_DataFrame
+from vtk import vtkPLYWriter
+
+from pzero.imports.pc2vtk import (
+    pc_capacity,
+    pc_file2vtk,
+    ply2df,
+    ply_column_names,
+    read_ply_header,
+)
+from tests.test_entities_factory import make_grid_trisurf
+
+col_names = ["X", "Y", "Z", "Red", "Green", "Blue", "Nx", "Ny", "Nz", "intensity"]
+
+
+def make_pc_values(n=1000, seed=0):
+    rng = np.random.default_rng(seed)
+    xyz = np.column_stack(
+        [
+            rng.uniform(512300.0, 512500.0, n),
+            rng.uniform(4987600.0, 4987800.0, n),
+            rng.uniform(200.0, 300.0, n),
+        ]
+    )
+    rgb = rng.integers(0, 256, (n, 3)).astype(float)
+    normals = rng.normal(size=(n, 3))
+    intensity = rng.uniform(0.0, 1.0, n)
+    return np.column_stack([xyz, rgb, normals, intensity])
+
+
+def write_csv(path, values):
+    pd_DataFrame(values, columns=col_names).to_csv(path, index=False)
+    return str(path)
+
+
+ply_vertex_properties = [
+    ("x", "f8"),
+    ("y", "f8"),
+    ("z", "f8"),
+    ("red", "u1"),
+    ("green", "u1"),
+    ("blue", "u1"),
+    ("nx", "f4"),
+    ("ny", "f4"),
+    ("nz", "f4"),
+    ("scalar_intensity", "f4"),
+]
+
+ply_type_names = {"f8": "double", "f4": "float", "u1": "uchar"}
+
+
+def write_ply(path, values, file_format):
+    """PLY file with the vertices in values, followed by a face element with list properties."""
+    byte_order = {"binary_little_endian": "<", "binary_big_endian": ">"}.get(
+        file_format, "="
+    )
+    vertices = np.empty(
+        values.shape[0],
+        dtype=[(name, byte_order + code) for name, code in ply_vertex_properties],
+    )
+    for i, (name, _) in enumerate(ply_vertex_properties):
+        vertices[name] = values[:, i]
+    faces = np.array([[0, 1, 2], [1, 2, 3]])
+    header = [
+        "ply",
+        f"format {file_format} 1.0",
+        "comment written by test_pc2vtk",
+        f"element vertex {values.shape[0]}",
+    ]
+    header += [
+        f"property {ply_type_names[code]} {name}"
+        for name, code in ply_vertex_properties
+    ]
+    header += [
+        f"element face {faces.shape[0]}",
+        "property list uchar int vertex_indices",
+        "end_header",
+    ]
+    with open(path, "wb") as f:
+        f.write(("\n".join(header) + "\n").encode("ascii"))
+        if file_format == "ascii":
+            for vertex in vertices.tolist():
+                f.write((" ".join(str(v) for v in vertex) + "\n").encode("ascii"))
+            for face in faces:
+                f.write(("3 " + " ".join(str(i) for i in face) + "\n").encode("ascii"))
+        else:
+            vertices.tofile(f)
+            for face in faces:
+                f.write(np.uint8(3).tobytes())
+                f.write(face.astype(byte_order + "i4").tobytes())
+    return str(path)
+
+
+def make_ply_values(n=1000, seed=0):
+    """Values of make_pc_values, with RGB and normals as stored in the PLY file."""
+    values = make_pc_values(n=n, seed=seed)
+    values[:, 6:10] = values[:, 6:10].astype(np.float32)
+    return values
+
+
+def read_csv_file(in_file_name, row_range=range(0, 0), **kwargs):
+    return pc_file2vtk(
+        in_file_name=in_file_name,
+        col_names=col_names,
+        row_range=row_range,
+        header_row=0,
+        usecols=list(range(len(col_names))),
+        delimiter=",",
+        **kwargs,
+    )
+
+
+# Class for testing the chunked point cloud import
+class TestPcFile2Vtk:
+
+    # points are offset by the XY of the first point rounded to the hundreds
+    def test_points_offset(self, tmp_path):
+        values = make_pc_values()
+        point_cloud = read_csv_file(write_csv(tmp_path / "pc.csv", values))
+        offset = np.round(values[0, :2], -2)
+
+        assert point_cloud.GetNumberOfPoints() == values.shape[0]
+        assert point_cloud.GetNumberOfCells() == values.shape[0]
+        assert np.allclose(point_cloud.points[:, :2], values[:, :2] - offset)
+        assert np.allclose(point_cloud.points[:, 2], values[:, 2])
+
+    # reading in chunks, also smaller than the file, gives the same point cloud as a single chunk
+    @pytest.mark.parametrize("chunk_size", [1, 7, 333, 999])
+    def test_chunks(self, tmp_path, chunk_size):
+        in_file_name = write_csv(tmp_path / "pc.csv", make_pc_values())
+        reference = read_csv_file(in_file_name, chunk_size=10000)
+        point_cloud = read_csv_file(in_file_name, chunk_size=chunk_size)
+
+        assert np.array_equal(point_cloud.points, reference.points)
+        assert point_cloud.point_data_keys == reference.point_data_keys
+        for key in reference.point_data_keys:
+            assert np.array_equal(
+                point_cloud.get_point_data(key), reference.get_point_data(key)
+            )
+
+    # a property with integer values in the first chunks keeps the decimals of later chunks
+    @pytest.mark.parametrize("chunk_size", [10, 1000])
+    def test_chunk_dtypes(self, tmp_path, chunk_size):
+        values = make_pc_values(n=20)
+        values[:10, 9] = np.arange(10)
+        values[10:, 9] = np.arange(10) + 0.75
+        pc_df = pd_DataFrame(values, columns=col_names)
+        # written as text, since a list with integers and floats is converted to float
+        pc_df["intensity"] = [f"{value:g}" for value in values[:, 9]]
+        pc_df.to_csv(tmp_path / "pc.csv", index=False)
+        point_cloud = read_csv_file(str(tmp_path / "pc.csv"), chunk_size=chunk_size)
+
+        assert np.array_equal(point_cloud.get_point_data("intensity"), values[:, 9])
+
+    # Red, Green, Blue and Nx, Ny, Nz are combined in vector properties, normals point downwards
+    def test_vector_properties(self, tmp_path):
+        values = make_pc_values()
+        in_file_name = write_csv(tmp_path / "pc.csv", values)
+        point_cloud = read_csv_file(in_file_name, chunk_size=100)
+        point_cloud_255 = read_csv_file(in_file_name, chunk_size=100, rgb_255=True)
+        normals = values[:, 6:9] * np.where(values[:, 8:9] > 0, -1, 1)
+
+        assert point_cloud.point_data_keys == ["RGB", "Normals", "intensity"]
+        assert np.allclose(point_cloud.get_point_data("RGB"), values[:, 3:6])
+        assert point_cloud_255.get_point_data("RGB").dtype == np.uint8
+        assert np.array_equal(point_cloud_255.get_point_data("RGB"), values[:, 3:6])
+        assert np.allclose(point_cloud.get_point_data("Normals"), normals)
+        assert np.allclose(point_cloud.get_point_data("intensity"), values[:, 9])
+
+    # only the rows in the row range are imported, with a preallocated buffer
+    def test_row_range(self, tmp_path):
+        values = make_pc_values()
+        in_file_name = write_csv(tmp_path / "pc.csv", values)
+        point_cloud = read_csv_file(
+            in_file_name, row_range=range(1, 501), chunk_size=64
+        )
+
+        assert pc_capacity(in_file_name=in_file_name, row_range=range(1, 501)) == 500
+        assert pc_capacity(in_file_name=in_file_name, row_range=range(0, 0)) is None
+        assert point_cloud.GetNumberOfPoints() == 500
+        assert np.allclose(point_cloud.get_point_data("intensity"), values[:500, 9])
+
+    # points can be stored in single precision
+    def test_points_dtype(self, tmp_path):
+        values = make_pc_values()
+        in_file_name = write_csv(tmp_path / "pc.csv", values)
+        reference = read_csv_file(in_file_name)
+        point_cloud = read_csv_file(in_file_name, points_dtype=np_float32)
+
+        assert point_cloud.points.dtype == np_float32
+        assert np.allclose(point_cloud.points, reference.points, atol=1e-4)
+
+    # values that are not numbers are not imported
+    def test_invalid_values(self, tmp_path):
+        in_file_name = tmp_path / "pc.csv"
+        write_csv(in_file_name, make_pc_values(n=10))
+        with open(in_file_name, "a") as f:
+            f.write("a,b,c,1,2,3,4,5,6,7\n")
+
+        assert read_csv_file(str(in_file_name), chunk_size=4) is None
+
+    # LAS files are read with the chunk iterator of laspy
+    @pytest.mark.parametrize("chunk_size", [100, 10000])
+    def test_las(self, tmp_path, chunk_size):
+        laspy = pytest.importorskip("laspy")
+        values = make_pc_values()
+        header = laspy.LasHeader(point_format=2, version="1.2")
+        header.scales = [0.001, 0.001, 0.001]
+        header.offsets = [512000.0, 4987000.0, 0.0]
+        las = laspy.LasData(header)
+        las.x, las.y, las.z = values[:, 0], values[:, 1], values[:, 2]
+        las.red = values[:, 3].astype(np.uint16)
+        in_file_name = str(tmp_path / "pc.las")
+        las.write(in_file_name)
+        point_cloud = pc_file2vtk(
+            in_file_name=in_file_name,
+            col_names=["X", "Y", "Z", "Red"],
+            row_range=range(100, 400),
+            header_row=0,
+            usecols=[0, 1, 2, 15],
+            delimiter=None,
+            chunk_size=chunk_size,
+        )
+        offset = np.round(values[100, :2], -2)
+
+        assert point_cloud.GetNumberOfPoints() == 300
+        assert np.allclose(
+            point_cloud.points[:, :2], values[100:400, :2] - offset, atol=1e-3
+        )
+        assert np.array_equal(point_cloud.get_point_data("Red"), values[100:400, 3])
+
+
+# Class for testing the header-aware PLY reader
+class TestPly:
+
+    # the header is parsed into format, elements and property types
+    def test_read_header(self, tmp_path):
+        in_file_name = write_ply(
+            tmp_path / "pc.ply", make_ply_values(n=10), "binary_big_endian"
+        )
+        header = read_ply_header(in_file_name)
+
+        assert header["format"] == "binary_big_endian"
+        assert [(e["name"], e["count"]) for e in header["elements"]] == [
+            ("vertex", 10),
+            ("face", 2),
+        ]
+        assert header["elements"][0]["properties"] == ply_vertex_properties
+        assert header["elements"][1]["properties"] == [("vertex_indices", None)]
+        assert ply_column_names(header) == [
+            "X",
+            "Y",
+            "Z",
+            "Red",
+            "Green",
+            "Blue",
+            "Nx",
+            "Ny",
+            "Nz",
+            "Intensity",
+        ]
+
+    # ASCII, little and big endian files give the same point cloud
+    @pytest.mark.parametrize(
+        "file_format", ["ascii", "binary_little_endian", "binary_big_endian"]
+    )
+    @pytest.mark.parametrize("chunk_size", [64, 10000])
+    def test_round_trip(self, tmp_path, file_format, chunk_size):
+        values = make_ply_values()
+        in_file_name = write_ply(tmp_path / "pc.ply", values, file_format)
+        col_names = ply_column_names(read_ply_header(in_file_name))
+        point_cloud = pc_file2vtk(
+            in_file_name=in_file_name,
+            col_names=col_names,
+            row_range=range(0, 0),
+            header_row=0,
+            usecols=list(range(len(col_names))),
+            delimiter=None,
+            rgb_255=True,
+            chunk_size=chunk_size,
+        )
+        offset = np.round(values[0, :2], -2)
+        normals = values[:, 6:9] * np.where(values[:, 8:9] > 0, -1, 1)
+
+        assert point_cloud.GetNumberOfPoints() == values.shape[0]
+        assert np.allclose(point_cloud.points[:, :2], values[:, :2] - offset)
+        assert np.allclose(point_cloud.points[:, 2], values[:, 2])
+        assert point_cloud.point_data_keys == ["RGB", "Normals", "Intensity"]
+        assert np.array_equal(point_cloud.get_point_data("RGB"), values[:, 3:6])
+        assert np.allclose(point_cloud.get_point_data("Normals"), normals)
+        assert np.allclose(point_cloud.get_point_data("Intensity"), values[:, 9])
+
+    # the preview reads the first rows, and a row range selects vertices and columns
+    @pytest.mark.parametrize(
+        "file_format", ["ascii", "binary_little_endian", "binary_big_endian"]
+    )
+    def test_preview_and_row_range(self, tmp_path, file_format):
+        values = make_ply_values()
+        in_file_name = write_ply(tmp_path / "pc.ply", values, file_format)
+        preview_df = ply2df(in_file_name=in_file_name, n_rows=50)
+        point_cloud = pc_file2vtk(
+            in_file_name=in_file_name,
+            col_names=["X", "Y", "Z", "user_i"],
+            row_range=range(100, 300),
+            header_row=0,
+            usecols=[0, 1, 2, 9],
+            delimiter=None,
+            chunk_size=64,
+        )
+
+        assert list(preview_df.columns) == ply_column_names(
+            read_ply_header(in_file_name)
+        )
+        assert np.allclose(preview_df.values, values[:50])
+        assert pc_capacity(in_file_name=in_file_name, row_range=range(100, 300)) == 200
+        assert pc_capacity(in_file_name=in_file_name, row_range=range(0, 0)) == 1000
+        assert point_cloud.GetNumberOfPoints() == 200
+        assert point_cloud.point_data_keys == ["user_i"]
+        assert np.allclose(point_cloud.get_point_data("user_i"), values[100:300, 9])
+
+    # files written by vtkPLYWriter, with vertices and faces, are read
+    @pytest.mark.parametrize("little_endian", [True, False])
+    def test_vtk_ply_writer(self, tmp_path, little_endian):
+        surface = make_grid_trisurf(nx=10, ny=8)
+        writer = vtkPLYWriter()
+        writer.SetFileName(str(tmp_path / "surface.ply"))
+        writer.SetInputData(surface)
+        writer.SetFileTypeToBinary()
+        if little_endian:
+            writer.SetDataByteOrderToLittleEndian()
+        else:
+            writer.SetDataByteOrderToBigEndian()
+        writer.Write()
+        preview_df = ply2df(in_file_name=str(tmp_path / "surface.ply"))
+
+        assert np.allclose(preview_df[["X", "Y", "Z"]].values, surface.points)
@@ -0,0 +1,276 @@
+import os
+from copy import deepcopy
+
+import numpy as np
+from pandas import DataFrame as pd_DataFrame
+from vtk import vtkCamera
+from vtkmodules.util.numpy_support import numpy_to_vtk
+
+from pzero.collections.dom_collection import DomCollection
+from pzero.entities_factory import PCDom
+from pzero.lod_octree import LodOctree, build_lod_nodes, morton_keys
+from pzero.project_io import (
+    LazyVtkObj,
+    VtkObjCache,
+    collect_garbage,
+    lod_dir_name,
+    object_file_name,
+    objects_dir_name,
+    revision_dir_names,
+    store_vtk_entities,
+    write_manifest,
+)
+from pzero.project_window import ProjectWindow
+
+
+# Build a point cloud on a wavy surface, with a scalar and a vector property
+def make_pc_dom(n=20000, seed=0):
+    rng = np.random.default_rng(seed)
+    xy = rng.uniform(0, 100, (n, 2))
+    points = np.column_stack([xy, 5 * np.sin(xy[:, 0] / 10)])
+    pc_dom = PCDom()
+    pc_dom.points = points
+    pc_dom.generate_cells()
+    for name, values in [
+        ("Intensity", rng.uniform(0, 1, n).astype(np.float32)),
+        ("RGB", rng.integers(0, 255, (n, 3)).astype(np.uint8)),
+    ]:
+        vtk_array = numpy_to_vtk(values, deep=True)
+        vtk_array.SetName(name)
+        pc_dom.GetPointData().AddArray(vtk_array)
+    return pc_dom
+
+
+# Camera looking down on the point cloud from height
+def make_camera(height=300.0, focal_point=(50.0, 50.0, 0.0), parallel=False):
+    camera = vtkCamera()
+    camera.SetFocalPoint(*focal_point)
+    camera.SetPosition(focal_point[0], focal_point[1], height)
+    camera.SetViewUp(0, 1, 0)
+    camera.SetClippingRange(1, 10 * height)
+    if parallel:
+        camera.ParallelProjectionOn()
+        camera.SetParallelScale(60)
+    return camera
+
+
+# Class used as a substitute of pyqt-signals/emit
+class FakeSignal:
+    def emit(self, uids):
+        return
+
+
+# Class used as a substitute of Legend
+class FakeLegend:
+    def update_widget(self, parent):
+        return
+
+
+# Project window with the members used to read the octrees of the DOM collection
+class FakeProjectWindow:
+    dom_object_name = ProjectWindow.dom_object_name
+    get_lod_octree = ProjectWindow.get_lod_octree
+
+    def __init__(self, project_dir_name):
+        self.project_dir_name = project_dir_name
+        self.lod_octrees = {}
+        self.vtk_obj_cache = VtkObjCache()
+        self.legend = FakeLegend()
+        self.prop_legend = FakeLegend()
+        self.prop_legend_df = pd_DataFrame(columns=["property_name"])
+        self.dom_added_signal = FakeSignal()
+        self.dom_coll = DomCollection(parent=self)
+
+
+# Project window with a point cloud saved in the object store and not read yet, as with lazy loading
+def make_lazy_window(tmp_path, pc_dom):
+    window = FakeProjectWindow(str(tmp_path))
+    objects_dir = objects_dir_name(str(tmp_path))
+    manifest = store_vtk_entities(
+        entities=[("pc", ".vtp", pc_dom)], objects_dir=objects_dir, workers=0
+    )
+    entity_dict = deepcopy(DomCollection.dom_entity_dict)
+    entity_dict["uid"] = "pc"
+    entity_dict["dom_type"] = "PCDom"
+    entity_dict["vtk_obj"] = LazyVtkObj(
+        vtk_obj=PCDom(), file_name=object_file_name(objects_dir, manifest["pc"])
+    )
+    window.dom_coll.add_entity_from_dict(entity_dict=entity_dict)
+    return window, manifest["pc"]
+
+
+# Class for testing the level of detail octree of point clouds
+class TestLodOctree:
+
+    # each point is in exactly one node, inside its cube, and children are linked to their parent
+    def test_build_lod_nodes(self):
+        points = make_pc_dom().points
+        nodes, order = build_lod_nodes(points=points, node_size=1000, seed=0)
+
+        assert np.array_equal(np.sort(order), np.arange(points.shape[0]))
+        assert nodes["count"].sum() == points.shape[0]
+        assert np.array_equal(nodes["start"][1:], np.cumsum(nodes["count"])[:-1])
+        assert nodes["count"].max() <= 1000
+        for node in nodes:
+            node_points = points[order][node["start"] : node["start"] + node["count"]]
+            assert np.abs(node_points - node["center"]).max() <= node["half_size"] * (
+                1 + 1e-9
+            )
+            children = nodes[
+                node["first_child"] : node["first_child"] + node["n_children"]
+            ]
+            assert np.all(children["depth"] == node["depth"] + 1)
+            assert np.all(children["key"] >> 3 == node["key"])
+
+    # children of a cell have consecutive Morton codes
+    def test_morton_keys(self):
+        cells = np.array(
+            [[i, j, k] for k in range(2) for j in range(2) for i in range(2)]
+        )
+
+        assert morton_keys(cells).tolist() == list(range(8))
+        assert np.all(
+            morton_keys(cells + [2, 4, 6]) >> 3 == morton_keys(np.array([[1, 2, 3]]))
+        )
+
+    # an octree saved to file and memory-mapped equals the one kept in memory
+    def test_save_load(self, tmp_path):
+        pc_dom = make_pc_dom()
+        in_memory = LodOctree.from_pcdom(vtk_obj=pc_dom, node_size=1000)
+        dir_name = str(tmp_path / "lod" / "uid")
+        on_file = LodOctree.from_pcdom(
+            vtk_obj=pc_dom, dir_name=dir_name, node_size=1000
+        )
+
+        assert in_memory.in_memory and not on_file.in_memory
+        assert LodOctree.exists(dir_name)
+        assert not os.path.isdir(dir_name + ".tmp")
+        assert np.array_equal(in_memory.nodes, on_file.nodes)
+        assert np.array_equal(in_memory.points, on_file.points)
+        assert list(on_file.point_data) == ["Intensity", "RGB"]
+        for name in in_memory.point_data:
+            assert np.array_equal(in_memory.point_data[name], on_file.point_data[name])
+        assert on_file.matches(pc_dom)
+        assert not on_file.matches(make_pc_dom(n=1000))
+
+    # properties added or removed after the octree was built invalidate it
+    def test_matches_properties(self, tmp_path):
+        pc_dom = make_pc_dom()
+        octree = LodOctree.from_pcdom(
+            vtk_obj=pc_dom, dir_name=str(tmp_path / "uid"), node_size=1000
+        )
+        pc_dom.init_point_data(data_key="Planarity", dimension=1)
+
+        assert not octree.matches(pc_dom)
+        pc_dom.remove_point_data("Planarity")
+        assert octree.matches(pc_dom)
+        pc_dom.remove_point_data("RGB")
+        assert not octree.matches(pc_dom)
+
+    # octrees built from the object of a cloud not read yet are used without reading the cloud
+    def test_lazy_octree(self, tmp_path):
+        pc_dom = make_pc_dom()
+        window, object_name = make_lazy_window(tmp_path, pc_dom)
+        dir_name = lod_dir_name(str(tmp_path), "pc")
+        LodOctree.from_pcdom(
+            vtk_obj=pc_dom, dir_name=dir_name, node_size=1000, object_name=object_name
+        )
+
+        assert LodOctree.load(dir_name).object_name == object_name
+        assert window.get_lod_octree(uid="pc") is not None
+        assert isinstance(
+            window.dom_coll.get_uid_value(uid="pc", column="vtk_obj"), LazyVtkObj
+        )
+        assert window.vtk_obj_cache.n_loads == 0
+
+        window.lod_octrees.clear()
+        octree = LodOctree.load(dir_name)
+        octree.object_name = "other.vtp"
+        octree.write_description(dir_name=dir_name)
+
+        assert window.get_lod_octree(uid="pc") is not None
+        assert window.vtk_obj_cache.n_loads == 1
+        assert window.dom_object_name("pc") == object_name
+        window.dom_coll.get_uid_vtk_obj("pc").init_point_data(
+            data_key="Planarity", dimension=1
+        )
+        assert window.dom_object_name("pc") is None
+        assert window.get_lod_octree(uid="pc") is None
+
+    # the nodes selected respect the point budget and the view frustum
+    def test_select_nodes(self):
+        octree = LodOctree.from_pcdom(vtk_obj=make_pc_dom(), node_size=1000)
+        near = octree.select_nodes(
+            camera=make_camera(height=100), viewport_size=(800, 600), point_budget=5000
+        )
+        far = octree.select_nodes(
+            camera=make_camera(height=100000), viewport_size=(800, 600)
+        )
+        away = make_camera()
+        away.SetFocalPoint(50, 50, 1000)
+        outside = octree.select_nodes(camera=away, viewport_size=(800, 600))
+
+        assert 0 < octree.nodes["count"][near].sum() <= 5000
+        assert 0 in near
+        assert far.tolist() == [0]
+        assert outside.size == 0
+        full = octree.select_nodes(
+            camera=make_camera(height=100),
+            viewport_size=(800, 600),
+            point_budget=10**9,
+            pixel_error=0,
+        )
+        assert octree.nodes["count"][full].sum() == octree.n_points
+
+    # a camera closer to a corner of the cloud refines the nodes around it, with parallel projection too
+    def test_select_nodes_frustum(self):
+        octree = LodOctree.from_pcdom(vtk_obj=make_pc_dom(), node_size=500)
+        for parallel in [False, True]:
+            camera = make_camera(height=30, focal_point=(10, 10, 0), parallel=parallel)
+            if parallel:
+                camera.SetParallelScale(8)
+            node_ids = octree.select_nodes(camera=camera, viewport_size=(800, 600))
+            deep = node_ids[octree.nodes["depth"][node_ids] > 1]
+
+            assert deep.size > 0
+            assert np.all(octree.nodes["center"][deep][:, :2].min(axis=1) < 50)
+
+    # the point cloud of the selected nodes keeps the properties of the original one
+    def test_node_pcdom(self):
+        pc_dom = make_pc_dom()
+        octree = LodOctree.from_pcdom(vtk_obj=pc_dom, node_size=1000)
+        node_ids = np.array([0, 1, 3])
+        point_cloud = octree.node_pcdom(node_ids)
+        n_points = octree.nodes["count"][node_ids].sum()
+
+        assert point_cloud.GetNumberOfPoints() == n_points
+        assert point_cloud.GetNumberOfCells() == n_points
+        assert point_cloud.get_point_data("RGB").shape == (n_points, 3)
+        original = {tuple(p): i for i, p in enumerate(pc_dom.points)}
+        rows = [original[tuple(p)] for p in point_cloud.points]
+        assert np.array_equal(
+            point_cloud.get_point_data("Intensity"),
+            pc_dom.get_point_data("Intensity")[rows],
+        )
+        assert octree.node_bounds(node_ids).shape == (3, 6)
+        assert octree.node_pcdom(np.array([], dtype=int)).GetNumberOfPoints() == 0
+
+    # octrees of entities not found in any manifest are removed, and are not taken as revisions
+    def test_collect_garbage(self, tmp_path):
+        project_dir_name = str(tmp_path)
+        rev_dir_name = str(tmp_path / "rev_0")
+        os.mkdir(rev_dir_name)
+        write_manifest({"kept": "object.vtp"}, rev_dir_name)
+        for uid in ["kept", "removed"]:
+            LodOctree.from_pcdom(
+                vtk_obj=make_pc_dom(n=1000),
+                dir_name=lod_dir_name(project_dir_name, uid),
+            )
+
+        assert revision_dir_names(project_dir_name) == [rev_dir_name]
+        n_files, n_bytes = collect_garbage(project_dir_name)
+
+        assert n_files == 5
+        assert n_bytes > 0
+        assert LodOctree.exists(lod_dir_name(project_dir_name, "kept"))
+        assert not os.path.isdir(lod_dir_name(project_dir_name, "removed"))
@@ -0,0 +1,313 @@
+import numpy as np
+import pytest
+from scipy.spatial import cKDTree
+from vtkmodules.vtkCommonDataModel import vtkPlane
+
+from pzero.entities_factory import PCDom, derived_cache_stats
+from pzero.point_clouds import (
+    colour_filter,
+    curvature,
+    decimate_pc,
+    estimate_normals,
+    fit_plane,
+    neighbour_chunks,
+    plane_distances,
+    poisson_disk_ids,
+    radial_outliers,
+    ransac_plane,
+    residual_stats,
+    roughness,
+    surface_density,
+    voxel_ids,
+)
+from tests.test_lod_octree import make_pc_dom
+
+
+# Build a point cloud from an (n, 3) array of points
+def pc_dom_from_points(points):
+    pc_dom = PCDom()
+    pc_dom.points = points
+    pc_dom.generate_cells()
+    return pc_dom
+
+
+# Points on a regular grid on the plane z = x + 2y, with spacing 0.1 in x and y
+def make_plane():
+    x, y = np.meshgrid(np.arange(100) * 0.1, np.arange(100) * 0.1)
+    return np.column_stack([x.ravel(), y.ravel(), x.ravel() + 2 * y.ravel()])
+
+
+# Random points on a sphere with radius 10
+def make_sphere(n=20000):
+    points = np.random.default_rng(0).normal(size=(n, 3))
+    return 10 * points / np.linalg.norm(points, axis=1)[:, None]
+
+
+# Random points on a cylinder with radius 5 and axis along y
+def make_cylinder(n=20000):
+    rng = np.random.default_rng(0)
+    angles = rng.uniform(0, 2 * np.pi, n)
+    return np.column_stack(
+        [5 * np.cos(angles), rng.uniform(0, 20, n), 5 * np.sin(angles)]
+    )
+
+
+# Class for testing the decimation of point clouds
+class TestDecimatePc:
+
+    # random decimation keeps fac of the points, without repetitions, with their point data
+    def test_random(self):
+        pc_dom = make_pc_dom(n=10000)
+        decimated = decimate_pc(pc_dom, 0.25, seed=1)
+        ids = cKDTree(pc_dom.points).query(decimated.points)[1]
+
+        assert decimated.GetNumberOfPoints() == 2500
+        assert decimated.GetNumberOfCells() == 2500
+        assert np.unique(ids).size == 2500
+        assert np.all(np.diff(ids) > 0)
+        assert np.array_equal(
+            decimated.get_point_data("RGB"), pc_dom.get_point_data("RGB")[ids]
+        )
+        assert np.array_equal(
+            decimated.points, decimate_pc(pc_dom, 0.25, seed=1).points
+        )
+        assert not np.array_equal(
+            decimated.points, decimate_pc(pc_dom, 0.25, seed=2).points
+        )
+
+    # voxel decimation keeps the point closest to the centre of each occupied voxel
+    def test_voxel(self):
+        points = make_pc_dom(n=10000).points
+        ids = voxel_ids(points=points, voxel_size=5.0)
+        cells = np.floor((points - points.min(axis=0)) / 5.0).astype(int)
+        distances = (((points - points.min(axis=0)) / 5.0 - cells - 0.5) ** 2).sum(
+            axis=1
+        )
+
+        assert ids.size == np.unique(cells, axis=0).shape[0]
+        assert np.unique(cells[ids], axis=0).shape[0] == ids.size
+        for cell in np.unique(cells, axis=0)[:50]:
+            in_cell = np.flatnonzero((cells == cell).all(axis=1))
+            assert in_cell[distances[in_cell].argmin()] in ids
+
+    # Poisson-disk decimation keeps points farther than radius, covering all the others
+    @pytest.mark.parametrize("seed", [0, 1])
+    def test_poisson(self, seed):
+        points = make_pc_dom(n=20000).points
+        ids = poisson_disk_ids(points=points, radius=3.0, seed=seed)
+        tree = cKDTree(points[ids])
+
+        assert tree.query(points[ids], k=2)[0][:, 1].min() > 3.0
+        assert tree.query(points)[0].max() <= 3.0
+        assert np.array_equal(
+            ids, poisson_disk_ids(points=points, radius=3.0, seed=seed)
+        )
+        decimated = decimate_pc(make_pc_dom(n=20000), mode="poisson", radius=3.0)
+        assert decimated.GetNumberOfPoints() == decimated.GetNumberOfCells() > 0
+
+    # unknown modes and grids too fine for the cloud are rejected
+    def test_errors(self):
+        pc_dom = make_pc_dom(n=100)
+        with pytest.raises(ValueError):
+            decimate_pc(pc_dom, mode="octree")
+        with pytest.raises(ValueError):
+            decimate_pc(pc_dom, mode="voxel", voxel_size=1e-12)
+
+
+# Class for testing the neighbourhood filters on analytic surfaces
+class TestNeighbourFilters:
+
+    # the KD-tree is built once and reused until the points change
+    def test_kd_tree(self):
+        pc_dom = pc_dom_from_points(make_plane())
+        tree = pc_dom.kd_tree
+        pc_dom.set_point_data("roughness", roughness(vtk_obj=pc_dom, radius=0.3))
+        misses = derived_cache_stats["misses"]
+
+        assert pc_dom.kd_tree is tree
+        assert derived_cache_stats["misses"] == misses
+        pc_dom.points = make_plane() + 1
+        assert pc_dom.kd_tree is not tree
+        assert np.array_equal(pc_dom.kd_tree.data, make_plane() + 1)
+
+    # neighbours are returned in chunks, with the point itself first and missing ones masked
+    def test_neighbour_chunks(self):
+        pc_dom = pc_dom_from_points(make_plane())
+        chunks = list(
+            neighbour_chunks(vtk_obj=pc_dom, radius=0.25, k=20, chunk_size=3000)
+        )
+
+        assert [(start, stop) for start, stop, _, _ in chunks] == [
+            (0, 3000),
+            (3000, 6000),
+            (6000, 9000),
+            (9000, 10000),
+        ]
+        _, _, ids, mask = chunks[1]
+        assert np.array_equal(ids[:, 0], np.arange(3000, 6000))
+        assert mask.sum(axis=1).max() == 9
+        assert mask.sum(axis=1).min() >= 4
+
+    # roughness and curvature are zero on a plane, and the density is one point per grid cell
+    def test_plane(self):
+        pc_dom = pc_dom_from_points(make_plane())
+        interior = np.all(
+            (make_plane()[:, :2] > 1) & (make_plane()[:, :2] < 8.9), axis=1
+        )
+        density = surface_density(vtk_obj=pc_dom, radius=0.5)
+
+        assert np.nanmax(roughness(vtk_obj=pc_dom, radius=0.3)) < 1e-9
+        for kind in ["mean", "gaussian", "variation"]:
+            assert (
+                np.nanmax(np.abs(curvature(vtk_obj=pc_dom, radius=0.3, kind=kind)))
+                < 1e-6
+            )
+        """The grid is sheared by the plane, so the density is divided by the area factor sqrt(6)."""
+        assert np.median(density[interior]) == pytest.approx(100 / np.sqrt(6), rel=0.1)
+
+    # mean curvature is 1/R and Gaussian curvature 1/R^2 on a sphere
+    def test_sphere(self):
+        pc_dom = pc_dom_from_points(make_sphere())
+        mean = curvature(vtk_obj=pc_dom, radius=2.0, k=60, kind="mean")
+        gaussian = curvature(vtk_obj=pc_dom, radius=2.0, k=60, kind="gaussian")
+
+        assert np.median(mean) == pytest.approx(0.1, rel=0.05)
+        assert np.median(gaussian) == pytest.approx(0.01, rel=0.1)
+        assert np.median(roughness(vtk_obj=pc_dom, radius=1.0)) < 0.05
+
+    # mean curvature is 1/2R and Gaussian curvature 0 on a cylinder
+    def test_cylinder(self):
+        pc_dom = pc_dom_from_points(make_cylinder())
+        interior = (make_cylinder()[:, 1] > 2) & (make_cylinder()[:, 1] < 18)
+        mean = curvature(vtk_obj=pc_dom, radius=1.5, k=60, kind="mean")
+        gaussian = curvature(vtk_obj=pc_dom, radius=1.5, k=60, kind="gaussian")
+
+        assert np.median(mean[interior]) == pytest.approx(0.1, rel=0.05)
+        assert np.abs(np.median(gaussian[interior])) < 1e-3
+
+    # isolated points are outliers, and colours are smoothed keeping their type (within 0.15 each point
+    # of the sheared grid has two neighbours along x)
+    def test_radial_colour(self):
+        points = np.vstack([make_plane(), [[50, 50, 50], [-50, 0, 0]]])
+        pc_dom = pc_dom_from_points(points)
+        rgb = np.full((points.shape[0], 3), 100, dtype=np.uint8)
+        rgb[5050] = 200
+        pc_dom.set_point_data("RGB", rgb)
+        outliers = radial_outliers(vtk_obj=pc_dom, radius=0.3, min_neighbours=3)
+
+        assert np.flatnonzero(outliers).tolist() == [10000, 10001]
+        median = colour_filter(
+            vtk_obj=pc_dom, property_name="RGB", radius=0.15, mode="median"
+        )
+        mean = colour_filter(vtk_obj=pc_dom, property_name="RGB", radius=0.15)
+        assert median.dtype == np.uint8 and median.shape == rgb.shape
+        assert np.all(median == 100)
+        assert mean[5050].tolist() == [133, 133, 133]
+        assert mean[0].tolist() == [100, 100, 100]
+
+
+# Class for testing the multi-scale estimation of point cloud normals
+class TestEstimateNormals:
+
+    # normals of a plane are exact, point downwards, and have full confidence (planarity is lower only
+    # where neighbourhoods are elongated, along the borders)
+    def test_plane(self):
+        pc_dom = pc_dom_from_points(make_plane())
+        normals, planarity, confidence, scales = estimate_normals(vtk_obj=pc_dom)
+        expected = np.array([1, 2, -1]) / np.sqrt(6)
+
+        assert np.allclose(normals, expected)
+        assert np.median(planarity) > 0.9 and np.all(confidence > 0.999)
+        assert set(scales) <= {10, 20, 40}
+
+    # on a noisy plane larger neighbourhoods give better normals, and they are chosen
+    def test_noisy_plane(self):
+        points = make_plane()
+        points[:, 2] += np.random.default_rng(0).normal(0, 0.02, points.shape[0])
+        pc_dom = pc_dom_from_points(points)
+        expected = np.array([1, 2, -1]) / np.sqrt(6)
+        single = estimate_normals(vtk_obj=pc_dom, scales=[10])[0]
+        normals, _, confidence, scales = estimate_normals(vtk_obj=pc_dom)
+
+        assert np.median(scales) == 40
+        assert np.mean(normals @ expected) > np.mean(single @ expected)
+        assert np.mean(confidence) > 0.9
+
+    # normals of a sphere point toward a sensor at its centre, and threads give the same result
+    def test_sensor_workers(self):
+        points = make_sphere()
+        pc_dom = pc_dom_from_points(points)
+        normals, _, confidence, _ = estimate_normals(
+            vtk_obj=pc_dom, sensor=[0, 0, 0], workers=1, chunk_size=3000
+        )
+        threaded = estimate_normals(
+            vtk_obj=pc_dom, sensor=[0, 0, 0], workers=3, chunk_size=3000
+        )
+
+        assert np.all((normals * -points).sum(axis=1) > 0)
+        assert np.median((normals * -points).sum(axis=1) / 10) > 0.999
+        assert np.array_equal(normals, threaded[0])
+        assert np.array_equal(confidence, threaded[2])
+
+    # points without enough neighbours within radius have zero normals and confidence, and normals,
+    # planarity and confidence are stored as properties
+    def test_isolated_properties(self):
+        pc_dom = pc_dom_from_points(np.vstack([make_plane(), [[50, 50, 50]]]))
+        normals, _, confidence, scales = estimate_normals(vtk_obj=pc_dom, radius=0.5)
+
+        assert np.all(normals[-1] == 0) and confidence[-1] == 0 and scales[-1] == 0
+        pc_dom.vtk_set_normals(radius=0.5)
+        assert np.array_equal(pc_dom.get_point_data("Normals"), normals)
+        assert pc_dom.get_point_data("Planarity").shape == (10001,)
+        assert np.array_equal(pc_dom.get_point_data("Normal confidence"), confidence)
+
+
+# Class for testing the plane calibration of point clouds
+class TestCalibration:
+
+    # distances are the absolute ones given before by vtkPlane, with the sign of the side of the plane
+    def test_plane_distances(self):
+        points = make_sphere(n=2000) + [500000, 5000000, 1000]
+        center, normal = fit_plane(points=points[points[:, 2] > 1005])
+        plane = vtkPlane()
+        plane.SetOrigin(center)
+        plane.SetNormal(normal)
+        expected = np.array([plane.DistanceToPlane(point) for point in points])
+        distances = plane_distances(points=points, center=center, normal=normal)
+
+        assert np.allclose(np.abs(distances), expected, rtol=0, atol=1e-8)
+        assert distances[points[:, 2].argmax()] < 0
+        assert normal[2] < 0
+
+    # RANSAC finds a noisy plane with 30% outliers, that the least-squares plane misses
+    def test_ransac_plane(self):
+        rng = np.random.default_rng(0)
+        points = make_plane() + [500000, 5000000, 1000]
+        points[:, 2] += rng.normal(0, 0.01, len(points))
+        outliers = rng.choice(len(points), 3000, replace=False)
+        points[outliers, 2] += rng.uniform(0.5, 5, 3000)
+        expected = np.array([1, 2, -1]) / np.sqrt(6)
+        center, normal, inliers, threshold = ransac_plane(
+            points=points, seed=0, chunk_size=3000
+        )
+
+        assert np.dot(normal, expected) > 0.99999
+        assert np.dot(fit_plane(points=points)[1], expected) < 0.9999
+        assert not inliers[outliers].any()
+        assert inliers.sum() > 6900
+        assert 0.02 < threshold < 0.1
+        again = ransac_plane(points=points, seed=0)
+        assert np.array_equal(again[2], inliers) and np.allclose(again[1], normal)
+        with pytest.raises(ValueError):
+            ransac_plane(points=points[:2])
+
+    # residual statistics are computed on the inliers only
+    def test_residual_stats(self):
+        distances = np.array([-0.1, 0.1, 0.3, -0.3, 10.0])
+        stats = residual_stats(distances=distances, inliers=np.abs(distances) < 1)
+
+        assert stats["points"] == 5 and stats["inlier_ratio"] == 0.8
+        assert stats["mean"] == pytest.approx(0)
+        assert stats["rms"] == pytest.approx(np.sqrt(0.05))
+        assert stats["median_abs"] == pytest.approx(0.2)
+        assert stats["max_abs"] == pytest.approx(0.3)
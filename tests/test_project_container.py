@@ -0,0 +1,324 @@
+import os
+
+import numpy as np
+import pytest
+from pandas import DataFrame as pd_DataFrame
+from pandas import read_json as pd_read_json
+from vtk import vtkCellArray, vtkTetra, VTK_DOUBLE, VTK_TETRA, VTK_UNSIGNED_CHAR
+from vtkmodules.util.numpy_support import numpy_to_vtk
+
+from pzero.entities_factory import (
+    PolyData,
+    VertexSet,
+    PolyLine,
+    TriSurf,
+    Frame,
+    XsVertexSet,
+    XsPolyLine,
+    XsTriSurf,
+    TetraSolid,
+    Voxet,
+    XsVoxet,
+    Seismics,
+    DEM,
+    PCDom,
+    TSDom,
+    Image,
+    MapImage,
+    XsImage,
+    Image3D,
+    Well,
+    WellTrace,
+    WellMarker,
+    Attitude,
+)
+from pzero.project_container import (
+    ContainerRevision,
+    ContainerVtkObj,
+    write_container,
+    convert_project,
+)
+from pzero.project_io import (
+    FolderRevision,
+    object_key,
+    serialize_vtk_obj,
+    read_project_file,
+    write_project_file,
+    store_vtk_entities,
+    objects_dir_name,
+    write_manifest,
+)
+
+
+# Class used as a substitute of the project window, for entities belonging to a cross-section
+class FakeParent:
+    xsect_coll = None
+
+
+def fill_polydata(vtk_obj, n=12, cells="triangles", seed=0):
+    rng = np.random.default_rng(seed)
+    vtk_obj.points = rng.random((n, 3)) * 100.0
+    if cells == "auto":
+        vtk_obj.auto_cells()
+    elif cells == "triangles":
+        for i in range(n - 2):
+            vtk_obj.append_cell(np.array([i, i + 1, i + 2]))
+    vtk_obj.set_point_data("prop", rng.random(n))
+    return vtk_obj
+
+
+def fill_image(vtk_obj, dims=(4, 3, 2)):
+    vtk_obj.SetDimensions(*dims)
+    vtk_obj.SetOrigin(10.0, 20.0, -5.0)
+    vtk_obj.SetSpacing(1.0, 2.0, 0.5)
+    vtk_obj.SetDirectionMatrix(0.0, -1.0, 0.0, 1.0, 0.0, 0.0, 0.0, 0.0, 1.0)
+    vtk_obj.AllocateScalars(VTK_DOUBLE, 1)
+    vtk_obj.GetPointData().GetScalars().SetName("intensity")
+    vtk_obj.GetPointData().GetScalars().Fill(3.5)
+    rgb = numpy_to_vtk(
+        np.arange(np.prod(dims) * 3).reshape(-1, 3) % 256,
+        deep=True,
+        array_type=VTK_UNSIGNED_CHAR,
+    )
+    rgb.SetName("RGB")
+    vtk_obj.GetPointData().AddArray(rgb)
+    return vtk_obj
+
+
+def fill_grid(vtk_obj):
+    x, y = np.meshgrid(np.arange(5.0), np.arange(4.0), indexing="ij")
+    vtk_obj.points = np.column_stack(
+        (x.ravel(order="F"), y.ravel(order="F"), np.sin(x + y).ravel(order="F"))
+    )
+    vtk_obj.SetDimensions(5, 4, 1)
+    vtk_obj.GetPointData().AddArray(numpy_to_vtk(np.arange(20.0), deep=True))
+    vtk_obj.GetPointData().GetArray(0).SetName("elevation")
+    return vtk_obj
+
+
+def fill_tetra_solid(vtk_obj):
+    rng = np.random.default_rng(1)
+    points = PolyData()
+    points.points = rng.random((5, 3))
+    vtk_obj.SetPoints(points.GetPoints())
+    cells = vtkCellArray()
+    for ids in [[0, 1, 2, 3], [1, 2, 3, 4]]:
+        tetra = vtkTetra()
+        for i, point_id in enumerate(ids):
+            tetra.GetPointIds().SetId(i, point_id)
+        cells.InsertNextCell(tetra)
+    vtk_obj.SetCells(VTK_TETRA, cells)
+    return vtk_obj
+
+
+def fill_well_trace(vtk_obj):
+    well = Well(
+        ID="W1",
+        trace_xyz=np.array([[0.0, 0.0, 0.0], [1.0, 0.0, -10.0], [2.0, 1.0, -20.0]]),
+        head_xyz=np.array([[0.0, 0.0, 0.0]]),
+    )
+    vtk_obj.ShallowCopy(well.trace)
+    return vtk_obj
+
+
+def fill_well_marker(vtk_obj):
+    vtk_obj.create_marker(np.array([[1.0, 2.0, 3.0]]), name="top")
+    return vtk_obj
+
+
+def fill_attitude(vtk_obj):
+    fill_polydata(vtk_obj, cells="auto")
+    vtk_obj.set_point_data("Normals", np.tile([0.0, 0.0, 1.0], (12, 1)))
+    vtk_obj.GetPointData().SetActiveNormals("Normals")
+    vtk_obj.set_point_data("dip", np.full(12, 30.0))
+    return vtk_obj
+
+
+def fill_pc_dom(vtk_obj):
+    vtk_obj.points = np.random.default_rng(2).random((1000, 3))
+    vtk_obj.generate_cells()
+    vtk_obj.set_point_data("intensity", np.arange(1000, dtype=np.float32))
+    return vtk_obj
+
+
+def xs_entity(entity_class):
+    return lambda: entity_class(x_section_uid="xs", parent=FakeParent())
+
+
+# Every class in entities_factory that is stored as an entity, with a function filling an empty instance
+entity_cases = [
+    ("PolyData", PolyData, lambda e: fill_polydata(e, cells=None), ".vtp"),
+    ("VertexSet", VertexSet, lambda e: fill_polydata(e, cells="auto"), ".vtp"),
+    ("PolyLine", PolyLine, lambda e: fill_polydata(e, cells="auto"), ".vtp"),
+    ("TriSurf", TriSurf, fill_polydata, ".vtp"),
+    ("Frame", Frame, lambda e: fill_polydata(e, n=4, cells=None), ".vtp"),
+    (
+        "XsVertexSet",
+        xs_entity(XsVertexSet),
+        lambda e: fill_polydata(e, cells="auto"),
+        ".vtp",
+    ),
+    (
+        "XsPolyLine",
+        xs_entity(XsPolyLine),
+        lambda e: fill_polydata(e, cells="auto"),
+        ".vtp",
+    ),
+    ("XsTriSurf", xs_entity(XsTriSurf), fill_polydata, ".vtp"),
+    ("TetraSolid", TetraSolid, fill_tetra_solid, ".vtu"),
+    ("Voxet", Voxet, fill_image, ".vti"),
+    ("XsVoxet", xs_entity(XsVoxet), fill_image, ".vti"),
+    ("Seismics", Seismics, fill_grid, ".vts"),
+    ("DEM", DEM, fill_grid, ".vts"),
+    ("PCDom", PCDom, fill_pc_dom, ".vtp"),
+    ("TSDom", TSDom, lambda e: e, ".vtp"),
+    ("Image", Image, fill_image, ".vti"),
+    ("MapImage", MapImage, lambda e: fill_image(e, dims=(4, 3, 1)), ".vti"),
+    ("XsImage", xs_entity(XsImage), lambda e: fill_image(e, dims=(4, 1, 3)), ".vti"),
+    ("Image3D", Image3D, fill_image, ".vti"),
+    ("WellTrace", WellTrace, fill_well_trace, ".vtp"),
+    ("WellMarker", WellMarker, fill_well_marker, ".vtp"),
+    ("Attitude", Attitude, fill_attitude, ".vtp"),
+]
+
+
+def same_entity(vtk_obj_1, vtk_obj_2, extension):
+    """Two entities are the same if their VTK XML serializations have the same content hash."""
+    return object_key(serialize_vtk_obj(vtk_obj_1, extension)) == object_key(
+        serialize_vtk_obj(vtk_obj_2, extension)
+    )
+
+
+# Class for testing the single-file project container
+class TestProjectContainer:
+
+    # every entity class is read back identical to the original
+    @pytest.mark.parametrize(
+        "class_name, new_entity, fill_entity, extension",
+        entity_cases,
+        ids=[case[0] for case in entity_cases],
+    )
+    def test_entity_round_trip(
+        self, tmp_path, class_name, new_entity, fill_entity, extension
+    ):
+        vtk_obj = fill_entity(new_entity())
+        file_name = str(tmp_path / "project.p0c")
+        write_container(
+            file_name=file_name,
+            tables=[],
+            entities=[("uid", extension, vtk_obj)],
+            revision="rev_test",
+        )
+        container = ContainerRevision(file_name=file_name)
+        out = container.read_entity(uid="uid", vtk_obj=new_entity())
+
+        assert type(out).__name__ == class_name
+        assert container.has_entity("uid", extension)
+        assert same_entity(vtk_obj, out, extension)
+
+    # tables are stored as the same JSON text written in revision folders
+    def test_tables(self, tmp_path):
+        table = pd_DataFrame(
+            {"uid": ["a", "b"], "name": ["x", "y"], "value": [1.5, 2.5]}
+        )
+        file_name = str(tmp_path / "project.p0c")
+        write_container(
+            file_name=file_name,
+            tables=[("geological_table.json", table.to_json(orient="index"))],
+            entities=[],
+            revision="rev_test",
+        )
+        container = ContainerRevision(file_name=file_name)
+
+        assert container.revision == "rev_test"
+        assert container.has_table("geological_table.json")
+        assert not container.has_table("geological_table.csv")
+        out = pd_read_json(container.table("geological_table.json"), orient="index")
+        assert out.equals(table)
+
+    # any range of rows of a chunked array can be read
+    def test_read_array(self, tmp_path):
+        point_cloud = fill_pc_dom(PCDom())
+        file_name = str(tmp_path / "project.p0c")
+        write_container(
+            file_name=file_name,
+            tables=[],
+            entities=[("cloud", ".vtp", point_cloud)],
+            chunk_mb=1000 * 24 / 7 / 1048576,
+        )
+        container = ContainerRevision(file_name=file_name)
+
+        assert container.array_spec(uid="cloud", key="points")["n_chunks"] == 8
+        assert np.array_equal(
+            container.read_array(uid="cloud", key="points"), point_cloud.points
+        )
+        assert np.array_equal(
+            container.read_array(uid="cloud", key="points", start=130, stop=557),
+            point_cloud.points[130:557],
+        )
+        assert container.read_array(
+            uid="cloud", key="points", start=5, stop=5
+        ).shape == (0, 3)
+
+    # placeholders read the container on first access, also after it has been replaced
+    def test_lazy_entities(self, tmp_path):
+        trisurf = fill_polydata(TriSurf())
+        file_name = str(tmp_path / "project.p0c")
+        write_container(
+            file_name=file_name, tables=[], entities=[("surf", ".vtp", trisurf)]
+        )
+        container = ContainerRevision(file_name=file_name)
+        lazy_obj = container.entity(uid="surf", extension=".vtp", vtk_obj=TriSurf())
+
+        assert isinstance(lazy_obj, ContainerVtkObj)
+        assert lazy_obj.object_name is None
+        assert lazy_obj.vtk_obj.GetNumberOfPoints() == 0
+
+        write_container(
+            file_name=file_name, tables=[], entities=[("surf", ".vtp", lazy_obj)]
+        )
+        assert lazy_obj.vtk_obj.GetNumberOfPoints() == 0
+        assert same_entity(lazy_obj.load(), trisurf, ".vtp")
+
+    # a project converted to a container and back has the same tables and entities
+    def test_convert_project(self, tmp_path):
+        entities = [
+            (class_name, extension, fill_entity(new_entity()))
+            for class_name, new_entity, fill_entity, extension in entity_cases
+        ]
+        new_entities = {case[0]: case[1] for case in entity_cases}
+        project_dir_name = str(tmp_path / "project_p0")
+        rev_dir_name = os.path.join(project_dir_name, "rev_test")
+        os.makedirs(rev_dir_name)
+        manifest = store_vtk_entities(
+            entities=entities, objects_dir=objects_dir_name(project_dir_name), workers=0
+        )
+        write_manifest(manifest, rev_dir_name)
+        with open(os.path.join(rev_dir_name, "geological_table.json"), "w") as fout:
+            fout.write('{"0":{"uid":"TriSurf"}}')
+        write_project_file(str(tmp_path / "project.p0"), "rev_test")
+
+        assert convert_project(
+            in_file_name=str(tmp_path / "project.p0"),
+            out_file_name=str(tmp_path / "project.p0c"),
+        ) == len(entities)
+        assert convert_project(
+            in_file_name=str(tmp_path / "project.p0c"),
+            out_file_name=str(tmp_path / "copy.p0"),
+        ) == len(entities)
+
+        assert read_project_file(str(tmp_path / "copy.p0")) == "rev_test"
+        original = FolderRevision(rev_dir_name=rev_dir_name)
+        revision = FolderRevision(rev_dir_name=str(tmp_path / "copy_p0" / "rev_test"))
+        assert revision.table_names() == ["geological_table.json"]
+        assert sorted(revision.entity_uids()) == sorted(original.entity_uids())
+        for uid, extension in original.entity_uids():
+            assert same_entity(
+                original.entity(
+                    uid=uid, extension=extension, vtk_obj=new_entities[uid]()
+                ).load(),
+                revision.entity(
+                    uid=uid, extension=extension, vtk_obj=new_entities[uid]()
+                ).load(),
+                extension,
+            )
@@ -0,0 +1,319 @@
+import os
+
+import numpy as np
+import pytest
+from pandas import DataFrame as pd_DataFrame
+from vtk import vtkXMLPolyDataReader, vtkXMLImageDataReader, VTK_DOUBLE
+
+from pzero.entities_factory import TriSurf, MapImage
+from pzero.project_io import (
+    save_vtk_entities,
+    store_vtk_entities,
+    objects_dir_name,
+    object_file_name,
+    write_manifest,
+    read_manifest,
+    entity_file_name,
+    collect_garbage,
+    migrate_project,
+    LazyVtkObj,
+    VtkObjCache,
+    serialize_vtk_obj,
+    write_vtk_buffer,
+    begin_revision,
+    commit_revision,
+    abort_revision,
+    staging_dir_name,
+    save_revision,
+)
+
+
+# Build a small triangulated surface with a point property
+def make_trisurf(n=10, seed=0):
+    rng = np.random.default_rng(seed)
+    trisurf = TriSurf()
+    trisurf.points = rng.random((n + 2, 3))
+    for i in range(n):
+        trisurf.append_cell(np.array([i, i + 1, i + 2]))
+    trisurf.set_point_data("prop", rng.random(n + 2))
+    return trisurf
+
+
+# Build a small image with one scalar property
+def make_image():
+    image = MapImage()
+    image.SetDimensions(4, 3, 1)
+    image.SetSpacing(1.0, 2.0, 1.0)
+    image.SetOrigin(10.0, 20.0, 0.0)
+    image.AllocateScalars(VTK_DOUBLE, 1)
+    return image
+
+
+# Class used as a substitute of a collection, with entities stored in the "vtk_obj" column
+class FakeCollection:
+    def __init__(self, vtk_objs):
+        self.df = pd_DataFrame(
+            {"uid": list(vtk_objs.keys()), "vtk_obj": list(vtk_objs.values())}
+        )
+
+    def get_uid_value(self, uid=None, column=None):
+        return self.df.loc[self.df["uid"] == uid, column].values[0]
+
+    def set_uid_vtk_obj(self, uid=None, vtk_obj=None):
+        self.df.loc[self.df["uid"] == uid, "vtk_obj"] = vtk_obj
+
+
+# Save surfaces in an object store and return a collection of LazyVtkObj placeholders
+def make_lazy_collection(tmp_path, n=3, n_points=1000):
+    objects_dir = objects_dir_name(str(tmp_path))
+    entities = [
+        ("surf_" + str(i), ".vtp", make_trisurf(n=n_points, seed=i)) for i in range(n)
+    ]
+    manifest = store_vtk_entities(entities=entities, objects_dir=objects_dir, workers=0)
+    collection = FakeCollection(
+        {
+            uid: LazyVtkObj(
+                vtk_obj=TriSurf(),
+                file_name=object_file_name(objects_dir, manifest[uid]),
+            )
+            for uid, _, _ in entities
+        }
+    )
+    return collection, entities, objects_dir
+
+
+def stored(collection, uid):
+    return collection.df.loc[collection.df["uid"] == uid, "vtk_obj"].values[0]
+
+
+def read_polydata(file_name):
+    reader = vtkXMLPolyDataReader()
+    reader.SetFileName(file_name)
+    reader.Update()
+    out = TriSurf()
+    out.ShallowCopy(reader.GetOutput())
+    return out
+
+
+# Table whose JSON text cannot be written, used to interrupt a save
+class FailingTable:
+    def to_json(self, orient=None):
+        raise OSError("disk full")
+
+
+# Class for testing the parallel project save engine
+class TestProjectIO:
+
+    # a buffer written by a worker must be equivalent to the original entity
+    @pytest.mark.parametrize("compress", [True, False])
+    def test_write_vtk_buffer(self, tmp_path, compress):
+        trisurf = make_trisurf()
+        file_name = str(tmp_path / "surf.vtp")
+        buffer = serialize_vtk_obj(vtk_obj=trisurf, extension=".vtp")
+        write_vtk_buffer(buffer, ".vtp", file_name, compress)
+        out = read_polydata(file_name)
+
+        assert np.allclose(out.points, trisurf.points)
+        assert np.array_equal(out.cells, trisurf.cells)
+        assert np.allclose(out.get_point_data("prop"), trisurf.get_point_data("prop"))
+
+    # sequential and parallel saves must write the same entities
+    @pytest.mark.parametrize("workers", [0, 2])
+    def test_save_vtk_entities(self, tmp_path, workers):
+        entities = [
+            ("surf_" + str(i), ".vtp", make_trisurf(seed=i)) for i in range(5)
+        ] + [("image", ".vti", make_image())]
+        saved = []
+        save_vtk_entities(
+            entities=entities,
+            out_dir_name=str(tmp_path),
+            workers=workers,
+            callback=saved.append,
+        )
+
+        assert sorted(saved) == sorted(uid for uid, _, _ in entities)
+        for uid, extension, vtk_obj in entities[:-1]:
+            out = read_polydata(str(tmp_path / (uid + extension)))
+            assert np.allclose(out.points, vtk_obj.points)
+
+        reader = vtkXMLImageDataReader()
+        reader.SetFileName(str(tmp_path / "image.vti"))
+        reader.Update()
+        assert reader.GetOutput().GetDimensions() == (4, 3, 1)
+
+    # the revision folder appears only when committed
+    def test_commit_revision(self, tmp_path):
+        out_dir_name = str(tmp_path / "rev_test")
+        staging = begin_revision(out_dir_name)
+        with open(os.path.join(staging, "table.json"), "w") as fout:
+            fout.write("{}")
+
+        assert not os.path.isdir(out_dir_name)
+
+        commit_revision(out_dir_name)
+
+        assert os.path.isfile(os.path.join(out_dir_name, "table.json"))
+        assert not os.path.isdir(staging_dir_name(out_dir_name))
+
+    # an aborted revision leaves nothing behind
+    def test_abort_revision(self, tmp_path):
+        out_dir_name = str(tmp_path / "rev_test")
+        begin_revision(out_dir_name)
+        abort_revision(out_dir_name)
+
+        assert os.listdir(str(tmp_path)) == []
+
+    # legends and tables are written in the staging folder, so a failed save leaves no revision
+    @pytest.mark.parametrize("failing_table", [0, 1])
+    def test_save_revision_abort(self, tmp_path, failing_table):
+        tables = [("geol_legend_table.json", "{}"), ("geological_table.json", "{}")]
+        tables[failing_table] = (tables[failing_table][0], FailingTable())
+
+        with pytest.raises(OSError):
+            save_revision(
+                project_dir_name=str(tmp_path),
+                rev_name="rev_test",
+                tables=tables,
+                entities=[("surf_0", ".vtp", make_trisurf())],
+                workers=0,
+            )
+
+        assert os.listdir(str(tmp_path)) == []
+
+    # unchanged entities are stored only once, changed entities get a new object
+    def test_store_vtk_entities(self, tmp_path):
+        objects_dir = objects_dir_name(str(tmp_path))
+        entities = [("surf_" + str(i), ".vtp", make_trisurf(seed=i)) for i in range(3)]
+        manifest_1 = store_vtk_entities(
+            entities=entities, objects_dir=objects_dir, workers=0
+        )
+        entities[0][2].points = entities[0][2].points + 1.0
+        saved = []
+        manifest_2 = store_vtk_entities(
+            entities=entities, objects_dir=objects_dir, workers=0, callback=saved.append
+        )
+
+        assert sorted(saved) == ["surf_0", "surf_1", "surf_2"]
+        assert manifest_1["surf_0"] != manifest_2["surf_0"]
+        assert manifest_1["surf_1"] == manifest_2["surf_1"]
+        assert manifest_1["surf_2"] == manifest_2["surf_2"]
+        n_objects = sum(len(files) for _, _, files in os.walk(objects_dir))
+        assert n_objects == 4
+        out = read_polydata(object_file_name(objects_dir, manifest_2["surf_0"]))
+        assert np.allclose(out.points, entities[0][2].points)
+
+    # objects referenced by no manifest are removed
+    def test_collect_garbage(self, tmp_path):
+        objects_dir = objects_dir_name(str(tmp_path))
+        for i in range(2):
+            rev_dir_name = str(tmp_path / ("rev_" + str(i)))
+            os.mkdir(rev_dir_name)
+            manifest = store_vtk_entities(
+                entities=[("surf", ".vtp", make_trisurf(seed=i))],
+                objects_dir=objects_dir,
+                workers=0,
+            )
+            write_manifest(manifest, rev_dir_name)
+
+        assert collect_garbage(str(tmp_path)) == (0, 0)
+
+        os.remove(str(tmp_path / "rev_0" / "manifest.json"))
+        n_files, n_bytes = collect_garbage(str(tmp_path))
+
+        assert n_files == 1
+        assert n_bytes > 0
+        assert os.path.isfile(
+            entity_file_name(str(tmp_path / "rev_1"), manifest, "surf", ".vtp")
+        )
+
+    # legacy revisions are moved to the object store and read through the manifest
+    def test_migrate_project(self, tmp_path):
+        trisurf = make_trisurf()
+        for i in range(2):
+            rev_dir_name = str(tmp_path / ("rev_" + str(i)))
+            os.mkdir(rev_dir_name)
+            save_vtk_entities(
+                entities=[("surf", ".vtp", trisurf)],
+                out_dir_name=rev_dir_name,
+                workers=0,
+            )
+        legacy_file_name = entity_file_name(str(tmp_path / "rev_0"), {}, "surf", ".vtp")
+        assert os.path.isfile(legacy_file_name)
+
+        assert migrate_project(str(tmp_path)) == 2
+        assert migrate_project(str(tmp_path)) == 0
+
+        manifest_0 = read_manifest(str(tmp_path / "rev_0"))
+        manifest_1 = read_manifest(str(tmp_path / "rev_1"))
+        assert manifest_0 == manifest_1
+        assert not os.path.isfile(legacy_file_name)
+        out = read_polydata(
+            entity_file_name(str(tmp_path / "rev_0"), manifest_0, "surf", ".vtp")
+        )
+        assert np.allclose(out.points, trisurf.points)
+        assert collect_garbage(str(tmp_path)) == (0, 0)
+
+    # a placeholder is replaced by the entity on first access, and put back when unloaded
+    def test_lazy_loading(self, tmp_path):
+        collection, entities, _ = make_lazy_collection(tmp_path)
+        cache = VtkObjCache()
+        lazy_obj = stored(collection, "surf_1")
+
+        vtk_obj = cache.load(collection=collection, uid="surf_1")
+
+        assert vtk_obj is lazy_obj.vtk_obj
+        assert stored(collection, "surf_1") is vtk_obj
+        assert isinstance(stored(collection, "surf_0"), LazyVtkObj)
+        assert np.allclose(vtk_obj.points, entities[1][2].points)
+        assert cache.memory_mb > 0
+
+        lazy_obj.unload()
+        assert vtk_obj.GetNumberOfPoints() == 0
+        assert lazy_obj.load() is vtk_obj
+        assert np.allclose(vtk_obj.points, entities[1][2].points)
+
+    # entities are unloaded in LRU order, except when shown or modified
+    def test_lazy_loading_budget(self, tmp_path):
+        collection, _, _ = make_lazy_collection(tmp_path, n=4)
+        shown = {"surf_0"}
+        unloaded = []
+        cache = VtkObjCache(
+            budget_mb=1e-6, is_shown=shown.__contains__, on_unload=unloaded.append
+        )
+        cache.load(collection=collection, uid="surf_0")
+        cache.load(collection=collection, uid="surf_1")
+        vtk_obj = cache.load(collection=collection, uid="surf_2")
+        vtk_obj.points = vtk_obj.points + 1.0
+        cache.load(collection=collection, uid="surf_3")
+
+        assert unloaded == ["surf_1"]
+        assert isinstance(stored(collection, "surf_1"), LazyVtkObj)
+        assert not isinstance(stored(collection, "surf_0"), LazyVtkObj)
+        assert stored(collection, "surf_2") is vtk_obj
+        assert cache.n_loads == 4
+        assert cache.n_unloads == 1
+
+        shown.clear()
+        cache.load(collection=collection, uid="surf_1")
+
+        assert unloaded == ["surf_1", "surf_0", "surf_3"]
+        assert list(cache.entries) == ["surf_1"]
+
+    # placeholders are saved by reference, without reading them
+    def test_store_lazy_entities(self, tmp_path):
+        collection, entities, objects_dir = make_lazy_collection(tmp_path)
+        lazy_objs = [stored(collection, uid) for uid, _, _ in entities]
+        manifest = store_vtk_entities(
+            entities=[
+                (uid, ".vtp", lazy_obj)
+                for (uid, _, _), lazy_obj in zip(entities, lazy_objs)
+            ],
+            objects_dir=objects_dir,
+            workers=0,
+        )
+
+        assert manifest == {
+            uid: lazy_obj.object_name
+            for (uid, _, _), lazy_obj in zip(entities, lazy_objs)
+        }
+        assert all(lazy_obj.vtk_obj.GetNumberOfPoints() == 0 for lazy_obj in lazy_objs)
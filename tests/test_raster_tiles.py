@@ -0,0 +1,278 @@
+import os
+
+import numpy as np
+import pytest
+import rasterio as rio
+from pandas import DataFrame as pd_DataFrame
+from rasterio.transform import from_origin
+from vtk import vtkCamera, vtkXMLStructuredGridReader, vtkXMLStructuredGridWriter
+from vtkmodules.util.numpy_support import vtk_to_numpy
+
+from pzero import raster_tiles
+from pzero.collections.dom_collection import DomCollection
+from pzero.collections.image_collection import ImageCollection
+from pzero.entities_factory import DEM
+from pzero.imports.dem2vtk import dem2vtk
+from pzero.imports.image2vtk import geo_image2vtk
+from pzero.raster_tiles import RasterTiles, build_overviews
+
+nodata = -9999.0
+
+
+# Write a tiled GeoTIFF with the bands of a (count, n_rows, n_cols) array and 2 m pixels
+def write_raster(path, bands, nodata=None):
+    with rio.open(
+        path,
+        "w",
+        driver="GTiff",
+        width=bands.shape[2],
+        height=bands.shape[1],
+        count=bands.shape[0],
+        dtype=bands.dtype,
+        crs="EPSG:32632",
+        transform=from_origin(500000, 5100000, 2, 2),
+        nodata=nodata,
+        tiled=True,
+        blockxsize=256,
+        blockysize=256,
+    ) as dataset:
+        dataset.write(bands)
+    return str(path)
+
+
+# Elevations of a tilted plane with a nodata pixel at upper-left
+def make_elevation(n_rows=1300, n_cols=1700):
+    elevation = (
+        np.arange(n_rows)[:, None] * 0.5 + np.arange(n_cols)[None, :] * 0.25
+    ).astype(np.float32)[None]
+    elevation[0, 0, 0] = nodata
+    return elevation
+
+
+# Camera looking down at map coordinates x, y from height above them
+def make_camera(x, y, height):
+    camera = vtkCamera()
+    camera.SetFocalPoint(x, y, 0)
+    camera.SetPosition(x, y, height)
+    camera.SetViewUp(0, 1, 0)
+    return camera
+
+
+# Class used as a substitute of pyqt-signals/emit
+class FakeSignal:
+    def emit(self, uids):
+        return
+
+
+# Class used as a substitute of Legend
+class FakeLegend:
+    def update_widget(self, parent):
+        return
+
+
+# Project window with the members used by dem2vtk and geo_image2vtk
+class FakeProjectWindow:
+    def __init__(self):
+        self.messages = []
+        self.TextTerminal = self
+        self.legend = FakeLegend()
+        self.prop_legend = FakeLegend()
+        self.prop_legend_df = pd_DataFrame(columns=["property_name"])
+        self.dom_added_signal = FakeSignal()
+        self.dom_coll = DomCollection(parent=self)
+        self.image_coll = ImageCollection(parent=self)
+
+    def appendPlainText(self, text):
+        self.messages.append(text)
+
+
+@pytest.fixture(autouse=True)
+def clear_opened():
+    raster_tiles.raster_tiles_opened.clear()
+    yield
+    raster_tiles.raster_tiles_opened.clear()
+
+
+# Class for testing the tiled raster pyramid
+class TestRasterTiles:
+
+    # overviews are built in an external file, without modifying the raster
+    def test_build_overviews(self, tmp_path):
+        path = write_raster(tmp_path / "dem.tif", make_elevation(), nodata=nodata)
+        with open(path, "rb") as fin:
+            raster_bytes = fin.read()
+
+        assert build_overviews(file_name=path)
+        assert os.path.isfile(path + ".ovr")
+        with open(path, "rb") as fin:
+            assert fin.read() == raster_bytes
+        with rio.open(path) as dataset:
+            assert dataset.overviews(1) == [2, 4]
+
+    # tiles of level 0 are windows of the raster, and tiles of coarser levels have the same extent
+    def test_read_tile(self, tmp_path):
+        elevation = make_elevation()
+        path = write_raster(tmp_path / "dem.tif", elevation, nodata=nodata)
+        build_overviews(file_name=path)
+        tiles = RasterTiles(file_name=path)
+
+        assert tiles.n_levels == 3
+        assert tiles.overview_level() == 1
+        assert tiles.tiles_shape(level=0) == (3, 4)
+        assert tiles.tiles_shape(level=1) == (2, 2)
+        assert np.array_equal(
+            tiles.read_tile(level=0, row=1, col=3), elevation[:, 512:1024, 1536:]
+        )
+        assert tiles.read_tile(level=1, row=1, col=1).shape == (1, 138, 338)
+        assert tiles.read_tile(level=2, row=0, col=0).shape == (1, 325, 425)
+        assert tiles.read_tile(level=0, row=1, col=3) is tiles.read_tile(
+            level=0, row=1, col=3
+        )
+
+    # DEMs of windows have the layout of dem2vtk, at the pixel centers, with NaN for nodata
+    def test_window_dem(self, tmp_path):
+        elevation = make_elevation()
+        tiles = RasterTiles(
+            file_name=write_raster(tmp_path / "dem.tif", elevation, nodata=nodata)
+        )
+        dem = tiles.window_dem(level=0, tile_rows=(0, 1), tile_cols=(2, 4))
+        overview = tiles.window_dem()
+
+        assert isinstance(dem, DEM)
+        assert dem.GetDimensions() == (512, 676, 1)
+        assert np.allclose(dem.points[0], [502049, 5099999, elevation[0, 0, 1024]])
+        assert np.allclose(
+            dem.points_Z.reshape(512, 676, order="F"), elevation[0, :512, 1024:]
+        )
+        assert np.allclose(
+            vtk_to_numpy(dem.GetPointData().GetArray("elevation")),
+            elevation[0, :512, 1024:].ravel(order="F"),
+        )
+        assert overview.GetDimensions() == (650, 850, 1)
+        assert np.allclose(overview.bounds[:4], [500002, 503398, 5097402, 5099998])
+        assert np.isnan(tiles.window_dem(level=0).points[0, 2])
+
+    # MapImages of windows have one RGB tuple per pixel, with the first pixel at upper-left
+    def test_window_map_image(self, tmp_path):
+        rng = np.random.default_rng(0)
+        bands = rng.integers(0, 255, (3, 600, 700), dtype=np.uint8)
+        tiles = RasterTiles(file_name=write_raster(tmp_path / "ortho.tif", bands))
+        image = tiles.window_map_image(level=0, tile_rows=(1, 2), tile_cols=(0, 2))
+
+        assert image.GetDimensions() == (700, 88, 1)
+        assert np.allclose(image.origin, [500001, 5100000 - 1025, 0])
+        assert np.allclose(image.spacing, [2, -2, 1])
+        assert np.array_equal(
+            vtk_to_numpy(image.GetPointData().GetArray("RGB")),
+            bands[:, 512:].transpose(1, 2, 0).reshape(-1, 3),
+        )
+        assert image.GetPointData().GetScalars().GetName() == "RGB"
+        two_bands = write_raster(tmp_path / "two.tif", bands[:2])
+        assert RasterTiles(file_name=two_bands).window_map_image() is None
+
+    # tiles are selected in the view frustum, refined up to the screen resolution and the pixel budget
+    def test_select_tiles(self, tmp_path):
+        tiles = RasterTiles(
+            file_name=write_raster(
+                tmp_path / "dem.tif", make_elevation(), nodata=nodata
+            )
+        )
+
+        assert tiles.select_tiles(
+            camera=make_camera(501700, 5098700, 50000),
+            viewport_size=(800, 600),
+            z_range=(0, 1000),
+        ) == (2, (0, 1), (0, 1))
+        assert tiles.select_tiles(
+            camera=make_camera(500300, 5099700, 300),
+            viewport_size=(800, 600),
+            z_range=(0, 1000),
+        ) == (0, (0, 1), (0, 1))
+        camera = make_camera(501700, 5098700, 3000)
+        assert tiles.select_tiles(
+            camera=camera, viewport_size=(800, 600), z_range=(0, 1000)
+        ) == (0, (0, 3), (0, 3))
+        assert tiles.select_tiles(
+            camera=camera,
+            viewport_size=(800, 600),
+            z_range=(0, 1000),
+            pixel_budget=1000000,
+        ) == (1, (0, 2), (0, 2))
+        assert (
+            tiles.select_tiles(
+                camera=make_camera(0, 0, 100),
+                viewport_size=(800, 600),
+                z_range=(0, 1000),
+            )
+            is None
+        )
+
+    # the raster file name saved in a project opens the same RasterTiles again
+    def test_from_vtk(self, tmp_path):
+        tiles = RasterTiles(
+            file_name=write_raster(
+                tmp_path / "dem.tif", make_elevation(), nodata=nodata
+            )
+        )
+        dem = tiles.window_dem()
+        tiles.to_vtk(vtk_obj=dem)
+        writer = vtkXMLStructuredGridWriter()
+        writer.SetFileName(str(tmp_path / "dem.vts"))
+        writer.SetInputData(dem)
+        writer.Write()
+        reader = vtkXMLStructuredGridReader()
+        reader.SetFileName(str(tmp_path / "dem.vts"))
+        reader.Update()
+        copy = DEM()
+        copy.ShallowCopy(reader.GetOutput())
+
+        assert copy.raster_tiles.file_name == tiles.file_name
+        assert copy.raster_tiles is copy.raster_tiles
+        assert (
+            tiles.window_dem(level=0, tile_rows=(0, 1), tile_cols=(0, 1)).raster_tiles
+            is None
+        )
+
+
+# Class for testing the raster importers
+class TestRasterImport:
+
+    # large rasters are imported as overviews, and small ones whole
+    def test_dem2vtk(self, tmp_path):
+        window = FakeProjectWindow()
+        large = write_raster(tmp_path / "large.tif", make_elevation(), nodata=nodata)
+        small = write_raster(
+            tmp_path / "small.tif",
+            make_elevation(n_rows=300, n_cols=400),
+            nodata=nodata,
+        )
+        dem2vtk(self=window, in_file_name=large, collection="DEMs and DOMs")
+        dem2vtk(self=window, in_file_name=small, collection="DEMs and DOMs")
+        large_uid, small_uid = window.dom_coll.get_uids()
+        large_dem = window.dom_coll.get_uid_vtk_obj(large_uid)
+        small_dem = window.dom_coll.get_uid_vtk_obj(small_uid)
+
+        assert window.dom_coll.get_uid_dom_type(large_uid) == "DEM"
+        assert large_dem.GetDimensions() == (650, 850, 1)
+        assert large_dem.raster_tiles is not None
+        assert os.path.isfile(large + ".ovr")
+        assert small_dem.GetDimensions() == (300, 400, 1)
+        assert small_dem.raster_tiles is None
+        assert not os.path.isfile(small + ".ovr")
+
+    # map images are imported with the overview of their bands
+    def test_geo_image2vtk(self, tmp_path):
+        window = FakeProjectWindow()
+        bands = np.zeros((3, 1100, 1200), dtype=np.uint8)
+        bands[0] = 200
+        geo_image2vtk(
+            self=window, in_file_name=write_raster(tmp_path / "ortho.tif", bands)
+        )
+        uid = window.image_coll.get_uids()[0]
+        image = window.image_coll.get_uid_vtk_obj(uid)
+
+        assert window.image_coll.get_uid_properties_names(uid) == ["RGB"]
+        assert image.GetDimensions() == (600, 550, 1)
+        assert np.allclose(image.spacing, [4, -4, 1])
+        assert np.all(image.image_data("RGB")[..., 0] == 200)
+        assert image.raster_tiles is not None
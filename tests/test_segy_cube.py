@@ -0,0 +1,278 @@
+import numpy as np
+import pytest
+from vtk import vtkSegYReader, vtkXMLStructuredGridReader, vtkXMLStructuredGridWriter
+from vtkmodules.util.numpy_support import vtk_to_numpy
+
+from pzero.collections.image_collection import ImageCollection
+from pzero.entities_factory import Seismics
+from pzero.imports.segy2vtk import segy2vtk
+from pzero.segy_cube import (
+    SegyCube,
+    ibm2ieee,
+    read_binary_header,
+    seismics_grid,
+    seismics_overview,
+)
+
+inlines = np.array([10, 11, 12, 13])
+crosslines = np.array([100, 102, 104, 106, 108])
+
+
+# Map coordinates of inline il and crossline xl, on a grid rotated with respect to the map axes
+def node_xy(il, xl):
+    return 500000 + 12.5 * xl + 5 * il, 5000000 + 12.5 * il - 5 * xl
+
+
+# Encode float values as IBM System/360 floats, exactly for values with few significant bits
+def ieee2ibm(values):
+    words = np.zeros(values.shape, dtype=np.uint32)
+    for i, value in np.ndenumerate(values.astype(np.float64)):
+        if value == 0:
+            continue
+        exponent = int(np.floor(np.log(abs(value)) / np.log(16))) + 1
+        fraction = int(round(abs(value) / 16.0**exponent * 2**24))
+        words[i] = (value < 0) << 31 | (exponent + 64) << 24 | fraction
+    return words
+
+
+# Write a post-stack 3D SEG-Y with the amplitudes of a (n_inlines, n_crosslines, n_samples) array,
+# leaving out the traces of the nodes in missing
+def write_segy(path, amplitudes, format_code=5, missing=(), n_extended_headers=0):
+    n_samples = amplitudes.shape[2]
+    binary_header = np.zeros(200, dtype=">i2")
+    binary_header[8], binary_header[10], binary_header[12] = (
+        4000,
+        n_samples,
+        format_code,
+    )
+    binary_header[152] = n_extended_headers
+    with open(path, "wb") as fout:
+        fout.write(b" " * 3200)
+        fout.write(binary_header.tobytes())
+        fout.write(b" " * 3200 * n_extended_headers)
+        for i, il in enumerate(inlines[: len(amplitudes)]):
+            for j, xl in enumerate(crosslines):
+                if (i, j) in missing:
+                    continue
+                header = np.zeros(240, dtype=np.uint8)
+                x, y = node_xy(il, xl)
+                for byte, value, dtype in [
+                    (71, -100, ">i2"),
+                    (73, round(x * 100), ">i4"),
+                    (77, round(y * 100), ">i4"),
+                    (115, n_samples, ">i2"),
+                    (117, 4000, ">i2"),
+                    (181, round(x * 100), ">i4"),
+                    (185, round(y * 100), ">i4"),
+                    (189, il, ">i4"),
+                    (193, xl, ">i4"),
+                ]:
+                    value = np.array([value], dtype=dtype).view(np.uint8)
+                    header[byte - 1 : byte - 1 + len(value)] = value
+                fout.write(header.tobytes())
+                if format_code == 1:
+                    fout.write(ieee2ibm(amplitudes[i, j]).astype(">u4").tobytes())
+                else:
+                    fout.write(amplitudes[i, j].astype(">f4").tobytes())
+    return str(path)
+
+
+def make_amplitudes(n_samples=7, seed=0):
+    rng = np.random.default_rng(seed)
+    return (
+        rng.integers(-64, 64, (len(inlines), len(crosslines), n_samples)) / 4
+    ).astype(np.float32)
+
+
+# Project window with the members used by segy2vtk
+class FakeProjectWindow:
+    def __init__(self):
+        self.messages = []
+        self.TextTerminal = self
+        self.image_coll = ImageCollection(parent=self)
+
+    def appendPlainText(self, text):
+        self.messages.append(text)
+
+
+# Class for testing the lazy SEG-Y cube
+class TestSegyCube:
+
+    # the index maps each node of the survey grid to its trace, with -1 for missing traces
+    def test_scan(self, tmp_path):
+        path = write_segy(
+            tmp_path / "cube.sgy",
+            make_amplitudes(),
+            missing=[(1, 2)],
+            n_extended_headers=1,
+        )
+        cube = SegyCube.scan(file_name=path)
+
+        assert read_binary_header(file_name=path) == (6800, 7, 5, 4000)
+        assert cube.shape == (4, 5, 7)
+        assert cube.inlines.tolist() == inlines.tolist()
+        assert cube.crosslines.tolist() == crosslines.tolist()
+        assert cube.trace_index[1].tolist() == [5, 6, -1, 7, 8]
+        assert np.allclose(
+            cube.map_xy(inline_ids=np.array([3]), crossline_ids=np.array([4])),
+            [node_xy(13, 108)],
+        )
+        assert np.allclose(
+            cube.node_spacing(), [np.hypot(5, 12.5), 2 * np.hypot(5, 12.5)]
+        )
+
+    # inline, crossline and time slices are the same as the slices of the whole cube
+    @pytest.mark.parametrize("format_code", [1, 5])
+    def test_slices(self, tmp_path, format_code):
+        amplitudes = make_amplitudes()
+        amplitudes[1, 2] = 0
+        cube = SegyCube.scan(
+            file_name=write_segy(
+                tmp_path / "cube.sgy",
+                amplitudes,
+                format_code=format_code,
+                missing=[(1, 2)],
+            )
+        )
+
+        assert np.array_equal(cube.subcube(), amplitudes)
+        assert np.array_equal(cube.inline_slice(index=1), amplitudes[1])
+        assert np.array_equal(cube.crossline_slice(index=2), amplitudes[:, 2])
+        assert np.array_equal(cube.time_slice(index=3), amplitudes[:, :, 3])
+        assert cube.time_slice(index=3).dtype == np.float32
+
+    # IBM floats are converted exactly
+    def test_ibm2ieee(self):
+        values = np.array([0, 1, -1, 0.25, 118.625, -3.5e-3, 1e6], dtype=np.float32)
+
+        assert np.allclose(ibm2ieee(ieee2ibm(values)), values, rtol=1e-6, atol=0)
+        assert ibm2ieee(np.array([0xC276A000], dtype=np.uint32))[0] == -118.625
+
+    # files that are not 3D cubes are rejected, so that they are read with vtkSegYReader
+    def test_not_a_cube(self, tmp_path):
+        path = write_segy(tmp_path / "line.sgy", make_amplitudes()[:1])
+
+        with pytest.raises(ValueError):
+            SegyCube.scan(file_name=path)
+
+    # grids built from the cube have the same points and values as those of vtkSegYReader
+    def test_vtk_segy_reader(self, tmp_path):
+        path = write_segy(tmp_path / "cube.sgy", make_amplitudes())
+        cube = SegyCube.scan(file_name=path)
+        inline_ids, crossline_ids, sample_ids = [np.arange(n) for n in cube.shape]
+        grid = seismics_grid(
+            cube=cube,
+            inline_ids=inline_ids,
+            crossline_ids=crossline_ids,
+            sample_ids=sample_ids,
+        )
+        segy_reader = vtkSegYReader()
+        segy_reader.SetFileName(path)
+        segy_reader.SetXYCoordModeToCDP()
+        segy_reader.Update()
+        output = segy_reader.GetOutput()
+
+        assert grid.GetDimensions() == (5, 4, 7)
+        assert np.allclose(grid.points, vtk_to_numpy(output.GetPoints().GetData()))
+        assert np.array_equal(
+            vtk_to_numpy(grid.GetPointData().GetArray("trace")),
+            vtk_to_numpy(output.GetPointData().GetArray("trace")),
+        )
+
+    # a section along an inline reads the traces of that inline, at the nearest trace elsewhere
+    def test_section(self, tmp_path):
+        amplitudes = make_amplitudes()
+        cube = SegyCube.scan(file_name=write_segy(tmp_path / "cube.sgy", amplitudes))
+        distances, xy, section = cube.section(
+            start_xy=node_xy(11, 100), end_xy=node_xy(11, 108)
+        )
+
+        assert len(distances) == 9
+        assert np.allclose(xy[-1], node_xy(11, 108))
+        assert np.array_equal(section[::2], amplitudes[1])
+        image = cube.section_image(start_xy=node_xy(11, 100), end_xy=node_xy(11, 108))
+        assert image.GetDimensions() == (9, 7, 1)
+        assert np.allclose(image.GetPoint(0), [*node_xy(11, 100), -24])
+        assert np.allclose(
+            image.GetPoint(image.GetNumberOfPoints() - 1), [*node_xy(11, 108), 0]
+        )
+        assert cube.section_image(start_xy=[0, 0], end_xy=[1, 1]) is None
+
+
+# Class for testing lazy Seismics entities
+class TestLazySeismics:
+
+    # the overview saved in a project stores the index, so the cube is opened again without a scan
+    def test_overview(self, tmp_path):
+        amplitudes = make_amplitudes(n_samples=9)
+        cube = SegyCube.scan(file_name=write_segy(tmp_path / "cube.sgy", amplitudes))
+        seismics = seismics_overview(cube=cube, max_nodes=3)
+        writer = vtkXMLStructuredGridWriter()
+        writer.SetFileName(str(tmp_path / "seismics.vts"))
+        writer.SetInputData(seismics)
+        writer.Write()
+        reader = vtkXMLStructuredGridReader()
+        reader.SetFileName(str(tmp_path / "seismics.vts"))
+        reader.Update()
+        copy = Seismics()
+        copy.ShallowCopy(reader.GetOutput())
+
+        assert seismics.GetDimensions() == (3, 3, 3)
+        assert np.array_equal(
+            vtk_to_numpy(seismics.GetPointData().GetArray("trace")),
+            amplitudes[np.ix_([0, 2, 3], [0, 2, 4], [0, 4, 8])]
+            .transpose(2, 0, 1)
+            .ravel(),
+        )
+        assert copy.survey_shape == (4, 5, 9)
+        assert np.array_equal(copy.segy_cube.trace_index, cube.trace_index)
+        assert np.allclose(copy.segy_cube.transform, cube.transform)
+        assert copy.segy_cube is copy.segy_cube
+
+    # full resolution slices are extracted from lazy and from whole Seismics
+    def test_extract_slice(self, tmp_path):
+        amplitudes = make_amplitudes()
+        cube = SegyCube.scan(file_name=write_segy(tmp_path / "cube.sgy", amplitudes))
+        lazy = seismics_overview(cube=cube, max_nodes=2)
+        whole = seismics_grid(
+            cube=cube,
+            inline_ids=np.arange(4),
+            crossline_ids=np.arange(5),
+            sample_ids=np.arange(7),
+        )
+
+        for seismics in [lazy, whole]:
+            inline = seismics.extract_slice(axis=0, index=1)
+            time = seismics.extract_slice(axis=2, index=3)
+            assert inline.GetDimensions() == (5, 1, 7)
+            assert np.array_equal(
+                vtk_to_numpy(inline.GetPointData().GetArray("trace")),
+                amplitudes[1].T.ravel(),
+            )
+            assert time.GetDimensions() == (5, 4, 1)
+            assert np.array_equal(
+                vtk_to_numpy(time.GetPointData().GetArray("trace")),
+                amplitudes[:, :, 3].ravel(),
+            )
+            assert np.allclose(time.points[:, 2], -12)
+            with pytest.raises(IndexError):
+                seismics.extract_slice(axis=1, index=5)
+
+    # segy2vtk adds a lazy overview of a cube and the whole grid of other files
+    def test_segy2vtk(self, tmp_path):
+        window = FakeProjectWindow()
+        segy2vtk(
+            self=window,
+            in_file_name=write_segy(tmp_path / "cube.sgy", make_amplitudes()),
+        )
+        segy2vtk(
+            self=window,
+            in_file_name=write_segy(tmp_path / "line.sgy", make_amplitudes()[:1]),
+        )
+        cube_uid, line_uid = window.image_coll.get_uids()
+
+        assert window.image_coll.get_uid_image_type(cube_uid) == "Seismics"
+        assert window.image_coll.get_uid_properties_names(cube_uid) == ["trace"]
+        assert window.image_coll.get_uid_vtk_obj(cube_uid).segy_cube.shape == (4, 5, 7)
+        assert window.image_coll.get_uid_vtk_obj(line_uid).segy_cube is None
+        assert window.image_coll.get_uid_vtk_obj(line_uid).GetNumberOfPoints() == 35
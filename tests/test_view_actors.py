@@ -0,0 +1,97 @@
+from pandas import DataFrame as pd_DataFrame
+from PyQt5.QtWidgets import QMainWindow
+
+from pzero.windows_factory import BaseView
+
+
+# Collection with the uid column only
+class FakeCollection:
+    def __init__(self, uids=()):
+        self.df = pd_DataFrame({"uid": list(uids)})
+
+
+# Actor that records its visibility
+class FakeActor:
+    def __init__(self, visible=None):
+        self.visible = visible
+
+    def SetVisibility(self, visible):
+        self.visible = visible
+
+
+# Renderer without other actors than those in actors_df
+class FakeRenderer:
+    actors = {}
+
+
+# Plotter with the methods used when actors are shown and removed
+class FakePlotter:
+    def __init__(self):
+        self.renderer = FakeRenderer()
+
+    def remove_actor(self, actor):
+        return actor is not None
+
+
+# Project window with one geological entity, shown by default, and one entity hidden by default
+class FakeProjectWindow:
+    update_actors = False
+
+    def __init__(self):
+        self.geol_coll = FakeCollection(["geol_0"])
+        self.xsect_coll = FakeCollection()
+        self.boundary_coll = FakeCollection()
+        self.mesh3d_coll = FakeCollection(["mesh_0"])
+        self.dom_coll = FakeCollection()
+        self.image_coll = FakeCollection()
+        self.well_coll = FakeCollection()
+        self.fluids_coll = FakeCollection()
+        self.backgrounds_coll = FakeCollection()
+
+
+# View without canvas that records the actors created
+class ActorsView(BaseView):
+    def __init__(self, parent=None):
+        QMainWindow.__init__(self)
+        self.parent = parent
+        self.plotter = FakePlotter()
+        self.actors_df = pd_DataFrame(
+            columns=["uid", "actor", "show", "collection", "show_prop"]
+        )
+        self.unloaded_uids = set()
+        self.shown_uids = []
+
+    def show_actor_with_property(
+        self, uid=None, collection=None, show_property=None, visible=None
+    ):
+        self.shown_uids.append(uid)
+        return FakeActor(visible=visible)
+
+
+# Class for testing the actors of the views
+class TestViewActors:
+
+    # hidden entities are registered without an actor, that is created when they are shown
+    def test_hidden_actor_created_when_shown(self, qtbot):
+        view = ActorsView(parent=FakeProjectWindow())
+        view.add_all_entities()
+
+        assert view.shown_uids == ["geol_0"]
+        assert (
+            view.actors_df.loc[view.actors_df["uid"] == "mesh_0", "actor"].values[0]
+            is None
+        )
+
+        view.set_actor_visible(uid="mesh_0", visible=False)
+        assert view.shown_uids == ["geol_0"]
+
+        view.set_actor_visible(uid="mesh_0", visible=True)
+        this_actor = view.actors_df.loc[
+            view.actors_df["uid"] == "mesh_0", "actor"
+        ].values[0]
+        assert view.shown_uids == ["geol_0", "mesh_0"]
+        assert this_actor.visible
+        assert (view.actors_df["uid"] == "mesh_0").sum() == 1
+
+        view.set_actor_visible(uid="mesh_0", visible=True)
+        assert view.shown_uids == ["geol_0", "mesh_0"]
@@ -0,0 +1,94 @@
+from copy import deepcopy
+
+import pytest
+from pandas import DataFrame as pd_DataFrame
+from PyQt5.QtCore import QObject, pyqtSignal
+from PyQt5.QtWidgets import QMainWindow, QTreeWidgetItemIterator
+
+from pzero.collections.geological_collection import GeologicalCollection
+from pzero.legend_manager import Legend
+from pzero.windows_factory import BaseView
+
+
+# Class used as a substitute of Legend
+class FakeLegend:
+    def update_widget(self, parent):
+        return
+
+
+# Project window with the geological collection and the signals used by the trees of the views
+class FakeProjectWindow(QObject):
+    geology_added_signal = pyqtSignal(list)
+    geology_removed_signal = pyqtSignal(list)
+
+    def __init__(self):
+        super().__init__()
+        self.geol_legend_df = pd_DataFrame(columns=list(Legend.geol_legend_dict.keys()))
+        self.legend = FakeLegend()
+        self.prop_legend = FakeLegend()
+        self.geol_coll = GeologicalCollection(parent=self)
+
+
+# View with the geology and topology trees only, without canvas, that records the actors shown
+class TreeView(BaseView):
+    def __init__(self, parent=None):
+        QMainWindow.__init__(self)
+        self.setupUi(self)
+        self.parent = parent
+        self.actors_df = pd_DataFrame(
+            columns=["uid", "actor", "show", "collection", "show_prop"]
+        )
+        self.shown_uids = []
+        self.create_geology_tree()
+        self.create_topology_tree()
+        self.parent.geology_added_signal.connect(
+            lambda updated_list: self.geology_added_update_views(
+                updated_list=updated_list
+            )
+        )
+
+    def show_actor_with_property(
+        self, uid=None, collection=None, show_property=None, visible=None
+    ):
+        self.shown_uids.append(uid)
+        return None
+
+    def closeEvent(self, event):
+        event.accept()
+
+
+# Number of items in a tree, at all levels
+def tree_items(tree):
+    items = []
+    iterator = QTreeWidgetItemIterator(tree)
+    while iterator.value():
+        items.append(iterator.value())
+        iterator += 1
+    return items
+
+
+# Class for testing the trees of the views
+class TestViewTrees:
+
+    # a batch of entities added with a single signal adds one item to the trees for each entity
+    def test_geology_added_batch(self, qtbot):
+        parent = FakeProjectWindow()
+        view = TreeView(parent=parent)
+        qtbot.addWidget(view)
+        entity_dicts = []
+        for i in range(4):
+            entity_dict = deepcopy(GeologicalCollection.geological_entity_dict)
+            entity_dict["name"] = f"entity_{i}"
+            entity_dict["geological_feature"] = f"feature_{i % 2}"
+            entity_dicts.append(entity_dict)
+        uids = parent.geol_coll.add_entities_from_dicts(entity_dicts)
+        geology_uids = [
+            item.text(1) for item in tree_items(view.GeologyTreeWidget) if item.text(1)
+        ]
+        topology_uids = [
+            item.text(1) for item in tree_items(view.TopologyTreeWidget) if item.text(1)
+        ]
+
+        assert view.shown_uids == uids
+        assert sorted(geology_uids) == sorted(uids)
+        assert sorted(topology_uids) == sorted(uids)